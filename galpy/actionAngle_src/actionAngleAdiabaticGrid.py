@@ -17,7 +17,9 @@ from scipy import interpolate
 from galpy.actionAngle_src.actionAngleAdiabatic import actionAngleAdiabatic
 from galpy.actionAngle_src.actionAngle import actionAngle, UnboundError
 import galpy.potential
-from galpy.potential_src.Potential import _evaluatePotentials
+from galpy.potential_src.Potential import _evaluatePotentials, _check_c
+import galpy.actionAngle_src.actionAngleAdiabatic_c as actionAngleAdiabatic_c
+from galpy.actionAngle_src.actionAngleAdiabatic_c import _ext_loaded as ext_loaded
 from galpy.util import multi
 _PRINTOUTSIDEGRID= False
 class actionAngleAdiabaticGrid(actionAngle):
@@ -44,7 +46,7 @@ class actionAngleAdiabaticGrid(actionAngle):
 
            numcores= number of cpus to use to parallellize
 
-           c= if True, use C to calculate actions
+           c= if True, use C to calculate actions and to evaluate the interpolation
 
            ro= distance from vantage point to GC (kpc; can be Quantity)
 
@@ -60,6 +62,8 @@ class actionAngleAdiabaticGrid(actionAngle):
 
             2012-07-27 - Written - Bovy (IAS@MPIA)
 
+            2017-10-21 - Evaluate the interpolation in C when c=True - agent
+
         """
         actionAngle.__init__(self,
                              ro=kwargs.get('ro',None),vo=kwargs.get('vo',None))
@@ -194,6 +198,8 @@ class actionAngleAdiabaticGrid(actionAngle):
                                                         y,
                                                         jr,
                                                         kx=3,ky=3,s=0.)
+        # Evaluate the interpolation in C if possible
+        self._cinterp= self._c and ext_loaded and _check_c(self._pot)
         # Check the units
         self._check_consistent_units()
         return None
@@ -214,6 +220,7 @@ class actionAngleAdiabaticGrid(actionAngle):
            (jr,lz,jz)
         HISTORY:
            2012-07-27 - Written - Bovy (IAS@MPIA)
+           2017-10-21 - Evaluate the interpolation in C when c=True - agent
         NOTE:
            For a Miyamoto-Nagai potential, this seems accurate to 0.1% and takes ~0.13 ms
            For a MWPotential, this takes ~ 0.17 ms
@@ -229,6 +236,20 @@ class actionAngleAdiabaticGrid(actionAngle):
             vT= self._eval_vT
             z= self._eval_z
             vz= self._eval_vz
+        if self._cinterp and kwargs.get('c',True) \
+                and isinstance(R,numpy.ndarray):
+            # For a single object, the overhead of calling C outweighs the
+            # gain
+            jr, jz, err= actionAngleAdiabatic_c.actionAngleAdiabaticGrid_c(\
+                self._pot,self._gamma,R,vR,vT,z,vz,
+                self._Rmin,self._Rmax,self._EzZmaxsInterp,self._jzEzmaxInterp,
+                self._jzInterp,self._Lzmin,self._Lzmax,
+                self._ERRLInterp,self._ERRLmax,self._ERRaInterp,self._ERRamax,
+                self._jrERRaInterp,self._jrInterp)
+            if err == 0:
+                return (jr,R*vT,jz)
+            else: #pragma: no cover
+                raise RuntimeError("C-code for calculation actions failed; try with c=False")
         #First work on the vertical action
         Phi= _evaluatePotentials(self._pot,R,z)
         try:
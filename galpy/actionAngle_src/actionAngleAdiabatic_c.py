@@ -6,7 +6,7 @@ import ctypes
 import ctypes.util
 import numpy
 from numpy.ctypeslib import ndpointer
-from galpy.util import galpyWarning
+from galpy.util import galpyWarning, config
 from galpy.orbit_src.integrateFullOrbit import _parse_pot
 #Find and load the library
 _lib= None
@@ -35,6 +35,7 @@ if _lib is None: #pragma: no cover
     _ext_loaded= False
 else:
     _ext_loaded= True
+    config._register_openmp_lib(_lib)
 
 def actionAngleAdiabatic_c(pot,gamma,R,vR,vT,z,vz):
     """
@@ -116,3 +117,127 @@ def actionAngleAdiabatic_c(pot,gamma,R,vR,vT,z,vz):
 
     return (jr,jz,err.value)
 
+
+def actionAngleAdiabaticGrid_c(pot,gamma,R,vR,vT,z,vz,
+                               Rmin,Rmax,EzZmaxsInterp,jzEzmaxInterp,jzInterp,
+                               Lzmin,Lzmax,ERRLInterp,ERRLmax,
+                               ERRaInterp,ERRamax,jrERRaInterp,jrInterp):
+    """
+    NAME:
+       actionAngleAdiabaticGrid_c
+    PURPOSE:
+       Use C to evaluate actions by interpolating the grids of actionAngleAdiabaticGrid, directly calculating the actions of objects outside of the grid
+    INPUT:
+       pot - Potential or list of such instances
+       gamma - as in Lz -> Lz+\gamma * J_z
+       R, vR, vT, z, vz - coordinates (arrays)
+       Rmin, Rmax - range of the R grid for the vertical action
+       EzZmaxsInterp - spline of log(Ez(zmax)) as a function of R
+       jzEzmaxInterp - spline of the log of the maximum jz (+10^-5) as a function of R
+       jzInterp - RectBivariateSpline of the normalized jz on the (R,Ez/Ez(zmax)) grid
+       Lzmin, Lzmax - range of the Lz grid for the radial action
+       ERRLInterp, ERRLmax - spline of log(ERRLmax-E_c(Lz)) and ERRLmax
+       ERRaInterp, ERRamax - spline of log(ERRamax-ER(Ramax;Lz)) and ERRamax
+       jrERRaInterp - spline of the log of the maximum jr (+10^-5) as a function of Lz
+       jrInterp - RectBivariateSpline of the normalized jr on the (Lz,ER) grid
+    OUTPUT:
+       (jr,jz,err)
+       jr,jz : array, shape (len(R))
+       err - non-zero if error occured
+    HISTORY:
+       2017-10-21 - Written - agent
+    """
+    #Parse the potential
+    npot, pot_type, pot_args= _parse_pot(pot,potforactions=True)
+
+    #Set up result arrays
+    jr= numpy.empty(len(R))
+    jz= numpy.empty(len(R))
+    err= ctypes.c_int(0)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleAdiabaticGrid_actionsFunc= _lib.actionAngleAdiabaticGrid_actions
+    actionAngleAdiabaticGrid_actionsFunc.argtypes=\
+        [ctypes.c_int]\
+        +[ndpointer(dtype=numpy.float64,flags=ndarrayFlags)
+          for ii in range(5)]\
+        +[ctypes.c_int,
+          ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_double,
+          ctypes.c_double,
+          ctypes.c_double,
+          ctypes.c_int,
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_int,
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_int,
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_double,
+          ctypes.c_double,
+          ctypes.c_int,
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_double,
+          ctypes.c_double,
+          ctypes.c_int,
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_int,
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.POINTER(ctypes.c_int)]
+
+    #Array requirements
+    R= numpy.require(R,dtype=numpy.float64,requirements=['C','W'])
+    vR= numpy.require(vR,dtype=numpy.float64,requirements=['C','W'])
+    vT= numpy.require(vT,dtype=numpy.float64,requirements=['C','W'])
+    z= numpy.require(z,dtype=numpy.float64,requirements=['C','W'])
+    vz= numpy.require(vz,dtype=numpy.float64,requirements=['C','W'])
+    # The splines in R and those in Lz share their knots
+    tR= numpy.require(EzZmaxsInterp._eval_args[0],dtype=numpy.float64,
+                      requirements=['C','W'])
+    Rcoeffs= numpy.require(numpy.array([EzZmaxsInterp._eval_args[1],
+                                        jzEzmaxInterp._eval_args[1]]),
+                           dtype=numpy.float64,requirements=['C','W'])
+    tRz= numpy.require(jzInterp.tck[0],dtype=numpy.float64,
+                       requirements=['C','W'])
+    tEz= numpy.require(jzInterp.tck[1],dtype=numpy.float64,
+                       requirements=['C','W'])
+    jzcoeffs= numpy.require(jzInterp.tck[2],dtype=numpy.float64,
+                            requirements=['C','W'])
+    tLz= numpy.require(ERRLInterp._eval_args[0],dtype=numpy.float64,
+                       requirements=['C','W'])
+    Lzcoeffs= numpy.require(numpy.array([ERRLInterp._eval_args[1],
+                                         ERRaInterp._eval_args[1],
+                                         jrERRaInterp._eval_args[1]]),
+                            dtype=numpy.float64,requirements=['C','W'])
+    tLzr= numpy.require(jrInterp.tck[0],dtype=numpy.float64,
+                        requirements=['C','W'])
+    tER= numpy.require(jrInterp.tck[1],dtype=numpy.float64,
+                       requirements=['C','W'])
+    jrcoeffs= numpy.require(jrInterp.tck[2],dtype=numpy.float64,
+                            requirements=['C','W'])
+
+    #Run the C code
+    actionAngleAdiabaticGrid_actionsFunc(len(R),R,vR,vT,z,vz,
+                                         ctypes.c_int(npot),pot_type,pot_args,
+                                         ctypes.c_double(gamma),
+                                         ctypes.c_double(Rmin),
+                                         ctypes.c_double(Rmax),
+                                         ctypes.c_int(len(tR)),tR,Rcoeffs,
+                                         ctypes.c_int(len(tEz)),tEz,
+                                         ctypes.c_int(len(tRz)),tRz,jzcoeffs,
+                                         ctypes.c_double(Lzmin),
+                                         ctypes.c_double(Lzmax),
+                                         ctypes.c_int(len(tLz)),tLz,Lzcoeffs,
+                                         ctypes.c_double(ERRLmax),
+                                         ctypes.c_double(ERRamax),
+                                         ctypes.c_int(len(tER)),tER,
+                                         ctypes.c_int(len(tLzr)),tLzr,jrcoeffs,
+                                         jr,jz,ctypes.byref(err))
+    return (jr,jz,err.value)
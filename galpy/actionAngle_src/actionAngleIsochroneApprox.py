@@ -21,11 +21,17 @@ from galpy.potential import dvcircdR, vcirc, _isNonAxi
 from galpy.actionAngle_src.actionAngleIsochrone import actionAngleIsochrone
 from galpy.actionAngle_src.actionAngle import actionAngle
 from galpy.potential import IsochronePotential, MWPotential
+from galpy.potential_src.Potential import _check_c
+from galpy.actionAngle_src import actionAngleIsochroneApprox_c
+from galpy.actionAngle_src.actionAngleIsochroneApprox_c import \
+    _ext_loaded as ext_loaded
 from galpy.util import bovy_plot, galpyWarning
 from galpy.util.bovy_conversion import physical_conversion, \
     potential_physical_input, time_in_Gyr
 _TWOPI= 2.*nu.pi
 _ANGLETOL= 0.02 #tolerance for deciding whether full angle range is covered
+_C_INTEGRATORS= ['leapfrog_c','rk4_c','rk6_c','symplec4_c','symplec6_c',
+                 'dopr54_c']
 _APY_LOADED= True
 try:
     from astropy import units
@@ -61,6 +67,8 @@ class actionAngleIsochroneApprox(actionAngle):
 
            maxn= (default: 3) Default value for all methods when using a grid in vec(n) up to this n (zero-based)
 
+           c= (True) if True, use C to integrate the orbits and compute the actions, frequencies, and angles without storing the orbits (only for phase-space inputs and C integrators)
+
            ro= distance from vantage point to GC (kpc; can be Quantity)
 
            vo= circular velocity at ro (km/s; can be Quantity)
@@ -71,6 +79,7 @@ class actionAngleIsochroneApprox(actionAngle):
 
         HISTORY:
            2013-09-10 - Written - Bovy (IAS)
+           2017-10-12 - Added C implementation - agent
         """
         actionAngle.__init__(self,
                              ro=kwargs.get('ro',None),vo=kwargs.get('vo',None))
@@ -108,11 +117,12 @@ class actionAngleIsochroneApprox(actionAngle):
         self._tsJ= nu.linspace(0.,self._tintJ,self._ntintJ)
         self._integrate_method= kwargs.get('integrate_method','dopr54_c')
         self._maxn= kwargs.get('maxn',3)
-        self._c= False
-        ext_loaded= False
         if ext_loaded and (('c' in kwargs and kwargs['c'])
-                           or not 'c' in kwargs): #pragma: no cover
-            self._c= True
+                           or not 'c' in kwargs):
+            self._c= _check_c(self._pot) \
+                and self._integrate_method.lower() in _C_INTEGRATORS
+            if 'c' in kwargs and kwargs['c'] and not self._c:
+                warnings.warn("C module not used because potential does not have a C implementation or integrate_method is not a C integrator",galpyWarning) #pragma: no cover
         else:
             self._c= False
         # Check the units
@@ -140,10 +150,21 @@ class actionAngleIsochroneApprox(actionAngle):
         HISTORY:
            2013-09-10 - Written - Bovy (IAS)
         """
-        R,vR,vT,z,vz,phi= self._parse_args(False,False,*args)
-        if self._c: #pragma: no cover
-            pass
+        if self._c and not kwargs.get('cumul',False) and _c_input(*args):
+            R,vR,vT,z,vz,phi= [nu.atleast_1d(nu.array(x,dtype='float'))
+                               for x in args]
+            nonaxi= _isNonAxi(self._pot)
+            jr,lz,jz,warn,err= \
+                actionAngleIsochroneApprox_c.actionAngleIsochroneApprox_c(\
+                self._pot,self._aAI.b,self._aAI.amp,R,vR,vT,z,vz,phi,
+                self._tsJ,self._integrate_method,dt=self._integrate_dt,
+                nonaxi=nonaxi)
+            _warn_coverage(warn,nonaxi)
+            if not nonaxi:
+                lz= R*vT
+            return (jr,lz,jz)
         else:
+            R,vR,vT,z,vz,phi= self._parse_args(False,False,*args)
             #Use self._aAI to calculate the actions and angles in the isochrone potential
             acfs= self._aAI._actionsFreqsAngles(R.flatten(),
                                                 vR.flatten(),
@@ -228,6 +249,22 @@ class actionAngleIsochroneApprox(actionAngle):
         """
         from galpy.orbit import Orbit
         _firstFlip= kwargs.get('_firstFlip',False)
+        maxn= kwargs.get('maxn',self._maxn)
+        if self._c and not _firstFlip and kwargs.get('ts',None) is None \
+                and not '_acfs' in kwargs and not kwargs.get('_retacfs',False)\
+                and _c_input(*args):
+            R,vR,vT,z,vz,phi= [nu.atleast_1d(nu.array(x,dtype='float'))
+                               for x in args]
+            nonaxi= _isNonAxi(self._pot)
+            gridR, gridZ, gridphi= _angleFitGrid(maxn,nonaxi)
+            out= actionAngleIsochroneApprox_c.actionAngleFreqAngleIsochroneApprox_c(\
+                self._pot,self._aAI.b,self._aAI.amp,R,vR,vT,z,vz,phi,
+                self._tsJ,self._integrate_method,gridR,gridZ,gridphi,
+                dt=self._integrate_dt,nonaxi=nonaxi)
+            _warn_coverage(out[-2],nonaxi)
+            if not nonaxi:
+                out= (out[0],R*vT)+out[2:]
+            return out[:9]
         #If the orbit was already integrated, set ts to the integration times
         if isinstance(args[0],Orbit) and hasattr(args[0]._orb,'orbit') \
                 and not 'ts' in kwargs:
@@ -246,122 +283,95 @@ class actionAngleIsochroneApprox(actionAngle):
             ts= nu.empty(R.shape[1])
             ts[self._ntintJ-1:]= self._tsJ
             ts[:self._ntintJ-1]= -self._tsJ[1:][::-1]
-        maxn= kwargs.get('maxn',self._maxn)
-        if self._c: #pragma: no cover
-            pass
+        #Use self._aAI to calculate the actions and angles in the isochrone potential
+        if '_acfs' in kwargs: acfs= kwargs['_acfs']
         else:
-            #Use self._aAI to calculate the actions and angles in the isochrone potential
-            if '_acfs' in kwargs: acfs= kwargs['_acfs']
-            else:
-                acfs= self._aAI._actionsFreqsAngles(R.flatten(),
-                                                    vR.flatten(),
-                                                    vT.flatten(),
-                                                    z.flatten(),
-                                                    vz.flatten(),
-                                                    phi.flatten())
-            jrI= nu.reshape(acfs[0],R.shape)[:,:-1]
-            jzI= nu.reshape(acfs[2],R.shape)[:,:-1]
-            anglerI= nu.reshape(acfs[6],R.shape)
-            anglezI= nu.reshape(acfs[8],R.shape)
-            if nu.any((nu.fabs(nu.amax(anglerI,axis=1)-_TWOPI) > _ANGLETOL)\
-                          *(nu.fabs(nu.amin(anglerI,axis=1)) > _ANGLETOL)): #pragma: no cover
-                warnings.warn("Full radial angle range not covered for at least one object; actions are likely not reliable",galpyWarning)
-            if nu.any((nu.fabs(nu.amax(anglezI,axis=1)-_TWOPI) > _ANGLETOL)\
-                          *(nu.fabs(nu.amin(anglezI,axis=1)) > _ANGLETOL)): #pragma: no cover
-                warnings.warn("Full vertical angle range not covered for at least one object; actions are likely not reliable",galpyWarning)
-            danglerI= ((nu.roll(anglerI,-1,axis=1)-anglerI) % _TWOPI)[:,:-1]
-            danglezI= ((nu.roll(anglezI,-1,axis=1)-anglezI) % _TWOPI)[:,:-1]
-            jr= nu.sum(jrI*danglerI,axis=1)/nu.sum(danglerI,axis=1)
-            jz= nu.sum(jzI*danglezI,axis=1)/nu.sum(danglezI,axis=1)
-            if _isNonAxi(self._pot): #pragma: no cover
-                lzI= nu.reshape(acfs[1],R.shape)[:,:-1]
-                anglephiI= nu.reshape(acfs[7],R.shape)
-                if nu.any((nu.fabs(nu.amax(anglephiI,axis=1)-_TWOPI) > _ANGLETOL)\
-                              *(nu.fabs(nu.amin(anglephiI,axis=1)) > _ANGLETOL)): #pragma: no cover
-                    warnings.warn("Full azimuthal angle range not covered for at least one object; actions are likely not reliable",galpyWarning)
-                danglephiI= ((nu.roll(anglephiI,-1,axis=1)-anglephiI) % _TWOPI)[:,:-1]
-                lz= nu.sum(lzI*danglephiI,axis=1)/nu.sum(danglephiI,axis=1)
-            else:
-                lz= R[:,len(ts)//2]*vT[:,len(ts)//2]
-            #Now do an 'angle-fit'
-            angleRT= dePeriod(nu.reshape(acfs[6],R.shape))
-            acfs7= nu.reshape(acfs[7],R.shape)
-            negFreqIndx= nu.median(acfs7-nu.roll(acfs7,1,axis=1),axis=1) < 0. #anglephi is decreasing
-            anglephiT= nu.empty(acfs7.shape)
-            anglephiT[negFreqIndx,:]= dePeriod(_TWOPI-acfs7[negFreqIndx,:])
-            negFreqPhi= nu.zeros(R.shape[0],dtype='bool')
-            negFreqPhi[negFreqIndx]= True
-            anglephiT[True^negFreqIndx,:]= dePeriod(acfs7[True^negFreqIndx,:])
-            angleZT= dePeriod(nu.reshape(acfs[8],R.shape))
-            #Write the angle-fit as Y=AX, build A and Y
-            nt= len(ts)
-            no= R.shape[0]
-            #remove 0,0,0 and half-plane
-            if _isNonAxi(self._pot):
-                nn= (2*maxn-1)**2*maxn-(maxn-1)*(2*maxn-1)-maxn
-            else:
-                nn= maxn*(2*maxn-1)-maxn 
-            A= nu.zeros((no,nt,2+nn))
-            A[:,:,0]= 1.
-            A[:,:,1]= ts
-            #sorting the phi and Z grids this way makes it easy to exclude the origin
-            phig= list(nu.arange(-maxn+1,maxn,1))
-            phig.sort(key = lambda x: abs(x))
-            phig= nu.array(phig,dtype='int')
-            if _isNonAxi(self._pot):
-                grid= nu.meshgrid(nu.arange(maxn),phig,phig)
-            else:
-                grid= nu.meshgrid(nu.arange(maxn),phig)
-            gridR= grid[0].T.flatten()[1:] #remove 0,0,0
-            gridZ= grid[1].T.flatten()[1:]
-            mask = nu.ones(len(gridR),dtype=bool)
-            # excludes axis that is not in half-space
-            if _isNonAxi(self._pot):
-                gridphi= grid[2].T.flatten()[1:]
-                mask= True\
-                    ^(gridR == 0)*((gridphi < 0)+((gridphi==0)*(gridZ < 0)))
-            else:
-                mask[:2*maxn-3:2]= False
-            gridR= gridR[mask]
-            gridZ= gridZ[mask]
-            tangleR= nu.tile(angleRT.T,(nn,1,1)).T
-            tgridR= nu.tile(gridR,(no,nt,1))
-            tangleZ= nu.tile(angleZT.T,(nn,1,1)).T
-            tgridZ= nu.tile(gridZ,(no,nt,1))
-            if _isNonAxi(self._pot):
-                gridphi= gridphi[mask]
-                tgridphi= nu.tile(gridphi,(no,nt,1))
-                tanglephi= nu.tile(anglephiT.T,(nn,1,1)).T
-                sinnR= nu.sin(tgridR*tangleR+tgridphi*tanglephi+tgridZ*tangleZ)
-            else:
-                sinnR= nu.sin(tgridR*tangleR+tgridZ*tangleZ)
-            A[:,:,2:]= sinnR
-            #Matrix magic
-            atainv= nu.empty((no,2+nn,2+nn))
-            AT= nu.transpose(A,axes=(0,2,1))
-            for ii in range(no):
-                atainv[ii,:,:,]= linalg.inv(nu.dot(AT[ii,:,:],A[ii,:,:]))
-            ATAR= nu.sum(AT*nu.transpose(nu.tile(angleRT,(2+nn,1,1)),axes=(1,0,2)),axis=2)
-            ATAT= nu.sum(AT*nu.transpose(nu.tile(anglephiT,(2+nn,1,1)),axes=(1,0,2)),axis=2)
-            ATAZ= nu.sum(AT*nu.transpose(nu.tile(angleZT,(2+nn,1,1)),axes=(1,0,2)),axis=2)
-            angleR= nu.sum(atainv[:,0,:]*ATAR,axis=1)
-            OmegaR= nu.sum(atainv[:,1,:]*ATAR,axis=1)
-            anglephi= nu.sum(atainv[:,0,:]*ATAT,axis=1)
-            Omegaphi= nu.sum(atainv[:,1,:]*ATAT,axis=1)
-            angleZ= nu.sum(atainv[:,0,:]*ATAZ,axis=1)
-            OmegaZ= nu.sum(atainv[:,1,:]*ATAZ,axis=1)
-            Omegaphi[negFreqIndx]= -Omegaphi[negFreqIndx]
-            anglephi[negFreqIndx]= _TWOPI-anglephi[negFreqIndx]
-            if kwargs.get('_retacfs',False):
-                return (jr,lz,jz,OmegaR,Omegaphi,OmegaZ, #pragma: no cover
-                        angleR % _TWOPI,
-                        anglephi % _TWOPI,
-                        angleZ % _TWOPI,acfs)
-            else:
-                return (jr,lz,jz,OmegaR,Omegaphi,OmegaZ,
-                        angleR % _TWOPI,
-                        anglephi % _TWOPI,
-                        angleZ % _TWOPI)
+            acfs= self._aAI._actionsFreqsAngles(R.flatten(),
+                                                vR.flatten(),
+                                                vT.flatten(),
+                                                z.flatten(),
+                                                vz.flatten(),
+                                                phi.flatten())
+        jrI= nu.reshape(acfs[0],R.shape)[:,:-1]
+        jzI= nu.reshape(acfs[2],R.shape)[:,:-1]
+        anglerI= nu.reshape(acfs[6],R.shape)
+        anglezI= nu.reshape(acfs[8],R.shape)
+        if nu.any((nu.fabs(nu.amax(anglerI,axis=1)-_TWOPI) > _ANGLETOL)\
+                      *(nu.fabs(nu.amin(anglerI,axis=1)) > _ANGLETOL)): #pragma: no cover
+            warnings.warn("Full radial angle range not covered for at least one object; actions are likely not reliable",galpyWarning)
+        if nu.any((nu.fabs(nu.amax(anglezI,axis=1)-_TWOPI) > _ANGLETOL)\
+                      *(nu.fabs(nu.amin(anglezI,axis=1)) > _ANGLETOL)): #pragma: no cover
+            warnings.warn("Full vertical angle range not covered for at least one object; actions are likely not reliable",galpyWarning)
+        danglerI= ((nu.roll(anglerI,-1,axis=1)-anglerI) % _TWOPI)[:,:-1]
+        danglezI= ((nu.roll(anglezI,-1,axis=1)-anglezI) % _TWOPI)[:,:-1]
+        jr= nu.sum(jrI*danglerI,axis=1)/nu.sum(danglerI,axis=1)
+        jz= nu.sum(jzI*danglezI,axis=1)/nu.sum(danglezI,axis=1)
+        if _isNonAxi(self._pot): #pragma: no cover
+            lzI= nu.reshape(acfs[1],R.shape)[:,:-1]
+            anglephiI= nu.reshape(acfs[7],R.shape)
+            if nu.any((nu.fabs(nu.amax(anglephiI,axis=1)-_TWOPI) > _ANGLETOL)\
+                          *(nu.fabs(nu.amin(anglephiI,axis=1)) > _ANGLETOL)): #pragma: no cover
+                warnings.warn("Full azimuthal angle range not covered for at least one object; actions are likely not reliable",galpyWarning)
+            danglephiI= ((nu.roll(anglephiI,-1,axis=1)-anglephiI) % _TWOPI)[:,:-1]
+            lz= nu.sum(lzI*danglephiI,axis=1)/nu.sum(danglephiI,axis=1)
+        else:
+            lz= R[:,len(ts)//2]*vT[:,len(ts)//2]
+        #Now do an 'angle-fit'
+        angleRT= dePeriod(nu.reshape(acfs[6],R.shape))
+        acfs7= nu.reshape(acfs[7],R.shape)
+        negFreqIndx= nu.median(acfs7-nu.roll(acfs7,1,axis=1),axis=1) < 0. #anglephi is decreasing
+        anglephiT= nu.empty(acfs7.shape)
+        anglephiT[negFreqIndx,:]= dePeriod(_TWOPI-acfs7[negFreqIndx,:])
+        negFreqPhi= nu.zeros(R.shape[0],dtype='bool')
+        negFreqPhi[negFreqIndx]= True
+        anglephiT[True^negFreqIndx,:]= dePeriod(acfs7[True^negFreqIndx,:])
+        angleZT= dePeriod(nu.reshape(acfs[8],R.shape))
+        #Write the angle-fit as Y=AX, build A and Y
+        nt= len(ts)
+        no= R.shape[0]
+        #remove 0,0,0 and half-plane
+        gridR, gridZ, gridphi= _angleFitGrid(maxn,_isNonAxi(self._pot))
+        nn= len(gridR)
+        A= nu.zeros((no,nt,2+nn))
+        A[:,:,0]= 1.
+        A[:,:,1]= ts
+        tangleR= nu.tile(angleRT.T,(nn,1,1)).T
+        tgridR= nu.tile(gridR,(no,nt,1))
+        tangleZ= nu.tile(angleZT.T,(nn,1,1)).T
+        tgridZ= nu.tile(gridZ,(no,nt,1))
+        if _isNonAxi(self._pot):
+            tgridphi= nu.tile(gridphi,(no,nt,1))
+            tanglephi= nu.tile(anglephiT.T,(nn,1,1)).T
+            sinnR= nu.sin(tgridR*tangleR+tgridphi*tanglephi+tgridZ*tangleZ)
+        else:
+            sinnR= nu.sin(tgridR*tangleR+tgridZ*tangleZ)
+        A[:,:,2:]= sinnR
+        #Matrix magic
+        atainv= nu.empty((no,2+nn,2+nn))
+        AT= nu.transpose(A,axes=(0,2,1))
+        for ii in range(no):
+            atainv[ii,:,:,]= linalg.inv(nu.dot(AT[ii,:,:],A[ii,:,:]))
+        ATAR= nu.sum(AT*nu.transpose(nu.tile(angleRT,(2+nn,1,1)),axes=(1,0,2)),axis=2)
+        ATAT= nu.sum(AT*nu.transpose(nu.tile(anglephiT,(2+nn,1,1)),axes=(1,0,2)),axis=2)
+        ATAZ= nu.sum(AT*nu.transpose(nu.tile(angleZT,(2+nn,1,1)),axes=(1,0,2)),axis=2)
+        angleR= nu.sum(atainv[:,0,:]*ATAR,axis=1)
+        OmegaR= nu.sum(atainv[:,1,:]*ATAR,axis=1)
+        anglephi= nu.sum(atainv[:,0,:]*ATAT,axis=1)
+        Omegaphi= nu.sum(atainv[:,1,:]*ATAT,axis=1)
+        angleZ= nu.sum(atainv[:,0,:]*ATAZ,axis=1)
+        OmegaZ= nu.sum(atainv[:,1,:]*ATAZ,axis=1)
+        Omegaphi[negFreqIndx]= -Omegaphi[negFreqIndx]
+        anglephi[negFreqIndx]= _TWOPI-anglephi[negFreqIndx]
+        if kwargs.get('_retacfs',False):
+            return (jr,lz,jz,OmegaR,Omegaphi,OmegaZ, #pragma: no cover
+                    angleR % _TWOPI,
+                    anglephi % _TWOPI,
+                    angleZ % _TWOPI,acfs)
+        else:
+            return (jr,lz,jz,OmegaR,Omegaphi,OmegaZ,
+                    angleR % _TWOPI,
+                    anglephi % _TWOPI,
+                    angleZ % _TWOPI)
 
     def plot(self,*args,**kwargs):
         """
@@ -758,6 +768,45 @@ def estimateBIsochrone(pot,R,z,phi=None):
             b= nu.nan
         return b
 
+def _angleFitGrid(maxn,nonaxi):
+    """Integer vectors n of the sin(n.angle) terms in the angle fit, excluding the origin and the half-space; returns (gridR,gridZ,gridphi), gridphi is all zero if not nonaxi"""
+    #sorting the phi and Z grids this way makes it easy to exclude the origin
+    phig= list(nu.arange(-maxn+1,maxn,1))
+    phig.sort(key = lambda x: abs(x))
+    phig= nu.array(phig,dtype='int')
+    if nonaxi:
+        grid= nu.meshgrid(nu.arange(maxn),phig,phig)
+    else:
+        grid= nu.meshgrid(nu.arange(maxn),phig)
+    gridR= grid[0].T.flatten()[1:] #remove 0,0,0
+    gridZ= grid[1].T.flatten()[1:]
+    mask = nu.ones(len(gridR),dtype=bool)
+    # excludes axis that is not in half-space
+    if nonaxi:
+        gridphi= grid[2].T.flatten()[1:]
+        mask= True\
+            ^(gridR == 0)*((gridphi < 0)+((gridphi==0)*(gridZ < 0)))
+    else:
+        gridphi= nu.zeros(len(gridR),dtype='int')
+        mask[:2*maxn-3:2]= False
+    return (gridR[mask],gridZ[mask],gridphi[mask])
+
+def _c_input(*args):
+    """Whether the input consists of phase-space points that the C code can handle"""
+    return len(args) == 6 and (isinstance(args[0],float)
+                               or (isinstance(args[0],nu.ndarray)
+                                   and len(args[0].shape) == 1))
+
+def _warn_coverage(warn,nonaxi):
+    """Issue the angle-coverage warnings for the bitmasks returned by the C code"""
+    if nu.any(warn & 1): #pragma: no cover
+        warnings.warn("Full radial angle range not covered for at least one object; actions are likely not reliable",galpyWarning)
+    if nu.any(warn & 2): #pragma: no cover
+        warnings.warn("Full vertical angle range not covered for at least one object; actions are likely not reliable",galpyWarning)
+    if nonaxi and nu.any(warn & 4): #pragma: no cover
+        warnings.warn("Full azimuthal angle range not covered for at least one object; actions are likely not reliable",galpyWarning)
+    return None
+
 def dePeriod(arr):
     """make an array of periodic angles increase linearly"""
     diff= arr-nu.roll(arr,1,axis=1)
@@ -0,0 +1,170 @@
+import os
+import sys
+import sysconfig
+import warnings
+import ctypes
+import ctypes.util
+import numpy
+from numpy.ctypeslib import ndpointer
+from galpy.util import galpyWarning, config
+from galpy.orbit_src.integrateFullOrbit import _parse_pot
+from galpy.orbit_src.integratePlanarOrbit import _parse_integrator, _parse_tol
+#Find and load the library
+_lib= None
+outerr= None
+PY3= sys.version > '3'
+if PY3: #pragma: no cover
+    _ext_suffix= sysconfig.get_config_var('EXT_SUFFIX')
+else:
+    _ext_suffix= '.so'
+for path in sys.path:
+    try:
+        _lib = ctypes.CDLL(os.path.join(path,'galpy_actionAngle_c%s' % _ext_suffix))
+    except OSError as e:
+        if os.path.exists(os.path.join(path,'galpy_actionAngle_c%s' % _ext_suffix)): #pragma: no cover
+            outerr= e
+        _lib = None
+    else:
+        break
+if _lib is None: #pragma: no cover
+    if not outerr is None:
+        warnings.warn("actionAngleIsochroneApprox_c extension module not loaded, because of error '%s' " % outerr,
+                      galpyWarning)
+    else:
+        warnings.warn("actionAngleIsochroneApprox_c extension module not loaded, because galpy_actionAngle_c%s image was not found" % _ext_suffix,
+                      galpyWarning)
+    _ext_loaded= False
+else:
+    _ext_loaded= True
+    config._register_openmp_lib(_lib)
+
+def actionAngleIsochroneApprox_c(pot,b,amp,R,vR,vT,z,vz,phi,ts,int_method,
+                                 dt=None,nonaxi=False):
+    """
+    NAME:
+       actionAngleIsochroneApprox_c
+    PURPOSE:
+       Use C to calculate actions by integrating orbits and averaging the isochrone actions along the orbit, without storing the orbit
+    INPUT:
+       pot - Potential or list of such instances
+       b, amp - scale parameter and amplitude of the isochrone potential
+       R, vR, vT, z, vz, phi - initial conditions (arrays)
+       ts - times at which to evaluate the orbit (starting at zero)
+       int_method - C integration method ('dopr54_c', ...)
+       dt= (None) orbit.integrate dt keyword
+       nonaxi= (False) if True, the potential is non-axisymmetric and lz is averaged as well
+    OUTPUT:
+       (jr,lz,jz,warn,err)
+       jr,lz,jz : array, shape (len(R))
+       warn - array of bitmasks indicating whether the full range of angler (1), anglez (2), and anglephi (4) was not covered
+       err - non-zero if error occured
+    HISTORY:
+       2017-10-12 - Written - agent
+    """
+    return _actionAngleIsochroneApprox_c_call(\
+        'actionAngleIsochroneApprox_actions',3,pot,b,amp,R,vR,vT,z,vz,phi,
+        ts,int_method,dt,nonaxi)
+
+def actionAngleFreqAngleIsochroneApprox_c(pot,b,amp,R,vR,vT,z,vz,phi,ts,
+                                          int_method,gridR,gridZ,gridphi,
+                                          dt=None,nonaxi=False):
+    """
+    NAME:
+       actionAngleFreqAngleIsochroneApprox_c
+    PURPOSE:
+       Use C to calculate actions, frequencies, and angles by integrating orbits forward and backward in time and fitting the isochrone angles along the orbit, without storing the orbit
+    INPUT:
+       pot - Potential or list of such instances
+       b, amp - scale parameter and amplitude of the isochrone potential
+       R, vR, vT, z, vz, phi - initial conditions (arrays)
+       ts - times at which to evaluate the orbit (starting at zero; the orbit is evaluated at -ts as well)
+       int_method - C integration method ('dopr54_c', ...)
+       gridR, gridZ, gridphi - integer vectors n of the sin(n.angle) terms in the angle fit (gridphi is ignored unless nonaxi)
+       dt= (None) orbit.integrate dt keyword
+       nonaxi= (False) if True, the potential is non-axisymmetric and lz is averaged as well
+    OUTPUT:
+       (jr,lz,jz,Omegar,Omegaphi,Omegaz,angler,anglephi,anglez,warn,err)
+       jr,... : array, shape (len(R))
+       warn - array of bitmasks indicating whether the full range of angler (1), anglez (2), and anglephi (4) was not covered
+       err - non-zero if error occured
+    HISTORY:
+       2017-10-12 - Written - agent
+    """
+    return _actionAngleIsochroneApprox_c_call(\
+        'actionAngleIsochroneApprox_actionsFreqsAngles',9,
+        pot,b,amp,R,vR,vT,z,vz,phi,ts,int_method,dt,nonaxi,
+        grids=(gridR,gridZ,gridphi))
+
+def _actionAngleIsochroneApprox_c_call(funcname,nout,pot,b,amp,
+                                       R,vR,vT,z,vz,phi,ts,int_method,dt,
+                                       nonaxi,grids=None):
+    """Set up and run the C code for nout output arrays"""
+    #Parse the potential and the integrator
+    npot, pot_type, pot_args= _parse_pot(pot)
+    rtol, atol= _parse_tol(None,None)
+    int_method_c= _parse_integrator(int_method)
+    if dt is None:
+        dt= -9999.99
+
+    #Set up result arrays
+    out= [numpy.empty(len(R)) for ii in range(nout)]
+    warn= numpy.zeros(len(R),dtype=numpy.int32)
+    err= numpy.zeros(len(R),dtype=numpy.int32)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleIsochroneApprox_Func= getattr(_lib,funcname)
+    argtypes= [ctypes.c_int]\
+        +[ndpointer(dtype=numpy.float64,flags=ndarrayFlags)
+          for ii in range(6)]\
+        +[ctypes.c_int,
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_double,
+          ctypes.c_double,
+          ctypes.c_double,
+          ctypes.c_int,
+          ctypes.c_int,
+          ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_double,
+          ctypes.c_double,
+          ctypes.c_int]
+    if not grids is None:
+        argtypes.append(ctypes.c_int)
+        argtypes.extend([ndpointer(dtype=numpy.int32,flags=ndarrayFlags)
+                         for ii in range(3)])
+    argtypes.extend([ndpointer(dtype=numpy.float64,flags=ndarrayFlags)
+                     for ii in range(nout)])
+    argtypes.extend([ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+                     ndpointer(dtype=numpy.int32,flags=ndarrayFlags)])
+    actionAngleIsochroneApprox_Func.argtypes= argtypes
+
+    #Array requirements
+    R= numpy.require(R,dtype=numpy.float64,requirements=['C','W'])
+    vR= numpy.require(vR,dtype=numpy.float64,requirements=['C','W'])
+    vT= numpy.require(vT,dtype=numpy.float64,requirements=['C','W'])
+    z= numpy.require(z,dtype=numpy.float64,requirements=['C','W'])
+    vz= numpy.require(vz,dtype=numpy.float64,requirements=['C','W'])
+    phi= numpy.require(phi,dtype=numpy.float64,requirements=['C','W'])
+    ts= numpy.require(ts,dtype=numpy.float64,requirements=['C','W'])
+    gridargs= []
+    if not grids is None:
+        gridargs.append(ctypes.c_int(len(grids[0])))
+        gridargs.extend([numpy.require(grid,dtype=numpy.int32,
+                                       requirements=['C','W'])
+                         for grid in grids])
+
+    #Run the C code
+    actionAngleIsochroneApprox_Func(len(R),R,vR,vT,z,vz,phi,
+                                    ctypes.c_int(len(ts)),ts,
+                                    ctypes.c_double(dt),
+                                    ctypes.c_double(rtol),
+                                    ctypes.c_double(atol),
+                                    ctypes.c_int(int_method_c),
+                                    ctypes.c_int(npot),pot_type,pot_args,
+                                    ctypes.c_double(amp),ctypes.c_double(b),
+                                    ctypes.c_int(nonaxi),
+                                    *(gridargs+out+[warn,err]))
+    if numpy.any(err == -10): #pragma: no cover
+        raise KeyboardInterrupt("Orbit integration interrupted by CTRL-C (SIGINT)")
+    return tuple(out+[warn,err])
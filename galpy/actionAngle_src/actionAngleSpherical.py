@@ -11,12 +11,17 @@
 ###############################################################################
 import copy
 import math as m
+import warnings
 import numpy as nu
 from scipy import integrate
+from galpy.util import galpyWarning
 from galpy.potential import epifreq, omegac
 from galpy.potential_src.Potential import _evaluatePotentials
 from galpy.actionAngle_src.actionAngle import *
 from galpy.actionAngle_src.actionAngleAxi import actionAngleAxi, potentialAxi
+import galpy.actionAngle_src.actionAngleSpherical_c as actionAngleSpherical_c
+from galpy.actionAngle_src.actionAngleSpherical_c import _ext_loaded as ext_loaded
+from galpy.potential_src.Potential import _check_c
 class actionAngleSpherical(actionAngle):
     """Action-angle formalism for spherical potentials"""
     def __init__(self,*args,**kwargs):
@@ -33,6 +38,10 @@ class actionAngleSpherical(actionAngle):
 
            pot= a Spherical potential
 
+           c= if True, always use C for calculations (default: use C when the potential has a C implementation)
+
+           order= (50) number of Gauss-Legendre points to use in each integral in C
+
            ro= distance from vantage point to GC (kpc; can be Quantity)
 
            vo= circular velocity at ro (km/s; can be Quantity)
@@ -45,6 +54,8 @@ class actionAngleSpherical(actionAngle):
 
            2013-12-28 - Written - Bovy (IAS)
 
+           2017-10-02 - Added C implementation - agent
+
         """
         actionAngle.__init__(self,
                              ro=kwargs.get('ro',None),vo=kwargs.get('vo',None))
@@ -56,14 +67,14 @@ class actionAngleSpherical(actionAngle):
             self._2dpot= [p.toPlanar() for p in self._pot]
         else:
             self._2dpot= self._pot.toPlanar()
-        #The following for if we ever implement this code in C
-        self._c= False
-        ext_loaded= False
         if ext_loaded and (('c' in kwargs and kwargs['c'])
                            or not 'c' in kwargs):
-            self._c= True #pragma: no cover
+            self._c= _check_c(self._pot)
+            if 'c' in kwargs and kwargs['c'] and not self._c:
+                warnings.warn("C module not used because potential does not have a C implementation",galpyWarning) #pragma: no cover
         else:
             self._c= False
+        self._order= kwargs.get('order',50)
         # Check the units
         self._check_consistent_units()
         return None
@@ -80,6 +91,7 @@ class actionAngleSpherical(actionAngle):
               b) Orbit instance: initial condition used if that's it, orbit(t)
                  if there is a time given as well
            fixed_quad= (False) if True, use n=10 fixed_quad integration
+           c= True/False; overrides the object's c= keyword to use C or not
            scipy.integrate.quadrature keywords
         OUTPUT:
            (jr,lz,jz)
@@ -87,6 +99,7 @@ class actionAngleSpherical(actionAngle):
            2013-12-28 - Written - Bovy (IAS)
         """
         fixed_quad= kwargs.pop('fixed_quad',False)
+        use_c= kwargs.pop('c',self._c) and ext_loaded and _check_c(self._pot)
         if len(args) == 5: #R,vR.vT, z, vz
             R,vR,vT, z, vz= args
         elif len(args) == 6: #R,vR.vT, z, vz, phi
@@ -104,8 +117,17 @@ class actionAngleSpherical(actionAngle):
             vT= nu.array([vT])
             z= nu.array([z])
             vz= nu.array([vz])
-        if self._c: #pragma: no cover
-            pass
+        if use_c:
+            Lz= R*vT
+            Lx= -z*vT
+            Ly= z*vR-R*vz
+            L= nu.sqrt(Lx*Lx+Ly*Ly+Lz*Lz)
+            Jr, err= actionAngleSpherical_c.actionAngleSpherical_c(\
+                self._pot,R,vR,vT,z,vz,order=self._order)
+            if err == 0:
+                return (Jr,Lz,L-nu.fabs(Lz))
+            else: #pragma: no cover
+                raise RuntimeError("C-code for calculation actions failed; try with c=False")
         else:
             Lz= R*vT
             Lx= -z*vT
@@ -144,6 +166,7 @@ class actionAngleSpherical(actionAngle):
               b) Orbit instance: initial condition used if that's it, orbit(t)
                  if there is a time given as well
            fixed_quad= (False) if True, use n=10 fixed_quad integration
+           c= True/False; overrides the object's c= keyword to use C or not
            scipy.integrate.quadrature keywords
         OUTPUT:
             (jr,lz,jz,Omegar,Omegaphi,Omegaz)
@@ -151,6 +174,7 @@ class actionAngleSpherical(actionAngle):
            2013-12-28 - Written - Bovy (IAS)
         """
         fixed_quad= kwargs.pop('fixed_quad',False)
+        use_c= kwargs.pop('c',self._c) and ext_loaded and _check_c(self._pot)
         if len(args) == 5: #R,vR.vT, z, vz
             R,vR,vT, z, vz= args
         elif len(args) == 6: #R,vR.vT, z, vz, phi
@@ -168,8 +192,18 @@ class actionAngleSpherical(actionAngle):
             vT= nu.array([vT])
             z= nu.array([z])
             vz= nu.array([vz])
-        if self._c: #pragma: no cover
-            pass
+        if use_c:
+            Lz= R*vT
+            Lx= -z*vT
+            Ly= z*vR-R*vz
+            L= nu.sqrt(Lx*Lx+Ly*Ly+Lz*Lz)
+            Jr, Or, Op, err= actionAngleSpherical_c.actionAngleFreqSpherical_c(\
+                self._pot,R,vR,vT,z,vz,order=self._order)
+            if err != 0: #pragma: no cover
+                raise RuntimeError("C-code for calculation actions failed; try with c=False")
+            Oz= copy.copy(Op)
+            Op[vT < 0.]*= -1.
+            return (Jr,Lz,L-nu.fabs(Lz),Or,Op,Oz)
         else:
             Lz= R*vT
             Lx= -z*vT
@@ -221,6 +255,7 @@ class actionAngleSpherical(actionAngle):
               b) Orbit instance: initial condition used if that's it, orbit(t)
                  if there is a time given as well
            fixed_quad= (False) if True, use n=10 fixed_quad integration
+           c= True/False; overrides the object's c= keyword to use C or not
            scipy.integrate.quadrature keywords
         OUTPUT:
             (jr,lz,jz,Omegar,Omegaphi,Omegaz,ar,aphi,az)
@@ -228,6 +263,7 @@ class actionAngleSpherical(actionAngle):
            2013-12-29 - Written - Bovy (IAS)
         """
         fixed_quad= kwargs.pop('fixed_quad',False)
+        use_c= kwargs.pop('c',self._c) and ext_loaded and _check_c(self._pot)
         if len(args) == 5: #R,vR.vT, z, vz pragma: no cover
             raise IOError("You need to provide phi when calculating angles")
         elif len(args) == 6: #R,vR.vT, z, vz, phi
@@ -247,8 +283,29 @@ class actionAngleSpherical(actionAngle):
             z= nu.array([z])
             vz= nu.array([vz])
             phi= nu.array([phi])
-        if self._c: #pragma: no cover
-            pass
+        if use_c:
+            Lz= R*vT
+            Lx= -z*vT
+            Ly= z*vR-R*vz
+            L= nu.sqrt(Lx*Lx+Ly*Ly+Lz*Lz)
+            Jr, Or, Op, ar, az, err=\
+                actionAngleSpherical_c.actionAngleFreqAngleSpherical_c(\
+                self._pot,R,vR,vT,z,vz,order=self._order)
+            if err != 0: #pragma: no cover
+                raise RuntimeError("C-code for calculation actions failed; try with c=False")
+            #Calculate the longitude of the ascending node
+            axiR= nu.sqrt(R**2.+z**2.)
+            axivz= (z*vR-R*vz)/axiR
+            asc= self._calc_long_asc(z,R,axivz,phi,Lz,L)
+            Oz= copy.copy(Op)
+            Op[vT < 0.]*= -1.
+            ap= copy.copy(asc)
+            ap[vT < 0.]-= az[vT < 0.]
+            ap[vT >= 0.]+= az[vT >= 0.]
+            ar= ar % (2.*nu.pi)
+            ap= ap % (2.*nu.pi)
+            az= az % (2.*nu.pi)
+            return (Jr,Lz,L-nu.fabs(Lz),Or,Op,Oz,ar,ap,az)
         else:
             Lz= R*vT
             Lx= -z*vT
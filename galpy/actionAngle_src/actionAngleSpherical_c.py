@@ -0,0 +1,147 @@
+import os
+import sys
+import sysconfig
+import warnings
+import ctypes
+import ctypes.util
+import numpy
+from numpy.ctypeslib import ndpointer
+from galpy.util import galpyWarning, config
+from galpy.orbit_src.integrateFullOrbit import _parse_pot
+#Find and load the library
+_lib= None
+outerr= None
+PY3= sys.version > '3'
+if PY3: #pragma: no cover
+    _ext_suffix= sysconfig.get_config_var('EXT_SUFFIX')
+else:
+    _ext_suffix= '.so'
+for path in sys.path:
+    try:
+        _lib = ctypes.CDLL(os.path.join(path,'galpy_actionAngle_c%s' % _ext_suffix))
+    except OSError as e:
+        if os.path.exists(os.path.join(path,'galpy_actionAngle_c%s' % _ext_suffix)): #pragma: no cover
+            outerr= e
+        _lib = None
+    else:
+        break
+if _lib is None: #pragma: no cover
+    if not outerr is None:
+        warnings.warn("actionAngleSpherical_c extension module not loaded, because of error '%s' " % outerr,
+                      galpyWarning)
+    else:
+        warnings.warn("actionAngleSpherical_c extension module not loaded, because galpy_actionAngle_c%s image was not found" % _ext_suffix,
+                      galpyWarning)
+    _ext_loaded= False
+else:
+    _ext_loaded= True
+    config._register_openmp_lib(_lib)
+
+def actionAngleSpherical_c(pot,R,vR,vT,z,vz,order=50):
+    """
+    NAME:
+       actionAngleSpherical_c
+    PURPOSE:
+       Use C to calculate radial actions in a spherical potential
+    INPUT:
+       pot - Potential or list of such instances
+       R, vR, vT, z, vz - coordinates (arrays)
+       order= (50) number of Gauss-Legendre points used in each integral
+    OUTPUT:
+       (jr,err)
+       jr : array, shape (len(R))
+       err - non-zero if error occured
+    HISTORY:
+       2017-10-02 - Written - agent
+    """
+    out= _actionAngleSpherical_c_call('actionAngleSpherical_actions',1,
+                                      pot,R,vR,vT,z,vz,order)
+    return (out[0],out[-1])
+
+def actionAngleFreqSpherical_c(pot,R,vR,vT,z,vz,order=50):
+    """
+    NAME:
+       actionAngleFreqSpherical_c
+    PURPOSE:
+       Use C to calculate radial actions and frequencies in a spherical potential
+    INPUT:
+       pot - Potential or list of such instances
+       R, vR, vT, z, vz - coordinates (arrays)
+       order= (50) number of Gauss-Legendre points used in each integral
+    OUTPUT:
+       (jr,Omegar,Omegaphi,err)
+       jr,Omegar,Omegaphi : array, shape (len(R)); Omegaphi is the frequency of the total angular momentum (always positive)
+       err - non-zero if error occured
+    HISTORY:
+       2017-10-02 - Written - agent
+    """
+    return _actionAngleSpherical_c_call('actionAngleSpherical_actionsFreqs',
+                                        3,pot,R,vR,vT,z,vz,order)
+
+def actionAngleFreqAngleSpherical_c(pot,R,vR,vT,z,vz,order=50):
+    """
+    NAME:
+       actionAngleFreqAngleSpherical_c
+    PURPOSE:
+       Use C to calculate radial actions, frequencies, and angles in a spherical potential
+    INPUT:
+       pot - Potential or list of such instances
+       R, vR, vT, z, vz - coordinates (arrays)
+       order= (50) number of Gauss-Legendre points used in each integral
+    OUTPUT:
+       (jr,Omegar,Omegaphi,angler,anglez,err)
+       jr,Omegar,Omegaphi,angler,anglez : array, shape (len(R)); Omegaphi is the frequency of the total angular momentum (always positive); anglez is the angle conjugate to the total angular momentum measured from the ascending node (not yet taken modulo 2 pi)
+       err - non-zero if error occured
+    HISTORY:
+       2017-10-02 - Written - agent
+    """
+    return _actionAngleSpherical_c_call(\
+        'actionAngleSpherical_actionsFreqsAngles',5,
+        pot,R,vR,vT,z,vz,order)
+
+def _actionAngleSpherical_c_call(funcname,nout,pot,R,vR,vT,z,vz,order):
+    """Set up and run the C code for nout output arrays"""
+    #Parse the potential
+    npot, pot_type, pot_args= _parse_pot(pot,potforactions=True)
+    #Gauss-Legendre points and weights
+    glx, glw= numpy.polynomial.legendre.leggauss(order)
+
+    #Set up result arrays
+    out= [numpy.empty(len(R)) for ii in range(nout)]
+    err= ctypes.c_int(0)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleSpherical_Func= getattr(_lib,funcname)
+    actionAngleSpherical_Func.argtypes=\
+        [ctypes.c_int,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_int,
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_int,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags)]\
+         +[ndpointer(dtype=numpy.float64,flags=ndarrayFlags)
+           for ii in range(nout)]\
+         +[ctypes.POINTER(ctypes.c_int)]
+
+    #Array requirements
+    R= numpy.require(R,dtype=numpy.float64,requirements=['C','W'])
+    vR= numpy.require(vR,dtype=numpy.float64,requirements=['C','W'])
+    vT= numpy.require(vT,dtype=numpy.float64,requirements=['C','W'])
+    z= numpy.require(z,dtype=numpy.float64,requirements=['C','W'])
+    vz= numpy.require(vz,dtype=numpy.float64,requirements=['C','W'])
+    glx= numpy.require(glx,dtype=numpy.float64,requirements=['C','W'])
+    glw= numpy.require(glw,dtype=numpy.float64,requirements=['C','W'])
+
+    #Run the C code
+    actionAngleSpherical_Func(len(R),R,vR,vT,z,vz,
+                              ctypes.c_int(npot),pot_type,pot_args,
+                              ctypes.c_int(order),glx,glw,
+                              *(out+[ctypes.byref(err)]))
+    return tuple(out+[err.value])
@@ -8,6 +8,7 @@
 #
 #      methods:
 #             __call__: returns (jr,lz,jz)
+#             xv: returns [R,vR,vT,z,vz,phi] for given actions and angles
 #
 ###############################################################################
 import copy
@@ -42,7 +43,7 @@ class actionAngleStaeckel(actionAngle):
         INPUT:
            pot= potential or list of potentials (3D)
 
-           delta= focus (can be Quantity)
+           delta= focus (can be Quantity; can be an array with a different focus for each object)
 
            useu0 - use u0 to calculate dV (NOT recommended)
 
@@ -60,6 +61,8 @@ class actionAngleStaeckel(actionAngle):
 
            2012-11-27 - Written - Bovy (IAS)
 
+           2017-10-15 - Allow array delta - agent
+
         """
         actionAngle.__init__(self,
                              ro=kwargs.get('ro',None),vo=kwargs.get('vo',None))
@@ -79,12 +82,19 @@ class actionAngleStaeckel(actionAngle):
         else:
             self._c= False
         self._useu0= kwargs.get('useu0',False)
-        self._delta= kwargs['delta']
-        if _APY_LOADED and isinstance(self._delta,units.Quantity):
-            self._delta= self._delta.to(units.kpc).value/self._ro
+        self._delta= self._parse_delta(kwargs['delta'])
         # Check the units
         self._check_consistent_units()
         return None
+
+    def _parse_delta(self,delta):
+        """Convert delta to internal units and to an array if it is not a scalar"""
+        if _APY_LOADED and isinstance(delta,units.Quantity):
+            delta= delta.to(units.kpc).value/self._ro
+        if not nu.isscalar(delta):
+            delta= nu.asarray(delta,dtype='float')
+            if delta.ndim == 0: delta= float(delta)
+        return delta
     
     def _evaluate(self,*args,**kwargs):
         """
@@ -98,12 +108,14 @@ class actionAngleStaeckel(actionAngle):
               b) Orbit instance: initial condition used if that's it, orbit(t)
                  if there is a time given as well
             c= True/False; overrides the object's c= keyword to use C or not
+            delta= (object-wide default) focus to use for this call (can be Quantity or an array with one focus per object)
            scipy.integrate.quadrature keywords
         OUTPUT:
            (jr,lz,jz)
         HISTORY:
            2012-11-27 - Written - Bovy (IAS)
         """
+        delta= self._parse_delta(kwargs.pop('delta',self._delta))
         if ((self._c and not ('c' in kwargs and not kwargs['c']))\
                 or (ext_loaded and (('c' in kwargs and kwargs['c'])))) \
                 and _check_c(self._pot):
@@ -134,12 +146,12 @@ class actionAngleStaeckel(actionAngle):
                                  +vR[ii]**2./2.+vz[ii]**2./2.+vT[ii]**2./2. for ii in range(len(R))])
                     u0= actionAngleStaeckel_c.actionAngleStaeckel_calcu0(E,Lz,
                                                                          self._pot,
-                                                                         self._delta)[0]
+                                                                         delta)[0]
                 kwargs.pop('u0',None)
             else:
                 u0= None
             jr, jz, err= actionAngleStaeckel_c.actionAngleStaeckel_c(\
-                self._pot,self._delta,R,vR,vT,z,vz,u0=u0)
+                self._pot,delta,R,vR,vT,z,vz,u0=u0)
             if err == 0:
                 return (jr,Lz,jz)
             else: #pragma: no cover
@@ -153,6 +165,8 @@ class actionAngleStaeckel(actionAngle):
                 ojr= nu.zeros((len(args[0])))
                 olz= nu.zeros((len(args[0])))
                 ojz= nu.zeros((len(args[0])))
+                delta= nu.atleast_1d(delta)
+                delta_stride= int(len(delta) > 1)
                 for ii in range(len(args[0])):
                     if len(args) == 5:
                         targs= (args[0][ii],args[1][ii],args[2][ii],
@@ -160,7 +174,9 @@ class actionAngleStaeckel(actionAngle):
                     elif len(args) == 6:
                         targs= (args[0][ii],args[1][ii],args[2][ii],
                                 args[3][ii],args[4][ii],args[5][ii])
-                    tjr,tlz,tjz= self(*targs,**copy.copy(kwargs))
+                    tkwargs= copy.copy(kwargs)
+                    tkwargs['delta']= delta[ii*delta_stride]
+                    tjr,tlz,tjz= self(*targs,**tkwargs)
                     ojr[ii]= tjr
                     ojz[ii]= tjz
                     olz[ii]= tlz
@@ -168,7 +184,7 @@ class actionAngleStaeckel(actionAngle):
             else:
                 #Set up the actionAngleStaeckelSingle object
                 aASingle= actionAngleStaeckelSingle(*args,pot=self._pot,
-                                                     delta=self._delta)
+                                                     delta=delta)
                 return (aASingle.JR(**copy.copy(kwargs)),
                         aASingle._R*aASingle._vT,
                         aASingle.Jz(**copy.copy(kwargs)))
@@ -184,12 +200,14 @@ class actionAngleStaeckel(actionAngle):
               a) R,vR,vT,z,vz
               b) Orbit instance: initial condition used if that's it, orbit(t)
                  if there is a time given as well
+            delta= (object-wide default) focus to use for this call (can be Quantity or an array with one focus per object)
            scipy.integrate.quadrature keywords
         OUTPUT:
             (jr,lz,jz,Omegar,Omegaphi,Omegaz)
         HISTORY:
            2013-08-28 - Written - Bovy (IAS)
         """
+        delta= self._parse_delta(kwargs.pop('delta',self._delta))
         if ((self._c and not ('c' in kwargs and not kwargs['c']))\
                 or (ext_loaded and (('c' in kwargs and kwargs['c'])))) \
                 and _check_c(self._pot):
@@ -220,12 +238,12 @@ class actionAngleStaeckel(actionAngle):
                                  +vR[ii]**2./2.+vz[ii]**2./2.+vT[ii]**2./2. for ii in range(len(R))])
                     u0= actionAngleStaeckel_c.actionAngleStaeckel_calcu0(E,Lz,
                                                                          self._pot,
-                                                                         self._delta)[0]
+                                                                         delta)[0]
                 kwargs.pop('u0',None)
             else:
                 u0= None
             jr, jz, Omegar, Omegaphi, Omegaz, err= actionAngleStaeckel_c.actionAngleFreqStaeckel_c(\
-                self._pot,self._delta,R,vR,vT,z,vz,u0=u0)
+                self._pot,delta,R,vR,vT,z,vz,u0=u0)
             # Adjustements for close-to-circular orbits
             indx= nu.isnan(Omegar)*(jr < 10.**-3.)+nu.isnan(Omegaz)*(jz < 10.**-3.) #Close-to-circular and close-to-the-plane orbits
             if nu.sum(indx) > 0:
@@ -253,12 +271,14 @@ class actionAngleStaeckel(actionAngle):
               a) R,vR,vT,z,vz,phi (MUST HAVE PHI)
               b) Orbit instance: initial condition used if that's it, orbit(t)
                  if there is a time given as well
+            delta= (object-wide default) focus to use for this call (can be Quantity or an array with one focus per object)
            scipy.integrate.quadrature keywords
         OUTPUT:
             (jr,lz,jz,Omegar,Omegaphi,Omegaz,angler,anglephi,anglez)
         HISTORY:
            2013-08-28 - Written - Bovy (IAS)
         """
+        delta= self._parse_delta(kwargs.pop('delta',self._delta))
         if ((self._c and not ('c' in kwargs and not kwargs['c']))\
                 or (ext_loaded and (('c' in kwargs and kwargs['c'])))) \
                 and _check_c(self._pot):
@@ -291,12 +311,12 @@ class actionAngleStaeckel(actionAngle):
                                  +vR[ii]**2./2.+vz[ii]**2./2.+vT[ii]**2./2. for ii in range(len(R))])
                     u0= actionAngleStaeckel_c.actionAngleStaeckel_calcu0(E,Lz,
                                                                          self._pot,
-                                                                         self._delta)[0]
+                                                                         delta)[0]
                 kwargs.pop('u0',None)
             else:
                 u0= None
             jr, jz, Omegar, Omegaphi, Omegaz, angler, anglephi,anglez, err= actionAngleStaeckel_c.actionAngleFreqAngleStaeckel_c(\
-                self._pot,self._delta,R,vR,vT,z,vz,phi,u0=u0)
+                self._pot,delta,R,vR,vT,z,vz,phi,u0=u0)
             # Adjustements for close-to-circular orbits
             indx= nu.isnan(Omegar)*(jr < 10.**-3.)+nu.isnan(Omegaz)*(jz < 10.**-3.) #Close-to-circular and close-to-the-plane orbits
             if nu.sum(indx) > 0:
@@ -312,6 +332,68 @@ class actionAngleStaeckel(actionAngle):
                 warnings.warn("C module not used because potential does not have a C implementation",galpyWarning)
             raise NotImplementedError("actionsFreqs with c=False not implemented")
 
+    def xv(self,jr,jphi,jz,angler,anglephi,anglez,**kwargs):
+        """
+        NAME:
+           xv
+        PURPOSE:
+           evaluate the phase-space coordinates (x,v) corresponding to actions and angles in the Staeckel approximation (the inverse of actionsFreqsAngles)
+        INPUT:
+           jr, jphi, jz, angler, anglephi, anglez - actions and angles (scalars or arrays that can be broadcast against each other)
+           delta= (object-wide default) focus to use for this call (can be Quantity or an array with one focus per object)
+           maxiter= (100) maximum number of Newton iterations
+           tol= (10^-6) tolerance on the difference in sqrt(2J) x (cos(angle),sin(angle))
+        OUTPUT:
+           [R,vR,vT,z,vz,phi] ([N,6] array)
+        HISTORY:
+           2017-10-24 - Written - agent
+        """
+        return self.xvFreqs(jr,jphi,jz,angler,anglephi,anglez,**kwargs)[0]
+
+    def xvFreqs(self,jr,jphi,jz,angler,anglephi,anglez,**kwargs):
+        """
+        NAME:
+           xvFreqs
+        PURPOSE:
+           evaluate the phase-space coordinates (x,v) corresponding to actions and angles in the Staeckel approximation as well as the frequencies
+        INPUT:
+           jr, jphi, jz, angler, anglephi, anglez - actions and angles (scalars or arrays that can be broadcast against each other)
+           delta= (object-wide default) focus to use for this call (can be Quantity or an array with one focus per object)
+           maxiter= (100) maximum number of Newton iterations
+           tol= (10^-6) tolerance on the difference in sqrt(2J) x (cos(angle),sin(angle))
+        OUTPUT:
+           ([R,vR,vT,z,vz,phi],OmegaR,Omegaphi,Omegaz,err); [N,6] and [N] arrays, err is non-zero for objects for which the iterations did not converge
+        HISTORY:
+           2017-10-24 - Written - agent
+        """
+        delta= self._parse_delta(kwargs.pop('delta',self._delta))
+        if not ((self._c and not ('c' in kwargs and not kwargs['c']))\
+                    or (ext_loaded and (('c' in kwargs and kwargs['c'])))) \
+                    or not _check_c(self._pot):
+            if 'c' in kwargs and kwargs['c'] and not self._c: #pragma: no cover
+                warnings.warn("C module not used because potential does not have a C implementation",galpyWarning)
+            raise NotImplementedError("xvFreqs with c=False not implemented")
+        jr,jphi,jz,angler,anglephi,anglez= \
+            [nu.array(x,dtype='float').flatten()
+             for x in nu.broadcast_arrays(jr,jphi,jz,
+                                          angler,anglephi,anglez)]
+        R,vR,vT,z,vz,phi,Omegar,Omegaphi,Omegaz,niter,err= \
+            actionAngleStaeckel_c.actionAngleStaeckel_xvFreqs_c(\
+            self._pot,delta,jr,jphi,jz,angler,anglephi,anglez,
+            useu0=self._useu0,maxiter=kwargs.get('maxiter',100),
+            tol=kwargs.get('tol',10.**-6.))
+        # Adjustements for close-to-circular orbits
+        indx= nu.isnan(Omegar)*(jr < 10.**-3.)+nu.isnan(Omegaz)*(jz < 10.**-3.) #Close-to-circular and close-to-the-plane orbits
+        indx*= (err == 0)
+        if nu.sum(indx) > 0:
+            Omegar[indx]= [epifreq(self._pot,r,use_physical=False) for r in R[indx]]
+            Omegaphi[indx]= [omegac(self._pot,r,use_physical=False) for r in R[indx]]
+            Omegaz[indx]= [verticalfreq(self._pot,r,use_physical=False) for r in R[indx]]
+        if nu.any(err != 0):
+            warnings.warn("actionAngleStaeckel.xvFreqs did not converge for %i out of %i objects" % (nu.sum(err != 0),len(err)),
+                          galpyWarning)
+        return (nu.array([R,vR,vT,z,vz,phi]).T,Omegar,Omegaphi,Omegaz,err)
+
 class actionAngleStaeckelSingle(actionAngle):
     """Action-angle formalism for axisymmetric potentials using Binney (2012)'s Staeckel approximation"""
     def __init__(self,*args,**kwargs):
@@ -890,7 +972,7 @@ def _vminFindStart(v,E,Lz,I3V,delta,u0,cosh2u0,sinh2u0,
 
 @potential_physical_input
 @physical_conversion('position',pop=True)
-def estimateDeltaStaeckel(pot,R,z):
+def estimateDeltaStaeckel(pot,R,z,no_median=False):
     """
     NAME:
        estimateDeltaStaeckel
@@ -899,28 +981,37 @@ def estimateDeltaStaeckel(pot,R,z):
     INPUT:
        pot - Potential instance or list thereof
        R,z- coordinates (if these are arrays, the median estimated delta is returned, i.e., if this is an orbit)
+       no_median - (False) if True, and input is array, return all calculated values of delta (useful for quickly estimating delta for many phase-space points)
     OUTPUT:
        delta
     HISTORY:
        2013-08-28 - Written - Bovy (IAS)
        2016-02-20 - Changed input order to allow physical conversions - Bovy (UofT)
+       2017-10-15 - Evaluate the forces and second derivatives for all points at once; added no_median - agent
     """
     if isinstance(R,nu.ndarray):
-        delta2= nu.array([(z[ii]**2.-R[ii]**2. #eqn. (9) has a sign error
-                           +(3.*R[ii]*_evaluatezforces(pot,R[ii],z[ii])
-                             -3.*z[ii]*_evaluateRforces(pot,R[ii],z[ii])
-                             +R[ii]*z[ii]*(evaluateR2derivs(pot,R[ii],z[ii],
-                                                            use_physical=False)
-                                           -evaluatez2derivs(pot,R[ii],z[ii],
-                                                             use_physical=False)))/evaluateRzderivs(pot,R[ii],z[ii],use_physical=False)) for ii in range(len(R))])
+        try:
+            delta2= _estimateDelta2(pot,R,z)
+            if not nu.shape(delta2) == R.shape: raise ValueError
+        except (TypeError,ValueError,IndexError):
+            # Potential cannot be evaluated for arrays, loop over points
+            delta2= nu.array([_estimateDelta2(pot,R[ii],z[ii])
+                              for ii in range(len(R))])
+        delta2= nu.array(delta2,dtype='float')
         indx= (delta2 < 0.)*(delta2 > -10.**-10.)
         delta2[indx]= 0.
-        delta2= nu.median(delta2[True^nu.isnan(delta2)])
+        if not no_median:
+            delta2= nu.median(delta2[True^nu.isnan(delta2)])
     else:
-        delta2= (z**2.-R**2. #eqn. (9) has a sign error
-                 +(3.*R*_evaluatezforces(pot,R,z)
-                   -3.*z*_evaluateRforces(pot,R,z)
-                   +R*z*(evaluateR2derivs(pot,R,z,use_physical=False)
-                         -evaluatez2derivs(pot,R,z,use_physical=False)))/evaluateRzderivs(pot,R,z,use_physical=False))
+        delta2= _estimateDelta2(pot,R,z)
         if delta2 < 0. and delta2 > -10.**-10.: delta2= 0.
     return nu.sqrt(delta2)
+
+def _estimateDelta2(pot,R,z):
+    """Square of the delta estimated using eqn. (9) in Sanders (2012) at (R,z), which can be arrays"""
+    return (z**2.-R**2. #eqn. (9) has a sign error
+            +(3.*R*_evaluatezforces(pot,R,z)
+              -3.*z*_evaluateRforces(pot,R,z)
+              +R*z*(evaluateR2derivs(pot,R,z,use_physical=False)
+                    -evaluatez2derivs(pot,R,z,use_physical=False)))\
+                /evaluateRzderivs(pot,R,z,use_physical=False))
@@ -10,6 +10,12 @@
 #             __call__: returns (jr,lz,jz)
 #
 ###############################################################################
+import os
+import struct
+import hashlib
+import tempfile
+import zipfile
+import warnings
 import numpy
 from scipy import interpolate, optimize, ndimage
 import galpy.actionAngle_src.actionAngleStaeckel as actionAngleStaeckel
@@ -17,9 +23,16 @@ from galpy.actionAngle_src.actionAngle import actionAngle
 import galpy.actionAngle_src.actionAngleStaeckel_c as actionAngleStaeckel_c
 from galpy.actionAngle_src.actionAngleStaeckel_c import _ext_loaded as ext_loaded
 import galpy.potential
-from galpy.potential_src.Potential import _evaluatePotentials
-from galpy.util import multi, bovy_coords
+from galpy.potential_src.Potential import _evaluatePotentials, _check_c
+from galpy.potential_src.interpRZPotential import _fingerprint_update
+from galpy.util import multi, bovy_coords, galpyWarning
+from galpy import __version__ as _galpy_version
 _PRINTOUTSIDEGRID= False
+# Saved grids: bump _GRID_VERSION whenever the content or meaning of the
+# saved grids changes, such that old grid files are never reused
+_GRID_VERSION= 1
+_GRID_ARRAYS= ['Lzs','RL','ERL','ERa','jr','jz','u0','jrLzE','jzLzE',
+               'jrFiltered','jzFiltered']
 _APY_LOADED= True
 try:
     from astropy import units
@@ -29,6 +42,7 @@ class actionAngleStaeckelGrid(actionAngle):
     """Action-angle formalism for axisymmetric potentials using Binney (2012)'s Staeckel approximation, grid-based interpolation"""
     def __init__(self,pot=None,delta=None,Rmax=5.,
                  nE=25,npsi=25,nLz=30,numcores=1,
+                 savefilename=None,mmap=False,
                  **kwargs):
         """
         NAME:
@@ -44,7 +58,13 @@ class actionAngleStaeckelGrid(actionAngle):
 
            nE=, npsi=, nLz= grid size
 
-           numcores= number of cpus to use to parallellize
+           numcores= number of cpus to use to parallellize (when building the grid in Python)
+
+           c= if True, use C to build the grid (default: use C if the potential has a C implementation; C is parallelized using OpenMP)
+
+           savefilename= (None) if set, load the grids from this file if it exists and was built for the same potential, delta, and grid specification; otherwise build the grids and save them to this file (see save)
+
+           mmap= (False) if True, memory-map the large grids loaded from savefilename rather than reading them into memory (useful to share a grid between many processes)
 
            ro= distance from vantage point to GC (kpc; can be Quantity)
 
@@ -58,6 +78,8 @@ class actionAngleStaeckelGrid(actionAngle):
 
             2012-11-29 - Written - Bovy (IAS)
 
+            2017-10-18 - Build in C by default and added savefilename= and mmap= - agent
+
         """
         actionAngle.__init__(self,
                              ro=kwargs.get('ro',None),vo=kwargs.get('vo',None))
@@ -66,8 +88,10 @@ class actionAngleStaeckelGrid(actionAngle):
         self._pot= pot
         if delta is None:
             raise IOError("Must specify delta= for actionAngleStaeckelGrid")
-        if ext_loaded and 'c' in kwargs and kwargs['c']:
-            self._c= True
+        if ext_loaded and 'c' in kwargs:
+            self._c= kwargs['c']
+        elif ext_loaded:
+            self._c= _check_c(self._pot)
         else:
             self._c= False
         self._delta= delta
@@ -77,35 +101,48 @@ class actionAngleStaeckelGrid(actionAngle):
         self._Rmin= 0.01
         #Set up the actionAngleStaeckel object that we will use to interpolate
         self._aA= actionAngleStaeckel.actionAngleStaeckel(pot=self._pot,delta=self._delta,c=self._c)
-        #Build grid
         self._Lzmin= 0.01
+        self._Ramax= 200./8.
+        self._nLz= nLz
+        self._nE= nE
+        self._npsi= npsi
+        #Load the grids if they were saved before, otherwise build them
+        grids= None
+        if not savefilename is None:
+            self._fingerprint= _grid_fingerprint(self._pot,self._delta,
+                                                 self._Rmax,nE,npsi,nLz)
+            if os.path.exists(savefilename):
+                grids= _grid_load(savefilename,self._fingerprint,mmap=mmap)
+        if grids is None:
+            self._build_grids(numcores)
+            if not savefilename is None:
+                self.save(savefilename)
+        else:
+            for key in _GRID_ARRAYS:
+                setattr(self,'_'+key,grids[key])
+        self._setup_interpolation()
+        # Check the units
+        self._check_consistent_units()
+        return None
+
+    def _build_grids(self,numcores):
+        """Build the grids of u0 and of the actions in (Lz,E,psi)"""
+        nE, npsi, nLz= self._nE, self._npsi, self._nLz
+        #Build grid
         self._Lzs= numpy.linspace(self._Lzmin,
                                   self._Rmax\
                                       *galpy.potential.vcirc(self._pot,
                                                              self._Rmax),
                                   nLz)
-        self._Lzmax= self._Lzs[-1]
-        self._nLz= nLz
         #Calculate E_c(R=RL), energy of circular orbit
         self._RL= numpy.array([galpy.potential.rl(self._pot,l) for l in self._Lzs])
-        self._RLInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
-                                                                 self._RL,k=3)
         self._ERL= _evaluatePotentials(self._pot,self._RL,
                                        numpy.zeros(self._nLz))\
                                        +self._Lzs**2./2./self._RL**2.
-        self._ERLmax= numpy.amax(self._ERL)+1.
-        self._ERLInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
-                                                                  numpy.log(-(self._ERL-self._ERLmax)),k=3)
-        self._Ramax= 200./8.
         self._ERa= _evaluatePotentials(self._pot,self._Ramax,0.) +self._Lzs**2./2./self._Ramax**2.
         #self._EEsc= numpy.array([self._ERL[ii]+galpy.potential.vesc(self._pot,self._RL[ii])**2./4. for ii in range(nLz)])
-        self._ERamax= numpy.amax(self._ERa)+1.
-        self._ERaInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
-                                                                  numpy.log(-(self._ERa-self._ERamax)),k=3)
         y= numpy.linspace(0.,1.,nE)
-        self._nE= nE
         psis= numpy.linspace(0.,1.,npsi)*numpy.pi/2.
-        self._npsi= npsi
         jr= numpy.zeros((nLz,nE,npsi))
         jz= numpy.zeros((nLz,nE,npsi))
         u0= numpy.zeros((nLz,nE))
@@ -147,12 +184,26 @@ class actionAngleStaeckelGrid(actionAngle):
         thisLzs= numpy.tile(thisLzs.T,(npsi,1,1)).T.flatten()
         thisR= numpy.tile(thisR.T,(npsi,1,1)).T.flatten()
         thisv= numpy.tile(thisv.T,(npsi,1,1)).T.flatten()
-        mjr, mlz, mjz= self._aA(thisR, #R
-                                thisv*numpy.cos(thispsi), #vR
-                                thisLzs/thisR, #vT
-                                numpy.zeros(len(thisR)), #z
-                                thisv*numpy.sin(thispsi), #vz
-                                fixed_quad=True) 
+        if not self._c and numcores > 1:
+            # Split the grid in one chunk per core, C uses OpenMP instead
+            chunks= numpy.array_split(numpy.arange(len(thisR)),numcores)
+            mjs= multi.parallel_map(\
+                (lambda x: self._aA(thisR[chunks[x]], #R
+                                    thisv[chunks[x]]*numpy.cos(thispsi[chunks[x]]), #vR
+                                    thisLzs[chunks[x]]/thisR[chunks[x]], #vT
+                                    numpy.zeros(len(chunks[x])), #z
+                                    thisv[chunks[x]]*numpy.sin(thispsi[chunks[x]]), #vz
+                                    fixed_quad=True)),
+                range(numcores),numcores=numcores)
+            mjr= numpy.hstack([mj[0] for mj in mjs])
+            mjz= numpy.hstack([mj[2] for mj in mjs])
+        else:
+            mjr, mlz, mjz= self._aA(thisR, #R
+                                    thisv*numpy.cos(thispsi), #vR
+                                    thisLzs/thisR, #vT
+                                    numpy.zeros(len(thisR)), #z
+                                    thisv*numpy.sin(thispsi), #vz
+                                    fixed_quad=True) 
         if isinstance(self._pot,galpy.potential.interpRZPotential) and hasattr(self._pot,'_origPot'):
             #Interpolated potentials have problems with extreme orbits
             indx= (mjr == 9999.99)
@@ -181,26 +232,79 @@ class actionAngleStaeckelGrid(actionAngle):
         #Deal w/ NaN
         jr[numpy.isnan(jr)]= 0.
         jz[numpy.isnan(jz)]= 0.
-        #First interpolate the maxima
         self._jr= jr
         self._jz= jz
         self._u0= u0
         self._jrLzE= jrLzE
         self._jzLzE= jzLzE
+        #spline filter jr and jz, such that they can be used with ndimage.map_coordinates
+        self._jrFiltered= ndimage.spline_filter(numpy.log(self._jr+10.**-10.),order=3)
+        self._jzFiltered= ndimage.spline_filter(numpy.log(self._jz+10.**-10.),order=3)
+        return None
+
+    def _setup_interpolation(self):
+        """Set up the interpolations of the grids"""
+        self._Lzmax= self._Lzs[-1]
+        self._RLInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
+                                                                 self._RL,k=3)
+        self._ERLmax= numpy.amax(self._ERL)+1.
+        self._ERLInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
+                                                                  numpy.log(-(self._ERL-self._ERLmax)),k=3)
+        self._ERamax= numpy.amax(self._ERa)+1.
+        self._ERaInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
+                                                                  numpy.log(-(self._ERa-self._ERamax)),k=3)
+        #First interpolate the maxima
         self._jrLzInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
-                                                                   numpy.log(jrLzE+10.**-5.),k=3)
+                                                                   numpy.log(self._jrLzE+10.**-5.),k=3)
         self._jzLzInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
-                                                                   numpy.log(jzLzE+10.**-5.),k=3)
+                                                                   numpy.log(self._jzLzE+10.**-5.),k=3)
         #Interpolate u0
         self._logu0Interp= interpolate.RectBivariateSpline(self._Lzs,
-                                                           y,
-                                                           numpy.log(u0),
+                                                           numpy.linspace(0.,1.,self._nE),
+                                                           numpy.log(self._u0),
                                                            kx=3,ky=3,s=0.)
-        #spline filter jr and jz, such that they can be used with ndimage.map_coordinates
-        self._jrFiltered= ndimage.spline_filter(numpy.log(self._jr+10.**-10.),order=3)
-        self._jzFiltered= ndimage.spline_filter(numpy.log(self._jz+10.**-10.),order=3)
-        # Check the units
-        self._check_consistent_units()
+        if self._c:
+            # The C code interpolates the actions in (Lz,E) slices at fixed psi
+            self._jrFilteredC= numpy.ascontiguousarray(\
+                numpy.transpose(self._jrFiltered,axes=(2,0,1)))
+            self._jzFilteredC= numpy.ascontiguousarray(\
+                numpy.transpose(self._jzFiltered,axes=(2,0,1)))
+        return None
+
+    def save(self,filename):
+        """
+        NAME:
+           save
+        PURPOSE:
+           save the grids to a file, such that they can be re-used by setting up an actionAngleStaeckelGrid instance with savefilename=filename (the grids are stored uncompressed in a .npz file, together with a fingerprint of the potential, delta, and grid specification, such that they can be memory-mapped)
+        INPUT:
+           filename - name of the file
+        OUTPUT:
+           (none)
+        HISTORY:
+           2017-10-18 - Written - agent
+        """
+        if not hasattr(self,'_fingerprint'):
+            self._fingerprint= _grid_fingerprint(self._pot,self._delta,
+                                                 self._Rmax,self._nE,
+                                                 self._npsi,self._nLz)
+        grids= dict([(key,numpy.asarray(getattr(self,'_'+key)))
+                     for key in _GRID_ARRAYS])
+        # Write to a temporary file first, such that processes that load the grids never see a partially-written file
+        fd, tmpname= tempfile.mkstemp(suffix='.npz',
+                                      dir=os.path.dirname(os.path.abspath(filename)))
+        try:
+            with os.fdopen(fd,'wb') as tmpfile:
+                numpy.savez(tmpfile,fingerprint=self._fingerprint,
+                            version=_GRID_VERSION,**grids)
+            if hasattr(os,'replace'):
+                os.replace(tmpname,filename)
+            else: #pragma: no cover
+                if os.path.exists(filename): os.remove(filename)
+                os.rename(tmpname,filename)
+        except Exception: #pragma: no cover
+            if os.path.exists(tmpname): os.remove(tmpname)
+            raise
         return None
 
     def _evaluate(self,*args,**kwargs):
@@ -217,6 +321,7 @@ class actionAngleStaeckelGrid(actionAngle):
            (jr,lz,jz)
         HISTORY:
            2012-11-29 - Written - Bovy (IAS)
+           2017-10-21 - Evaluate the interpolation in C when c=True - agent
         """
         if len(args) == 5: #R,vR.vT, z, vz
             R,vR,vT, z, vz= args
@@ -229,6 +334,21 @@ class actionAngleStaeckelGrid(actionAngle):
             vT= self._eval_vT
             z= self._eval_z
             vz= self._eval_vz
+        if self._c and kwargs.get('c',True):
+            if not isinstance(R,numpy.ndarray):
+                jr,Lz,jz= self._evaluate(numpy.array([R]),numpy.array([vR]),
+                                         numpy.array([vT]),numpy.array([z]),
+                                         numpy.array([vz]),**kwargs)
+                return (jr[0],Lz[0],jz[0])
+            jr, jz, err= actionAngleStaeckel_c.actionAngleStaeckelGrid_c(\
+                self._pot,self._delta,R,vR,vT,z,vz,
+                self._Lzs,self._ERLInterp,self._ERLmax,
+                self._ERaInterp,self._ERamax,self._jrLzInterp,self._jzLzInterp,
+                self._logu0Interp,self._jrFilteredC,self._jzFilteredC)
+            if err == 0:
+                return (jr,R*vT,jz)
+            else: #pragma: no cover
+                raise RuntimeError("C-code for calculation actions failed; try with c=False")
         Lz= R*vT
         Phi= _evaluatePotentials(self._pot,R,z)
         E= Phi+vR**2./2.+vT**2./2.+vz**2./2.
@@ -480,3 +600,52 @@ def _invEfunc(Ef,*args):
     """Inverse of Efunc"""
 #    return Ef**2.+args[0]
     return numpy.exp(Ef)+args[0]-10.**-10.
+
+def _grid_fingerprint(pot,delta,Rmax,nE,npsi,nLz):
+    """Fingerprint of the potential, delta, and the grid specification"""
+    h= hashlib.sha1()
+    h.update(('%s%i' % (_galpy_version,_GRID_VERSION)).encode('utf-8'))
+    if not _fingerprint_update(h,[pot,float(delta),float(Rmax),int(nE),
+                                  int(npsi),int(nLz)]): #pragma: no cover
+        raise RuntimeError("Potential cannot be fingerprinted, so actionAngleStaeckelGrid grids cannot be saved or loaded")
+    return h.hexdigest()
+
+def _grid_load(filename,fingerprint,mmap=False):
+    """Load the grids saved in filename, returns None if they are invalid or were built for a different potential, delta, or grid"""
+    try:
+        with numpy.load(filename) as saved:
+            if str(saved['fingerprint']) != fingerprint \
+                    or int(saved['version']) != _GRID_VERSION:
+                warnings.warn("actionAngleStaeckelGrid grids in %s were built for a different potential, delta, or grid specification (or galpy version); rebuilding and overwriting them" % filename,galpyWarning)
+                return None
+            if mmap:
+                out= dict([(key,_npz_memmap(filename,key))
+                           for key in _GRID_ARRAYS])
+            else:
+                out= dict([(key,saved[key]) for key in _GRID_ARRAYS])
+    except (IOError,ValueError,KeyError,zipfile.BadZipfile):
+        warnings.warn("Could not load actionAngleStaeckelGrid grids from %s; rebuilding and overwriting them" % filename,galpyWarning)
+        return None
+    return out
+
+def _npz_memmap(filename,key):
+    """Memory-map the array key stored uncompressed in the .npz file filename"""
+    with zipfile.ZipFile(filename) as zf:
+        info= zf.getinfo(key+'.npy')
+    if info.compress_type != zipfile.ZIP_STORED: #pragma: no cover
+        raise ValueError("Array %s in %s is compressed and cannot be memory-mapped" % (key,filename))
+    with open(filename,'rb') as npzfile:
+        # The data follow the 30-byte local file header, the file name, and the extra field
+        npzfile.seek(info.header_offset+26)
+        namelen, extralen= struct.unpack('<HH',npzfile.read(4))
+        npzfile.seek(info.header_offset+30+namelen+extralen)
+        version= numpy.lib.format.read_magic(npzfile)
+        if version == (1,0):
+            shape, fortran_order, dtype= \
+                numpy.lib.format.read_array_header_1_0(npzfile)
+        else: #pragma: no cover
+            shape, fortran_order, dtype= \
+                numpy.lib.format.read_array_header_2_0(npzfile)
+        offset= npzfile.tell()
+    return numpy.memmap(filename,dtype=dtype,mode='r',offset=offset,
+                        shape=shape,order='F' if fortran_order else 'C')
@@ -6,7 +6,7 @@ import ctypes
 import ctypes.util
 import numpy
 from numpy.ctypeslib import ndpointer
-from galpy.util import galpyWarning
+from galpy.util import galpyWarning, config
 from galpy.orbit_src.integrateFullOrbit import _parse_pot
 from galpy.util import bovy_coords
 #Find and load the library
@@ -36,6 +36,7 @@ if _lib is None: #pragma: no cover
     _ext_loaded= False
 else:
     _ext_loaded= True
+    config._register_openmp_lib(_lib)
 
 def actionAngleStaeckel_c(pot,delta,R,vR,vT,z,vz,u0=None):
     """
@@ -45,7 +46,7 @@ def actionAngleStaeckel_c(pot,delta,R,vR,vT,z,vz,u0=None):
        Use C to calculate actions using the Staeckel approximation
     INPUT:
        pot - Potential or list of such instances
-       delta - focal length of prolate spheroidal coordinates
+       delta - focal length of prolate spheroidal coordinates (float or array with one delta per object)
        R, vR, vT, z, vz - coordinates (arrays)
     OUTPUT:
        (jr,jz,err)
@@ -53,6 +54,7 @@ def actionAngleStaeckel_c(pot,delta,R,vR,vT,z,vz,u0=None):
        err - non-zero if error occured
     HISTORY:
        2012-12-01 - Written - Bovy (IAS)
+       2017-10-15 - Allow a different delta for each object - agent
     """
     if u0 is None:
         u0, dummy= bovy_coords.Rz_to_uv(R,z,delta=delta)
@@ -77,7 +79,8 @@ def actionAngleStaeckel_c(pot,delta,R,vR,vT,z,vz,u0=None):
                                ctypes.c_int,
                                ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
                                ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
-                               ctypes.c_double,
+                               ctypes.c_int,
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
                                ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
                                ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
                                ctypes.POINTER(ctypes.c_int)]
@@ -90,6 +93,10 @@ def actionAngleStaeckel_c(pot,delta,R,vR,vT,z,vz,u0=None):
              vz.flags['F_CONTIGUOUS'],
              u0.flags['F_CONTIGUOUS']]
     R= numpy.require(R,dtype=numpy.float64,requirements=['C','W'])
+    delta= numpy.require(numpy.atleast_1d(delta),dtype=numpy.float64,
+                         requirements=['C','W'])
+    if len(delta) != 1 and len(delta) != len(R):
+        raise ValueError("delta must be a float or an array with the same length as the input coordinates")
     vR= numpy.require(vR,dtype=numpy.float64,requirements=['C','W'])
     vT= numpy.require(vT,dtype=numpy.float64,requirements=['C','W'])
     z= numpy.require(z,dtype=numpy.float64,requirements=['C','W'])
@@ -109,7 +116,8 @@ def actionAngleStaeckel_c(pot,delta,R,vR,vT,z,vz,u0=None):
                                     ctypes.c_int(npot),
                                     pot_type,
                                     pot_args,
-                                    ctypes.c_double(delta),
+                                    ctypes.c_int(len(delta)),
+                                    delta,
                                     jr,
                                     jz,
                                     ctypes.byref(err))
@@ -133,13 +141,14 @@ def actionAngleStaeckel_calcu0(E,Lz,pot,delta):
     INPUT:
        E, Lz - energy and angular momentum
        pot - Potential or list of such instances
-       delta - focal length of prolate spheroidal coordinates
+       delta - focal length of prolate spheroidal coordinates (float or array with one delta per object)
     OUTPUT:
        (u0,err)
        u0 : array, shape (len(E))
        err - non-zero if error occured
     HISTORY:
        2012-12-03 - Written - Bovy (IAS)
+       2017-10-15 - Allow a different delta for each object - agent
     """
     #Parse the potential
     npot, pot_type, pot_args= _parse_pot(pot,potforactions=True)
@@ -157,7 +166,8 @@ def actionAngleStaeckel_calcu0(E,Lz,pot,delta):
                                ctypes.c_int,
                                ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
                                ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
-                               ctypes.c_double,
+                               ctypes.c_int,
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
                                ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
                                ctypes.POINTER(ctypes.c_int)]
 
@@ -165,6 +175,10 @@ def actionAngleStaeckel_calcu0(E,Lz,pot,delta):
     f_cont= [E.flags['F_CONTIGUOUS'],
              Lz.flags['F_CONTIGUOUS']]
     E= numpy.require(E,dtype=numpy.float64,requirements=['C','W'])
+    delta= numpy.require(numpy.atleast_1d(delta),dtype=numpy.float64,
+                         requirements=['C','W'])
+    if len(delta) != 1 and len(delta) != len(E):
+        raise ValueError("delta must be a float or an array with the same length as the input coordinates")
     Lz= numpy.require(Lz,dtype=numpy.float64,requirements=['C','W'])
     u0= numpy.require(u0,dtype=numpy.float64,requirements=['C','W'])
 
@@ -175,7 +189,8 @@ def actionAngleStaeckel_calcu0(E,Lz,pot,delta):
                                     ctypes.c_int(npot),
                                     pot_type,
                                     pot_args,
-                                    ctypes.c_double(delta),
+                                    ctypes.c_int(len(delta)),
+                                    delta,
                                     u0,
                                     ctypes.byref(err))
 
@@ -194,7 +209,7 @@ def actionAngleFreqStaeckel_c(pot,delta,R,vR,vT,z,vz,u0=None):
        using the Staeckel approximation
     INPUT:
        pot - Potential or list of such instances
-       delta - focal length of prolate spheroidal coordinates
+       delta - focal length of prolate spheroidal coordinates (float or array with one delta per object)
        R, vR, vT, z, vz - coordinates (arrays)
     OUTPUT:
        (jr,jz,Omegar,Omegaphi,Omegaz,err)
@@ -202,6 +217,7 @@ def actionAngleFreqStaeckel_c(pot,delta,R,vR,vT,z,vz,u0=None):
        err - non-zero if error occured
     HISTORY:
        2013-08-23 - Written - Bovy (IAS)
+       2017-10-15 - Allow a different delta for each object - agent
     """
     if u0 is None:
         u0, dummy= bovy_coords.Rz_to_uv(R,z,delta=delta)
@@ -229,7 +245,8 @@ def actionAngleFreqStaeckel_c(pot,delta,R,vR,vT,z,vz,u0=None):
                                ctypes.c_int,
                                ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
                                ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
-                               ctypes.c_double,
+                               ctypes.c_int,
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
                                ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
                                ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
                                ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
@@ -245,6 +262,10 @@ def actionAngleFreqStaeckel_c(pot,delta,R,vR,vT,z,vz,u0=None):
              vz.flags['F_CONTIGUOUS'],
              u0.flags['F_CONTIGUOUS']]
     R= numpy.require(R,dtype=numpy.float64,requirements=['C','W'])
+    delta= numpy.require(numpy.atleast_1d(delta),dtype=numpy.float64,
+                         requirements=['C','W'])
+    if len(delta) != 1 and len(delta) != len(R):
+        raise ValueError("delta must be a float or an array with the same length as the input coordinates")
     vR= numpy.require(vR,dtype=numpy.float64,requirements=['C','W'])
     vT= numpy.require(vT,dtype=numpy.float64,requirements=['C','W'])
     z= numpy.require(z,dtype=numpy.float64,requirements=['C','W'])
@@ -268,7 +289,8 @@ def actionAngleFreqStaeckel_c(pot,delta,R,vR,vT,z,vz,u0=None):
                                     ctypes.c_int(npot),
                                     pot_type,
                                     pot_args,
-                                    ctypes.c_double(delta),
+                                    ctypes.c_int(len(delta)),
+                                    delta,
                                     jr,
                                     jz,
                                     Omegar,
@@ -295,7 +317,7 @@ def actionAngleFreqAngleStaeckel_c(pot,delta,R,vR,vT,z,vz,phi,u0=None):
        using the Staeckel approximation
     INPUT:
        pot - Potential or list of such instances
-       delta - focal length of prolate spheroidal coordinates
+       delta - focal length of prolate spheroidal coordinates (float or array with one delta per object)
        R, vR, vT, z, vz, phi - coordinates (arrays)
     OUTPUT:
        (jr,jz,Omegar,Omegaphi,Omegaz,Angler,Anglephi,Anglez,err)
@@ -303,6 +325,7 @@ def actionAngleFreqAngleStaeckel_c(pot,delta,R,vR,vT,z,vz,phi,u0=None):
        err - non-zero if error occured
     HISTORY:
        2013-08-27 - Written - Bovy (IAS)
+       2017-10-15 - Allow a different delta for each object - agent
     """
     if u0 is None:
         u0, dummy= bovy_coords.Rz_to_uv(R,z,delta=delta)
@@ -333,7 +356,8 @@ def actionAngleFreqAngleStaeckel_c(pot,delta,R,vR,vT,z,vz,phi,u0=None):
                                ctypes.c_int,
                                ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
                                ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
-                               ctypes.c_double,
+                               ctypes.c_int,
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
                                ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
                                ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
                                ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
@@ -352,6 +376,10 @@ def actionAngleFreqAngleStaeckel_c(pot,delta,R,vR,vT,z,vz,phi,u0=None):
              vz.flags['F_CONTIGUOUS'],
              u0.flags['F_CONTIGUOUS']]
     R= numpy.require(R,dtype=numpy.float64,requirements=['C','W'])
+    delta= numpy.require(numpy.atleast_1d(delta),dtype=numpy.float64,
+                         requirements=['C','W'])
+    if len(delta) != 1 and len(delta) != len(R):
+        raise ValueError("delta must be a float or an array with the same length as the input coordinates")
     vR= numpy.require(vR,dtype=numpy.float64,requirements=['C','W'])
     vT= numpy.require(vT,dtype=numpy.float64,requirements=['C','W'])
     z= numpy.require(z,dtype=numpy.float64,requirements=['C','W'])
@@ -379,7 +407,8 @@ def actionAngleFreqAngleStaeckel_c(pot,delta,R,vR,vT,z,vz,phi,u0=None):
                                     ctypes.c_int(npot),
                                     pot_type,
                                     pot_args,
-                                    ctypes.c_double(delta),
+                                    ctypes.c_int(len(delta)),
+                                    delta,
                                     jr,
                                     jz,
                                     Omegar,
@@ -405,3 +434,182 @@ def actionAngleFreqAngleStaeckel_c(pot,delta,R,vR,vT,z,vz,phi,u0=None):
     return (jr,jz,Omegar,Omegaphi,Omegaz,Angler,
             Anglephi,Anglez,err.value)
 
+
+def actionAngleStaeckel_xvFreqs_c(pot,delta,jr,jphi,jz,angler,anglephi,anglez,
+                                  useu0=False,maxiter=100,tol=10.**-6.):
+    """
+    NAME:
+       actionAngleStaeckel_xvFreqs_c
+    PURPOSE:
+       Use C to calculate the phase-space coordinates corresponding to actions and angles in the Staeckel approximation, using Newton iterations starting from the epicycle approximation
+    INPUT:
+       pot - Potential or list of such instances
+       delta - focal length of prolate spheroidal coordinates (float or array with one delta per object)
+       jr, jphi, jz, angler, anglephi, anglez - actions and angles (arrays)
+       useu0= (False) if True, use u0 from calcu0 rather than the u of each point
+       maxiter= (100) maximum number of Newton iterations
+       tol= (10^-6) tolerance on the difference in sqrt(2J) x (cos(angle),sin(angle))
+    OUTPUT:
+       (R,vR,vT,z,vz,phi,Omegar,Omegaphi,Omegaz,niter,err)
+       R,...,Omegaz : array, shape (len(jr))
+       niter - number of Newton iterations for each object
+       err - array of flags, non-zero when the iterations did not converge
+    HISTORY:
+       2017-10-24 - Written - agent
+    """
+    #Parse the potential
+    npot, pot_type, pot_args= _parse_pot(pot,potforactions=True)
+
+    #Set up result arrays
+    out= [numpy.empty(len(jr)) for ii in range(9)]
+    niter= numpy.empty(len(jr),dtype=numpy.int32)
+    err= numpy.empty(len(jr),dtype=numpy.int32)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleStaeckel_xvFreqsFunc= _lib.actionAngleStaeckel_xvFreqs
+    actionAngleStaeckel_xvFreqsFunc.argtypes=\
+        [ctypes.c_int]\
+        +[ndpointer(dtype=numpy.float64,flags=ndarrayFlags)
+          for ii in range(6)]\
+        +[ctypes.c_int,
+          ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_int,
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_int,
+          ctypes.c_int,
+          ctypes.c_double]\
+        +[ndpointer(dtype=numpy.float64,flags=ndarrayFlags)
+          for ii in range(9)]\
+        +[ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.int32,flags=ndarrayFlags)]
+
+    #Array requirements
+    jr= numpy.require(jr,dtype=numpy.float64,requirements=['C','W'])
+    jphi= numpy.require(jphi,dtype=numpy.float64,requirements=['C','W'])
+    jz= numpy.require(jz,dtype=numpy.float64,requirements=['C','W'])
+    angler= numpy.require(angler,dtype=numpy.float64,requirements=['C','W'])
+    anglephi= numpy.require(anglephi,dtype=numpy.float64,
+                            requirements=['C','W'])
+    anglez= numpy.require(anglez,dtype=numpy.float64,requirements=['C','W'])
+    delta= numpy.require(numpy.atleast_1d(delta),dtype=numpy.float64,
+                         requirements=['C','W'])
+    if len(delta) != 1 and len(delta) != len(jr):
+        raise ValueError("delta must be a float or an array with the same length as the input actions")
+
+    #Run the C code
+    actionAngleStaeckel_xvFreqsFunc(len(jr),jr,jphi,jz,angler,anglephi,anglez,
+                                    ctypes.c_int(npot),pot_type,pot_args,
+                                    ctypes.c_int(len(delta)),delta,
+                                    ctypes.c_int(useu0),
+                                    ctypes.c_int(maxiter),
+                                    ctypes.c_double(tol),
+                                    *(out+[niter,err]))
+    return tuple(out+[niter,err])
+
+def actionAngleStaeckelGrid_c(pot,delta,R,vR,vT,z,vz,Lzs,
+                              ERLInterp,ERLmax,ERaInterp,ERamax,
+                              jrLzInterp,jzLzInterp,logu0Interp,
+                              jrFiltered,jzFiltered):
+    """
+    NAME:
+       actionAngleStaeckelGrid_c
+    PURPOSE:
+       Use C to evaluate actions by interpolating the grids of actionAngleStaeckelGrid, directly calculating the actions of objects outside of the grid
+    INPUT:
+       pot - Potential or list of such instances
+       delta - focal length of prolate spheroidal coordinates
+       R, vR, vT, z, vz - coordinates (arrays)
+       Lzs - grid in Lz
+       ERLInterp, ERLmax - spline of log(ERLmax-E_c(Lz)) and ERLmax
+       ERaInterp, ERamax - spline of log(ERamax-E(Ramax;Lz)) and ERamax
+       jrLzInterp, jzLzInterp - splines of the log of the maximum jr and jz (+10^-5) as a function of Lz
+       logu0Interp - RectBivariateSpline of log(u0) on the (Lz,E) grid
+       jrFiltered, jzFiltered - spline-filtered log(jr) and log(jz) grids, in (psi,Lz,E) order
+    OUTPUT:
+       (jr,jz,err)
+       jr,jz : array, shape (len(R))
+       err - non-zero if error occured
+    HISTORY:
+       2017-10-21 - Written - agent
+    """
+    #Parse the potential
+    npot, pot_type, pot_args= _parse_pot(pot,potforactions=True)
+
+    #Set up result arrays
+    jr= numpy.empty(len(R))
+    jz= numpy.empty(len(R))
+    err= ctypes.c_int(0)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleStaeckelGrid_actionsFunc= _lib.actionAngleStaeckelGrid_actions
+    actionAngleStaeckelGrid_actionsFunc.argtypes=\
+        [ctypes.c_int]\
+        +[ndpointer(dtype=numpy.float64,flags=ndarrayFlags)
+          for ii in range(5)]\
+        +[ctypes.c_int,
+          ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_double,
+          ctypes.c_int,
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_int,
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_double,
+          ctypes.c_double,
+          ctypes.c_int,
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_int,
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.c_int,
+          ctypes.c_int,
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+          ctypes.POINTER(ctypes.c_int)]
+
+    #Array requirements
+    R= numpy.require(R,dtype=numpy.float64,requirements=['C','W'])
+    vR= numpy.require(vR,dtype=numpy.float64,requirements=['C','W'])
+    vT= numpy.require(vT,dtype=numpy.float64,requirements=['C','W'])
+    z= numpy.require(z,dtype=numpy.float64,requirements=['C','W'])
+    vz= numpy.require(vz,dtype=numpy.float64,requirements=['C','W'])
+    Lzs= numpy.require(Lzs,dtype=numpy.float64,requirements=['C','W'])
+    # The splines in Lz all have the same knots
+    t= numpy.require(ERLInterp._eval_args[0],dtype=numpy.float64,
+                     requirements=['C','W'])
+    Lzcoeffs= numpy.require(\
+        numpy.array([ERLInterp._eval_args[1],ERaInterp._eval_args[1],
+                     jrLzInterp._eval_args[1],jzLzInterp._eval_args[1]]),
+        dtype=numpy.float64,requirements=['C','W'])
+    tLz= numpy.require(logu0Interp.tck[0],dtype=numpy.float64,
+                       requirements=['C','W'])
+    tE= numpy.require(logu0Interp.tck[1],dtype=numpy.float64,
+                      requirements=['C','W'])
+    logu0coeffs= numpy.require(logu0Interp.tck[2],dtype=numpy.float64,
+                               requirements=['C','W'])
+    jrFiltered= numpy.require(jrFiltered,dtype=numpy.float64,
+                              requirements=['C','W'])
+    jzFiltered= numpy.require(jzFiltered,dtype=numpy.float64,
+                              requirements=['C','W'])
+
+    #Run the C code
+    actionAngleStaeckelGrid_actionsFunc(len(R),R,vR,vT,z,vz,
+                                        ctypes.c_int(npot),pot_type,pot_args,
+                                        ctypes.c_double(delta),
+                                        ctypes.c_int(len(Lzs)),Lzs,
+                                        ctypes.c_int(len(t)),t,Lzcoeffs,
+                                        ctypes.c_double(ERLmax),
+                                        ctypes.c_double(ERamax),
+                                        ctypes.c_int(len(tLz)),tLz,
+                                        ctypes.c_int(len(tE)),tE,logu0coeffs,
+                                        ctypes.c_int(jrFiltered.shape[2]),
+                                        ctypes.c_int(jrFiltered.shape[0]),
+                                        jrFiltered,jzFiltered,
+                                        jr,jz,ctypes.byref(err))
+    return (jr,jz,err.value)
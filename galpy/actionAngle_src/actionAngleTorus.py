@@ -7,7 +7,9 @@
 #
 ###############################################################################
 import warnings
+from collections import OrderedDict
 import numpy
+from scipy.spatial import cKDTree
 from galpy.potential import MWPotential, _isNonAxi
 from galpy.util import galpyWarning
 import galpy.actionAngle_src.actionAngleTorus_c as actionAngleTorus_c
@@ -18,6 +20,210 @@ _autofit_errvals[-1]= 'something wrong with input, usually bad starting values f
 _autofit_errvals[-2]= 'Fit failed the goal by a factor <= 2'
 _autofit_errvals[-3]= 'Fit failed the goal by more than 2'
 _autofit_errvals[-4]= 'Fit aborted: serious problems occured'
+# Cached tori within this relative distance in action space are used as the
+# starting point for fitting a new torus
+_CACHE_NEARBY= 0.1
+class _FittedTorus(object):
+    """Torus fit by the C code, which is freed when no longer referenced"""
+    def __init__(self,handle,Omegar,Omegaphi,Omegaz,flag):
+        self.handle= handle
+        self.Omegar= Omegar
+        self.Omegaphi= Omegaphi
+        self.Omegaz= Omegaz
+        self.flag= flag
+        self.nbytes= actionAngleTorus_c.actionAngleTorus_sizeTorus_c(handle)
+        return None
+
+    def __del__(self,_free=actionAngleTorus_c.actionAngleTorus_freeTorus_c):
+        _free(self.handle)
+
+class _TorusCache(object):
+    """LRU cache of fitted tori for a given potential, keyed on (J,tol) and
+    limited to maxbytes of memory"""
+    def __init__(self,pot,maxbytes):
+        self._pot= pot
+        self._maxbytes= maxbytes
+        self._tori= OrderedDict()
+        self.nbytes= 0
+        self.hits= 0
+        self.misses= 0
+        self.seeded= 0
+        return None
+
+    def __len__(self):
+        return len(self._tori)
+
+    def get(self,jr,jphi,jz,tol):
+        """Return the _FittedTorus for each of the tori (jr,jphi,jz) ([ntorus]
+        arrays), fitting those that are not in the cache in a single C call,
+        each starting from the nearest cached torus if there is one close
+        by; failed fits are returned, but not cached"""
+        keys= [(float(r),float(p),float(z),float(tol))
+               for r,p,z in zip(jr,jphi,jz)]
+        tori= [None]*len(keys)
+        missed= OrderedDict() # key -> indices in keys
+        for ii,key in enumerate(keys):
+            torus= self._tori.pop(key,None)
+            if torus is None:
+                missed.setdefault(key,[]).append(ii)
+                continue
+            self.hits+= 1
+            self._tori[key]= torus # most recently used at the end
+            tori[ii]= torus
+        if len(missed) == 0: return tori
+        mkeys= list(missed.keys())
+        starts= self._nearest(mkeys)
+        self.misses+= len(mkeys)
+        self.seeded+= numpy.sum([not start is None for start in starts])
+        handles,Omegar,Omegaphi,Omegaz,flag=\
+            actionAngleTorus_c.actionAngleTorus_fitTori_batch_c(\
+            self._pot,
+            [key[0] for key in mkeys],
+            [key[1] for key in mkeys],
+            [key[2] for key in mkeys],
+            tol=tol,
+            starts=[None if start is None else start.handle
+                    for start in starts])
+        for jj,key in enumerate(mkeys):
+            torus= _FittedTorus(handles[jj],Omegar[jj],Omegaphi[jj],
+                                Omegaz[jj],flag[jj])
+            for ii in missed[key]: tori[ii]= torus
+            if flag[jj] == 0: self._add(key,torus)
+        return tori
+
+    def _nearest(self,keys):
+        """Nearest cached torus with the same tol for each key, if close"""
+        ckeys= [k for k in self._tori if k[3] == keys[0][3]]
+        if len(ckeys) == 0: return [None]*len(keys)
+        J= numpy.array(keys)[:,:3]
+        dJ, indx= cKDTree(numpy.array(ckeys)[:,:3]).query(J)
+        return [self._tori[ckeys[ii]] if d <= _CACHE_NEARBY*numpy.sqrt(numpy.sum(j**2.)) else None
+                for d,ii,j in zip(dJ,indx,J)]
+
+    def _add(self,key,torus):
+        """Add a torus, evicting the least recently used ones to stay
+        within the memory budget"""
+        self._tori[key]= torus
+        self.nbytes+= torus.nbytes
+        while self.nbytes > self._maxbytes and len(self._tori) > 0:
+            self.nbytes-= self._tori.popitem(last=False)[1].nbytes
+        return None
+
+    def clear(self):
+        self._tori.clear()
+        self.nbytes= 0
+        return None
+
+# Cached versions of the batched C functions, with the same outputs;
+# internally, the torus code orders actions and angles as (r,z,phi) and
+# (x,v) as (R,z,phi,vR,vz,vT)
+_XV_TO_INTERNAL= [0,3,5,1,4,2]
+def _freqs(tori):
+    return (numpy.array([torus.Omegar for torus in tori]),
+            numpy.array([torus.Omegaphi for torus in tori]),
+            numpy.array([torus.Omegaz for torus in tori]),
+            numpy.array([torus.flag for torus in tori],dtype=numpy.int32))
+
+def _actions(jr,jphi,jz):
+    return numpy.broadcast_arrays(numpy.atleast_1d(jr),
+                                  numpy.atleast_1d(jphi),
+                                  numpy.atleast_1d(jz))
+
+def _angles(ntorus,*angles):
+    return [numpy.broadcast_to(numpy.atleast_2d(angle),
+                               (ntorus,numpy.shape(angle)[-1])).astype('float')
+            for angle in angles]
+
+def _xv_internal(tori,angler,anglephi,anglez):
+    """(x,v) as an [ntorus,N,6] array in the internal order"""
+    xv= actionAngleTorus_c.actionAngleTorus_xvTori_batch_c(\
+        [torus.handle for torus in tori],angler,anglephi,anglez)
+    return numpy.moveaxis(numpy.array(xv)[_XV_TO_INTERNAL],0,-1)
+
+def _Freqs_cached(cache,jr,jphi,jz,tol):
+    jr,jphi,jz= _actions(jr,jphi,jz)
+    return _freqs(cache.get(jr,jphi,jz,tol))
+
+def _xvFreqs_cached(cache,jr,jphi,jz,angler,anglephi,anglez,tol):
+    jr,jphi,jz= _actions(jr,jphi,jz)
+    tori= cache.get(jr,jphi,jz,tol)
+    xv= actionAngleTorus_c.actionAngleTorus_xvTori_batch_c(\
+        [torus.handle for torus in tori],angler,anglephi,anglez)
+    return xv+_freqs(tori)
+
+def _perturbed_tori(cache,jr,jphi,jz,tol,dJ):
+    """Fit the tori and those offset by dJ in each action (in the internal
+    order) in a single call; returns the tori, a list of the three sets of
+    offset tori, and the actual offsets ([3,ntorus])"""
+    J= numpy.array([jr,jz,jphi],dtype='float')
+    JdJs= [J]
+    djs= numpy.empty_like(J)
+    for ii in range(3):
+        JdJ= numpy.copy(J)
+        djs[ii]= (J[ii]+dJ)-J[ii]
+        JdJ[ii]+= djs[ii]
+        JdJs.append(JdJ)
+    JdJs= numpy.concatenate(JdJs,axis=1)
+    tori= cache.get(JdJs[0],JdJs[2],JdJs[1],tol)
+    ntorus= len(jr)
+    return (tori[:ntorus],
+            [tori[(ii+1)*ntorus:(ii+2)*ntorus] for ii in range(3)],djs)
+
+def _hessian_cached(cache,jr,jphi,jz,tol,dJ):
+    jr,jphi,jz= _actions(jr,jphi,jz)
+    tori, dtori, djs= _perturbed_tori(cache,jr,jphi,jz,tol,dJ)
+    freqs= _freqs(tori)
+    om= numpy.array([freqs[0],freqs[2],freqs[1]]).T
+    dOdJ= numpy.empty((len(jr),3,3))
+    for ii in range(3):
+        dfreqs= _freqs(dtori[ii])
+        dOdJ[:,:,ii]= (numpy.array([dfreqs[0],dfreqs[2],dfreqs[1]]).T-om)\
+            /djs[ii,:,None]
+    return (dOdJ,)+freqs
+
+def _jacobian_cached(cache,jr,jphi,jz,angler,anglephi,anglez,tol,dJ):
+    jr,jphi,jz= _actions(jr,jphi,jz)
+    angler,anglephi,anglez= _angles(len(jr),angler,anglephi,anglez)
+    tori, dtori, djs= _perturbed_tori(cache,jr,jphi,jz,tol,dJ)
+    xv= actionAngleTorus_c.actionAngleTorus_xvTori_batch_c(\
+        [torus.handle for torus in tori],angler,anglephi,anglez)
+    xvi= numpy.moveaxis(numpy.array(xv)[_XV_TO_INTERNAL],0,-1)
+    dxvOdJa= numpy.empty(xvi.shape+(6,))
+    # Angle derivatives on these tori
+    angles= [angler,anglez,anglephi]
+    for jj in range(3):
+        dangles= list(angles)
+        dA= (angles[jj]+1.e-8)-angles[jj]
+        dangles[jj]= angles[jj]+dA
+        dxvOdJa[:,:,:,jj+3]=\
+            (_xv_internal(tori,dangles[0],dangles[2],dangles[1])-xvi)\
+            /dA[:,:,None]
+    # Action derivatives from nearby tori
+    freqs= _freqs(tori)
+    om= numpy.array([freqs[0],freqs[2],freqs[1]]).T
+    dOdJ= numpy.empty((len(jr),3,3))
+    for jj in range(3):
+        dxvOdJa[:,:,:,jj]=\
+            (_xv_internal(dtori[jj],angler,anglephi,anglez)-xvi)\
+            /djs[jj,:,None,None]
+        dfreqs= _freqs(dtori[jj])
+        dOdJ[:,:,jj]= (numpy.array([dfreqs[0],dfreqs[2],dfreqs[1]]).T-om)\
+            /djs[jj,:,None]
+    return xv+(dxvOdJa,dOdJ)+freqs
+
+def _single(out):
+    """Outputs for a single torus from the outputs for multiple tori"""
+    return tuple(o[0] for o in out)
+
+def _batch(*actions):
+    """Whether multiple tori are requested"""
+    return numpy.any([numpy.ndim(j) > 0 for j in actions])
+def _warn_autofit_batch(flag):
+    """Warn about the first non-zero AutoFit return status for multiple tori"""
+    if numpy.any(flag != 0):
+        bad= flag[flag != 0]
+        warnings.warn("actionAngleTorus' AutoFit exited with non-zero return status for %i tori, e.g., %i: %s" % (len(bad),bad[0],_autofit_errvals[bad[0]]),
+                      galpyWarning)
 class actionAngleTorus(object):
     """Action-angle formalism using the Torus machinery"""
     def __init__(self,*args,**kwargs):
@@ -38,6 +244,8 @@ class actionAngleTorus(object):
 
            dJ= default action difference when computing derivatives (Hessian or Jacobian)
 
+           cache= (0) memory budget in bytes for a least-recently-used cache of fitted tori (0: no cache); tori with the same actions and tolerance are then re-used without refitting, while new tori are fit starting from the nearest cached torus
+
         OUTPUT:
 
            instance
@@ -46,6 +254,8 @@ class actionAngleTorus(object):
 
            2015-08-07 - Written - Bovy (UofT)
 
+           2017-10-09 - Added cache= - agent
+
         """
         if not 'pot' in kwargs: #pragma: no cover
             raise IOError("Must specify pot= for actionAngleTorus")
@@ -63,6 +273,70 @@ class actionAngleTorus(object):
             raise RuntimeError('actionAngleTorus instances cannot be used, because the actionAngleTorus_c extension failed to load')
         self._tol= kwargs.get('tol',0.001)
         self._dJ= kwargs.get('dJ',0.001)
+        if kwargs.get('cache',0) > 0:
+            self._cache= _TorusCache(self._pot,kwargs['cache'])
+        else:
+            self._cache= None
+        return None
+
+    def cache_info(self):
+        """
+        NAME:
+
+           cache_info
+
+        PURPOSE:
+
+           return statistics of the cache of fitted tori
+
+        INPUT:
+
+           (none)
+
+        OUTPUT:
+
+           dictionary with the number of hits, misses, misses whose fit started from a nearby cached torus (seeded), the current number of cached tori (size), their memory in bytes (nbytes), and the memory budget (maxbytes)
+
+        HISTORY:
+
+           2017-10-09 - Written - agent
+
+        """
+        if self._cache is None:
+            return {'hits':0,'misses':0,'seeded':0,'size':0,'nbytes':0,
+                    'maxbytes':0}
+        return {'hits':self._cache.hits,
+                'misses':self._cache.misses,
+                'seeded':self._cache.seeded,
+                'size':len(self._cache),
+                'nbytes':self._cache.nbytes,
+                'maxbytes':self._cache._maxbytes}
+
+    def clear_cache(self):
+        """
+        NAME:
+
+           clear_cache
+
+        PURPOSE:
+
+           remove all fitted tori from the cache (statistics are kept)
+
+        INPUT:
+
+           (none)
+
+        OUTPUT:
+
+           (none)
+
+        HISTORY:
+
+           2017-10-09 - Written - agent
+
+        """
+        if not self._cache is None:
+            self._cache.clear()
         return None
     
     def __call__(self,jr,jphi,jz,angler,anglephi,anglez,**kwargs):
@@ -73,42 +347,36 @@ class actionAngleTorus(object):
 
         PURPOSE:
 
-           evaluate the phase-space coordinates (x,v) for a number of angles on a single torus
+           evaluate the phase-space coordinates (x,v) for a number of angles on a single torus or on multiple tori
 
         INPUT:
 
-           jr - radial action (scalar)
+           jr - radial action (scalar or array [ntorus])
 
-           jphi - azimuthal action (scalar)
+           jphi - azimuthal action (scalar or array [ntorus])
 
-           jz - vertical action (scalar)
+           jz - vertical action (scalar or array [ntorus])
 
-           angler - radial angle (array [N])
+           angler - radial angle (array [N] or [ntorus,N])
 
-           anglephi - azimuthal angle (array [N])
+           anglephi - azimuthal angle (array [N] or [ntorus,N])
 
-           anglez - vertical angle (array [N])
+           anglez - vertical angle (array [N] or [ntorus,N])
 
            tol= (object-wide value) goal for |dJ|/|J| along the torus
 
         OUTPUT:
 
-           [R,vR,vT,z,vz,phi]
+           [R,vR,vT,z,vz,phi] ([N,6] array for a single torus, [ntorus,N,6] for multiple tori)
 
         HISTORY:
 
            2015-08-07 - Written - Bovy (UofT)
 
+           2017-10-06 - Added multiple tori, fit in a single C call - agent
+
         """
-        out= actionAngleTorus_c.actionAngleTorus_xvFreqs_c(\
-            self._pot,
-            jr,jphi,jz,
-            angler,anglephi,anglez,
-            tol=kwargs.get('tol',self._tol))
-        if out[9] != 0:
-            warnings.warn("actionAngleTorus' AutoFit exited with non-zero return status %i: %s" % (out[9],_autofit_errvals[out[9]]),
-                          galpyWarning)
-        return numpy.array(out[:6]).T
+        return self.xvFreqs(jr,jphi,jz,angler,anglephi,anglez,**kwargs)[0]
 
     def xvFreqs(self,jr,jphi,jz,angler,anglephi,anglez,**kwargs):
         """
@@ -118,38 +386,57 @@ class actionAngleTorus(object):
 
         PURPOSE:
 
-           evaluate the phase-space coordinates (x,v) for a number of angles on a single torus as well as the frequencies
+           evaluate the phase-space coordinates (x,v) for a number of angles on a single torus or on multiple tori as well as the frequencies
 
         INPUT:
 
-           jr - radial action (scalar)
+           jr - radial action (scalar or array [ntorus])
 
-           jphi - azimuthal action (scalar)
+           jphi - azimuthal action (scalar or array [ntorus])
 
-           jz - vertical action (scalar)
+           jz - vertical action (scalar or array [ntorus])
 
-           angler - radial angle (array [N])
+           angler - radial angle (array [N] or [ntorus,N])
 
-           anglephi - azimuthal angle (array [N])
+           anglephi - azimuthal angle (array [N] or [ntorus,N])
 
-           anglez - vertical angle (array [N])
+           anglez - vertical angle (array [N] or [ntorus,N])
 
            tol= (object-wide value) goal for |dJ|/|J| along the torus
 
         OUTPUT:
 
-           ([R,vR,vT,z,vz,phi],OmegaR,Omegaphi,Omegaz,AutoFit error message)
+           ([R,vR,vT,z,vz,phi],OmegaR,Omegaphi,Omegaz,AutoFit error message); for multiple tori, [ntorus,N,6] and [ntorus] arrays
 
         HISTORY:
 
            2015-08-07 - Written - Bovy (UofT)
 
+           2017-10-06 - Added multiple tori, fit in a single C call - agent
+
         """
-        out= actionAngleTorus_c.actionAngleTorus_xvFreqs_c(\
-            self._pot,
-            jr,jphi,jz,
-            angler,anglephi,anglez,
-            tol=kwargs.get('tol',self._tol))
+        batch= _batch(jr,jphi,jz)
+        if not self._cache is None:
+            out= _xvFreqs_cached(self._cache,jr,jphi,jz,
+                                 angler,anglephi,anglez,
+                                 kwargs.get('tol',self._tol))
+            if not batch: out= _single(out)
+        elif batch:
+            out= actionAngleTorus_c.actionAngleTorus_xvFreqs_batch_c(\
+                self._pot,
+                jr,jphi,jz,
+                angler,anglephi,anglez,
+                tol=kwargs.get('tol',self._tol))
+        else:
+            out= actionAngleTorus_c.actionAngleTorus_xvFreqs_c(\
+                self._pot,
+                jr,jphi,jz,
+                angler,anglephi,anglez,
+                tol=kwargs.get('tol',self._tol))
+        if batch:
+            _warn_autofit_batch(out[9])
+            return (numpy.rollaxis(numpy.array(out[:6]),0,3),
+                    out[6],out[7],out[8],out[9])
         if out[9] != 0:
             warnings.warn("actionAngleTorus' AutoFit exited with non-zero return status %i: %s" % (out[9],_autofit_errvals[out[9]]),
                           galpyWarning)
@@ -163,31 +450,47 @@ class actionAngleTorus(object):
 
         PURPOSE:
 
-           return the frequencies corresponding to a torus
+           return the frequencies corresponding to a torus or to multiple tori
 
         INPUT:
 
-           jr - radial action (scalar)
+           jr - radial action (scalar or array [ntorus])
 
-           jphi - azimuthal action (scalar)
+           jphi - azimuthal action (scalar or array [ntorus])
 
-           jz - vertical action (scalar)
+           jz - vertical action (scalar or array [ntorus])
 
            tol= (object-wide value) goal for |dJ|/|J| along the torus
 
         OUTPUT:
 
-           (OmegaR,Omegaphi,Omegaz)
+           (OmegaR,Omegaphi,Omegaz,AutoFit error message); [ntorus] arrays for multiple tori
 
         HISTORY:
 
            2015-08-07 - Written - Bovy (UofT)
 
+           2017-10-06 - Added multiple tori, fit in a single C call - agent
+
         """
-        out= actionAngleTorus_c.actionAngleTorus_Freqs_c(\
-            self._pot,
-            jr,jphi,jz,
-            tol=kwargs.get('tol',self._tol))
+        batch= _batch(jr,jphi,jz)
+        if not self._cache is None:
+            out= _Freqs_cached(self._cache,jr,jphi,jz,
+                               kwargs.get('tol',self._tol))
+            if not batch: out= _single(out)
+        elif batch:
+            out= actionAngleTorus_c.actionAngleTorus_Freqs_batch_c(\
+                self._pot,
+                jr,jphi,jz,
+                tol=kwargs.get('tol',self._tol))
+        else:
+            out= actionAngleTorus_c.actionAngleTorus_Freqs_c(\
+                self._pot,
+                jr,jphi,jz,
+                tol=kwargs.get('tol',self._tol))
+        if batch:
+            _warn_autofit_batch(out[3])
+            return out
         if out[3] != 0:
             warnings.warn("actionAngleTorus' AutoFit exited with non-zero return status %i: %s" % (out[3],_autofit_errvals[out[3]]),
                           galpyWarning)
@@ -201,15 +504,15 @@ class actionAngleTorus(object):
 
         PURPOSE:
 
-           return the Hessian d Omega / d J and frequencies Omega corresponding to a torus
+           return the Hessian d Omega / d J and frequencies Omega corresponding to a torus or to multiple tori
 
         INPUT:
 
-           jr - radial action (scalar)
+           jr - radial action (scalar or array [ntorus])
 
-           jphi - azimuthal action (scalar)
+           jphi - azimuthal action (scalar or array [ntorus])
 
-           jz - vertical action (scalar)
+           jz - vertical action (scalar or array [ntorus])
 
            tol= (object-wide value) goal for |dJ|/|J| along the torus
 
@@ -219,18 +522,42 @@ class actionAngleTorus(object):
 
         OUTPUT:
 
-           (dO/dJ,Omegar,Omegaphi,Omegaz,Autofit error message)
+           (dO/dJ,Omegar,Omegaphi,Omegaz,Autofit error message); for multiple tori, dO/dJ is a [ntorus,3,3] array and the others are [ntorus] arrays
 
         HISTORY:
 
            2016-07-15 - Written - Bovy (UofT)
 
+           2017-10-06 - Added multiple tori, fit in a single C call - agent
+
         """
-        out= actionAngleTorus_c.actionAngleTorus_hessian_c(\
-            self._pot,
-            jr,jphi,jz,
-            tol=kwargs.get('tol',self._tol),
-            dJ=kwargs.get('dJ',self._dJ))
+        batch= _batch(jr,jphi,jz)
+        if not self._cache is None:
+            out= _hessian_cached(self._cache,jr,jphi,jz,
+                                 kwargs.get('tol',self._tol),
+                                 kwargs.get('dJ',self._dJ))
+            if not batch: out= _single(out)
+        elif batch:
+            out= actionAngleTorus_c.actionAngleTorus_hessian_batch_c(\
+                self._pot,
+                jr,jphi,jz,
+                tol=kwargs.get('tol',self._tol),
+                dJ=kwargs.get('dJ',self._dJ))
+        else:
+            out= actionAngleTorus_c.actionAngleTorus_hessian_c(\
+                self._pot,
+                jr,jphi,jz,
+                tol=kwargs.get('tol',self._tol),
+                dJ=kwargs.get('dJ',self._dJ))
+        if batch:
+            _warn_autofit_batch(out[4])
+            # Re-arrange frequencies and actions to r,phi,z
+            out[0][:,:,:]= out[0][:,:,[0,2,1]]
+            out[0][:,:,:]= out[0][:,[0,2,1]]
+            if not kwargs.get('nosym',False):
+                # explicitly symmetrize
+                out[0][:]= 0.5*(out[0]+numpy.swapaxes(out[0],1,2))
+            return out
         if out[4] != 0:
             warnings.warn("actionAngleTorus' AutoFit exited with non-zero return status %i: %s" % (out[4],_autofit_errvals[out[4]]),
                           galpyWarning)
@@ -250,21 +577,21 @@ class actionAngleTorus(object):
 
         PURPOSE:
 
-           return [R,vR,vT,z,vz,phi], the Jacobian d [R,vR,vT,z,vz,phi] / d (J,angle), the Hessian dO/dJ, and frequencies Omega corresponding to a torus at multiple sets of angles
+           return [R,vR,vT,z,vz,phi], the Jacobian d [R,vR,vT,z,vz,phi] / d (J,angle), the Hessian dO/dJ, and frequencies Omega corresponding to a torus (or to multiple tori) at multiple sets of angles
 
         INPUT:
 
-           jr - radial action (scalar)
+           jr - radial action (scalar or array [ntorus])
 
-           jphi - azimuthal action (scalar)
+           jphi - azimuthal action (scalar or array [ntorus])
 
-           jz - vertical action (scalar)
+           jz - vertical action (scalar or array [ntorus])
 
-           angler - radial angle (array [N])
+           angler - radial angle (array [N] or [ntorus,N])
 
-           anglephi - azimuthal angle (array [N])
+           anglephi - azimuthal angle (array [N] or [ntorus,N])
 
-           anglez - vertical angle (array [N])
+           anglez - vertical angle (array [N] or [ntorus,N])
 
            tol= (object-wide value) goal for |dJ|/|J| along the torus
 
@@ -284,17 +611,49 @@ class actionAngleTorus(object):
 
             Autofit error message)
 
+            for multiple tori, all outputs have an additional leading [ntorus] dimension
+
         HISTORY:
 
            2016-07-19 - Written - Bovy (UofT)
 
+           2017-10-06 - Added multiple tori, fit in a single C call - agent
+
         """
-        out= actionAngleTorus_c.actionAngleTorus_jacobian_c(\
-            self._pot,
-            jr,jphi,jz,
-            angler,anglephi,anglez,
-            tol=kwargs.get('tol',self._tol),
-            dJ=kwargs.get('dJ',self._dJ))
+        batch= _batch(jr,jphi,jz)
+        if not self._cache is None:
+            out= _jacobian_cached(self._cache,jr,jphi,jz,
+                                  angler,anglephi,anglez,
+                                  kwargs.get('tol',self._tol),
+                                  kwargs.get('dJ',self._dJ))
+            if not batch: out= _single(out)
+        elif batch:
+            out= actionAngleTorus_c.actionAngleTorus_jacobian_batch_c(\
+                self._pot,
+                jr,jphi,jz,
+                angler,anglephi,anglez,
+                tol=kwargs.get('tol',self._tol),
+                dJ=kwargs.get('dJ',self._dJ))
+        else:
+            out= actionAngleTorus_c.actionAngleTorus_jacobian_c(\
+                self._pot,
+                jr,jphi,jz,
+                angler,anglephi,anglez,
+                tol=kwargs.get('tol',self._tol),
+                dJ=kwargs.get('dJ',self._dJ))
+        if batch:
+            _warn_autofit_batch(out[11])
+            # Re-arrange actions,angles to r,phi,z
+            out[6][:,:,:,:]= out[6][:,:,:,[0,2,1,3,5,4]]
+            out[7][:,:,:]= out[7][:,:,[0,2,1]]
+            out[7][:,:,:]= out[7][:,[0,2,1]]
+            # Re-arrange x,v to R,vR,vT,z,vz,phi
+            out[6][:,:,:]= out[6][:,:,[0,3,5,1,4,2]]
+            if not kwargs.get('nosym',False):
+                # explicitly symmetrize
+                out[7][:]= 0.5*(out[7]+numpy.swapaxes(out[7],1,2))
+            return (numpy.rollaxis(numpy.array(out[:6]),0,3),out[6],out[7],
+                    out[8],out[9],out[10],out[11])
         if out[11] != 0:
             warnings.warn("actionAngleTorus' AutoFit exited with non-zero return status %i: %s" % (out[11],_autofit_errvals[out[11]]),
                           galpyWarning)
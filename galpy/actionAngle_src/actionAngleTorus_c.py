@@ -6,7 +6,7 @@ import ctypes
 import ctypes.util
 import numpy
 from numpy.ctypeslib import ndpointer
-from galpy.util import galpyWarning
+from galpy.util import galpyWarning, config
 from galpy.orbit_src.integrateFullOrbit import _parse_pot
 #Find and load the library
 _lib= None
@@ -35,6 +35,7 @@ if _lib is None: #pragma: no cover
     _ext_loaded= False
 else:
     _ext_loaded= True
+    config._register_openmp_lib(_lib)
 
 def actionAngleTorus_xvFreqs_c(pot,jr,jphi,jz,
                                angler,anglephi,anglez,
@@ -392,3 +393,514 @@ def actionAngleTorus_jacobian_c(pot,jr,jphi,jz,angler,anglephi,anglez,
             dOdJT.reshape((3,3)).T,
             Omegar[0],Omegaphi[0],Omegaz[0],
             flag.value)
+
+def actionAngleTorus_xvFreqs_batch_c(pot,jr,jphi,jz,
+                                     angler,anglephi,anglez,
+                                     tol=0.003):
+    """
+    NAME:
+       actionAngleTorus_xvFreqs_batch_c
+    PURPOSE:
+       compute configuration (x,v) and frequencies of sets of angles on multiple tori in a single call (parallelized over tori with OpenMP)
+    INPUT:
+       pot - Potential object or list thereof
+       jr - radial action (array [ntorus])
+       jphi - azimuthal action (array [ntorus])
+       jz - vertical action (array [ntorus])
+       angler - radial angle (array [ntorus,N])
+       anglephi - azimuthal angle (array [ntorus,N])
+       anglez - vertical angle (array [ntorus,N])
+       tol= (0.003) goal for |dJ|/|J| along the torus
+    OUTPUT:
+       (R,vR,vT,z,vz,phi,Omegar,Omegaphi,Omegaz,flag); phase-space coordinates are [ntorus,N] arrays, frequencies and flags [ntorus] arrays
+    HISTORY:
+       2017-10-06 - Written - agent
+    """
+    #Parse the potential
+    npot, pot_type, pot_args= _parse_pot(pot,potfortorus=True)
+
+    #Sort the tori in action space, such that each fit starts from a neighbor
+    jr, jphi, jz, angler, anglephi, anglez, sindx=\
+        _sort_tori(jr,jphi,jz,angler,anglephi,anglez)
+    ntorus, na= angler.shape
+
+    #Set up result arrays
+    R= numpy.empty((ntorus,na))
+    vR= numpy.empty((ntorus,na))
+    vT= numpy.empty((ntorus,na))
+    z= numpy.empty((ntorus,na))
+    vz= numpy.empty((ntorus,na))
+    phi= numpy.empty((ntorus,na))
+    Omegar= numpy.empty(ntorus)
+    Omegaphi= numpy.empty(ntorus)
+    Omegaz= numpy.empty(ntorus)
+    flag= numpy.zeros(ntorus,dtype=numpy.int32)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleTorus_xvFreqsFunc= _lib.actionAngleTorus_xvFreqsBatch
+    actionAngleTorus_xvFreqsFunc.argtypes=\
+        [ctypes.c_int,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_int,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_int,
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_double,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags)]
+
+    #Run the C code
+    actionAngleTorus_xvFreqsFunc(ctypes.c_int(ntorus),
+                                 jr,jphi,jz,
+                                 ctypes.c_int(na),
+                                 angler,
+                                 anglephi,
+                                 anglez,
+                                 ctypes.c_int(npot),
+                                 pot_type,
+                                 pot_args,
+                                 ctypes.c_double(tol),
+                                 R,vR,vT,z,vz,phi,
+                                 Omegar,Omegaphi,Omegaz,
+                                 flag)
+
+    return _unsort_tori(sindx,R,vR,vT,z,vz,phi,Omegar,Omegaphi,Omegaz,flag)
+
+def actionAngleTorus_Freqs_batch_c(pot,jr,jphi,jz,
+                                   tol=0.003):
+    """
+    NAME:
+       actionAngleTorus_Freqs_batch_c
+    PURPOSE:
+       compute frequencies on multiple tori in a single call (parallelized over tori with OpenMP)
+    INPUT:
+       pot - Potential object or list thereof
+       jr - radial action (array [ntorus])
+       jphi - azimuthal action (array [ntorus])
+       jz - vertical action (array [ntorus])
+       tol= (0.003) goal for |dJ|/|J| along the torus
+    OUTPUT:
+       (Omegar,Omegaphi,Omegaz,flag), all [ntorus] arrays
+    HISTORY:
+       2017-10-06 - Written - agent
+    """
+    #Parse the potential
+    npot, pot_type, pot_args= _parse_pot(pot,potfortorus=True)
+
+    #Sort the tori in action space, such that each fit starts from a neighbor
+    jr, jphi, jz, sindx= _sort_tori(jr,jphi,jz)
+    ntorus= len(jr)
+
+    #Set up result
+    Omegar= numpy.empty(ntorus)
+    Omegaphi= numpy.empty(ntorus)
+    Omegaz= numpy.empty(ntorus)
+    flag= numpy.zeros(ntorus,dtype=numpy.int32)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleTorus_FreqsFunc= _lib.actionAngleTorus_FreqsBatch
+    actionAngleTorus_FreqsFunc.argtypes=\
+        [ctypes.c_int,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_int,
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_double,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags)]
+
+    #Run the C code
+    actionAngleTorus_FreqsFunc(ctypes.c_int(ntorus),
+                               jr,jphi,jz,
+                               ctypes.c_int(npot),
+                               pot_type,
+                               pot_args,
+                               ctypes.c_double(tol),
+                               Omegar,Omegaphi,Omegaz,
+                               flag)
+
+    return _unsort_tori(sindx,Omegar,Omegaphi,Omegaz,flag)
+
+def actionAngleTorus_hessian_batch_c(pot,jr,jphi,jz,
+                                     tol=0.003,dJ=0.001):
+    """
+    NAME:
+       actionAngleTorus_hessian_batch_c
+    PURPOSE:
+       compute dO/dJ on multiple tori in a single call (parallelized over tori with OpenMP)
+    INPUT:
+       pot - Potential object or list thereof
+       jr - radial action (array [ntorus])
+       jphi - azimuthal action (array [ntorus])
+       jz - vertical action (array [ntorus])
+       tol= (0.003) goal for |dJ|/|J| along the torus
+       dJ= (0.001) action difference when computing derivatives (Hessian or Jacobian)
+    OUTPUT:
+       (dO/dJ,Omegar,Omegaphi,Omegaz,Autofit error flag); dO/dJ is a [ntorus,3,3] array, the others are [ntorus] arrays
+       Note: dO/dJ is *not* symmetrized here
+    HISTORY:
+       2017-10-06 - Written - agent
+    """
+    #Parse the potential
+    npot, pot_type, pot_args= _parse_pot(pot,potfortorus=True)
+
+    #Sort the tori in action space, such that each fit starts from a neighbor
+    jr, jphi, jz, sindx= _sort_tori(jr,jphi,jz)
+    ntorus= len(jr)
+
+    #Set up result
+    dOdJT= numpy.empty((ntorus,3,3))
+    Omegar= numpy.empty(ntorus)
+    Omegaphi= numpy.empty(ntorus)
+    Omegaz= numpy.empty(ntorus)
+    flag= numpy.zeros(ntorus,dtype=numpy.int32)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleTorus_HessFunc= _lib.actionAngleTorus_hessianFreqsBatch
+    actionAngleTorus_HessFunc.argtypes=\
+        [ctypes.c_int,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_int,
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_double,
+         ctypes.c_double,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags)]
+
+    #Run the C code
+    actionAngleTorus_HessFunc(ctypes.c_int(ntorus),
+                              jr,jphi,jz,
+                              ctypes.c_int(npot),
+                              pot_type,
+                              pot_args,
+                              ctypes.c_double(tol),
+                              ctypes.c_double(dJ),
+                              dOdJT,
+                              Omegar,Omegaphi,Omegaz,
+                              flag)
+
+    return _unsort_tori(sindx,numpy.swapaxes(dOdJT,1,2),
+                        Omegar,Omegaphi,Omegaz,flag)
+
+def actionAngleTorus_jacobian_batch_c(pot,jr,jphi,jz,
+                                      angler,anglephi,anglez,
+                                      tol=0.003,dJ=0.001):
+    """
+    NAME:
+       actionAngleTorus_jacobian_batch_c
+    PURPOSE:
+       compute d(x,v)/d(J,theta) on multiple tori in a single call (parallelized over tori with OpenMP), also compute dO/dJ and the frequencies
+    INPUT:
+       pot - Potential object or list thereof
+       jr - radial action (array [ntorus])
+       jphi - azimuthal action (array [ntorus])
+       jz - vertical action (array [ntorus])
+       angler - radial angle (array [ntorus,N])
+       anglephi - azimuthal angle (array [ntorus,N])
+       anglez - vertical angle (array [ntorus,N])
+       tol= (0.003) goal for |dJ|/|J| along the torus
+       dJ= (0.001) action difference when computing derivatives (Hessian or Jacobian)
+    OUTPUT:
+       (R,vR,vT,z,vz,phi, --> [ntorus,N] arrays
+        d[R,vR,vT,z,vz,phi]/d[J,theta], --> [ntorus,N,6,6] array
+        dO/dJ, --> [ntorus,3,3] array
+        Omegar,Omegaphi,Omegaz, --> [ntorus] arrays
+        Autofit error flag --> [ntorus] array)
+        Note: dO/dJ is *not* symmetrized here
+    HISTORY:
+       2017-10-06 - Written - agent
+    """
+    #Parse the potential
+    npot, pot_type, pot_args= _parse_pot(pot,potfortorus=True)
+
+    #Sort the tori in action space, such that each fit starts from a neighbor
+    jr, jphi, jz, angler, anglephi, anglez, sindx=\
+        _sort_tori(jr,jphi,jz,angler,anglephi,anglez)
+    ntorus, na= angler.shape
+
+    #Set up result
+    R= numpy.empty((ntorus,na))
+    vR= numpy.empty((ntorus,na))
+    vT= numpy.empty((ntorus,na))
+    z= numpy.empty((ntorus,na))
+    vz= numpy.empty((ntorus,na))
+    phi= numpy.empty((ntorus,na))
+    dxvOdJaT= numpy.empty((ntorus,na,6,6))
+    dOdJT= numpy.empty((ntorus,3,3))
+    Omegar= numpy.empty(ntorus)
+    Omegaphi= numpy.empty(ntorus)
+    Omegaz= numpy.empty(ntorus)
+    flag= numpy.zeros(ntorus,dtype=numpy.int32)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleTorus_JacFunc= _lib.actionAngleTorus_jacobianFreqsBatch
+    actionAngleTorus_JacFunc.argtypes=\
+        [ctypes.c_int,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_int,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_int,
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_double,
+         ctypes.c_double,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags)]
+
+    #Run the C code
+    actionAngleTorus_JacFunc(ctypes.c_int(ntorus),
+                             jr,jphi,jz,
+                             ctypes.c_int(na),
+                             angler,
+                             anglephi,
+                             anglez,
+                             ctypes.c_int(npot),
+                             pot_type,
+                             pot_args,
+                             ctypes.c_double(tol),
+                             ctypes.c_double(dJ),
+                             R,vR,vT,z,vz,phi,
+                             dxvOdJaT,
+                             dOdJT,
+                             Omegar,Omegaphi,Omegaz,
+                             flag)
+
+    return _unsort_tori(sindx,R,vR,vT,z,vz,phi,
+                        numpy.swapaxes(dxvOdJaT,2,3),
+                        numpy.swapaxes(dOdJT,1,2),
+                        Omegar,Omegaphi,Omegaz,flag)
+
+def _sort_tori(jr,jphi,jz,*angles):
+    """Sort tori by action (jphi first, then jz and jr), such that
+    consecutive tori are close in action space and each fit in the C code
+    starts from the previous one; angles ([ntorus,N] or [N] for the same
+    angles on every torus) are sorted along"""
+    jr, jphi, jz= numpy.broadcast_arrays(numpy.atleast_1d(jr),
+                                         numpy.atleast_1d(jphi),
+                                         numpy.atleast_1d(jz))
+    sindx= numpy.lexsort((jr,jz,jphi))
+    out= [numpy.require(j[sindx],dtype=numpy.float64,requirements=['C','W'])
+          for j in (jr,jphi,jz)]
+    for angle in angles:
+        angle= numpy.broadcast_to(numpy.atleast_2d(angle),
+                                  (len(sindx),numpy.shape(angle)[-1]))
+        out.append(numpy.require(angle[sindx],
+                                 dtype=numpy.float64,requirements=['C','W']))
+    out.append(sindx)
+    return tuple(out)
+
+def _unsort_tori(sindx,*args):
+    """Undo the sorting of _sort_tori along the first axis of all args"""
+    out= []
+    for arg in args:
+        unsorted= numpy.empty_like(arg)
+        unsorted[sindx]= arg
+        out.append(unsorted)
+    return tuple(out)
+
+def actionAngleTorus_fitTori_batch_c(pot,jr,jphi,jz,tol=0.003,starts=None):
+    """
+    NAME:
+       actionAngleTorus_fitTori_batch_c
+    PURPOSE:
+       fit multiple tori in a single call (parallelized over tori with OpenMP) and keep them in memory, such that angles can be mapped onto them later without refitting
+    INPUT:
+       pot - Potential object or list thereof
+       jr - radial action (array [ntorus])
+       jphi - azimuthal action (array [ntorus])
+       jz - vertical action (array [ntorus])
+       tol= (0.003) goal for |dJ|/|J| along the torus
+       starts= (None) list of handles of already-fitted (nearby) tori to start each fit from (entries can be None); when not given, each fit starts from the previous one in action space
+    OUTPUT:
+       (handles,Omegar,Omegaphi,Omegaz,flag); handles is a list of handles that need to be freed with actionAngleTorus_freeTorus_c, the others are [ntorus] arrays
+    HISTORY:
+       2017-10-09 - Written - agent
+    """
+    #Parse the potential
+    npot, pot_type, pot_args= _parse_pot(pot,potfortorus=True)
+
+    #Sort the tori in action space, such that each fit starts from a neighbor
+    jr, jphi, jz, sindx= _sort_tori(jr,jphi,jz)
+    ntorus= len(jr)
+    if starts is None: starts= [None]*ntorus
+    cstarts= (ctypes.c_void_p*ntorus)(*[starts[ii] for ii in sindx])
+
+    #Set up result
+    tori= (ctypes.c_void_p*ntorus)()
+    Omegar= numpy.empty(ntorus)
+    Omegaphi= numpy.empty(ntorus)
+    Omegaz= numpy.empty(ntorus)
+    flag= numpy.zeros(ntorus,dtype=numpy.int32)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleTorus_fitToriFunc= _lib.actionAngleTorus_fitToriBatch
+    actionAngleTorus_fitToriFunc.argtypes=\
+        [ctypes.c_int,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_int,
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_double,
+         ctypes.POINTER(ctypes.c_void_p),
+         ctypes.POINTER(ctypes.c_void_p),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags)]
+
+    #Run the C code
+    actionAngleTorus_fitToriFunc(ctypes.c_int(ntorus),
+                                 jr,jphi,jz,
+                                 ctypes.c_int(npot),
+                                 pot_type,
+                                 pot_args,
+                                 ctypes.c_double(tol),
+                                 cstarts,tori,
+                                 Omegar,Omegaphi,Omegaz,
+                                 flag)
+    handles= [None]*ntorus
+    for ii in range(ntorus): handles[sindx[ii]]= tori[ii]
+    if None in handles: #pragma: no cover
+        for handle in handles:
+            if not handle is None: actionAngleTorus_freeTorus_c(handle)
+        raise MemoryError("Failed to allocate a new torus in actionAngleTorus_fitTori_batch_c")
+
+    return (handles,)+_unsort_tori(sindx,Omegar,Omegaphi,Omegaz,flag)
+
+def actionAngleTorus_xvTori_batch_c(handles,angler,anglephi,anglez):
+    """
+    NAME:
+       actionAngleTorus_xvTori_batch_c
+    PURPOSE:
+       compute configuration (x,v) of sets of angles on multiple tori fit with actionAngleTorus_fitTori_batch_c
+    INPUT:
+       handles - list of handles of the fitted tori [ntorus]
+       angler - radial angle (array [ntorus,N] or [N])
+       anglephi - azimuthal angle (array [ntorus,N] or [N])
+       anglez - vertical angle (array [ntorus,N] or [N])
+    OUTPUT:
+       (R,vR,vT,z,vz,phi), [ntorus,N] arrays
+    HISTORY:
+       2017-10-09 - Written - agent
+    """
+    ntorus= len(handles)
+    angler, anglephi, anglez=\
+        [numpy.require(numpy.broadcast_to(numpy.atleast_2d(angle),
+                                          (ntorus,numpy.shape(angle)[-1])),
+                       dtype=numpy.float64,requirements=['C','W'])
+         for angle in (angler,anglephi,anglez)]
+    na= angler.shape[1]
+
+    #Set up result arrays
+    R= numpy.empty((ntorus,na))
+    vR= numpy.empty((ntorus,na))
+    vT= numpy.empty((ntorus,na))
+    z= numpy.empty((ntorus,na))
+    vz= numpy.empty((ntorus,na))
+    phi= numpy.empty((ntorus,na))
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleTorus_xvToriFunc= _lib.actionAngleTorus_xvToriBatch
+    actionAngleTorus_xvToriFunc.argtypes=\
+        [ctypes.c_int,
+         ctypes.POINTER(ctypes.c_void_p),
+         ctypes.c_int,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags)]
+
+    #Run the C code
+    actionAngleTorus_xvToriFunc(ctypes.c_int(ntorus),
+                                (ctypes.c_void_p*ntorus)(*handles),
+                                ctypes.c_int(na),
+                                angler,anglephi,anglez,
+                                R,vR,vT,z,vz,phi)
+
+    return (R,vR,vT,z,vz,phi)
+
+def actionAngleTorus_sizeTorus_c(handle):
+    """
+    NAME:
+       actionAngleTorus_sizeTorus_c
+    PURPOSE:
+       return the (approximate) memory used by a torus fit with actionAngleTorus_fitTori_batch_c
+    INPUT:
+       handle - handle of the fitted torus
+    OUTPUT:
+       size in bytes
+    HISTORY:
+       2017-10-09 - Written - agent
+    """
+    actionAngleTorus_sizeTorusFunc= _lib.actionAngleTorus_sizeTorus
+    actionAngleTorus_sizeTorusFunc.argtypes= [ctypes.c_void_p]
+    actionAngleTorus_sizeTorusFunc.restype= ctypes.c_long
+    return actionAngleTorus_sizeTorusFunc(handle)
+
+def actionAngleTorus_freeTorus_c(handle):
+    """
+    NAME:
+       actionAngleTorus_freeTorus_c
+    PURPOSE:
+       free the memory of a torus fit with actionAngleTorus_fitTori_batch_c
+    INPUT:
+       handle - handle of the fitted torus
+    OUTPUT:
+       (none)
+    HISTORY:
+       2017-10-09 - Written - agent
+    """
+    actionAngleTorus_freeTorusFunc= _lib.actionAngleTorus_freeTorus
+    actionAngleTorus_freeTorusFunc.argtypes= [ctypes.c_void_p]
+    actionAngleTorus_freeTorusFunc(handle)
+    return None
@@ -9,6 +9,10 @@
 #include <ctime>
 #include <cmath>
 #include <gsl/gsl_spline.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#include <bovy_openmp.h>
 #include "Torus.h"
 #include "interp_2d.h"
 #include "galpyPot.h"
@@ -18,90 +22,138 @@
 
 extern "C"
 {
-  // Clean up function
-  inline void cleanup(Torus * T,Potential * Phi,
-		      int npot,struct potentialArg * actionAngleArgs)
+  /*
+    Set up and clean up one Potential per thread, as well as the last
+    successfully fitted torus of each thread, which is used to start the
+    next fit; the potentialArgs may cache intermediate results and set_Lz
+    changes the Potential, so these cannot be shared between threads
+  */
+  static void cleanup_tori(int max_threads,Torus ** seeds,Potential ** Phis,
+			   int npot,struct potentialArg * actionAngleArgs)
   {
-    delete Phi;
-    delete T;
-    free_potentialArgs(npot,actionAngleArgs);
+    int ii;
+    for (ii=0; ii < max_threads; ii++){
+      delete *(Phis+ii);
+      delete *(seeds+ii);
+      free_potentialArgs(npot,actionAngleArgs+ii*npot);
+    }
+    free(Phis);
+    free(seeds);
     free(actionAngleArgs);
   }
-  // Calculate frequencies
-  void actionAngleTorus_Freqs(double jr, double jphi, double jz,
-			      int npot,
-			      int * pot_type,
-			      double * pot_args,
-			      double tol,
-			      double * Omegar,double * Omegaphi,double * Omegaz,
-			      int * flag)
+  // Returns the number of threads, or 0 if the allocation failed
+  static int setup_tori(int ntorus,int npot,int * pot_type,double * pot_args,
+			Torus *** seeds,Potential *** Phis,
+			struct potentialArg ** actionAngleArgs)
   {
-    // set up Torus
-    Torus *T;
-    T= new(std::nothrow) Torus;
-    
-    // set up potential
-    Potential *Phi;
-    //Phi = new(std::nothrow) LogPotential(1.,0.8,0.,0.);
-    struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
-    parse_actionAngleArgs(npot,actionAngleArgs,pot_type,pot_args,true);
-    Phi = new(std::nothrow) galpyPotential(npot,actionAngleArgs);
-
-    // Load actions and fit Torus
-    Actions J;
+    int ii, max_threads;
+#ifdef _OPENMP
+    max_threads= ( ntorus < omp_get_max_threads() ) ? ntorus : omp_get_max_threads();
+#else
+    max_threads= 1;
+#endif
+    if ( max_threads < 1 ) max_threads= 1;
+    *seeds= (Torus **) malloc ( max_threads * sizeof (Torus *) );
+    *Phis= (Potential **) malloc ( max_threads * sizeof (Potential *) );
+    *actionAngleArgs= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+    if ( !*seeds || !*Phis || !*actionAngleArgs ) {
+      free(*seeds);
+      free(*Phis);
+      free(*actionAngleArgs);
+      return 0;
+    }
+    for (ii=0; ii < max_threads; ii++){
+      *(*seeds+ii)= NULL;
+      parse_actionAngleArgs(npot,*actionAngleArgs+ii*npot,
+			    pot_type,pot_args,true);
+      *(*Phis+ii)= new(std::nothrow) galpyPotential(npot,
+						   *actionAngleArgs+ii*npot);
+      if ( !*(*Phis+ii) ) {
+	// delete of NULL is a no-op, so this also cleans up thread ii
+	cleanup_tori(ii+1,*seeds,*Phis,npot,*actionAngleArgs);
+	return 0;
+      }
+    }
+    return max_threads;
+  }
+  // Flag all tori as failed ('Fit aborted') when the setup failed
+  static void fail_tori(int ntorus,int * flag)
+  {
+    int ii;
+    for (ii=0; ii < ntorus; ii++) *(flag+ii)= -4;
+  }
+  /*
+    Per-torus computations
+  */
+  // Fit the torus with actions (jr,jphi,jz), starting from the already-fitted
+  // torus seed (if not NULL); returns the new torus, or NULL (with
+  // flag= -4) if it could not be allocated
+  static Torus * fitTorus(Torus * seed,Potential * Phi,
+			  double jr,double jphi,double jz,double tol,
+			  Actions & J,int * flag)
+  {
+    Torus * T;
+    if ( seed )
+      T= new(std::nothrow) Torus(*seed);
+    else
+      T= new(std::nothrow) Torus;
+    if ( !T ) {
+      *flag= -4;
+      return NULL;
+    }
     J[0]= jr;
     J[1]= jz;
     J[2]= jphi;
-    *flag = T->AutoFit(J,Phi,tol);
-
+    *flag= T->AutoFit(J,Phi,tol);
     Phi->set_Lz(J(2));
-
-    // Grab the frequencies
-    Frequencies om=T->omega();
+    return T;
+  }
+  // Keep a copy of T as the start of the next fit if its fit converged
+  static void setSeed(Torus ** seed,Torus * T,int flag)
+  {
+    Torus * newseed;
+    if ( flag != 0 ) return;
+    newseed= new(std::nothrow) Torus(*T);
+    if ( !newseed ) return;
+    delete *seed;
+    *seed= newseed;
+  }
+  static void torusFreqs(Torus * T,Frequencies & om,
+			 double * Omegar,double * Omegaphi,double * Omegaz)
+  {
+    om= T->omega();
     *Omegar= om(0);
     *Omegaz= om(1);
     *Omegaphi= om(2);
-
-    // Clean up
-    cleanup(T,Phi,npot,actionAngleArgs);
   }
-  // Calculate (x,v) for angles on a single torus; also returns the frequencies
-  void actionAngleTorus_xvFreqs(double jr, double jphi, double jz,
-				int na,
-				double * angler, double * anglephi, double * anglez,
-				int npot,
-				int * pot_type,
-				double * pot_args,
-				double tol,
-				double * R, double * vR, double * vT, 
-				double * z, double * vz, double * phi,
-				double * Omegar,double * Omegaphi,double * Omegaz,
-				int * flag)
+  static void torusHessian(Torus * T,Potential * Phi,
+			   Actions & J,Frequencies & om,
+			   double tol,double indJ,double * dOdJT)
   {
-    // set up Torus
-    Torus *T;
-    T= new(std::nothrow) Torus;
-    
-    // set up potential
-    Potential *Phi;
-    //Phi = new(std::nothrow) LogPotential(1.,0.8,0.,0.);
-    struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
-    parse_actionAngleArgs(npot,actionAngleArgs,pot_type,pot_args,true);
-    Phi = new(std::nothrow) galpyPotential(npot,actionAngleArgs);
-
-    // Load actions and fit Torus
-    Actions J;
-    J[0]= jr;
-    J[1]= jz;
-    J[2]= jphi;
-    *flag = T->AutoFit(J,Phi,tol);
-
-    Phi->set_Lz(J(2));
-
-    // Load angles and get (x,v)
+    int ii,jj;
+    double dJ;
+    Actions JdJ;
+    Frequencies omdom;
+    for (ii=0;ii < 3; ii++){
+      JdJ= J;
+      dJ= J[ii]+indJ;
+      dJ= dJ-J[ii];
+      JdJ[ii]= J[ii]+dJ;
+      T->AutoFit(JdJ,Phi,tol);
+      Phi->set_Lz(JdJ(2));
+      omdom=T->omega();
+      for (jj=0;jj<3;jj++) *(dOdJT+ii*3+jj)= (omdom(jj)-om(jj)) / dJ;
+    }
+  }
+  static void torusxv(Torus * T,int na,
+		      double * angler,double * anglephi,double * anglez,
+		      double * R, double * vR, double * vT,
+		      double * z, double * vz, double * phi,
+		      PSPT * Qs)
+  {
+    int ii;
     Angles A;
     PSPT Q;
-    int ii;
     for (ii=0; ii < na; ii++) {
       // Load angles
       A[0]= *(angler+ii);
@@ -109,6 +161,7 @@ extern "C"
       A[2]= *(anglephi+ii);
       // get phase-space point
       Q= T->Map3D(A);
+      if ( Qs ) *(Qs+ii)= Q;
       *(R+ii)= Q(0);
       *(z+ii)= Q(1);
       *(phi+ii)= Q(2);
@@ -116,136 +169,30 @@ extern "C"
       *(vz+ii)= Q(4);
       *(vT+ii)= Q(5);
     }
-
-    // Finally, grab the frequencies
-    Frequencies om=T->omega();
-    *Omegar= om(0);
-    *Omegaz= om(1);
-    *Omegaphi= om(2);
-
-    // Clean up
-    cleanup(T,Phi,npot,actionAngleArgs);
   }
-  // Calculate Hessian and frequencies
-  void actionAngleTorus_hessianFreqs(double jr, double jphi, double jz,
-				     int npot,
-				     int * pot_type,
-				     double * pot_args,
-				     double tol,
-				     double indJ,
-				     double * dOdJT,
-				     double * Omegar,
-				     double * Omegaphi,
-				     double * Omegaz,
-				     int * flag)
-  {
-    int ii,jj;
-    double dJ;
-    // set up Torus
-    Torus *T;
-    T= new(std::nothrow) Torus;
-    
-    // set up potential
-    Potential *Phi;
-    //Phi = new(std::nothrow) LogPotential(1.,0.8,0.,0.);
-    struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
-    parse_actionAngleArgs(npot,actionAngleArgs,pot_type,pot_args,true);
-    Phi = new(std::nothrow) galpyPotential(npot,actionAngleArgs);
-
-    // Load actions and fit Torus
-    Actions J,JdJ;
-    Frequencies om, omdom;
-    J[0]= jr;
-    J[1]= jz;
-    J[2]= jphi;
-    *flag = T->AutoFit(J,Phi,tol);
-
-    Phi->set_Lz(J(2));
-
-    // Grab the frequencies
-    om=T->omega();
-    *Omegar= om(0);
-    *Omegaz= om(1);
-    *Omegaphi= om(2);
-
-    // Now compute the Jacobian
-    for (ii=0;ii < 3; ii++){
-      JdJ= J;
-      dJ= J[ii]+indJ;
-      dJ= dJ-J[ii];
-      JdJ[ii]= J[ii]+dJ;
-      T->AutoFit(JdJ,Phi,tol);
-      Phi->set_Lz(JdJ(2));
-      omdom=T->omega();
-      for (jj=0;jj<3;jj++) *(dOdJT+ii*3+jj)= (omdom(jj)-om(jj)) / dJ;
-    }
-
-    // Clean up
-    cleanup(T,Phi,npot,actionAngleArgs);
-  }
-  // Calculate Jacobian and frequencies
-  void actionAngleTorus_jacobianFreqs(double jr,double jphi, 
-				      double jz,int na,double * angler,
-				      double * anglephi, double * anglez,
-				      int npot,
-				      int * pot_type,
-				      double * pot_args,
-				      double tol,
-				      double indJ,
-				      double * R, double * vR, double * vT, 
-				      double * z, double * vz, double * phi,
-				      double * dxvOdJaT,
-				      double * dOdJT,
-				      double * Omegar,
-				      double * Omegaphi,
-				      double * Omegaz,
-				      int * flag)
+  static void torusJacobian(Torus * T,Potential * Phi,
+			    Actions & J,Frequencies & om,
+			    int na,double * angler,
+			    double * anglephi, double * anglez,
+			    double tol,double indJ,
+			    double * R, double * vR, double * vT,
+			    double * z, double * vz, double * phi,
+			    double * dxvOdJaT,double * dOdJT)
   {
     int ii,jj,kk;
     double dJ, dA;
-    // set up Torus
-    Torus *T;
-    T= new(std::nothrow) Torus;
-    
-    // set up potential
-    Potential *Phi;
-    struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
-    parse_actionAngleArgs(npot,actionAngleArgs,pot_type,pot_args,true);
-    Phi = new(std::nothrow) galpyPotential(npot,actionAngleArgs);
-
-    // Load actions and fit Torus
-    Actions J,JdJ;
-    Frequencies om, omdom;
+    Actions JdJ;
+    Frequencies omdom;
     Angles A, AdA;
-    PSPT Q, QdQ;
-    PSPT * Qs= (PSPT *) malloc ( na * sizeof ( PSPT ) );
-    J[0]= jr;
-    J[1]= jz;
-    J[2]= jphi;
-    *flag = T->AutoFit(J,Phi,tol);
-
-    Phi->set_Lz(J(2));
-
-    // Grab the frequencies
-    om=T->omega();
-    *Omegar= om(0);
-    *Omegaz= om(1);
-    *Omegaphi= om(2);
-
+    PSPT QdQ;
+    PSPT * Qs= new PSPT[na];
+    // x,v; store for dJ calc. below
+    torusxv(T,na,angler,anglephi,anglez,R,vR,vT,z,vz,phi,Qs);
     // Now compute the Jacobian: dangle changes
     for (ii=0;ii < na;ii++){
-      // Load angles and get phase-space point
       A[0]= *(angler+ii);
       A[1]= *(anglez+ii);
       A[2]= *(anglephi+ii);
-      Q= T->Map3D(A);
-      *(Qs+ii)= Q; // store for dJ calc. below
-      *(R+ii)= Q(0); // output x,v
-      *(z+ii)= Q(1);
-      *(phi+ii)= Q(2);
-      *(vR+ii)= Q(3);
-      *(vz+ii)= Q(4);
-      *(vT+ii)= Q(5);
       for (jj=0;jj < 3;jj++){
 	// Setup dangle
 	AdA= A;
@@ -255,7 +202,7 @@ extern "C"
 	// get phase-space point
 	QdQ= T->Map3D(AdA);
 	for (kk=0;kk < 6;kk++)
-	  *(dxvOdJaT+ii*36+(jj+3)*6+kk)= (QdQ(kk)-Q(kk)) / dA;
+	  *(dxvOdJaT+ii*36+(jj+3)*6+kk)= (QdQ(kk)-(*(Qs+ii))(kk)) / dA;
       }
     }
     // Now compute the Jacobian: dJ changes
@@ -280,9 +227,350 @@ extern "C"
       omdom=T->omega();
       for (kk=0;kk<3;kk++) *(dOdJT+jj*3+kk)= (omdom(kk)-om(kk)) / dJ;
     }
-
-    // Clean up
-    free(Qs);
-    cleanup(T,Phi,npot,actionAngleArgs);
+    delete[] Qs;
+  }
+  /*
+    Batched functions: fit and evaluate ntorus tori, parallelized over
+    tori with OpenMP. Each thread works through a contiguous block of
+    tori and starts each fit from the last torus that it successfully
+    fit, which is a neighbour in action space when the tori are sorted
+  */
+  // Calculate frequencies
+  void actionAngleTorus_FreqsBatch(int ntorus,
+				   double * jr, double * jphi, double * jz,
+				   int npot,
+				   int * pot_type,
+				   double * pot_args,
+				   double tol,
+				   double * Omegar,double * Omegaphi,
+				   double * Omegaz,
+				   int * flag)
+  {
+    int ii, tid;
+    Torus ** seeds;
+    Potential ** Phis;
+    struct potentialArg * actionAngleArgs;
+    int max_threads= setup_tori(ntorus,npot,pot_type,pot_args,
+				&seeds,&Phis,&actionAngleArgs);
+    if ( !max_threads ) {
+      fail_tori(ntorus,flag);
+      return;
+    }
+    galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,0);
+#pragma omp parallel for schedule(runtime) private(ii,tid) num_threads(max_threads)
+    for (ii=0; ii < ntorus; ii++){
+#ifdef _OPENMP
+      tid= omp_get_thread_num();
+#else
+      tid= 0;
+#endif
+      Actions J;
+      Frequencies om;
+      Torus * T= fitTorus(*(seeds+tid),*(Phis+tid),
+			  *(jr+ii),*(jphi+ii),*(jz+ii),tol,J,flag+ii);
+      if ( !T ) continue;
+      torusFreqs(T,om,Omegar+ii,Omegaphi+ii,Omegaz+ii);
+      setSeed(seeds+tid,T,*(flag+ii));
+      delete T;
+    }
+    cleanup_tori(max_threads,seeds,Phis,npot,actionAngleArgs);
+  }
+  // Calculate (x,v) for na angles on each torus; also returns the frequencies
+  void actionAngleTorus_xvFreqsBatch(int ntorus,
+				     double * jr, double * jphi, double * jz,
+				     int na,
+				     double * angler, double * anglephi,
+				     double * anglez,
+				     int npot,
+				     int * pot_type,
+				     double * pot_args,
+				     double tol,
+				     double * R, double * vR, double * vT,
+				     double * z, double * vz, double * phi,
+				     double * Omegar,double * Omegaphi,
+				     double * Omegaz,
+				     int * flag)
+  {
+    int ii, tid;
+    Torus ** seeds;
+    Potential ** Phis;
+    struct potentialArg * actionAngleArgs;
+    int max_threads= setup_tori(ntorus,npot,pot_type,pot_args,
+				&seeds,&Phis,&actionAngleArgs);
+    if ( !max_threads ) {
+      fail_tori(ntorus,flag);
+      return;
+    }
+    galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,0);
+#pragma omp parallel for schedule(runtime) private(ii,tid) num_threads(max_threads)
+    for (ii=0; ii < ntorus; ii++){
+#ifdef _OPENMP
+      tid= omp_get_thread_num();
+#else
+      tid= 0;
+#endif
+      Actions J;
+      Frequencies om;
+      Torus * T= fitTorus(*(seeds+tid),*(Phis+tid),
+			  *(jr+ii),*(jphi+ii),*(jz+ii),tol,J,flag+ii);
+      if ( !T ) continue;
+      torusxv(T,na,angler+ii*na,anglephi+ii*na,anglez+ii*na,
+	      R+ii*na,vR+ii*na,vT+ii*na,z+ii*na,vz+ii*na,phi+ii*na,NULL);
+      torusFreqs(T,om,Omegar+ii,Omegaphi+ii,Omegaz+ii);
+      setSeed(seeds+tid,T,*(flag+ii));
+      delete T;
+    }
+    cleanup_tori(max_threads,seeds,Phis,npot,actionAngleArgs);
+  }
+  // Calculate Hessian and frequencies
+  void actionAngleTorus_hessianFreqsBatch(int ntorus,
+					  double * jr, double * jphi,
+					  double * jz,
+					  int npot,
+					  int * pot_type,
+					  double * pot_args,
+					  double tol,
+					  double indJ,
+					  double * dOdJT,
+					  double * Omegar,
+					  double * Omegaphi,
+					  double * Omegaz,
+					  int * flag)
+  {
+    int ii, tid;
+    Torus ** seeds;
+    Potential ** Phis;
+    struct potentialArg * actionAngleArgs;
+    int max_threads= setup_tori(ntorus,npot,pot_type,pot_args,
+				&seeds,&Phis,&actionAngleArgs);
+    if ( !max_threads ) {
+      fail_tori(ntorus,flag);
+      return;
+    }
+    galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,0);
+#pragma omp parallel for schedule(runtime) private(ii,tid) num_threads(max_threads)
+    for (ii=0; ii < ntorus; ii++){
+#ifdef _OPENMP
+      tid= omp_get_thread_num();
+#else
+      tid= 0;
+#endif
+      Actions J;
+      Frequencies om;
+      Torus * T= fitTorus(*(seeds+tid),*(Phis+tid),
+			  *(jr+ii),*(jphi+ii),*(jz+ii),tol,J,flag+ii);
+      if ( !T ) continue;
+      torusFreqs(T,om,Omegar+ii,Omegaphi+ii,Omegaz+ii);
+      // Seed before the J+dJ fits below change T
+      setSeed(seeds+tid,T,*(flag+ii));
+      torusHessian(T,*(Phis+tid),J,om,tol,indJ,dOdJT+9*ii);
+      delete T;
+    }
+    cleanup_tori(max_threads,seeds,Phis,npot,actionAngleArgs);
+  }
+  // Calculate Jacobian and frequencies
+  void actionAngleTorus_jacobianFreqsBatch(int ntorus,
+					   double * jr, double * jphi,
+					   double * jz,
+					   int na,double * angler,
+					   double * anglephi, double * anglez,
+					   int npot,
+					   int * pot_type,
+					   double * pot_args,
+					   double tol,
+					   double indJ,
+					   double * R, double * vR, double * vT,
+					   double * z, double * vz, double * phi,
+					   double * dxvOdJaT,
+					   double * dOdJT,
+					   double * Omegar,
+					   double * Omegaphi,
+					   double * Omegaz,
+					   int * flag)
+  {
+    int ii, tid;
+    Torus ** seeds;
+    Potential ** Phis;
+    struct potentialArg * actionAngleArgs;
+    int max_threads= setup_tori(ntorus,npot,pot_type,pot_args,
+				&seeds,&Phis,&actionAngleArgs);
+    if ( !max_threads ) {
+      fail_tori(ntorus,flag);
+      return;
+    }
+    galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,0);
+#pragma omp parallel for schedule(runtime) private(ii,tid) num_threads(max_threads)
+    for (ii=0; ii < ntorus; ii++){
+#ifdef _OPENMP
+      tid= omp_get_thread_num();
+#else
+      tid= 0;
+#endif
+      Actions J;
+      Frequencies om;
+      Torus * T= fitTorus(*(seeds+tid),*(Phis+tid),
+			  *(jr+ii),*(jphi+ii),*(jz+ii),tol,J,flag+ii);
+      if ( !T ) continue;
+      torusFreqs(T,om,Omegar+ii,Omegaphi+ii,Omegaz+ii);
+      // Seed before the J+dJ fits below change T
+      setSeed(seeds+tid,T,*(flag+ii));
+      torusJacobian(T,*(Phis+tid),J,om,
+		    na,angler+ii*na,anglephi+ii*na,anglez+ii*na,tol,indJ,
+		    R+ii*na,vR+ii*na,vT+ii*na,z+ii*na,vz+ii*na,phi+ii*na,
+		    dxvOdJaT+36*na*ii,dOdJT+9*ii);
+      delete T;
+    }
+    cleanup_tori(max_threads,seeds,Phis,npot,actionAngleArgs);
+  }
+  /*
+    Persistent tori: fit tori and return them, such that they can be kept
+    (e.g., in a cache) and used to map angles without refitting; each fit
+    starts from starts[ii] (an already-fitted torus) if that is not NULL and
+    otherwise from the thread's previous successful fit, as above. Tori that
+    could not be allocated are returned as NULL (with flag= -4)
+  */
+  void actionAngleTorus_fitToriBatch(int ntorus,
+				     double * jr, double * jphi, double * jz,
+				     int npot,
+				     int * pot_type,
+				     double * pot_args,
+				     double tol,
+				     void ** starts,
+				     void ** tori,
+				     double * Omegar,double * Omegaphi,
+				     double * Omegaz,
+				     int * flag)
+  {
+    int ii, tid;
+    Torus ** seeds;
+    Potential ** Phis;
+    struct potentialArg * actionAngleArgs;
+    int max_threads= setup_tori(ntorus,npot,pot_type,pot_args,
+				&seeds,&Phis,&actionAngleArgs);
+    if ( !max_threads ) {
+      fail_tori(ntorus,flag);
+      for (ii=0; ii < ntorus; ii++) *(tori+ii)= NULL;
+      return;
+    }
+    galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,0);
+#pragma omp parallel for schedule(runtime) private(ii,tid) num_threads(max_threads)
+    for (ii=0; ii < ntorus; ii++){
+#ifdef _OPENMP
+      tid= omp_get_thread_num();
+#else
+      tid= 0;
+#endif
+      Actions J;
+      Frequencies om;
+      Torus * seed= *(starts+ii) ? (Torus *) *(starts+ii) : *(seeds+tid);
+      Torus * T= fitTorus(seed,*(Phis+tid),
+			  *(jr+ii),*(jphi+ii),*(jz+ii),tol,J,flag+ii);
+      *(tori+ii)= (void *) T;
+      if ( !T ) continue;
+      torusFreqs(T,om,Omegar+ii,Omegaphi+ii,Omegaz+ii);
+      setSeed(seeds+tid,T,*(flag+ii));
+    }
+    cleanup_tori(max_threads,seeds,Phis,npot,actionAngleArgs);
+  }
+  // Calculate (x,v) for na angles on each of ntorus already-fitted tori;
+  // serial, because the same torus may appear more than once in tori
+  void actionAngleTorus_xvToriBatch(int ntorus,void ** tori,int na,
+				    double * angler, double * anglephi,
+				    double * anglez,
+				    double * R, double * vR, double * vT,
+				    double * z, double * vz, double * phi)
+  {
+    int ii;
+    for (ii=0; ii < ntorus; ii++)
+      torusxv((Torus *) *(tori+ii),na,
+	      angler+ii*na,anglephi+ii*na,anglez+ii*na,
+	      R+ii*na,vR+ii*na,vT+ii*na,z+ii*na,vz+ii*na,phi+ii*na,NULL);
+  }
+  // Approximate memory used by a fitted torus in bytes: the Torus itself and
+  // the terms of its generating function, which are stored four times (S
+  // and its three action derivatives in the angle map)
+  long actionAngleTorus_sizeTorus(void * T)
+  {
+    return (long) (sizeof (Torus)
+		   +4 * ((Torus *) T)->SN().NumberofTerms()
+		   * (2 * sizeof (int) + sizeof (double)));
+  }
+  void actionAngleTorus_freeTorus(void * T)
+  {
+    delete (Torus *) T;
+  }
+  /*
+    Single-torus functions
+  */
+  // Calculate frequencies
+  void actionAngleTorus_Freqs(double jr, double jphi, double jz,
+			      int npot,
+			      int * pot_type,
+			      double * pot_args,
+			      double tol,
+			      double * Omegar,double * Omegaphi,double * Omegaz,
+			      int * flag)
+  {
+    actionAngleTorus_FreqsBatch(1,&jr,&jphi,&jz,npot,pot_type,pot_args,tol,
+				Omegar,Omegaphi,Omegaz,flag);
+  }
+  // Calculate (x,v) for angles on a single torus; also returns the frequencies
+  void actionAngleTorus_xvFreqs(double jr, double jphi, double jz,
+				int na,
+				double * angler, double * anglephi, double * anglez,
+				int npot,
+				int * pot_type,
+				double * pot_args,
+				double tol,
+				double * R, double * vR, double * vT,
+				double * z, double * vz, double * phi,
+				double * Omegar,double * Omegaphi,double * Omegaz,
+				int * flag)
+  {
+    actionAngleTorus_xvFreqsBatch(1,&jr,&jphi,&jz,na,angler,anglephi,anglez,
+				  npot,pot_type,pot_args,tol,
+				  R,vR,vT,z,vz,phi,
+				  Omegar,Omegaphi,Omegaz,flag);
+  }
+  // Calculate Hessian and frequencies
+  void actionAngleTorus_hessianFreqs(double jr, double jphi, double jz,
+				     int npot,
+				     int * pot_type,
+				     double * pot_args,
+				     double tol,
+				     double indJ,
+				     double * dOdJT,
+				     double * Omegar,
+				     double * Omegaphi,
+				     double * Omegaz,
+				     int * flag)
+  {
+    actionAngleTorus_hessianFreqsBatch(1,&jr,&jphi,&jz,
+				       npot,pot_type,pot_args,tol,indJ,
+				       dOdJT,Omegar,Omegaphi,Omegaz,flag);
+  }
+  // Calculate Jacobian and frequencies
+  void actionAngleTorus_jacobianFreqs(double jr,double jphi,
+				      double jz,int na,double * angler,
+				      double * anglephi, double * anglez,
+				      int npot,
+				      int * pot_type,
+				      double * pot_args,
+				      double tol,
+				      double indJ,
+				      double * R, double * vR, double * vT,
+				      double * z, double * vz, double * phi,
+				      double * dxvOdJaT,
+				      double * dOdJT,
+				      double * Omegar,
+				      double * Omegaphi,
+				      double * Omegaz,
+				      int * flag)
+  {
+    actionAngleTorus_jacobianFreqsBatch(1,&jr,&jphi,&jz,
+					na,angler,anglephi,anglez,
+					npot,pot_type,pot_args,tol,indJ,
+					R,vR,vT,z,vz,phi,dxvOdJaT,dOdJT,
+					Omegar,Omegaphi,Omegaz,flag);
   }
 }
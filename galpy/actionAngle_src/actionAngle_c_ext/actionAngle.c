@@ -20,6 +20,12 @@ void parse_actionAngleArgs(int npot,
       potentialArgs->zforce= &LogarithmicHaloPotentialzforce;
       potentialArgs->nargs= 3;
       break;
+    case 1: //DehnenBarPotential, 6 arguments
+      potentialArgs->potentialEval= &DehnenBarPotentialEval;
+      potentialArgs->Rforce= &DehnenBarPotentialRforce;
+      potentialArgs->zforce= &DehnenBarPotentialzforce;
+      potentialArgs->nargs= 6;
+      break;
     case 5: //MiyamotoNagaiPotential, 3 arguments
       potentialArgs->potentialEval= &MiyamotoNagaiPotentialEval;
       potentialArgs->Rforce= &MiyamotoNagaiPotentialRforce;
@@ -187,6 +193,31 @@ void parse_actionAngleArgs(int npot,
       potentialArgs->zforce= &DiskSCFPotentialzforce;
       potentialArgs->nargs= (int) *(pot_args) + 3;
       break;      
+    case 27: // SpiralArmsPotential, 10 arguments + array of Cs
+      potentialArgs->potentialEval= &SpiralArmsPotentialEval;
+      potentialArgs->Rforce= &SpiralArmsPotentialRforce;
+      potentialArgs->zforce= &SpiralArmsPotentialzforce;
+      potentialArgs->nargs= (int) 10 + *pot_args;
+      break;
+    case 28: //FerrersPotential, 2*glorder+15 arguments
+      potentialArgs->potentialEval= &FerrersPotentialEval;
+      potentialArgs->Rforce= &FerrersPotentialRforce;
+      potentialArgs->zforce= &FerrersPotentialzforce;
+      potentialArgs->nargs= (int) ( 15 + 2 * *(pot_args+7) );
+      break;
+    case 29: //MovingObjectPotential, 4 arguments after the tabulated orbit
+      initMovingObjectSplines(potentialArgs,&pot_args);
+      potentialArgs->potentialEval= &MovingObjectPotentialEval;
+      potentialArgs->Rforce= &MovingObjectPotentialRforce;
+      potentialArgs->zforce= &MovingObjectPotentialzforce;
+      potentialArgs->nargs= 4;
+      break;
+    case 30: //RazorThinExponentialDiskPotential, 2*glorder+3 arguments
+      potentialArgs->potentialEval= &RazorThinExponentialDiskPotentialEval;
+      potentialArgs->Rforce= &RazorThinExponentialDiskPotentialRforce;
+      potentialArgs->zforce= &RazorThinExponentialDiskPotentialzforce;
+      potentialArgs->nargs= (int) ( 3 + 2 * *(pot_args+2) );
+      break;
 //////////////////////////////// WRAPPERS /////////////////////////////////////
     case -1: //DehnenSmoothWrapperPotential
       potentialArgs->potentialEval= &DehnenSmoothWrapperPotentialEval;
@@ -203,6 +234,21 @@ void parse_actionAngleArgs(int npot,
       pot_type+= potentialArgs->nwrapped;
       pot_args+= ( (int) *pot_args ) +  1;
       break;
+    case -2: //SolidBodyRotationWrapperPotential
+      potentialArgs->potentialEval= &SolidBodyRotationWrapperPotentialEval;
+      potentialArgs->Rforce= &SolidBodyRotationWrapperPotentialRforce;
+      potentialArgs->zforce= &SolidBodyRotationWrapperPotentialzforce;
+      potentialArgs->nargs= (int) 3;
+      potentialArgs->nwrapped= (int) *pot_args++;
+      potentialArgs->wrappedPotentialArg= \
+	(struct potentialArg *) malloc ( potentialArgs->nwrapped	\
+					 * sizeof (struct potentialArg) );
+      parse_actionAngleArgs(potentialArgs->nwrapped,
+			    potentialArgs->wrappedPotentialArg,
+			    pot_type,pot_args+1,forTorus);
+      pot_type+= potentialArgs->nwrapped;
+      pot_args+= ( (int) *pot_args ) +  1;
+      break;
     }
     potentialArgs->args= (double *) malloc( potentialArgs->nargs * sizeof(double));
     for (jj=0; jj < potentialArgs->nargs; jj++){
@@ -214,3 +260,56 @@ void parse_actionAngleArgs(int npot,
   }
   potentialArgs-= npot;
 }
+/*
+  Evaluation of cubic splines given in B-spline representation (knots t and
+  coefficients c, e.g., as computed by scipy.interpolate's
+  InterpolatedUnivariateSpline and RectBivariateSpline)
+*/
+static int bspline_basis(double x, int nt, double * t, double * h){
+  // Computes the four non-zero B-splines at x, returns the knot interval
+  int ii, jj, li, lj, l, lu, lm;
+  double f, hh[3];
+  // Bisection for the interval t[l] <= x < t[l+1], 3 <= l <= nt-5
+  l= 3;
+  lu= nt - 4;
+  while ( lu - l > 1 ) {
+    lm= ( l + lu ) / 2;
+    if ( x >= *(t+lm) ) l= lm;
+    else lu= lm;
+  }
+  h[0]= 1.;
+  for (jj=1; jj < 4; jj++){
+    for (ii=0; ii < jj; ii++) hh[ii]= h[ii];
+    h[0]= 0.;
+    for (ii=1; ii <= jj; ii++){
+      li= l + ii;
+      lj= li - jj;
+      f= hh[ii-1] / ( *(t+li) - *(t+lj) );
+      h[ii-1]+= f * ( *(t+li) - x );
+      h[ii]= f * ( x - *(t+lj) );
+    }
+  }
+  return l;
+}
+double bspline_eval(double x, int nt, double * t, double * c){
+  // Outside of the knots, the polynomial of the first/last interval is used
+  int ii, l;
+  double h[4], out= 0.;
+  l= bspline_basis(x,nt,t,h);
+  for (ii=0; ii < 4; ii++) out+= *(c+l-3+ii) * h[ii];
+  return out;
+}
+double bspline_2d_eval(double x, double y, int ntx, double * tx,
+		       int nty, double * ty, double * c){
+  // Outside of the knots, x and y are clamped to the boundary
+  int ii, jj, lx, ly;
+  double hx[4], hy[4], out= 0.;
+  x= ( x < *(tx+3) ) ? *(tx+3) : ( ( x > *(tx+ntx-4) ) ? *(tx+ntx-4) : x );
+  y= ( y < *(ty+3) ) ? *(ty+3) : ( ( y > *(ty+nty-4) ) ? *(ty+nty-4) : y );
+  lx= bspline_basis(x,ntx,tx,hx);
+  ly= bspline_basis(y,nty,ty,hy);
+  for (ii=0; ii < 4; ii++)
+    for (jj=0; jj < 4; jj++)
+      out+= *(c+(lx-3+ii)*(nty-4)+ly-3+jj) * hx[ii] * hy[jj];
+  return out;
+}
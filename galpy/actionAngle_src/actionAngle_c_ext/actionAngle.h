@@ -40,6 +40,10 @@ struct pragmasolver{
   Function declarations
 */
   void parse_actionAngleArgs(int,struct potentialArg *,int *,double *,bool);
+  void calcRapRperi(int,double *,double *,double *,double *,double *,
+		    int,struct potentialArg *,int);
+  double bspline_eval(double,int,double *,double *);
+  double bspline_2d_eval(double,double,int,double *,int,double *,double *);
 #ifdef __cplusplus
 }
 #endif
@@ -13,6 +13,7 @@
 #ifdef _OPENMP
 #include <omp.h>
 #endif
+#include <bovy_openmp.h>
 #define CHUNKSIZE 10
 //Potentials
 #include <galpy_potentials.h>
@@ -46,7 +47,7 @@ void calcJRAdiabatic(int,double *,double *,double *,double *,double *,
 void calcJzAdiabatic(int,double *,double *,double *,double *,int,
 		     struct potentialArg *,int);
 void calcRapRperi(int,double *,double *,double *,double *,double *,
-		  int,struct potentialArg *);
+		  int,struct potentialArg *,int);
 void calcZmax(int,double *,double *,double *,double *,int,
 	      struct potentialArg *);
 double JRAdiabaticIntegrandSquared(double,void *);
@@ -69,8 +70,8 @@ inline void calcEREzL(int ndata,
 		      int nargs,
 		      struct potentialArg * actionAngleArgs){
   int ii;
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk) private(ii)
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii)
   for (ii=0; ii < ndata; ii++){
     *(ER+ii)= evaluatePotentials(*(R+ii),0.,
 				 nargs,actionAngleArgs)
@@ -114,14 +115,14 @@ void actionAngleAdiabatic_actions(int ndata,
   calcZmax(ndata,zmax,z,R,Ez,npot,actionAngleArgs);
   calcJzAdiabatic(ndata,jz,zmax,R,Ez,npot,actionAngleArgs,10);
   //Adjust planar effective potential for gamma
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk) private(ii)
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii)
   for (ii=0; ii < ndata; ii++){
     *(Lz+ii)= fabs( *(Lz+ii) ) + gamma * *(jz+ii);
     *(ER+ii)+= 0.5 * *(Lz+ii) * *(Lz+ii) / *(R+ii) / *(R+ii) 
       - 0.5 * *(vT+ii) * *(vT+ii);
   }
-  calcRapRperi(ndata,rperi,rap,R,ER,Lz,npot,actionAngleArgs);
+  calcRapRperi(ndata,rperi,rap,R,ER,Lz,npot,actionAngleArgs,1);
   calcJRAdiabatic(ndata,jr,rperi,rap,ER,Lz,npot,actionAngleArgs,10);
   free_potentialArgs(npot,actionAngleArgs);
   free(actionAngleArgs);
@@ -155,8 +156,8 @@ void calcJRAdiabatic(int ndata,
   }
   //Setup integrator
   gsl_integration_glfixed_table * T= gsl_integration_glfixed_table_alloc (order);
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk)				\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)				\
   private(tid,ii)							\
   shared(jr,rperi,rap,JRInt,params,T,ER,Lz)
   for (ii=0; ii < ndata; ii++){
@@ -208,8 +209,8 @@ void calcJzAdiabatic(int ndata,
   }
   //Setup integrator
   gsl_integration_glfixed_table * T= gsl_integration_glfixed_table_alloc (order);
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk)				\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)				\
   private(tid,ii)							\
   shared(jz,zmax,JzInt,params,T,Ez,R)
   for (ii=0; ii < ndata; ii++){
@@ -246,7 +247,10 @@ void calcRapRperi(int ndata,
 		  double * ER,
 		  double * Lz,
 		  int nargs,
-		  struct potentialArg * actionAngleArgs){
+		  struct potentialArg * actionAngleArgs,
+		  int nthreadArgs){
+  // actionAngleArgs holds nthreadArgs consecutive copies of the potential;
+  // thread tid uses copy tid % nthreadArgs
   int ii, tid, nthreads;
 #ifdef _OPENMP
   nthreads = omp_get_max_threads();
@@ -265,12 +269,13 @@ void calcRapRperi(int ndata,
   T = gsl_root_fsolver_brent;
   for (tid=0; tid < nthreads; tid++){
     (params+tid)->nargs= nargs;
-    (params+tid)->actionAngleArgs= actionAngleArgs;
+    (params+tid)->actionAngleArgs= actionAngleArgs
+      + ( tid % nthreadArgs ) * nargs;
     (s+tid)->s= gsl_root_fsolver_alloc (T);
   }
-  UNUSED int chunk= CHUNKSIZE;
   gsl_set_error_handler_off();
-#pragma omp parallel for schedule(static,chunk)				\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)				\
   private(tid,ii,iter,status,R_lo,R_hi,meps,peps)			\
   shared(rperi,rap,JRRoot,params,s,R,ER,Lz,max_iter)
   for (ii=0; ii < ndata; ii++){
@@ -288,11 +293,12 @@ void calcRapRperi(int ndata,
     if ( fabs(GSL_FN_EVAL(JRRoot+tid,*(R+ii))) < 0.0000001){ //we are at rap or rperi
       peps= GSL_FN_EVAL(JRRoot+tid,*(R+ii)+0.0000001);
       meps= GSL_FN_EVAL(JRRoot+tid,*(R+ii)-0.0000001);
-      if ( fabs(peps) < 0.00000001 && fabs(meps) < 0.00000001 && peps*meps >= 0.) {//circular
+      if ( ( fabs(peps) < 0.00000001 && fabs(meps) < 0.00000001 && peps*meps >= 0.)
+	   || ( peps <= 0. && meps <= 0. ) ) {//circular
 	*(rperi+ii) = *(R+ii);
 	*(rap+ii) = *(R+ii);
       }
-      else if ( peps < 0. && meps > 0. ) {//umax
+      else if ( peps < meps ) {//umax (also when R is just inside rap)
 	*(rap+ii)= *(R+ii);
 	R_lo= 0.9 * (*(R+ii) - 0.0000001);
 	R_hi= *(R+ii) - 0.00000001;
@@ -327,7 +333,7 @@ void calcRapRperi(int ndata,
 	// LCOV_EXCL_STOP
 	*(rperi+ii) = gsl_root_fsolver_root ((s+tid)->s);
       }
-      else if ( peps > 0. && meps < 0. ){//umin
+      else {//umin (also when R is just outside rperi)
 	*(rperi+ii)= *(R+ii);
 	R_lo= *(R+ii) + 0.0000001;
 	R_hi= 1.1 * (*(R+ii) + 0.0000001);
@@ -469,9 +475,9 @@ void calcZmax(int ndata,
     (params+tid)->actionAngleArgs= actionAngleArgs;
     (s+tid)->s= gsl_root_fsolver_alloc (T);
   }
-  UNUSED int chunk= CHUNKSIZE;
   gsl_set_error_handler_off();
-#pragma omp parallel for schedule(static,chunk)				\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)				\
   private(tid,ii,iter,status,z_lo,z_hi)				\
   shared(zmax,JzRoot,params,s,z,Ez,R,max_iter)
   for (ii=0; ii < ndata; ii++){
@@ -0,0 +1,182 @@
+/*
+  C code for evaluating actions using the grid-based interpolation of the
+  adiabatic approximation (actionAngleAdiabaticGrid)
+*/
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdbool.h>
+#include <math.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#include <bovy_openmp.h>
+#define CHUNKSIZE 10
+//Potentials
+#include <galpy_potentials.h>
+#include <actionAngle.h>
+/*
+  Function Declarations
+*/
+void actionAngleAdiabaticGrid_actions(int,double *,double *,double *,double *,
+				      double *,int,int *,double *,double,
+				      double,double,int,double *,double *,
+				      int,double *,int,double *,double *,
+				      double,double,int,double *,double *,
+				      double,double,int,double *,int,double *,
+				      double *,double *,double *,int *);
+void calcJRAdiabatic(int,double *,double *,double *,double *,double *,
+		     int,struct potentialArg *,int);
+void calcJzAdiabatic(int,double *,double *,double *,double *,int,
+		     struct potentialArg *,int);
+void calcZmax(int,double *,double *,double *,double *,int,
+	      struct potentialArg *);
+/*
+  MAIN FUNCTIONS
+ */
+void actionAngleAdiabaticGrid_actions(int ndata,
+				      double *R,
+				      double *vR,
+				      double *vT,
+				      double *z,
+				      double *vz,
+				      int npot,
+				      int * pot_type,
+				      double * pot_args,
+				      double gamma,
+				      double Rmin,
+				      double Rmax,
+				      int ntR,
+				      double * tR,
+				      double * Rcoeffs,
+				      int ntEz,
+				      double * tEz,
+				      int ntRz,
+				      double * tRz,
+				      double * jzcoeffs,
+				      double Lzmin,
+				      double Lzmax,
+				      int ntLz,
+				      double * tLz,
+				      double * Lzcoeffs,
+				      double ERRLmax,
+				      double ERRamax,
+				      int ntER,
+				      double * tER,
+				      int ntLzr,
+				      double * tLzr,
+				      double * jrcoeffs,
+				      double *jr,
+				      double *jz,
+				      int * err){
+  int ii, jj, noff;
+  double Phio, thisEzZmax, thisERRL, thisERRa, y;
+  //Set up the potentials
+  struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
+  parse_actionAngleArgs(npot,actionAngleArgs,pot_type,pot_args,false);
+  // Ez, ER, and ERLz= |Lz| + gamma Jz for all objects
+  double *Ez= (double *) malloc ( 3 * ndata * sizeof(double) );
+  double *ER= Ez + ndata;
+  double *ERLz= Ez + 2 * ndata;
+  int * offgrid= (int *) malloc ( ndata * sizeof(int) );
+  //First work on the vertical action
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)		\
+  private(ii,Phio,thisEzZmax)
+  for (ii=0; ii < ndata; ii++){
+    Phio= evaluatePotentials(*(R+ii),0.,npot,actionAngleArgs);
+    *(Ez+ii)= evaluatePotentials(*(R+ii),*(z+ii),npot,actionAngleArgs)
+      - Phio + 0.5 * *(vz+ii) * *(vz+ii);
+    *(ER+ii)= Phio + 0.5 * *(vR+ii) * *(vR+ii);
+    *(offgrid+ii)= 1;
+    if ( *(R+ii) > Rmax || *(R+ii) < Rmin ) continue;
+    thisEzZmax= exp(bspline_eval(*(R+ii),ntR,tR,Rcoeffs));
+    if ( *(Ez+ii) != 0. && log(*(Ez+ii)) > thisEzZmax ) continue;
+    *(jz+ii)= bspline_2d_eval(*(R+ii),*(Ez+ii) / thisEzZmax,
+			      ntRz,tRz,ntEz,tEz,jzcoeffs)
+      * ( exp(bspline_eval(*(R+ii),ntR,tR,Rcoeffs+ntR)) - 1e-5 );
+    *(offgrid+ii)= 0;
+  }
+  *err= 0;
+  noff= 0;
+  for (ii=0; ii < ndata; ii++) noff+= *(offgrid+ii);
+  if ( noff > 0 ) {
+    double *Roff= (double *) malloc ( 5 * noff * sizeof(double) );
+    double *zoff= Roff + noff;
+    double *Ezoff= Roff + 2 * noff;
+    double *zmaxoff= Roff + 3 * noff;
+    double *jzoff= Roff + 4 * noff;
+    jj= 0;
+    for (ii=0; ii < ndata; ii++){
+      if ( ! *(offgrid+ii) ) continue;
+      *(Roff+jj)= *(R+ii);
+      *(zoff+jj)= 0.;
+      *(Ezoff+jj)= *(Ez+ii);
+      jj++;
+    }
+    calcZmax(noff,zmaxoff,zoff,Roff,Ezoff,npot,actionAngleArgs);
+    calcJzAdiabatic(noff,jzoff,zmaxoff,Roff,Ezoff,npot,actionAngleArgs,10);
+    jj= 0;
+    for (ii=0; ii < ndata; ii++){
+      if ( ! *(offgrid+ii) ) continue;
+      *(jz+ii)= *(jzoff+jj);
+      jj++;
+    }
+    free(Roff);
+  }
+  //Radial action
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)		\
+  private(ii,thisERRL,thisERRa,y)
+  for (ii=0; ii < ndata; ii++){
+    *(ERLz+ii)= fabs( *(R+ii) * *(vT+ii) ) + gamma * *(jz+ii);
+    *(ER+ii)+= 0.5 * *(ERLz+ii) * *(ERLz+ii) / *(R+ii) / *(R+ii);
+    *(offgrid+ii)= 1;
+    thisERRL= -exp(bspline_eval(*(ERLz+ii),ntLz,tLz,Lzcoeffs)) + ERRLmax;
+    thisERRa= -exp(bspline_eval(*(ERLz+ii),ntLz,tLz,Lzcoeffs+ntLz))
+      + ERRamax;
+    y= ( *(ER+ii) - thisERRa ) / ( thisERRL - thisERRa );
+    if ( y > 1. && y - 1. < 1e-2 ) *(ER+ii)= thisERRL;
+    else if ( y < 0. && y > -1e-2 ) *(ER+ii)= thisERRa;
+    y= ( *(ER+ii) - thisERRa ) / ( thisERRL - thisERRa );
+    if ( !( *(ERLz+ii) >= Lzmin && *(ERLz+ii) <= Lzmax ) || y > 1. || y < 0. )
+      continue;
+    *(jr+ii)= bspline_2d_eval(*(ERLz+ii),y,ntLzr,tLzr,ntER,tER,jrcoeffs)
+      * ( exp(bspline_eval(*(ERLz+ii),ntLz,tLz,Lzcoeffs+2*ntLz)) - 1e-5 );
+    *(offgrid+ii)= 0;
+  }
+  noff= 0;
+  for (ii=0; ii < ndata; ii++) noff+= *(offgrid+ii);
+  if ( noff > 0 ) {
+    // The object's current radius is always between peri- and apocenter
+    double *Roff= (double *) malloc ( 6 * noff * sizeof(double) );
+    double *ERoff= Roff + noff;
+    double *Lzoff= Roff + 2 * noff;
+    double *rperioff= Roff + 3 * noff;
+    double *rapoff= Roff + 4 * noff;
+    double *jroff= Roff + 5 * noff;
+    jj= 0;
+    for (ii=0; ii < ndata; ii++){
+      if ( ! *(offgrid+ii) ) continue;
+      *(Roff+jj)= *(R+ii);
+      *(ERoff+jj)= *(ER+ii);
+      *(Lzoff+jj)= *(ERLz+ii);
+      jj++;
+    }
+    calcRapRperi(noff,rperioff,rapoff,Roff,ERoff,Lzoff,npot,actionAngleArgs,
+		 1);
+    calcJRAdiabatic(noff,jroff,rperioff,rapoff,ERoff,Lzoff,npot,
+		    actionAngleArgs,10);
+    jj= 0;
+    for (ii=0; ii < ndata; ii++){
+      if ( ! *(offgrid+ii) ) continue;
+      *(jr+ii)= *(jroff+jj);
+      jj++;
+    }
+    free(Roff);
+  }
+  //Free
+  free(Ez);
+  free(offgrid);
+  free_potentialArgs(npot,actionAngleArgs);
+  free(actionAngleArgs);
+}
@@ -0,0 +1,646 @@
+/*
+  C code for the actionAngleIsochroneApprox method: orbits are integrated
+  and each output point is directly transformed to actions and angles in
+  the isochrone potential; the time-averaged actions and the sums for the
+  linear angle-fit are accumulated along the way, such that the orbit
+  never needs to be stored
+*/
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdbool.h>
+#include <math.h>
+#include <gsl/gsl_linalg.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#include <bovy_openmp.h>
+#define CHUNKSIZE 1
+#define ISOAPPROX_CHUNKSIZE 1000
+#define ISOAPPROX_ANGLETOL 0.02
+#include <bovy_symplecticode.h>
+#include <bovy_rk.h>
+//Potentials
+#include <galpy_potentials.h>
+#include <integrateFullOrbit.h>
+#include <actionAngle.h>
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+/*
+  Structure to hold the running sums for a single orbit
+*/
+struct isoApproxSums{
+  int npar; // number of parameters in the angle fit
+  bool fit; // whether to accumulate the angle-fit sums
+  bool nonaxi; // whether the angle fit includes the azimuthal angle
+  // previous point: isochrone actions, angles, and de-periodization offsets
+  double jr, lz, jz, ar, aphi, az;
+  double off_r, off_phi, off_z, off_mphi;
+  // sums for the angle-weighted time-averaged actions
+  double sjr, sdr, slz, sdphi, sjz, sdz;
+  // angle ranges to check coverage
+  double minr, maxr, minphi, maxphi, minz, maxz;
+  // counters to determine the sign of the median change in aphi
+  int nneg, ndiff;
+  double maxneg, minnonneg;
+  // sums for the angle fit: A^T A and A^T Y for the three angles, both for
+  // increasing (p) and decreasing (m) aphi
+  double *ATAp, *ATAm, *ATYr, *ATYphi, *ATYz, *ATYmr, *ATYmphi, *ATYmz;
+  double *row, *rowm; // work space
+};
+/*
+  Function Declarations
+*/
+void actionAngleIsochroneApprox_actions(int,double *,double *,double *,
+					double *,double *,double *,int,
+					double *,double,double,double,int,
+					int,int *,double *,double,double,int,
+					double *,double *,double *,int *,
+					int *);
+void actionAngleIsochroneApprox_actionsFreqsAngles(int,double *,double *,
+						   double *,double *,double *,
+						   double *,int,double *,
+						   double,double,double,int,
+						   int,int *,double *,double,
+						   double,int,int,int *,int *,
+						   int *,double *,double *,
+						   double *,double *,double *,
+						   double *,double *,double *,
+						   double *,int *,int *);
+/*
+  Actual functions, inlines first
+*/
+static inline double mod2pi(double x){
+  x= fmod(x,2.*M_PI);
+  return ( x < 0. ) ? x + 2.*M_PI : x;
+}
+static inline double clip_unit(double x){
+  if ( x > 1. && x < 1. + 1e-7 ) return 1.;
+  if ( x < -1. && x > -1. - 1e-7 ) return -1.;
+  return x;
+}
+static void isochrone_actionsAngles(double amp,double b,double *q,
+				    double *jr,double *lz,double *jz,
+				    double *ar,double *aphi,double *az){
+  // Actions and angles in the isochrone potential for rectangular q
+  double R, phi, vR, vT, z, vz, r2;
+  double Lz, Lx, Ly, L2, L, E, Or, Oz, c, e, s, coseta, eta, costheta;
+  double sintheta, tan11, tan12, cosi, i, sinpsi, psi, sinu, u;
+  bool vzindx;
+  R= sqrt( *q * *q + *(q+1) * *(q+1) );
+  phi= acos( *q / R );
+  if ( *(q+1) < 0. ) phi= 2.*M_PI-phi;
+  vR= *(q+3) * cos(phi) + *(q+4) * sin(phi);
+  vT= *(q+4) * cos(phi) - *(q+3) * sin(phi);
+  z= *(q+2);
+  vz= *(q+5);
+  r2= R*R+z*z;
+  Lz= R*vT;
+  Lx= -z*vT;
+  Ly= z*vR-R*vz;
+  L2= Lx*Lx+Ly*Ly+Lz*Lz;
+  L= sqrt(L2);
+  E= -amp/(b+sqrt(b*b+r2))+0.5*(vR*vR+vT*vT+vz*vz);
+  //Actions
+  *lz= Lz;
+  *jz= L-fabs(Lz);
+  *jr= amp/sqrt(-2.*E)-0.5*(L+sqrt(L2+4.*amp*b));
+  //Frequencies
+  Or= pow(-2.*E,1.5)/amp;
+  Oz= 0.5*(1.+L/sqrt(L2+4.*amp*b))*Or;
+  //Angles
+  c= -0.5*amp/E-b;
+  e= sqrt(1.-L2/amp/c*(1.+b/c));
+  s= 1.+sqrt(1.+r2/b/b);
+  coseta= clip_unit(1./e*(1.-b/c*(s-2.)));
+  eta= acos(coseta);
+  costheta= z/sqrt(r2);
+  sintheta= R/sqrt(r2);
+  if ( vR*sintheta+vz*costheta < 0. ) eta= 2.*M_PI-eta;
+  *ar= eta-e*c/(c+b)*sin(eta);
+  tan11= atan(sqrt((1.+e)/(1.-e))*tan(0.5*eta));
+  tan12= atan(sqrt((1.+e+2.*b/c)/(1.-e+2.*b/c))*tan(0.5*eta));
+  vzindx= ( -vz*sintheta+vR*costheta ) > 0.;
+  if ( tan11 < 0. ) tan11+= M_PI;
+  if ( tan12 < 0. ) tan12+= M_PI;
+  cosi= clip_unit(Lz/L);
+  i= acos(cosi);
+  sinpsi= clip_unit(costheta/sin(i));
+  psi= asin(sinpsi);
+  if ( vzindx ) psi= M_PI-psi;
+  psi= mod2pi(psi);
+  *az= psi+Oz/Or * *ar-tan11-1./sqrt(1.+4*amp*b/L2)*tan12;
+  sinu= clip_unit(z/R/tan(i));
+  u= asin(sinu);
+  if ( vzindx ) u= M_PI-u;
+  *aphi= ( Lz < 0. ) ? phi-u-*az : phi-u+*az;
+  *ar= mod2pi(*ar);
+  *aphi= mod2pi(*aphi);
+  *az= mod2pi(*az);
+}
+static void isoApproxSums_alloc(struct isoApproxSums * sums,int nn,
+				bool fit,bool nonaxi){
+  int npar= nn+2;
+  sums->npar= npar;
+  sums->fit= fit;
+  sums->nonaxi= nonaxi;
+  if ( ! fit ) return;
+  sums->ATAp= (double *) malloc ( npar * npar * sizeof(double) );
+  sums->ATYr= (double *) malloc ( 6 * npar * sizeof(double) );
+  sums->ATYphi= sums->ATYr + npar;
+  sums->ATYz= sums->ATYr + 2 * npar;
+  sums->ATYmr= sums->ATYr + 3 * npar;
+  sums->ATYmphi= sums->ATYr + 4 * npar;
+  sums->ATYmz= sums->ATYr + 5 * npar;
+  sums->row= (double *) malloc ( 2 * npar * sizeof(double) );
+  sums->rowm= sums->row + npar;
+  if ( nonaxi )
+    sums->ATAm= (double *) malloc ( npar * npar * sizeof(double) );
+  else { // same design matrix for decreasing aphi
+    sums->ATAm= sums->ATAp;
+    sums->ATYmr= sums->ATYr;
+    sums->ATYmz= sums->ATYz;
+  }
+}
+static void isoApproxSums_free(struct isoApproxSums * sums){
+  if ( ! sums->fit ) return;
+  if ( sums->nonaxi ) free(sums->ATAm);
+  free(sums->ATAp);
+  free(sums->ATYr);
+  free(sums->row);
+}
+static void isoApproxSums_addfit(struct isoApproxSums * sums,double t,
+				 int nn,int * gridR,int * gridZ,int * gridphi){
+  // Add the current point to the angle-fit sums
+  int ii, jj;
+  int npar= sums->npar;
+  double ar= sums->ar+sums->off_r;
+  double aphi= sums->aphi+sums->off_phi;
+  double amphi= 2.*M_PI-sums->aphi+sums->off_mphi;
+  double az= sums->az+sums->off_z;
+  *(sums->row)= 1.;
+  *(sums->row+1)= t;
+  for (ii=0; ii < nn; ii++)
+    *(sums->row+ii+2)= sin( *(gridR+ii) * ar + *(gridZ+ii) * az
+			    + ( sums->nonaxi ? *(gridphi+ii) * aphi : 0. ));
+  // upper triangle only, A^T A is symmetric
+  for (ii=0; ii < npar; ii++) {
+    for (jj=ii; jj < npar; jj++)
+      *(sums->ATAp+ii*npar+jj)+= *(sums->row+ii) * *(sums->row+jj);
+    *(sums->ATYr+ii)+= *(sums->row+ii) * ar;
+    *(sums->ATYphi+ii)+= *(sums->row+ii) * aphi;
+    *(sums->ATYz+ii)+= *(sums->row+ii) * az;
+  }
+  if ( sums->nonaxi ) {
+    *(sums->rowm)= 1.;
+    *(sums->rowm+1)= t;
+    for (ii=0; ii < nn; ii++)
+      *(sums->rowm+ii+2)= sin( *(gridR+ii) * ar + *(gridZ+ii) * az
+			       + *(gridphi+ii) * amphi );
+    for (ii=0; ii < npar; ii++) {
+      for (jj=ii; jj < npar; jj++)
+	*(sums->ATAm+ii*npar+jj)+= *(sums->rowm+ii) * *(sums->rowm+jj);
+      *(sums->ATYmr+ii)+= *(sums->rowm+ii) * ar;
+      *(sums->ATYmphi+ii)+= *(sums->rowm+ii) * amphi;
+      *(sums->ATYmz+ii)+= *(sums->rowm+ii) * az;
+    }
+  }
+  else
+    for (ii=0; ii < npar; ii++)
+      *(sums->ATYmphi+ii)+= *(sums->row+ii) * amphi;
+}
+static void isoApproxSums_init(struct isoApproxSums * sums,double *q,
+			       double amp,double b,
+			       int nn,int * gridR,int * gridZ,int * gridphi){
+  // Initialize the sums with the point at t=0
+  int ii;
+  isochrone_actionsAngles(amp,b,q,&sums->jr,&sums->lz,&sums->jz,
+			  &sums->ar,&sums->aphi,&sums->az);
+  sums->off_r= 0.;
+  sums->off_phi= 0.;
+  sums->off_z= 0.;
+  sums->off_mphi= 0.;
+  sums->sjr= 0.;
+  sums->sdr= 0.;
+  sums->slz= 0.;
+  sums->sdphi= 0.;
+  sums->sjz= 0.;
+  sums->sdz= 0.;
+  sums->minr= sums->ar;
+  sums->maxr= sums->ar;
+  sums->minphi= sums->aphi;
+  sums->maxphi= sums->aphi;
+  sums->minz= sums->az;
+  sums->maxz= sums->az;
+  sums->nneg= 0;
+  sums->ndiff= 0;
+  sums->maxneg= -INFINITY;
+  sums->minnonneg= INFINITY;
+  if ( ! sums->fit ) return;
+  for (ii=0; ii < sums->npar*sums->npar; ii++) {
+    *(sums->ATAp+ii)= 0.;
+    *(sums->ATAm+ii)= 0.;
+  }
+  for (ii=0; ii < 6*sums->npar; ii++) *(sums->ATYr+ii)= 0.;
+  isoApproxSums_addfit(sums,0.,nn,gridR,gridZ,gridphi);
+}
+static void isoApproxSums_restart(struct isoApproxSums * sums,
+				  double amp,double b,double *q){
+  // Go back to the point at t=0 to start the backwards part of the orbit
+  isochrone_actionsAngles(amp,b,q,&sums->jr,&sums->lz,&sums->jz,
+			  &sums->ar,&sums->aphi,&sums->az);
+  sums->off_r= 0.;
+  sums->off_phi= 0.;
+  sums->off_z= 0.;
+  sums->off_mphi= 0.;
+}
+static inline void isoApproxSums_angle(double cur,double * prev,
+				       double * off,double * mn,double * mx,
+				       bool forward,double * dangle){
+  // Update the de-periodization offset and range of a single angle and
+  // return the (positive) change in the angle over the time step
+  double diff= forward ? cur - *prev : *prev - cur; // later - earlier
+  if ( diff < -6. ) *off+= forward ? 2.*M_PI : -2.*M_PI;
+  *dangle= mod2pi(diff);
+  if ( cur < *mn ) *mn= cur;
+  if ( cur > *mx ) *mx= cur;
+  *prev= cur;
+}
+static void isoApproxSums_add(struct isoApproxSums * sums,double *q,double t,
+			      bool forward,double amp,double b,
+			      int nn,int * gridR,int * gridZ,int * gridphi){
+  // Add a point; if forward, this point is later than the previous point,
+  // otherwise it is earlier; actions are weighted by the change in angle
+  // until the next point in time
+  double jr, lz, jz, ar, aphi, az, dr, dphi, dz, diff;
+  isochrone_actionsAngles(amp,b,q,&jr,&lz,&jz,&ar,&aphi,&az);
+  // azimuthal angle: median change and de-periodization of 2pi-aphi
+  diff= forward ? aphi - sums->aphi : sums->aphi - aphi;
+  if ( diff < 0. ) {
+    sums->nneg+= 1;
+    if ( diff > sums->maxneg ) sums->maxneg= diff;
+  }
+  else if ( diff < sums->minnonneg ) sums->minnonneg= diff;
+  sums->ndiff+= 1;
+  if ( diff > 6. ) sums->off_mphi+= forward ? 2.*M_PI : -2.*M_PI;
+  isoApproxSums_angle(ar,&sums->ar,&sums->off_r,&sums->minr,&sums->maxr,
+		      forward,&dr);
+  isoApproxSums_angle(aphi,&sums->aphi,&sums->off_phi,
+		      &sums->minphi,&sums->maxphi,forward,&dphi);
+  isoApproxSums_angle(az,&sums->az,&sums->off_z,&sums->minz,&sums->maxz,
+		      forward,&dz);
+  if ( forward ) {
+    sums->sjr+= sums->jr * dr;
+    sums->slz+= sums->lz * dphi;
+    sums->sjz+= sums->jz * dz;
+  }
+  else {
+    sums->sjr+= jr * dr;
+    sums->slz+= lz * dphi;
+    sums->sjz+= jz * dz;
+  }
+  sums->sdr+= dr;
+  sums->sdphi+= dphi;
+  sums->sdz+= dz;
+  sums->jr= jr;
+  sums->lz= lz;
+  sums->jz= jz;
+  if ( sums->fit ) isoApproxSums_addfit(sums,t,nn,gridR,gridZ,gridphi);
+}
+static bool isoApproxSums_negFreq(struct isoApproxSums * sums,
+				  double aphi_first,double aphi_last){
+  // Determine whether the median change in aphi is negative, including the
+  // difference between the first and the last point
+  int nneg= sums->nneg;
+  int ntot= sums->ndiff+1;
+  double maxneg= sums->maxneg;
+  double minnonneg= sums->minnonneg;
+  double diff= aphi_first - aphi_last;
+  if ( diff < 0. ) {
+    nneg+= 1;
+    if ( diff > maxneg ) maxneg= diff;
+  }
+  else if ( diff < minnonneg ) minnonneg= diff;
+  if ( ntot % 2 == 1 ) return 2 * nneg > ntot;
+  if ( 2 * nneg > ntot ) return true;
+  if ( 2 * nneg < ntot ) return false;
+  return maxneg+minnonneg < 0.;
+}
+static int isoApproxSums_solve(int npar,double * ATA,double * ATY1,
+			       double * ATY2,double * ATY3,double * out){
+  // Solve the three normal equations, return angle and frequency for each
+  int ii, jj, s, status;
+  gsl_error_handler_t * old_handler= gsl_set_error_handler_off();
+  gsl_matrix * m= gsl_matrix_alloc(npar,npar);
+  gsl_vector * y= gsl_vector_alloc(npar);
+  gsl_vector * x= gsl_vector_alloc(npar);
+  gsl_permutation * p= gsl_permutation_alloc(npar);
+  for (ii=0; ii < npar; ii++)
+    for (jj=ii; jj < npar; jj++) {
+      gsl_matrix_set(m,ii,jj,*(ATA+ii*npar+jj));
+      gsl_matrix_set(m,jj,ii,*(ATA+ii*npar+jj));
+    }
+  status= gsl_linalg_LU_decomp(m,p,&s);
+  double * ATYs[3]= {ATY1,ATY2,ATY3};
+  for (jj=0; jj < 3; jj++) {
+    for (ii=0; ii < npar; ii++) gsl_vector_set(y,ii,*(ATYs[jj]+ii));
+    status|= gsl_linalg_LU_solve(m,p,y,x);
+    *(out+2*jj)= gsl_vector_get(x,0);
+    *(out+2*jj+1)= gsl_vector_get(x,1);
+  }
+  gsl_matrix_free(m);
+  gsl_vector_free(y);
+  gsl_vector_free(x);
+  gsl_permutation_free(p);
+  gsl_set_error_handler(old_handler);
+  return status;
+}
+static inline int isoApproxSums_coverage(double mn,double mx){
+  return ( fabs(mx-2.*M_PI) > ISOAPPROX_ANGLETOL
+	   && fabs(mn) > ISOAPPROX_ANGLETOL );
+}
+static void isoApproxSums_integrate(void (*odeint_func)(void (*)(double, double *, double *,
+								 int, struct potentialArg *),
+							int,double *,int,double,double *,
+							int,struct potentialArg *,
+							double,double,double *,int *),
+				    void (*odeint_deriv_func)(double, double *, double *,
+							      int,struct potentialArg *),
+				    int dim,struct isoApproxSums * sums,
+				    double *yo,bool forward,int nt,double *t,
+				    double dt,int npot,
+				    struct potentialArg * potentialArgs,
+				    double rtol,double atol,double amp,double b,
+				    int nn,int * gridR,int * gridZ,int * gridphi,
+				    double * buf,int *err){
+  // Integrate the orbit in chunks and add each point to the sums; the
+  // backwards orbit is integrated forward in time with flipped velocities
+  int ii, jj, nchunk, thiserr;
+  int k0= 0;
+  double yf[6];
+  for (ii=0; ii < 6; ii++) yf[ii]= *(yo+ii);
+  if ( ! forward )
+    for (ii=3; ii < 6; ii++) yf[ii]= -yf[ii];
+  while ( k0 < nt-1 ) {
+    nchunk= ( nt-1-k0 < ISOAPPROX_CHUNKSIZE ) ? nt-k0 : ISOAPPROX_CHUNKSIZE+1;
+    thiserr= 0;
+    odeint_func(odeint_deriv_func,dim,yf,nchunk,dt,t+k0,npot,potentialArgs,
+		rtol,atol,buf,&thiserr);
+    if ( thiserr == -10 ) {
+      *err= -10;
+      return;
+    }
+    else if ( thiserr != 0 )
+      *err= thiserr;
+    // Continue from the end of this chunk
+    for (ii=0; ii < 6; ii++) yf[ii]= *(buf+6*(nchunk-1)+ii);
+    for (jj=1; jj < nchunk; jj++) {
+      if ( ! forward )
+	for (ii=3; ii < 6; ii++) *(buf+6*jj+ii)= -*(buf+6*jj+ii);
+      isoApproxSums_add(sums,buf+6*jj,forward ? *(t+k0+jj) : -*(t+k0+jj),
+			forward,amp,b,nn,gridR,gridZ,gridphi);
+    }
+    k0+= nchunk-1;
+  }
+}
+static void actionAngleIsochroneApprox_main(int nobj,
+					    double *R,
+					    double *vR,
+					    double *vT,
+					    double *z,
+					    double *vz,
+					    double *phi,
+					    int nt,
+					    double *t,
+					    double dt,
+					    double rtol,
+					    double atol,
+					    int odeint_type,
+					    int npot,
+					    int * pot_type,
+					    double * pot_args,
+					    double amp,
+					    double b,
+					    int nonaxi,
+					    int nn,
+					    int * gridR,
+					    int * gridZ,
+					    int * gridphi,
+					    double *jr,
+					    double *lz,
+					    double *jz,
+					    double *Omegar,
+					    double *Omegaphi,
+					    double *Omegaz,
+					    double *angler,
+					    double *anglephi,
+					    double *anglez,
+					    int * warn,
+					    int * err){
+  // Omegar etc. can be NULL, in which case only the actions are computed
+  // from the forward orbit
+  int ii, dim, max_threads, tid;
+  struct sigaction oldaction;
+  bool freqsAngles= Omegar != NULL;
+  double yo[6], fit[6], aphi_last;
+  struct isoApproxSums * thisSums;
+#ifdef _OPENMP
+  max_threads= ( nobj < omp_get_max_threads() ) ? nobj : omp_get_max_threads();
+#else
+  max_threads= 1;
+#endif
+  // potentialArgs may cache intermediate results, so one copy / thread
+  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+  struct isoApproxSums * sums= (struct isoApproxSums *) malloc ( max_threads * sizeof (struct isoApproxSums) );
+  double * buf= (double *) malloc ( max_threads * 6 * (ISOAPPROX_CHUNKSIZE+1) * sizeof(double) );
+  for (ii=0; ii < max_threads; ii++) {
+    parse_leapFuncArgs_Full(npot,potentialArgs+ii*npot,pot_type,pot_args);
+    isoApproxSums_alloc(sums+ii,nn,freqsAngles,nonaxi);
+  }
+  //Integrator
+  void (*odeint_func)(void (*func)(double, double *, double *,
+			   int, struct potentialArg *),
+		      int,
+		      double *,
+		      int, double, double *,
+		      int, struct potentialArg *,
+		      double, double,
+		      double *,int *);
+  void (*odeint_deriv_func)(double, double *, double *,
+			    int,struct potentialArg *);
+  switch ( odeint_type ) {
+  case 0: //leapfrog
+    odeint_func= &leapfrog;
+    odeint_deriv_func= &evalRectForce;
+    dim= 3;
+    break;
+  case 1: //RK4
+    odeint_func= &bovy_rk4;
+    odeint_deriv_func= &evalRectDeriv;
+    dim= 6;
+    break;
+  case 2: //RK6
+    odeint_func= &bovy_rk6;
+    odeint_deriv_func= &evalRectDeriv;
+    dim= 6;
+    break;
+  case 3: //symplec4
+    odeint_func= &symplec4;
+    odeint_deriv_func= &evalRectForce;
+    dim= 3;
+    break;
+  case 4: //symplec6
+    odeint_func= &symplec6;
+    odeint_deriv_func= &evalRectForce;
+    dim= 3;
+    break;
+  case 5: //DOPR54
+    odeint_func= &bovy_dopr54;
+    odeint_deriv_func= &evalRectDeriv;
+    dim= 6;
+    break;
+  }
+  install_sigint_handler(&oldaction);
+  galpy_openmp_schedule(GALPY_SCHEDULE_DYNAMIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)			\
+  private(ii,tid,thisSums,yo,fit,aphi_last) num_threads(max_threads)
+  for (ii=0; ii < nobj; ii++) {
+    *(err+ii)= 0;
+    *(warn+ii)= 0;
+    if ( interrupted ) { // skip remaining orbits after CTRL-C
+      *(err+ii)= -10;
+      continue;
+    }
+#ifdef _OPENMP
+    tid= omp_get_thread_num();
+#else
+    tid= 0;
+#endif
+    thisSums= sums+tid;
+    //go to the rectangular frame
+    yo[0]= *(R+ii) * cos(*(phi+ii));
+    yo[1]= *(R+ii) * sin(*(phi+ii));
+    yo[2]= *(z+ii);
+    yo[3]= *(vR+ii) * cos(*(phi+ii)) - *(vT+ii) * sin(*(phi+ii));
+    yo[4]= *(vR+ii) * sin(*(phi+ii)) + *(vT+ii) * cos(*(phi+ii));
+    yo[5]= *(vz+ii);
+    isoApproxSums_init(thisSums,yo,amp,b,nn,gridR,gridZ,gridphi);
+    isoApproxSums_integrate(odeint_func,odeint_deriv_func,dim,thisSums,
+			    yo,true,nt,t,dt,npot,potentialArgs+tid*npot,
+			    rtol,atol,amp,b,nn,gridR,gridZ,gridphi,
+			    buf+tid*6*(ISOAPPROX_CHUNKSIZE+1),err+ii);
+    if ( freqsAngles && *(err+ii) != -10 ) {
+      aphi_last= thisSums->aphi; // last point of the forward orbit
+      isoApproxSums_restart(thisSums,amp,b,yo);
+      isoApproxSums_integrate(odeint_func,odeint_deriv_func,dim,thisSums,
+			      yo,false,nt,t,dt,npot,potentialArgs+tid*npot,
+			      rtol,atol,amp,b,nn,gridR,gridZ,gridphi,
+			      buf+tid*6*(ISOAPPROX_CHUNKSIZE+1),err+ii);
+    }
+    if ( *(err+ii) == -10 ) continue;
+    *(jr+ii)= thisSums->sjr / thisSums->sdr;
+    *(lz+ii)= thisSums->slz / thisSums->sdphi;
+    *(jz+ii)= thisSums->sjz / thisSums->sdz;
+    *(warn+ii)= isoApproxSums_coverage(thisSums->minr,thisSums->maxr)
+      + 2 * isoApproxSums_coverage(thisSums->minz,thisSums->maxz)
+      + 4 * isoApproxSums_coverage(thisSums->minphi,thisSums->maxphi);
+    if ( ! freqsAngles ) continue;
+    // Angle fit, thisSums->aphi is now the first point of the orbit
+    if ( isoApproxSums_negFreq(thisSums,thisSums->aphi,aphi_last) ) {
+      if ( isoApproxSums_solve(thisSums->npar,thisSums->ATAm,
+			       thisSums->ATYmr,thisSums->ATYmphi,
+			       thisSums->ATYmz,fit) )
+	*(err+ii)= 1;
+      fit[2]= 2.*M_PI-fit[2];
+      fit[3]= -fit[3];
+    }
+    else if ( isoApproxSums_solve(thisSums->npar,thisSums->ATAp,
+				  thisSums->ATYr,thisSums->ATYphi,
+				  thisSums->ATYz,fit) )
+      *(err+ii)= 1;
+    *(angler+ii)= mod2pi(fit[0]);
+    *(Omegar+ii)= fit[1];
+    *(anglephi+ii)= mod2pi(fit[2]);
+    *(Omegaphi+ii)= fit[3];
+    *(anglez+ii)= mod2pi(fit[4]);
+    *(Omegaz+ii)= fit[5];
+  }
+  restore_sigint_handler(&oldaction);
+  //Free allocated memory
+  for (ii=0; ii < max_threads; ii++) {
+    free_potentialArgs(npot,potentialArgs+ii*npot);
+    isoApproxSums_free(sums+ii);
+  }
+  free(potentialArgs);
+  free(sums);
+  free(buf);
+}
+void actionAngleIsochroneApprox_actions(int nobj,
+					double *R,
+					double *vR,
+					double *vT,
+					double *z,
+					double *vz,
+					double *phi,
+					int nt,
+					double *t,
+					double dt,
+					double rtol,
+					double atol,
+					int odeint_type,
+					int npot,
+					int * pot_type,
+					double * pot_args,
+					double amp,
+					double b,
+					int nonaxi,
+					double *jr,
+					double *lz,
+					double *jz,
+					int * warn,
+					int * err){
+  actionAngleIsochroneApprox_main(nobj,R,vR,vT,z,vz,phi,nt,t,dt,rtol,atol,
+				  odeint_type,npot,pot_type,pot_args,amp,b,
+				  nonaxi,0,NULL,NULL,NULL,jr,lz,jz,
+				  NULL,NULL,NULL,NULL,NULL,NULL,warn,err);
+}
+void actionAngleIsochroneApprox_actionsFreqsAngles(int nobj,
+						   double *R,
+						   double *vR,
+						   double *vT,
+						   double *z,
+						   double *vz,
+						   double *phi,
+						   int nt,
+						   double *t,
+						   double dt,
+						   double rtol,
+						   double atol,
+						   int odeint_type,
+						   int npot,
+						   int * pot_type,
+						   double * pot_args,
+						   double amp,
+						   double b,
+						   int nonaxi,
+						   int nn,
+						   int * gridR,
+						   int * gridZ,
+						   int * gridphi,
+						   double *jr,
+						   double *lz,
+						   double *jz,
+						   double *Omegar,
+						   double *Omegaphi,
+						   double *Omegaz,
+						   double *angler,
+						   double *anglephi,
+						   double *anglez,
+						   int * warn,
+						   int * err){
+  actionAngleIsochroneApprox_main(nobj,R,vR,vT,z,vz,phi,nt,t,dt,rtol,atol,
+				  odeint_type,npot,pot_type,pot_args,amp,b,
+				  nonaxi,nn,gridR,gridZ,gridphi,jr,lz,jz,
+				  Omegar,Omegaphi,Omegaz,angler,anglephi,
+				  anglez,warn,err);
+}
@@ -0,0 +1,378 @@
+/*
+  C code for actions, frequencies, and angles in spherical potentials
+*/
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdbool.h>
+#include <math.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#include <bovy_openmp.h>
+#define CHUNKSIZE 10
+//Potentials
+#include <galpy_potentials.h>
+#include <actionAngle.h>
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+/*
+  Function Declarations
+*/
+void actionAngleSpherical_actions(int,double *,double *,double *,double *,
+				  double *,int,int *,double *,int,double *,
+				  double *,double *,int *);
+void actionAngleSpherical_actionsFreqs(int,double *,double *,double *,
+				       double *,double *,int,int *,double *,
+				       int,double *,double *,double *,double *,
+				       double *,int *);
+void actionAngleSpherical_actionsFreqsAngles(int,double *,double *,double *,
+					     double *,double *,int,int *,
+					     double *,int,double *,double *,
+					     double *,double *,double *,
+					     double *,double *,int *);
+void calcSphericalIntegrals(double,double,double,double,bool,
+			    int,double *,double *,int,struct potentialArg *,
+			    double *,double *,double *);
+void calcSphericalCircularFreqs(double,int,struct potentialArg *,
+				double *,double *);
+/*
+  Actual functions, inlines first
+*/
+static inline void calcErL(double R,double vR,double vT,double z,double vz,
+			   double * r,double * vr,double * vtheta,
+			   double * E,double * L,
+			   int nargs,struct potentialArg * actionAngleArgs){
+  // spherical radius, radial velocity, velocity in the direction of
+  // increasing theta, energy, and total angular momentum
+  double Lx, Ly, Lz;
+  *r= sqrt ( R * R + z * z );
+  *vr= ( R * vR + z * vz ) / *r;
+  *vtheta= ( z * vR - R * vz ) / *r;
+  Lz= R * vT;
+  Lx= -z * vT;
+  Ly= z * vR - R * vz;
+  *L= sqrt ( Lx * Lx + Ly * Ly + Lz * Lz );
+  *E= evaluatePotentials(*r,0.,nargs,actionAngleArgs)
+    + 0.5 * *vr * *vr + 0.5 * *L * *L / *r / *r;
+}
+static inline double JrSphericalIntegrandSquared(double r,double E,double L,
+						 int nargs,
+						 struct potentialArg * actionAngleArgs){
+  return 2. * ( E - evaluatePotentials(r,0.,nargs,actionAngleArgs) )
+    - L * L / r / r;
+}
+static inline double polishTurningPoint(double r,double E,double L,
+					bool apo,int nargs,
+					struct potentialArg * actionAngleArgs){
+  // calcRapRperi returns the current radius r as the turning point when the
+  // radial velocity is small, refine it using Newton's method; because
+  // p_r^2(r) >= 0, the apocenter is >= r and the pericenter <= r, steps
+  // that do not satisfy this or that are not small (e.g., for near-circular
+  // orbits) are rejected
+  int ii;
+  double step, rturn= r;
+  for (ii=0; ii < 10; ii++){
+    step= JrSphericalIntegrandSquared(rturn,E,L,nargs,actionAngleArgs)
+      / 2. / ( calcRforce(rturn,0.,0.,0.,nargs,actionAngleArgs)
+	       + L * L / rturn / rturn / rturn );
+    rturn-= step;
+    if ( ( apo && rturn < r ) || ( ! apo && rturn > r )
+	 || fabs ( rturn - r ) > 0.0001 * r || isnan ( rturn ) )
+      return r;
+    if ( fabs ( step ) < 1e-14 * rturn ) break;
+  }
+  return rturn;
+}
+/*
+  MAIN FUNCTIONS
+ */
+static void actionAngleSpherical_main(int ndata,
+				      double *R,
+				      double *vR,
+				      double *vT,
+				      double *z,
+				      double *vz,
+				      int npot,
+				      int * pot_type,
+				      double * pot_args,
+				      int ngl,
+				      double *glx,
+				      double *glw,
+				      double *jr,
+				      double *Omegar,
+				      double *Omegaphi,
+				      double *angler,
+				      double *anglez,
+				      int * err){
+  // Omegar, Omegaphi, angler, anglez can be NULL, in which case they are
+  // not computed; outputs are set to 9999.99 when rperi or rap cannot be
+  // found (e.g., for unbound orbits)
+  int ii, max_threads, tid;
+  *err= 0;
+  double Rmean, JS, JL, TS, TL, IS, IL, Tr, Ir, Or, Op;
+  double wr, wz, dpsi, cosi, sinpsi, psi;
+  struct potentialArg * thisArgs;
+  bool freqs= Omegar != NULL;
+  bool angles= angler != NULL;
+#ifdef _OPENMP
+  max_threads= omp_get_max_threads();
+#else
+  max_threads= 1;
+#endif
+  //Set up the potentials; potentialArgs may cache intermediate results, so
+  //one copy / thread
+  struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+  for (ii=0; ii < max_threads; ii++)
+    parse_actionAngleArgs(npot,actionAngleArgs+ii*npot,pot_type,pot_args,
+			  false);
+  //E, L, and r, vr, vtheta
+  double *r= (double *) malloc ( ndata * sizeof(double) );
+  double *vr= (double *) malloc ( ndata * sizeof(double) );
+  double *vtheta= (double *) malloc ( ndata * sizeof(double) );
+  double *E= (double *) malloc ( ndata * sizeof(double) );
+  double *L= (double *) malloc ( ndata * sizeof(double) );
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii,tid)	\
+  num_threads(max_threads)
+  for (ii=0; ii < ndata; ii++){
+#ifdef _OPENMP
+    tid= omp_get_thread_num();
+#else
+    tid= 0;
+#endif
+    calcErL(*(R+ii),*(vR+ii),*(vT+ii),*(z+ii),*(vz+ii),
+	    r+ii,vr+ii,vtheta+ii,E+ii,L+ii,npot,actionAngleArgs+tid*npot);
+  }
+  //Calculate peri and apocenters, this is the same problem as the radial
+  //motion in the adiabatic approximation with ER=E and Lz=L
+  double *rperi= (double *) malloc ( ndata * sizeof(double) );
+  double *rap= (double *) malloc ( ndata * sizeof(double) );
+  calcRapRperi(ndata,rperi,rap,r,E,L,npot,actionAngleArgs,max_threads);
+  //Now compute the actions, frequencies, and angles using Gauss-Legendre
+  //integration with r = rperi + t^2 (r < Rmean) and r = rap - t^2
+  //(r > Rmean), which removes the square-root singularities at the
+  //turning points
+  galpy_openmp_schedule(GALPY_SCHEDULE_DYNAMIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)				\
+  private(ii,tid,thisArgs,Rmean,JS,JL,TS,TL,IS,IL,Tr,Ir,Or,Op,wr,wz,dpsi,cosi, \
+	  sinpsi,psi) num_threads(max_threads)
+  for (ii=0; ii < ndata; ii++){
+#ifdef _OPENMP
+    tid= omp_get_thread_num();
+#else
+    tid= 0;
+#endif
+    thisArgs= actionAngleArgs+tid*npot;
+    if ( *(rperi+ii) == -9999.99 || *(rap+ii) == -9999.99 ){
+      *(jr+ii)= 9999.99;
+      if ( freqs ) {
+	*(Omegar+ii)= 9999.99;
+	*(Omegaphi+ii)= 9999.99;
+      }
+      if ( angles ) {
+	*(angler+ii)= 9999.99;
+	*(anglez+ii)= 9999.99;
+      }
+      continue;
+    }
+    if ( *(rperi+ii) != *(rap+ii) ) {
+      if ( *(rperi+ii) == r[ii] )
+	*(rperi+ii)= polishTurningPoint(r[ii],E[ii],L[ii],false,
+					npot,thisArgs);
+      else if ( *(rap+ii) == r[ii] )
+	*(rap+ii)= polishTurningPoint(r[ii],E[ii],L[ii],true,
+				      npot,thisArgs);
+    }
+    Rmean= exp ( 0.5 * ( log ( *(rperi+ii) ) + log ( *(rap+ii) ) ) );
+    // Half-integrals from rperi to Rmean and from Rmean to rap
+    calcSphericalIntegrals(Rmean,*(rperi+ii),E[ii],L[ii],false,
+			   ngl,glx,glw,npot,thisArgs,
+			   &JS,&TS,&IS);
+    calcSphericalIntegrals(Rmean,*(rap+ii),E[ii],L[ii],true,
+			   ngl,glx,glw,npot,thisArgs,
+			   &JL,&TL,&IL);
+    *(jr+ii)= ( JS + JL ) / M_PI;
+    if ( ! freqs ) continue;
+    if ( *(jr+ii) < 0.000000001 ) // circular orbit
+      calcSphericalCircularFreqs(r[ii],npot,thisArgs,&Or,&Op);
+    else {
+      Tr= 2. * ( TS + TL );
+      Ir= 2. * L[ii] * ( IS + IL );
+      Or= 2. * M_PI / Tr;
+      Op= Ir * Or / 2. / M_PI;
+    }
+    *(Omegar+ii)= Or;
+    *(Omegaphi+ii)= Op;
+    if ( ! angles ) continue;
+    // Radial angle and the angle conjugate to L, using the integrals from
+    // the nearest turning point to the current radius
+    dpsi= Op / Or * 2. * M_PI;
+    if ( r[ii] < Rmean ) {
+      if ( r[ii] > *(rperi+ii) )
+	calcSphericalIntegrals(r[ii],*(rperi+ii),E[ii],L[ii],false,
+			       ngl,glx,glw,npot,thisArgs,
+			       &JS,&TS,&IS);
+      else {
+	TS= 0.;
+	IS= 0.;
+      }
+      wr= Or * TS;
+      wz= L[ii] * IS;
+      if ( vr[ii] < 0. ) {
+	wr= 2. * M_PI - wr;
+	wz= dpsi - wz;
+      }
+    }
+    else {
+      if ( r[ii] < *(rap+ii) )
+	calcSphericalIntegrals(r[ii],*(rap+ii),E[ii],L[ii],true,
+			       ngl,glx,glw,npot,thisArgs,
+			       &JL,&TL,&IL);
+      else {
+	TL= 0.;
+	IL= 0.;
+      }
+      wr= Or * TL;
+      wz= L[ii] * IL;
+      if ( vr[ii] < 0. ) {
+	wr= M_PI + wr;
+	wz= dpsi / 2. + wz;
+      }
+      else {
+	wr= M_PI - wr;
+	wz= dpsi / 2. - wz;
+      }
+    }
+    // psi, the angle in the orbital plane measured from the ascending node
+    cosi= *(R+ii) * *(vT+ii) / L[ii];
+    sinpsi= *(z+ii) / r[ii] / sqrt ( 1. - cosi * cosi );
+    if ( sinpsi > 1. && sinpsi < 1.0000001 ) sinpsi= 1.;
+    else if ( sinpsi < -1. && sinpsi > -1.0000001 ) sinpsi= -1.;
+    psi= asin ( sinpsi );
+    if ( vtheta[ii] > 0. ) psi= M_PI - psi;
+    psi= fmod ( psi, 2. * M_PI );
+    if ( psi < 0. ) psi+= 2. * M_PI;
+    *(angler+ii)= wr;
+    *(anglez+ii)= -wz + psi + Op / Or * wr;
+  }
+  for (ii=0; ii < max_threads; ii++)
+    free_potentialArgs(npot,actionAngleArgs+ii*npot);
+  free(actionAngleArgs);
+  free(r);
+  free(vr);
+  free(vtheta);
+  free(E);
+  free(L);
+  free(rperi);
+  free(rap);
+}
+void actionAngleSpherical_actions(int ndata,
+				  double *R,
+				  double *vR,
+				  double *vT,
+				  double *z,
+				  double *vz,
+				  int npot,
+				  int * pot_type,
+				  double * pot_args,
+				  int ngl,
+				  double *glx,
+				  double *glw,
+				  double *jr,
+				  int * err){
+  actionAngleSpherical_main(ndata,R,vR,vT,z,vz,npot,pot_type,pot_args,
+			    ngl,glx,glw,jr,NULL,NULL,NULL,NULL,err);
+}
+void actionAngleSpherical_actionsFreqs(int ndata,
+				       double *R,
+				       double *vR,
+				       double *vT,
+				       double *z,
+				       double *vz,
+				       int npot,
+				       int * pot_type,
+				       double * pot_args,
+				       int ngl,
+				       double *glx,
+				       double *glw,
+				       double *jr,
+				       double *Omegar,
+				       double *Omegaphi,
+				       int * err){
+  actionAngleSpherical_main(ndata,R,vR,vT,z,vz,npot,pot_type,pot_args,
+			    ngl,glx,glw,jr,Omegar,Omegaphi,NULL,NULL,err);
+}
+void actionAngleSpherical_actionsFreqsAngles(int ndata,
+					     double *R,
+					     double *vR,
+					     double *vT,
+					     double *z,
+					     double *vz,
+					     int npot,
+					     int * pot_type,
+					     double * pot_args,
+					     int ngl,
+					     double *glx,
+					     double *glw,
+					     double *jr,
+					     double *Omegar,
+					     double *Omegaphi,
+					     double *angler,
+					     double *anglez,
+					     int * err){
+  actionAngleSpherical_main(ndata,R,vR,vT,z,vz,npot,pot_type,pot_args,
+			    ngl,glx,glw,jr,Omegar,Omegaphi,angler,anglez,err);
+}
+void calcSphericalIntegrals(double r,
+			    double rturn,
+			    double E,
+			    double L,
+			    bool large,
+			    int ngl,
+			    double * glx,
+			    double * glw,
+			    int nargs,
+			    struct potentialArg * actionAngleArgs,
+			    double * J,
+			    double * T,
+			    double * I){
+  // Integrals of p_r, 1/p_r, and 1/p_r/r^2 from the turning point rturn
+  // (rperi if large=false, rap otherwise) to r using r' = rturn +/- t^2
+  int ii;
+  double tmax= sqrt ( fabs ( r - rturn ) );
+  double t, rp, pr2, pr;
+  *J= 0.;
+  *T= 0.;
+  *I= 0.;
+  for (ii=0; ii < ngl; ii++){
+    t= 0.5 * tmax * ( *(glx+ii) + 1. );
+    rp= large ? rturn - t * t : rturn + t * t;
+    pr2= JrSphericalIntegrandSquared(rp,E,L,nargs,actionAngleArgs);
+    if ( pr2 <= 0. ) continue; // only happens through round-off near rturn
+    pr= sqrt ( pr2 );
+    *J+= *(glw+ii) * 2. * t * pr;
+    *T+= *(glw+ii) * 2. * t / pr;
+    *I+= *(glw+ii) * 2. * t / pr / rp / rp;
+  }
+  *J*= 0.5 * tmax;
+  *T*= 0.5 * tmax;
+  *I*= 0.5 * tmax;
+}
+void calcSphericalCircularFreqs(double r,
+				int nargs,
+				struct potentialArg * actionAngleArgs,
+				double * Or,
+				double * Op){
+  // Epicycle and circular frequency, using a five-point finite-difference
+  // stencil of the radial force for the second derivative
+  double h= 0.0001 * r;
+  double Fr= calcRforce(r,0.,0.,0.,nargs,actionAngleArgs);
+  double dFrdr= ( - calcRforce(r+2.*h,0.,0.,0.,nargs,actionAngleArgs)
+		  + 8. * calcRforce(r+h,0.,0.,0.,nargs,actionAngleArgs)
+		  - 8. * calcRforce(r-h,0.,0.,0.,nargs,actionAngleArgs)
+		  + calcRforce(r-2.*h,0.,0.,0.,nargs,actionAngleArgs) )
+    / 12. / h;
+  *Or= sqrt ( - dFrdr - 3. * Fr / r );
+  *Op= sqrt ( - Fr / r );
+}
@@ -10,9 +10,11 @@
 #include <gsl/gsl_roots.h>
 #include <gsl/gsl_min.h>
 #include <gsl/gsl_integration.h>
+#include <gsl/gsl_linalg.h>
 #ifdef _OPENMP
 #include <omp.h>
 #endif
+#include <bovy_openmp.h>
 #define CHUNKSIZE 10
 //Potentials
 #include <galpy_potentials.h>
@@ -86,55 +88,64 @@ struct u0EqArg{
 /*
   Function Declarations
 */
-void calcu0(int,double *,double *,int,int *,double *,double,double *,int *);
+void calcu0(int,double *,double *,int,int *,double *,int,double *,double *,
+	    int *);
 void actionAngleStaeckel_actions(int,double *,double *,double *,double *,
-				 double *,double *,int,int *,double *,double,
-				 double *,double *,int *);
+				 double *,double *,int,int *,double *,int,
+				 double *,double *,double *,int *);
 void actionAngleStaeckel_actionsFreqsAngles(int,double *,double *,double *,
 					    double *,double *,double *,
-					    int,int *,double *,
-					    double,double *,double *,double *,
+					    int,int *,double *,int,
+					    double *,double *,double *,double *,
 					    double *,double *,double *,
 					    double *,double *,int *);
 void actionAngleStaeckel_actionsFreqs(int,double *,double *,double *,double *,
 				      double *,double *,int,int *,double *,
-				      double,double *,double *,double *,
+				      int,double *,double *,double *,double *,
 				      double *,double *,int *);
+void actionAngleStaeckel_xvFreqs(int,double *,double *,double *,double *,
+				 double *,double *,int,int *,double *,int,
+				 double *,int,int,double,double *,double *,
+				 double *,double *,double *,double *,double *,
+				 double *,double *,int *,int *);
+double calcRgStaeckel(double,int,struct potentialArg *);
 void calcAnglesStaeckel(int,double *,double *,double *,double *,double *,
 			double *,double *,double *,double *,double *,double *,
 			double *,double *,double *,double *,double *,double *,
 			double *,double *,double *,double *,double *,double *,
-			double *,double,double *,double *,double *,double *,
-			double *,double *,double *,double *,double *,int,
-			struct potentialArg *,int);
+			double *,int,double *,double *,double *,double *,
+			double *,double *,double *,double *,double *,double *,
+			int,struct potentialArg *,int);
 void calcFreqsFromDerivsStaeckel(int,double *,double *,double *,
 				 double *,double *,double *,
 				 double *,double *,double *,double *);
 void calcdI3dJFromDerivsStaeckel(int,double *,double *,double *,double *,
 				 double *,double *,double *,double *);
 void calcJRStaeckel(int,double *,double *,double *,double *,double *,double *,
-		    double,double *,double *,double *,double *,double *,int,
-		    struct potentialArg *,int);
-void calcJzStaeckel(int,double *,double *,double *,double *,double *,double,
-		    double *,double *,double *,double *,int,
+		    int,double *,double *,double *,double *,double *,double *,
+		    int,struct potentialArg *,int);
+void calcJzStaeckel(int,double *,double *,double *,double *,double *,int,
+		    double *,double *,double *,double *,double *,int,
 		    struct potentialArg *,int);
 void calcdJRStaeckel(int,double *,double *,double *,double *,double *,
 		    double *,double *,double *,
-		    double,double *,double *,double *,double *,double *,int,
-		    struct potentialArg *,int);
+		    int,double *,double *,double *,double *,double *,double *,
+		    int,struct potentialArg *,int);
 void calcdJzStaeckel(int,double *,double *,double *,double *,double *,
-		     double *,double *,double,double *,double *,double *,
+		     double *,double *,int,double *,double *,double *,double *,
 		     double *,int,
 		     struct potentialArg *,int);
 void calcUminUmax(int,double *,double *,double *,double *,double *,double *,
-		  double *,double,double *,double *,double *,double *,double *,
-		  int,struct potentialArg *);
-void calcVmin(int,double *,double *,double *,double *,double *,double *,double,
-	      double *,double *,double *,double *,int,struct potentialArg *);
+		  double *,int,double *,double *,double *,double *,double *,
+		  double *,int,struct potentialArg *);
+void calcVmin(int,double *,double *,double *,double *,double *,double *,int,
+	      double *,double *,double *,double *,double *,int,
+	      struct potentialArg *);
 double JRStaeckelIntegrandSquared(double,void *);
 double JRStaeckelIntegrand(double,void *);
 double JzStaeckelIntegrandSquared(double,void *);
 double JzStaeckelIntegrand(double,void *);
+double JzStaeckelIntegrandSquared4dJz(double,void *);
 double dJRdEStaeckelIntegrand(double,void *);
 double dJRdELowStaeckelIntegrand(double,void *);
 double dJRdEHighStaeckelIntegrand(double,void *);
@@ -168,14 +179,16 @@ inline void Rz_to_uv_vec(int ndata,
 			 double *z,
 			 double *u,
 			 double *v,
-			 double delta){
+			 int ndelta,
+			 double *delta){
   int ii;
+  int delta_stride= ndelta == 1 ? 0 : 1;
   double d12, d22, coshu, cosv;
   for (ii=0; ii < ndata; ii++) {
-    d12= (*(z+ii)+delta)*(*(z+ii)+delta)+(*(R+ii))*(*(R+ii));
-    d22= (*(z+ii)-delta)*(*(z+ii)-delta)+(*(R+ii))*(*(R+ii));
-    coshu= 0.5/delta*(sqrt(d12)+sqrt(d22));
-    cosv=  0.5/delta*(sqrt(d12)-sqrt(d22));
+    d12= (*(z+ii)+*(delta+ii*delta_stride))*(*(z+ii)+*(delta+ii*delta_stride))+(*(R+ii))*(*(R+ii));
+    d22= (*(z+ii)-*(delta+ii*delta_stride))*(*(z+ii)-*(delta+ii*delta_stride))+(*(R+ii))*(*(R+ii));
+    coshu= 0.5 / *(delta+ii*delta_stride) *(sqrt(d12)+sqrt(d22));
+    cosv=  0.5 / *(delta+ii*delta_stride) *(sqrt(d12)-sqrt(d22));
     *u++= acosh(coshu);
     *v++= acos(cosv);
   }
@@ -211,17 +224,18 @@ void calcu0(int ndata,
 	    int npot,
 	    int * pot_type,
 	    double * pot_args,
-	    double delta,
+	    int ndelta,
+	    double *delta,
 	    double *u0,
 	    int * err){
   int ii;
+  int delta_stride= ndelta == 1 ? 0 : 1;
   //Set up the potentials
   struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
   parse_actionAngleArgs(npot,actionAngleArgs,pot_type,pot_args,false);
   //setup the function to be minimized
   gsl_function u0Eq;
   struct u0EqArg * params= (struct u0EqArg *) malloc ( sizeof (struct u0EqArg) );
-  params->delta= delta;
   params->nargs= npot;
   params->actionAngleArgs= actionAngleArgs;
   //Setup solver
@@ -236,7 +250,8 @@ void calcu0(int ndata,
   for (ii=0; ii < ndata; ii++){
     //Setup function
     params->E= *(E+ii);
-    params->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta;
+    params->delta= *(delta+ii*delta_stride);
+    params->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride);
     u0Eq.params = params;
     //Find starting points for minimum
     u_guess= 1.;
@@ -281,11 +296,13 @@ void actionAngleStaeckel_actions(int ndata,
 				 int npot,
 				 int * pot_type,
 				 double * pot_args,
-				 double delta,
+				 int ndelta,
+				 double *delta,
 				 double *jr,
 				 double *jz,
 				 int * err){
   int ii;
+  int delta_stride= ndelta == 1 ? 0 : 1;
   //Set up the potentials
   struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
   parse_actionAngleArgs(npot,actionAngleArgs,pot_type,pot_args,false);
@@ -296,7 +313,7 @@ void actionAngleStaeckel_actions(int ndata,
   //Calculate all necessary parameters
   double *ux= (double *) malloc ( ndata * sizeof(double) );
   double *vx= (double *) malloc ( ndata * sizeof(double) );
-  Rz_to_uv_vec(ndata,R,z,ux,vx,delta);
+  Rz_to_uv_vec(ndata,R,z,ux,vx,ndelta,delta);
   double *coshux= (double *) malloc ( ndata * sizeof(double) );
   double *sinhux= (double *) malloc ( ndata * sizeof(double) );
   double *sinvx= (double *) malloc ( ndata * sizeof(double) );
@@ -311,52 +328,52 @@ void actionAngleStaeckel_actions(int ndata,
   double *potupi2= (double *) malloc ( ndata * sizeof(double) );
   double *I3U= (double *) malloc ( ndata * sizeof(double) );
   double *I3V= (double *) malloc ( ndata * sizeof(double) );
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk) private(ii)
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii)
   for (ii=0; ii < ndata; ii++){
     *(coshux+ii)= cosh(*(ux+ii));
     *(sinhux+ii)= sinh(*(ux+ii));
     *(cosvx+ii)= cos(*(vx+ii));
     *(sinvx+ii)= sin(*(vx+ii));
-    *(pux+ii)= delta * (*(vR+ii) * *(coshux+ii) * *(sinvx+ii) 
+    *(pux+ii)= *(delta+ii*delta_stride) * (*(vR+ii) * *(coshux+ii) * *(sinvx+ii) 
 			+ *(vz+ii) * *(sinhux+ii) * *(cosvx+ii));
-    *(pvx+ii)= delta * (*(vR+ii) * *(sinhux+ii) * *(cosvx+ii) 
+    *(pvx+ii)= *(delta+ii*delta_stride) * (*(vR+ii) * *(sinhux+ii) * *(cosvx+ii) 
 			- *(vz+ii) * *(coshux+ii) * *(sinvx+ii));
     *(sinh2u0+ii)= sinh(*(u0+ii)) * sinh(*(u0+ii));
     *(cosh2u0+ii)= cosh(*(u0+ii)) * cosh(*(u0+ii));
     *(v0+ii)= 0.5 * M_PI; //*(vx+ii);
     *(sin2v0+ii)= sin(*(v0+ii)) * sin(*(v0+ii));
-    *(potu0v0+ii)= evaluatePotentialsUV(*(u0+ii),*(v0+ii),delta,
+    *(potu0v0+ii)= evaluatePotentialsUV(*(u0+ii),*(v0+ii),*(delta+ii*delta_stride),
 					npot,actionAngleArgs);
     *(I3U+ii)= *(E+ii) * *(sinhux+ii) * *(sinhux+ii)
-      - 0.5 * *(pux+ii) * *(pux+ii) / delta / delta
-      - 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta / *(sinhux+ii) / *(sinhux+ii) 
+      - 0.5 * *(pux+ii) * *(pux+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride)
+      - 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride) / *(sinhux+ii) / *(sinhux+ii) 
       - ( *(sinhux+ii) * *(sinhux+ii) + *(sin2v0+ii))
-      *evaluatePotentialsUV(*(ux+ii),*(v0+ii),delta,
+      *evaluatePotentialsUV(*(ux+ii),*(v0+ii),*(delta+ii*delta_stride),
 			    npot,actionAngleArgs)
       + ( *(sinh2u0+ii) + *(sin2v0+ii) )* *(potu0v0+ii);
-    *(potupi2+ii)= evaluatePotentialsUV(*(u0+ii),0.5 * M_PI,delta,
+    *(potupi2+ii)= evaluatePotentialsUV(*(u0+ii),0.5 * M_PI,*(delta+ii*delta_stride),
 					npot,actionAngleArgs);
     *(I3V+ii)= - *(E+ii) * *(sinvx+ii) * *(sinvx+ii)
-      + 0.5 * *(pvx+ii) * *(pvx+ii) / delta / delta
-      + 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta / *(sinvx+ii) / *(sinvx+ii)
+      + 0.5 * *(pvx+ii) * *(pvx+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride)
+      + 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride) / *(sinvx+ii) / *(sinvx+ii)
       - *(cosh2u0+ii) * *(potupi2+ii)
       + ( *(sinh2u0+ii) + *(sinvx+ii) * *(sinvx+ii))
-      * evaluatePotentialsUV(*(u0+ii),*(vx+ii),delta,
+      * evaluatePotentialsUV(*(u0+ii),*(vx+ii),*(delta+ii*delta_stride),
 			     npot,actionAngleArgs);
   }
   //Calculate 'peri' and 'apo'centers
   double *umin= (double *) malloc ( ndata * sizeof(double) );
   double *umax= (double *) malloc ( ndata * sizeof(double) );
   double *vmin= (double *) malloc ( ndata * sizeof(double) );
-  calcUminUmax(ndata,umin,umax,ux,pux,E,Lz,I3U,delta,u0,sinh2u0,v0,sin2v0,
+  calcUminUmax(ndata,umin,umax,ux,pux,E,Lz,I3U,ndelta,delta,u0,sinh2u0,v0,sin2v0,
 	       potu0v0,npot,actionAngleArgs);
-  calcVmin(ndata,vmin,vx,pvx,E,Lz,I3V,delta,u0,cosh2u0,sinh2u0,potupi2,
+  calcVmin(ndata,vmin,vx,pvx,E,Lz,I3V,ndelta,delta,u0,cosh2u0,sinh2u0,potupi2,
 	   npot,actionAngleArgs);
   //Calculate the actions
-  calcJRStaeckel(ndata,jr,umin,umax,E,Lz,I3U,delta,u0,sinh2u0,v0,sin2v0,
+  calcJRStaeckel(ndata,jr,umin,umax,E,Lz,I3U,ndelta,delta,u0,sinh2u0,v0,sin2v0,
 		 potu0v0,npot,actionAngleArgs,10);
-  calcJzStaeckel(ndata,jz,vmin,E,Lz,I3V,delta,u0,cosh2u0,sinh2u0,potupi2,
+  calcJzStaeckel(ndata,jz,vmin,E,Lz,I3V,ndelta,delta,u0,cosh2u0,sinh2u0,potupi2,
 		 npot,actionAngleArgs,10);
   //Free
   free_potentialArgs(npot,actionAngleArgs);
@@ -390,7 +407,8 @@ void calcJRStaeckel(int ndata,
 		    double * E,
 		    double * Lz,
 		    double * I3U,
-		    double delta,
+		    int ndelta,
+		    double *delta,
 		    double * u0,
 		    double * sinh2u0,
 		    double * v0,
@@ -400,6 +418,7 @@ void calcJRStaeckel(int ndata,
 		    struct potentialArg * actionAngleArgs,
 		    int order){
   int ii, tid, nthreads;
+  int delta_stride= ndelta == 1 ? 0 : 1;
 #ifdef _OPENMP
   nthreads = omp_get_max_threads();
 #else
@@ -408,14 +427,13 @@ void calcJRStaeckel(int ndata,
   gsl_function * JRInt= (gsl_function *) malloc ( nthreads * sizeof(gsl_function) );
   struct JRStaeckelArg * params= (struct JRStaeckelArg *) malloc ( nthreads * sizeof (struct JRStaeckelArg) );
   for (tid=0; tid < nthreads; tid++){
-    (params+tid)->delta= delta;
     (params+tid)->nargs= nargs;
     (params+tid)->actionAngleArgs= actionAngleArgs;
   }
   //Setup integrator
   gsl_integration_glfixed_table * T= gsl_integration_glfixed_table_alloc (order);
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk)				\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)				\
   private(tid,ii)							\
   shared(jr,umin,umax,JRInt,params,T,delta,E,Lz,I3U,u0,sinh2u0,v0,sin2v0,potu0v0)
   for (ii=0; ii < ndata; ii++){
@@ -434,7 +452,8 @@ void calcJRStaeckel(int ndata,
     }
     //Setup function
     (params+tid)->E= *(E+ii);
-    (params+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta;
+    (params+tid)->delta= *(delta+ii*delta_stride);
+    (params+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride);
     (params+tid)->I3U= *(I3U+ii);
     (params+tid)->u0= *(u0+ii);
     (params+tid)->sinh2u0= *(sinh2u0+ii);
@@ -445,7 +464,7 @@ void calcJRStaeckel(int ndata,
     (JRInt+tid)->params = params+tid;
     //Integrate
     *(jr+ii)= gsl_integration_glfixed (JRInt+tid,*(umin+ii),*(umax+ii),T)
-      * sqrt(2.) * delta / M_PI;
+      * sqrt(2.) * *(delta+ii*delta_stride) / M_PI;
   }
   free(JRInt);
   free(params);
@@ -457,7 +476,8 @@ void calcJzStaeckel(int ndata,
 		    double * E,
 		    double * Lz,
 		    double * I3V,
-		    double delta,
+		    int ndelta,
+		    double *delta,
 		    double * u0,
 		    double * cosh2u0,
 		    double * sinh2u0,
@@ -466,6 +486,7 @@ void calcJzStaeckel(int ndata,
 		    struct potentialArg * actionAngleArgs,
 		    int order){
   int ii, tid, nthreads;
+  int delta_stride= ndelta == 1 ? 0 : 1;
 #ifdef _OPENMP
   nthreads = omp_get_max_threads();
 #else
@@ -474,14 +495,13 @@ void calcJzStaeckel(int ndata,
   gsl_function * JzInt= (gsl_function *) malloc ( nthreads * sizeof(gsl_function) );
   struct JzStaeckelArg * params= (struct JzStaeckelArg *) malloc ( nthreads * sizeof (struct JzStaeckelArg) );
   for (tid=0; tid < nthreads; tid++){
-    (params+tid)->delta= delta;
     (params+tid)->nargs= nargs;
     (params+tid)->actionAngleArgs= actionAngleArgs;
   }
   //Setup integrator
   gsl_integration_glfixed_table * T= gsl_integration_glfixed_table_alloc (order);
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk)				\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)				\
   private(tid,ii)							\
   shared(jz,vmin,JzInt,params,T,delta,E,Lz,I3V,u0,cosh2u0,sinh2u0,potupi2)
   for (ii=0; ii < ndata; ii++){
@@ -500,7 +520,8 @@ void calcJzStaeckel(int ndata,
     }
     //Setup function
     (params+tid)->E= *(E+ii);
-    (params+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta;
+    (params+tid)->delta= *(delta+ii*delta_stride);
+    (params+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride);
     (params+tid)->I3V= *(I3V+ii);
     (params+tid)->u0= *(u0+ii);
     (params+tid)->cosh2u0= *(cosh2u0+ii);
@@ -510,7 +531,7 @@ void calcJzStaeckel(int ndata,
     (JzInt+tid)->params = params+tid;
     //Integrate
     *(jz+ii)= gsl_integration_glfixed (JzInt+tid,*(vmin+ii),M_PI/2.,T)
-      * 2 * sqrt(2.) * delta / M_PI;
+      * 2 * sqrt(2.) * *(delta+ii*delta_stride) / M_PI;
   }
   free(JzInt);
   free(params);
@@ -526,7 +547,8 @@ void actionAngleStaeckel_actionsFreqs(int ndata,
 				      int npot,
 				      int * pot_type,
 				      double * pot_args,
-				      double delta,
+				      int ndelta,
+				      double *delta,
 				      double *jr,
 				      double *jz,
 				      double *Omegar,
@@ -534,6 +556,7 @@ void actionAngleStaeckel_actionsFreqs(int ndata,
 				      double *Omegaz,
 				      int * err){
   int ii;
+  int delta_stride= ndelta == 1 ? 0 : 1;
   //Set up the potentials
   struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
   parse_actionAngleArgs(npot,actionAngleArgs,pot_type,pot_args,false);
@@ -544,7 +567,7 @@ void actionAngleStaeckel_actionsFreqs(int ndata,
   //Calculate all necessary parameters
   double *ux= (double *) malloc ( ndata * sizeof(double) );
   double *vx= (double *) malloc ( ndata * sizeof(double) );
-  Rz_to_uv_vec(ndata,R,z,ux,vx,delta);
+  Rz_to_uv_vec(ndata,R,z,ux,vx,ndelta,delta);
   double *coshux= (double *) malloc ( ndata * sizeof(double) );
   double *sinhux= (double *) malloc ( ndata * sizeof(double) );
   double *sinvx= (double *) malloc ( ndata * sizeof(double) );
@@ -559,52 +582,52 @@ void actionAngleStaeckel_actionsFreqs(int ndata,
   double *potupi2= (double *) malloc ( ndata * sizeof(double) );
   double *I3U= (double *) malloc ( ndata * sizeof(double) );
   double *I3V= (double *) malloc ( ndata * sizeof(double) );
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk) private(ii)
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii)
   for (ii=0; ii < ndata; ii++){
     *(coshux+ii)= cosh(*(ux+ii));
     *(sinhux+ii)= sinh(*(ux+ii));
     *(cosvx+ii)= cos(*(vx+ii));
     *(sinvx+ii)= sin(*(vx+ii));
-    *(pux+ii)= delta * (*(vR+ii) * *(coshux+ii) * *(sinvx+ii) 
+    *(pux+ii)= *(delta+ii*delta_stride) * (*(vR+ii) * *(coshux+ii) * *(sinvx+ii) 
 			+ *(vz+ii) * *(sinhux+ii) * *(cosvx+ii));
-    *(pvx+ii)= delta * (*(vR+ii) * *(sinhux+ii) * *(cosvx+ii) 
+    *(pvx+ii)= *(delta+ii*delta_stride) * (*(vR+ii) * *(sinhux+ii) * *(cosvx+ii) 
 			- *(vz+ii) * *(coshux+ii) * *(sinvx+ii));
     *(sinh2u0+ii)= sinh(*(u0+ii)) * sinh(*(u0+ii));
     *(cosh2u0+ii)= cosh(*(u0+ii)) * cosh(*(u0+ii));
     *(v0+ii)= 0.5 * M_PI; //*(vx+ii);
     *(sin2v0+ii)= sin(*(v0+ii)) * sin(*(v0+ii));
-    *(potu0v0+ii)= evaluatePotentialsUV(*(u0+ii),*(v0+ii),delta,
+    *(potu0v0+ii)= evaluatePotentialsUV(*(u0+ii),*(v0+ii),*(delta+ii*delta_stride),
 					npot,actionAngleArgs);
     *(I3U+ii)= *(E+ii) * *(sinhux+ii) * *(sinhux+ii)
-      - 0.5 * *(pux+ii) * *(pux+ii) / delta / delta
-      - 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta / *(sinhux+ii) / *(sinhux+ii) 
+      - 0.5 * *(pux+ii) * *(pux+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride)
+      - 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride) / *(sinhux+ii) / *(sinhux+ii) 
       - ( *(sinhux+ii) * *(sinhux+ii) + *(sin2v0+ii))
-      *evaluatePotentialsUV(*(ux+ii),*(v0+ii),delta,
+      *evaluatePotentialsUV(*(ux+ii),*(v0+ii),*(delta+ii*delta_stride),
 			    npot,actionAngleArgs)
       + ( *(sinh2u0+ii) + *(sin2v0+ii) )* *(potu0v0+ii);
-    *(potupi2+ii)= evaluatePotentialsUV(*(u0+ii),0.5 * M_PI,delta,
+    *(potupi2+ii)= evaluatePotentialsUV(*(u0+ii),0.5 * M_PI,*(delta+ii*delta_stride),
 					npot,actionAngleArgs);
     *(I3V+ii)= - *(E+ii) * *(sinvx+ii) * *(sinvx+ii)
-      + 0.5 * *(pvx+ii) * *(pvx+ii) / delta / delta
-      + 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta / *(sinvx+ii) / *(sinvx+ii)
+      + 0.5 * *(pvx+ii) * *(pvx+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride)
+      + 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride) / *(sinvx+ii) / *(sinvx+ii)
       - *(cosh2u0+ii) * *(potupi2+ii)
       + ( *(sinh2u0+ii) + *(sinvx+ii) * *(sinvx+ii))
-      * evaluatePotentialsUV(*(u0+ii),*(vx+ii),delta,
+      * evaluatePotentialsUV(*(u0+ii),*(vx+ii),*(delta+ii*delta_stride),
 			     npot,actionAngleArgs);
   }
   //Calculate 'peri' and 'apo'centers
   double *umin= (double *) malloc ( ndata * sizeof(double) );
   double *umax= (double *) malloc ( ndata * sizeof(double) );
   double *vmin= (double *) malloc ( ndata * sizeof(double) );
-  calcUminUmax(ndata,umin,umax,ux,pux,E,Lz,I3U,delta,u0,sinh2u0,v0,sin2v0,
+  calcUminUmax(ndata,umin,umax,ux,pux,E,Lz,I3U,ndelta,delta,u0,sinh2u0,v0,sin2v0,
 	       potu0v0,npot,actionAngleArgs);
-  calcVmin(ndata,vmin,vx,pvx,E,Lz,I3V,delta,u0,cosh2u0,sinh2u0,potupi2,
+  calcVmin(ndata,vmin,vx,pvx,E,Lz,I3V,ndelta,delta,u0,cosh2u0,sinh2u0,potupi2,
 	   npot,actionAngleArgs);
   //Calculate the actions
-  calcJRStaeckel(ndata,jr,umin,umax,E,Lz,I3U,delta,u0,sinh2u0,v0,sin2v0,
+  calcJRStaeckel(ndata,jr,umin,umax,E,Lz,I3U,ndelta,delta,u0,sinh2u0,v0,sin2v0,
 		 potu0v0,npot,actionAngleArgs,10);
-  calcJzStaeckel(ndata,jz,vmin,E,Lz,I3V,delta,u0,cosh2u0,sinh2u0,potupi2,
+  calcJzStaeckel(ndata,jz,vmin,E,Lz,I3V,ndelta,delta,u0,cosh2u0,sinh2u0,potupi2,
 		 npot,actionAngleArgs,10);
   //Calculate the derivatives of the actions wrt the integrals of motion
   double *dJRdE= (double *) malloc ( ndata * sizeof(double) );
@@ -615,10 +638,10 @@ void actionAngleStaeckel_actionsFreqs(int ndata,
   double *dJzdI3= (double *) malloc ( ndata * sizeof(double) );
   double *detA= (double *) malloc ( ndata * sizeof(double) );
   calcdJRStaeckel(ndata,dJRdE,dJRdLz,dJRdI3,
-		  umin,umax,E,Lz,I3U,delta,u0,sinh2u0,v0,sin2v0,
+		  umin,umax,E,Lz,I3U,ndelta,delta,u0,sinh2u0,v0,sin2v0,
 		  potu0v0,npot,actionAngleArgs,10);
   calcdJzStaeckel(ndata,dJzdE,dJzdLz,dJzdI3,
-		  vmin,E,Lz,I3V,delta,u0,cosh2u0,sinh2u0,
+		  vmin,E,Lz,I3V,ndelta,delta,u0,cosh2u0,sinh2u0,
 		  potupi2,npot,actionAngleArgs,10);
   calcFreqsFromDerivsStaeckel(ndata,Omegar,Omegaphi,Omegaz,detA,
 			      dJRdE,dJRdLz,dJRdI3,
@@ -665,7 +688,8 @@ void actionAngleStaeckel_actionsFreqsAngles(int ndata,
 					    int npot,
 					    int * pot_type,
 					    double * pot_args,
-					    double delta,
+					    int ndelta,
+					    double *delta,
 					    double *jr,
 					    double *jz,
 					    double *Omegar,
@@ -676,6 +700,7 @@ void actionAngleStaeckel_actionsFreqsAngles(int ndata,
 					    double *Anglez,
 					    int * err){
   int ii;
+  int delta_stride= ndelta == 1 ? 0 : 1;
   //Set up the potentials
   struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
   parse_actionAngleArgs(npot,actionAngleArgs,pot_type,pot_args,false);
@@ -686,7 +711,7 @@ void actionAngleStaeckel_actionsFreqsAngles(int ndata,
   //Calculate all necessary parameters
   double *ux= (double *) malloc ( ndata * sizeof(double) );
   double *vx= (double *) malloc ( ndata * sizeof(double) );
-  Rz_to_uv_vec(ndata,R,z,ux,vx,delta);
+  Rz_to_uv_vec(ndata,R,z,ux,vx,ndelta,delta);
   double *coshux= (double *) malloc ( ndata * sizeof(double) );
   double *sinhux= (double *) malloc ( ndata * sizeof(double) );
   double *sinvx= (double *) malloc ( ndata * sizeof(double) );
@@ -701,52 +726,52 @@ void actionAngleStaeckel_actionsFreqsAngles(int ndata,
   double *potupi2= (double *) malloc ( ndata * sizeof(double) );
   double *I3U= (double *) malloc ( ndata * sizeof(double) );
   double *I3V= (double *) malloc ( ndata * sizeof(double) );
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk) private(ii)
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii)
   for (ii=0; ii < ndata; ii++){
     *(coshux+ii)= cosh(*(ux+ii));
     *(sinhux+ii)= sinh(*(ux+ii));
     *(cosvx+ii)= cos(*(vx+ii));
     *(sinvx+ii)= sin(*(vx+ii));
-    *(pux+ii)= delta * (*(vR+ii) * *(coshux+ii) * *(sinvx+ii) 
+    *(pux+ii)= *(delta+ii*delta_stride) * (*(vR+ii) * *(coshux+ii) * *(sinvx+ii) 
 			+ *(vz+ii) * *(sinhux+ii) * *(cosvx+ii));
-    *(pvx+ii)= delta * (*(vR+ii) * *(sinhux+ii) * *(cosvx+ii) 
+    *(pvx+ii)= *(delta+ii*delta_stride) * (*(vR+ii) * *(sinhux+ii) * *(cosvx+ii) 
 			- *(vz+ii) * *(coshux+ii) * *(sinvx+ii));
     *(sinh2u0+ii)= sinh(*(u0+ii)) * sinh(*(u0+ii));
     *(cosh2u0+ii)= cosh(*(u0+ii)) * cosh(*(u0+ii));
     *(v0+ii)= 0.5 * M_PI; //*(vx+ii);
     *(sin2v0+ii)= sin(*(v0+ii)) * sin(*(v0+ii));
-    *(potu0v0+ii)= evaluatePotentialsUV(*(u0+ii),*(v0+ii),delta,
+    *(potu0v0+ii)= evaluatePotentialsUV(*(u0+ii),*(v0+ii),*(delta+ii*delta_stride),
 					npot,actionAngleArgs);
     *(I3U+ii)= *(E+ii) * *(sinhux+ii) * *(sinhux+ii)
-      - 0.5 * *(pux+ii) * *(pux+ii) / delta / delta
-      - 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta / *(sinhux+ii) / *(sinhux+ii) 
+      - 0.5 * *(pux+ii) * *(pux+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride)
+      - 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride) / *(sinhux+ii) / *(sinhux+ii) 
       - ( *(sinhux+ii) * *(sinhux+ii) + *(sin2v0+ii))
-      *evaluatePotentialsUV(*(ux+ii),*(v0+ii),delta,
+      *evaluatePotentialsUV(*(ux+ii),*(v0+ii),*(delta+ii*delta_stride),
 			    npot,actionAngleArgs)
       + ( *(sinh2u0+ii) + *(sin2v0+ii) )* *(potu0v0+ii);
-    *(potupi2+ii)= evaluatePotentialsUV(*(u0+ii),0.5 * M_PI,delta,
+    *(potupi2+ii)= evaluatePotentialsUV(*(u0+ii),0.5 * M_PI,*(delta+ii*delta_stride),
 					npot,actionAngleArgs);
     *(I3V+ii)= - *(E+ii) * *(sinvx+ii) * *(sinvx+ii)
-      + 0.5 * *(pvx+ii) * *(pvx+ii) / delta / delta
-      + 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta / *(sinvx+ii) / *(sinvx+ii)
+      + 0.5 * *(pvx+ii) * *(pvx+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride)
+      + 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride) / *(sinvx+ii) / *(sinvx+ii)
       - *(cosh2u0+ii) * *(potupi2+ii)
       + ( *(sinh2u0+ii) + *(sinvx+ii) * *(sinvx+ii))
-      * evaluatePotentialsUV(*(u0+ii),*(vx+ii),delta,
+      * evaluatePotentialsUV(*(u0+ii),*(vx+ii),*(delta+ii*delta_stride),
 			     npot,actionAngleArgs);
   }
   //Calculate 'peri' and 'apo'centers
   double *umin= (double *) malloc ( ndata * sizeof(double) );
   double *umax= (double *) malloc ( ndata * sizeof(double) );
   double *vmin= (double *) malloc ( ndata * sizeof(double) );
-  calcUminUmax(ndata,umin,umax,ux,pux,E,Lz,I3U,delta,u0,sinh2u0,v0,sin2v0,
+  calcUminUmax(ndata,umin,umax,ux,pux,E,Lz,I3U,ndelta,delta,u0,sinh2u0,v0,sin2v0,
 	       potu0v0,npot,actionAngleArgs);
-  calcVmin(ndata,vmin,vx,pvx,E,Lz,I3V,delta,u0,cosh2u0,sinh2u0,potupi2,
+  calcVmin(ndata,vmin,vx,pvx,E,Lz,I3V,ndelta,delta,u0,cosh2u0,sinh2u0,potupi2,
 	   npot,actionAngleArgs);
   //Calculate the actions
-  calcJRStaeckel(ndata,jr,umin,umax,E,Lz,I3U,delta,u0,sinh2u0,v0,sin2v0,
+  calcJRStaeckel(ndata,jr,umin,umax,E,Lz,I3U,ndelta,delta,u0,sinh2u0,v0,sin2v0,
 		 potu0v0,npot,actionAngleArgs,10);
-  calcJzStaeckel(ndata,jz,vmin,E,Lz,I3V,delta,u0,cosh2u0,sinh2u0,potupi2,
+  calcJzStaeckel(ndata,jz,vmin,E,Lz,I3V,ndelta,delta,u0,cosh2u0,sinh2u0,potupi2,
 		 npot,actionAngleArgs,10);
   //Calculate the derivatives of the actions wrt the integrals of motion
   double *dJRdE= (double *) malloc ( ndata * sizeof(double) );
@@ -757,10 +782,10 @@ void actionAngleStaeckel_actionsFreqsAngles(int ndata,
   double *dJzdI3= (double *) malloc ( ndata * sizeof(double) );
   double *detA= (double *) malloc ( ndata * sizeof(double) );
   calcdJRStaeckel(ndata,dJRdE,dJRdLz,dJRdI3,
-		  umin,umax,E,Lz,I3U,delta,u0,sinh2u0,v0,sin2v0,
+		  umin,umax,E,Lz,I3U,ndelta,delta,u0,sinh2u0,v0,sin2v0,
 		  potu0v0,npot,actionAngleArgs,10);
   calcdJzStaeckel(ndata,dJzdE,dJzdLz,dJzdI3,
-		  vmin,E,Lz,I3V,delta,u0,cosh2u0,sinh2u0,
+		  vmin,E,Lz,I3V,ndelta,delta,u0,cosh2u0,sinh2u0,
 		  potupi2,npot,actionAngleArgs,10);
   calcFreqsFromDerivsStaeckel(ndata,Omegar,Omegaphi,Omegaz,detA,
 			      dJRdE,dJRdLz,dJRdI3,
@@ -775,7 +800,7 @@ void actionAngleStaeckel_actionsFreqsAngles(int ndata,
 		     dJRdE,dJRdLz,dJRdI3,
 		     dJzdE,dJzdLz,dJzdI3,
 		     ux,vx,pux,pvx,
-		     umin,umax,E,Lz,I3U,delta,u0,sinh2u0,v0,sin2v0,
+		     umin,umax,E,Lz,I3U,ndelta,delta,u0,sinh2u0,v0,sin2v0,
 		     potu0v0,
 		     vmin,I3V,cosh2u0,potupi2,
 		     npot,actionAngleArgs,10);
@@ -813,6 +838,312 @@ void actionAngleStaeckel_actionsFreqsAngles(int ndata,
   free(dI3dJR);
   free(dI3dJz);
 }
+/*
+  Inverse transformation (J,angle) --> (x,v): Newton iterations on the
+  Staeckel actions and angles, seeded with the epicycle approximation. The
+  equations are solved for (sqrt(2J) cos(angle),sqrt(2J) sin(angle)) of the
+  radial and vertical degrees of freedom, which is regular for J --> 0 and
+  does not require angles to be wrapped; in-plane orbits (jz=0) have z=vz=0
+  and are solved for (R,vR) only
+*/
+static inline void actionAngleStaeckel_xvTarget(double jr,double jz,
+						double angler,double anglez,
+						double * Y){
+  if ( angler == 9999.99 || anglez == 9999.99 ) {
+    Y[0]= NAN;
+    Y[1]= NAN;
+    Y[2]= NAN;
+    Y[3]= NAN;
+    return;
+  }
+  Y[0]= sqrt(2. * jr) * cos(angler);
+  Y[1]= sqrt(2. * jr) * sin(angler);
+  Y[2]= sqrt(2. * jz) * cos(anglez);
+  Y[3]= sqrt(2. * jz) * sin(anglez);
+}
+void actionAngleStaeckel_xvFreqs(int ndata,
+				 double *jr,
+				 double *jphi,
+				 double *jz,
+				 double *angler,
+				 double *anglephi,
+				 double *anglez,
+				 int npot,
+				 int * pot_type,
+				 double * pot_args,
+				 int ndelta,
+				 double *delta,
+				 int useu0,
+				 int maxiter,
+				 double tol,
+				 double *R,
+				 double *vR,
+				 double *vT,
+				 double *z,
+				 double *vz,
+				 double *phi,
+				 double *Omegar,
+				 double *Omegaphi,
+				 double *Omegaz,
+				 int * niter,
+				 int * err){
+  int ii, jj, kk, ll, pp, nact, iter, signum, cerr, ndim, max_threads, tid;
+  int delta_stride= ndelta == 1 ? 0 : 1;
+  double Rg, kappa2, nu2, X, Z, dR, dz, res, stepx, Y[20], f[4];
+  gsl_matrix * Jm= gsl_matrix_alloc(4,4);
+  gsl_vector * fv= gsl_vector_alloc(4);
+  gsl_vector * dxv= gsl_vector_alloc(4);
+  gsl_permutation * perm= gsl_permutation_alloc(4);
+  //Same for in-plane orbits, solved for (R,vR) only
+  gsl_matrix * Jm2= gsl_matrix_alloc(2,2);
+  gsl_vector * fv2= gsl_vector_alloc(2);
+  gsl_vector * dxv2= gsl_vector_alloc(2);
+  gsl_permutation * perm2= gsl_permutation_alloc(2);
+  gsl_matrix * Jmi;
+  gsl_vector * fvi, * dxvi;
+  gsl_permutation * permi;
+  struct potentialArg * thisArgs;
+#ifdef _OPENMP
+  max_threads= omp_get_max_threads();
+#else
+  max_threads= 1;
+#endif
+  //Set up the potentials; potentialArgs may cache intermediate results, so
+  //one copy / thread for the parallel seeding loop
+  struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+  for (ii=0; ii < max_threads; ii++)
+    parse_actionAngleArgs(npot,actionAngleArgs+ii*npot,pot_type,pot_args,
+			  false);
+  // Newton state: current (R,vR,z,vz), last accepted point and step
+  double *x= (double *) malloc ( 12 * ndata * sizeof(double) );
+  double *xprev= x + 4 * ndata;
+  double *dx= x + 8 * ndata;
+  double *resprev= (double *) malloc ( 2 * ndata * sizeof(double) );
+  double *step= resprev + ndata;
+  int *active= (int *) malloc ( ndata * sizeof(int) );
+  // Work arrays for evaluating each point and its four offsets at once
+  double *Rb= (double *) malloc ( 5 * ndata * 16 * sizeof(double) );
+  double *vRb= Rb + 5 * ndata;
+  double *vTb= Rb + 10 * ndata;
+  double *zb= Rb + 15 * ndata;
+  double *vzb= Rb + 20 * ndata;
+  double *u0b= Rb + 25 * ndata;
+  double *vb= Rb + 30 * ndata;
+  double *deltab= Rb + 35 * ndata;
+  double *jrb= Rb + 40 * ndata;
+  double *jzb= Rb + 45 * ndata;
+  double *Omegarb= Rb + 50 * ndata;
+  double *Omegaphib= Rb + 55 * ndata;
+  double *Omegazb= Rb + 60 * ndata;
+  double *anglerb= Rb + 65 * ndata;
+  double *anglephib= Rb + 70 * ndata;
+  double *anglezb= Rb + 75 * ndata;
+  double *hb= (double *) malloc ( 4 * ndata * sizeof(double) );
+  //Seed with the epicycle approximation around the guiding-center radius
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) \
+  private(ii,tid,thisArgs,Rg,dR,dz,kappa2,nu2,X,Z) num_threads(max_threads)
+  for (ii=0; ii < ndata; ii++){
+#ifdef _OPENMP
+    tid= omp_get_thread_num();
+#else
+    tid= 0;
+#endif
+    thisArgs= actionAngleArgs+tid*npot;
+    Rg= calcRgStaeckel(*(jphi+ii),npot,thisArgs);
+    dR= 1e-4 * Rg;
+    dz= 1e-4 * Rg;
+    kappa2= - ( calcRforce(Rg+dR,0.,0.,0.,npot,thisArgs)
+		- calcRforce(Rg-dR,0.,0.,0.,npot,thisArgs) ) / 2. / dR
+      - 3. * calcRforce(Rg,0.,0.,0.,npot,thisArgs) / Rg;
+    nu2= - ( calczforce(Rg,dz,0.,0.,npot,thisArgs)
+	     - calczforce(Rg,-dz,0.,0.,npot,thisArgs) ) / 2. / dz;
+    if ( kappa2 <= 0. )
+      kappa2= - calcRforce(Rg,0.,0.,0.,npot,thisArgs) / Rg;
+    if ( nu2 <= 0. ) nu2= kappa2;
+    X= sqrt( 2. * *(jr+ii) / sqrt(kappa2) );
+    Z= sqrt( 2. * *(jz+ii) / sqrt(nu2) );
+    *(x+4*ii)= Rg - X * cos(*(angler+ii));
+    if ( *(x+4*ii) <= 0. ) *(x+4*ii)= 0.5 * Rg;
+    *(x+4*ii+1)= sqrt(kappa2) * X * sin(*(angler+ii));
+    *(x+4*ii+2)= Z * sin(*(anglez+ii));
+    *(x+4*ii+3)= sqrt(nu2) * Z * cos(*(anglez+ii));
+    *(R+ii)= NAN;
+    *(vR+ii)= NAN;
+    *(vT+ii)= NAN;
+    *(z+ii)= NAN;
+    *(vz+ii)= NAN;
+    *(phi+ii)= NAN;
+    *(Omegar+ii)= NAN;
+    *(Omegaphi+ii)= NAN;
+    *(Omegaz+ii)= NAN;
+    *(resprev+ii)= INFINITY;
+    *(step+ii)= 1.;
+    *(niter+ii)= 0;
+    *(err+ii)= 1;
+    if ( *(jr+ii) == 0. && *(jz+ii) == 0. ) {
+      //Circular orbit, for which the angles are undefined
+      *(R+ii)= Rg;
+      *(vR+ii)= 0.;
+      *(vT+ii)= *(jphi+ii) / Rg;
+      *(z+ii)= 0.;
+      *(vz+ii)= 0.;
+      *(phi+ii)= fmod(*(anglephi+ii),2. * M_PI);
+      if ( *(phi+ii) < 0. ) *(phi+ii)+= 2. * M_PI;
+      *(err+ii)= 0;
+    }
+  }
+  nact= 0;
+  for (ii=0; ii < ndata; ii++)
+    if ( *(err+ii) ) *(active+nact++)= ii;
+  for (iter=0; iter <= maxiter && nact > 0; iter++){
+    //Set up each active point and its offsets in R, vR, z, and vz
+    for (jj=0; jj < nact; jj++){
+      ii= *(active+jj);
+      for (kk=0; kk < 4; kk++)
+	*(hb+4*jj+kk)= 1e-6 * ( fabs(*(x+4*ii+kk)) > 0.1 ? fabs(*(x+4*ii+kk))
+				: 0.1 );
+      for (pp=0; pp < 5; pp++){
+	*(Rb+5*jj+pp)= *(x+4*ii);
+	*(vRb+5*jj+pp)= *(x+4*ii+1);
+	*(zb+5*jj+pp)= *(x+4*ii+2);
+	*(vzb+5*jj+pp)= *(x+4*ii+3);
+	*(deltab+5*jj+pp)= *(delta+ii*delta_stride);
+      }
+      *(Rb+5*jj+1)+= *(hb+4*jj);
+      *(vRb+5*jj+2)+= *(hb+4*jj+1);
+      *(zb+5*jj+3)+= *(hb+4*jj+2);
+      *(vzb+5*jj+4)+= *(hb+4*jj+3);
+      for (pp=0; pp < 5; pp++)
+	*(vTb+5*jj+pp)= *(jphi+ii) / *(Rb+5*jj+pp);
+    }
+    if ( useu0 ) {
+      // Use u0b and vb as temporary storage for E and Lz
+      calcEL(5*nact,Rb,vRb,vTb,zb,vzb,jrb,jzb,npot,actionAngleArgs);
+      calcu0(5*nact,jrb,jzb,npot,pot_type,pot_args,5*nact,deltab,u0b,&cerr);
+    }
+    else
+      Rz_to_uv_vec(5*nact,Rb,zb,u0b,vb,5*nact,deltab);
+    actionAngleStaeckel_actionsFreqsAngles(5*nact,Rb,vRb,vTb,zb,vzb,u0b,
+					   npot,pot_type,pot_args,
+					   5*nact,deltab,jrb,jzb,
+					   Omegarb,Omegaphib,Omegazb,
+					   anglerb,anglephib,anglezb,&cerr);
+    //Newton update for each active point
+    kk= 0;
+    for (jj=0; jj < nact; jj++){
+      ii= *(active+jj);
+      ndim= *(jz+ii) == 0. ? 2 : 4;
+      for (pp=0; pp < 5; pp++)
+	actionAngleStaeckel_xvTarget(*(jrb+5*jj+pp),*(jzb+5*jj+pp),
+				     *(anglerb+5*jj+pp),
+				     ndim == 2 ? 0. : *(anglezb+5*jj+pp),
+				     Y+4*pp);
+      actionAngleStaeckel_xvTarget(*(jr+ii),*(jz+ii),
+				   *(angler+ii),*(anglez+ii),f);
+      res= 0.;
+      for (pp=0; pp < ndim; pp++){
+	f[pp]= Y[pp] - f[pp];
+	res+= f[pp] * f[pp];
+      }
+      res= sqrt(res);
+      if ( !( res <= *(resprev+ii) ) ) {
+	//Step made things worse (or left the allowed region): backtrack
+	*(step+ii)*= 0.5;
+	if ( isinf(*(resprev+ii)) || *(step+ii) < 1e-4 || iter == maxiter ) {
+	  *(niter+ii)= iter;
+	  continue; // give up, the previous point is stored
+	}
+	for (pp=0; pp < ndim; pp++)
+	  *(x+4*ii+pp)= *(xprev+4*ii+pp) - *(step+ii) * *(dx+4*ii+pp);
+	*(active+kk++)= ii;
+	continue;
+      }
+      //Store the current point as the best solution so far
+      *(R+ii)= *(x+4*ii);
+      *(vR+ii)= *(x+4*ii+1);
+      *(vT+ii)= *(jphi+ii) / *(x+4*ii);
+      *(z+ii)= *(x+4*ii+2);
+      *(vz+ii)= *(x+4*ii+3);
+      *(Omegar+ii)= *(Omegarb+5*jj);
+      *(Omegaphi+ii)= *(Omegaphib+5*jj);
+      *(Omegaz+ii)= *(Omegazb+5*jj);
+      *(phi+ii)= fmod(*(anglephi+ii) - *(anglephib+5*jj),2. * M_PI);
+      if ( *(phi+ii) < 0. ) *(phi+ii)+= 2. * M_PI;
+      *(niter+ii)= iter;
+      if ( res < tol ) {
+	*(err+ii)= 0;
+	continue;
+      }
+      if ( iter == maxiter ) continue;
+      //Jacobian from finite differences and Newton step
+      Jmi= ndim == 2 ? Jm2 : Jm;
+      fvi= ndim == 2 ? fv2 : fv;
+      dxvi= ndim == 2 ? dxv2 : dxv;
+      permi= ndim == 2 ? perm2 : perm;
+      for (pp=0; pp < ndim; pp++){
+	gsl_vector_set(fvi,pp,f[pp]);
+	for (ll=0; ll < ndim; ll++)
+	  gsl_matrix_set(Jmi,pp,ll,
+			 ( Y[4*(ll+1)+pp] - Y[pp] ) / *(hb+4*jj+ll));
+      }
+      gsl_set_error_handler_off();
+      cerr= gsl_linalg_LU_decomp(Jmi,permi,&signum);
+      cerr|= gsl_linalg_LU_solve(Jmi,permi,fvi,dxvi);
+      gsl_set_error_handler (NULL);
+      for (pp=0; pp < ndim; pp++)
+	*(dx+4*ii+pp)= gsl_vector_get(dxvi,pp);
+      if ( cerr || isnan(*(dx+4*ii)) ) continue;
+      //Don't step to R <= 0
+      stepx= 1.;
+      while ( *(x+4*ii) - stepx * *(dx+4*ii) <= 0. ) stepx*= 0.5;
+      *(resprev+ii)= res;
+      *(step+ii)= stepx;
+      for (pp=0; pp < ndim; pp++){
+	*(xprev+4*ii+pp)= *(x+4*ii+pp);
+	*(x+4*ii+pp)-= stepx * *(dx+4*ii+pp);
+      }
+      *(active+kk++)= ii;
+    }
+    nact= kk;
+  }
+  //Free
+  gsl_matrix_free(Jm);
+  gsl_vector_free(fv);
+  gsl_vector_free(dxv);
+  gsl_permutation_free(perm);
+  gsl_matrix_free(Jm2);
+  gsl_vector_free(fv2);
+  gsl_vector_free(dxv2);
+  gsl_permutation_free(perm2);
+  for (ii=0; ii < max_threads; ii++)
+    free_potentialArgs(npot,actionAngleArgs+ii*npot);
+  free(actionAngleArgs);
+  free(x);
+  free(resprev);
+  free(active);
+  free(Rb);
+  free(hb);
+}
+double calcRgStaeckel(double Lz,int npot,struct potentialArg * actionAngleArgs){
+  // Guiding-center radius: solve R^3 x (-dPhi/dR) = Lz^2 by bisection in ln R
+  int ii;
+  double lnR_lo= log(1e-8), lnR_hi= 0., lnR_mid, Lz2= Lz * Lz;
+  while ( exp(3. * lnR_hi)
+	  * ( - calcRforce(exp(lnR_hi),0.,0.,0.,npot,actionAngleArgs) ) < Lz2
+	  && lnR_hi < log(1e8) )
+    lnR_hi+= log(2.);
+  for (ii=0; ii < 100; ii++){
+    lnR_mid= 0.5 * ( lnR_lo + lnR_hi );
+    if ( exp(3. * lnR_mid)
+	 * ( - calcRforce(exp(lnR_mid),0.,0.,0.,npot,actionAngleArgs) ) < Lz2 )
+      lnR_lo= lnR_mid;
+    else
+      lnR_hi= lnR_mid;
+    if ( lnR_hi - lnR_lo < 1e-13 ) break;
+  }
+  return exp(0.5 * ( lnR_lo + lnR_hi ));
+}
 void calcFreqsFromDerivsStaeckel(int ndata,
 				 double * Omegar,
 				 double * Omegaphi,
@@ -825,8 +1156,8 @@ void calcFreqsFromDerivsStaeckel(int ndata,
 				 double * djzdLz,
 				 double * djzdI3){
   int ii;
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk)			\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)			\
   private(ii)							\
   shared(Omegar,Omegaphi,Omegaz,djrdE,djrdLz,djrdI3,djzdE,djzdLz,djzdI3,detA)
   for (ii=0; ii < ndata; ii++){
@@ -854,8 +1185,8 @@ void calcdI3dJFromDerivsStaeckel(int ndata,
 				 double * djrdLz,
 				 double * djzdLz){
   int ii;
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk)			\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)			\
   private(ii)							\
   shared(djrdE,djzdE,djrdLz,djzdLz,dI3dJR,dI3dJz,dI3dLz,detA)
   for (ii=0; ii < ndata; ii++){
@@ -873,7 +1204,8 @@ void calcdJRStaeckel(int ndata,
 		     double * E,
 		     double * Lz,
 		     double * I3U,
-		     double delta,
+		     int ndelta,
+		     double *delta,
 		     double * u0,
 		     double * sinh2u0,
 		     double * v0,
@@ -883,6 +1215,7 @@ void calcdJRStaeckel(int ndata,
 		     struct potentialArg * actionAngleArgs,
 		     int order){
   int ii, tid, nthreads;
+  int delta_stride= ndelta == 1 ? 0 : 1;
   double mid;
 #ifdef _OPENMP
   nthreads = omp_get_max_threads();
@@ -892,14 +1225,13 @@ void calcdJRStaeckel(int ndata,
   gsl_function * dJRInt= (gsl_function *) malloc ( nthreads * sizeof(gsl_function) );
   struct dJRStaeckelArg * params= (struct dJRStaeckelArg *) malloc ( nthreads * sizeof (struct dJRStaeckelArg) );
   for (tid=0; tid < nthreads; tid++){
-    (params+tid)->delta= delta;
     (params+tid)->nargs= nargs;
     (params+tid)->actionAngleArgs= actionAngleArgs;
   }
   //Setup integrator
   gsl_integration_glfixed_table * T= gsl_integration_glfixed_table_alloc (order);
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk)				\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)				\
   private(tid,ii,mid)							\
   shared(djrdE,djrdLz,djrdI3,umin,umax,dJRInt,params,T,delta,E,Lz,I3U,u0,sinh2u0,v0,sin2v0,potu0v0)
   for (ii=0; ii < ndata; ii++){
@@ -922,7 +1254,8 @@ void calcdJRStaeckel(int ndata,
     }
     //Setup function
     (params+tid)->E= *(E+ii);
-    (params+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta;
+    (params+tid)->delta= *(delta+ii*delta_stride);
+    (params+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride);
     (params+tid)->I3U= *(I3U+ii);
     (params+tid)->u0= *(u0+ii);
     (params+tid)->sinh2u0= *(sinh2u0+ii);
@@ -938,19 +1271,19 @@ void calcdJRStaeckel(int ndata,
     *(djrdE+ii)= gsl_integration_glfixed (dJRInt+tid,0.,mid,T);
     (dJRInt+tid)->function = &dJRdEHighStaeckelIntegrand;
     *(djrdE+ii)+= gsl_integration_glfixed (dJRInt+tid,0.,mid,T);
-    *(djrdE+ii)*= delta / M_PI / sqrt(2.);
+    *(djrdE+ii)*= *(delta+ii*delta_stride) / M_PI / sqrt(2.);
     //then calculate djrdLz
     (dJRInt+tid)->function = &dJRdLzLowStaeckelIntegrand;
     *(djrdLz+ii)= gsl_integration_glfixed (dJRInt+tid,0.,mid,T);
     (dJRInt+tid)->function = &dJRdLzHighStaeckelIntegrand;
     *(djrdLz+ii)+= gsl_integration_glfixed (dJRInt+tid,0.,mid,T);
-    *(djrdLz+ii)*= - *(Lz+ii) / M_PI / sqrt(2.) / delta;
+    *(djrdLz+ii)*= - *(Lz+ii) / M_PI / sqrt(2.) / *(delta+ii*delta_stride);
     //then calculate djrdI3
     (dJRInt+tid)->function = &dJRdI3LowStaeckelIntegrand;
     *(djrdI3+ii)= gsl_integration_glfixed (dJRInt+tid,0.,mid,T);
     (dJRInt+tid)->function = &dJRdI3HighStaeckelIntegrand;
     *(djrdI3+ii)+= gsl_integration_glfixed (dJRInt+tid,0.,mid,T);
-    *(djrdI3+ii)*= -delta / M_PI / sqrt(2.);
+    *(djrdI3+ii)*= -*(delta+ii*delta_stride) / M_PI / sqrt(2.);
   }
   free(dJRInt);
   free(params);
@@ -964,7 +1297,8 @@ void calcdJzStaeckel(int ndata,
 		     double * E,
 		     double * Lz,
 		     double * I3V,
-		     double delta,
+		     int ndelta,
+		     double *delta,
 		     double * u0,
 		     double * cosh2u0,
 		     double * sinh2u0,
@@ -973,6 +1307,7 @@ void calcdJzStaeckel(int ndata,
 		     struct potentialArg * actionAngleArgs,
 		     int order){
   int ii, tid, nthreads;
+  int delta_stride= ndelta == 1 ? 0 : 1;
   double mid;
 #ifdef _OPENMP
   nthreads = omp_get_max_threads();
@@ -982,14 +1317,13 @@ void calcdJzStaeckel(int ndata,
   gsl_function * dJzInt= (gsl_function *) malloc ( nthreads * sizeof(gsl_function) );
   struct dJzStaeckelArg * params= (struct dJzStaeckelArg *) malloc ( nthreads * sizeof (struct dJzStaeckelArg) );
   for (tid=0; tid < nthreads; tid++){
-    (params+tid)->delta= delta;
     (params+tid)->nargs= nargs;
     (params+tid)->actionAngleArgs= actionAngleArgs;
   }
   //Setup integrator
   gsl_integration_glfixed_table * T= gsl_integration_glfixed_table_alloc (order);
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk)				\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)				\
   private(tid,ii,mid)							\
   shared(djzdE,djzdLz,djzdI3,vmin,dJzInt,params,T,delta,E,Lz,I3V,u0,cosh2u0,sinh2u0,potupi2)
   for (ii=0; ii < ndata; ii++){
@@ -1004,21 +1338,35 @@ void calcdJzStaeckel(int ndata,
       *(djzdI3+ii)= 9999.99;
       continue;
     }
-    if ( (0.5 * M_PI - *(vmin+ii)) / M_PI * 2. < 0.000001 ){//circular
-      *(djzdE+ii) = 0.;
-      *(djzdLz+ii) = 0.;
-      *(djzdI3+ii) = 0.;
-      continue;
-    }
     //Setup function
     (params+tid)->E= *(E+ii);
-    (params+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta;
+    (params+tid)->delta= *(delta+ii*delta_stride);
+    (params+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride);
     (params+tid)->I3V= *(I3V+ii);
     (params+tid)->u0= *(u0+ii);
     (params+tid)->cosh2u0= *(cosh2u0+ii);
     (params+tid)->sinh2u0= *(sinh2u0+ii);
     (params+tid)->potupi2= *(potupi2+ii);
     (params+tid)->vmin= *(vmin+ii);
+    if ( (0.5 * M_PI - *(vmin+ii)) / M_PI * 2. < 0.000001 ){//in-plane
+      //Limit Jz --> 0: the motion in v is harmonic around pi/2, with
+      //p_v^2 / 2 / delta^2 = -a (v-pi/2)^2, such that all integrals
+      //reduce to pi/2/sqrt(a) times their integrand at pi/2
+      mid= 1e-4;
+      mid= ( JzStaeckelIntegrandSquared4dJz(0.5 * M_PI,params+tid)
+	     - JzStaeckelIntegrandSquared4dJz(0.5 * M_PI - mid,params+tid) )
+	/ mid / mid;
+      if ( mid <= 0. ) {
+	*(djzdE+ii) = 0.;
+	*(djzdLz+ii) = 0.;
+	*(djzdI3+ii) = 0.;
+	continue;
+      }
+      *(djzdE+ii)= *(delta+ii*delta_stride) / sqrt(2. * mid);
+      *(djzdLz+ii)= - *(Lz+ii) / sqrt(2. * mid) / *(delta+ii*delta_stride);
+      *(djzdI3+ii)= *(delta+ii*delta_stride) / sqrt(2. * mid);
+      continue;
+    }
     //First calculate dJzdE
     (dJzInt+tid)->function = &dJzdELowStaeckelIntegrand;
     (dJzInt+tid)->params = params+tid;
@@ -1028,21 +1376,21 @@ void calcdJzStaeckel(int ndata,
     *(djzdE+ii)= gsl_integration_glfixed (dJzInt+tid,0.,mid,T);
     (dJzInt+tid)->function = &dJzdEHighStaeckelIntegrand;
     *(djzdE+ii)+= gsl_integration_glfixed (dJzInt+tid,0.,mid,T);
-    *(djzdE+ii)*= sqrt(2.) * delta / M_PI;
+    *(djzdE+ii)*= sqrt(2.) * *(delta+ii*delta_stride) / M_PI;
     //Then calculate dJzdLz
     (dJzInt+tid)->function = &dJzdLzLowStaeckelIntegrand;
     //Integrate
     *(djzdLz+ii)= gsl_integration_glfixed (dJzInt+tid,0.,mid,T);
     (dJzInt+tid)->function = &dJzdLzHighStaeckelIntegrand;
     *(djzdLz+ii)+= gsl_integration_glfixed (dJzInt+tid,0.,mid,T);
-    *(djzdLz+ii)*= - *(Lz+ii) * sqrt(2.) / M_PI / delta;
+    *(djzdLz+ii)*= - *(Lz+ii) * sqrt(2.) / M_PI / *(delta+ii*delta_stride);
     //Then calculate dJzdI3
     (dJzInt+tid)->function = &dJzdI3LowStaeckelIntegrand;
     //Integrate
     *(djzdI3+ii)= gsl_integration_glfixed (dJzInt+tid,0.,mid,T);
     (dJzInt+tid)->function = &dJzdI3HighStaeckelIntegrand;
     *(djzdI3+ii)+= gsl_integration_glfixed (dJzInt+tid,0.,mid,T);
-    *(djzdI3+ii)*= sqrt(2.) * delta / M_PI;
+    *(djzdI3+ii)*= sqrt(2.) * *(delta+ii*delta_stride) / M_PI;
   }
   free(dJzInt);
   free(params);
@@ -1073,7 +1421,8 @@ void calcAnglesStaeckel(int ndata,
 			double * E,
 			double * Lz,
 			double * I3U,
-			double delta,
+			int ndelta,
+			double *delta,
 			double * u0,
 			double * sinh2u0,
 			double * v0,
@@ -1087,6 +1436,7 @@ void calcAnglesStaeckel(int ndata,
 			struct potentialArg * actionAngleArgs,
 			int order){
   int ii, tid, nthreads;
+  int delta_stride= ndelta == 1 ? 0 : 1;
   double Or1, Or2, I3r1, I3r2,phitmp;
   double mid, midpoint;
 #ifdef _OPENMP
@@ -1099,17 +1449,15 @@ void calcAnglesStaeckel(int ndata,
   struct dJRStaeckelArg * paramsu= (struct dJRStaeckelArg *) malloc ( nthreads * sizeof (struct dJRStaeckelArg) );
   struct dJzStaeckelArg * paramsv= (struct dJzStaeckelArg *) malloc ( nthreads * sizeof (struct dJzStaeckelArg) );
   for (tid=0; tid < nthreads; tid++){
-    (paramsu+tid)->delta= delta;
     (paramsu+tid)->nargs= nargs;
     (paramsu+tid)->actionAngleArgs= actionAngleArgs;
-    (paramsv+tid)->delta= delta;
     (paramsv+tid)->nargs= nargs;
     (paramsv+tid)->actionAngleArgs= actionAngleArgs;
   }
   //Setup integrator
   gsl_integration_glfixed_table * T= gsl_integration_glfixed_table_alloc (order);
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk)				\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)				\
   private(tid,ii,mid,midpoint,Or1,Or2,I3r1,I3r2,phitmp)			\
   shared(Angler,Anglephi,Anglez,Omegar,Omegaz,dI3dJR,dI3dJz,umin,umax,AngleuInt,AnglevInt,paramsu,paramsv,T,delta,E,Lz,I3U,u0,sinh2u0,v0,sin2v0,potu0v0,vmin,I3V,cosh2u0,potupi2)
   for (ii=0; ii < ndata; ii++){
@@ -1132,7 +1480,8 @@ void calcAnglesStaeckel(int ndata,
     }
     //Setup u function
     (paramsu+tid)->E= *(E+ii);
-    (paramsu+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta;
+    (paramsu+tid)->delta= *(delta+ii*delta_stride);
+    (paramsu+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride);
     (paramsu+tid)->I3U= *(I3U+ii);
     (paramsu+tid)->u0= *(u0+ii);
     (paramsu+tid)->sinh2u0= *(sinh2u0+ii);
@@ -1151,9 +1500,9 @@ void calcAnglesStaeckel(int ndata,
 	(AngleuInt+tid)->function = &dJRdI3HighStaeckelIntegrand;
 	I3r1= -gsl_integration_glfixed (AngleuInt+tid,0.,mid,T);
 	(AngleuInt+tid)->function = &dJRdLzHighStaeckelIntegrand;
-	*(Anglephi+ii)= M_PI * *(dJRdLz+ii) + *(Lz+ii) * gsl_integration_glfixed (AngleuInt+tid,0.,mid,T) / delta / sqrt(2.);
-	Or1*= delta / sqrt(2.);
-	I3r1*= delta / sqrt(2.);
+	*(Anglephi+ii)= M_PI * *(dJRdLz+ii) + *(Lz+ii) * gsl_integration_glfixed (AngleuInt+tid,0.,mid,T) / *(delta+ii*delta_stride) / sqrt(2.);
+	Or1*= *(delta+ii*delta_stride) / sqrt(2.);
+	I3r1*= *(delta+ii*delta_stride) / sqrt(2.);
 	Or1= M_PI * *(dJRdE+ii) - Or1;
 	I3r1= M_PI * *(dJRdI3+ii) - I3r1;
       }
@@ -1164,9 +1513,9 @@ void calcAnglesStaeckel(int ndata,
 	(AngleuInt+tid)->function = &dJRdI3LowStaeckelIntegrand;
 	I3r1= -gsl_integration_glfixed (AngleuInt+tid,0.,mid,T);
 	(AngleuInt+tid)->function = &dJRdLzLowStaeckelIntegrand;
-	*(Anglephi+ii)= - *(Lz+ii) * gsl_integration_glfixed (AngleuInt+tid,0.,mid,T) / delta / sqrt(2.);
-	Or1*= delta / sqrt(2.);
-	I3r1*= delta / sqrt(2.);
+	*(Anglephi+ii)= - *(Lz+ii) * gsl_integration_glfixed (AngleuInt+tid,0.,mid,T) / *(delta+ii*delta_stride) / sqrt(2.);
+	Or1*= *(delta+ii*delta_stride) / sqrt(2.);
+	I3r1*= *(delta+ii*delta_stride) / sqrt(2.);
       }
     } 
     else {
@@ -1174,32 +1523,33 @@ void calcAnglesStaeckel(int ndata,
 	mid= sqrt( ( *(umax+ii) - *(ux+ii) ) );
 	(AngleuInt+tid)->function = &dJRdEHighStaeckelIntegrand;
 	Or1= gsl_integration_glfixed (AngleuInt+tid,0.,mid,T);
-	Or1*= delta / sqrt(2.);
+	Or1*= *(delta+ii*delta_stride) / sqrt(2.);
 	Or1= M_PI * *(dJRdE+ii) + Or1;
 	(AngleuInt+tid)->function = &dJRdI3HighStaeckelIntegrand;
 	I3r1= -gsl_integration_glfixed (AngleuInt+tid,0.,mid,T);
-	I3r1*= delta / sqrt(2.);
+	I3r1*= *(delta+ii*delta_stride) / sqrt(2.);
 	I3r1= M_PI * *(dJRdI3+ii) + I3r1;
 	(AngleuInt+tid)->function = &dJRdLzHighStaeckelIntegrand;
-	*(Anglephi+ii)= M_PI * *(dJRdLz+ii) - *(Lz+ii) * gsl_integration_glfixed (AngleuInt+tid,0.,mid,T) / delta / sqrt(2.);
+	*(Anglephi+ii)= M_PI * *(dJRdLz+ii) - *(Lz+ii) * gsl_integration_glfixed (AngleuInt+tid,0.,mid,T) / *(delta+ii*delta_stride) / sqrt(2.);
       }
       else {
 	mid= sqrt( ( *(ux+ii) - *(umin+ii) ) );
 	(AngleuInt+tid)->function = &dJRdELowStaeckelIntegrand;
 	Or1= gsl_integration_glfixed (AngleuInt+tid,0.,mid,T);
-	Or1*= delta / sqrt(2.);
+	Or1*= *(delta+ii*delta_stride) / sqrt(2.);
 	Or1= 2. * M_PI * *(dJRdE+ii) - Or1;
 	(AngleuInt+tid)->function = &dJRdI3LowStaeckelIntegrand;
 	I3r1= -gsl_integration_glfixed (AngleuInt+tid,0.,mid,T);
-	I3r1*= delta / sqrt(2.);
+	I3r1*= *(delta+ii*delta_stride) / sqrt(2.);
 	I3r1= 2. * M_PI * *(dJRdI3+ii) - I3r1;
 	(AngleuInt+tid)->function = &dJRdLzLowStaeckelIntegrand;
-	*(Anglephi+ii)= 2. * M_PI * *(dJRdLz+ii) + *(Lz+ii) * gsl_integration_glfixed (AngleuInt+tid,0.,mid,T) / delta / sqrt(2.);
+	*(Anglephi+ii)= 2. * M_PI * *(dJRdLz+ii) + *(Lz+ii) * gsl_integration_glfixed (AngleuInt+tid,0.,mid,T) / *(delta+ii*delta_stride) / sqrt(2.);
       }
     }
     //Setup v function
     (paramsv+tid)->E= *(E+ii);
-    (paramsv+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta;
+    (paramsv+tid)->delta= *(delta+ii*delta_stride);
+    (paramsv+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride);
     (paramsv+tid)->I3V= *(I3V+ii);
     (paramsv+tid)->u0= *(u0+ii);
     (paramsv+tid)->cosh2u0= *(cosh2u0+ii);
@@ -1213,13 +1563,13 @@ void calcAnglesStaeckel(int ndata,
 	mid = ( *(vx+ii) > 0.5 * M_PI ) ? sqrt( (M_PI - *(vx+ii) - *(vmin+ii))): sqrt( *(vx+ii) - *(vmin+ii));
 	(AnglevInt+tid)->function = &dJzdELowStaeckelIntegrand;
 	Or2= gsl_integration_glfixed (AnglevInt+tid,0.,mid,T);
-	Or2*= delta / sqrt(2.);
+	Or2*= *(delta+ii*delta_stride) / sqrt(2.);
 	(AnglevInt+tid)->function = &dJzdI3LowStaeckelIntegrand;
 	I3r2= gsl_integration_glfixed (AnglevInt+tid,0.,mid,T);
-	I3r2*= delta / sqrt(2.);
+	I3r2*= *(delta+ii*delta_stride) / sqrt(2.);
 	(AnglevInt+tid)->function = &dJzdLzLowStaeckelIntegrand;
 	phitmp= gsl_integration_glfixed (AnglevInt+tid,0.,mid,T);
-	phitmp*= - *(Lz+ii) / delta / sqrt(2.);
+	phitmp*= - *(Lz+ii) / *(delta+ii*delta_stride) / sqrt(2.);
 	if ( *(vx+ii) > 0.5 * M_PI ) {
 	  Or2= M_PI * *(dJzdE+ii) - Or2;
 	  I3r2= M_PI * *(dJzdI3+ii) - I3r2;
@@ -1230,13 +1580,13 @@ void calcAnglesStaeckel(int ndata,
 	mid= sqrt( fabs ( 0.5 * M_PI - *(vx+ii) ) );
 	(AnglevInt+tid)->function = &dJzdEHighStaeckelIntegrand;
 	Or2= gsl_integration_glfixed (AnglevInt+tid,0.,mid,T);
-	Or2*= delta / sqrt(2.);
+	Or2*= *(delta+ii*delta_stride) / sqrt(2.);
 	(AnglevInt+tid)->function = &dJzdI3HighStaeckelIntegrand;
 	I3r2= gsl_integration_glfixed (AnglevInt+tid,0.,mid,T);
-	I3r2*= delta / sqrt(2.);
+	I3r2*= *(delta+ii*delta_stride) / sqrt(2.);
 	(AnglevInt+tid)->function = &dJzdLzHighStaeckelIntegrand;
 	phitmp= gsl_integration_glfixed (AnglevInt+tid,0.,mid,T);
-	phitmp*= - *(Lz+ii) / delta / sqrt(2.);
+	phitmp*= - *(Lz+ii) / *(delta+ii*delta_stride) / sqrt(2.);
 	if ( *(vx+ii) > 0.5 * M_PI ) {
 	  Or2= 0.5 * M_PI * *(dJzdE+ii) + Or2;
 	  I3r2= 0.5 * M_PI * *(dJzdI3+ii) + I3r2;
@@ -1254,13 +1604,13 @@ void calcAnglesStaeckel(int ndata,
 	mid = ( *(vx+ii) > 0.5 * M_PI ) ? sqrt( (M_PI - *(vx+ii) - *(vmin+ii))): sqrt( *(vx+ii) - *(vmin+ii));
 	(AnglevInt+tid)->function = &dJzdELowStaeckelIntegrand;
 	Or2= gsl_integration_glfixed (AnglevInt+tid,0.,mid,T);
-	Or2*= delta / sqrt(2.);
+	Or2*= *(delta+ii*delta_stride) / sqrt(2.);
 	(AnglevInt+tid)->function = &dJzdI3LowStaeckelIntegrand;
 	I3r2= gsl_integration_glfixed (AnglevInt+tid,0.,mid,T);
-	I3r2*= delta / sqrt(2.);
+	I3r2*= *(delta+ii*delta_stride) / sqrt(2.);
 	(AnglevInt+tid)->function = &dJzdLzLowStaeckelIntegrand;
 	phitmp= gsl_integration_glfixed (AnglevInt+tid,0.,mid,T);
-	phitmp*= - *(Lz+ii) / delta / sqrt(2.);
+	phitmp*= - *(Lz+ii) / *(delta+ii*delta_stride) / sqrt(2.);
 	if ( *(vx+ii) < 0.5 * M_PI ) {
 	  Or2= 2. * M_PI * *(dJzdE+ii) - Or2;
 	  I3r2= 2. * M_PI * *(dJzdI3+ii) - I3r2;
@@ -1276,13 +1626,13 @@ void calcAnglesStaeckel(int ndata,
 	mid= sqrt( fabs ( 0.5 * M_PI - *(vx+ii) ) );
 	(AnglevInt+tid)->function = &dJzdEHighStaeckelIntegrand;
 	Or2= gsl_integration_glfixed (AnglevInt+tid,0.,mid,T);
-	Or2*= delta / sqrt(2.);
+	Or2*= *(delta+ii*delta_stride) / sqrt(2.);
 	(AnglevInt+tid)->function = &dJzdI3HighStaeckelIntegrand;
 	I3r2= gsl_integration_glfixed (AnglevInt+tid,0.,mid,T);
-	I3r2*= delta / sqrt(2.);
+	I3r2*= *(delta+ii*delta_stride) / sqrt(2.);
 	(AnglevInt+tid)->function = &dJzdLzHighStaeckelIntegrand;
 	phitmp= gsl_integration_glfixed (AnglevInt+tid,0.,mid,T);
-	phitmp*= - *(Lz+ii) / delta / sqrt(2.);
+	phitmp*= - *(Lz+ii) / *(delta+ii*delta_stride) / sqrt(2.);
 	if ( *(vx+ii) < 0.5 * M_PI ) {
 	  Or2= 1.5 * M_PI * *(dJzdE+ii) + Or2;
 	  I3r2= 1.5 * M_PI * *(dJzdI3+ii) + I3r2;
@@ -1329,7 +1679,8 @@ void calcUminUmax(int ndata,
 		  double * E,
 		  double * Lz,
 		  double * I3U,
-		  double delta,
+		  int ndelta,
+		  double *delta,
 		  double * u0,
 		  double * sinh2u0,
 		  double * v0,
@@ -1338,6 +1689,7 @@ void calcUminUmax(int ndata,
 		  int nargs,
 		  struct potentialArg * actionAngleArgs){
   int ii, tid, nthreads;
+  int delta_stride= ndelta == 1 ? 0 : 1;
 #ifdef _OPENMP
   nthreads = omp_get_max_threads();
 #else
@@ -1354,14 +1706,13 @@ void calcUminUmax(int ndata,
   double u_lo, u_hi;
   T = gsl_root_fsolver_brent;
   for (tid=0; tid < nthreads; tid++){
-    (params+tid)->delta= delta;
     (params+tid)->nargs= nargs;
     (params+tid)->actionAngleArgs= actionAngleArgs;
     (s+tid)->s= gsl_root_fsolver_alloc (T);
   }
-  UNUSED int chunk= CHUNKSIZE;
   gsl_set_error_handler_off();
-#pragma omp parallel for schedule(static,chunk)				\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)				\
   private(tid,ii,iter,status,u_lo,u_hi,meps,peps)				\
   shared(umin,umax,JRRoot,params,s,ux,delta,E,Lz,I3U,u0,sinh2u0,v0,sin2v0,potu0v0,max_iter)
   for (ii=0; ii < ndata; ii++){
@@ -1372,7 +1723,8 @@ void calcUminUmax(int ndata,
 #endif
     //Setup function
     (params+tid)->E= *(E+ii);
-    (params+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta;
+    (params+tid)->delta= *(delta+ii*delta_stride);
+    (params+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride);
     (params+tid)->I3U= *(I3U+ii);
     (params+tid)->u0= *(u0+ii);
     (params+tid)->sinh2u0= *(sinh2u0+ii);
@@ -1428,7 +1780,7 @@ void calcUminUmax(int ndata,
 	*(umin+ii)= *(ux+ii);
 	u_lo= *(ux+ii) + 0.000001;
 	u_hi= 1.1 * (*(ux+ii) + 0.000001);
-	while ( GSL_FN_EVAL(JRRoot+tid,u_hi) >= 0. && u_hi < asinh(37.5/delta)) {
+	while ( GSL_FN_EVAL(JRRoot+tid,u_hi) >= 0. && u_hi < asinh(37.5 / *(delta+ii*delta_stride))) {
 	  u_lo= u_hi; //this makes sure that brent evaluates using previous
 	  u_hi*= 1.1;
 	}
@@ -1498,7 +1850,7 @@ void calcUminUmax(int ndata,
       //Find starting points for maximum
       u_lo= *(ux+ii);
       u_hi= 1.1 * *(ux+ii);
-      while ( GSL_FN_EVAL(JRRoot+tid,u_hi) > 0. && u_hi < asinh(37.5/delta)) {
+      while ( GSL_FN_EVAL(JRRoot+tid,u_hi) > 0. && u_hi < asinh(37.5 / *(delta+ii*delta_stride))) {
 	u_lo= u_hi; //this makes sure that brent evaluates using previous
 	u_hi*= 1.1;
       }
@@ -1546,7 +1898,8 @@ void calcVmin(int ndata,
 	      double * E,
 	      double * Lz,
 	      double * I3V,
-	      double delta,
+	      int ndelta,
+	      double *delta,
 	      double * u0,
 	      double * cosh2u0,
 	      double * sinh2u0,
@@ -1554,6 +1907,7 @@ void calcVmin(int ndata,
 	      int nargs,
 	      struct potentialArg * actionAngleArgs){
   int ii, tid, nthreads;
+  int delta_stride= ndelta == 1 ? 0 : 1;
 #ifdef _OPENMP
   nthreads = omp_get_max_threads();
 #else
@@ -1569,14 +1923,13 @@ void calcVmin(int ndata,
   double v_lo, v_hi;
   T = gsl_root_fsolver_brent;
   for (tid=0; tid < nthreads; tid++){
-    (params+tid)->delta= delta;
     (params+tid)->nargs= nargs;
     (params+tid)->actionAngleArgs= actionAngleArgs;
     (s+tid)->s= gsl_root_fsolver_alloc (T);
   }
-  UNUSED int chunk= CHUNKSIZE;
   gsl_set_error_handler_off();
-#pragma omp parallel for schedule(static,chunk)				\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)				\
   private(tid,ii,iter,status,v_lo,v_hi)				\
   shared(vmin,JzRoot,params,s,vx,delta,E,Lz,I3V,u0,cosh2u0,sinh2u0,potupi2,max_iter)
   for (ii=0; ii < ndata; ii++){
@@ -1587,7 +1940,8 @@ void calcVmin(int ndata,
 #endif
     //Setup function
     (params+tid)->E= *(E+ii);
-    (params+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta;
+    (params+tid)->delta= *(delta+ii*delta_stride);
+    (params+tid)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride);
     (params+tid)->I3V= *(I3V+ii);
     (params+tid)->u0= *(u0+ii);
     (params+tid)->cosh2u0= *(cosh2u0+ii);
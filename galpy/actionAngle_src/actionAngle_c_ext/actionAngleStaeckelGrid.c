@@ -0,0 +1,231 @@
+/*
+  C code for evaluating actions using the grid-based interpolation of
+  Binney (2012)'s Staeckel approximation (actionAngleStaeckelGrid)
+*/
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdbool.h>
+#include <math.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#include <bovy_openmp.h>
+#define CHUNKSIZE 10
+//Potentials
+#include <galpy_potentials.h>
+#include <actionAngle.h>
+#include <cubic_bspline_2d_interpol.h>
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+/*
+  Function Declarations
+*/
+void actionAngleStaeckelGrid_actions(int,double *,double *,double *,double *,
+				     double *,int,int *,double *,double,
+				     int,double *,int,double *,double *,
+				     double,double,int,double *,int,double *,
+				     double *,int,int,double *,double *,
+				     double *,double *,int *);
+void actionAngleStaeckel_actions(int,double *,double *,double *,double *,
+				 double *,double *,int,int *,double *,int,
+				 double *,double *,double *,int *);
+double evaluatePotentialsUV(double,double,double,int,struct potentialArg *);
+/*
+  Actual functions, inlines first
+*/
+static inline double Efunc(double E, double ERL){
+  return log(E - ERL + 1e-10);
+}
+static inline void Rz_to_uv_single(double R, double z, double * u, double * v,
+				   double delta){
+  double d12, d22, coshu, cosv;
+  d12= (z+delta)*(z+delta)+R*R;
+  d22= (z-delta)*(z-delta)+R*R;
+  coshu= 0.5 / delta * (sqrt(d12)+sqrt(d22));
+  cosv=  0.5 / delta * (sqrt(d12)-sqrt(d22));
+  *u= acosh(coshu);
+  *v= acos(cosv);
+}
+/*
+  Evaluate the 3D cubic B-spline with coefficients coeffs (stored as npsi
+  2D slices of size nLz x nE, i.e., with psi as the slowest index) at grid
+  coordinates (x,y,p) by combining the 2D B-spline interpolations in the
+  (Lz,E) slices of the four nearest psi indices
+*/
+static double cubic_bspline_3d_interpol(double * coeffs,
+					long nLz,long nE,long npsi,
+					double x,double y,double p){
+  long k, p_index[4];
+  double w, p_weight[4];
+  long npsi2= 2L * npsi - 2L;
+  long kk= (long)floor(p) - 1L;
+  double out= 0.;
+  for (k=0L; k < 4L; k++) p_index[k]= kk++;
+  w= p - (double)p_index[1];
+  p_weight[3]= (1.0 / 6.0) * w * w * w;
+  p_weight[0]= (1.0 / 6.0) + (1.0 / 2.0) * w * (w - 1.0) - p_weight[3];
+  p_weight[2]= w + p_weight[0] - 2.0 * p_weight[3];
+  p_weight[1]= 1.0 - p_weight[0] - p_weight[2] - p_weight[3];
+  for (k=0L; k < 4L; k++){
+    //Mirror boundary conditions, same as in the 2D interpolation
+    p_index[k]= (npsi == 1L) ? (0L) : ((p_index[k] < 0L) ? (-p_index[k] - npsi2 * ((-p_index[k]) / npsi2)) : (p_index[k] - npsi2 * (p_index[k] / npsi2)));
+    if (npsi <= p_index[k])
+      p_index[k]= npsi2 - p_index[k];
+    out+= p_weight[k] * cubic_bspline_2d_interpol(coeffs+p_index[k]*nLz*nE,
+						   nLz,nE,x,y);
+  }
+  return out;
+}
+/*
+  MAIN FUNCTIONS
+ */
+void actionAngleStaeckelGrid_actions(int ndata,
+				     double *R,
+				     double *vR,
+				     double *vT,
+				     double *z,
+				     double *vz,
+				     int npot,
+				     int * pot_type,
+				     double * pot_args,
+				     double delta,
+				     int nLz,
+				     double * Lzs,
+				     int nt,
+				     double * t,
+				     double * Lzcoeffs,
+				     double ERLmax,
+				     double ERamax,
+				     int ntLz,
+				     double * tLz,
+				     int ntE,
+				     double * tE,
+				     double * logu0coeffs,
+				     int nE,
+				     int npsi,
+				     double * jrFiltered,
+				     double * jzFiltered,
+				     double *jr,
+				     double *jz,
+				     int * err){
+  int ii, noff, jj;
+  double Lz, E, thisERL, thisERa, yE, x, y, u0, sinh2u0, u, v, sinhu, coshu;
+  double sinv, cosv, pu, pv, potu0pi2, Er, Ez, v2, cos2psi, sin2psi;
+  double Lzmin= *Lzs;
+  double Lzmax= *(Lzs+nLz-1);
+  //Set up the potentials
+  struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
+  parse_actionAngleArgs(npot,actionAngleArgs,pot_type,pot_args,false);
+  // offgrid flags objects for which we need to compute the actions directly
+  int * offgrid= (int *) malloc ( ndata * sizeof(int) );
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime)				\
+  private(ii,Lz,E,thisERL,thisERa,yE,x,y,u0,sinh2u0,u,v,sinhu,coshu,	\
+	  sinv,cosv,pu,pv,potu0pi2,Er,Ez,v2,cos2psi,sin2psi)
+  for (ii=0; ii < ndata; ii++){
+    *(offgrid+ii)= 1;
+    Lz= *(R+ii) * *(vT+ii);
+    if ( Lz < Lzmin || Lz > Lzmax ) continue;
+    E= evaluatePotentials(*(R+ii),*(z+ii),npot,actionAngleArgs)
+      + 0.5 * *(vR+ii) * *(vR+ii)
+      + 0.5 * *(vT+ii) * *(vT+ii)
+      + 0.5 * *(vz+ii) * *(vz+ii);
+    thisERL= -exp(bspline_eval(Lz,nt,t,Lzcoeffs)) + ERLmax;
+    thisERa= -exp(bspline_eval(Lz,nt,t,Lzcoeffs+nt)) + ERamax;
+    yE= (E - thisERa) / (thisERL - thisERa);
+    if ( yE > 1. && yE - 1. < 1e-2 ) E= thisERL;
+    else if ( yE < 0. && yE > -1e-2 ) E= thisERa;
+    yE= (E - thisERa) / (thisERL - thisERa);
+    if ( !(yE >= 0. && yE <= 1.) ) continue;
+    //Interpolate u0
+    y= ( Efunc(E,thisERL) - Efunc(thisERa,thisERL) )
+      / ( Efunc(thisERL,thisERL) - Efunc(thisERa,thisERL) );
+    u0= exp(bspline_2d_eval(Lz,y,ntLz,tLz,ntE,tE,logu0coeffs));
+    sinh2u0= sinh(u0) * sinh(u0);
+    //Radial and vertical energies
+    Rz_to_uv_single(*(R+ii),*(z+ii),&u,&v,delta);
+    sinhu= sinh(u);
+    coshu= cosh(u);
+    sinv= sin(v);
+    cosv= cos(v);
+    pu= *(vR+ii) * coshu * sinv + *(vz+ii) * sinhu * cosv;
+    pv= *(vR+ii) * sinhu * cosv - *(vz+ii) * coshu * sinv;
+    potu0pi2= evaluatePotentialsUV(u0,0.5 * M_PI,delta,npot,actionAngleArgs);
+    Er= 0.5 * pu * pu
+      + 0.5 * Lz * Lz / delta / delta * ( 1. / sinhu / sinhu - 1. / sinh2u0 )
+      - E * ( sinhu * sinhu - sinh2u0 )
+      + ( sinhu * sinhu + 1. )
+      * evaluatePotentialsUV(u,0.5 * M_PI,delta,npot,actionAngleArgs)
+      - ( sinh2u0 + 1. ) * potu0pi2;
+    Ez= 0.5 * pv * pv
+      + 0.5 * Lz * Lz / delta / delta * ( 1. / sinv / sinv - 1. )
+      - E * ( sinv * sinv - 1. )
+      - ( sinh2u0 + 1. ) * potu0pi2
+      + ( sinh2u0 + sinv * sinv )
+      * evaluatePotentialsUV(u0,v,delta,npot,actionAngleArgs);
+    v2= 2. * ( E - potu0pi2 ) - Lz * Lz / delta / delta / sinh2u0;
+    cos2psi= 2. * Er / v2 / ( 1. + sinh2u0 );
+    if ( cos2psi > 1. && cos2psi < 1. + 1e-5 ) cos2psi= 1.;
+    if ( !(cos2psi >= 0. && cos2psi <= 1.) ) continue;
+    sin2psi= 2. * Ez / v2 / ( 1. + sinh2u0 );
+    if ( sin2psi > 1. && sin2psi < 1. + 1e-5 ) sin2psi= 1.;
+    if ( !(sin2psi >= 0. && sin2psi <= 1.) ) continue;
+    //Interpolate the actions on the grid, grid coordinates first
+    x= (Lz - Lzmin) / (Lzmax - Lzmin) * ( nLz - 1. );
+    y*= nE - 1.;
+    *(jr+ii)= ( exp(cubic_bspline_3d_interpol(jrFiltered,nLz,nE,npsi,x,y,
+			 acos(sqrt(cos2psi)) / M_PI * 2. * ( npsi - 1. )))
+		- 1e-10 )
+      * ( exp(bspline_eval(Lz,nt,t,Lzcoeffs+2*nt)) - 1e-5 );
+    *(jz+ii)= ( exp(cubic_bspline_3d_interpol(jzFiltered,nLz,nE,npsi,x,y,
+			 asin(sqrt(sin2psi)) / M_PI * 2. * ( npsi - 1. )))
+		- 1e-10 )
+      * ( exp(bspline_eval(Lz,nt,t,Lzcoeffs+3*nt)) - 1e-5 );
+    *(offgrid+ii)= 0;
+  }
+  //Directly compute the actions of objects that are outside of the grid
+  noff= 0;
+  for (ii=0; ii < ndata; ii++) noff+= *(offgrid+ii);
+  *err= 0;
+  if ( noff > 0 ) {
+    double *Roff= (double *) malloc ( 8 * noff * sizeof(double) );
+    double *vRoff= Roff + noff;
+    double *vToff= Roff + 2 * noff;
+    double *zoff= Roff + 3 * noff;
+    double *vzoff= Roff + 4 * noff;
+    double *u0off= Roff + 5 * noff;
+    double *jroff= Roff + 6 * noff;
+    double *jzoff= Roff + 7 * noff;
+    jj= 0;
+    for (ii=0; ii < ndata; ii++){
+      if ( ! *(offgrid+ii) ) continue;
+      *(Roff+jj)= *(R+ii);
+      *(vRoff+jj)= *(vR+ii);
+      *(vToff+jj)= *(vT+ii);
+      *(zoff+jj)= *(z+ii);
+      *(vzoff+jj)= *(vz+ii);
+      Rz_to_uv_single(*(R+ii),*(z+ii),u0off+jj,&v,delta);
+      jj++;
+    }
+    actionAngleStaeckel_actions(noff,Roff,vRoff,vToff,zoff,vzoff,u0off,
+				npot,pot_type,pot_args,1,&delta,
+				jroff,jzoff,err);
+    jj= 0;
+    for (ii=0; ii < ndata; ii++){
+      if ( ! *(offgrid+ii) ) continue;
+      *(jr+ii)= *(jroff+jj);
+      *(jz+ii)= *(jzoff+jj);
+      jj++;
+    }
+    free(Roff);
+  }
+  for (ii=0; ii < ndata; ii++){
+    if ( *(jr+ii) < 0. ) *(jr+ii)= 0.;
+    if ( *(jz+ii) < 0. ) *(jz+ii)= 0.;
+  }
+  //Free
+  free(offgrid);
+  free_potentialArgs(npot,actionAngleArgs);
+  free(actionAngleArgs);
+}
@@ -16,6 +16,9 @@ _NSIGMA= 4.
 _INTERPDEGREE= 3
 _RMIN=10.**-10.
 _MAXD_REJECTLOS= 4.
+_NSAMPLEPHASE= 101
+_SAMPLECHUNK= 10000
+_DEFAULTNGL= 20
 _PROFILE= False
 import copy
 import re
@@ -32,7 +35,7 @@ from scipy import optimize
 from galpy.df_src.surfaceSigmaProfile import *
 from galpy.orbit import Orbit
 from galpy.util.bovy_ars import bovy_ars
-from galpy.util import save_pickles
+from galpy.util import save_pickles, multi
 from galpy.util.bovy_conversion import physical_conversion, \
     potential_physical_input, _APY_UNITS, surfdens_in_msolpc2
 from galpy.potential import PowerSphericalPotential
@@ -95,6 +98,7 @@ class diskdf(df):
             self._surfaceSigmaProfile= surfaceSigma(profileParams)
         self._beta= beta
         self._gamma= sc.sqrt(2./(1.+self._beta))
+        self._glxdef, self._glwdef= nu.polynomial.legendre.leggauss(_DEFAULTNGL)
         if correct or 'corrections' in kwargs or 'rmax' in kwargs \
                 or 'niter' in kwargs or 'npoints' in kwargs:
             self._correct= True
@@ -742,7 +746,8 @@ class diskdf(df):
 
     @potential_physical_input
     @physical_conversion('surfacedensity',pop=True)        
-    def surfacemass(self,R,romberg=False,nsigma=None,relative=False):
+    def surfacemass(self,R,romberg=False,nsigma=None,relative=False,
+                    gl=False,ngl=_DEFAULTNGL):
         """
         NAME:
 
@@ -764,6 +769,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            surface mass at R
@@ -772,9 +781,14 @@ class diskdf(df):
 
            2010-03-XX - Written - Bovy (NYU)
 
+           2017-11-07 - Added Gauss-Legendre integration - agent
+
         """
         if nsigma == None:
             nsigma= _NSIGMA
+        if gl:
+            return self._vmomentsurfacemass(R,0,0,nsigma=nsigma,
+                                            relative=relative,gl=True,ngl=ngl)
         logSigmaR= self.targetSurfacemass(R,log=True,use_physical=False)
         sigmaR2= self.targetSigma2(R,use_physical=False)
         sigmaR1= sc.sqrt(sigmaR2)
@@ -808,7 +822,8 @@ class diskdf(df):
     @potential_physical_input
     @physical_conversion('velocity2surfacedensity',pop=True)
     def sigma2surfacemass(self,R,romberg=False,nsigma=None,
-                                relative=False):
+                                relative=False,
+                          gl=False,ngl=_DEFAULTNGL):
         """
 
         NAME:
@@ -831,6 +846,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            sigma_R^2 x surface-mass at R
@@ -839,9 +858,14 @@ class diskdf(df):
 
            2010-03-XX - Written - Bovy (NYU)
 
+           2017-11-07 - Added Gauss-Legendre integration - agent
+
         """
         if nsigma == None:
             nsigma= _NSIGMA
+        if gl:
+            return self._vmomentsurfacemass(R,2,0,nsigma=nsigma,
+                                            relative=relative,gl=True,ngl=ngl)
         logSigmaR= self.targetSurfacemass(R,log=True,use_physical=False)
         sigmaR2= self.targetSigma2(R,use_physical=False)
         sigmaR1= sc.sqrt(sigmaR2)
@@ -899,6 +923,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
            deriv= None, 'R', or 'phi': calculates derivative of the moment wrt R or phi
 
         OUTPUT:
@@ -909,6 +937,8 @@ class diskdf(df):
 
            2011-03-30 - Written - Bovy (NYU)
 
+           2017-11-07 - Added Gauss-Legendre integration - agent
+
         """
         use_physical= kwargs.pop('use_physical',True)
         ro= kwargs.pop('ro',None)
@@ -934,13 +964,20 @@ class diskdf(df):
             return self._vmomentsurfacemass(*args,**kwargs)
           
     def _vmomentsurfacemass(self,R,n,m,romberg=False,nsigma=None,
-                           relative=False,phi=0.,deriv=None):
+                           relative=False,phi=0.,deriv=None,
+                           gl=False,ngl=_DEFAULTNGL,
+                           _returngl=False,_glqeval=None):
         """Non-physical version of vmomentsurfacemass, otherwise the same"""
         #odd moments of vR are zero
         if isinstance(n,int) and n%2 == 1:
             return 0.
         if nsigma == None:
             nsigma= _NSIGMA
+        if gl:
+            return self._vmomentsurfacemassGL(R,n,m,nsigma=nsigma,ngl=ngl,
+                                              relative=relative,deriv=deriv,
+                                              _returngl=_returngl,
+                                              _glqeval=_glqeval)
         logSigmaR= self.targetSurfacemass(R,log=True,use_physical=False)
         sigmaR2= self.targetSigma2(R,use_physical=False)
         sigmaR1= sc.sqrt(sigmaR2)
@@ -989,9 +1026,94 @@ class diskdf(df):
                                           self._gamma,n,m,deriv),
                                          epsrel=_EPSREL)[0]/sc.pi*norm/2.
 
+    def _vmomentsurfacemassGL(self,R,n,m,nsigma=_NSIGMA,ngl=_DEFAULTNGL,
+                              relative=False,deriv=None,
+                              _returngl=False,_glqeval=None):
+        """
+        NAME:
+           _vmomentsurfacemassGL
+        PURPOSE:
+           calculate <vR^n vT^m x surface-mass> using fixed-order Gauss-Legendre integration over (vR,vT), for many R at once
+        INPUT:
+           R - radius or array of radii (/ro)
+           n - vR^n
+           m - vT^m
+           nsigma - number of sigma to integrate the velocities over
+           ngl - order of the Gauss-Legendre integration in vR and vT
+           relative - if True, return the moment relative to the target surface mass and sigma_R^2
+           deriv= None or 'R': calculate the derivative of the moment wrt R
+           _returngl= if True, also return the DF evaluated on the Gauss-Legendre grid
+           _glqeval= the DF evaluated on the Gauss-Legendre grid (from _returngl=True for the same R, nsigma, and ngl), such that other moments do not require new DF evaluations
+        OUTPUT:
+           <vR^n vT^m  x surface-mass> at R (and the evaluated DF if _returngl)
+        HISTORY:
+           2017-11-07 - Written - agent
+        """
+        scalarOut= not isinstance(R,nu.ndarray)
+        R= nu.atleast_1d(R).astype('float')
+        logSigmaR= self.targetSurfacemass(R,log=True,use_physical=False)
+        sigmaR2= self.targetSigma2(R,use_physical=False)
+        sigmaR1= nu.sqrt(sigmaR2)
+        logsigmaR2= nu.log(sigmaR2)
+        if relative:
+            norm= 1.
+        else:
+            norm= nu.exp(logSigmaR+logsigmaR2*(n+m)/2.)/self._gamma**m
+        #Use the asymmetric drift equation to estimate va
+        va= sigmaR2/2./R**self._beta*(1./self._gamma**2.-1.
+                                      -R*self._surfaceSigmaProfile.surfacemassDerivative(R,log=True)
+                                      -R*self._surfaceSigmaProfile.sigma2Derivative(R,log=True))
+        va[nu.fabs(va) > sigmaR1]= 0. #To avoid craziness near the center
+        if ngl == _DEFAULTNGL:
+            glx, glw= self._glxdef, self._glwdef
+        else:
+            glx, glw= nu.polynomial.legendre.leggauss(ngl)
+        #Velocities in units of sigmaR1 (vR) and sigmaR1/gamma (vT) on the
+        #grid, indexed as [R,vR,vT]
+        vRgl= nsigma*glx[None,:,None]
+        vTgl= (self._gamma*(R**self._beta-va)/sigmaR1)[:,None,None]\
+            +nsigma*glx[None,None,:]
+        vR= vRgl*sigmaR1[:,None,None]
+        vT= vTgl*(sigmaR1/self._gamma)[:,None,None]
+        if _glqeval is None:
+            E,L= nu.broadcast_arrays(*vRvTRToEL(vR,vT,R[:,None,None],
+                                                self._beta))
+            shape= E.shape
+            _glqeval= nu.real(self.eval(E.flatten(),L.flatten(),
+                                        nu.tile(logSigmaR[:,None,None],
+                                                (1,ngl,ngl)).flatten(),
+                                        nu.tile(logsigmaR2[:,None,None],
+                                                (1,ngl,ngl)).flatten()))\
+                                                .reshape(shape)\
+                                                *2.*nu.pi/self._gamma
+        integrand= _glqeval*vRgl**n*vTgl**m
+        if not deriv is None:
+            if deriv.lower() == 'r':
+                integrand= integrand*self._dlnfdR(R[:,None,None],vR,vT)
+            else:
+                integrand= integrand*0.
+        out= nu.sum(integrand*glw[None,:,None]*glw[None,None,:],axis=(1,2))\
+            *nsigma**2./nu.pi*norm/2.
+        if scalarOut:
+            out= out[0]
+        if _returngl:
+            return (out,_glqeval)
+        else:
+            return out
+
+    def _surfacemassGLqeval(self,R,romberg,nsigma,gl,ngl):
+        """Surface mass and, when using Gauss-Legendre integration, the DF evaluated on the Gauss-Legendre grid, such that other moments can re-use it"""
+        if gl:
+            return self._vmomentsurfacemass(R,0,0,nsigma=nsigma,gl=True,
+                                            ngl=ngl,_returngl=True)
+        else:
+            return (self.surfacemass(R,romberg=romberg,nsigma=nsigma,
+                                     use_physical=False),None)
+
     @potential_physical_input
     @physical_conversion('frequency_kmskpc',pop=True)
-    def oortA(self,R,romberg=False,nsigma=None,phi=0.):
+    def oortA(self,R,romberg=False,nsigma=None,phi=0.,
+              gl=False,ngl=_DEFAULTNGL):
         """
 
         NAME:
@@ -1014,6 +1136,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            Oort A at R
@@ -1028,6 +1154,23 @@ class diskdf(df):
 
         """
         #2A= meanvphi/R-dmeanvR/R/dphi-dmeanvphi/dR
+        if gl:
+            surfmass, glqeval= self._vmomentsurfacemass(R,0,0,nsigma=nsigma,
+                                                        gl=True,ngl=ngl,
+                                                        _returngl=True)
+            meanvphi= self._vmomentsurfacemass(R,0,1,nsigma=nsigma,gl=True,
+                                               ngl=ngl,_glqeval=glqeval)\
+                                               /surfmass
+            dmeanvphidR= (self._vmomentsurfacemass(R,0,1,deriv='R',
+                                                   nsigma=nsigma,gl=True,
+                                                   ngl=ngl,_glqeval=glqeval)
+                          -meanvphi\
+                              *self._vmomentsurfacemass(R,0,0,deriv='R',
+                                                        nsigma=nsigma,
+                                                        gl=True,ngl=ngl,
+                                                        _glqeval=glqeval))\
+                                                        /surfmass
+            return 0.5*(meanvphi/R-dmeanvphidR)
         meanvphi= self.meanvT(R,romberg=romberg,nsigma=nsigma,phi=phi,
                               use_physical=False)
         dmeanvRRdphi= 0. #We know this, since the DF does not depend on phi
@@ -1041,7 +1184,8 @@ class diskdf(df):
 
     @potential_physical_input
     @physical_conversion('frequency_kmskpc',pop=True)
-    def oortB(self,R,romberg=False,nsigma=None,phi=0.):
+    def oortB(self,R,romberg=False,nsigma=None,phi=0.,
+              gl=False,ngl=_DEFAULTNGL):
         """
         NAME:
 
@@ -1063,6 +1207,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            Oort B at R
@@ -1077,6 +1225,23 @@ class diskdf(df):
 
         """
         #2B= -meanvphi/R+dmeanvR/R/dphi-dmeanvphi/dR
+        if gl:
+            surfmass, glqeval= self._vmomentsurfacemass(R,0,0,nsigma=nsigma,
+                                                        gl=True,ngl=ngl,
+                                                        _returngl=True)
+            meanvphi= self._vmomentsurfacemass(R,0,1,nsigma=nsigma,gl=True,
+                                               ngl=ngl,_glqeval=glqeval)\
+                                               /surfmass
+            dmeanvphidR= (self._vmomentsurfacemass(R,0,1,deriv='R',
+                                                   nsigma=nsigma,gl=True,
+                                                   ngl=ngl,_glqeval=glqeval)
+                          -meanvphi\
+                              *self._vmomentsurfacemass(R,0,0,deriv='R',
+                                                        nsigma=nsigma,
+                                                        gl=True,ngl=ngl,
+                                                        _glqeval=glqeval))\
+                                                        /surfmass
+            return 0.5*(-meanvphi/R-dmeanvphidR)
         meanvphi= self.meanvT(R,romberg=romberg,nsigma=nsigma,phi=phi,
                               use_physical=False)
         dmeanvRRdphi= 0. #We know this, since the DF does not depend on phi
@@ -1090,7 +1255,8 @@ class diskdf(df):
 
     @potential_physical_input
     @physical_conversion('frequency_kmskpc',pop=True)
-    def oortC(self,R,romberg=False,nsigma=None,phi=0.):
+    def oortC(self,R,romberg=False,nsigma=None,phi=0.,
+              gl=False,ngl=_DEFAULTNGL):
         """
         NAME:
 
@@ -1112,6 +1278,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            Oort C at R
@@ -1127,6 +1297,9 @@ class diskdf(df):
 
         """
         #2C= -meanvR/R-dmeanvphi/R/dphi+dmeanvR/dR
+        if gl: #<vR> and its derivative are zero because f is even in vR
+            return 0.*self._vmomentsurfacemass(R,0,0,nsigma=nsigma,gl=True,
+                                               ngl=ngl)
         meanvr= self.meanvR(R,romberg=romberg,nsigma=nsigma,phi=phi,
                             use_physical=False)
         dmeanvphiRdphi= 0. #We know this, since the DF does not depend on phi
@@ -1137,7 +1310,8 @@ class diskdf(df):
 
     @potential_physical_input
     @physical_conversion('frequency_kmskpc',pop=True)
-    def oortK(self,R,romberg=False,nsigma=None,phi=0.):
+    def oortK(self,R,romberg=False,nsigma=None,phi=0.,
+              gl=False,ngl=_DEFAULTNGL):
         """
         NAME:
 
@@ -1159,6 +1333,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            Oort K at R
@@ -1174,6 +1352,9 @@ class diskdf(df):
 
         """
         #2K= meanvR/R+dmeanvphi/R/dphi+dmeanvR/dR
+        if gl: #<vR> and its derivative are zero because f is even in vR
+            return 0.*self._vmomentsurfacemass(R,0,0,nsigma=nsigma,gl=True,
+                                               ngl=ngl)
         meanvr= self.meanvR(R,romberg=romberg,nsigma=nsigma,phi=phi,
                             use_physical=False)
         dmeanvphiRdphi= 0. #We know this, since the DF does not depend on phi
@@ -1184,7 +1365,8 @@ class diskdf(df):
 
     @potential_physical_input
     @physical_conversion('velocity2',pop=True)        
-    def sigma2(self,R,romberg=False,nsigma=None,phi=0.):
+    def sigma2(self,R,romberg=False,nsigma=None,phi=0.,
+               gl=False,ngl=_DEFAULTNGL):
         """
         NAME:
 
@@ -1206,6 +1388,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            sigma_R^2 at R
@@ -1215,12 +1401,19 @@ class diskdf(df):
            2010-03-XX - Written - Bovy (NYU)
 
         """
+        if gl:
+            surfmass, glqeval= self._vmomentsurfacemass(R,0,0,nsigma=nsigma,
+                                                        gl=True,ngl=ngl,
+                                                        _returngl=True)
+            return self._vmomentsurfacemass(R,2,0,nsigma=nsigma,gl=True,
+                                            ngl=ngl,_glqeval=glqeval)/surfmass
         return self.sigma2surfacemass(R,romberg,nsigma,use_physical=False)\
             /self.surfacemass(R,romberg,nsigma,use_physical=False)
 
     @potential_physical_input
     @physical_conversion('velocity2',pop=True)        
-    def sigmaT2(self,R,romberg=False,nsigma=None,phi=0.):
+    def sigmaT2(self,R,romberg=False,nsigma=None,phi=0.,
+                gl=False,ngl=_DEFAULTNGL):
         """
 
         NAME:
@@ -1243,6 +1436,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            sigma_T^2 at R
@@ -1252,16 +1449,18 @@ class diskdf(df):
            2011-03-30 - Written - Bovy (NYU)
 
         """
-        surfmass= self.surfacemass(R,romberg=romberg,nsigma=nsigma,
-                                   use_physical=False)
-        return (self._vmomentsurfacemass(R,0,2,romberg=romberg,nsigma=nsigma)
-                -self._vmomentsurfacemass(R,0,1,romberg=romberg,nsigma=nsigma)\
+        surfmass, glqeval= self._surfacemassGLqeval(R,romberg,nsigma,gl,ngl)
+        return (self._vmomentsurfacemass(R,0,2,romberg=romberg,nsigma=nsigma,
+                                         gl=gl,ngl=ngl,_glqeval=glqeval)
+                -self._vmomentsurfacemass(R,0,1,romberg=romberg,nsigma=nsigma,
+                                          gl=gl,ngl=ngl,_glqeval=glqeval)\
                     **2.\
                     /surfmass)/surfmass
 
     @potential_physical_input
     @physical_conversion('velocity2',pop=True)        
-    def sigmaR2(self,R,romberg=False,nsigma=None,phi=0.):
+    def sigmaR2(self,R,romberg=False,nsigma=None,phi=0.,
+                gl=False,ngl=_DEFAULTNGL):
         """
         NAME:
 
@@ -1283,6 +1482,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            sigma_R^2 at R
@@ -1292,11 +1495,13 @@ class diskdf(df):
            2011-03-30 - Written - Bovy (NYU)
 
         """
-        return self.sigma2(R,romberg=romberg,nsigma=nsigma,use_physical=False)
+        return self.sigma2(R,romberg=romberg,nsigma=nsigma,gl=gl,ngl=ngl,
+                           use_physical=False)
 
     @potential_physical_input
     @physical_conversion('velocity',pop=True)
-    def meanvT(self,R,romberg=False,nsigma=None,phi=0.):
+    def meanvT(self,R,romberg=False,nsigma=None,phi=0.,
+               gl=False,ngl=_DEFAULTNGL):
         """
         NAME:
 
@@ -1318,6 +1523,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            <vT> at R
@@ -1327,13 +1536,15 @@ class diskdf(df):
            2011-03-30 - Written - Bovy (NYU)
 
         """
-        return self._vmomentsurfacemass(R,0,1,romberg=romberg,nsigma=nsigma)\
-            /self.surfacemass(R,romberg=romberg,nsigma=nsigma,
-                              use_physical=False)
+        surfmass, glqeval= self._surfacemassGLqeval(R,romberg,nsigma,gl,ngl)
+        return self._vmomentsurfacemass(R,0,1,romberg=romberg,nsigma=nsigma,
+                                        gl=gl,ngl=ngl,_glqeval=glqeval)\
+                                        /surfmass
 
     @potential_physical_input
     @physical_conversion('velocity',pop=True)
-    def meanvR(self,R,romberg=False,nsigma=None,phi=0.):
+    def meanvR(self,R,romberg=False,nsigma=None,phi=0.,
+               gl=False,ngl=_DEFAULTNGL):
         """
         NAME:
 
@@ -1355,6 +1566,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            <vR> at R
@@ -1364,12 +1579,14 @@ class diskdf(df):
            2011-03-30 - Written - Bovy (NYU)
 
         """
-        return self._vmomentsurfacemass(R,1,0,romberg=romberg,nsigma=nsigma)\
-            /self.surfacemass(R,romberg=romberg,nsigma=nsigma,
-                              use_physical=False)
+        surfmass, glqeval= self._surfacemassGLqeval(R,romberg,nsigma,gl,ngl)
+        return self._vmomentsurfacemass(R,1,0,romberg=romberg,nsigma=nsigma,
+                                        gl=gl,ngl=ngl,_glqeval=glqeval)\
+                                        /surfmass
 
     @potential_physical_input
-    def skewvT(self,R,romberg=False,nsigma=None,phi=0.):
+    def skewvT(self,R,romberg=False,nsigma=None,phi=0.,
+               gl=False,ngl=_DEFAULTNGL):
         """
         NAME:
 
@@ -1391,6 +1608,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            skewvT
@@ -1400,19 +1621,22 @@ class diskdf(df):
            2011-12-07 - Written - Bovy (NYU)
 
         """
-        surfmass= self.surfacemass(R,romberg=romberg,nsigma=nsigma,
-                                   use_physical=False)
-        vt= self._vmomentsurfacemass(R,0,1,romberg=romberg,nsigma=nsigma)\
+        surfmass, glqeval= self._surfacemassGLqeval(R,romberg,nsigma,gl,ngl)
+        vt= self._vmomentsurfacemass(R,0,1,romberg=romberg,nsigma=nsigma,
+                                     gl=gl,ngl=ngl,_glqeval=glqeval)\
             /surfmass
-        vt2= self._vmomentsurfacemass(R,0,2,romberg=romberg,nsigma=nsigma)\
+        vt2= self._vmomentsurfacemass(R,0,2,romberg=romberg,nsigma=nsigma,
+                                     gl=gl,ngl=ngl,_glqeval=glqeval)\
             /surfmass
-        vt3= self._vmomentsurfacemass(R,0,3,romberg=romberg,nsigma=nsigma)\
+        vt3= self._vmomentsurfacemass(R,0,3,romberg=romberg,nsigma=nsigma,
+                                     gl=gl,ngl=ngl,_glqeval=glqeval)\
             /surfmass
         s2= vt2-vt**2.
         return (vt3-3.*vt*vt2+2.*vt**3.)*s2**(-1.5)
 
     @potential_physical_input
-    def skewvR(self,R,romberg=False,nsigma=None,phi=0.):
+    def skewvR(self,R,romberg=False,nsigma=None,phi=0.,
+               gl=False,ngl=_DEFAULTNGL):
         """
         NAME:
 
@@ -1434,6 +1658,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            skewvR
@@ -1443,19 +1671,22 @@ class diskdf(df):
            2011-12-07 - Written - Bovy (NYU)
 
         """
-        surfmass= self.surfacemass(R,romberg=romberg,nsigma=nsigma,
-                                   use_physical=False)
-        vr= self._vmomentsurfacemass(R,1,0,romberg=romberg,nsigma=nsigma)\
+        surfmass, glqeval= self._surfacemassGLqeval(R,romberg,nsigma,gl,ngl)
+        vr= self._vmomentsurfacemass(R,1,0,romberg=romberg,nsigma=nsigma,
+                                     gl=gl,ngl=ngl,_glqeval=glqeval)\
             /surfmass
-        vr2= self._vmomentsurfacemass(R,2,0,romberg=romberg,nsigma=nsigma)\
+        vr2= self._vmomentsurfacemass(R,2,0,romberg=romberg,nsigma=nsigma,
+                                     gl=gl,ngl=ngl,_glqeval=glqeval)\
             /surfmass
-        vr3= self._vmomentsurfacemass(R,3,0,romberg=romberg,nsigma=nsigma)\
+        vr3= self._vmomentsurfacemass(R,3,0,romberg=romberg,nsigma=nsigma,
+                                     gl=gl,ngl=ngl,_glqeval=glqeval)\
             /surfmass
         s2= vr2-vr**2.
         return (vr3-3.*vr*vr2+2.*vr**3.)*s2**(-1.5)
 
     @potential_physical_input
-    def kurtosisvT(self,R,romberg=False,nsigma=None,phi=0.):
+    def kurtosisvT(self,R,romberg=False,nsigma=None,phi=0.,
+                   gl=False,ngl=_DEFAULTNGL):
         """
         NAME:
 
@@ -1477,6 +1708,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            kurtosisvT
@@ -1486,21 +1721,25 @@ class diskdf(df):
            2011-12-07 - Written - Bovy (NYU)
 
         """
-        surfmass= self.surfacemass(R,romberg=romberg,nsigma=nsigma,
-                                   use_physical=False)
-        vt= self._vmomentsurfacemass(R,0,1,romberg=romberg,nsigma=nsigma)\
+        surfmass, glqeval= self._surfacemassGLqeval(R,romberg,nsigma,gl,ngl)
+        vt= self._vmomentsurfacemass(R,0,1,romberg=romberg,nsigma=nsigma,
+                                     gl=gl,ngl=ngl,_glqeval=glqeval)\
             /surfmass
-        vt2= self._vmomentsurfacemass(R,0,2,romberg=romberg,nsigma=nsigma)\
+        vt2= self._vmomentsurfacemass(R,0,2,romberg=romberg,nsigma=nsigma,
+                                     gl=gl,ngl=ngl,_glqeval=glqeval)\
             /surfmass
-        vt3= self._vmomentsurfacemass(R,0,3,romberg=romberg,nsigma=nsigma)\
+        vt3= self._vmomentsurfacemass(R,0,3,romberg=romberg,nsigma=nsigma,
+                                     gl=gl,ngl=ngl,_glqeval=glqeval)\
             /surfmass
-        vt4= self._vmomentsurfacemass(R,0,4,romberg=romberg,nsigma=nsigma)\
+        vt4= self._vmomentsurfacemass(R,0,4,romberg=romberg,nsigma=nsigma,
+                                     gl=gl,ngl=ngl,_glqeval=glqeval)\
             /surfmass
         s2= vt2-vt**2.
         return (vt4-4.*vt*vt3+6.*vt**2.*vt2-3.*vt**4.)*s2**(-2.)-3.
 
     @potential_physical_input
-    def kurtosisvR(self,R,romberg=False,nsigma=None,phi=0.):
+    def kurtosisvR(self,R,romberg=False,nsigma=None,phi=0.,
+                   gl=False,ngl=_DEFAULTNGL):
         """
         NAME:
 
@@ -1522,6 +1761,10 @@ class diskdf(df):
 
            romberg - if True, use a romberg integrator (default: False)
 
+           gl - if True, use fixed-order Gauss-Legendre integration over the velocities, which is vectorized in R (default: False)
+
+           ngl - order of the Gauss-Legendre integration (default: 20)
+
         OUTPUT:
 
            kurtosisvR
@@ -1531,15 +1774,18 @@ class diskdf(df):
            2011-12-07 - Written - Bovy (NYU)
 
         """
-        surfmass= self.surfacemass(R,romberg=romberg,nsigma=nsigma,
-                                   use_physical=False)
-        vr= self._vmomentsurfacemass(R,1,0,romberg=romberg,nsigma=nsigma)\
+        surfmass, glqeval= self._surfacemassGLqeval(R,romberg,nsigma,gl,ngl)
+        vr= self._vmomentsurfacemass(R,1,0,romberg=romberg,nsigma=nsigma,
+                                     gl=gl,ngl=ngl,_glqeval=glqeval)\
             /surfmass
-        vr2= self._vmomentsurfacemass(R,2,0,romberg=romberg,nsigma=nsigma)\
+        vr2= self._vmomentsurfacemass(R,2,0,romberg=romberg,nsigma=nsigma,
+                                     gl=gl,ngl=ngl,_glqeval=glqeval)\
             /surfmass
-        vr3= self._vmomentsurfacemass(R,3,0,romberg=romberg,nsigma=nsigma)\
+        vr3= self._vmomentsurfacemass(R,3,0,romberg=romberg,nsigma=nsigma,
+                                     gl=gl,ngl=ngl,_glqeval=glqeval)\
             /surfmass
-        vr4= self._vmomentsurfacemass(R,4,0,romberg=romberg,nsigma=nsigma)\
+        vr4= self._vmomentsurfacemass(R,4,0,romberg=romberg,nsigma=nsigma,
+                                     gl=gl,ngl=ngl,_glqeval=glqeval)\
             /surfmass
         s2= vr2-vr**2.
         return (vr4-4.*vr*vr3+6.*vr**2.*vr2-3.*vr**4.)*s2**(-2.)-3.
@@ -1571,8 +1817,70 @@ class diskdf(df):
         TR= aA.TR()
         return (2.*math.pi/TR,rap,rperi)
 
+    def _sampleRvRvT(self,E,L,nphi=1,rrange=None,returnOrbit=False):
+        """
+        NAME:
+           _sampleRvRvT
+        PURPOSE:
+           sample (R,vR,vT[,phi]) for orbits with energies E and angular momenta L at a random radial phase, including the kappa/wR multiplicity of each (E,L)
+        INPUT:
+           E - energies (array)
+           L - angular momenta (array)
+           nphi - number of azimuths to sample for each E,L
+           rrange - if set, only return samples with R in this range
+           returnOrbit - if True, also sample phi
+        OUTPUT:
+           array [N,3] of (R,vR,vT) or [N,4] of (R,vR,vT,phi)
+        HISTORY:
+           2017-10-31 - Written based on the per-sample orbit integration in sample - agent
+        """
+        R, vR, vT, wR= [], [], [], []
+        for ii in range(0,len(E),_SAMPLECHUNK):
+            tR, tvR, tvT, twR= _sampleRadialPhase(E[ii:ii+_SAMPLECHUNK],
+                                                  L[ii:ii+_SAMPLECHUNK],
+                                                  self._beta)
+            R.append(tR)
+            vR.append(tvR)
+            vT.append(tvT)
+            wR.append(twR)
+        R= nu.concatenate(R)
+        vR= nu.concatenate(vR)
+        vT= nu.concatenate(vT)
+        wR= nu.concatenate(wR)
+        indx= True^nu.isnan(R)
+        if not rrange is None:
+            indx*= (R >= rrange[0])*(R <= rrange[1])
+        R, vR, vT, wR= R[indx], vR[indx], vT[indx], wR[indx]
+        #Each (E,L) represents kappa/wR*nphi points
+        kappawR= _kappa(R,self._beta)/wR*nphi
+        mult= nu.ceil(kappawR)-1.
+        kappawR-= mult
+        mult+= (stats.uniform.rvs(size=len(R)) <= kappawR)
+        mult= mult.astype('int')
+        out= nu.array([nu.repeat(R,mult),nu.repeat(vR,mult),
+                       nu.repeat(vT,mult)]).T
+        if returnOrbit:
+            out= nu.hstack((out,stats.uniform.rvs(size=(len(out),1))*2.*math.pi))
+        return out
+
+    def _sampleOutput(self,out,orbits,returnArray,use_physical):
+        """Convert the sampled array of (R,vR,vT[,phi]) to the output of sample"""
+        if not orbits:
+            return out
+        if returnArray:
+            if use_physical and self._roSet and self._voSet:
+                out= copy.copy(out)
+                out[:,0]*= self._ro
+                out[:,1:3]*= self._vo
+            return out
+        out= [Orbit(vxvv) for vxvv in out]
+        if use_physical and self._roSet and self._voSet:
+            dum= [o.turn_physical_on(ro=self._ro,vo=self._vo) for o in out]
+        return out
+
     def sample(self,n=1,rrange=None,returnROrbit=True,returnOrbit=False,
-               nphi=1.,los=None,losdeg=True,nsigma=None,maxd=None,target=True):
+               nphi=1.,los=None,losdeg=True,nsigma=None,maxd=None,target=True,
+               returnArray=False):
         """
         NAME:
 
@@ -1605,9 +1913,11 @@ class diskdf(df):
 
            maxd= maximum distance to consider (for the rejection sampling)
 
+           returnArray= if True, return an array [n*nphi,3] of (R,vR,vT) (returnROrbit) or [n*nphi,4] of (R,vR,vT,phi) (returnOrbit) rather than a list of planar(R)Orbits (in physical units if ro and vo are set)
+
         OUTPUT:
 
-           n*nphi list of [[E,Lz],...] or list of planar(R)Orbits
+           n*nphi list of [[E,Lz],...] or list of planar(R)Orbits (or array, see returnArray)
 
            CAUTION: lists of EL need to be post-processed to account for the 
                     \kappa/\omega_R discrepancy
@@ -1805,7 +2115,7 @@ class dehnendf(diskdf):
     def sample(self,n=1,rrange=None,returnROrbit=True,returnOrbit=False,
                nphi=1.,los=None,losdeg=True,nsigma=None,targetSurfmass=True,
                targetSigma2=True,
-               maxd=None,**kwargs):
+               maxd=None,returnArray=False,**kwargs):
         """
         NAME:
            sample
@@ -1826,12 +2136,14 @@ class dehnendf(diskdf):
                    (default=True)
            nsigma= number of sigma to rejection-sample on
            maxd= maximum distance to consider (for the rejection sampling)
+           returnArray= if True, return an array [n*nphi,3] of (R,vR,vT) (returnROrbit) or [n*nphi,4] of (R,vR,vT,phi) (returnOrbit) rather than a list of planar(R)Orbits (in physical units if ro and vo are set)
         OUTPUT:
-           n*nphi list of [[E,Lz],...] or list of planar(R)Orbits
+           n*nphi list of [[E,Lz],...] or list of planar(R)Orbits (or array, see returnArray)
            CAUTION: lists of EL need to be post-processed to account for the 
                     \kappa/\omega_R discrepancy; EL not returned in physical units        
         HISTORY:
            2010-07-10 - Started  - Bovy (NYU)
+           2017-10-31 - Sample the radial phase of all samples at once rather than by integrating each orbit; added returnArray - agent
         """
         if not los is None:
             return self.sampleLOS(los,deg=losdeg,n=n,maxd=maxd,
@@ -1839,15 +2151,11 @@ class dehnendf(diskdf):
                                   targetSigma2=targetSigma2)
         #First sample xE
         if self._correct:
-            xE= sc.array(bovy_ars([0.,0.],[True,False],[0.05,2.],_ars_hx,
-                                  _ars_hpx,nsamples=n,
-                                  hxparams=(self._surfaceSigmaProfile,
-                                            self._corr)))
+            hxparams= (self._surfaceSigmaProfile,self._corr)
         else:
-            xE= sc.array(bovy_ars([0.,0.],[True,False],[0.05,2.],_ars_hx,
-                                  _ars_hpx,nsamples=n,
-                                  hxparams=(self._surfaceSigmaProfile,
-                                            None)))
+            hxparams= (self._surfaceSigmaProfile,None)
+        xE= sc.array(bovy_ars([0.,0.],[True,False],_ars_abcissae(hxparams),
+                              _ars_hx,_ars_hpx,nsamples=n,hxparams=hxparams))
         #Calculate E
         if self._beta == 0.:
             E= sc.log(xE)+0.5
@@ -1867,62 +2175,23 @@ class dehnendf(diskdf):
                     and _APY_LOADED and isinstance(rrange[0],units.Quantity):
                 rrange[0]= rrange[0].to(units.kpc).value/self._ro
                 rrange[1]= rrange[1].to(units.kpc).value/self._ro
-            if not hasattr(self,'_psp'):
-                self._psp= PowerSphericalPotential(alpha=2.-self._beta,normalize=True).toPlanar()
-            out= []
-            for ii in range(int(n)):
-                try:
-                    wR, rap, rperi= self._ELtowRRapRperi(E[ii],Lz[ii])
-                except ValueError:
-                    continue
-                TR= 2.*math.pi/wR
-                tr= stats.uniform.rvs()*TR
-                if tr > TR/2.:
-                    tr-= TR/2.
-                    thisOrbit= Orbit([rperi,0.,Lz[ii]/rperi])
-                else:
-                    thisOrbit= Orbit([rap,0.,Lz[ii]/rap])
-                thisOrbit.integrate(sc.array([0.,tr]),self._psp)
-                if returnOrbit:
-                    vxvv= thisOrbit(tr)._orb.vxvv
-                    thisOrbit= Orbit(vxvv=sc.array([vxvv[0],vxvv[1],vxvv[2],
-                                                    stats.uniform.rvs()\
-                                                        *math.pi*2.])\
-                                         .reshape(4))
-                else:
-                    thisOrbit= thisOrbit(tr)
-                kappa= _kappa(thisOrbit._orb.vxvv[0],self._beta)
-                if not rrange == None:
-                    if thisOrbit._orb.vxvv[0] < rrange[0] \
-                            or thisOrbit._orb.vxvv[0] > rrange[1]:
-                        continue
-                mult= sc.ceil(kappa/wR*nphi)-1.
-                kappawR= kappa/wR*nphi-mult
-                while mult > 0:
-                    if returnOrbit:
-                        out.append(Orbit(vxvv=sc.array([vxvv[0],vxvv[1],
-                                                            vxvv[2],
-                                                            stats.uniform.rvs()*math.pi*2.]).reshape(4)))
-                    else:
-                        out.append(thisOrbit)
-                    mult-= 1
-                if stats.uniform.rvs() > kappawR:
-                    continue
-                out.append(thisOrbit)
+            out= self._sampleRvRvT(E,Lz,nphi=nphi,rrange=rrange,
+                                   returnOrbit=returnOrbit)
         #Recurse to get enough
         if len(out) < n*nphi:
-            out.extend(self.sample(n=int(n-len(out)/nphi),rrange=rrange,
-                                   returnROrbit=returnROrbit,
-                                   returnOrbit=returnOrbit,nphi=int(nphi),
-                                   los=los,losdeg=losdeg))
+            more= self.sample(n=int(n-len(out)/nphi),rrange=rrange,
+                              returnROrbit=returnROrbit,
+                              returnOrbit=returnOrbit,nphi=int(nphi),
+                              returnArray=True,use_physical=False)
+            if isinstance(out,list):
+                out.extend(more)
+            else:
+                out= nu.vstack((out,more))
         if len(out) > n*nphi:
-            print(n, nphi, n*nphi)
             out= out[0:int(n*nphi)]
-        if kwargs.get('use_physical',True) and \
-                self._roSet and self._voSet:
-            if isinstance(out[0],Orbit):
-                dum= [o.turn_physical_on(ro=self._ro,vo=self._vo) for o in out]
-        return out
+        return self._sampleOutput(out,returnROrbit or returnOrbit,
+                                  returnArray,
+                                  kwargs.get('use_physical',True))
 
 class shudf(diskdf):
     """Shu's df (1969)"""
@@ -1988,6 +2257,7 @@ class shudf(diskdf):
            DF(E,L)
         HISTORY:
            2010-05-09 - Written - Bovy (NYU)
+           2017-11-07 - Allow arrays of E and L - agent
         """
         if _APY_LOADED and isinstance(E,units.Quantity):
             E= E.to(units.km**2/units.s**2).value/self._vo**2.
@@ -2000,18 +2270,26 @@ class shudf(diskdf):
         else: #non-flat rotation curve
             xL= L**(1./(self._beta+1.))
             logECLE= sc.log(-0.5*(1./self._beta+1.)*xL**(2.*self._beta)+E)
-        if xL < 0.: #We must remove counter-rotating mass
+        if isinstance(L,nu.ndarray):
+            counter= L < 0. #We must remove counter-rotating mass
+            xL= copy.copy(xL)
+            xL[counter]= 1.
+        elif xL < 0.: #We must remove counter-rotating mass
             return 0.
         if self._correct: 
             correction= self._corr.correct(xL,log=True)
         else:
             correction= sc.zeros(2)
         SRE2= self.targetSigma2(xL,log=True,use_physical=False)+correction[1]
-        return self._gamma*sc.exp(logsigmaR2-SRE2+self.targetSurfacemass(xL,log=True,use_physical=False)-logSigmaR-sc.exp(logECLE-SRE2)+correction[0])/2./nu.pi
+        out= self._gamma*sc.exp(logsigmaR2-SRE2+self.targetSurfacemass(xL,log=True,use_physical=False)-logSigmaR-sc.exp(logECLE-SRE2)+correction[0])/2./nu.pi
+        if isinstance(L,nu.ndarray):
+            out[counter]= 0.
+        return out
 
     def sample(self,n=1,rrange=None,returnROrbit=True,returnOrbit=False,
                nphi=1.,los=None,losdeg=True,nsigma=None,maxd=None,
-               targetSurfmass=True,targetSigma2=True,**kwargs):
+               targetSurfmass=True,targetSigma2=True,returnArray=False,
+               **kwargs):
         """
         NAME:
            sample
@@ -2032,12 +2310,14 @@ class shudf(diskdf):
                    (default=True)
            nsigma= number of sigma to rejection-sample on
            maxd= maximum distance to consider (for the rejection sampling)
+           returnArray= if True, return an array [n*nphi,3] of (R,vR,vT) (returnROrbit) or [n*nphi,4] of (R,vR,vT,phi) (returnOrbit) rather than a list of planar(R)Orbits (in physical units if ro and vo are set)
         OUTPUT:
-           n*nphi list of [[E,Lz],...] or list of planar(R)Orbits
+           n*nphi list of [[E,Lz],...] or list of planar(R)Orbits (or array, see returnArray)
            CAUTION: lists of EL need to be post-processed to account for the 
                     \kappa/\omega_R discrepancy
         HISTORY:
            2010-07-10 - Started  - Bovy (NYU)
+           2017-10-31 - Sample the radial phase of all samples at once rather than by integrating each orbit; added returnArray - agent
         """
         if not los is None:
             return self.sampleLOS(los,n=n,maxd=maxd,
@@ -2045,15 +2325,11 @@ class shudf(diskdf):
                                   targetSigma2=targetSigma2)
         #First sample xL
         if self._correct:
-            xL= sc.array(bovy_ars([0.,0.],[True,False],[0.05,2.],_ars_hx,
-                                  _ars_hpx,nsamples=n,
-                                  hxparams=(self._surfaceSigmaProfile,
-                                            self._corr)))
+            hxparams= (self._surfaceSigmaProfile,self._corr)
         else:
-            xL= sc.array(bovy_ars([0.,0.],[True,False],[0.05,2.],_ars_hx,
-                                  _ars_hpx,nsamples=n,
-                                  hxparams=(self._surfaceSigmaProfile,
-                                            None)))
+            hxparams= (self._surfaceSigmaProfile,None)
+        xL= sc.array(bovy_ars([0.,0.],[True,False],_ars_abcissae(hxparams),
+                              _ars_hx,_ars_hpx,nsamples=n,hxparams=hxparams))
         #Calculate Lz
         Lz= xL**(self._beta+1.)
         #Then sample E
@@ -2072,58 +2348,23 @@ class shudf(diskdf):
                     and _APY_LOADED and isinstance(rrange[0],units.Quantity):
                 rrange[0]= rrange[0].to(units.kpc).value/self._ro
                 rrange[1]= rrange[1].to(units.kpc).value/self._ro
-            if not hasattr(self,'_psp'):
-                self._psp= PowerSphericalPotential(alpha=2.-self._beta,normalize=True).toPlanar()
-            out= []
-            for ii in range(n):
-                try:
-                    wR, rap, rperi= self._ELtowRRapRperi(E[ii],Lz[ii])
-                except ValueError: #pragma: no cover
-                    continue
-                TR= 2.*math.pi/wR
-                tr= stats.uniform.rvs()*TR
-                if tr > TR/2.:
-                    tr-= TR/2.
-                    thisOrbit= Orbit([rperi,0.,Lz[ii]/rperi])
-                else:
-                    thisOrbit= Orbit([rap,0.,Lz[ii]/rap])
-                thisOrbit.integrate(sc.array([0.,tr]),self._psp)
-                if returnOrbit:
-                    vxvv= thisOrbit(tr)._orb.vxvv
-                    thisOrbit= Orbit(vxvv=sc.array([vxvv[0],vxvv[1],vxvv[2],
-                                                    stats.uniform.rvs()*math.pi*2.]).reshape(4))
-                else:
-                    thisOrbit= thisOrbit(tr)
-                kappa= _kappa(thisOrbit._orb.vxvv[0],self._beta)
-                if not rrange == None:
-                    if thisOrbit._orb.vxvv[0] < rrange[0] \
-                            or thisOrbit._orb.vxvv[0] > rrange[1]:
-                        continue
-                mult= sc.ceil(kappa/wR*nphi)-1.
-                kappawR= kappa/wR*nphi-mult
-                while mult > 0:
-                    if returnOrbit:
-                        out.append(Orbit(vxvv=sc.array([vxvv[0],vxvv[1],
-                                                        vxvv[2],
-                                                        stats.uniform.rvs()*math.pi*2.]).reshape(4)))
-                    else:
-                        out.append(thisOrbit)
-                    mult-= 1
-                if stats.uniform.rvs() > kappawR:
-                    continue
-                out.append(thisOrbit)
+            out= self._sampleRvRvT(E,Lz,nphi=nphi,rrange=rrange,
+                                   returnOrbit=returnOrbit)
         #Recurse to get enough
         if len(out) < n*nphi:
-            out.extend(self.sample(n=int(n-len(out)/nphi),rrange=rrange,
-                                   returnROrbit=returnROrbit,
-                                   returnOrbit=returnOrbit,nphi=nphi))
+            more= self.sample(n=int(n-len(out)/nphi),rrange=rrange,
+                              returnROrbit=returnROrbit,
+                              returnOrbit=returnOrbit,nphi=nphi,
+                              returnArray=True,use_physical=False)
+            if isinstance(out,list):
+                out.extend(more)
+            else:
+                out= nu.vstack((out,more))
         if len(out) > n*nphi:
             out= out[0:int(n*nphi)]
-        if kwargs.get('use_physical',True) and \
-                self._roSet and self._voSet:
-            if isinstance(out[0],Orbit):
-                dum= [o.turn_physical_on(ro=self._ro,vo=self._vo) for o in out]
-        return out
+        return self._sampleOutput(out,returnROrbit or returnOrbit,
+                                  returnArray,
+                                  kwargs.get('use_physical',True))
 
 def _surfaceIntegrand(vR,vT,R,df,logSigmaR,logsigmaR2,sigmaR1,gamma):
     """Internal function that is the integrand for the surface mass integration"""
@@ -2202,9 +2443,12 @@ class DFcorrection(object):
            dftype - classname of the DF
            niter - number of iterations to perform to calculate the corrections
            interp_k - 'k' keyword to give to InterpolatedUnivariateSpline
+           numcores - number of cores to use to calculate the corrections in parallel (default: 1)
+           tol - if set, stop iterating once all corrections change by less than this fractional amount in an iteration; the corrections are then saved under the number of iterations reached rather than niter, together with a file recording that they converged for this tol, such that they are loaded by later calculations with the same tol (default: None)
         OUTPUT:
         HISTORY:
            2010-03-10 - Written - Bovy (NYU)
+           2017-11-10 - Added numcores and tol; save corrections after every iteration - agent
         """
         if not 'surfaceSigmaProfile' in kwargs:
             raise DFcorrectionError("surfaceSigmaProfile not given")
@@ -2223,6 +2467,8 @@ class DFcorrection(object):
         self._beta= kwargs.get('beta',0.)
         self._rs= sc.linspace(_RMIN,self._rmax,self._npoints)
         self._interp_k= kwargs.get('interp_k',_INTERPDEGREE)
+        self._numcores= kwargs.get('numcores',1)
+        self._tol= kwargs.get('tol',None)
         if 'corrections' in kwargs:
             self._corrections= kwargs['corrections']
             if not len(self._corrections) == self._npoints:
@@ -2230,6 +2476,11 @@ class DFcorrection(object):
         else:
             self._savedir= kwargs.get('savedir',_CORRECTIONSDIR)
             self._savefilename= self._createSavefilename(self._niter)
+            convergedIter= self._convergedIter()
+            if not os.path.exists(self._savefilename) \
+                    and not convergedIter is None:
+                #Corrections converged for this tol before reaching niter
+                self._savefilename= self._createSavefilename(convergedIter)
             if os.path.exists(self._savefilename):
                 savefile= open(self._savefilename,'rb')
                 self._corrections= sc.array(pickle.load(savefile))
@@ -2252,6 +2503,13 @@ class DFcorrection(object):
         return None
 
     def _createSavefilename(self,niter):
+        return self._createSavefilenameBase()+'%i.sav' % niter
+
+    def _createConvergedFilename(self):
+        """Internal function that returns the name of the file that records the iteration at which the corrections converged for self._tol"""
+        return self._createSavefilenameBase()+'converged_%g.sav' % self._tol
+
+    def _createSavefilenameBase(self):
         #Form surfaceSigmaProfile string
         sspFormat= self._surfaceSigmaProfile.formatStringParams()
         sspString= ''
@@ -2261,8 +2519,21 @@ class DFcorrection(object):
                             self._dftype.__name__+'_'+
                             self._surfaceSigmaProfile.__class__.__name__+'_'+
                             sspString % self._surfaceSigmaProfile.outputParams()+
-                            '%6.4f_%i_%6.4f_%i.sav'
-                            % (self._beta,self._npoints,self._rmax,niter))
+                            '%6.4f_%i_%6.4f_'
+                            % (self._beta,self._npoints,self._rmax))
+
+    def _convergedIter(self):
+        """Internal function that returns the iteration at which the corrections converged for self._tol, if this is at most niter and these corrections are saved, and None otherwise"""
+        if self._tol is None \
+                or not os.path.exists(self._createConvergedFilename()):
+            return None
+        convergedFile= open(self._createConvergedFilename(),'rb')
+        convergedIter= pickle.load(convergedFile)
+        convergedFile.close()
+        if convergedIter > self._niter \
+                or not os.path.exists(self._createSavefilename(convergedIter)):
+            return None
+        return convergedIter
 
     def correct(self,R,log=False):
         """
@@ -2346,7 +2617,9 @@ class DFcorrection(object):
             
 
     def _calc_corrections(self):
-        """Internal function that calculates the corrections"""     
+        """Internal function that calculates the corrections; the
+        corrections are saved after every iteration, such that an
+        interrupted calculation resumes from the last saved iteration"""
         searchIter= self._niter-1
         while searchIter > 0:
             trySavefilename= self._createSavefilename(searchIter)
@@ -2371,23 +2644,48 @@ class DFcorrection(object):
                                         rmax=self._rmax,
                                         savedir=self._savedir,
                                         interp_k=self._interp_k)
-            newcorrections= sc.zeros((self._npoints,2))
-            for jj in range(self._npoints):
-                thisSurface= currentDF.surfacemass(self._rs[jj],
-                                                   use_physical=False)
-                newcorrections[jj,0]= currentDF.targetSurfacemass(self._rs[jj],use_physical=False)/thisSurface
-                newcorrections[jj,1]= currentDF.targetSigma2(self._rs[jj],use_physical=False)*thisSurface\
-                    /currentDF.sigma2surfacemass(self._rs[jj],
-                                                 use_physical=False)
-                #print(jj, newcorrections[jj,:])
+            if self._numcores > 1:
+                #One chunk of radii per core
+                rschunks= nu.array_split(self._rs,
+                                         min(self._numcores,self._npoints))
+                newcorrections= nu.concatenate(\
+                    multi.parallel_map((lambda x: _newcorrections(\
+                                currentDF,rschunks[x])),
+                                       range(len(rschunks)),
+                                       numcores=self._numcores))
+            else:
+                newcorrections= _newcorrections(currentDF,self._rs)
             corrections*= newcorrections
-        #Save
+            #Save this iteration, such that we can resume from here; a
+            #converged result is saved under the iteration reached, not niter
+            self._save_corrections(corrections,self._createSavefilename(ii+1))
+            if not self._tol is None \
+                    and nu.all(nu.fabs(newcorrections-1.) < self._tol):
+                #Record convergence, such that later calculations with the
+                #same tol load these corrections
+                save_pickles(self._createConvergedFilename(),ii+1)
+                break
+        return corrections
+
+    def _save_corrections(self,corrections,savefilename):
+        """Internal function that saves the corrections"""
         picklethis= []
         for arr in list(corrections):
             picklethis.append([float(a) for a in arr])
-        save_pickles(self._savefilename,picklethis) #We pickle a list for platform-independence)
-        return corrections
+        save_pickles(savefilename,picklethis) #We pickle a list for platform-independence)
+        return None
     
+def _newcorrections(df,rs):
+    """Internal function that computes the multiplicative update of the 
+    corrections at radii rs from the moments of df"""
+    #Vectorized Gauss-Legendre integration over all radii at once
+    surfmass, glqeval= df._vmomentsurfacemass(rs,0,0,gl=True,_returngl=True)
+    out= nu.empty((len(rs),2))
+    out[:,0]= df.targetSurfacemass(rs,use_physical=False)/surfmass
+    out[:,1]= df.targetSigma2(rs,use_physical=False)*surfmass\
+        /df._vmomentsurfacemass(rs,2,0,gl=True,_glqeval=glqeval)
+    return out
+
 class DFcorrectionError(Exception):
     def __init__(self, value):
         self.value = value
@@ -2435,6 +2733,98 @@ def axipotential(R,beta=0.):
     else: #non-flat rotation curve
         return R**(2.*beta)/2./beta
 
+def _vR2(R,E,L,beta):
+    """Internal function that returns vR^2 at R for orbits with E,L"""
+    return 2.*(E-axipotential(R,beta))-L**2./R**2.
+
+def _ELtoRapRperi(E,L,beta):
+    """
+    NAME:
+       _ELtoRapRperi
+    PURPOSE:
+       calculate the pericenter and apocenter radii of orbits with energies E and angular momenta L in the power-law rotation-curve potential, by bisection in ln(R)
+    INPUT:
+       E - energies (array)
+       L - angular momenta (array)
+       beta - rotation curve power-law
+    OUTPUT:
+       (rperi,rap); NaN for (E,L) that do not correspond to an orbit
+    HISTORY:
+       2017-10-31 - Written - agent
+    """
+    absL= nu.maximum(nu.fabs(L),_RMIN)
+    lnrc= nu.log(absL)/(1.+beta) #radius of the circular orbit with L
+    bad= _vR2(nu.exp(lnrc),E,absL,beta) < 0.
+    out= []
+    for sign in [-1.,1.]:
+        #Bracket the turning point
+        lo= copy.copy(lnrc)
+        hi= lnrc+sign
+        notbracketed= (_vR2(nu.exp(hi),E,absL,beta) > 0.)*(True^bad)
+        while nu.any(notbracketed):
+            lo[notbracketed]= hi[notbracketed]
+            hi[notbracketed]+= sign
+            notbracketed[notbracketed]=\
+                _vR2(nu.exp(hi[notbracketed]),E[notbracketed],
+                     absL[notbracketed],beta) > 0.
+            notbracketed*= nu.fabs(hi) < -math.log(_RMIN)
+        #Bisect
+        for ii in range(60):
+            mid= 0.5*(lo+hi)
+            pos= _vR2(nu.exp(mid),E,absL,beta) > 0.
+            lo[pos]= mid[pos]
+            hi[True^pos]= mid[True^pos]
+        out.append(nu.exp(0.5*(lo+hi)))
+    out[0][bad]= nu.nan
+    out[1][bad]= nu.nan
+    return tuple(out)
+
+def _sampleRadialPhase(E,L,beta):
+    """
+    NAME:
+       _sampleRadialPhase
+    PURPOSE:
+       sample R, vR, and vT uniformly in time along the orbits with energies E and angular momenta L in the power-law rotation-curve potential
+    INPUT:
+       E - energies (array)
+       L - angular momenta (array)
+       beta - rotation curve power-law
+    OUTPUT:
+       (R,vR,vT,wR); NaN for (E,L) that do not correspond to an orbit
+    HISTORY:
+       2017-10-31 - Written - agent
+    """
+    rperi, rap= _ELtoRapRperi(E,L,beta)
+    # R = rm - dr cos(eta), with eta = 0 at pericenter and pi at apocenter;
+    # dt/deta = dr sin(eta) / vR is smooth, so the time along the orbit is
+    # computed using the midpoint rule on a grid in eta
+    rm= 0.5*(rap+rperi)
+    dr= 0.5*(rap-rperi)
+    deta= math.pi/_NSAMPLEPHASE
+    etas= (nu.arange(_NSAMPLEPHASE)+0.5)*deta
+    Rs= nu.tile(rm,(_NSAMPLEPHASE,1)).T\
+        -nu.outer(dr,nu.cos(etas))
+    vR2s= _vR2(Rs,nu.tile(E,(_NSAMPLEPHASE,1)).T,
+               nu.tile(L,(_NSAMPLEPHASE,1)).T,beta)
+    with nu.errstate(divide='ignore',invalid='ignore'):
+        dtdeta= nu.outer(dr,nu.sin(etas))/nu.sqrt(vR2s)
+    #(close to) circular orbits
+    circ= (dr < 10.**-8.*rm)+(True^nu.all(nu.isfinite(dtdeta),axis=1))
+    circ*= True^nu.isnan(rm)
+    dtdeta[circ]= (1./_kappa(rm[circ],beta))[:,None]
+    ts= nu.cumsum(dtdeta,axis=1)*deta
+    TR= 2.*ts[:,-1]
+    #Sample the time since pericenter, on the way out or in
+    t= stats.uniform.rvs(size=len(E))*TR/2.
+    vRsign= 2.*(stats.uniform.rvs(size=len(E)) < 0.5)-1.
+    indx= nu.sum(ts < t[:,None],axis=1)
+    indx[indx == _NSAMPLEPHASE]= _NSAMPLEPHASE-1
+    tindx= nu.arange(len(E))
+    eta= (indx+1.)*deta-(ts[tindx,indx]-t)/dtdeta[tindx,indx]
+    R= rm-dr*nu.cos(eta)
+    vR= vRsign*nu.sqrt(nu.maximum(_vR2(R,E,L,beta),0.))
+    return (R,vR,L/R,2.*math.pi/TR)
+
 def _ars_hx(x,args):
     """
     NAME:
@@ -2479,6 +2869,28 @@ def _ars_hpx(x,args):
     else:
         return 1./x+surfaceSigma.surfacemassDerivative(x,log=True)+dfcorr.derivLogcorrect(x)[0]
 
+def _ars_abcissae(args):
+    """
+    NAME:
+       _ars_abcissae
+    PURPOSE:
+       initial abcissae for ARS sampling of the input surfacemass profile that lie on either side of the peak of h(x), such that the upper hull is normalizable
+    INPUT:
+       args= (surfaceSigma, dfcorr)
+          surfaceSigma - surfaceSigmaProfile instance
+          dfcorr - DFcorrection instance
+    OUTPUT:
+       list of abcissae
+    HISTORY:
+       2017-11-21 - Written - agent
+    """
+    abcissae= [0.05,2.]
+    # h'(x) has to be negative at the last abcissa; for the exponential
+    # profile the peak is at x = hR
+    while _ars_hpx(abcissae[-1],args) >= 0. and abcissae[-1] < 1000.:
+        abcissae.append(2.*abcissae[-1])
+    return abcissae
+
 def _kappa(R,beta):
     """Internal function to give kappa(r)"""
     return math.sqrt(2.*(1.+beta))*R**(beta-1)
@@ -1,6 +1,7 @@
 #A 'Binney' quasi-isothermal DF
 import math
 import warnings
+from collections import OrderedDict
 import numpy
 from scipy import optimize, interpolate, integrate
 from galpy import potential
@@ -17,6 +18,39 @@ if _APY_LOADED:
 _NSIGMA=4
 _DEFAULTNGL=10
 _DEFAULTNGL2=20
+_GLCHUNK=100000 #max. number of phase-space points per action-angle call
+class _GLActionCache(object):
+    """LRU cache of the DF, actions, and frequencies evaluated on the
+    Gauss-Legendre velocity grid at (R,z), keyed on (R,z,ngl,nsigma,sigmaR1,sigmaz1)"""
+    def __init__(self,maxsize):
+        self._maxsize= maxsize
+        self._grids= OrderedDict()
+        self.hits= 0
+        self.misses= 0
+        return None
+
+    def __len__(self):
+        return len(self._grids)
+
+    def get(self,key):
+        entry= self._grids.pop(key,None)
+        if entry is None:
+            self.misses+= 1
+            return None
+        self.hits+= 1
+        self._grids[key]= entry # most recently used at the end
+        return entry
+
+    def put(self,key,entry):
+        self._grids[key]= entry
+        while len(self._grids) > self._maxsize:
+            self._grids.popitem(last=False)
+        return None
+
+    def clear(self):
+        self._grids.clear()
+        return None
+
 class quasiisothermaldf(df):
     """Class that represents a 'Binney' quasi-isothermal DF"""
     def __init__(self,hr,sr,sz,hsr,hsz,pot=None,aA=None,
@@ -24,6 +58,7 @@ class quasiisothermaldf(df):
                  _precomputerg=True,_precomputergrmax=None,
                  _precomputergnLz=51,
                  refr=1.,lo=10./220./8.,
+                 cache=0,
                  ro=None,vo=None):
         """
         NAME:
@@ -56,6 +91,8 @@ class quasiisothermaldf(df):
 
            lo= reference angular momentum below where there are significant numbers of retrograde stars (can be Quantity)
 
+           cache= (0) maximum number of Gauss-Legendre velocity grids (one per (R,z,ngl,nsigma)) for which to keep the DF, actions, and frequencies in a least-recently-used cache, such that different moments at the same location re-use the same actions
+
            ro= distance from vantage point to GC (kpc; can be Quantity)
 
            vo= circular velocity at ro (km/s; can be Quantity)
@@ -76,6 +113,8 @@ class quasiisothermaldf(df):
 
            2012-07-25 - Started - Bovy (IAS@MPIA)
 
+           2017-10-27 - Added cache= - agent
+
         """
         df.__init__(self,ro=ro,vo=vo)
         if _APY_LOADED and isinstance(hr,units.Quantity):
@@ -144,6 +183,67 @@ class quasiisothermaldf(df):
             numpy.polynomial.legendre.leggauss(_DEFAULTNGL2)
         self._glxdef12, self._glwdef12= \
             numpy.polynomial.legendre.leggauss(_DEFAULTNGL//2)
+        if cache > 0:
+            self._cache= _GLActionCache(cache)
+        else:
+            self._cache= None
+        return None
+
+    def cache_info(self):
+        """
+        NAME:
+
+           cache_info
+
+        PURPOSE:
+
+           return statistics of the cache of actions on the Gauss-Legendre velocity grids
+
+        INPUT:
+
+           (none)
+
+        OUTPUT:
+
+           dictionary with the number of hits, misses, the current number of cached grids (size), and the maximum number (maxsize)
+
+        HISTORY:
+
+           2017-10-27 - Written - agent
+
+        """
+        if self._cache is None:
+            return {'hits':0,'misses':0,'size':0,'maxsize':0}
+        return {'hits':self._cache.hits,
+                'misses':self._cache.misses,
+                'size':len(self._cache),
+                'maxsize':self._cache._maxsize}
+
+    def clear_cache(self):
+        """
+        NAME:
+
+           clear_cache
+
+        PURPOSE:
+
+           remove all grids from the cache of actions (statistics are kept)
+
+        INPUT:
+
+           (none)
+
+        OUTPUT:
+
+           (none)
+
+        HISTORY:
+
+           2017-10-27 - Written - agent
+
+        """
+        if not self._cache is None:
+            self._cache.clear()
         return None
 
     @physical_conversion('phasespacedensity',pop=True)
@@ -578,6 +678,11 @@ class quasiisothermaldf(df):
                        _sigmaR1=None,_sigmaz1=None,
                        **kwargs):
         """Non-physical version of vmomentdensity, otherwise the same"""
+        if isinstance(R,numpy.ndarray) and gl and _jr is None \
+                and not _return_actions and not _return_freqs:
+            return self._vmomentdensityGL(R,z,n,m,o,nsigma=nsigma,ngl=ngl,
+                                          _returngl=_returngl,
+                                          _glqeval=_glqeval)
         if isinstance(R,numpy.ndarray):
             return numpy.array([self._vmomentdensity(r,zz,n,m,o,nsigma=nsigma,
                                                     mc=mc,nmc=nmc,
@@ -656,16 +761,28 @@ class quasiisothermaldf(df):
             vzglw= numpy.tile(vzglw,(ngl,ngl,1))
             #evaluate
             if _glqeval is None and _jr is None:
-                logqeval, jr, lz, jz, rg, kappa, nu, Omega= self(R+numpy.zeros(ngl*ngl*ngl),
-                                           vRgl.flatten(),
-                                           vTgl.flatten(),
-                                           z+numpy.zeros(ngl*ngl*ngl),
-                                           vzgl.flatten(),
-                                           log=True,
-                                           _return_actions=True,
-                                           _return_freqs=True,
-                                           use_physical=False)
-                logqeval= numpy.reshape(logqeval,(ngl,ngl,ngl))
+                if self._cache is None:
+                    cached= None
+                else:
+                    cachekey= (float(R),float(z),ngl,float(nsigma),
+                               float(sigmaR1),float(sigmaz1))
+                    cached= self._cache.get(cachekey)
+                if cached is None:
+                    logqeval, jr, lz, jz, rg, kappa, nu, Omega= self(R+numpy.zeros(ngl*ngl*ngl),
+                                               vRgl.flatten(),
+                                               vTgl.flatten(),
+                                               z+numpy.zeros(ngl*ngl*ngl),
+                                               vzgl.flatten(),
+                                               log=True,
+                                               _return_actions=True,
+                                               _return_freqs=True,
+                                               use_physical=False)
+                    logqeval= numpy.reshape(logqeval,(ngl,ngl,ngl))
+                    if not self._cache is None:
+                        self._cache.put(cachekey,(logqeval,jr,lz,jz,
+                                                  rg,kappa,nu,Omega))
+                else:
+                    logqeval, jr, lz, jz, rg, kappa, nu, Omega= cached
             elif not _jr is None and _rg is None:
                 logqeval, jr, lz, jz, rg, kappa, nu, Omega= self((_jr,_lz,_jz),
                                                                  log=True,
@@ -740,6 +857,141 @@ class quasiisothermaldf(df):
                                      (R,z,self,sigmaR1,gamma,sigmaz1,n,m,o),
                                      **kwargs)[0]*sigmaR1**(2.+n+m)*gamma**(1.+m)*sigmaz1**(1.+o)
         
+    def _vmomentdensityGL(self,R,z,n,m,o,nsigma=None,ngl=_DEFAULTNGL,
+                          _returngl=False,_glqeval=None):
+        """
+        NAME:
+
+           _vmomentdensityGL
+
+        PURPOSE:
+
+           calculate <vR^n vT^m vz^o x density> for arrays of (R,z) using Gauss-Legendre integration, evaluating the DF on the velocity grids of all (R,z) with batched action-angle calls
+
+        INPUT:
+
+           R - radii (array)
+
+           z - heights (array or float)
+
+           n - vR^n
+
+           m - vT^m
+
+           o - vz^o
+
+           nsigma - number of sigma to integrate the velocities over
+
+           ngl - order of the Gauss-Legendre integration in each dimension
+
+           _returngl= if True, also return the log of the DF evaluated on the grids
+
+           _glqeval= log of the DF evaluated on the grids (from _returngl=True for the same (R,z), nsigma, and ngl)
+
+        OUTPUT:
+
+           <vR^n vT^m vz^o x density> at (R,z), with the shape of R (and the evaluated log DF if _returngl)
+
+        HISTORY:
+
+           2017-11-14 - Written - agent
+
+        """
+        R, z= numpy.broadcast_arrays(R,z)
+        shape= R.shape
+        R= R.flatten().astype('float')
+        z= z.flatten().astype('float')
+        if isinstance(self._aA,(actionAngle.actionAngleAdiabatic,
+                                actionAngle.actionAngleAdiabaticGrid)):
+            if n % 2 == 1. or o % 2 == 1.:
+                return numpy.zeros(shape) #we know this must be the case
+        if nsigma == None:
+            nsigma= _NSIGMA
+        if ngl % 2 == 1:
+            raise ValueError("ngl must be even")
+        if not _glqeval is None and ngl != _glqeval.shape[1]:
+            _glqeval= None
+        sigmaR1= self._sr*numpy.exp((self._refr-R)/self._hsr)
+        sigmaz1= self._sz*numpy.exp((self._refr-R)/self._hsz)
+        if ngl == _DEFAULTNGL:
+            glx, glw= self._glxdef, self._glwdef
+            glx12, glw12= self._glxdef12, self._glwdef12
+        elif ngl == _DEFAULTNGL2:
+            glx, glw= self._glxdef2, self._glwdef2
+            glx12, glw12= self._glxdef, self._glwdef
+        else:
+            glx, glw= numpy.polynomial.legendre.leggauss(ngl)
+            glx12, glw12= numpy.polynomial.legendre.leggauss(ngl//2)
+        #Velocity grids in units of sigmaR1 and sigmaz1, same as for scalar R
+        if isinstance(self._aA,(actionAngle.actionAngleAdiabatic,
+                                actionAngle.actionAngleAdiabaticGrid)):
+            vRgl= nsigma/2.*(glx+1.)
+            vzgl= nsigma/2.*(glx+1.)
+            vRglw= glw
+            vzglw= glw
+        else:
+            vRgl= numpy.hstack((nsigma/2.*(glx12+1.),-nsigma/2.*(glx12+1.)))
+            vzgl= vRgl
+            vRglw= numpy.hstack((glw12,glw12))
+            vzglw= vRglw
+        vTgl= 1.5/2.*(glx+1.)
+        #Evaluate the DF on the grids, indexed as [(R,z),vT,vR,vz]
+        if _glqeval is None:
+            logqeval= numpy.empty((len(R),ngl,ngl,ngl))
+            if self._cache is None:
+                todo= numpy.arange(len(R))
+            else:
+                cachekeys= [(float(R[ii]),float(z[ii]),ngl,float(nsigma),
+                             float(sigmaR1[ii]),float(sigmaz1[ii]))
+                            for ii in range(len(R))]
+                todo= []
+                for ii in range(len(R)):
+                    cached= self._cache.get(cachekeys[ii])
+                    if cached is None: todo.append(ii)
+                    else: logqeval[ii]= cached[0]
+                todo= numpy.array(todo,dtype='int')
+            nchunk= max(_GLCHUNK//ngl**3,1)
+            for ii in range(0,len(todo),nchunk):
+                indx= todo[ii:ii+nchunk]
+                tR, tvR, tvT, tz, tvz= \
+                    numpy.broadcast_arrays(R[indx,None,None,None],
+                                           (sigmaR1[indx,None,None,None]
+                                            *vRgl[None,None,:,None]),
+                                           vTgl[None,:,None,None],
+                                           z[indx,None,None,None],
+                                           (sigmaz1[indx,None,None,None]
+                                            *vzgl[None,None,None,:]))
+                if self._cache is None:
+                    logqeval[indx]= numpy.reshape(\
+                        self(tR.flatten(),tvR.flatten(),tvT.flatten(),
+                             tz.flatten(),tvz.flatten(),
+                             log=True,use_physical=False),
+                        (len(indx),ngl,ngl,ngl))
+                    continue
+                out= self(tR.flatten(),tvR.flatten(),tvT.flatten(),
+                          tz.flatten(),tvz.flatten(),
+                          log=True,_return_actions=True,_return_freqs=True,
+                          use_physical=False)
+                logqeval[indx]= numpy.reshape(out[0],(len(indx),ngl,ngl,ngl))
+                #Store the same entries as for scalar R (copies, such that
+                #evicted entries do not keep the entire chunk in memory)
+                for jj,kk in enumerate(indx):
+                    self._cache.put(cachekeys[kk],
+                                    (numpy.copy(logqeval[kk]),)
+                                    +tuple([numpy.copy(x[jj*ngl**3:
+                                                         (jj+1)*ngl**3])
+                                            for x in out[1:]]))
+        else:
+            logqeval= _glqeval
+        out= numpy.einsum('ijkl,j,k,l->i',numpy.exp(logqeval),
+                          vTgl**m*glw,vRgl**n*vRglw,vzgl**o*vzglw)\
+                          *sigmaR1**(1.+n)*sigmaz1**(1.+o)*0.1875*nsigma**2
+        out= numpy.reshape(out,shape)
+        if _returngl:
+            return (out,logqeval)
+        else:
+            return out
+
     def jmomentdensity(self,*args,**kwargs):
         """
         NAME:
@@ -907,9 +1159,9 @@ class quasiisothermaldf(df):
 
         INPUT:
 
-           R - radius at which to calculate this (can be Quantity)
+           R - radius at which to calculate this (can be Quantity; can be an array when gl=True)
 
-           z - height at which to calculate this (can be Quantity)
+           z - height at which to calculate this (can be Quantity; can be an array that broadcasts with R)
 
         OPTIONAL INPUT:
 
@@ -974,9 +1226,9 @@ class quasiisothermaldf(df):
 
         INPUT:
 
-           R - radius at which to calculate this (can be Quantity)
+           R - radius at which to calculate this (can be Quantity; can be an array when gl=True)
 
-           z - height at which to calculate this (can be Quantity)
+           z - height at which to calculate this (can be Quantity; can be an array that broadcasts with R)
 
         OPTIONAL INPUT:
 
@@ -1041,9 +1293,9 @@ class quasiisothermaldf(df):
 
         INPUT:
 
-           R - radius at which to calculate this (can be Quantity)
+           R - radius at which to calculate this (can be Quantity; can be an array when gl=True)
 
-           z - height at which to calculate this (can be Quantity)
+           z - height at which to calculate this (can be Quantity; can be an array that broadcasts with R)
 
         OPTIONAL INPUT:
 
@@ -1121,9 +1373,9 @@ class quasiisothermaldf(df):
 
         INPUT:
 
-           R - radius at which to calculate this (can be Quantity)
+           R - radius at which to calculate this (can be Quantity; can be an array when gl=True)
 
-           z - height at which to calculate this (can be Quantity)
+           z - height at which to calculate this (can be Quantity; can be an array that broadcasts with R)
 
         OPTIONAL INPUT:
 
@@ -1188,9 +1440,9 @@ class quasiisothermaldf(df):
 
         INPUT:
 
-           R - radius at which to calculate this (can be Quantity)
+           R - radius at which to calculate this (can be Quantity; can be an array when gl=True)
 
-           z - height at which to calculate this (can be Quantity)
+           z - height at which to calculate this (can be Quantity; can be an array that broadcasts with R)
 
         OPTIONAL INPUT:
 
@@ -1255,9 +1507,9 @@ class quasiisothermaldf(df):
 
         INPUT:
 
-           R - radius at which to calculate this (can be Quantity)
+           R - radius at which to calculate this (can be Quantity; can be an array when gl=True)
 
-           z - height at which to calculate this (can be Quantity)
+           z - height at which to calculate this (can be Quantity; can be an array that broadcasts with R)
 
         OPTIONAL INPUT:
 
@@ -1322,9 +1574,9 @@ class quasiisothermaldf(df):
 
         INPUT:
 
-           R - radius at which to calculate this (can be Quantity)
+           R - radius at which to calculate this (can be Quantity; can be an array when gl=True)
 
-           z - height at which to calculate this (can be Quantity)
+           z - height at which to calculate this (can be Quantity; can be an array that broadcasts with R)
 
         OPTIONAL INPUT:
 
@@ -1389,9 +1641,9 @@ class quasiisothermaldf(df):
 
         INPUT:
 
-           R - radius at which to calculate this (can be Quantity)
+           R - radius at which to calculate this (can be Quantity; can be an array when gl=True)
 
-           z - height at which to calculate this (can be Quantity)
+           z - height at which to calculate this (can be Quantity; can be an array that broadcasts with R)
 
         OPTIONAL INPUT:
 
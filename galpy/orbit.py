@@ -3,8 +3,10 @@ from galpy.orbit_src import Orbit
 #
 # Functions
 #
-
-#none
+integrateOrbits= Orbit.integrateOrbits
+integrateOrbitsChunked= Orbit.integrateOrbitsChunked
+integrateOrbitEvents= Orbit.integrateOrbitEvents
+lyapunovExponent= Orbit.lyapunovExponent
 
 #
 # Classes
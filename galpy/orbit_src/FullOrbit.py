@@ -14,10 +14,13 @@ import galpy.util.bovy_plot as plot
 import galpy.util.bovy_symplecticode as symplecticode
 import galpy.util.bovy_coords as coords
 #try:
-from galpy.orbit_src.integrateFullOrbit import integrateFullOrbit_c, _ext_loaded
+from galpy.orbit_src.integrateFullOrbit import integrateFullOrbit_c, \
+    integrateFullOrbit_dxdv_c, _ext_loaded
 ext_loaded= _ext_loaded
 from galpy.util.bovy_conversion import physical_conversion
-from galpy.orbit_src.OrbitTop import OrbitTop
+from galpy.orbit_src.OrbitTop import OrbitTop, _denseOrbitInterp, \
+    _integrate_memmap
+_DXDV_FD_STEP= 10.**-5.
 _ORBFITNORMRADEC= 360.
 _ORBFITNORMDIST= 10.
 _ORBFITNORMPMRADEC= 4.
@@ -62,7 +65,8 @@ class FullOrbit(OrbitTop):
                           ro=ro,zo=zo,vo=vo,solarmotion=solarmotion)
         return None
 
-    def integrate(self,t,pot,method='symplec4_c',dt=None):
+    def integrate(self,t,pot,method='symplec4_c',dt=None,dense_output=False,
+                  memmap=None,chunksize=10000):
         """
         NAME:
            integrate
@@ -78,17 +82,65 @@ class FullOrbit(OrbitTop):
                    'rk6_c' for a 6-th order Runge-Kutta integrator in C
                    'dopr54_c' for a Dormand-Prince integrator in C (generally the fastest)
            dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize
+           dense_output= (False) if True, also store the acceleration at each output time and use it to evaluate the orbit at arbitrary times using quintic Hermite interpolation
+           memmap= (None) if set, name of a .npy file to which the orbit and the acceleration at each output time are written as the integration advances in chunks of chunksize output times; the orbit is then a numpy.memmap of this file that is read lazily
+           chunksize= (10000) number of output times integrated at once when memmap is set
         OUTPUT:
            (none) (get the actual orbit using getOrbit()
         HISTORY:
            2010-08-01 - Written - Bovy (NYU)
+           2017-09-05 - Added dense_output - agent
+           2017-09-12 - Added memmap - agent
         """
         #Reset things that may have been defined by a previous integration
         if hasattr(self,'_orbInterp'): delattr(self,'_orbInterp')
         if hasattr(self,'rs'): delattr(self,'rs')
         self.t= nu.array(t)
         self._pot= pot
-        self.orbit= _integrateFullOrbit(self.vxvv,pot,t,method,dt)
+        if not memmap is None:
+            self.orbit, acc= _integrate_memmap(\
+                lambda vxvv,tt: _integrateFullOrbit(vxvv,pot,tt,method,dt,
+                                                    dense_output=True),
+                self.vxvv,t,memmap,chunksize,nacc=3)
+            self._orbInterp= _denseOrbitInterp(self.t,self.orbit,acc)
+        elif dense_output:
+            self.orbit, acc= _integrateFullOrbit(self.vxvv,pot,t,method,dt,
+                                                 dense_output=True)
+            self._orbInterp= _denseOrbitInterp(self.t,self.orbit,acc)
+        else:
+            self.orbit= _integrateFullOrbit(self.vxvv,pot,t,method,dt)
+
+    def integrate_dxdv(self,dxdv,t,pot,method='dopr54_c',
+                       rectIn=False,rectOut=False):
+        """
+        NAME:
+           integrate_dxdv
+        PURPOSE:
+           integrate the orbit and a small area of phase space
+        INPUT:
+           dxdv - [dR,dvR,dvT,dz,dvz,dphi]
+           t - list of times at which to output (0 has to be in this!)
+           pot - potential instance or list of instances
+           method= 'odeint' for scipy's odeint
+                   'rk4_c' for a 4th-order Runge-Kutta integrator in C
+                   'rk6_c' for a 6-th order Runge-Kutta integrator in C
+                   'dopr54_c' for a Dormand-Prince integrator in C (generally the fastest)
+           rectIn= (False) if True, input dxdv is in rectangular coordinates
+           rectOut= (False) if True, output dxdv (that in orbit_dxdv) is in rectangular coordinates
+        OUTPUT:
+           (none) (get the actual orbit using getOrbit_dxdv()
+        HISTORY:
+           2017-09-15 - Written - agent
+        """
+        if hasattr(self,'_orbInterp'): delattr(self,'_orbInterp')
+        if hasattr(self,'rs'): delattr(self,'rs')
+        self.t= nu.array(t)
+        self._pot_dxdv= pot
+        self._pot= pot
+        self.orbit_dxdv, msg= _integrateFullOrbit_dxdv(self.vxvv,dxdv,pot,t,
+                                                       method,rectIn,rectOut)
+        self.orbit= self.orbit_dxdv[:,:6]
+        return msg
 
     @physical_conversion('energy')
     def Jacobi(self,*args,**kwargs):
@@ -542,7 +594,7 @@ class FullOrbit(OrbitTop):
             plot.bovy_plot(self.orbit[:,4],nu.array(self.EzJz)/self.EzJz[0],
                            *args,**kwargs)
 
-def _integrateFullOrbit(vxvv,pot,t,method,dt):
+def _integrateFullOrbit(vxvv,pot,t,method,dt,dense_output=False):
     """
     NAME:
        _integrateFullOrbit
@@ -550,15 +602,19 @@ def _integrateFullOrbit(vxvv,pot,t,method,dt):
        integrate an orbit in a Phi(R,z,phi) potential
     INPUT:
        vxvv - array with the initial conditions stacked like
-              [R,vR,vT,z,vz,phi]; vR outward!
+              [R,vR,vT,z,vz,phi]; vR outward! or [nobj,6] array of such initial conditions, which are integrated in a single call for the C integrators
        pot - Potential instance
        t - list of times at which to output (0 has to be in this!)
        method - 'odeint' or 'leapfrog'
        dt - if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize
+       dense_output= (False) if True, also return the rectangular acceleration at each t
     OUTPUT:
-       [:,5] array of [R,vR,vT,z,vz,phi] at each t
+       [:,6] array of [R,vR,vT,z,vz,phi] at each t ([nobj,:,6] for [nobj,6] input)
+       if dense_output: ([:,6] orbit array, [:,3] array of [ax,ay,az] at each t)
     HISTORY:
        2010-08-01 - Written - Bovy (NYU)
+       2017-09-01 - Allow multiple initial conditions - agent
+       2017-09-05 - Added dense_output - agent
     """
     #First check that the potential has C
     if '_c' in method:
@@ -568,6 +624,18 @@ def _integrateFullOrbit(vxvv,pot,t,method,dt):
             else:
                 method= 'odeint'
             warnings.warn("Cannot use C integration because some of the potentials are not implemented in C (using %s instead)" % (method), galpyWarning)
+    vxvv= nu.array(vxvv)
+    if len(vxvv.shape) > 1 and not (ext_loaded and '_c' in method):
+        # Python integrators: integrate one orbit at a time
+        outs= [_integrateFullOrbit(tvxvv,pot,t,method,dt,
+                                   dense_output=dense_output)
+               for tvxvv in vxvv]
+        if dense_output:
+            return (nu.array([o[0] for o in outs]),
+                    nu.array([o[1] for o in outs]))
+        else:
+            return nu.array(outs)
+    acc= None
     if method.lower() == 'leapfrog':
         #go to the rectangular frame
         this_vxvv= nu.array([vxvv[0]*nu.cos(vxvv[5]),
@@ -598,28 +666,35 @@ def _integrateFullOrbit(vxvv,pot,t,method,dt):
         warnings.warn("Using C implementation to integrate orbits",
                       galpyWarning)
         #go to the rectangular frame
-        this_vxvv= nu.array([vxvv[0]*nu.cos(vxvv[5]),
-                             vxvv[0]*nu.sin(vxvv[5]),
-                             vxvv[3],
-                             vxvv[1]*nu.cos(vxvv[5])-vxvv[2]*nu.sin(vxvv[5]),
-                             vxvv[2]*nu.cos(vxvv[5])+vxvv[1]*nu.sin(vxvv[5]),
-                             vxvv[4]])
+        this_vxvv= nu.array([vxvv[...,0]*nu.cos(vxvv[...,5]),
+                             vxvv[...,0]*nu.sin(vxvv[...,5]),
+                             vxvv[...,3],
+                             vxvv[...,1]*nu.cos(vxvv[...,5])
+                             -vxvv[...,2]*nu.sin(vxvv[...,5]),
+                             vxvv[...,2]*nu.cos(vxvv[...,5])
+                             +vxvv[...,1]*nu.sin(vxvv[...,5]),
+                             vxvv[...,4]]).T
         #integrate
-        tmp_out, msg= integrateFullOrbit_c(pot,this_vxvv,
-                                           t,method,dt=dt)
+        if dense_output:
+            tmp_out, msg, acc= integrateFullOrbit_c(pot,this_vxvv,
+                                                    t,method,dt=dt,
+                                                    dense_output=True)
+        else:
+            tmp_out, msg= integrateFullOrbit_c(pot,this_vxvv,
+                                               t,method,dt=dt)
         #go back to the cylindrical frame
-        R= nu.sqrt(tmp_out[:,0]**2.+tmp_out[:,1]**2.)
-        phi= nu.arccos(tmp_out[:,0]/R)
-        phi[(tmp_out[:,1] < 0.)]= 2.*nu.pi-phi[(tmp_out[:,1] < 0.)]
-        vR= tmp_out[:,3]*nu.cos(phi)+tmp_out[:,4]*nu.sin(phi)
-        vT= tmp_out[:,4]*nu.cos(phi)-tmp_out[:,3]*nu.sin(phi)
-        out= nu.zeros((len(t),6))
-        out[:,0]= R
-        out[:,1]= vR
-        out[:,2]= vT
-        out[:,5]= phi
-        out[:,3]= tmp_out[:,2]
-        out[:,4]= tmp_out[:,5]
+        R= nu.sqrt(tmp_out[...,0]**2.+tmp_out[...,1]**2.)
+        phi= nu.arccos(tmp_out[...,0]/R)
+        phi[(tmp_out[...,1] < 0.)]= 2.*nu.pi-phi[(tmp_out[...,1] < 0.)]
+        vR= tmp_out[...,3]*nu.cos(phi)+tmp_out[...,4]*nu.sin(phi)
+        vT= tmp_out[...,4]*nu.cos(phi)-tmp_out[...,3]*nu.sin(phi)
+        out= nu.zeros_like(tmp_out)
+        out[...,0]= R
+        out[...,1]= vR
+        out[...,2]= vT
+        out[...,5]= phi
+        out[...,3]= tmp_out[...,2]
+        out[...,4]= tmp_out[...,5]
     elif method.lower() == 'odeint' or not ext_loaded:
         vphi= vxvv[2]/vxvv[0]
         init= [vxvv[0],vxvv[1],vxvv[5],vphi,vxvv[3],vxvv[4]]
@@ -633,10 +708,103 @@ def _integrateFullOrbit(vxvv,pot,t,method,dt):
         out[:,4]= intOut[:,5]
         out[:,5]= intOut[:,2]
     #post-process to remove negative radii
-    neg_radii= (out[:,0] < 0.)
+    neg_radii= (out[...,0] < 0.)
     out[neg_radii,0]= -out[neg_radii,0]
     out[neg_radii,5]+= m.pi
-    return out
+    if not dense_output:
+        return out
+    if acc is None: # Not computed by the integrator
+        acc= nu.array([_rectForce([out[ii,0]*nu.cos(out[ii,5]),
+                                   out[ii,0]*nu.sin(out[ii,5]),
+                                   out[ii,3]],pot,t=t[ii])
+                       for ii in range(len(t))])
+    return (out,acc)
+
+def _integrateFullOrbit_dxdv(vxvv,dxdv,pot,t,method,rectIn,rectOut):
+    """
+    NAME:
+       _integrateFullOrbit_dxdv
+    PURPOSE:
+       integrate an orbit and area of phase space in a Phi(R,z,phi) potential
+    INPUT:
+       vxvv - array with the initial conditions stacked like
+              [R,vR,vT,z,vz,phi]; vR outward!
+       dxdv - difference to integrate [dR,dvR,dvT,dz,dvz,dphi]
+       pot - Potential instance
+       t - list of times at which to output (0 has to be in this!)
+       method - 'odeint', 'rk4_c', 'rk6_c', or 'dopr54_c'
+       rectIn= (False) if True, input dxdv is in rectangular coordinates
+       rectOut= (False) if True, output dxdv (that in orbit_dxdv) is in rectangular coordinates
+    OUTPUT:
+       [:,12] array of [R,vR,vT,z,vz,phi,dR,dvR,dvT,dz,dvz,dphi] at each t
+       error message from integrator
+    HISTORY:
+       2017-09-15 - Written - agent
+    """
+    #First check that the potential has C
+    if '_c' in method:
+        if not ext_loaded or not _check_c(pot):
+            method= 'odeint'
+            warnings.warn("Using odeint because not all used potential have adequate C implementations to integrate phase-space volumes",galpyWarning)
+    cp, sp= nu.cos(vxvv[5]), nu.sin(vxvv[5])
+    #go to the rectangular frame
+    this_vxvv= nu.array([vxvv[0]*cp,vxvv[0]*sp,vxvv[3],
+                         vxvv[1]*cp-vxvv[2]*sp,vxvv[2]*cp+vxvv[1]*sp,
+                         vxvv[4]])
+    if not rectIn:
+        this_dxdv= nu.array([cp*dxdv[0]-vxvv[0]*sp*dxdv[5],
+                             sp*dxdv[0]+vxvv[0]*cp*dxdv[5],
+                             dxdv[3],
+                             -(vxvv[1]*sp+vxvv[2]*cp)*dxdv[5]
+                             +cp*dxdv[1]-sp*dxdv[2],
+                             (vxvv[1]*cp-vxvv[2]*sp)*dxdv[5]
+                             +sp*dxdv[1]+cp*dxdv[2],
+                             dxdv[4]])
+    else:
+        this_dxdv= nu.array(dxdv)
+    if 'leapfrog' in method.lower() or 'symplec' in method.lower():
+        raise TypeError('Symplectic integration for phase-space volume is not possible')
+    elif method.lower() == 'rk4_c' or method.lower() == 'rk6_c' \
+            or method.lower() == 'dopr54_c':
+        warnings.warn("Using C implementation to integrate orbits",galpyWarning)
+        #integrate
+        tmp_out, msg= integrateFullOrbit_dxdv_c(pot,this_vxvv,this_dxdv,
+                                                t,method)
+    elif method.lower() == 'odeint':
+        init= nu.concatenate((this_vxvv,this_dxdv))
+        #integrate
+        tmp_out= integrate.odeint(_FullEOM_dxdv,init,t,args=(pot,),
+                                  rtol=10.**-8.)#,mxstep=100000000)
+        msg= 0
+    else:
+        raise NotImplementedError("requested integration method does not exist")
+    #go back to the cylindrical frame
+    R= nu.sqrt(tmp_out[:,0]**2.+tmp_out[:,1]**2.)
+    phi= nu.arccos(tmp_out[:,0]/R)
+    phi[(tmp_out[:,1] < 0.)]= 2.*nu.pi-phi[(tmp_out[:,1] < 0.)]
+    cp= nu.cos(phi)
+    sp= nu.sin(phi)
+    vR= tmp_out[:,3]*cp+tmp_out[:,4]*sp
+    vT= tmp_out[:,4]*cp-tmp_out[:,3]*sp
+    out= nu.zeros((len(t),12))
+    out[:,0]= R
+    out[:,1]= vR
+    out[:,2]= vT
+    out[:,3]= tmp_out[:,2]
+    out[:,4]= tmp_out[:,5]
+    out[:,5]= phi
+    if rectOut:
+        out[:,6:]= tmp_out[:,6:]
+    else:
+        dR= cp*tmp_out[:,6]+sp*tmp_out[:,7]
+        dphi= (cp*tmp_out[:,7]-sp*tmp_out[:,6])/R
+        out[:,6]= dR
+        out[:,7]= cp*tmp_out[:,9]+sp*tmp_out[:,10]+vT*dphi
+        out[:,8]= cp*tmp_out[:,10]-sp*tmp_out[:,9]-vR*dphi
+        out[:,9]= tmp_out[:,8]
+        out[:,10]= tmp_out[:,11]
+        out[:,11]= dphi
+    return (out,msg)
 
 def _FullEOM(y,t,pot):
     """
@@ -663,6 +831,32 @@ def _FullEOM(y,t,pot):
             y[5],
             _evaluatezforces(pot,y[0],y[4],phi=y[2],t=t)]
 
+def _FullEOM_dxdv(x,t,pot):
+    """
+    NAME:
+       _FullEOM_dxdv
+    PURPOSE:
+       implements the EOM, i.e., the right-hand side of the differential 
+       equation, for integrating phase space differences, rectangular
+    INPUT:
+       x - current phase-space position
+       t - current time
+       pot - (list of) Potential instance(s)
+    OUTPUT:
+       dy/dt
+    HISTORY:
+       2017-09-15 - Written - agent
+    """
+    # Derivative of the force along dx using a central finite difference
+    dxnorm= nu.sqrt(x[6]**2.+x[7]**2.+x[8]**2.)
+    if dxnorm == 0.:
+        dF= nu.zeros(3)
+    else:
+        h= _DXDV_FD_STEP*nu.sqrt(x[0]**2.+x[1]**2.+x[2]**2.)/dxnorm
+        dF= 0.5*(_rectForce(x[:3]+h*x[6:9],pot,t=t)
+                 -_rectForce(x[:3]-h*x[6:9],pot,t=t))/h
+    return nu.concatenate((x[3:6],_rectForce(x[:3],pot,t=t),x[9:12],dF))
+
 def _rectForce(x,pot,t=0.):
     """
     NAME:
@@ -16,6 +16,7 @@ from galpy.orbit_src.RZOrbit import RZOrbit
 from galpy.orbit_src.planarOrbit import planarOrbit, planarROrbit, \
     planarOrbitTop
 from galpy.orbit_src.linearOrbit import linearOrbit
+from galpy.orbit_src.OrbitTop import _integrate_chunked, _integrate_memmap
 _K=4.74047
 if _APY_LOADED:
     vxvv_units= [units.kpc,units.km/units.s,units.km/units.s,
@@ -365,7 +366,8 @@ class Orbit(object):
             self._vo= vo
         self._orb.turn_physical_on(ro=ro,vo=vo)
 
-    def integrate(self,t,pot,method='symplec4_c',dt=None):
+    def integrate(self,t,pot,method='symplec4_c',dt=None,dense_output=False,
+                  memmap=None,chunksize=10000):
         """
         NAME:
 
@@ -392,6 +394,12 @@ class Orbit(object):
 
            dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize (only works for the C integrators that use a fixed stepsize) (can be Quantity)
 
+           dense_output= (False) if True, also store the acceleration at each output time, such that the orbit can be evaluated at arbitrary times within the integrated range (using o(t)) using quintic Hermite interpolation rather than spline interpolation of the output; only for orbits that include the azimuth
+
+           memmap= (None) if set, name of a .npy file to which the orbit is written as the integration advances, rather than keeping the entire orbit in memory; the orbit is integrated in chunks of chunksize output times and the stored orbit is a numpy.memmap of this file, from which methods such as R(t) and x(t) read lazily (using dense output for times in between the output times); the file contains the orbit followed by the rectangular acceleration as additional columns; only for orbits that include the azimuth
+
+           chunksize= (10000) number of output times integrated at once when memmap is set
+
         OUTPUT:
 
            (none) (get the actual orbit using getOrbit()
@@ -402,6 +410,10 @@ class Orbit(object):
 
            2015-06-28 - Added dt keyword - Bovy (IAS)
 
+           2017-09-05 - Added dense_output keyword - agent
+
+           2017-09-12 - Added memmap and chunksize keywords - agent
+
         """
         _check_potential_dim(self,pot)
         _check_consistent_units(self,pot)
@@ -419,7 +431,17 @@ class Orbit(object):
                           galpyWarning)
         if not _check_integrate_dt(t,dt):
             raise ValueError('dt input (integrator stepsize) for Orbit.integrate must be an integer divisor of the output stepsize')
-        self._orb.integrate(t,pot,method=method,dt=dt)
+        if not memmap is None:
+            if not len(self._orb.vxvv) in [4,6]:
+                raise NotImplementedError('memmap is only implemented for orbits that include the azimuth')
+            self._orb.integrate(t,pot,method=method,dt=dt,dense_output=True,
+                                memmap=memmap,chunksize=chunksize)
+        elif dense_output:
+            if not len(self._orb.vxvv) in [4,6]:
+                raise NotImplementedError('dense_output is only implemented for orbits that include the azimuth')
+            self._orb.integrate(t,pot,method=method,dt=dt,dense_output=True)
+        else:
+            self._orb.integrate(t,pot,method=method,dt=dt)
 
     def integrate_dxdv(self,dxdv,t,pot,method='dopr54_c',
                        rectIn=False,rectOut=False):
@@ -434,7 +456,7 @@ class Orbit(object):
 
         INPUT:
 
-           dxdv - [dR,dvR,dvT,dphi]
+           dxdv - [dR,dvR,dvT,dphi] for planar orbits or [dR,dvR,dvT,dz,dvz,dphi] for full 3D orbits
 
            t - list of times at which to output (0 has to be in this!) (can be Quantity)
 
@@ -465,7 +487,11 @@ class Orbit(object):
 
            2014-06-29 - Added rectIn and rectOut - Bovy (IAS)
 
+           2017-09-15 - Added support for full 3D orbits - agent
+
         """
+        if not len(self._orb.vxvv) in [4,6]:
+            raise AttributeError('integrate_dxdv is only implemented for orbits that include the azimuth')
         _check_potential_dim(self,pot)
         _check_consistent_units(self,pot)
         # Parse t
@@ -3570,6 +3596,314 @@ v           obs=[X,Y,Z,vx,vy,vz] - (optional) position and velocity of observer
                                linOrb._orb.vxvv[3]],
                          **orbSetupKwargs)
 
+def integrateOrbits(vxvv,t,pot,method='symplec4_c',dt=None,memmap=None,
+                    chunksize=10000):
+    """
+    NAME:
+
+       integrateOrbits
+
+    PURPOSE:
+
+       integrate many orbits at once; for the C integrators, all orbits are integrated in a single call to C, parallelized over orbits using OpenMP
+
+    INPUT:
+
+       vxvv - [nobj,6] array of initial conditions [R,vR,vT,z,vz,phi] or [nobj,4] array of planar initial conditions [R,vR,vT,phi] (in natural units)
+
+       t - list of times at which to output (0 has to be in this!)
+
+       pot - potential instance or list of instances
+
+       method= 'odeint' for scipy's odeint
+               'leapfrog' for a simple leapfrog implementation
+               'leapfrog_c' for a simple leapfrog implementation in C
+               'symplec4_c' for a 4th order symplectic integrator in C
+               'symplec6_c' for a 6th order symplectic integrator in C
+               'rk4_c' for a 4th-order Runge-Kutta integrator in C
+               'rk6_c' for a 6-th order Runge-Kutta integrator in C
+               'dopr54_c' for a Dormand-Prince integrator in C (generally the fastest)
+
+       dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize (only works for the C integrators that use a fixed stepsize)
+
+       memmap= (None) if set, name of a .npy file to which the orbits are written as the integration advances in chunks of chunksize output times, rather than keeping all orbits in memory
+
+       chunksize= (10000) number of output times integrated at once when memmap is set
+
+    OUTPUT:
+
+       [nobj,len(t),6] or [nobj,len(t),4] array of the orbits (same ordering of the phase-space coordinates as the input); numpy.memmap if memmap is set
+
+    HISTORY:
+
+       2017-09-01 - Written - agent
+
+       2017-09-12 - Added memmap and chunksize keywords - agent
+
+    """
+    from galpy.orbit_src.FullOrbit import _integrateFullOrbit
+    from galpy.orbit_src.planarOrbit import _integrateOrbit
+    from galpy.potential import toPlanarPotential, _dim
+    vxvv= nu.atleast_2d(vxvv)
+    t= nu.array(t)
+    if not _check_integrate_dt(t,dt):
+        raise ValueError('dt input (integrator stepsize) for integrateOrbits must be an integer divisor of the output stepsize')
+    if not memmap is None:
+        return _integrate_memmap(lambda tvxvv,tt: integrateOrbits(tvxvv,tt,pot,
+                                                                  method=method,
+                                                                  dt=dt),
+                                 vxvv,t,memmap,chunksize)
+    if vxvv.shape[1] == 6:
+        assert _dim(pot) == 3, 'Orbit dimensionality is 3, but potential dimensionality is %i < 3' % _dim(pot)
+        return _integrateFullOrbit(vxvv,pot,t,method,dt)
+    elif vxvv.shape[1] == 4:
+        return _integrateOrbit(vxvv,toPlanarPotential(pot),t,method,dt)[0]
+    else:
+        raise ValueError('integrateOrbits only supports [nobj,6] full or [nobj,4] planar initial conditions')
+
+def integrateOrbitsChunked(vxvv,t,pot,method='symplec4_c',dt=None,
+                           chunksize=10000):
+    """
+    NAME:
+
+       integrateOrbitsChunked
+
+    PURPOSE:
+
+       generator that integrates many orbits at once in chunks of output times, yielding each chunk of the orbits when it has been integrated, such that very long integrations do not have to be kept in memory
+
+    INPUT:
+
+       vxvv - [nobj,6] array of initial conditions [R,vR,vT,z,vz,phi] or [nobj,4] array of planar initial conditions [R,vR,vT,phi] (in natural units)
+
+       t - list of times at which to output (0 has to be in this!)
+
+       pot - potential instance or list of instances
+
+       method= integration method (see integrateOrbits)
+
+       dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize (only works for the C integrators that use a fixed stepsize)
+
+       chunksize= (10000) number of output times in each chunk
+
+    OUTPUT:
+
+       yields (t,orbits) for each chunk, where t are the output times in the chunk and orbits is the [nobj,len(t),6] or [nobj,len(t),4] array of the orbits at these times
+
+    HISTORY:
+
+       2017-09-12 - Written - agent
+
+    """
+    t= nu.array(t)
+    if not _check_integrate_dt(t,dt):
+        raise ValueError('dt input (integrator stepsize) for integrateOrbitsChunked must be an integer divisor of the output stepsize')
+    for chunk in _integrate_chunked(\
+        lambda tvxvv,tt: integrateOrbits(tvxvv,tt,pot,method=method,dt=dt),
+        nu.atleast_2d(vxvv),t,chunksize):
+        yield chunk
+
+def integrateOrbitEvents(vxvv,t,pot,method='symplec4_c',dt=None,
+                         maxevents=1000):
+    """
+    NAME:
+
+       integrateOrbitEvents
+
+    PURPOSE:
+
+       integrate many orbits in C and detect pericenters, apocenters, z extrema, and disk crossings during the integration, without storing the orbits; parallelized over orbits using OpenMP
+
+    INPUT:
+
+       vxvv - [nobj,6] array of initial conditions [R,vR,vT,z,vz,phi] or [nobj,4] array of planar initial conditions [R,vR,vT,phi] (in natural units)
+
+       t - list of times at which the orbit is checked for events (0 has to be in this!); events are located in between these times using quintic Hermite interpolation, so the spacing should be small enough that at most one event of each type happens between consecutive times (e.g., a few tens of times per orbital period)
+
+       pot - potential instance or list of instances (must be implemented in C)
+
+       method= 'leapfrog_c' for a simple leapfrog implementation in C
+               'symplec4_c' for a 4th order symplectic integrator in C
+               'symplec6_c' for a 6th order symplectic integrator in C
+               'rk4_c' for a 4th-order Runge-Kutta integrator in C
+               'rk6_c' for a 6-th order Runge-Kutta integrator in C
+               'dopr54_c' for a Dormand-Prince integrator in C (generally the fastest)
+
+       dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize (only works for the C integrators that use a fixed stepsize)
+
+       maxevents= (1000) maximum number of events to store for each orbit
+
+    OUTPUT:
+
+       dictionary with entries
+
+          nevents - [nobj] number of events found for each orbit
+
+          type - [nobj,maxevents] type of each event: 0= pericenter, 1= apocenter, 2= z extremum, 3= disk crossing; -1 for unused entries
+
+          t - [nobj,maxevents] time of each event (NaN for unused entries)
+
+          vxvv - [nobj,maxevents,6] or [nobj,maxevents,4] phase-space point at each event (same ordering of the phase-space coordinates as the input)
+
+          vxvv_end - [nobj,6] or [nobj,4] phase-space point at the final time
+
+          rperi, rap - [nobj] pericenter and apocenter radius, the smallest and largest (spherical) radius at the pericenters and apocenters and the start and end of the integration (like Orbit.rperi and Orbit.rap)
+
+          zmax - [nobj] maximum height |z| (only for full orbits)
+
+          err - [nobj] error message from the integrator, if not zero: 1 means maximum step reduction happened for adaptive integrators
+
+    HISTORY:
+
+       2017-09-08 - Written - agent
+
+    """
+    from galpy.orbit_src.integrateFullOrbit import \
+        integrateFullOrbit_events_c, _ext_loaded
+    from galpy.orbit_src.integratePlanarOrbit import \
+        integratePlanarOrbit_events_c
+    from galpy.potential import toPlanarPotential, _dim
+    from galpy.potential_src.Potential import _check_c
+    vxvv= nu.atleast_2d(vxvv)
+    t= nu.array(t)
+    if not _check_integrate_dt(t,dt):
+        raise ValueError('dt input (integrator stepsize) for integrateOrbitEvents must be an integer divisor of the output stepsize')
+    if not _ext_loaded or not '_c' in method:
+        raise NotImplementedError('integrateOrbitEvents is only implemented for the C integrators')
+    dim= vxvv.shape[1]
+    if dim == 6:
+        assert _dim(pot) == 3, 'Orbit dimensionality is 3, but potential dimensionality is %i < 3' % _dim(pot)
+        integrator= integrateFullOrbit_events_c
+    elif dim == 4:
+        pot= toPlanarPotential(pot)
+        integrator= integratePlanarOrbit_events_c
+    else:
+        raise ValueError('integrateOrbitEvents only supports [nobj,6] full or [nobj,4] planar initial conditions')
+    if not _check_c(pot):
+        raise NotImplementedError('integrateOrbitEvents requires all potentials to be implemented in C')
+    # Go to the rectangular frame
+    yo= _cyl_to_rect_vxvv(vxvv)
+    nevents, etype, etime, estate, yf, err= \
+        integrator(pot,yo,t,method,dt=dt,maxevents=maxevents)
+    if nu.any(nevents > maxevents):
+        warnings.warn("Some orbits have more than maxevents=%i events; only the first %i events were stored (increase maxevents to store all events)" % (maxevents,maxevents),
+                      galpyWarning)
+    out= {'nevents':nevents,'type':etype,'t':etime,'err':err}
+    # Back to the cylindrical frame
+    out['vxvv']= _rect_to_cyl_vxvv(estate)
+    out['vxvv_end']= _rect_to_cyl_vxvv(yf)
+    # Orbital extrema, also using the start and end points
+    if dim == 6:
+        r= nu.sqrt(out['vxvv'][...,0]**2.+out['vxvv'][...,3]**2.)
+        rends= nu.sqrt(nu.array([vxvv[:,0],out['vxvv_end'][:,0]])**2.
+                       +nu.array([vxvv[:,3],out['vxvv_end'][:,3]])**2.)
+        absz= nu.fabs(out['vxvv'][...,3])
+        out['zmax']= nu.amax(nu.hstack((nu.where(etype == 2,absz,-nu.inf),
+                                        nu.fabs(vxvv[:,3,None]),
+                                        nu.fabs(out['vxvv_end'][:,3,None]))),
+                             axis=1)
+    else:
+        r= out['vxvv'][...,0]
+        rends= nu.array([vxvv[:,0],out['vxvv_end'][:,0]])
+    out['rperi']= nu.amin(nu.hstack((nu.where(etype == 0,r,nu.inf),rends.T)),
+                          axis=1)
+    out['rap']= nu.amax(nu.hstack((nu.where(etype == 1,r,-nu.inf),rends.T)),
+                        axis=1)
+    return out
+
+def lyapunovExponent(vxvv,t,pot,method='dopr54_c',dxdv=None,dt=None):
+    """
+    NAME:
+
+       lyapunovExponent
+
+    PURPOSE:
+
+       compute the maximal Lyapunov exponent of many orbits at once by integrating each orbit together with a deviation vector in C, renormalizing the deviation vector at each time in t; parallelized over orbits using OpenMP
+
+    INPUT:
+
+       vxvv - [nobj,6] array of initial conditions [R,vR,vT,z,vz,phi] or [nobj,4] array of planar initial conditions [R,vR,vT,phi] (in natural units)
+
+       t - list of times at which the deviation vector is renormalized and at which the Lyapunov exponent is returned (0 has to be in this!)
+
+       pot - potential instance or list of instances (must be implemented in C; planar orbits require C implementations of the second derivatives of the potential)
+
+       method= 'rk4_c' for a 4th-order Runge-Kutta integrator in C
+               'rk6_c' for a 6-th order Runge-Kutta integrator in C
+               'dopr54_c' for a Dormand-Prince integrator in C (generally the fastest)
+
+       dxdv= (None) initial deviation vector in rectangular coordinates [dx,dy,dz,dvx,dvy,dvz] or [dx,dy,dvx,dvy], either a single vector or [nobj,6] / [nobj,4] array (default: equal components along all directions)
+
+       dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize (only works for the C integrators that use a fixed stepsize)
+
+    OUTPUT:
+
+       [nobj,len(t)] array of the finite-time estimate of the maximal Lyapunov exponent at each time in t (0 at the first time)
+
+    HISTORY:
+
+       2017-09-15 - Written - agent
+
+    """
+    from galpy.orbit_src.integrateFullOrbit import \
+        integrateFullOrbit_lyapunov_c
+    from galpy.orbit_src.integratePlanarOrbit import \
+        integratePlanarOrbit_lyapunov_c
+    from galpy.orbit_src.FullOrbit import ext_loaded
+    from galpy.potential import toPlanarPotential, _dim
+    from galpy.potential_src.Potential import _check_c
+    vxvv= nu.atleast_2d(vxvv)
+    t= nu.array(t)
+    if not method.lower() in ['rk4_c','rk6_c','dopr54_c']:
+        raise NotImplementedError('lyapunovExponent is only implemented for the rk4_c, rk6_c, and dopr54_c integrators')
+    if not _check_integrate_dt(t,dt):
+        raise ValueError('dt input (integrator stepsize) for lyapunovExponent must be an integer divisor of the output stepsize')
+    if not vxvv.shape[1] in [4,6]:
+        raise ValueError('lyapunovExponent only supports [nobj,6] full or [nobj,4] planar initial conditions')
+    if vxvv.shape[1] == 6:
+        assert _dim(pot) == 3, 'Orbit dimensionality is 3, but potential dimensionality is %i < 3' % _dim(pot)
+    else:
+        pot= toPlanarPotential(pot)
+    if not ext_loaded or not _check_c(pot) \
+            or (vxvv.shape[1] == 4 and not _check_c(pot,dxdv=True)):
+        raise NotImplementedError('lyapunovExponent requires all potentials to be implemented in C')
+    if dxdv is None:
+        dxdv= nu.ones(vxvv.shape[1])
+    rect= _cyl_to_rect_vxvv(vxvv)
+    if vxvv.shape[1] == 6:
+        lyap= integrateFullOrbit_lyapunov_c(pot,rect,dxdv,t,method,dt=dt)[1]
+    else:
+        lyap= integratePlanarOrbit_lyapunov_c(pot,rect,dxdv,t,method,
+                                              dt=dt)[1]
+    return lyap
+
+def _cyl_to_rect_vxvv(vxvv):
+    """Convert [nobj,6] [R,vR,vT,z,vz,phi] or [nobj,4] [R,vR,vT,phi] to rectangular phase-space coordinates"""
+    if vxvv.shape[1] == 6:
+        z, vz= vxvv[:,3], vxvv[:,4]
+    else:
+        z, vz= 0., 0.
+    x, y, z= coords.cyl_to_rect(vxvv[:,0],vxvv[:,-1],z)
+    vx, vy, vz= coords.cyl_to_rect_vec(vxvv[:,1],vxvv[:,2],vz,vxvv[:,-1])
+    if vxvv.shape[1] == 6:
+        return nu.array([x,y,z,vx,vy,vz]).T
+    else:
+        return nu.array([x,y,vx,vy]).T
+
+def _rect_to_cyl_vxvv(q):
+    """Convert [...,6] [x,y,z,vx,vy,vz] or [...,4] [x,y,vx,vy] to galpy's cylindrical phase-space coordinates"""
+    if q.shape[-1] == 6:
+        R, phi, z= coords.rect_to_cyl(q[...,0],q[...,1],q[...,2])
+        vR, vT, vz= coords.rect_to_cyl_vec(q[...,3],q[...,4],q[...,5],
+                                           R,phi,z,cyl=True)
+        return nu.rollaxis(nu.array([R,vR,vT,z,vz,phi]),0,q.ndim)
+    else:
+        R, phi, z= coords.rect_to_cyl(q[...,0],q[...,1],0.)
+        vR, vT, vz= coords.rect_to_cyl_vec(q[...,2],q[...,3],0.,
+                                           R,phi,z,cyl=True)
+        return nu.rollaxis(nu.array([R,vR,vT,phi]),0,q.ndim)
+
 def _check_integrate_dt(t,dt):
     """Check that the stepszie in t is an integer x dt"""
     if dt is None:
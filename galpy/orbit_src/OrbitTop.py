@@ -157,7 +157,7 @@ class OrbitTop(object):
         HISTORY:
            2010-07-10 - Written - Bovy (NYU)
         """
-        return self.orbit_dxdv[:,4:]
+        return self.orbit_dxdv[:,len(self.vxvv):]
 
     @physical_conversion('time')
     def time(self,*args,**kwargs):
@@ -1285,9 +1285,18 @@ class OrbitTop(object):
                     and self._integrate_t_asQuantity \
                     and not nu.all(t == self.t):
             warnings.warn("You specified integration times as a Quantity, but are evaluating at times not specified as a Quantity; assuming that time given is in natural (internal) units (multiply time by unit to get output at physical time)",galpyWarning)
-        if isinstance(t,(int,float)) and hasattr(self,'t') \
-                and t in list(self.t):
-            return self.orbit[list(self.t).index(t),:]
+        tindx= None
+        if isinstance(t,(int,float)) and hasattr(self,'t'):
+            # Look for t among the output times (sorted, decreasing for
+            # backward integration) with a single binary search
+            if len(self.t) > 1 and self.t[-1] < self.t[0]:
+                tindx= len(self.t)-1-nu.searchsorted(self.t[::-1],t)
+            else:
+                tindx= nu.searchsorted(self.t,t)
+            if tindx < 0 or tindx >= len(self.t) or self.t[tindx] != t:
+                tindx= None
+        if not tindx is None:
+            return self.orbit[tindx,:]
         else:
             if isinstance(t,(int,float)): 
                 nt= 1
@@ -1307,6 +1316,12 @@ class OrbitTop(object):
                     for ii in range(dim):
                         out[ii,jj]= self.orbit[indx,ii]
                 return out #should always have nt > 1, bc otherwise covered by above
+            if isinstance(self._orbInterp,_denseOrbitInterp):
+                out= self._orbInterp(t)
+                if nt == 1:
+                    return out.reshape(dim)
+                else:
+                    return out
             out= []
             if _OLD_SCIPY and not isinstance(self._orbInterp[0],_fakeInterp) \
                     and nu.any((nu.array(t) < self._orbInterp[0]._data[3])\
@@ -2105,6 +2120,159 @@ class _fakeInterp(object):
         else:
             return nu.array([self.x for i in t])
 
+class _denseOrbitInterp(object):
+    """Class that interpolates an integrated orbit using quintic Hermite interpolation of the rectangular positions between output times, using the positions, velocities, and accelerations at each output time"""
+    def __init__(self,t,orbit,acc):
+        """
+        NAME:
+           __init__
+        PURPOSE:
+           initialize the dense-output interpolation of an orbit
+        INPUT:
+           t - output times
+           orbit - [nt,4] ([R,vR,vT,phi]) or [nt,6] ([R,vR,vT,z,vz,phi]) orbit (can be a numpy.memmap, only the rows necessary for each evaluation are read)
+           acc - [nt,2] or [nt,3] rectangular acceleration at each t (can be a numpy.memmap)
+        OUTPUT:
+           instance
+        HISTORY:
+           2017-09-05 - Written - agent
+           2017-09-12 - Only read the necessary rows of the orbit when evaluating - agent
+        """
+        self._dim= orbit.shape[1]
+        self._sindx= nu.argsort(t)
+        self._t= t[self._sindx]
+        self._orbit= orbit
+        self._acc= acc
+        return None
+
+    def _rect(self,indx):
+        """Return the rectangular positions, velocities, and accelerations at the sorted output times indx"""
+        rows= self._sindx[indx]
+        orbit= nu.asarray(self._orbit[rows])
+        R, vR, vT, phi= orbit[:,0], orbit[:,1], orbit[:,2], orbit[:,-1]
+        cosphi, sinphi= nu.cos(phi), nu.sin(phi)
+        if self._dim == 6:
+            x= nu.array([R*cosphi,R*sinphi,orbit[:,3]]).T
+            v= nu.array([vR*cosphi-vT*sinphi,vT*cosphi+vR*sinphi,
+                         orbit[:,4]]).T
+        else:
+            x= nu.array([R*cosphi,R*sinphi]).T
+            v= nu.array([vR*cosphi-vT*sinphi,vT*cosphi+vR*sinphi]).T
+        return (x,v,nu.asarray(self._acc[rows]))
+
+    def __call__(self,t):
+        """Evaluate the orbit at times t, returns [dim,nt] array"""
+        t= nu.atleast_1d(t)
+        if nu.any((t < self._t[0])+(t > self._t[-1])):
+            raise ValueError("One or more requested time is not within the integrated range")
+        indx= nu.searchsorted(self._t,t,side='right')-1
+        indx[indx == len(self._t)-1]-= 1 # t at end of range
+        h= (self._t[indx+1]-self._t[indx])[:,None]
+        s= (t-self._t[indx])[:,None]/h
+        s2= s*s
+        s3= s2*s
+        # Quintic Hermite basis functions and their derivatives
+        h0= 1.-10.*s3+15.*s3*s-6.*s3*s2
+        h1= s-6.*s3+8.*s3*s-3.*s3*s2
+        h2= 0.5*(s2-3.*s3+3.*s3*s-s3*s2)
+        h3= 0.5*(s3-2.*s3*s+s3*s2)
+        h4= -4.*s3+7.*s3*s-3.*s3*s2
+        h5= 1.-h0
+        dh0= -30.*s2+60.*s3-30.*s3*s
+        dh1= 1.-18.*s2+32.*s3-15.*s3*s
+        dh2= 0.5*(2.*s-9.*s2+12.*s3-5.*s3*s)
+        dh3= 0.5*(3.*s2-8.*s3+5.*s3*s)
+        dh4= -12.*s2+28.*s3-15.*s3*s
+        dh5= -dh0
+        x0, v0, a0= self._rect(indx)
+        x1, v1, a1= self._rect(indx+1)
+        x= h0*x0+h5*x1+h*(h1*v0+h4*v1)+h**2.*(h2*a0+h3*a1)
+        v= (dh0*x0+dh5*x1)/h+dh1*v0+dh4*v1+h*(dh2*a0+dh3*a1)
+        # Back to cylindrical coordinates
+        R= nu.sqrt(x[:,0]**2.+x[:,1]**2.)
+        phi= nu.arctan2(x[:,1],x[:,0]) % (2.*nu.pi)
+        cosphi, sinphi= nu.cos(phi), nu.sin(phi)
+        vR= v[:,0]*cosphi+v[:,1]*sinphi
+        vT= v[:,1]*cosphi-v[:,0]*sinphi
+        if self._dim == 6:
+            return nu.array([R,vR,vT,x[:,2],v[:,2],phi])
+        else:
+            return nu.array([R,vR,vT,phi])
+
+def _integrate_chunked(integrator,vxvv,t,chunksize):
+    """
+    NAME:
+       _integrate_chunked
+    PURPOSE:
+       generator that integrates one or more orbits in chunks of output times, each chunk starting from the end of the previous one
+    INPUT:
+       integrator - function integrator(vxvv,t) that integrates a chunk and returns the [...,len(t),dim] orbit or a tuple (orbit,...) of such arrays
+       vxvv - [dim] or [nobj,dim] initial conditions
+       t - output times
+       chunksize - number of output times in each chunk
+    OUTPUT:
+       yields (t,orbit,...) for each chunk, with the orbit only containing the output times in that chunk
+    HISTORY:
+       2017-09-12 - Written - agent
+    """
+    if chunksize < 1:
+        raise ValueError('chunksize must be at least 1')
+    t= nu.array(t)
+    nt= len(t)
+    indx= 0
+    while indx < nt:
+        if indx == 0:
+            tchunk= t[:max(chunksize,2)]
+        else: # Start from the last time of the previous chunk
+            tchunk= t[indx-1:indx+chunksize]
+        out= integrator(vxvv,tchunk)
+        if not isinstance(out,tuple): out= (out,)
+        if indx == 0:
+            out= tuple(o[...,:chunksize,:] for o in out)
+            tchunk= tchunk[:chunksize]
+        else:
+            out= tuple(o[...,1:,:] for o in out)
+            tchunk= tchunk[1:]
+        # Continue from the last output time in this chunk
+        vxvv= out[0][...,-1,:]
+        yield (tchunk,)+out
+        indx+= chunksize
+
+def _integrate_memmap(integrator,vxvv,t,filename,chunksize,nacc=0):
+    """
+    NAME:
+       _integrate_memmap
+    PURPOSE:
+       integrate an orbit in chunks of output times, writing the output to a memory-mapped .npy file as the integration advances
+    INPUT:
+       integrator - function integrator(vxvv,t) that integrates a chunk and returns the [...,len(t),dim] orbit or, if nacc > 0, (orbit,[...,len(t),nacc] acceleration)
+       vxvv - [dim] or [nobj,dim] initial conditions
+       t - output times
+       filename - name of the .npy file to write the output to
+       chunksize - number of output times integrated in each chunk
+       nacc= (0) number of acceleration components returned by the integrator, stored as additional columns in the file
+    OUTPUT:
+       [...,len(t),dim] numpy.memmap of the orbit or, if nacc > 0, ([...,len(t),dim] memmap of the orbit,[...,len(t),nacc] memmap of the acceleration)
+    HISTORY:
+       2017-09-12 - Written - agent
+    """
+    vxvv= nu.array(vxvv)
+    dim= vxvv.shape[-1]
+    out= nu.lib.format.open_memmap(filename,mode='w+',dtype=nu.float64,
+                                   shape=vxvv.shape[:-1]+(len(t),dim+nacc))
+    indx= 0
+    for chunk in _integrate_chunked(integrator,vxvv,t,chunksize):
+        nchunk= len(chunk[0])
+        out[...,indx:indx+nchunk,:dim]= chunk[1]
+        if nacc > 0:
+            out[...,indx:indx+nchunk,dim:]= chunk[2]
+        indx+= nchunk
+    out.flush()
+    if nacc > 0:
+        return (out[...,:dim],out[...,dim:])
+    else:
+        return out
+
 def _check_roSet(orb,kwargs,funcName):
     """Function to check whether ro is set, because it's required for funcName"""
     if not orb._roSet and kwargs.get('ro',None) is None:
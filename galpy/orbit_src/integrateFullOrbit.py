@@ -1,13 +1,14 @@
 import sys
 import sysconfig
 import warnings
+import numbers
 import numpy as nu
 import ctypes
 import ctypes.util
 from numpy.ctypeslib import ndpointer
 import os
-from galpy import potential
-from galpy.util import galpyWarning
+from galpy import potential, potential_src
+from galpy.util import galpyWarning, config
 from galpy.orbit_src.integratePlanarOrbit import _parse_integrator, _parse_tol
 #Find and load the library
 _lib= None
@@ -36,6 +37,7 @@ if _lib is None: #pragma: no cover
     _ext_loaded= False
 else:
     _ext_loaded= True
+    config._register_openmp_lib(_lib)
 
 def _parse_pot(pot,potforactions=False,potfortorus=False):
     """Parse the potential so it can be fed to C"""
@@ -45,175 +47,231 @@ def _parse_pot(pot,potforactions=False,potfortorus=False):
     #Initialize everything
     pot_type= []
     pot_args= []
-    npot= len(pot)
+    npot= 0
     for p in pot:
-        if isinstance(p,potential.LogarithmicHaloPotential):
-            pot_type.append(0)
-            pot_args.extend([p._amp,p._q,p._core2])
-        elif isinstance(p,potential.DehnenBarPotential):
-            pot_type.append(1)
-            pot_args.extend([p._amp*p._af,p._tform,p._tsteady,p._rb,p._omegab,
-                             p._barphi])
-        elif isinstance(p,potential.MiyamotoNagaiPotential):
-            pot_type.append(5)
-            pot_args.extend([p._amp,p._a,p._b])
-        elif isinstance(p,potential.PowerSphericalPotential):
-            pot_type.append(7)
-            pot_args.extend([p._amp,p.alpha])
-        elif isinstance(p,potential.HernquistPotential):
-            pot_type.append(8)
-            pot_args.extend([p._amp,p.a])
-        elif isinstance(p,potential.NFWPotential):
-            pot_type.append(9)
-            pot_args.extend([p._amp,p.a])
-        elif isinstance(p,potential.JaffePotential):
-            pot_type.append(10)
-            pot_args.extend([p._amp,p.a])
-        elif isinstance(p,potential.DoubleExponentialDiskPotential):
-            pot_type.append(11)
-            pot_args.extend([p._amp,p._alpha,p._beta,p._kmaxFac,
-                             p._nzeros,p._glorder])
-            pot_args.extend([p._glx[ii] for ii in range(p._glorder)])
-            pot_args.extend([p._glw[ii] for ii in range(p._glorder)])
-            pot_args.extend([p._j0zeros[ii] for ii in range(p._nzeros+1)])
-            pot_args.extend([p._dj0zeros[ii] for ii in range(p._nzeros+1)])
-            pot_args.extend([p._j1zeros[ii] for ii in range(p._nzeros+1)])
-            pot_args.extend([p._dj1zeros[ii] for ii in range(p._nzeros+1)])
-            pot_args.extend([p._kp._amp,p._kp.alpha])
-        elif isinstance(p,potential.FlattenedPowerPotential):
-            pot_type.append(12)
-            pot_args.extend([p._amp,p.alpha,p.q2,p.core2])
-        elif isinstance(p,potential.interpRZPotential):
-            pot_type.append(13)
-            pot_args.extend([len(p._rgrid),len(p._zgrid)])
-            if p._logR:
-                pot_args.extend([p._logrgrid[ii] for ii in range(len(p._rgrid))])
-            else:
-                pot_args.extend([p._rgrid[ii] for ii in range(len(p._rgrid))])
-            pot_args.extend([p._zgrid[ii] for ii in range(len(p._zgrid))])
-            if potforactions or potfortorus:
-                pot_args.extend([x for x in p._potGrid_splinecoeffs.flatten(order='C')])
-            if not potforactions:
-                pot_args.extend([x for x in p._rforceGrid_splinecoeffs.flatten(order='C')])
-                pot_args.extend([x for x in p._zforceGrid_splinecoeffs.flatten(order='C')])
-            pot_args.extend([p._amp,int(p._logR)])
-        elif isinstance(p,potential.IsochronePotential):
-            pot_type.append(14)
-            pot_args.extend([p._amp,p.b])
-        elif isinstance(p,potential.PowerSphericalPotentialwCutoff):
-            pot_type.append(15)
-            pot_args.extend([p._amp,p.alpha,p.rc])
-        elif isinstance(p,potential.MN3ExponentialDiskPotential):
-            # Three Miyamoto-Nagai disks
-            npot+= 2
-            pot_type.extend([5,5,5])
-            pot_args.extend([p._amp*p._mn3[0]._amp,
-                             p._mn3[0]._a,p._mn3[0]._b,
-                             p._amp*p._mn3[1]._amp,
-                             p._mn3[1]._a,p._mn3[1]._b,
-                             p._amp*p._mn3[2]._amp,
-                             p._mn3[2]._a,p._mn3[2]._b])
-        elif isinstance(p,potential.KuzminKutuzovStaeckelPotential):
-            pot_type.append(16)
-            pot_args.extend([p._amp,p._ac,p._Delta])
-        elif isinstance(p,potential.PlummerPotential):
-            pot_type.append(17)
-            pot_args.extend([p._amp,p._b])
-        elif isinstance(p,potential.PseudoIsothermalPotential):
-            pot_type.append(18)
-            pot_args.extend([p._amp,p._a])
-        elif isinstance(p,potential.KuzminDiskPotential):
-            pot_type.append(19)
-            pot_args.extend([p._amp,p._a])
-        elif isinstance(p,potential.BurkertPotential):
-            pot_type.append(20)
-            pot_args.extend([p._amp,p.a])
-        elif isinstance(p,potential.TwoPowerTriaxialPotential):
-            if isinstance(p,potential.TriaxialHernquistPotential):
-                pot_type.append(21)
-            elif isinstance(p,potential.TriaxialNFWPotential):
-                pot_type.append(22)
-            elif isinstance(p,potential.TriaxialJaffePotential):
-                pot_type.append(23)
-            pot_args.extend([p._amp,p.a,p._b2,p._c2,int(p._aligned)])
-            if not p._aligned:
-                pot_args.extend(list(p._rot.flatten()))
-            else:
-                pot_args.extend(list(nu.eye(3).flatten())) # not actually used
-            pot_args.append(p._glorder)
-            pot_args.extend([p._glx[ii] for ii in range(p._glorder)])
-            # this adds some common factors to the integration weights
-            pot_args.extend([-p._glw[ii]*p._b*p._c/p.a**3.\
-                                  /nu.sqrt(( 1.+(p._b2-1.)*p._glx[ii]**2.)
-                                           *(1.+(p._c2-1.)*p._glx[ii]**2.))
-                             for ii in range(p._glorder)])
-            pot_args.extend([0.,0.,0.,0.,0.,0.]) # for caching
-        elif isinstance(p,potential.SCFPotential):
-            # Type 24, see stand-alone parser below
-            pt,pa= _parse_scf_pot(p)
-            pot_type.append(pt)
-            pot_args.extend(pa)
-        elif isinstance(p,potential.SoftenedNeedleBarPotential):
-            pot_type.append(25)
-            pot_args.extend([p._amp,p._a,p._b,p._c2,p._pa,p._omegab])
-            pot_args.extend([0.,0.,0.,0.,0.,0.,0.]) # for caching
-        elif isinstance(p,potential.DiskSCFPotential):
-            # Need to pull this apart into: (a) SCF part, (b) constituent
-            # [Sigma_i,h_i] parts
-            # (a) SCF, multiply in any add'l amp
-            pt,pa= _parse_scf_pot(p._scf,extra_amp=p._amp)
-            pot_type.append(pt)
-            pot_args.extend(pa)
-            # (b) constituent [Sigma_i,h_i] parts
-            for Sigma,hz in zip(p._Sigma_dict,p._hz_dict):
-                npot+= 1
-                pot_type.append(26)
-                stype= Sigma.get('type','exp')
-                if stype == 'exp' \
-                        or (stype == 'exp' and 'Rhole' in Sigma):
-                    pot_args.extend([3,0,
-                                     4.*nu.pi*Sigma.get('amp',1.)*p._amp,
-                                     Sigma.get('h',1./3.)])
-                elif stype == 'expwhole' \
-                        or (stype == 'exp' and 'Rhole' in Sigma):
-                    pot_args.extend([4,1,
-                                     4.*nu.pi*Sigma.get('amp',1.)*p._amp,
-                                     Sigma.get('h',1./3.),
-                                     Sigma.get('Rhole',0.5)])
-                hztype= hz.get('type','exp')
-                if hztype == 'exp':
-                    pot_args.extend([0,hz.get('h',0.0375)])
-                elif hztype == 'sech2':
-                    pot_args.extend([1,hz.get('h',0.0375)])
-        elif isinstance(p, potential.SpiralArmsPotential):
-            pot_type.append(27)
-            pot_args.extend([len(p._Cs), p._amp, p._N, p._sin_alpha, p._tan_alpha, p._r_ref, p._phi_ref,
-                             p._Rs, p._H, p._omega])
-            pot_args.extend(p._Cs)
-        ############################## WRAPPERS ###############################
-        elif isinstance(p,potential.DehnenSmoothWrapperPotential):
-            pot_type.append(-1)
-            wrap_npot, wrap_pot_type, wrap_pot_args= \
-                _parse_pot(p._pot,
-                           potforactions=potforactions,potfortorus=potfortorus)
-            pot_args.extend([wrap_npot,len(wrap_pot_args)])
-            pot_type.extend(wrap_pot_type)
-            pot_args.extend(wrap_pot_args)
-            pot_args.extend([p._amp,p._tform,p._tsteady])
-        elif isinstance(p,potential.SolidBodyRotationWrapperPotential):
-            pot_type.append(-2)
-            # Not sure how to easily avoid this duplication
-            wrap_npot, wrap_pot_type, wrap_pot_args= \
-                _parse_pot(p._pot,
-                           potforactions=potforactions,potfortorus=potfortorus)
-            pot_args.extend([wrap_npot,len(wrap_pot_args)])
-            pot_type.extend(wrap_pot_type)
-            pot_args.extend(wrap_pot_args)
-            pot_args.extend([p._amp,p._omega,p._pa])
-    pot_type= nu.array(pot_type,dtype=nu.int32,order='C')
-    pot_args= nu.array(pot_args,dtype=nu.float64,order='C')
+        tnpot, tpot_type, tpot_args= _parse_single_pot(p,potforactions=potforactions,
+                              potfortorus=potfortorus)
+        npot+= tnpot
+        pot_type.append(tpot_type)
+        pot_args.append(tpot_args)
+    pot_type= nu.ascontiguousarray(nu.concatenate(pot_type),dtype=nu.int32)
+    pot_args= nu.ascontiguousarray(nu.concatenate(pot_args),dtype=nu.float64)
     return (npot,pot_type,pot_args)
 
+def _c_parse_key(p):
+    """Fingerprint of the parameters of a potential that determine its C representation"""
+    return tuple([(k,_c_parse_key_value(p.__dict__[k]))
+                  for k in sorted(p.__dict__) if not k == '_c_parse_cache'])
+
+def _c_parse_key_value(v):
+    """Fingerprint of a single attribute of a potential: the value of numbers and strings, the contents of arrays, recursing into containers and nested potentials, and the identity of anything else"""
+    if v is None or isinstance(v,(numbers.Number,str)):
+        return v
+    elif isinstance(v,nu.ndarray):
+        return (v.shape,v.dtype.str,hash(v.tobytes()))
+    elif isinstance(v,(list,tuple)):
+        return tuple([_c_parse_key_value(x) for x in v])
+    elif isinstance(v,(potential.Potential,potential.planarPotential,
+                       potential.linearPotential)):
+        return _c_parse_key(v)
+    else:
+        return id(v)
+
+def _parse_single_pot(p,potforactions=False,potfortorus=False):
+    """Parse a single potential so it can be fed to C, caching the result on the instance"""
+    cache_key= (potforactions,potfortorus)
+    cache_holder= p
+    # The cache is keyed on the current parameters, so it is never stale
+    param_key= _c_parse_key(cache_holder)
+    cached= getattr(cache_holder,'_c_parse_cache',{}).get(cache_key)
+    if not cached is None and cached[0] == param_key:
+        return cached[1]
+    npot= 1
+    pot_type= []
+    pot_args= []
+    if isinstance(p,potential.LogarithmicHaloPotential):
+        pot_type.append(0)
+        pot_args.extend([p._amp,p._q,p._core2])
+    elif isinstance(p,potential.DehnenBarPotential):
+        pot_type.append(1)
+        pot_args.extend([p._amp*p._af,p._tform,p._tsteady,p._rb,p._omegab,
+                         p._barphi])
+    elif isinstance(p,potential.MiyamotoNagaiPotential):
+        pot_type.append(5)
+        pot_args.extend([p._amp,p._a,p._b])
+    elif isinstance(p,potential.PowerSphericalPotential):
+        pot_type.append(7)
+        pot_args.extend([p._amp,p.alpha])
+    elif isinstance(p,potential.HernquistPotential):
+        pot_type.append(8)
+        pot_args.extend([p._amp,p.a])
+    elif isinstance(p,potential.NFWPotential):
+        pot_type.append(9)
+        pot_args.extend([p._amp,p.a])
+    elif isinstance(p,potential.JaffePotential):
+        pot_type.append(10)
+        pot_args.extend([p._amp,p.a])
+    elif isinstance(p,potential.DoubleExponentialDiskPotential):
+        pot_type.append(11)
+        pot_args.extend([p._amp,p._alpha,p._beta,p._kmaxFac,
+                         p._nzeros,p._glorder])
+        pot_args.extend([p._glx[ii] for ii in range(p._glorder)])
+        pot_args.extend([p._glw[ii] for ii in range(p._glorder)])
+        pot_args.extend([p._j0zeros[ii] for ii in range(p._nzeros+1)])
+        pot_args.extend([p._dj0zeros[ii] for ii in range(p._nzeros+1)])
+        pot_args.extend([p._j1zeros[ii] for ii in range(p._nzeros+1)])
+        pot_args.extend([p._dj1zeros[ii] for ii in range(p._nzeros+1)])
+        pot_args.extend([p._kp._amp,p._kp.alpha])
+    elif isinstance(p,potential.FlattenedPowerPotential):
+        pot_type.append(12)
+        pot_args.extend([p._amp,p.alpha,p.q2,p.core2])
+    elif isinstance(p,potential.interpRZPotential):
+        pot_type.append(13)
+        pot_args.extend([len(p._rgrid),len(p._zgrid)])
+        if p._logR:
+            pot_args.extend([p._logrgrid[ii] for ii in range(len(p._rgrid))])
+        else:
+            pot_args.extend([p._rgrid[ii] for ii in range(len(p._rgrid))])
+        pot_args.extend([p._zgrid[ii] for ii in range(len(p._zgrid))])
+        if potforactions or potfortorus:
+            pot_args.extend([x for x in p._potGrid_splinecoeffs.flatten(order='C')])
+        if not potforactions:
+            pot_args.extend([x for x in p._rforceGrid_splinecoeffs.flatten(order='C')])
+            pot_args.extend([x for x in p._zforceGrid_splinecoeffs.flatten(order='C')])
+        pot_args.extend([p._amp,int(p._logR)])
+    elif isinstance(p,potential.IsochronePotential):
+        pot_type.append(14)
+        pot_args.extend([p._amp,p.b])
+    elif isinstance(p,potential.PowerSphericalPotentialwCutoff):
+        pot_type.append(15)
+        pot_args.extend([p._amp,p.alpha,p.rc])
+    elif isinstance(p,potential.MN3ExponentialDiskPotential):
+        # Three Miyamoto-Nagai disks
+        npot+= 2
+        pot_type.extend([5,5,5])
+        pot_args.extend([p._amp*p._mn3[0]._amp,
+                         p._mn3[0]._a,p._mn3[0]._b,
+                         p._amp*p._mn3[1]._amp,
+                         p._mn3[1]._a,p._mn3[1]._b,
+                         p._amp*p._mn3[2]._amp,
+                         p._mn3[2]._a,p._mn3[2]._b])
+    elif isinstance(p,potential.KuzminKutuzovStaeckelPotential):
+        pot_type.append(16)
+        pot_args.extend([p._amp,p._ac,p._Delta])
+    elif isinstance(p,potential.PlummerPotential):
+        pot_type.append(17)
+        pot_args.extend([p._amp,p._b])
+    elif isinstance(p,potential.PseudoIsothermalPotential):
+        pot_type.append(18)
+        pot_args.extend([p._amp,p._a])
+    elif isinstance(p,potential.KuzminDiskPotential):
+        pot_type.append(19)
+        pot_args.extend([p._amp,p._a])
+    elif isinstance(p,potential.BurkertPotential):
+        pot_type.append(20)
+        pot_args.extend([p._amp,p.a])
+    elif isinstance(p,potential.TwoPowerTriaxialPotential):
+        if isinstance(p,potential.TriaxialHernquistPotential):
+            pot_type.append(21)
+        elif isinstance(p,potential.TriaxialNFWPotential):
+            pot_type.append(22)
+        elif isinstance(p,potential.TriaxialJaffePotential):
+            pot_type.append(23)
+        pot_args.extend([p._amp,p.a,p._b2,p._c2,int(p._aligned)])
+        if not p._aligned:
+            pot_args.extend(list(p._rot.flatten()))
+        else:
+            pot_args.extend(list(nu.eye(3).flatten())) # not actually used
+        pot_args.append(p._glorder)
+        pot_args.extend([p._glx[ii] for ii in range(p._glorder)])
+        # this adds some common factors to the integration weights
+        pot_args.extend([-p._glw[ii]*p._b*p._c/p.a**3.\
+                              /nu.sqrt(( 1.+(p._b2-1.)*p._glx[ii]**2.)
+                                       *(1.+(p._c2-1.)*p._glx[ii]**2.))
+                         for ii in range(p._glorder)])
+        pot_args.extend([0.,0.,0.,0.,0.,0.]) # for caching
+    elif isinstance(p,potential.SCFPotential):
+        # Type 24, see stand-alone parser below
+        pt,pa= _parse_scf_pot(p)
+        pot_type.append(pt)
+        pot_args.extend(pa)
+    elif isinstance(p,potential.SoftenedNeedleBarPotential):
+        pot_type.append(25)
+        pot_args.extend([p._amp,p._a,p._b,p._c2,p._pa,p._omegab])
+        pot_args.extend([0.,0.,0.,0.,0.,0.,0.]) # for caching
+    elif isinstance(p,potential.DiskSCFPotential):
+        # Need to pull this apart into: (a) SCF part, (b) constituent
+        # [Sigma_i,h_i] parts
+        # (a) SCF, multiply in any add'l amp
+        pt,pa= _parse_scf_pot(p._scf,extra_amp=p._amp)
+        pot_type.append(pt)
+        pot_args.extend(pa)
+        # (b) constituent [Sigma_i,h_i] parts
+        for Sigma,hz in zip(p._Sigma_dict,p._hz_dict):
+            npot+= 1
+            pot_type.append(26)
+            stype= Sigma.get('type','exp')
+            if stype == 'exp' \
+                    or (stype == 'exp' and 'Rhole' in Sigma):
+                pot_args.extend([3,0,
+                                 4.*nu.pi*Sigma.get('amp',1.)*p._amp,
+                                 Sigma.get('h',1./3.)])
+            elif stype == 'expwhole' \
+                    or (stype == 'exp' and 'Rhole' in Sigma):
+                pot_args.extend([4,1,
+                                 4.*nu.pi*Sigma.get('amp',1.)*p._amp,
+                                 Sigma.get('h',1./3.),
+                                 Sigma.get('Rhole',0.5)])
+            hztype= hz.get('type','exp')
+            if hztype == 'exp':
+                pot_args.extend([0,hz.get('h',0.0375)])
+            elif hztype == 'sech2':
+                pot_args.extend([1,hz.get('h',0.0375)])
+    elif isinstance(p, potential.SpiralArmsPotential):
+        pot_type.append(27)
+        pot_args.extend([len(p._Cs), p._amp, p._N, p._sin_alpha, p._tan_alpha, p._r_ref, p._phi_ref,
+                         p._Rs, p._H, p._omega])
+        pot_args.extend(p._Cs)
+    elif isinstance(p,potential.FerrersPotential):
+        pot_type.append(28)
+        pot_args.extend(_parse_ferrers_pot(p))
+    elif isinstance(p,potential.MovingObjectPotential):
+        pot_type.append(29)
+        pot_args.extend(_parse_movingobject_pot(p))
+    elif isinstance(p,potential.RazorThinExponentialDiskPotential):
+        pot_type.append(30)
+        pot_args.extend([p._amp,p._alpha,p._glorder])
+        pot_args.extend(p._glx)
+        pot_args.extend(p._glw)
+    ############################## WRAPPERS ###############################
+    elif isinstance(p,potential.DehnenSmoothWrapperPotential):
+        pot_type.append(-1)
+        wrap_npot, wrap_pot_type, wrap_pot_args= \
+            _parse_pot(p._pot,
+                       potforactions=potforactions,potfortorus=potfortorus)
+        pot_args.extend([wrap_npot,len(wrap_pot_args)])
+        pot_type.extend(wrap_pot_type)
+        pot_args.extend(wrap_pot_args)
+        pot_args.extend([p._amp,p._tform,p._tsteady])
+    elif isinstance(p,potential.SolidBodyRotationWrapperPotential):
+        pot_type.append(-2)
+        # Not sure how to easily avoid this duplication
+        wrap_npot, wrap_pot_type, wrap_pot_args= \
+            _parse_pot(p._pot,
+                       potforactions=potforactions,potfortorus=potfortorus)
+        pot_args.extend([wrap_npot,len(wrap_pot_args)])
+        pot_type.extend(wrap_pot_type)
+        pot_args.extend(wrap_pot_args)
+        pot_args.extend([p._amp,p._omega,p._pa])
+    out= (npot,nu.array(pot_type,dtype=nu.int32),
+          nu.array(pot_args,dtype=nu.float64))
+    # Don't cache wrappers, because the wrapped potential may change
+    if not isinstance(p,potential_src.WrapperPotential.WrapperPotential):
+        if not hasattr(cache_holder,'_c_parse_cache'):
+            cache_holder._c_parse_cache= {}
+        cache_holder._c_parse_cache[cache_key]= (param_key,out)
+    return out
+
 def _parse_scf_pot(p,extra_amp=1.):
     # Stand-alone parser for SCF, bc re-used
     isNonAxi= p.isNonAxi
@@ -225,7 +283,38 @@ def _parse_scf_pot(p,extra_amp=1.):
     pot_args.extend([-1.,0,0,0,0,0,0])    
     return (24,pot_args)
 
-def integrateFullOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,dt=None):
+def _parse_ferrers_pot(p,glorder=50):
+    # Stand-alone parser for Ferrers, bc re-used
+    pot_args= [p._amp*nu.pi*p._rhoc_M*p.a**3*p._b*p._c,
+               p._a2,p._b2*p._a2,p._c2*p._a2,p.n,p._omegab,p._pa,glorder]
+    glx, glw= nu.polynomial.legendre.leggauss(glorder)
+    pot_args.extend(glx)
+    pot_args.extend(glw)
+    pot_args.extend([0.,0.,0.,0.,0.,0.,0.]) # for caching
+    return pot_args
+
+def _parse_movingobject_pot(p):
+    # Stand-alone parser for MovingObject, bc re-used; tabulates the
+    # pre-integrated orbit of the object in rectangular coordinates
+    t= nu.array(p._orb._orb.t)
+    orb= p._orb._orb.orbit
+    sindx= nu.argsort(t)
+    t= t[sindx]
+    R, phi= orb[sindx,0], orb[sindx,-1]
+    if orb.shape[1] == 6:
+        z= orb[sindx,3]
+    else:
+        z= nu.zeros_like(R)
+    pot_args= [len(t)]
+    pot_args.extend(t)
+    pot_args.extend(R*nu.cos(phi))
+    pot_args.extend(R*nu.sin(phi))
+    pot_args.extend(z)
+    pot_args.extend([p._amp,p._softening._softening_length,t[0],t[-1]])
+    return pot_args
+
+def integrateFullOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,dt=None,
+                         dense_output=False):
     """
     NAME:
        integrateFullOrbit_c
@@ -233,34 +322,47 @@ def integrateFullOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,dt=None):
        C integrate an ode for a FullOrbit
     INPUT:
        pot - Potential or list of such instances
-       yo - initial condition [q,p]
+       yo - initial condition [q,p], shape [6] or [nobj,6] to integrate nobj orbits in a single call (parallelized over orbits with OpenMP)
        t - set of times at which one wants the result
        int_method= 'leapfrog_c', 'rk4_c', 'rk6_c', 'symplec4_c'
        rtol, atol
        dt= (None) force integrator to use this stepsize (default is to automatically determine one))
+       dense_output= (False) if True, also return the rectangular acceleration at each time in t, for dense (Hermite) interpolation of the orbit
     OUTPUT:
-       (y,err)
-       y : array, shape (len(y0), len(t))
+       (y,err) or (y,err,acc) if dense_output
+       y : array, shape (len(t),6) or (nobj,len(t),6)
        Array containing the value of y for each desired time in t, \
        with the initial value y0 in the first row.
-       err: error message, if not zero: 1 means maximum step reduction happened for adaptive integrators
+       err: error message, if not zero: 1 means maximum step reduction happened for adaptive integrators (array with one entry per orbit if yo is [nobj,6])
+       acc : array, shape (len(t),3) or (nobj,len(t),3), rectangular acceleration at each time in t (only if dense_output)
     HISTORY:
        2011-11-13 - Written - Bovy (IAS)
+       2017-09-01 - Added integration of multiple orbits in a single call - agent
+       2017-09-05 - Added dense_output - agent
     """
     rtol, atol= _parse_tol(rtol,atol)
     npot, pot_type, pot_args= _parse_pot(pot)
     int_method_c= _parse_integrator(int_method)
     if dt is None: 
         dt= -9999.99
+    yo= nu.array(yo)
+    single_obj= len(yo.shape) == 1
+    yo= nu.atleast_2d(yo)
+    nobj= len(yo)
 
     #Set up result array
-    result= nu.empty((len(t),6))
-    err= ctypes.c_int(0)
+    result= nu.empty((nobj,len(t),6))
+    err= nu.zeros(nobj,dtype=nu.int32)
+    if dense_output:
+        acc= nu.empty((nobj,len(t),3))
+    else:
+        acc= nu.empty(1) # not used
 
     #Set up the C code
     ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
     integrationFunc= _lib.integrateFullOrbit
-    integrationFunc.argtypes= [ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+    integrationFunc.argtypes= [ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
                                ctypes.c_int,                             
                                ndpointer(dtype=nu.float64,flags=ndarrayFlags),
                                ctypes.c_int,
@@ -270,18 +372,22 @@ def integrateFullOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,dt=None):
                                ctypes.c_double,
                                ctypes.c_double,
                                ndpointer(dtype=nu.float64,flags=ndarrayFlags),
-                               ctypes.POINTER(ctypes.c_int),
-                               ctypes.c_int]
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ctypes.c_int,
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags)]
 
     #Array requirements, first store old order
-    f_cont= [yo.flags['F_CONTIGUOUS'],
-             t.flags['F_CONTIGUOUS']]
+    f_cont= [t.flags['F_CONTIGUOUS']]
     yo= nu.require(yo,dtype=nu.float64,requirements=['C','W'])
     t= nu.require(t,dtype=nu.float64,requirements=['C','W'])
     result= nu.require(result,dtype=nu.float64,requirements=['C','W'])
+    err= nu.require(err,dtype=nu.int32,requirements=['C','W'])
+    acc= nu.require(acc,dtype=nu.float64,requirements=['C','W'])
 
     #Run the C code
-    integrationFunc(yo,
+    integrationFunc(ctypes.c_int(nobj),
+                    yo,
                     ctypes.c_int(len(t)),
                     t,
                     ctypes.c_int(npot),
@@ -290,53 +396,161 @@ def integrateFullOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,dt=None):
                     ctypes.c_double(dt),
                     ctypes.c_double(rtol),ctypes.c_double(atol),
                     result,
-                    ctypes.byref(err),
-                    ctypes.c_int(int_method_c))
+                    err,
+                    ctypes.c_int(int_method_c),
+                    ctypes.c_int(dense_output),
+                    acc)
     
-    if int(err.value) == -10: #pragma: no cover
+    if nu.any(err == -10): #pragma: no cover
         raise KeyboardInterrupt("Orbit integration interrupted by CTRL-C (SIGINT)")
 
     #Reset input arrays
-    if f_cont[0]: yo= nu.asfortranarray(yo)
-    if f_cont[1]: t= nu.asfortranarray(t)
+    if f_cont[0]: t= nu.asfortranarray(t)
+
+    if single_obj:
+        result, err, acc= result[0], err[0], acc[0]
+    if dense_output:
+        return (result,err,acc)
+    else:
+        return (result,err)
+
+def integrateFullOrbit_events_c(pot,yo,t,int_method,rtol=None,atol=None,
+                                dt=None,maxevents=1000):
+    """
+    NAME:
+       integrateFullOrbit_events_c
+    PURPOSE:
+       C integrate a set of FullOrbits and detect pericenters, apocenters, z extrema, and disk crossings without storing the orbits
+    INPUT:
+       pot - Potential or list of such instances
+       yo - [nobj,6] initial conditions [q,p] (rectangular)
+       t - set of times at which to check for events (events are found between these times using Hermite interpolation, so at most one event of each type can be found between consecutive times)
+       int_method= 'leapfrog_c', 'rk4_c', 'rk6_c', 'symplec4_c'
+       rtol, atol
+       dt= (None) force integrator to use this stepsize (default is to automatically determine one))
+       maxevents= (1000) maximum number of events to store per orbit
+    OUTPUT:
+       (nevents,etype,etime,estate,yf,err)
+       nevents - [nobj] number of events found for each orbit (can be larger than maxevents, but only maxevents are stored)
+       etype - [nobj,maxevents] type of each event: 0= pericenter, 1= apocenter, 2= z extremum, 3= disk crossing; -1 for unused entries
+       etime - [nobj,maxevents] time of each event
+       estate - [nobj,maxevents,6] rectangular phase-space point at each event
+       yf - [nobj,6] rectangular phase-space point at the final time
+       err - [nobj] error message, if not zero: 1 means maximum step reduction happened for adaptive integrators
+    HISTORY:
+       2017-09-08 - Written - agent
+    """
+    rtol, atol= _parse_tol(rtol,atol)
+    npot, pot_type, pot_args= _parse_pot(pot)
+    int_method_c= _parse_integrator(int_method)
+    if dt is None: 
+        dt= -9999.99
+    yo= nu.atleast_2d(yo)
+    nobj= len(yo)
+
+    #Set up result arrays
+    nevents= nu.zeros(nobj,dtype=nu.int32)
+    etype= -nu.ones((nobj,maxevents),dtype=nu.int32)
+    etime= nu.zeros((nobj,maxevents))+nu.nan
+    estate= nu.zeros((nobj,maxevents,6))+nu.nan
+    yf= nu.empty((nobj,6))
+    err= nu.zeros(nobj,dtype=nu.int32)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    integrationFunc= _lib.integrateFullOrbit_events
+    integrationFunc.argtypes= [ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,                             
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_double,
+                               ctypes.c_double,
+                               ctypes.c_double,
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ctypes.c_int]
+
+    #Array requirements
+    yo= nu.require(yo,dtype=nu.float64,requirements=['C','W'])
+    t= nu.require(t,dtype=nu.float64,requirements=['C','W'])
+
+    #Run the C code
+    integrationFunc(ctypes.c_int(nobj),
+                    yo,
+                    ctypes.c_int(len(t)),
+                    t,
+                    ctypes.c_int(npot),
+                    pot_type,
+                    pot_args,
+                    ctypes.c_double(dt),
+                    ctypes.c_double(rtol),ctypes.c_double(atol),
+                    ctypes.c_int(maxevents),
+                    nevents,
+                    etype,
+                    etime,
+                    estate,
+                    yf,
+                    err,
+                    ctypes.c_int(int_method_c))
+    
+    if nu.any(err == -10): #pragma: no cover
+        raise KeyboardInterrupt("Orbit integration interrupted by CTRL-C (SIGINT)")
 
-    return (result,err.value)
+    return (nevents,etype,etime,estate,yf,err)
 
-def integrateFullOrbit_dxdv_c(pot,yo,dyo,t,int_method,rtol=None,atol=None): #pragma: no cover because not included in v1, uncover when included
+def integrateFullOrbit_dxdv_c(pot,yo,dyo,t,int_method,rtol=None,atol=None,
+                              dt=None):
     """
     NAME:
        integrateFullOrbit_dxdv_c
     PURPOSE:
-       C integrate an ode for a planarOrbit+phase space volume dxdv
+       C integrate an ode for a FullOrbit+phase space volume dxdv
     INPUT:
        pot - Potential or list of such instances
-       yo - initial condition [q,p]
-       dyo - initial condition [dq,dp]
+       yo - initial condition [q,p], shape [6] or [nobj,6]
+       dyo - initial condition [dq,dp], shape [6] or [nobj,6]; a single yo can be combined with multiple dyo to integrate many deviation vectors along the same orbit (all are integrated in a single call, parallelized with OpenMP)
        t - set of times at which one wants the result
-       int_method= 'leapfrog_c', 'rk4_c', 'rk6_c', 'symplec4_c'
+       int_method= 'rk4_c', 'rk6_c', 'dopr54_c'
        rtol, atol
+       dt= (None) force integrator to use this stepsize (default is to automatically determine one))
     OUTPUT:
        (y,err)
-       y : array, shape (len(y0), len(t))
+       y : array, shape (len(t),12) or (nobj,len(t),12)
        Array containing the value of y for each desired time in t, \
        with the initial value y0 in the first row.
-       err: error message if not zero, 1: maximum step reduction happened for adaptive integrators
+       err: error message if not zero, 1: maximum step reduction happened for adaptive integrators (array with one entry per orbit for [nobj,6] input)
     HISTORY:
        2011-11-13 - Written - Bovy (IAS)
+       2017-09-15 - Allow multiple orbits and deviation vectors - agent
     """
     rtol, atol= _parse_tol(rtol,atol)
     npot, pot_type, pot_args= _parse_pot(pot)
     int_method_c= _parse_integrator(int_method)
-    yo= nu.concatenate((yo,dyo))
+    if dt is None: 
+        dt= -9999.99
+    yo, dyo= nu.array(yo), nu.array(dyo)
+    single_obj= len(yo.shape) == 1 and len(dyo.shape) == 1
+    yo, dyo= nu.broadcast_arrays(nu.atleast_2d(yo),nu.atleast_2d(dyo))
+    yo= nu.concatenate((yo,dyo),axis=1)
+    nobj= len(yo)
 
     #Set up result array
-    result= nu.empty((len(t),12))
-    err= ctypes.c_int(0)
+    result= nu.empty((nobj,len(t),12))
+    err= nu.zeros(nobj,dtype=nu.int32)
 
     #Set up the C code
     ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
     integrationFunc= _lib.integrateFullOrbit_dxdv
-    integrationFunc.argtypes= [ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+    integrationFunc.argtypes= [ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
                                ctypes.c_int,                             
                                ndpointer(dtype=nu.float64,flags=ndarrayFlags),
                                ctypes.c_int,
@@ -344,34 +558,129 @@ def integrateFullOrbit_dxdv_c(pot,yo,dyo,t,int_method,rtol=None,atol=None): #pra
                                ndpointer(dtype=nu.float64,flags=ndarrayFlags),
                                ctypes.c_double,
                                ctypes.c_double,
+                               ctypes.c_double,
                                ndpointer(dtype=nu.float64,flags=ndarrayFlags),
-                               ctypes.POINTER(ctypes.c_int),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
                                ctypes.c_int]
 
     #Array requirements, first store old order
-    f_cont= [yo.flags['F_CONTIGUOUS'],
-             t.flags['F_CONTIGUOUS']]
+    f_cont= [t.flags['F_CONTIGUOUS']]
     yo= nu.require(yo,dtype=nu.float64,requirements=['C','W'])
     t= nu.require(t,dtype=nu.float64,requirements=['C','W'])
     result= nu.require(result,dtype=nu.float64,requirements=['C','W'])
+    err= nu.require(err,dtype=nu.int32,requirements=['C','W'])
 
     #Run the C code
-    integrationFunc(yo,
+    integrationFunc(ctypes.c_int(nobj),
+                    yo,
                     ctypes.c_int(len(t)),
                     t,
                     ctypes.c_int(npot),
                     pot_type,
                     pot_args,
+                    ctypes.c_double(dt),
+                    ctypes.c_double(rtol),ctypes.c_double(atol),
+                    result,
+                    err,
+                    ctypes.c_int(int_method_c))
+
+    if nu.any(err == -10): #pragma: no cover
+        raise KeyboardInterrupt("Orbit integration interrupted by CTRL-C (SIGINT)")
+
+    #Reset input arrays
+    if f_cont[0]: t= nu.asfortranarray(t)
+
+    if single_obj:
+        result, err= result[0], err[0]
+    return (result,err)
+
+def integrateFullOrbit_lyapunov_c(pot,yo,dyo,t,int_method,rtol=None,
+                                  atol=None,dt=None):
+    """
+    NAME:
+       integrateFullOrbit_lyapunov_c
+    PURPOSE:
+       C integrate FullOrbits and deviation vectors, renormalizing the deviation vectors at each time in t, to compute the maximal Lyapunov exponent
+    INPUT:
+       pot - Potential or list of such instances
+       yo - initial condition [q,p], shape [6] or [nobj,6]
+       dyo - initial deviation vector [dq,dp], shape [6] or [nobj,6] (normalized internally)
+       t - set of times at which the deviation vector is renormalized and at which one wants the result
+       int_method= 'rk4_c', 'rk6_c', 'dopr54_c'
+       rtol, atol
+       dt= (None) force integrator to use this stepsize (default is to automatically determine one))
+    OUTPUT:
+       (y,lyap,err)
+       y : array, shape (len(t),12) or (nobj,len(t),12): orbit and renormalized deviation vector at each time in t
+       lyap : array, shape (len(t)) or (nobj,len(t)): finite-time estimate of the maximal Lyapunov exponent at each time in t (0 for the first time)
+       err: error message if not zero, 1: maximum step reduction happened for adaptive integrators (array with one entry per orbit for [nobj,6] input)
+    HISTORY:
+       2017-09-15 - Written - agent
+    """
+    rtol, atol= _parse_tol(rtol,atol)
+    npot, pot_type, pot_args= _parse_pot(pot)
+    int_method_c= _parse_integrator(int_method)
+    if dt is None: 
+        dt= -9999.99
+    yo, dyo= nu.array(yo), nu.array(dyo,dtype='float')
+    single_obj= len(yo.shape) == 1 and len(dyo.shape) == 1
+    yo, dyo= nu.broadcast_arrays(nu.atleast_2d(yo),nu.atleast_2d(dyo))
+    dyo= dyo/nu.sqrt(nu.sum(dyo**2.,axis=1))[:,None]
+    yo= nu.concatenate((yo,dyo),axis=1)
+    nobj= len(yo)
+
+    #Set up result arrays
+    result= nu.empty((nobj,len(t),12))
+    lyap= nu.empty((nobj,len(t)))
+    err= nu.zeros(nobj,dtype=nu.int32)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    integrationFunc= _lib.integrateFullOrbit_lyapunov
+    integrationFunc.argtypes= [ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,                             
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_double,
+                               ctypes.c_double,
+                               ctypes.c_double,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ctypes.c_int]
+
+    #Array requirements, first store old order
+    f_cont= [t.flags['F_CONTIGUOUS']]
+    yo= nu.require(yo,dtype=nu.float64,requirements=['C','W'])
+    t= nu.require(t,dtype=nu.float64,requirements=['C','W'])
+    result= nu.require(result,dtype=nu.float64,requirements=['C','W'])
+    lyap= nu.require(lyap,dtype=nu.float64,requirements=['C','W'])
+    err= nu.require(err,dtype=nu.int32,requirements=['C','W'])
+
+    #Run the C code
+    integrationFunc(ctypes.c_int(nobj),
+                    yo,
+                    ctypes.c_int(len(t)),
+                    t,
+                    ctypes.c_int(npot),
+                    pot_type,
+                    pot_args,
+                    ctypes.c_double(dt),
                     ctypes.c_double(rtol),ctypes.c_double(atol),
                     result,
-                    ctypes.byref(err),
+                    lyap,
+                    err,
                     ctypes.c_int(int_method_c))
 
-    if int(err.value) == -10: #pragma: no cover
+    if nu.any(err == -10): #pragma: no cover
         raise KeyboardInterrupt("Orbit integration interrupted by CTRL-C (SIGINT)")
 
     #Reset input arrays
-    if f_cont[0]: yo= nu.asfortranarray(yo)
-    if f_cont[1]: t= nu.asfortranarray(t)
+    if f_cont[0]: t= nu.asfortranarray(t)
 
-    return (result,err.value)
+    if single_obj:
+        result, lyap, err= result[0], lyap[0], err[0]
+    return (result,lyap,err)
@@ -0,0 +1,140 @@
+import sys
+import sysconfig
+import warnings
+import numpy as nu
+import ctypes
+import ctypes.util
+from numpy.ctypeslib import ndpointer
+import os
+from galpy import potential
+from galpy.util import galpyWarning, config
+from galpy.orbit_src.integratePlanarOrbit import _parse_integrator, _parse_tol
+#Find and load the library
+_lib= None
+outerr= None
+PY3= sys.version > '3'
+if PY3: #pragma: no cover
+    _ext_suffix= sysconfig.get_config_var('EXT_SUFFIX')
+else:
+    _ext_suffix= '.so'
+for path in sys.path:
+    try:
+        _lib = ctypes.CDLL(os.path.join(path,'galpy_integrate_c%s' % _ext_suffix))
+    except OSError as e:
+        if os.path.exists(os.path.join(path,'galpy_integrate_c%s' % _ext_suffix)): #pragma: no cover
+            outerr= e
+        _lib = None
+    else:
+        break
+if _lib is None: #pragma: no cover
+    if not outerr is None:
+        warnings.warn("integrateLinearOrbit_c extension module not loaded, because of error '%s' " % outerr,
+                      galpyWarning)
+    else:
+        warnings.warn("integrateLinearOrbit_c extension module not loaded, because galpy_integrate_c%s image was not found" % _ext_suffix,
+                      galpyWarning)
+    _ext_loaded= False
+else:
+    _ext_loaded= True
+    config._register_openmp_lib(_lib)
+
+def _parse_pot(pot):
+    """Parse the potential so it can be fed to C"""
+    #Figure out what's in pot
+    if not isinstance(pot,list):
+        pot= [pot]
+    #Initialize everything
+    pot_type= []
+    pot_args= []
+    npot= len(pot)
+    for p in pot:
+        if isinstance(p,potential.KGPotential):
+            pot_type.append(31)
+            pot_args.extend([p._amp,p._K,p._D2,p._F])
+    pot_type= nu.array(pot_type,dtype=nu.int32,order='C')
+    pot_args= nu.array(pot_args,dtype=nu.float64,order='C')
+    return (npot,pot_type,pot_args)
+
+def integrateLinearOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,dt=None):
+    """
+    NAME:
+       integrateLinearOrbit_c
+    PURPOSE:
+       C integrate an ode for a linearOrbit
+    INPUT:
+       pot - linearPotential or list of such instances
+       yo - initial condition [q,p], shape [2] or [nobj,2] to integrate nobj orbits in a single call (parallelized over orbits with OpenMP)
+       t - set of times at which one wants the result
+       int_method= 'leapfrog_c', 'rk4_c', 'rk6_c', 'symplec4_c'
+       rtol, atol
+       dt= (None) force integrator to use this stepsize (default is to automatically determine one))
+    OUTPUT:
+       (y,err)
+       y : array, shape (len(t),2) or (nobj,len(t),2)
+       Array containing the value of y for each desired time in t, \
+       with the initial value y0 in the first row.
+       err: error message, if not zero: 1 means maximum step reduction happened for adaptive integrators (array with one entry per orbit if yo is [nobj,2])
+    HISTORY:
+       2017-09-21 - Written - agent
+    """
+    rtol, atol= _parse_tol(rtol,atol)
+    npot, pot_type, pot_args= _parse_pot(pot)
+    int_method_c= _parse_integrator(int_method)
+    if dt is None:
+        dt= -9999.99
+    yo= nu.array(yo)
+    single_obj= len(yo.shape) == 1
+    yo= nu.atleast_2d(yo)
+    nobj= len(yo)
+
+    #Set up result array
+    result= nu.empty((nobj,len(t),2))
+    err= nu.zeros(nobj,dtype=nu.int32)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    integrationFunc= _lib.integrateLinearOrbit
+    integrationFunc.argtypes= [ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_double,
+                               ctypes.c_double,
+                               ctypes.c_double,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ctypes.c_int]
+
+    #Array requirements, first store old order
+    f_cont= [t.flags['F_CONTIGUOUS']]
+    yo= nu.require(yo,dtype=nu.float64,requirements=['C','W'])
+    t= nu.require(t,dtype=nu.float64,requirements=['C','W'])
+    result= nu.require(result,dtype=nu.float64,requirements=['C','W'])
+    err= nu.require(err,dtype=nu.int32,requirements=['C','W'])
+
+    #Run the C code
+    integrationFunc(ctypes.c_int(nobj),
+                    yo,
+                    ctypes.c_int(len(t)),
+                    t,
+                    ctypes.c_int(npot),
+                    pot_type,
+                    pot_args,
+                    ctypes.c_double(dt),
+                    ctypes.c_double(rtol),ctypes.c_double(atol),
+                    result,
+                    err,
+                    ctypes.c_int(int_method_c))
+
+    if nu.any(err == -10): #pragma: no cover
+        raise KeyboardInterrupt("Orbit integration interrupted by CTRL-C (SIGINT)")
+
+    #Reset input arrays
+    if f_cont[0]: t= nu.asfortranarray(t)
+
+    if single_obj:
+        result, err= result[0], err[0]
+    return (result,err)
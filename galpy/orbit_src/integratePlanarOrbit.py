@@ -7,7 +7,7 @@ import ctypes.util
 from numpy.ctypeslib import ndpointer
 import os
 from galpy import potential, potential_src
-from galpy.util import galpyWarning
+from galpy.util import galpyWarning, config
 #Find and load the library
 _lib= None
 outerr= None
@@ -35,227 +35,284 @@ if _lib is None: #pragma: no cover
     _ext_loaded= False
 else:
     _ext_loaded= True
+    config._register_openmp_lib(_lib)
 
 def _parse_pot(pot):
     """Parse the potential so it can be fed to C"""
-    from galpy.orbit_src.integrateFullOrbit import _parse_scf_pot
     #Figure out what's in pot
     if not isinstance(pot,list):
         pot= [pot]
     #Initialize everything
     pot_type= []
     pot_args= []
-    npot= len(pot)
+    npot= 0
     for p in pot:
-        if isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                 and isinstance(p._Pot,potential.LogarithmicHaloPotential):
-            pot_type.append(0)
-            pot_args.extend([p._Pot._amp,p._Pot._core2])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) \
-                 and isinstance(p._Pot,potential.DehnenBarPotential):
-            pot_type.append(1)
-            pot_args.extend([p._Pot._amp*p._Pot._af,p._Pot._tform,
-                             p._Pot._tsteady,p._Pot._rb,p._Pot._omegab,
-                             p._Pot._barphi])
-        elif isinstance(p,potential.TransientLogSpiralPotential):
-            pot_type.append(2)
-            pot_args.extend([p._amp,p._A,p._to,p._sigma2,p._alpha,p._m,
-                             p._omegas,p._gamma])
-        elif isinstance(p,potential.SteadyLogSpiralPotential):
-            pot_type.append(3)
-            if p._tform is None:
-                pot_args.extend([p._amp,float('nan'), float('nan'),
-                                 p._A,p._alpha,p._m,
-                                 p._omegas,p._gamma])
-            else:
-                pot_args.extend([p._amp,p._tform,p._tsteady,p._A,p._alpha,p._m,
-                                 p._omegas,p._gamma])
-        elif isinstance(p,potential.EllipticalDiskPotential):
-            pot_type.append(4)
-            if p._tform is None:
-                pot_args.extend([p._amp,float('nan'), float('nan'),
-                                 p._twophio,p._p,p._phib])
-            else:
-                pot_args.extend([p._amp,p._tform,p._tsteady,
-                                 p._twophio,p._p,p._phib])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                 and isinstance(p._Pot,potential.MiyamotoNagaiPotential):
-            pot_type.append(5)
-            pot_args.extend([p._Pot._amp,p._Pot._a,p._Pot._b])
-        elif isinstance(p,potential.LopsidedDiskPotential):
-            pot_type.append(6)
-            if p._tform is None:
-                pot_args.extend([p._amp,float('nan'), float('nan'),
-                                 p._mphio,p._p,p._phib])
-            else:
-                pot_args.extend([p._amp,p._tform,p._tsteady,
-                                 p._mphio,p._p,p._phib])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                 and isinstance(p._Pot,potential.PowerSphericalPotential):
-            pot_type.append(7)
-            pot_args.extend([p._Pot._amp,p._Pot.alpha])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                 and isinstance(p._Pot,potential.HernquistPotential):
-            pot_type.append(8)
-            pot_args.extend([p._Pot._amp,p._Pot.a])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                 and isinstance(p._Pot,potential.NFWPotential):
-            pot_type.append(9)
-            pot_args.extend([p._Pot._amp,p._Pot.a])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                 and isinstance(p._Pot,potential.JaffePotential):
-            pot_type.append(10)
-            pot_args.extend([p._Pot._amp,p._Pot.a])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                and isinstance(p._Pot,potential.DoubleExponentialDiskPotential):
-            pot_type.append(11)
-            pot_args.extend([p._Pot._amp,p._Pot._alpha,
-                             p._Pot._beta,p._Pot._kmaxFac,
-                             p._Pot._nzeros,p._Pot._glorder])
-            pot_args.extend([p._Pot._glx[ii] for ii in range(p._Pot._glorder)])
-            pot_args.extend([p._Pot._glw[ii] for ii in range(p._Pot._glorder)])
-            pot_args.extend([p._Pot._j0zeros[ii] for ii in range(p._Pot._nzeros+1)])
-            pot_args.extend([p._Pot._dj0zeros[ii] for ii in range(p._Pot._nzeros+1)])
-            pot_args.extend([p._Pot._j1zeros[ii] for ii in range(p._Pot._nzeros+1)])
-            pot_args.extend([p._Pot._dj1zeros[ii] for ii in range(p._Pot._nzeros+1)])
-            pot_args.extend([p._Pot._kp._amp,p._Pot._kp.alpha])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                and isinstance(p._Pot,potential.FlattenedPowerPotential):
-            pot_type.append(12)
-            pot_args.extend([p._Pot._amp,p._Pot.alpha,p._Pot.core2])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                 and isinstance(p._Pot,potential.IsochronePotential):
-            pot_type.append(14)
-            pot_args.extend([p._Pot._amp,p._Pot.b])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                 and isinstance(p._Pot,potential.PowerSphericalPotentialwCutoff):
-            pot_type.append(15)
-            pot_args.extend([p._Pot._amp,p._Pot.alpha,p._Pot.rc])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                 and isinstance(p._Pot,potential.MN3ExponentialDiskPotential):
-            # Three Miyamoto-Nagai disks
-            npot+= 2
-            pot_type.extend([5,5,5])
-            pot_args.extend([p._Pot._amp*p._Pot._mn3[0]._amp,
-                             p._Pot._mn3[0]._a,p._Pot._mn3[0]._b,
-                             p._Pot._amp*p._Pot._mn3[1]._amp,
-                             p._Pot._mn3[1]._a,p._Pot._mn3[1]._b,
-                             p._Pot._amp*p._Pot._mn3[2]._amp,
-                             p._Pot._mn3[2]._a,p._Pot._mn3[2]._b])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                 and isinstance(p._Pot,potential.KuzminKutuzovStaeckelPotential):
-            pot_type.append(16)
-            pot_args.extend([p._Pot._amp,p._Pot._ac,p._Pot._Delta])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                 and isinstance(p._Pot,potential.PlummerPotential):
-            pot_type.append(17)
-            pot_args.extend([p._Pot._amp,p._Pot._b])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                 and isinstance(p._Pot,potential.PseudoIsothermalPotential):
-            pot_type.append(18)
-            pot_args.extend([p._Pot._amp,p._Pot._a])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                 and isinstance(p._Pot,potential.KuzminDiskPotential):
-            pot_type.append(19)
-            pot_args.extend([p._Pot._amp,p._Pot._a])
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
-                 and isinstance(p._Pot,potential.BurkertPotential):
-            pot_type.append(20)
-            pot_args.extend([p._Pot._amp,p._Pot.a])
-        elif (isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) or isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential)) and isinstance(p._Pot,potential.TwoPowerTriaxialPotential):
-            if isinstance(p._Pot,potential.TriaxialHernquistPotential):
-                pot_type.append(21)
-            elif isinstance(p._Pot,potential.TriaxialNFWPotential):
-                pot_type.append(22)
-            elif isinstance(p._Pot,potential.TriaxialJaffePotential):
-                pot_type.append(23)
-            pot_args.extend([p._Pot._amp,p._Pot.a,p._Pot._b2,
-                             p._Pot._c2,int(p._Pot._aligned)])
-            if not p._Pot._aligned:
-                pot_args.extend(list(p._Pot._rot.flatten()))
-            else:
-                pot_args.extend(list(nu.eye(3).flatten())) # not actually used
-            pot_args.append(p._Pot._glorder)
-            pot_args.extend([p._Pot._glx[ii] for ii in range(p._Pot._glorder)])
-            # this adds some common factors to the integration weights
-            pot_args.extend([-p._Pot._glw[ii]*p._Pot._b*p._Pot._c/p._Pot.a**3.\
-                                 /nu.sqrt(( 1.+(p._Pot._b2-1.)
-                                            *p._Pot._glx[ii]**2.)
-                                          *(1.+(p._Pot._c2-1.)
-                                            *p._Pot._glx[ii]**2.))
-                             for ii in range(p._Pot._glorder)])
-            pot_args.extend([p._Pot._glw[ii] for ii in range(p._Pot._glorder)])
-            pot_args.extend([0.,0.,0.,0.,0.,0.]) 
-        elif (isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) or isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential)) \
-                 and isinstance(p._Pot,potential.SCFPotential):
-            pt,pa= _parse_scf_pot(p._Pot)
-            pot_type.append(pt)
-            pot_args.extend(pa)
-        elif isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) \
-                 and isinstance(p._Pot,potential.SoftenedNeedleBarPotential):
-            pot_type.append(25)
-            pot_args.extend([p._Pot._amp,p._Pot._a,p._Pot._b,p._Pot._c2,
-                             p._Pot._pa,p._Pot._omegab])
-            pot_args.extend([0.,0.,0.,0.,0.,0.,0.]) # for caching
-        elif (isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) or isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential)) \
-                and isinstance(p._Pot,potential.DiskSCFPotential):
-            # Need to pull this apart into: (a) SCF part, (b) constituent
-            # [Sigma_i,h_i] parts
-            # (a) SCF, multiply in any add'l amp
-            pt,pa= _parse_scf_pot(p._Pot._scf,extra_amp=p._Pot._amp)
-            pot_type.append(pt)
-            pot_args.extend(pa)
-            # (b) constituent [Sigma_i,h_i] parts
-            for Sigma,hz in zip(p._Pot._Sigma_dict,p._Pot._hz_dict):
-                npot+= 1
-                pot_type.append(26)
-                stype= Sigma.get('type','exp')
-                if stype == 'exp' \
-                        or (stype == 'exp' and 'Rhole' in Sigma):
-                    pot_args.extend([3,0,
-                                     4.*nu.pi*Sigma.get('amp',1.)*p._Pot._amp,
-                                     Sigma.get('h',1./3.)])
-                elif stype == 'expwhole' \
-                        or (stype == 'exp' and 'Rhole' in Sigma):
-                    pot_args.extend([4,1,
-                                     4.*nu.pi*Sigma.get('amp',1.)*p._Pot._amp,
-                                     Sigma.get('h',1./3.),
-                                     Sigma.get('Rhole',0.5)])
-                hztype= hz.get('type','exp')
-                if hztype == 'exp':
-                    pot_args.extend([0,hz.get('h',0.0375)])
-                elif hztype == 'sech2':
-                    pot_args.extend([1,hz.get('h',0.0375)])
-        elif isinstance(p, potential_src.planarPotential.planarPotentialFromFullPotential) \
-                and isinstance(p._Pot, potential.SpiralArmsPotential):
-            pot_type.append(27)
-            pot_args.extend([len(p._Pot._Cs), p._Pot._amp, p._Pot._N, p._Pot._sin_alpha,
-                             p._Pot._tan_alpha, p._Pot._r_ref, p._Pot._phi_ref, p._Pot._Rs, p._Pot._H, p._Pot._omega])
-            pot_args.extend(p._Pot._Cs)
-        ############################## WRAPPERS ###############################
-        elif (isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) or isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential)) \
-                and isinstance(p._Pot,potential.DehnenSmoothWrapperPotential):
-            pot_type.append(-1)
-            wrap_npot, wrap_pot_type, wrap_pot_args= \
-                _parse_pot(potential.toPlanarPotential(p._Pot._pot))
-            pot_args.extend([wrap_npot,len(wrap_pot_args)])
-            pot_type.extend(wrap_pot_type)
-            pot_args.extend(wrap_pot_args)
-            pot_args.extend([p._Pot._amp,p._Pot._tform,p._Pot._tsteady])
-        elif (isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) or isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential)) \
-                and isinstance(p._Pot,potential.SolidBodyRotationWrapperPotential):
-            pot_type.append(-2)
-            # Not sure how to easily avoid this duplication
-            wrap_npot, wrap_pot_type, wrap_pot_args= \
-                _parse_pot(potential.toPlanarPotential(p._Pot._pot))
-            pot_args.extend([wrap_npot,len(wrap_pot_args)])
-            pot_type.extend(wrap_pot_type)
-            pot_args.extend(wrap_pot_args)
-            pot_args.extend([p._Pot._amp,p._Pot._omega,p._Pot._pa])
-    pot_type= nu.array(pot_type,dtype=nu.int32,order='C')
-    pot_args= nu.array(pot_args,dtype=nu.float64,order='C')
+        tnpot, tpot_type, tpot_args= _parse_single_pot(p)
+        npot+= tnpot
+        pot_type.append(tpot_type)
+        pot_args.append(tpot_args)
+    pot_type= nu.ascontiguousarray(nu.concatenate(pot_type),dtype=nu.int32)
+    pot_args= nu.ascontiguousarray(nu.concatenate(pot_args),dtype=nu.float64)
     return (npot,pot_type,pot_args)
 
+def _parse_single_pot(p):
+    """Parse a single potential so it can be fed to C, caching the result on the instance"""
+    from galpy.orbit_src.integrateFullOrbit import _parse_scf_pot, \
+        _parse_ferrers_pot, _parse_movingobject_pot, _c_parse_key
+    # Cache on the underlying 3D potential if there is one, because the
+    # planar potential is typically re-created on every toPlanarPotential call
+    cache_key= 'planar'
+    cache_holder= getattr(p,'_Pot',p)
+    # The cache is keyed on the current parameters, so it is never stale
+    param_key= _c_parse_key(cache_holder)
+    cached= getattr(cache_holder,'_c_parse_cache',{}).get(cache_key)
+    if not cached is None and cached[0] == param_key:
+        return cached[1]
+    npot= 1
+    pot_type= []
+    pot_args= []
+    if isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.LogarithmicHaloPotential):
+        pot_type.append(0)
+        pot_args.extend([p._Pot._amp,p._Pot._core2])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) \
+             and isinstance(p._Pot,potential.DehnenBarPotential):
+        pot_type.append(1)
+        pot_args.extend([p._Pot._amp*p._Pot._af,p._Pot._tform,
+                         p._Pot._tsteady,p._Pot._rb,p._Pot._omegab,
+                         p._Pot._barphi])
+    elif isinstance(p,potential.TransientLogSpiralPotential):
+        pot_type.append(2)
+        pot_args.extend([p._amp,p._A,p._to,p._sigma2,p._alpha,p._m,
+                         p._omegas,p._gamma])
+    elif isinstance(p,potential.SteadyLogSpiralPotential):
+        pot_type.append(3)
+        if p._tform is None:
+            pot_args.extend([p._amp,float('nan'), float('nan'),
+                             p._A,p._alpha,p._m,
+                             p._omegas,p._gamma])
+        else:
+            pot_args.extend([p._amp,p._tform,p._tsteady,p._A,p._alpha,p._m,
+                             p._omegas,p._gamma])
+    elif isinstance(p,potential.EllipticalDiskPotential):
+        pot_type.append(4)
+        if p._tform is None:
+            pot_args.extend([p._amp,float('nan'), float('nan'),
+                             p._twophio,p._p,p._phib])
+        else:
+            pot_args.extend([p._amp,p._tform,p._tsteady,
+                             p._twophio,p._p,p._phib])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.MiyamotoNagaiPotential):
+        pot_type.append(5)
+        pot_args.extend([p._Pot._amp,p._Pot._a,p._Pot._b])
+    elif isinstance(p,potential.LopsidedDiskPotential):
+        pot_type.append(6)
+        if p._tform is None:
+            pot_args.extend([p._amp,float('nan'), float('nan'),
+                             p._mphio,p._p,p._phib])
+        else:
+            pot_args.extend([p._amp,p._tform,p._tsteady,
+                             p._mphio,p._p,p._phib])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.PowerSphericalPotential):
+        pot_type.append(7)
+        pot_args.extend([p._Pot._amp,p._Pot.alpha])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.HernquistPotential):
+        pot_type.append(8)
+        pot_args.extend([p._Pot._amp,p._Pot.a])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.NFWPotential):
+        pot_type.append(9)
+        pot_args.extend([p._Pot._amp,p._Pot.a])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.JaffePotential):
+        pot_type.append(10)
+        pot_args.extend([p._Pot._amp,p._Pot.a])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+            and isinstance(p._Pot,potential.DoubleExponentialDiskPotential):
+        pot_type.append(11)
+        pot_args.extend([p._Pot._amp,p._Pot._alpha,
+                         p._Pot._beta,p._Pot._kmaxFac,
+                         p._Pot._nzeros,p._Pot._glorder])
+        pot_args.extend([p._Pot._glx[ii] for ii in range(p._Pot._glorder)])
+        pot_args.extend([p._Pot._glw[ii] for ii in range(p._Pot._glorder)])
+        pot_args.extend([p._Pot._j0zeros[ii] for ii in range(p._Pot._nzeros+1)])
+        pot_args.extend([p._Pot._dj0zeros[ii] for ii in range(p._Pot._nzeros+1)])
+        pot_args.extend([p._Pot._j1zeros[ii] for ii in range(p._Pot._nzeros+1)])
+        pot_args.extend([p._Pot._dj1zeros[ii] for ii in range(p._Pot._nzeros+1)])
+        pot_args.extend([p._Pot._kp._amp,p._Pot._kp.alpha])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+            and isinstance(p._Pot,potential.FlattenedPowerPotential):
+        pot_type.append(12)
+        pot_args.extend([p._Pot._amp,p._Pot.alpha,p._Pot.core2])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.interpRZPotential):
+        pot_type.append(13)
+        pot_args.extend([len(p._Pot._rgrid),len(p._Pot._zgrid)])
+        if p._Pot._logR:
+            pot_args.extend([p._Pot._logrgrid[ii]
+                             for ii in range(len(p._Pot._rgrid))])
+        else:
+            pot_args.extend([p._Pot._rgrid[ii]
+                             for ii in range(len(p._Pot._rgrid))])
+        pot_args.extend([p._Pot._zgrid[ii] for ii in range(len(p._Pot._zgrid))])
+        pot_args.extend([x for x in p._Pot._rforceGrid_splinecoeffs.flatten(order='C')])
+        pot_args.extend([p._Pot._amp,int(p._Pot._logR)])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.IsochronePotential):
+        pot_type.append(14)
+        pot_args.extend([p._Pot._amp,p._Pot.b])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.PowerSphericalPotentialwCutoff):
+        pot_type.append(15)
+        pot_args.extend([p._Pot._amp,p._Pot.alpha,p._Pot.rc])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.MN3ExponentialDiskPotential):
+        # Three Miyamoto-Nagai disks
+        npot+= 2
+        pot_type.extend([5,5,5])
+        pot_args.extend([p._Pot._amp*p._Pot._mn3[0]._amp,
+                         p._Pot._mn3[0]._a,p._Pot._mn3[0]._b,
+                         p._Pot._amp*p._Pot._mn3[1]._amp,
+                         p._Pot._mn3[1]._a,p._Pot._mn3[1]._b,
+                         p._Pot._amp*p._Pot._mn3[2]._amp,
+                         p._Pot._mn3[2]._a,p._Pot._mn3[2]._b])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.KuzminKutuzovStaeckelPotential):
+        pot_type.append(16)
+        pot_args.extend([p._Pot._amp,p._Pot._ac,p._Pot._Delta])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.PlummerPotential):
+        pot_type.append(17)
+        pot_args.extend([p._Pot._amp,p._Pot._b])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.PseudoIsothermalPotential):
+        pot_type.append(18)
+        pot_args.extend([p._Pot._amp,p._Pot._a])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.KuzminDiskPotential):
+        pot_type.append(19)
+        pot_args.extend([p._Pot._amp,p._Pot._a])
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+             and isinstance(p._Pot,potential.BurkertPotential):
+        pot_type.append(20)
+        pot_args.extend([p._Pot._amp,p._Pot.a])
+    elif (isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) or isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential)) and isinstance(p._Pot,potential.TwoPowerTriaxialPotential):
+        if isinstance(p._Pot,potential.TriaxialHernquistPotential):
+            pot_type.append(21)
+        elif isinstance(p._Pot,potential.TriaxialNFWPotential):
+            pot_type.append(22)
+        elif isinstance(p._Pot,potential.TriaxialJaffePotential):
+            pot_type.append(23)
+        pot_args.extend([p._Pot._amp,p._Pot.a,p._Pot._b2,
+                         p._Pot._c2,int(p._Pot._aligned)])
+        if not p._Pot._aligned:
+            pot_args.extend(list(p._Pot._rot.flatten()))
+        else:
+            pot_args.extend(list(nu.eye(3).flatten())) # not actually used
+        pot_args.append(p._Pot._glorder)
+        pot_args.extend([p._Pot._glx[ii] for ii in range(p._Pot._glorder)])
+        # this adds some common factors to the integration weights
+        pot_args.extend([-p._Pot._glw[ii]*p._Pot._b*p._Pot._c/p._Pot.a**3.\
+                             /nu.sqrt(( 1.+(p._Pot._b2-1.)
+                                        *p._Pot._glx[ii]**2.)
+                                      *(1.+(p._Pot._c2-1.)
+                                        *p._Pot._glx[ii]**2.))
+                         for ii in range(p._Pot._glorder)])
+        pot_args.extend([p._Pot._glw[ii] for ii in range(p._Pot._glorder)])
+        pot_args.extend([0.,0.,0.,0.,0.,0.]) 
+    elif (isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) or isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential)) \
+             and isinstance(p._Pot,potential.SCFPotential):
+        pt,pa= _parse_scf_pot(p._Pot)
+        pot_type.append(pt)
+        pot_args.extend(pa)
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) \
+             and isinstance(p._Pot,potential.SoftenedNeedleBarPotential):
+        pot_type.append(25)
+        pot_args.extend([p._Pot._amp,p._Pot._a,p._Pot._b,p._Pot._c2,
+                         p._Pot._pa,p._Pot._omegab])
+        pot_args.extend([0.,0.,0.,0.,0.,0.,0.]) # for caching
+    elif (isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) or isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential)) \
+            and isinstance(p._Pot,potential.DiskSCFPotential):
+        # Need to pull this apart into: (a) SCF part, (b) constituent
+        # [Sigma_i,h_i] parts
+        # (a) SCF, multiply in any add'l amp
+        pt,pa= _parse_scf_pot(p._Pot._scf,extra_amp=p._Pot._amp)
+        pot_type.append(pt)
+        pot_args.extend(pa)
+        # (b) constituent [Sigma_i,h_i] parts
+        for Sigma,hz in zip(p._Pot._Sigma_dict,p._Pot._hz_dict):
+            npot+= 1
+            pot_type.append(26)
+            stype= Sigma.get('type','exp')
+            if stype == 'exp' \
+                    or (stype == 'exp' and 'Rhole' in Sigma):
+                pot_args.extend([3,0,
+                                 4.*nu.pi*Sigma.get('amp',1.)*p._Pot._amp,
+                                 Sigma.get('h',1./3.)])
+            elif stype == 'expwhole' \
+                    or (stype == 'exp' and 'Rhole' in Sigma):
+                pot_args.extend([4,1,
+                                 4.*nu.pi*Sigma.get('amp',1.)*p._Pot._amp,
+                                 Sigma.get('h',1./3.),
+                                 Sigma.get('Rhole',0.5)])
+            hztype= hz.get('type','exp')
+            if hztype == 'exp':
+                pot_args.extend([0,hz.get('h',0.0375)])
+            elif hztype == 'sech2':
+                pot_args.extend([1,hz.get('h',0.0375)])
+    elif isinstance(p, potential_src.planarPotential.planarPotentialFromFullPotential) \
+            and isinstance(p._Pot, potential.SpiralArmsPotential):
+        pot_type.append(27)
+        pot_args.extend([len(p._Pot._Cs), p._Pot._amp, p._Pot._N, p._Pot._sin_alpha,
+                         p._Pot._tan_alpha, p._Pot._r_ref, p._Pot._phi_ref, p._Pot._Rs, p._Pot._H, p._Pot._omega])
+        pot_args.extend(p._Pot._Cs)
+    elif (isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) or isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential)) \
+            and isinstance(p._Pot,potential.FerrersPotential):
+        pot_type.append(28)
+        pot_args.extend(_parse_ferrers_pot(p._Pot))
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) \
+            and isinstance(p._Pot,potential.MovingObjectPotential):
+        pot_type.append(29)
+        pot_args.extend(_parse_movingobject_pot(p._Pot))
+    elif isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential) \
+            and isinstance(p._Pot,potential.RazorThinExponentialDiskPotential):
+        pot_type.append(30)
+        pot_args.extend([p._Pot._amp,p._Pot._alpha,p._Pot._glorder])
+        pot_args.extend(p._Pot._glx)
+        pot_args.extend(p._Pot._glw)
+    ############################## WRAPPERS ###############################
+    elif (isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) or isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential)) \
+            and isinstance(p._Pot,potential.DehnenSmoothWrapperPotential):
+        pot_type.append(-1)
+        wrap_npot, wrap_pot_type, wrap_pot_args= \
+            _parse_pot(potential.toPlanarPotential(p._Pot._pot))
+        pot_args.extend([wrap_npot,len(wrap_pot_args)])
+        pot_type.extend(wrap_pot_type)
+        pot_args.extend(wrap_pot_args)
+        pot_args.extend([p._Pot._amp,p._Pot._tform,p._Pot._tsteady])
+    elif (isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) or isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential)) \
+            and isinstance(p._Pot,potential.SolidBodyRotationWrapperPotential):
+        pot_type.append(-2)
+        # Not sure how to easily avoid this duplication
+        wrap_npot, wrap_pot_type, wrap_pot_args= \
+            _parse_pot(potential.toPlanarPotential(p._Pot._pot))
+        pot_args.extend([wrap_npot,len(wrap_pot_args)])
+        pot_type.extend(wrap_pot_type)
+        pot_args.extend(wrap_pot_args)
+        pot_args.extend([p._Pot._amp,p._Pot._omega,p._Pot._pa])
+    out= (npot,nu.array(pot_type,dtype=nu.int32),
+          nu.array(pot_args,dtype=nu.float64))
+    # Don't cache wrappers, because the wrapped potential may change
+    if not isinstance(cache_holder,
+                  potential_src.WrapperPotential.WrapperPotential):
+        if not hasattr(cache_holder,'_c_parse_cache'):
+            cache_holder._c_parse_cache= {}
+        cache_holder._c_parse_cache[cache_key]= (param_key,out)
+    return out
+
 def _parse_integrator(int_method):
     """parse the integrator method to pass to C"""
     #Pick integrator
@@ -287,7 +344,7 @@ def _parse_tol(rtol,atol):
     return (rtol,atol)
 
 def integratePlanarOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,
-                           dt=None):
+                           dt=None,dense_output=False):
     """
     NAME:
        integratePlanarOrbit_c
@@ -295,34 +352,47 @@ def integratePlanarOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,
        C integrate an ode for a planarOrbit
     INPUT:
        pot - Potential or list of such instances
-       yo - initial condition [q,p]
+       yo - initial condition [q,p], shape [4] or [nobj,4] to integrate nobj orbits in a single call (parallelized over orbits with OpenMP)
        t - set of times at which one wants the result
        int_method= 'leapfrog_c', 'rk4_c', 'rk6_c', 'symplec4_c'
        rtol, atol
        dt= (None) force integrator to use this stepsize (default is to automatically determine one))
+       dense_output= (False) if True, also return the rectangular acceleration at each time in t, for dense (Hermite) interpolation of the orbit
     OUTPUT:
-       (y,err)
-       y : array, shape (len(y0), len(t))
+       (y,err) or (y,err,acc) if dense_output
+       y : array, shape (len(t),4) or (nobj,len(t),4)
        Array containing the value of y for each desired time in t, \
        with the initial value y0 in the first row.
-       err: error message, if not zero: 1 means maximum step reduction happened for adaptive integrators
+       err: error message, if not zero: 1 means maximum step reduction happened for adaptive integrators (array with one entry per orbit if yo is [nobj,4])
+       acc : array, shape (len(t),2) or (nobj,len(t),2), rectangular acceleration at each time in t (only if dense_output)
     HISTORY:
        2011-10-03 - Written - Bovy (IAS)
+       2017-09-01 - Added integration of multiple orbits in a single call - agent
+       2017-09-05 - Added dense_output - agent
     """
     rtol, atol= _parse_tol(rtol,atol)
     npot, pot_type, pot_args= _parse_pot(pot)
     int_method_c= _parse_integrator(int_method)
     if dt is None: 
         dt= -9999.99
+    yo= nu.array(yo)
+    single_obj= len(yo.shape) == 1
+    yo= nu.atleast_2d(yo)
+    nobj= len(yo)
 
     #Set up result array
-    result= nu.empty((len(t),4))
-    err= ctypes.c_int(0)
+    result= nu.empty((nobj,len(t),4))
+    err= nu.zeros(nobj,dtype=nu.int32)
+    if dense_output:
+        acc= nu.empty((nobj,len(t),2))
+    else:
+        acc= nu.empty(1) # not used
 
     #Set up the C code
     ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
     integrationFunc= _lib.integratePlanarOrbit
-    integrationFunc.argtypes= [ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+    integrationFunc.argtypes= [ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
                                ctypes.c_int,                             
                                ndpointer(dtype=nu.float64,flags=ndarrayFlags),
                                ctypes.c_int,
@@ -332,18 +402,22 @@ def integratePlanarOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,
                                ctypes.c_double,
                                ctypes.c_double,
                                ndpointer(dtype=nu.float64,flags=ndarrayFlags),
-                               ctypes.POINTER(ctypes.c_int),
-                               ctypes.c_int]
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ctypes.c_int,
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags)]
 
     #Array requirements, first store old order
-    f_cont= [yo.flags['F_CONTIGUOUS'],
-             t.flags['F_CONTIGUOUS']]
+    f_cont= [t.flags['F_CONTIGUOUS']]
     yo= nu.require(yo,dtype=nu.float64,requirements=['C','W'])
     t= nu.require(t,dtype=nu.float64,requirements=['C','W'])
     result= nu.require(result,dtype=nu.float64,requirements=['C','W'])
+    err= nu.require(err,dtype=nu.int32,requirements=['C','W'])
+    acc= nu.require(acc,dtype=nu.float64,requirements=['C','W'])
 
     #Run the C code
-    integrationFunc(yo,
+    integrationFunc(ctypes.c_int(nobj),
+                    yo,
                     ctypes.c_int(len(t)),
                     t,
                     ctypes.c_int(npot),
@@ -352,18 +426,115 @@ def integratePlanarOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,
                     ctypes.c_double(dt),                    
                     ctypes.c_double(rtol),ctypes.c_double(atol),
                     result,
-                    ctypes.byref(err),
-                    ctypes.c_int(int_method_c))
+                    err,
+                    ctypes.c_int(int_method_c),
+                    ctypes.c_int(dense_output),
+                    acc)
 
-    if err.value == -10: #pragma: no cover
+    if nu.any(err == -10): #pragma: no cover
         raise KeyboardInterrupt("Orbit integration interrupted by CTRL-C (SIGINT)")
 
     #Reset input arrays
-    if f_cont[0]: yo= nu.asfortranarray(yo)
-    if f_cont[1]: t= nu.asfortranarray(t)
+    if f_cont[0]: t= nu.asfortranarray(t)
 
-    return (result,err.value)
+    if single_obj:
+        result, err, acc= result[0], err[0], acc[0]
+    if dense_output:
+        return (result,err,acc)
+    else:
+        return (result,err)
+
+def integratePlanarOrbit_events_c(pot,yo,t,int_method,rtol=None,atol=None,
+                                  dt=None,maxevents=1000):
+    """
+    NAME:
+       integratePlanarOrbit_events_c
+    PURPOSE:
+       C integrate a set of planarOrbits and detect pericenters, apocenters without storing the orbits
+    INPUT:
+       pot - Potential or list of such instances
+       yo - [nobj,4] initial conditions [q,p] (rectangular)
+       t - set of times at which to check for events (events are found between these times using Hermite interpolation, so at most one event of each type can be found between consecutive times)
+       int_method= 'leapfrog_c', 'rk4_c', 'rk6_c', 'symplec4_c'
+       rtol, atol
+       dt= (None) force integrator to use this stepsize (default is to automatically determine one))
+       maxevents= (1000) maximum number of events to store per orbit
+    OUTPUT:
+       (nevents,etype,etime,estate,yf,err)
+       nevents - [nobj] number of events found for each orbit (can be larger than maxevents, but only maxevents are stored)
+       etype - [nobj,maxevents] type of each event: 0= pericenter, 1= apocenter; -1 for unused entries
+       etime - [nobj,maxevents] time of each event
+       estate - [nobj,maxevents,4] rectangular phase-space point at each event
+       yf - [nobj,4] rectangular phase-space point at the final time
+       err - [nobj] error message, if not zero: 1 means maximum step reduction happened for adaptive integrators
+    HISTORY:
+       2017-09-08 - Written - agent
+    """
+    rtol, atol= _parse_tol(rtol,atol)
+    npot, pot_type, pot_args= _parse_pot(pot)
+    int_method_c= _parse_integrator(int_method)
+    if dt is None: 
+        dt= -9999.99
+    yo= nu.atleast_2d(yo)
+    nobj= len(yo)
+
+    #Set up result arrays
+    nevents= nu.zeros(nobj,dtype=nu.int32)
+    etype= -nu.ones((nobj,maxevents),dtype=nu.int32)
+    etime= nu.zeros((nobj,maxevents))+nu.nan
+    estate= nu.zeros((nobj,maxevents,4))+nu.nan
+    yf= nu.empty((nobj,4))
+    err= nu.zeros(nobj,dtype=nu.int32)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    integrationFunc= _lib.integratePlanarOrbit_events
+    integrationFunc.argtypes= [ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,                             
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_double,
+                               ctypes.c_double,
+                               ctypes.c_double,
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ctypes.c_int]
 
+    #Array requirements
+    yo= nu.require(yo,dtype=nu.float64,requirements=['C','W'])
+    t= nu.require(t,dtype=nu.float64,requirements=['C','W'])
+
+    #Run the C code
+    integrationFunc(ctypes.c_int(nobj),
+                    yo,
+                    ctypes.c_int(len(t)),
+                    t,
+                    ctypes.c_int(npot),
+                    pot_type,
+                    pot_args,
+                    ctypes.c_double(dt),
+                    ctypes.c_double(rtol),ctypes.c_double(atol),
+                    ctypes.c_int(maxevents),
+                    nevents,
+                    etype,
+                    etime,
+                    estate,
+                    yf,
+                    err,
+                    ctypes.c_int(int_method_c))
+    
+    if nu.any(err == -10): #pragma: no cover
+        raise KeyboardInterrupt("Orbit integration interrupted by CTRL-C (SIGINT)")
+
+    return (nevents,etype,etime,estate,yf,err)
 
 def integratePlanarOrbit_dxdv_c(pot,yo,dyo,t,int_method,rtol=None,atol=None,
                                 dt=None):
@@ -444,3 +615,94 @@ def integratePlanarOrbit_dxdv_c(pot,yo,dyo,t,int_method,rtol=None,atol=None,
     if f_cont[1]: t= nu.asfortranarray(t)
 
     return (result,err.value)
+
+def integratePlanarOrbit_lyapunov_c(pot,yo,dyo,t,int_method,rtol=None,
+                                    atol=None,dt=None):
+    """
+    NAME:
+       integratePlanarOrbit_lyapunov_c
+    PURPOSE:
+       C integrate planarOrbits and deviation vectors, renormalizing the deviation vectors at each time in t, to compute the maximal Lyapunov exponent
+    INPUT:
+       pot - Potential or list of such instances
+       yo - initial condition [q,p], shape [4] or [nobj,4]
+       dyo - initial deviation vector [dq,dp], shape [4] or [nobj,4] (normalized internally)
+       t - set of times at which the deviation vector is renormalized and at which one wants the result
+       int_method= 'rk4_c', 'rk6_c', 'dopr54_c'
+       rtol, atol
+       dt= (None) force integrator to use this stepsize (default is to automatically determine one))
+    OUTPUT:
+       (y,lyap,err)
+       y : array, shape (len(t),8) or (nobj,len(t),8): orbit and renormalized deviation vector at each time in t
+       lyap : array, shape (len(t)) or (nobj,len(t)): finite-time estimate of the maximal Lyapunov exponent at each time in t (0 for the first time)
+       err: error message if not zero, 1: maximum step reduction happened for adaptive integrators (array with one entry per orbit for [nobj,4] input)
+    HISTORY:
+       2017-09-15 - Written - agent
+    """
+    rtol, atol= _parse_tol(rtol,atol)
+    npot, pot_type, pot_args= _parse_pot(pot)
+    int_method_c= _parse_integrator(int_method)
+    if dt is None: 
+        dt= -9999.99
+    yo, dyo= nu.array(yo), nu.array(dyo,dtype='float')
+    single_obj= len(yo.shape) == 1 and len(dyo.shape) == 1
+    yo, dyo= nu.broadcast_arrays(nu.atleast_2d(yo),nu.atleast_2d(dyo))
+    dyo= dyo/nu.sqrt(nu.sum(dyo**2.,axis=1))[:,None]
+    yo= nu.concatenate((yo,dyo),axis=1)
+    nobj= len(yo)
+
+    #Set up result arrays
+    result= nu.empty((nobj,len(t),8))
+    lyap= nu.empty((nobj,len(t)))
+    err= nu.zeros(nobj,dtype=nu.int32)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    integrationFunc= _lib.integratePlanarOrbit_lyapunov
+    integrationFunc.argtypes= [ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,                             
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_double,
+                               ctypes.c_double,
+                               ctypes.c_double,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ctypes.c_int]
+
+    #Array requirements, first store old order
+    f_cont= [t.flags['F_CONTIGUOUS']]
+    yo= nu.require(yo,dtype=nu.float64,requirements=['C','W'])
+    t= nu.require(t,dtype=nu.float64,requirements=['C','W'])
+    result= nu.require(result,dtype=nu.float64,requirements=['C','W'])
+    lyap= nu.require(lyap,dtype=nu.float64,requirements=['C','W'])
+    err= nu.require(err,dtype=nu.int32,requirements=['C','W'])
+
+    #Run the C code
+    integrationFunc(ctypes.c_int(nobj),
+                    yo,
+                    ctypes.c_int(len(t)),
+                    t,
+                    ctypes.c_int(npot),
+                    pot_type,
+                    pot_args,
+                    ctypes.c_double(dt),
+                    ctypes.c_double(rtol),ctypes.c_double(atol),
+                    result,
+                    lyap,
+                    err,
+                    ctypes.c_int(int_method_c))
+
+    if nu.any(err == -10): #pragma: no cover
+        raise KeyboardInterrupt("Orbit integration interrupted by CTRL-C (SIGINT)")
+
+    #Reset input arrays
+    if f_cont[0]: t= nu.asfortranarray(t)
+
+    if single_obj:
+        result, lyap, err= result[0], lyap[0], err[0]
+    return (result,lyap,err)
@@ -1,11 +1,17 @@
+import warnings
 import numpy as nu
 from scipy import integrate
 from galpy.orbit_src.OrbitTop import OrbitTop
+from galpy.orbit_src.integrateLinearOrbit import integrateLinearOrbit_c, \
+    _ext_loaded
+from galpy.potential_src.Potential import _check_c
 from galpy.potential_src.linearPotential import _evaluatelinearForces,\
     evaluatelinearPotentials
 import galpy.util.bovy_plot as plot
 import galpy.util.bovy_symplecticode as symplecticode
 from galpy.util.bovy_conversion import physical_conversion
+from galpy.util import galpyWarning
+ext_loaded= _ext_loaded
 class linearOrbit(OrbitTop):
     """Class that represents an orbit in a (effectively) one-dimensional potential"""
     def __init__(self,vxvv=[1.,0.],vo=220.,ro=8.0):
@@ -48,17 +54,18 @@ class linearOrbit(OrbitTop):
         INPUT:
            t - list of times at which to output (0 has to be in this!)
            pot - potential instance or list of instances
-           method= 'odeint'= scipy's odeint, or 'leapfrog'
-           dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize (NOT USED FOR LINEAR ORBIT SO FAR)
+           method= 'odeint'= scipy's odeint, 'leapfrog', or one of the C integrators ('leapfrog_c', 'symplec4_c', 'symplec6_c', 'rk4_c', 'rk6_c', 'dopr54_c'; only for potentials with a C implementation)
+           dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize (only used by the C integrators)
         OUTPUT:
            (none) (get the actual orbit using getOrbit()
         HISTORY:
            2010-07-13 - Written - Bovy (NYU)
+           2017-09-21 - Added C integration - agent
         """
         if hasattr(self,'_orbInterp'): delattr(self,'_orbInterp')
         self.t= nu.array(t)
         self._pot= pot
-        self.orbit= _integrateLinearOrbit(self.vxvv,pot,t,method)
+        self.orbit= _integrateLinearOrbit(self.vxvv,pot,self.t,method,dt)
 
     @physical_conversion('energy')
     def E(self,*args,**kwargs):
@@ -125,7 +132,7 @@ class linearOrbit(OrbitTop):
     def zmax(self): #pragma: no cover
         raise AttributeError("linearOrbit does not have a zmax")
 
-def _integrateLinearOrbit(vxvv,pot,t,method):
+def _integrateLinearOrbit(vxvv,pot,t,method,dt=None):
     """
     NAME:
        integrateLinearOrbit
@@ -135,22 +142,32 @@ def _integrateLinearOrbit(vxvv,pot,t,method):
        vxvv - initial condition [x,vx]
        pot - linearPotential or list of linearPotentials
        t - list of times at which to output (0 has to be in this!)
-       method - 'odeint' or 'leapfrog'
+       method - 'odeint', 'leapfrog', or a C integrator ('leapfrog_c', 'symplec4_c', 'symplec6_c', 'rk4_c', 'rk6_c', 'dopr54_c')
+       dt - if set, force the C integrators to use this basic stepsize; must be an integer divisor of output stepsize
     OUTPUT:
        [:,2] array of [x,vx] at each t
     HISTORY:
        2010-07-13- Written - Bovy (NYU)
+       2017-09-21 - Added C integration - agent
     """
     if '_c' in method:
-        if 'leapfrog' in method or 'symplec' in method:
-            method= 'leapfrog'
-        else:
-            method= 'odeint'
+        if not ext_loaded or not _check_c(pot):
+            if 'leapfrog' in method or 'symplec' in method:
+                method= 'leapfrog'
+            else:
+                method= 'odeint'
+            if not ext_loaded: # pragma: no cover
+                warnings.warn("Cannot use C integration because C extension not loaded (using %s instead)" % (method), galpyWarning)
     if method.lower() == 'leapfrog':
         return symplecticode.leapfrog(lambda x,t=t: _evaluatelinearForces(pot,x,
                                                                          t=t),
                                       nu.array(vxvv),
                                       t,rtol=10.**-8)
+    elif method.lower() == 'leapfrog_c' or method.lower() == 'rk4_c' \
+            or method.lower() == 'rk6_c' or method.lower() == 'symplec4_c' \
+            or method.lower() == 'symplec6_c' or method.lower() == 'dopr54_c':
+        out, msg= integrateLinearOrbit_c(pot,nu.copy(vxvv),t,method,dt=dt)
+        return out
     elif method.lower() == 'odeint':
         return integrate.odeint(_linearEOM,vxvv,t,args=(pot,),rtol=10.**-8.)
 
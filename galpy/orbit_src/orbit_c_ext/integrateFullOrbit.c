@@ -7,6 +7,14 @@
 #include <math.h>
 #include <bovy_symplecticode.h>
 #include <bovy_rk.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#include <bovy_openmp.h>
+#define ORBITS_CHUNKSIZE 1
+#define EVENTS_CHUNKSIZE 1000
+#define EVENTS_MAXITER 50
+#define DXDV_FD_STEP 1e-5
 //Potentials
 #include <galpy_potentials.h>
 #ifndef M_PI
@@ -238,6 +246,25 @@ void parse_leapFuncArgs_Full(int npot,
       potentialArgs->Rphideriv = &SpiralArmsPotentialRphideriv;
       potentialArgs->nargs = (int) 10 + *pot_args;
       break;    
+    case 28: //FerrersPotential, 2*glorder+15 arguments
+      potentialArgs->Rforce= &FerrersPotentialRforce;
+      potentialArgs->zforce= &FerrersPotentialzforce;
+      potentialArgs->phiforce= &FerrersPotentialphiforce;
+      potentialArgs->nargs= (int) ( 15 + 2 * *(pot_args+7) );
+      break;
+    case 29: //MovingObjectPotential, 4 arguments after the tabulated orbit
+      initMovingObjectSplines(potentialArgs,&pot_args);
+      potentialArgs->Rforce= &MovingObjectPotentialRforce;
+      potentialArgs->zforce= &MovingObjectPotentialzforce;
+      potentialArgs->phiforce= &MovingObjectPotentialphiforce;
+      potentialArgs->nargs= 4;
+      break;
+    case 30: //RazorThinExponentialDiskPotential, 2*glorder+3 arguments
+      potentialArgs->Rforce= &RazorThinExponentialDiskPotentialRforce;
+      potentialArgs->zforce= &RazorThinExponentialDiskPotentialzforce;
+      potentialArgs->phiforce= &ZeroForce;
+      potentialArgs->nargs= (int) ( 3 + 2 * *(pot_args+2) );
+      break;
 //////////////////////////////// WRAPPERS /////////////////////////////////////
     case -1: //DehnenSmoothWrapperPotential
       potentialArgs->Rforce= &DehnenSmoothWrapperPotentialRforce;
@@ -273,7 +300,8 @@ void parse_leapFuncArgs_Full(int npot,
   }
   potentialArgs-= npot;
 }
-void integrateFullOrbit(double *yo,
+void integrateFullOrbit(int nobj,
+			double *yo,
 			int nt, 
 			double *t,
 			int npot,
@@ -284,11 +312,23 @@ void integrateFullOrbit(double *yo,
 			double atol,
 			double *result,
 			int * err,
-			int odeint_type){
+			int odeint_type,
+			int dense_output,
+			double *acc){
   //Set up the forces, first count
+  int ii,jj;
   int dim;
-  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
-  parse_leapFuncArgs_Full(npot,potentialArgs,pot_type,pot_args);
+  int max_threads;
+  struct sigaction oldaction;
+#ifdef _OPENMP
+  max_threads= ( nobj < omp_get_max_threads() ) ? nobj : omp_get_max_threads();
+#else
+  max_threads= 1;
+#endif
+  // potentialArgs may cache intermediate results, so one copy / thread
+  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+  for (ii=0; ii < max_threads; ii++)
+    parse_leapFuncArgs_Full(npot,potentialArgs+ii*npot,pot_type,pot_args);
   //Integrate
   void (*odeint_func)(void (*func)(double, double *, double *,
 			   int, struct potentialArg *),
@@ -332,29 +372,233 @@ void integrateFullOrbit(double *yo,
     dim= 6;
     break;
   }
-  odeint_func(odeint_deriv_func,dim,yo,nt,dt,t,npot,potentialArgs,rtol,atol,
-	      result,err);
+  install_sigint_handler(&oldaction);
+  galpy_openmp_schedule(GALPY_SCHEDULE_DYNAMIC,ORBITS_CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii,jj) num_threads(max_threads)
+  for (ii=0; ii < nobj; ii++) {
+    if ( interrupted ) { // skip remaining orbits after CTRL-C
+      *(err+ii)= -10;
+      continue;
+    }
+    odeint_func(odeint_deriv_func,dim,yo+6*ii,nt,dt,t,npot,
+#ifdef _OPENMP
+		potentialArgs+omp_get_thread_num()*npot,
+#else
+		potentialArgs,
+#endif
+		rtol,atol,result+6*nt*ii,err+ii);
+    // For dense output, also return the acceleration at each output time
+    if ( dense_output )
+      for (jj=0; jj < nt; jj++)
+	evalRectForce(*(t+jj),result+6*nt*ii+6*jj,acc+3*nt*ii+3*jj,npot,
+#ifdef _OPENMP
+		      potentialArgs+omp_get_thread_num()*npot);
+#else
+		      potentialArgs);
+#endif
+  }
+  restore_sigint_handler(&oldaction);
   //Free allocated memory
-  free_potentialArgs(npot,potentialArgs);
+  for (ii=0; ii < max_threads; ii++)
+    free_potentialArgs(npot,potentialArgs+ii*npot);
   free(potentialArgs);
   //Done!
 }
-// LCOV_EXCL_START
-void integrateOrbit_dxdv(double *yo,
-			 int nt, 
-			 double *t,
-			 int npot,
-			 int * pot_type,
-			 double * pot_args,
-			 double rtol,
-			 double atol,
-			 double *result,
-			 int * err,
-			 int odeint_type){
+/*
+  Event detection: integrate an orbit in chunks of output times, without
+  storing the orbit, and find pericenters, apocenters, z extrema, and
+  disk crossings in between output times using quintic Hermite
+  interpolation of the positions; the roots are found using bisection
+*/
+static void hermite_interp(double s,double h,int ndim,
+			   double *q0,double *a0,double *q1,double *a1,
+			   double *q){
+  // q0,q1= [x,v] at the start and end of the interval, a0,a1 acceleration
+  int ii;
+  double s2= s*s;
+  double s3= s2*s;
+  double h0= 1.-10.*s3+15.*s3*s-6.*s3*s2;
+  double h1= s-6.*s3+8.*s3*s-3.*s3*s2;
+  double h2= 0.5*(s2-3.*s3+3.*s3*s-s3*s2);
+  double h3= 0.5*(s3-2.*s3*s+s3*s2);
+  double h4= -4.*s3+7.*s3*s-3.*s3*s2;
+  double dh0= -30.*s2+60.*s3-30.*s3*s;
+  double dh1= 1.-18.*s2+32.*s3-15.*s3*s;
+  double dh2= 0.5*(2.*s-9.*s2+12.*s3-5.*s3*s);
+  double dh3= 0.5*(3.*s2-8.*s3+5.*s3*s);
+  double dh4= -12.*s2+28.*s3-15.*s3*s;
+  for (ii=0; ii < ndim; ii++){
+    *(q+ii)= h0 * *(q0+ii) + (1.-h0) * *(q1+ii)
+      + h * ( h1 * *(q0+ndim+ii) + h4 * *(q1+ndim+ii) )
+      + h * h * ( h2 * *(a0+ii) + h3 * *(a1+ii) );
+    *(q+ndim+ii)= dh0 * ( *(q0+ii) - *(q1+ii) ) / h
+      + dh1 * *(q0+ndim+ii) + dh4 * *(q1+ndim+ii)
+      + h * ( dh2 * *(a0+ii) + dh3 * *(a1+ii) );
+  }
+}
+static double event_func(int etype,int ndim,double *q){
+  int ii;
+  double out= 0.;
+  switch ( etype ) {
+  case 0: // radial velocity (x.v), peri- and apocenters
+    for (ii=0; ii < ndim; ii++) out+= *(q+ii) * *(q+ndim+ii);
+    break;
+  case 1: // vz, z extrema
+    out= *(q+5);
+    break;
+  case 2: // z, disk crossings
+    out= *(q+2);
+    break;
+  }
+  return out;
+}
+void integrateOrbit_events(void (*odeint_func)(void (*func)(double, double *, double *,
+							    int, struct potentialArg *),
+					       int,
+					       double *,
+					       int, double, double *,
+					       int, struct potentialArg *,
+					       double, double,
+					       double *,int *),
+			   void (*odeint_deriv_func)(double, double *, double *,
+						     int,struct potentialArg *),
+			   int dim,
+			   void (*force_func)(double, double *, double *,
+					      int,struct potentialArg *),
+			   int ndim,
+			   double *yo,
+			   int nt,
+			   double dt,
+			   double *t,
+			   int npot,
+			   struct potentialArg * potentialArgs,
+			   double rtol,
+			   double atol,
+			   int maxevents,
+			   int *nevents,
+			   int *etype,
+			   double *etime,
+			   double *estate,
+			   double *yf,
+			   int *err){
+  int ii, jj, kk, ee, nchunk, thiserr;
+  int nfunc= ( ndim == 3 ) ? 3 : 1;
+  int this_etype[3];
+  double f0[3], f1[3], this_s[3];
+  double sa, sb, fa, s, fs, tmp_s, h;
+  int tmp_etype;
+  int k0= 0;
+  double * buf= (double *) malloc ( (EVENTS_CHUNKSIZE+1) * 2 * ndim * sizeof(double) );
+  double * abuf= (double *) malloc ( (EVENTS_CHUNKSIZE+1) * ndim * sizeof(double) );
+  double * q= (double *) malloc ( 2 * ndim * sizeof(double) );
+  *nevents= 0;
+  *err= 0;
+  for (ii=0; ii < 2*ndim; ii++) *(yf+ii)= *(yo+ii);
+  while ( k0 < nt-1 ) {
+    nchunk= ( nt-1-k0 < EVENTS_CHUNKSIZE ) ? nt-k0 : EVENTS_CHUNKSIZE+1;
+    thiserr= 0;
+    odeint_func(odeint_deriv_func,dim,yf,nchunk,dt,t+k0,npot,potentialArgs,
+		rtol,atol,buf,&thiserr);
+    if ( thiserr == -10 ) {
+      *err= -10;
+      break;
+    }
+    else if ( thiserr != 0 )
+      *err= thiserr;
+    for (jj=0; jj < nchunk; jj++)
+      force_func(*(t+k0+jj),buf+2*ndim*jj,abuf+ndim*jj,npot,potentialArgs);
+    // Look for sign changes of the event functions between output times
+    for (jj=0; jj < nchunk-1; jj++) {
+      h= *(t+k0+jj+1) - *(t+k0+jj);
+      ee= 0;
+      for (kk=0; kk < nfunc; kk++) {
+	f0[kk]= event_func(kk,ndim,buf+2*ndim*jj);
+	f1[kk]= event_func(kk,ndim,buf+2*ndim*(jj+1));
+	if ( ( f0[kk] < 0. ) == ( f1[kk] < 0. ) ) continue;
+	sa= 0.;
+	sb= 1.;
+	fa= f0[kk];
+	for (ii=0; ii < EVENTS_MAXITER; ii++) {
+	  s= 0.5*(sa+sb);
+	  hermite_interp(s,h,ndim,buf+2*ndim*jj,abuf+ndim*jj,
+			 buf+2*ndim*(jj+1),abuf+ndim*(jj+1),q);
+	  fs= event_func(kk,ndim,q);
+	  if ( ( fs < 0. ) == ( fa < 0. ) ) {
+	    sa= s;
+	    fa= fs;
+	  }
+	  else
+	    sb= s;
+	}
+	this_s[ee]= 0.5*(sa+sb);
+	if ( kk == 0 ) // pericenter (0) if x.v goes from - to +, else apocenter
+	  this_etype[ee]= ( f0[kk] < 0. ) ? 0 : 1;
+	else // z extremum (2) or disk crossing (3)
+	  this_etype[ee]= kk+1;
+	ee++;
+      }
+      // Sort the events in this interval in time
+      for (ii=1; ii < ee; ii++)
+	for (kk=ii; kk > 0 && this_s[kk-1] > this_s[kk]; kk--) {
+	  tmp_s= this_s[kk];
+	  this_s[kk]= this_s[kk-1];
+	  this_s[kk-1]= tmp_s;
+	  tmp_etype= this_etype[kk];
+	  this_etype[kk]= this_etype[kk-1];
+	  this_etype[kk-1]= tmp_etype;
+	}
+      // Store
+      for (ii=0; ii < ee; ii++) {
+	if ( *nevents < maxevents ) {
+	  *(etype+*nevents)= this_etype[ii];
+	  *(etime+*nevents)= *(t+k0+jj) + this_s[ii] * h;
+	  hermite_interp(this_s[ii],h,ndim,buf+2*ndim*jj,abuf+ndim*jj,
+			 buf+2*ndim*(jj+1),abuf+ndim*(jj+1),
+			 estate+2*ndim * *nevents);
+	}
+	*nevents+= 1;
+      }
+    }
+    // Continue from the end of this chunk
+    for (ii=0; ii < 2*ndim; ii++) *(yf+ii)= *(buf+2*ndim*(nchunk-1)+ii);
+    k0+= nchunk-1;
+  }
+  free(buf);
+  free(abuf);
+  free(q);
+}
+void integrateFullOrbit_events(int nobj,
+                               double *yo,
+                               int nt,
+                               double *t,
+                               int npot,
+                               int * pot_type,
+                               double * pot_args,
+                               double dt,
+                               double rtol,
+                               double atol,
+                               int maxevents,
+                               int *nevents,
+                               int *etype,
+                               double *etime,
+                               double *estate,
+                               double *yf,
+                               int * err,
+                               int odeint_type){
   //Set up the forces, first count
+  int ii;
   int dim;
-  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
-  parse_leapFuncArgs_Full(npot,potentialArgs,pot_type,pot_args);
+  int max_threads;
+  struct sigaction oldaction;
+#ifdef _OPENMP
+  max_threads= ( nobj < omp_get_max_threads() ) ? nobj : omp_get_max_threads();
+#else
+  max_threads= 1;
+#endif
+  // potentialArgs may cache intermediate results, so one copy / thread
+  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+  for (ii=0; ii < max_threads; ii++)
+    parse_leapFuncArgs_Full(npot,potentialArgs+ii*npot,pot_type,pot_args);
   //Integrate
   void (*odeint_func)(void (*func)(double, double *, double *,
 			   int, struct potentialArg *),
@@ -370,42 +614,280 @@ void integrateOrbit_dxdv(double *yo,
   case 0: //leapfrog
     odeint_func= &leapfrog;
     odeint_deriv_func= &evalRectForce;
-    dim= 6;
+    dim= 3;
     break;
   case 1: //RK4
     odeint_func= &bovy_rk4;
-    odeint_deriv_func= &evalRectDeriv_dxdv;
-    dim= 12;
+    odeint_deriv_func= &evalRectDeriv;
+    dim= 6;
     break;
   case 2: //RK6
     odeint_func= &bovy_rk6;
-    odeint_deriv_func= &evalRectDeriv_dxdv;
-    dim= 12;
+    odeint_deriv_func= &evalRectDeriv;
+    dim= 6;
     break;
   case 3: //symplec4
     odeint_func= &symplec4;
     odeint_deriv_func= &evalRectForce;
-    dim= 6;
+    dim= 3;
     break;
   case 4: //symplec6
     odeint_func= &symplec6;
     odeint_deriv_func= &evalRectForce;
+    dim= 3;
+    break;
+  case 5: //DOPR54
+    odeint_func= &bovy_dopr54;
+    odeint_deriv_func= &evalRectDeriv;
     dim= 6;
     break;
+  }
+  install_sigint_handler(&oldaction);
+  galpy_openmp_schedule(GALPY_SCHEDULE_DYNAMIC,ORBITS_CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii) num_threads(max_threads)
+  for (ii=0; ii < nobj; ii++) {
+    if ( interrupted ) { // skip remaining orbits after CTRL-C
+      *(err+ii)= -10;
+      continue;
+    }
+    integrateOrbit_events(odeint_func,odeint_deriv_func,dim,&evalRectForce,3,
+			  yo+6*ii,nt,dt,t,npot,
+#ifdef _OPENMP
+			  potentialArgs+omp_get_thread_num()*npot,
+#else
+			  potentialArgs,
+#endif
+			  rtol,atol,maxevents,nevents+ii,
+			  etype+maxevents*ii,etime+maxevents*ii,
+			  estate+6*maxevents*ii,yf+6*ii,err+ii);
+  }
+  restore_sigint_handler(&oldaction);
+  //Free allocated memory
+  for (ii=0; ii < max_threads; ii++)
+    free_potentialArgs(npot,potentialArgs+ii*npot);
+  free(potentialArgs);
+  //Done!
+}
+void integrateFullOrbit_dxdv(int nobj,
+			     double *yo,
+			     int nt, 
+			     double *t,
+			     int npot,
+			     int * pot_type,
+			     double * pot_args,
+			     double dt,
+			     double rtol,
+			     double atol,
+			     double *result,
+			     int * err,
+			     int odeint_type){
+  //Set up the forces, first count
+  int ii;
+  int dim;
+  int max_threads;
+  struct sigaction oldaction;
+#ifdef _OPENMP
+  max_threads= ( nobj < omp_get_max_threads() ) ? nobj : omp_get_max_threads();
+#else
+  max_threads= 1;
+#endif
+  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+  for (ii=0; ii < max_threads; ii++)
+    parse_leapFuncArgs_Full(npot,potentialArgs+ii*npot,pot_type,pot_args);
+  //Integrate
+  void (*odeint_func)(void (*func)(double, double *, double *,
+			   int, struct potentialArg *),
+		      int,
+		      double *,
+		      int, double, double *,
+		      int, struct potentialArg *,
+		      double, double,
+		      double *,int *);
+  void (*odeint_deriv_func)(double, double *, double *,
+			    int,struct potentialArg *);
+  switch ( odeint_type ) {
+  case 1: //RK4
+    odeint_func= &bovy_rk4;
+    odeint_deriv_func= &evalRectDeriv_dxdv;
+    dim= 12;
+    break;
+  case 2: //RK6
+    odeint_func= &bovy_rk6;
+    odeint_deriv_func= &evalRectDeriv_dxdv;
+    dim= 12;
+    break;
   case 5: //DOPR54
     odeint_func= &bovy_dopr54;
     odeint_deriv_func= &evalRectDeriv_dxdv;
     dim= 12;
     break;
   }
-  odeint_func(odeint_deriv_func,dim,yo,nt,-9999.99,t,npot,potentialArgs,
-	      rtol,atol,result,err);
+  install_sigint_handler(&oldaction);
+  galpy_openmp_schedule(GALPY_SCHEDULE_DYNAMIC,ORBITS_CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii) num_threads(max_threads)
+  for (ii=0; ii < nobj; ii++) {
+    if ( interrupted ) { // skip remaining orbits after CTRL-C
+      *(err+ii)= -10;
+      continue;
+    }
+    odeint_func(odeint_deriv_func,dim,yo+12*ii,nt,dt,t,npot,
+#ifdef _OPENMP
+		potentialArgs+omp_get_thread_num()*npot,
+#else
+		potentialArgs,
+#endif
+		rtol,atol,result+12*nt*ii,err+ii);
+  }
+  restore_sigint_handler(&oldaction);
+  //Free allocated memory
+  for (ii=0; ii < max_threads; ii++)
+    free_potentialArgs(npot,potentialArgs+ii*npot);
+  free(potentialArgs);
+  //Done!
+}
+/*
+  Maximal Lyapunov exponent: integrate an orbit and a deviation vector
+  from output time to output time, renormalizing the deviation vector to
+  unit length at each output time and accumulating the logarithm of its
+  growth; dim is the dimension of phase space, the state is [q,p,dq,dp]
+*/
+void integrateOrbit_lyapunov(void (*odeint_func)(void (*)(double, double *, double *,
+							  int, struct potentialArg *),
+						 int,double *,int,double,double *,
+						 int,struct potentialArg *,
+						 double,double,double *,int *),
+			     void (*odeint_deriv_func)(double,double *,double *,
+						       int,struct potentialArg *),
+			     int dim,
+			     double *yo,
+			     int nt,
+			     double dt,
+			     double *t,
+			     int npot,
+			     struct potentialArg * potentialArgs,
+			     double rtol,
+			     double atol,
+			     double *result,
+			     double *lyap,
+			     int * err){
+  int ii, jj, thiserr;
+  double norm, sumlog= 0.;
+  double tt[2];
+  double *y= (double *) malloc ( 2 * dim * sizeof(double) );
+  double *out= (double *) malloc ( 4 * dim * sizeof(double) );
+  for (jj=0; jj < 2*dim; jj++) *(y+jj)= *(yo+jj);
+  for (jj=0; jj < 2*dim; jj++) *(result+jj)= *(y+jj);
+  *lyap= 0.;
+  *err= 0;
+  for (ii=1; ii < nt; ii++) {
+    tt[0]= *(t+ii-1);
+    tt[1]= *(t+ii);
+    odeint_func(odeint_deriv_func,2*dim,y,2,dt,tt,npot,potentialArgs,
+		rtol,atol,out,&thiserr);
+    if ( thiserr == -10 ) {
+      *err= -10;
+      break;
+    }
+    if ( thiserr > *err ) *err= thiserr;
+    // Renormalize the deviation vector
+    norm= 0.;
+    for (jj=0; jj < dim; jj++)
+      norm+= *(out+3*dim+jj) * *(out+3*dim+jj);
+    norm= sqrt(norm);
+    sumlog+= log(norm);
+    for (jj=0; jj < dim; jj++) {
+      *(y+jj)= *(out+2*dim+jj);
+      *(y+dim+jj)= *(out+3*dim+jj) / norm;
+    }
+    for (jj=0; jj < 2*dim; jj++) *(result+2*dim*ii+jj)= *(y+jj);
+    *(lyap+ii)= sumlog / fabs(*(t+ii) - *t);
+  }
+  free(y);
+  free(out);
+}
+void integrateFullOrbit_lyapunov(int nobj,
+				 double *yo,
+				 int nt, 
+				 double *t,
+				 int npot,
+				 int * pot_type,
+				 double * pot_args,
+				 double dt,
+				 double rtol,
+				 double atol,
+				 double *result,
+				 double *lyap,
+				 int * err,
+				 int odeint_type){
+  int ii;
+  int max_threads;
+  struct sigaction oldaction;
+  double thisdt;
+  struct potentialArg * thesePotentialArgs;
+#ifdef _OPENMP
+  max_threads= ( nobj < omp_get_max_threads() ) ? nobj : omp_get_max_threads();
+#else
+  max_threads= 1;
+#endif
+  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+  for (ii=0; ii < max_threads; ii++)
+    parse_leapFuncArgs_Full(npot,potentialArgs+ii*npot,pot_type,pot_args);
+  void (*odeint_func)(void (*func)(double, double *, double *,
+			   int, struct potentialArg *),
+		      int,
+		      double *,
+		      int, double, double *,
+		      int, struct potentialArg *,
+		      double, double,
+		      double *,int *);
+  double (*estimate_step_func)(void (*func)(double, double *, double *,
+					    int, struct potentialArg *),
+			       int,double *,double,double *,
+			       int,struct potentialArg *,double,double);
+  switch ( odeint_type ) {
+  case 1: //RK4
+    odeint_func= &bovy_rk4;
+    estimate_step_func= &rk4_estimate_step;
+    break;
+  case 2: //RK6
+    odeint_func= &bovy_rk6;
+    estimate_step_func= &rk6_estimate_step;
+    break;
+  case 5: //DOPR54
+    odeint_func= &bovy_dopr54;
+    estimate_step_func= &rk4_estimate_step;
+    break;
+  }
+  install_sigint_handler(&oldaction);
+  galpy_openmp_schedule(GALPY_SCHEDULE_DYNAMIC,ORBITS_CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii,thisdt,thesePotentialArgs) num_threads(max_threads)
+  for (ii=0; ii < nobj; ii++) {
+    if ( interrupted ) { // skip remaining orbits after CTRL-C
+      *(err+ii)= -10;
+      continue;
+    }
+#ifdef _OPENMP
+    thesePotentialArgs= potentialArgs+omp_get_thread_num()*npot;
+#else
+    thesePotentialArgs= potentialArgs;
+#endif
+    // Estimate the stepsize once, rather than for each output interval
+    thisdt= dt;
+    if ( dt == -9999.99 )
+      thisdt= estimate_step_func(&evalRectDeriv_dxdv,12,yo+12*ii,
+				 *(t+1)-*t,t,npot,thesePotentialArgs,
+				 rtol,atol);
+    integrateOrbit_lyapunov(odeint_func,&evalRectDeriv_dxdv,6,yo+12*ii,nt,
+			    thisdt,t,npot,thesePotentialArgs,rtol,atol,
+			    result+12*nt*ii,lyap+nt*ii,err+ii);
+  }
+  restore_sigint_handler(&oldaction);
   //Free allocated memory
-  free_potentialArgs(npot,potentialArgs);
+  for (ii=0; ii < max_threads; ii++)
+    free_potentialArgs(npot,potentialArgs+ii*npot);
   free(potentialArgs);
   //Done!
 }
-// LCOV_EXCL_STOP
 void evalRectForce(double t, double *q, double *a,
 		   int nargs, struct potentialArg * potentialArgs){
   double sinphi, cosphi, x, y, phi,R,Rforce,phiforce, z, zforce;
@@ -452,64 +934,38 @@ void evalRectDeriv(double t, double *q, double *a,
   *a= zforce;
 }
 
-// LCOV_EXCL_START
 void evalRectDeriv_dxdv(double t, double *q, double *a,
 			int nargs, struct potentialArg * potentialArgs){
-  double sinphi, cosphi, x, y, phi,R,Rforce,phiforce,z,zforce;
-  double R2deriv, phi2deriv, Rphideriv, dFxdx, dFxdy, dFydx, dFydy;
+  int ii;
+  double r, dxnorm, h;
+  double qp[3], qm[3], ap[3], am[3];
   //first three derivatives are just the velocities
-  *a++= *(q+3);
-  *a++= *(q+4);
-  *a++= *(q+5);
+  *a= *(q+3);
+  *(a+1)= *(q+4);
+  *(a+2)= *(q+5);
   //Rest is force
-  //q is rectangular so calculate R and phi
-  x= *q;
-  y= *(q+1);
-  z= *(q+2);
-  R= sqrt(x*x+y*y);
-  phi= acos(x/R);
-  sinphi= y/R;
-  cosphi= x/R;
-  if ( y < 0. ) phi= 2.*M_PI-phi;
-  //Calculate the forces
-  Rforce= calcRforce(R,z,phi,t,nargs,potentialArgs);
-  zforce= calczforce(R,z,phi,t,nargs,potentialArgs);
-  phiforce= calcPhiforce(R,z,phi,t,nargs,potentialArgs);
-  *a++= cosphi*Rforce-1./R*sinphi*phiforce;
-  *a++= sinphi*Rforce+1./R*cosphi*phiforce;
-  *a++= zforce;
+  evalRectForce(t,q,a+3,nargs,potentialArgs);
   //dx derivatives are just dv
-  *a++= *(q+9);
-  *a++= *(q+10);
-  *a++= *(q+11);
-  //for the dv derivatives we need also R2deriv, phi2deriv, and Rphideriv
-  R2deriv= calcR2deriv(R,z,phi,t,nargs,potentialArgs);
-  phi2deriv= calcphi2deriv(R,z,phi,t,nargs,potentialArgs);
-  Rphideriv= calcRphideriv(R,z,phi,t,nargs,potentialArgs);
-  //..and dFxdx, dFxdy, dFydx, dFydy
-  dFxdx= -cosphi*cosphi*R2deriv
-    +2.*cosphi*sinphi/R/R*phiforce
-    +sinphi*sinphi/R*Rforce
-    +2.*sinphi*cosphi/R*Rphideriv
-    -sinphi*sinphi/R/R*phi2deriv;
-  dFxdy= -sinphi*cosphi*R2deriv
-    +(sinphi*sinphi-cosphi*cosphi)/R/R*phiforce
-    -cosphi*sinphi/R*Rforce
-    -(cosphi*cosphi-sinphi*sinphi)/R*Rphideriv
-    +cosphi*sinphi/R/R*phi2deriv;
-  dFydx= -cosphi*sinphi*R2deriv
-    +(sinphi*sinphi-cosphi*cosphi)/R/R*phiforce
-    +(sinphi*sinphi-cosphi*cosphi)/R*Rphideriv
-    -sinphi*cosphi/R*Rforce
-    +sinphi*cosphi/R/R*phi2deriv;
-  dFydy= -sinphi*sinphi*R2deriv
-    -2.*sinphi*cosphi/R/R*phiforce
-    -2.*sinphi*cosphi/R*Rphideriv
-    +cosphi*cosphi/R*Rforce
-    -cosphi*cosphi/R/R*phi2deriv;
-  *a++= dFxdx * *(q+4) + dFxdy * *(q+5);
-  *a++= dFydx * *(q+4) + dFydy * *(q+5);
-  *a= 0; //BOVY: PUT IN Z2DERIVS
+  *(a+6)= *(q+9);
+  *(a+7)= *(q+10);
+  *(a+8)= *(q+11);
+  //dv derivatives are the derivative of the force along dx, computed
+  //using a central finite difference of the force
+  dxnorm= sqrt(*(q+6) * *(q+6) + *(q+7) * *(q+7) + *(q+8) * *(q+8));
+  if ( dxnorm == 0. ) {
+    *(a+9)= 0.;
+    *(a+10)= 0.;
+    *(a+11)= 0.;
+    return;
+  }
+  r= sqrt(*q * *q + *(q+1) * *(q+1) + *(q+2) * *(q+2));
+  h= DXDV_FD_STEP * r / dxnorm;
+  for (ii=0; ii < 3; ii++) {
+    qp[ii]= *(q+ii) + h * *(q+6+ii);
+    qm[ii]= *(q+ii) - h * *(q+6+ii);
+  }
+  evalRectForce(t,qp,ap,nargs,potentialArgs);
+  evalRectForce(t,qm,am,nargs,potentialArgs);
+  for (ii=0; ii < 3; ii++)
+    *(a+9+ii)= 0.5 * ( ap[ii] - am[ii] ) / h;
 }
-
-// LCOV_EXCL_STOP
@@ -5,6 +5,33 @@ extern "C" {
 #endif
 #include <galpy_potentials.h>
 void parse_leapFuncArgs_Full(int, struct potentialArg *,int *,double *);
+void evalRectForce(double, double *, double *,
+		   int, struct potentialArg *);
+void evalRectDeriv(double, double *, double *,
+		   int, struct potentialArg *);
+void integrateOrbit_events(void (*)(void (*)(double, double *, double *,
+					     int, struct potentialArg *),
+				    int,double *,int,double,double *,
+				    int,struct potentialArg *,
+				    double,double,double *,int *),
+			   void (*)(double,double *,double *,
+				    int,struct potentialArg *),
+			   int,
+			   void (*)(double,double *,double *,
+				    int,struct potentialArg *),
+			   int,double *,int,double,double *,int,
+			   struct potentialArg *,double,double,int,
+			   int *,int *,double *,double *,double *,int *);
+void integrateOrbit_lyapunov(void (*)(void (*)(double, double *, double *,
+					       int, struct potentialArg *),
+				      int,double *,int,double,double *,
+				      int,struct potentialArg *,
+				      double,double,double *,int *),
+			     void (*)(double,double *,double *,
+				      int,struct potentialArg *),
+			     int,double *,int,double,double *,int,
+			     struct potentialArg *,double,double,
+			     double *,double *,int *);
 #ifdef __cplusplus
 }
 #endif
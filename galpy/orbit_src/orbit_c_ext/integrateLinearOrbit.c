@@ -0,0 +1,152 @@
+/*
+  Wrappers around the C integration code for linear Orbits
+*/
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#include <bovy_symplecticode.h>
+#include <bovy_rk.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#include <bovy_openmp.h>
+#define ORBITS_CHUNKSIZE 1
+//Potentials
+#include <galpy_potentials.h>
+/*
+  Function Declarations
+*/
+void evalLinearForce(double, double *, double *,
+		     int, struct potentialArg *);
+void evalLinearDeriv(double, double *, double *,
+		     int, struct potentialArg *);
+/*
+  Actual functions
+*/
+void parse_leapFuncArgs_Linear(int npot,struct potentialArg * potentialArgs,
+			       int * pot_type,
+			       double * pot_args){
+  int ii,jj;
+  init_potentialArgs(npot,potentialArgs);
+  for (ii=0; ii < npot; ii++){
+    switch ( *pot_type++ ) {
+    case 31: //KGPotential, 4 arguments
+      potentialArgs->linearForce= &KGPotentialLinearForce;
+      potentialArgs->nargs= 4;
+      break;
+    }
+    potentialArgs->args= (double *) malloc( potentialArgs->nargs * sizeof(double));
+    for (jj=0; jj < potentialArgs->nargs; jj++){
+      *(potentialArgs->args)= *pot_args++;
+      potentialArgs->args++;
+    }
+    potentialArgs->args-= potentialArgs->nargs;
+    potentialArgs++;
+  }
+  potentialArgs-= npot;
+}
+void integrateLinearOrbit(int nobj,
+			  double *yo,
+			  int nt,
+			  double *t,
+			  int npot,
+			  int * pot_type,
+			  double * pot_args,
+			  double dt,
+			  double rtol,
+			  double atol,
+			  double *result,
+			  int * err,
+			  int odeint_type){
+  //Set up the forces, first count
+  int ii;
+  int dim;
+  int max_threads;
+  struct sigaction oldaction;
+#ifdef _OPENMP
+  max_threads= ( nobj < omp_get_max_threads() ) ? nobj : omp_get_max_threads();
+#else
+  max_threads= 1;
+#endif
+  // potentialArgs may cache intermediate results, so one copy / thread
+  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+  for (ii=0; ii < max_threads; ii++)
+    parse_leapFuncArgs_Linear(npot,potentialArgs+ii*npot,pot_type,pot_args);
+  //Integrate
+  void (*odeint_func)(void (*func)(double, double *, double *,
+			   int, struct potentialArg *),
+		      int,
+		      double *,
+		      int, double, double *,
+		      int, struct potentialArg *,
+		      double, double,
+		      double *,int *);
+  void (*odeint_deriv_func)(double, double *, double *,
+			    int,struct potentialArg *);
+  switch ( odeint_type ) {
+  case 0: //leapfrog
+    odeint_func= &leapfrog;
+    odeint_deriv_func= &evalLinearForce;
+    dim= 1;
+    break;
+  case 1: //RK4
+    odeint_func= &bovy_rk4;
+    odeint_deriv_func= &evalLinearDeriv;
+    dim= 2;
+    break;
+  case 2: //RK6
+    odeint_func= &bovy_rk6;
+    odeint_deriv_func= &evalLinearDeriv;
+    dim= 2;
+    break;
+  case 3: //symplec4
+    odeint_func= &symplec4;
+    odeint_deriv_func= &evalLinearForce;
+    dim= 1;
+    break;
+  case 4: //symplec6
+    odeint_func= &symplec6;
+    odeint_deriv_func= &evalLinearForce;
+    dim= 1;
+    break;
+  case 5: //DOPR54
+    odeint_func= &bovy_dopr54;
+    odeint_deriv_func= &evalLinearDeriv;
+    dim= 2;
+    break;
+  }
+  install_sigint_handler(&oldaction);
+  galpy_openmp_schedule(GALPY_SCHEDULE_DYNAMIC,ORBITS_CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii) num_threads(max_threads)
+  for (ii=0; ii < nobj; ii++) {
+    if ( interrupted ) { // skip remaining orbits after CTRL-C
+      *(err+ii)= -10;
+      continue;
+    }
+    odeint_func(odeint_deriv_func,dim,yo+2*ii,nt,dt,t,npot,
+#ifdef _OPENMP
+		potentialArgs+omp_get_thread_num()*npot,
+#else
+		potentialArgs,
+#endif
+		rtol,atol,result+2*nt*ii,err+ii);
+  }
+  restore_sigint_handler(&oldaction);
+  //Free allocated memory
+  for (ii=0; ii < max_threads; ii++)
+    free_potentialArgs(npot,potentialArgs+ii*npot);
+  free(potentialArgs);
+  //Done!
+}
+
+void evalLinearForce(double t, double *q, double *a,
+		     int nargs, struct potentialArg * potentialArgs){
+  *a= calcLinearForce(*q,t,nargs,potentialArgs);
+}
+void evalLinearDeriv(double t, double *q, double *a,
+		     int nargs, struct potentialArg * potentialArgs){
+  //first derivative is just the velocity
+  *a++= *(q+1);
+  //Rest is force
+  *a= calcLinearForce(*q,t,nargs,potentialArgs);
+}
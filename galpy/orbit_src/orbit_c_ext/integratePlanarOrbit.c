@@ -7,8 +7,15 @@
 #include <math.h>
 #include <bovy_symplecticode.h>
 #include <bovy_rk.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#include <bovy_openmp.h>
+#define ORBITS_CHUNKSIZE 1
 //Potentials
 #include <galpy_potentials.h>
+#include <cubic_bspline_2d_coeffs.h>
+#include "integrateFullOrbit.h"
 #ifndef M_PI
 #define M_PI 3.14159265358979323846
 #endif
@@ -27,7 +34,9 @@ void evalPlanarRectDeriv_dxdv(double, double *, double *,
 void parse_leapFuncArgs(int npot,struct potentialArg * potentialArgs,
 			int * pot_type,
 			double * pot_args){
-  int ii,jj;
+  int ii,jj,kk;
+  int nR, nz;
+  double * Rgrid, * zgrid, * rforceGrid_splinecoeffs;
   init_potentialArgs(npot,potentialArgs);
   for (ii=0; ii < npot; ii++){
     switch ( *pot_type++ ) {
@@ -50,11 +59,17 @@ void parse_leapFuncArgs(int npot,struct potentialArg * potentialArgs,
     case 2: //TransientLogSpiralPotential, 8 arguments
       potentialArgs->planarRforce= &TransientLogSpiralPotentialRforce;
       potentialArgs->planarphiforce= &TransientLogSpiralPotentialphiforce;
+      potentialArgs->planarR2deriv= &TransientLogSpiralPotentialR2deriv;
+      potentialArgs->planarphi2deriv= &TransientLogSpiralPotentialphi2deriv;
+      potentialArgs->planarRphideriv= &TransientLogSpiralPotentialRphideriv;
       potentialArgs->nargs= 8;
       break;
     case 3: //SteadyLogSpiralPotential, 8 arguments
       potentialArgs->planarRforce= &SteadyLogSpiralPotentialRforce;
       potentialArgs->planarphiforce= &SteadyLogSpiralPotentialphiforce;
+      potentialArgs->planarR2deriv= &SteadyLogSpiralPotentialR2deriv;
+      potentialArgs->planarphi2deriv= &SteadyLogSpiralPotentialphi2deriv;
+      potentialArgs->planarRphideriv= &SteadyLogSpiralPotentialRphideriv;
       potentialArgs->nargs= 8;
       break;
     case 4: //EllipticalDiskPotential, 6 arguments
@@ -116,7 +131,7 @@ void parse_leapFuncArgs(int npot,struct potentialArg * potentialArgs,
     case 11: //DoubleExponentialDiskPotential, XX arguments
       potentialArgs->planarRforce= &DoubleExponentialDiskPotentialPlanarRforce;
       potentialArgs->planarphiforce= &ZeroPlanarForce;
-      //potentialArgs->planarR2deriv= &DoubleExponentialDiskPotentialPlanarR2deriv;
+      potentialArgs->planarR2deriv= &DoubleExponentialDiskPotentialPlanarR2deriv;
       potentialArgs->planarphi2deriv= &ZeroPlanarForce;
       potentialArgs->planarRphideriv= &ZeroPlanarForce;
       //Look at pot_args to figure out the number of arguments
@@ -130,6 +145,37 @@ void parse_leapFuncArgs(int npot,struct potentialArg * potentialArgs,
       potentialArgs->planarRphideriv= &ZeroPlanarForce;
       potentialArgs->nargs= 3;
       break;
+    case 13: //interpRZPotential, XX arguments
+      //Grab the grids and the coefficients of the Rforce interpolation
+      nR= (int) *pot_args++;
+      nz= (int) *pot_args++;
+      Rgrid= (double *) malloc ( nR * sizeof ( double ) );
+      zgrid= (double *) malloc ( nz * sizeof ( double ) );
+      rforceGrid_splinecoeffs= (double *) malloc ( nR * nz * sizeof ( double ) );
+      for (kk=0; kk < nR; kk++)
+	*(Rgrid+kk)= *pot_args++;
+      for (kk=0; kk < nz; kk++)
+	*(zgrid+kk)= *pot_args++;
+      for (kk=0; kk < nR; kk++)
+	put_row(rforceGrid_splinecoeffs,kk,pot_args+kk*nz,nz);
+      pot_args+= nR*nz;
+      potentialArgs->i2drforce= interp_2d_alloc(nR,nz);
+      interp_2d_init(potentialArgs->i2drforce,Rgrid,zgrid,
+		     rforceGrid_splinecoeffs,
+		     INTERP_2D_LINEAR); //latter bc we already calculated the coeffs
+      potentialArgs->accxrforce= gsl_interp_accel_alloc ();
+      potentialArgs->accyrforce= gsl_interp_accel_alloc ();
+      potentialArgs->planarRforce= &interpRZPotentialPlanarRforce;
+      potentialArgs->planarphiforce= &ZeroPlanarForce;
+      potentialArgs->planarR2deriv= &interpRZPotentialPlanarR2deriv;
+      potentialArgs->planarphi2deriv= &ZeroPlanarForce;
+      potentialArgs->planarRphideriv= &ZeroPlanarForce;
+      potentialArgs->nargs= 2;
+      //clean up
+      free(Rgrid);
+      free(zgrid);
+      free(rforceGrid_splinecoeffs);
+      break;
     case 14: //IsochronePotential, 2 arguments
       potentialArgs->planarRforce= &IsochronePotentialPlanarRforce;
       potentialArgs->planarphiforce= &ZeroPlanarForce;
@@ -189,16 +235,25 @@ void parse_leapFuncArgs(int npot,struct potentialArg * potentialArgs,
     case 21: //TriaxialHernquistPotential, lots of arguments
       potentialArgs->planarRforce= &TriaxialHernquistPotentialPlanarRforce;
       potentialArgs->planarphiforce= &TriaxialHernquistPotentialPlanarphiforce;
+      potentialArgs->planarR2deriv= &TriaxialHernquistPotentialPlanarR2deriv;
+      potentialArgs->planarphi2deriv= &TriaxialHernquistPotentialPlanarphi2deriv;
+      potentialArgs->planarRphideriv= &TriaxialHernquistPotentialPlanarRphideriv;
       potentialArgs->nargs= (int) (21 + 2 * *(pot_args+14));
       break;
     case 22: //TriaxialNFWPotential, lots of arguments
       potentialArgs->planarRforce= &TriaxialNFWPotentialPlanarRforce;
       potentialArgs->planarphiforce= &TriaxialNFWPotentialPlanarphiforce;
+      potentialArgs->planarR2deriv= &TriaxialNFWPotentialPlanarR2deriv;
+      potentialArgs->planarphi2deriv= &TriaxialNFWPotentialPlanarphi2deriv;
+      potentialArgs->planarRphideriv= &TriaxialNFWPotentialPlanarRphideriv;
       potentialArgs->nargs= (int) (21 + 2 * *(pot_args+14));
       break;
     case 23: //TriaxialJaffePotential, lots of arguments
       potentialArgs->planarRforce= &TriaxialJaffePotentialPlanarRforce;
       potentialArgs->planarphiforce= &TriaxialJaffePotentialPlanarphiforce;
+      potentialArgs->planarR2deriv= &TriaxialJaffePotentialPlanarR2deriv;
+      potentialArgs->planarphi2deriv= &TriaxialJaffePotentialPlanarphi2deriv;
+      potentialArgs->planarRphideriv= &TriaxialJaffePotentialPlanarRphideriv;
       potentialArgs->nargs= (int) (21 + 2 * *(pot_args+14));
       break;    
     case 24: //SCFPotential, many arguments
@@ -212,11 +267,17 @@ void parse_leapFuncArgs(int npot,struct potentialArg * potentialArgs,
     case 25: //SoftenedNeedleBarPotential, 13 arguments
       potentialArgs->planarRforce= &SoftenedNeedleBarPotentialPlanarRforce;
       potentialArgs->planarphiforce= &SoftenedNeedleBarPotentialPlanarphiforce;
+      potentialArgs->planarR2deriv= &SoftenedNeedleBarPotentialPlanarR2deriv;
+      potentialArgs->planarphi2deriv= &SoftenedNeedleBarPotentialPlanarphi2deriv;
+      potentialArgs->planarRphideriv= &SoftenedNeedleBarPotentialPlanarRphideriv;
       potentialArgs->nargs= (int) 13;
       break;    
     case 26: //DiskSCFPotential, nsigma+3 arguments
       potentialArgs->planarRforce= &DiskSCFPotentialPlanarRforce;
       potentialArgs->planarphiforce= &ZeroPlanarForce;
+      potentialArgs->planarR2deriv= &DiskSCFPotentialPlanarR2deriv;
+      potentialArgs->planarphi2deriv= &ZeroPlanarForce;
+      potentialArgs->planarRphideriv= &ZeroPlanarForce;
       potentialArgs->nargs= (int) *(pot_args) + 3;
       break;
     case 27: // SpiralArmsPotential, 10 arguments + array of Cs
@@ -227,6 +288,25 @@ void parse_leapFuncArgs(int npot,struct potentialArg * potentialArgs,
       potentialArgs->planarRphideriv = &SpiralArmsPotentialPlanarRphideriv;
       potentialArgs->nargs = (int) 10 + *pot_args;
       break;
+    case 28: //FerrersPotential, 2*glorder+15 arguments
+      potentialArgs->planarRforce= &FerrersPotentialPlanarRforce;
+      potentialArgs->planarphiforce= &FerrersPotentialPlanarphiforce;
+      potentialArgs->nargs= (int) ( 15 + 2 * *(pot_args+7) );
+      break;
+    case 29: //MovingObjectPotential, 4 arguments after the tabulated orbit
+      initMovingObjectSplines(potentialArgs,&pot_args);
+      potentialArgs->planarRforce= &MovingObjectPotentialPlanarRforce;
+      potentialArgs->planarphiforce= &MovingObjectPotentialPlanarphiforce;
+      potentialArgs->nargs= 4;
+      break;
+    case 30: //RazorThinExponentialDiskPotential, 2*glorder+3 arguments
+      potentialArgs->planarRforce= &RazorThinExponentialDiskPotentialPlanarRforce;
+      potentialArgs->planarphiforce= &ZeroPlanarForce;
+      potentialArgs->planarR2deriv= &RazorThinExponentialDiskPotentialPlanarR2deriv;
+      potentialArgs->planarphi2deriv= &ZeroPlanarForce;
+      potentialArgs->planarRphideriv= &ZeroPlanarForce;
+      potentialArgs->nargs= (int) ( 3 + 2 * *(pot_args+2) );
+      break;
 //////////////////////////////// WRAPPERS /////////////////////////////////////
     case -1: //DehnenSmoothWrapperPotential
       potentialArgs->planarRforce= &DehnenSmoothWrapperPotentialPlanarRforce;
@@ -266,7 +346,8 @@ void parse_leapFuncArgs(int npot,struct potentialArg * potentialArgs,
   }
   potentialArgs-= npot;
 }
-void integratePlanarOrbit(double *yo,
+void integratePlanarOrbit(int nobj,
+			  double *yo,
 			  int nt, 
 			  double *t,
 			  int npot,
@@ -277,11 +358,23 @@ void integratePlanarOrbit(double *yo,
 			  double atol,
 			  double *result,
 			  int * err,
-			  int odeint_type){
+			  int odeint_type,
+			  int dense_output,
+			  double *acc){
   //Set up the forces, first count
+  int ii,jj;
   int dim;
-  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
-  parse_leapFuncArgs(npot,potentialArgs,pot_type,pot_args);
+  int max_threads;
+  struct sigaction oldaction;
+#ifdef _OPENMP
+  max_threads= ( nobj < omp_get_max_threads() ) ? nobj : omp_get_max_threads();
+#else
+  max_threads= 1;
+#endif
+  // potentialArgs may cache intermediate results, so one copy / thread
+  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+  for (ii=0; ii < max_threads; ii++)
+    parse_leapFuncArgs(npot,potentialArgs+ii*npot,pot_type,pot_args);
   //Integrate
   void (*odeint_func)(void (*func)(double, double *, double *,
 			   int, struct potentialArg *),
@@ -325,14 +418,140 @@ void integratePlanarOrbit(double *yo,
     dim= 4;
     break;
   }
-  odeint_func(odeint_deriv_func,dim,yo,nt,dt,t,npot,potentialArgs,rtol,atol,
-	      result,err);
+  install_sigint_handler(&oldaction);
+  galpy_openmp_schedule(GALPY_SCHEDULE_DYNAMIC,ORBITS_CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii,jj) num_threads(max_threads)
+  for (ii=0; ii < nobj; ii++) {
+    if ( interrupted ) { // skip remaining orbits after CTRL-C
+      *(err+ii)= -10;
+      continue;
+    }
+    odeint_func(odeint_deriv_func,dim,yo+4*ii,nt,dt,t,npot,
+#ifdef _OPENMP
+		potentialArgs+omp_get_thread_num()*npot,
+#else
+		potentialArgs,
+#endif
+		rtol,atol,result+4*nt*ii,err+ii);
+    // For dense output, also return the acceleration at each output time
+    if ( dense_output )
+      for (jj=0; jj < nt; jj++)
+	evalPlanarRectForce(*(t+jj),result+4*nt*ii+4*jj,acc+2*nt*ii+2*jj,npot,
+#ifdef _OPENMP
+		      potentialArgs+omp_get_thread_num()*npot);
+#else
+		      potentialArgs);
+#endif
+  }
+  restore_sigint_handler(&oldaction);
   //Free allocated memory
-  free_potentialArgs(npot,potentialArgs);
+  for (ii=0; ii < max_threads; ii++)
+    free_potentialArgs(npot,potentialArgs+ii*npot);
   free(potentialArgs);
   //Done!
 }
 
+void integratePlanarOrbit_events(int nobj,
+                                 double *yo,
+                                 int nt,
+                                 double *t,
+                                 int npot,
+                                 int * pot_type,
+                                 double * pot_args,
+                                 double dt,
+                                 double rtol,
+                                 double atol,
+                                 int maxevents,
+                                 int *nevents,
+                                 int *etype,
+                                 double *etime,
+                                 double *estate,
+                                 double *yf,
+                                 int * err,
+                                 int odeint_type){
+  //Set up the forces, first count
+  int ii;
+  int dim;
+  int max_threads;
+  struct sigaction oldaction;
+#ifdef _OPENMP
+  max_threads= ( nobj < omp_get_max_threads() ) ? nobj : omp_get_max_threads();
+#else
+  max_threads= 1;
+#endif
+  // potentialArgs may cache intermediate results, so one copy / thread
+  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+  for (ii=0; ii < max_threads; ii++)
+    parse_leapFuncArgs(npot,potentialArgs+ii*npot,pot_type,pot_args);
+  //Integrate
+  void (*odeint_func)(void (*func)(double, double *, double *,
+			   int, struct potentialArg *),
+		      int,
+		      double *,
+		      int, double, double *,
+		      int, struct potentialArg *,
+		      double, double,
+		      double *,int *);
+  void (*odeint_deriv_func)(double, double *, double *,
+			    int,struct potentialArg *);
+  switch ( odeint_type ) {
+  case 0: //leapfrog
+    odeint_func= &leapfrog;
+    odeint_deriv_func= &evalPlanarRectForce;
+    dim= 2;
+    break;
+  case 1: //RK4
+    odeint_func= &bovy_rk4;
+    odeint_deriv_func= &evalPlanarRectDeriv;
+    dim= 4;
+    break;
+  case 2: //RK6
+    odeint_func= &bovy_rk6;
+    odeint_deriv_func= &evalPlanarRectDeriv;
+    dim= 4;
+    break;
+  case 3: //symplec4
+    odeint_func= &symplec4;
+    odeint_deriv_func= &evalPlanarRectForce;
+    dim= 2;
+    break;
+  case 4: //symplec6
+    odeint_func= &symplec6;
+    odeint_deriv_func= &evalPlanarRectForce;
+    dim= 2;
+    break;
+  case 5: //DOPR54
+    odeint_func= &bovy_dopr54;
+    odeint_deriv_func= &evalPlanarRectDeriv;
+    dim= 4;
+    break;
+  }
+  install_sigint_handler(&oldaction);
+  galpy_openmp_schedule(GALPY_SCHEDULE_DYNAMIC,ORBITS_CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii) num_threads(max_threads)
+  for (ii=0; ii < nobj; ii++) {
+    if ( interrupted ) { // skip remaining orbits after CTRL-C
+      *(err+ii)= -10;
+      continue;
+    }
+    integrateOrbit_events(odeint_func,odeint_deriv_func,dim,&evalPlanarRectForce,2,
+			  yo+4*ii,nt,dt,t,npot,
+#ifdef _OPENMP
+			  potentialArgs+omp_get_thread_num()*npot,
+#else
+			  potentialArgs,
+#endif
+			  rtol,atol,maxevents,nevents+ii,
+			  etype+maxevents*ii,etime+maxevents*ii,
+			  estate+4*maxevents*ii,yf+4*ii,err+ii);
+  }
+  restore_sigint_handler(&oldaction);
+  //Free allocated memory
+  for (ii=0; ii < max_threads; ii++)
+    free_potentialArgs(npot,potentialArgs+ii*npot);
+  free(potentialArgs);
+  //Done!
+}
 void integratePlanarOrbit_dxdv(double *yo,
 			       int nt, 
 			       double *t,
@@ -347,6 +566,7 @@ void integratePlanarOrbit_dxdv(double *yo,
 			       int odeint_type){
   //Set up the forces, first count
   int dim;
+  struct sigaction oldaction;
   struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
   parse_leapFuncArgs(npot,potentialArgs,pot_type,pot_args);
   //Integrate
@@ -377,14 +597,100 @@ void integratePlanarOrbit_dxdv(double *yo,
     dim= 8;
     break;
   }
+  install_sigint_handler(&oldaction);
   odeint_func(odeint_deriv_func,dim,yo,nt,dt,t,npot,potentialArgs,rtol,atol,
 	      result,err);
+  restore_sigint_handler(&oldaction);
   //Free allocated memory
   free_potentialArgs(npot,potentialArgs);
   free(potentialArgs);
   //Done!
 }
 
+void integratePlanarOrbit_lyapunov(int nobj,
+				   double *yo,
+				   int nt, 
+				   double *t,
+				   int npot,
+				   int * pot_type,
+				   double * pot_args,
+				   double dt,
+				   double rtol,
+				   double atol,
+				   double *result,
+				   double *lyap,
+				   int * err,
+				   int odeint_type){
+  int ii;
+  int max_threads;
+  struct sigaction oldaction;
+  double thisdt;
+  struct potentialArg * thesePotentialArgs;
+#ifdef _OPENMP
+  max_threads= ( nobj < omp_get_max_threads() ) ? nobj : omp_get_max_threads();
+#else
+  max_threads= 1;
+#endif
+  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+  for (ii=0; ii < max_threads; ii++)
+    parse_leapFuncArgs(npot,potentialArgs+ii*npot,pot_type,pot_args);
+  void (*odeint_func)(void (*func)(double, double *, double *,
+			   int, struct potentialArg *),
+		      int,
+		      double *,
+		      int, double, double *,
+		      int, struct potentialArg *,
+		      double, double,
+		      double *,int *);
+  double (*estimate_step_func)(void (*func)(double, double *, double *,
+					    int, struct potentialArg *),
+			       int,double *,double,double *,
+			       int,struct potentialArg *,double,double);
+  switch ( odeint_type ) {
+  case 1: //RK4
+    odeint_func= &bovy_rk4;
+    estimate_step_func= &rk4_estimate_step;
+    break;
+  case 2: //RK6
+    odeint_func= &bovy_rk6;
+    estimate_step_func= &rk6_estimate_step;
+    break;
+  case 5: //DOPR54
+    odeint_func= &bovy_dopr54;
+    estimate_step_func= &rk4_estimate_step;
+    break;
+  }
+  install_sigint_handler(&oldaction);
+  galpy_openmp_schedule(GALPY_SCHEDULE_DYNAMIC,ORBITS_CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii,thisdt,thesePotentialArgs) num_threads(max_threads)
+  for (ii=0; ii < nobj; ii++) {
+    if ( interrupted ) { // skip remaining orbits after CTRL-C
+      *(err+ii)= -10;
+      continue;
+    }
+#ifdef _OPENMP
+    thesePotentialArgs= potentialArgs+omp_get_thread_num()*npot;
+#else
+    thesePotentialArgs= potentialArgs;
+#endif
+    // Estimate the stepsize once, rather than for each output interval
+    thisdt= dt;
+    if ( dt == -9999.99 )
+      thisdt= estimate_step_func(&evalPlanarRectDeriv_dxdv,8,yo+8*ii,
+				 *(t+1)-*t,t,npot,thesePotentialArgs,
+				 rtol,atol);
+    integrateOrbit_lyapunov(odeint_func,&evalPlanarRectDeriv_dxdv,4,yo+8*ii,
+			    nt,thisdt,t,npot,thesePotentialArgs,rtol,atol,
+			    result+8*nt*ii,lyap+nt*ii,err+ii);
+  }
+  restore_sigint_handler(&oldaction);
+  //Free allocated memory
+  for (ii=0; ii < max_threads; ii++)
+    free_potentialArgs(npot,potentialArgs+ii*npot);
+  free(potentialArgs);
+  //Done!
+}
+
 void evalPlanarRectForce(double t, double *q, double *a,
 			 int nargs, struct potentialArg * potentialArgs){
   double sinphi, cosphi, x, y, phi,R,Rforce,phiforce;
@@ -4,7 +4,8 @@ import numpy as nu
 from scipy import integrate
 import galpy.util.bovy_symplecticode as symplecticode
 from galpy.util.bovy_conversion import physical_conversion
-from galpy.orbit_src.OrbitTop import OrbitTop
+from galpy.orbit_src.OrbitTop import OrbitTop, _denseOrbitInterp, \
+    _integrate_memmap
 from galpy.potential_src.planarPotential import _evaluateplanarRforces,\
     RZToplanarPotential, toPlanarPotential, _evaluateplanarphiforces,\
     _evaluateplanarPotentials
@@ -338,7 +339,8 @@ class planarOrbit(planarOrbitTop):
                           ro=ro,zo=zo,vo=vo,solarmotion=solarmotion)
         return None
 
-    def integrate(self,t,pot,method='symplec4_c',dt=None):
+    def integrate(self,t,pot,method='symplec4_c',dt=None,dense_output=False,
+                  memmap=None,chunksize=10000):
         """
         NAME:
            integrate
@@ -354,17 +356,38 @@ class planarOrbit(planarOrbitTop):
                    'rk6_c' for a 6-th order Runge-Kutta integrator in C
                    'dopr54_c' for a Dormand-Prince integrator in C (generally the fastest)
            dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize
+           dense_output= (False) if True, also store the acceleration at each output time and use it to evaluate the orbit at arbitrary times using quintic Hermite interpolation
+           memmap= (None) if set, name of a .npy file to which the orbit and the acceleration at each output time are written as the integration advances in chunks of chunksize output times; the orbit is then a numpy.memmap of this file that is read lazily
+           chunksize= (10000) number of output times integrated at once when memmap is set
         OUTPUT:
            (none) (get the actual orbit using getOrbit()
         HISTORY:
            2010-07-20
+           2017-09-05 - Added dense_output - agent
+           2017-09-12 - Added memmap - agent
         """
         if hasattr(self,'_orbInterp'): delattr(self,'_orbInterp')
         if hasattr(self,'rs'): delattr(self,'rs')
         thispot= toPlanarPotential(pot)
         self.t= nu.array(t)
         self._pot= thispot
-        self.orbit, msg= _integrateOrbit(self.vxvv,thispot,t,method,dt)
+        if not memmap is None:
+            msgs= []
+            def integrator(vxvv,tt):
+                out, tmsg, acc= _integrateOrbit(vxvv,thispot,tt,method,dt,
+                                                dense_output=True)
+                msgs.append(tmsg)
+                return (out,acc)
+            self.orbit, acc= _integrate_memmap(integrator,self.vxvv,t,memmap,
+                                               chunksize,nacc=2)
+            self._orbInterp= _denseOrbitInterp(self.t,self.orbit,acc)
+            msg= nu.amax(msgs)
+        elif dense_output:
+            self.orbit, msg, acc= _integrateOrbit(self.vxvv,thispot,t,method,
+                                                  dt,dense_output=True)
+            self._orbInterp= _denseOrbitInterp(self.t,self.orbit,acc)
+        else:
+            self.orbit, msg= _integrateOrbit(self.vxvv,thispot,t,method,dt)
         return msg
 
     def integrate_dxdv(self,dxdv,t,pot,method='dopr54_c',
@@ -556,7 +579,7 @@ def _REOM(y,t,pot,l2):
     return [y[1],
             l2/y[0]**3.+_evaluateplanarRforces(pot,y[0],t=t)]
 
-def _integrateOrbit(vxvv,pot,t,method,dt):
+def _integrateOrbit(vxvv,pot,t,method,dt,dense_output=False):
     """
     NAME:
        _integrateOrbit
@@ -564,15 +587,19 @@ def _integrateOrbit(vxvv,pot,t,method,dt):
        integrate an orbit in a Phi(R) potential in the (R,phi)-plane
     INPUT:
        vxvv - array with the initial conditions stacked like
-              [R,vR,vT,phi]; vR outward!
+              [R,vR,vT,phi]; vR outward! or [nobj,4] array of such initial conditions, which are integrated in a single call for the C integrators
        pot - Potential instance
        t - list of times at which to output (0 has to be in this!)
        method - 'odeint' or 'leapfrog'
        dt- if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize
+       dense_output= (False) if True, also return the rectangular acceleration at each t
     OUTPUT:
-       [:,4] array of [R,vR,vT,phi] at each t
+       ([:,4] array of [R,vR,vT,phi] at each t ([nobj,:,4] for [nobj,4] input),error message)
+       if dense_output: (orbit,error message,[:,2] array of [ax,ay] at each t)
     HISTORY:
        2010-07-20 - Written - Bovy (NYU)
+       2017-09-01 - Allow multiple initial conditions - agent
+       2017-09-05 - Added dense_output - agent
     """
     #First check that the potential has C
     if '_c' in method:
@@ -582,6 +609,15 @@ def _integrateOrbit(vxvv,pot,t,method,dt):
             else:
                 method= 'odeint'
             warnings.warn("Cannot use C integration because some of the potentials are not implemented in C (using %s instead)" % (method), galpyWarning)
+    vxvv= nu.array(vxvv)
+    if len(vxvv.shape) > 1 and not '_c' in method:
+        # Python integrators: integrate one orbit at a time
+        outs= [_integrateOrbit(tvxvv,pot,t,method,dt,
+                               dense_output=dense_output)
+               for tvxvv in vxvv]
+        return tuple(nu.array([o[ii] for o in outs])
+                     for ii in range(len(outs[0])))
+    acc= None
     if method.lower() == 'leapfrog':
         #go to the rectangular frame
         this_vxvv= nu.array([vxvv[0]*nu.cos(vxvv[3]),
@@ -608,24 +644,31 @@ def _integrateOrbit(vxvv,pot,t,method,dt):
             or method.lower() == 'symplec6_c' or method.lower() == 'dopr54_c':
         warnings.warn("Using C implementation to integrate orbits",galpyWarning)
         #go to the rectangular frame
-        this_vxvv= nu.array([vxvv[0]*nu.cos(vxvv[3]),
-                             vxvv[0]*nu.sin(vxvv[3]),
-                             vxvv[1]*nu.cos(vxvv[3])-vxvv[2]*nu.sin(vxvv[3]),
-                             vxvv[2]*nu.cos(vxvv[3])+vxvv[1]*nu.sin(vxvv[3])])
+        this_vxvv= nu.array([vxvv[...,0]*nu.cos(vxvv[...,3]),
+                             vxvv[...,0]*nu.sin(vxvv[...,3]),
+                             vxvv[...,1]*nu.cos(vxvv[...,3])
+                             -vxvv[...,2]*nu.sin(vxvv[...,3]),
+                             vxvv[...,2]*nu.cos(vxvv[...,3])
+                             +vxvv[...,1]*nu.sin(vxvv[...,3])]).T
         #integrate
-        tmp_out, msg= integratePlanarOrbit_c(pot,this_vxvv,
-                                             t,method,dt=dt)
+        if dense_output:
+            tmp_out, msg, acc= integratePlanarOrbit_c(pot,this_vxvv,
+                                                      t,method,dt=dt,
+                                                      dense_output=True)
+        else:
+            tmp_out, msg= integratePlanarOrbit_c(pot,this_vxvv,
+                                                 t,method,dt=dt)
         #go back to the cylindrical frame
-        R= nu.sqrt(tmp_out[:,0]**2.+tmp_out[:,1]**2.)
-        phi= nu.arccos(tmp_out[:,0]/R)
-        phi[(tmp_out[:,1] < 0.)]= 2.*nu.pi-phi[(tmp_out[:,1] < 0.)]
-        vR= tmp_out[:,2]*nu.cos(phi)+tmp_out[:,3]*nu.sin(phi)
-        vT= tmp_out[:,3]*nu.cos(phi)-tmp_out[:,2]*nu.sin(phi)
-        out= nu.zeros((len(t),4))
-        out[:,0]= R
-        out[:,1]= vR
-        out[:,2]= vT
-        out[:,3]= phi
+        R= nu.sqrt(tmp_out[...,0]**2.+tmp_out[...,1]**2.)
+        phi= nu.arccos(tmp_out[...,0]/R)
+        phi[(tmp_out[...,1] < 0.)]= 2.*nu.pi-phi[(tmp_out[...,1] < 0.)]
+        vR= tmp_out[...,2]*nu.cos(phi)+tmp_out[...,3]*nu.sin(phi)
+        vT= tmp_out[...,3]*nu.cos(phi)-tmp_out[...,2]*nu.sin(phi)
+        out= nu.zeros_like(tmp_out)
+        out[...,0]= R
+        out[...,1]= vR
+        out[...,2]= vT
+        out[...,3]= phi
     elif method.lower() == 'odeint':
         vphi= vxvv[2]/vxvv[0]
         init= [vxvv[0],vxvv[1],vxvv[3],vphi]
@@ -640,11 +683,17 @@ def _integrateOrbit(vxvv,pot,t,method,dt):
     else:
         raise NotImplementedError("requested integration method does not exist")
     #post-process to remove negative radii
-    neg_radii= (out[:,0] < 0.)
+    neg_radii= (out[...,0] < 0.)
     out[neg_radii,0]= -out[neg_radii,0]
     out[neg_radii,3]+= m.pi
     _parse_warnmessage(msg)
-    return (out,msg)
+    if not dense_output:
+        return (out,msg)
+    if acc is None: # Not computed by the integrator
+        acc= nu.array([_rectForce([out[ii,0]*nu.cos(out[ii,3]),
+                                   out[ii,0]*nu.sin(out[ii,3])],pot,t=t[ii])
+                       for ii in range(len(t))])
+    return (out,msg,acc)
 
 def _integrateOrbit_dxdv(vxvv,dxdv,pot,t,method,rectIn,rectOut):
     """
@@ -844,6 +893,6 @@ def _rectForce(x,pot,t=0.):
                      sinphi*Rforce+1./R*cosphi*phiforce])
 
 def _parse_warnmessage(msg):
-    if msg == 1: #pragma: no cover
+    if nu.any(msg == 1): #pragma: no cover
         warnings.warn("During numerical integration, steps smaller than the smallest step were requested; integration might not be accurate",galpyWarning)
         
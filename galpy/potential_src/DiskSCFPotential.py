@@ -124,6 +124,7 @@ This technique was introduced by `Kuijken & Dubinski (1995) <http://adsabs.harva
         self._scf= SCFPotential(amp=1.,Acos=Acos,Asin=Asin,a=a,ro=None,vo=None)
         if not self._Sigma_dict is None and not self._hz_dict is None:
             self.hasC= True
+            self.hasC_dxdv= True
         if normalize or \
                 (isinstance(normalize,(int,float)) \
                      and not isinstance(normalize,bool)): 
@@ -32,7 +32,7 @@ class FerrersPotential(Potential):
     and :math:`(x',y',z')` is a rotated frame wrt :math:`(x,y,z)`
     so that the major axis is aligned with :math:`x'`.
 
-    Note that this potential has not yet been optimized for speed and has no C implementation, so orbit integration is currently slow.
+    The C implementation used for orbit integration computes the force integrals using a fixed-order Gauss-Legendre quadrature.
     """
 
     def __init__(self,amp=1.,a=1.,n=2,b=0.35,c=0.2375,omegab=0.,
@@ -99,6 +99,7 @@ class FerrersPotential(Potential):
             self.normalize(normalize)
         if np.fabs(self._b-1.) > 10.**-10.:
             self.isNonAxi= True
+        self.hasC= True
         return None
 
     def _evaluate(self,R,z,phi=0.,t=0.):
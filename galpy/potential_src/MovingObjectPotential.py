@@ -79,6 +79,11 @@ class MovingObjectPotential(Potential):
         else:
             self._softening= softening
         self.isNonAxi= True
+        # C implementation interpolates the pre-integrated orbit, only for
+        # Plummer softening
+        self.hasC= isinstance(self._softening,PlummerSoftening) \
+            and hasattr(self._orb._orb,'orbit') \
+            and len(self._orb._orb.vxvv) in [4,6]
         return None
 
     def _evaluate(self,R,z,phi=0.,t=0.):
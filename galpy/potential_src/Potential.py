@@ -17,13 +17,14 @@ from __future__  import division, print_function
 
 import os, os.path
 import pickle
+import warnings
 from functools import wraps
 import math
 import numpy as nu
 from scipy import optimize, integrate
 import galpy.util.bovy_plot as plot
 from galpy.util import bovy_coords
-from galpy.util import config
+from galpy.util import config, galpyWarning
 from galpy.util.bovy_conversion import velocity_in_kpcGyr, \
     physical_conversion, potential_physical_input, freq_in_Gyr
 from galpy.util import bovy_conversion
@@ -1955,6 +1956,108 @@ def evaluateRzderivs(Pot,R,z,phi=None,t=0.):
     else: #pragma: no cover 
         raise PotentialError("Input to 'evaluateRzderivs' is neither a Potential-instance or a list of such instances")
 
+@potential_physical_input
+def evaluateBatch(Pot,R,z,phi=None,t=0.,quantities='potential',**kwargs):
+    """
+    NAME:
+
+       evaluateBatch
+
+    PURPOSE:
+
+       evaluate a possible sum of potentials, their forces, second derivatives, and densities at many points at once, using C (parallelized with OpenMP) when all potentials have a C implementation
+
+    INPUT:
+
+       Pot - a potential or list of potentials
+
+       R - cylindrical Galactocentric distance (can be Quantity)
+
+       z - distance above the plane (can be Quantity)
+
+       phi - azimuth (optional; can be Quantity)
+
+       t - time (optional; can be Quantity)
+
+       quantities= ('potential') quantity or list of quantities to evaluate: 'potential', 'Rforce', 'zforce', 'phiforce', 'R2deriv', 'z2deriv', 'Rzderiv', 'phi2deriv', 'Rphideriv', 'dens'
+
+       R, z, phi, and t are broadcast against each other
+
+       ro=, vo=, use_physical=, quantity= as for the other potential functions, to control the conversion of each output quantity to physical units
+
+    OUTPUT:
+
+       array with the broadcast shape of R, z, phi, and t for a single quantity or tuple of such arrays for a list of quantities (in physical units if ro and vo are set, each converted like the corresponding evaluate function)
+
+    NOTE:
+
+       In C, second derivatives are computed using central finite differences of the forces and the density using the Poisson equation applied to these
+
+    HISTORY:
+
+       2017-09-25 - Written - agent
+
+       2017-11-21 - Convert the output to physical units - agent
+
+    """
+    from galpy.potential_src.interpRZPotential import eval_batch_c, \
+        ext_loaded, _BATCH_QUANTITIES
+    if _dim(Pot) < 3:
+        raise PotentialError("Input to 'evaluateBatch' must be a 3D Potential-instance or a list of such instances")
+    nonAxi= _isNonAxi(Pot)
+    if nonAxi and phi is None:
+        raise PotentialError("The (list of) Potential instances is non-axisymmetric, but you did not provide phi")
+    if phi is None: phi= 0.
+    singleQuantity= isinstance(quantities,str)
+    if singleQuantity: quantities= [quantities]
+    for q in quantities:
+        if not q in _BATCH_QUANTITIES:
+            raise ValueError("Quantity %s not understood; should be one of %s" % (q,', '.join(_BATCH_QUANTITIES)))
+    R,z,phi,t= nu.broadcast_arrays(nu.asarray(R,dtype='float'),
+                                   nu.asarray(z,dtype='float'),
+                                   nu.asarray(phi,dtype='float'),
+                                   nu.asarray(t,dtype='float'))
+    shape= R.shape
+    R,z,phi,t= R.flatten(),z.flatten(),phi.flatten(),t.flatten()
+    if ext_loaded and _check_c(Pot):
+        out, err= eval_batch_c(Pot,R,z,phi,t,quantities)
+    else:
+        if not ext_loaded: #pragma: no cover
+            warnings.warn("Cannot use C batch evaluation, because the C extension is not loaded; using Python instead",galpyWarning)
+        out= nu.array([[_evaluate_single(Pot,q,R[ii],z[ii],phi[ii],t[ii])
+                        for ii in range(len(R))] for q in quantities])
+    out= [_batch_physical[q](Pot,o.reshape(shape) if len(shape) > 0 else o[0],
+                             **kwargs)
+          for q,o in zip(quantities,out)]
+    if singleQuantity: return out[0]
+    else: return tuple(out)
+
+def _batch_output(Pot,out,**kwargs):
+    """Return a single output of evaluateBatch, wrapped below to convert it to physical units"""
+    return out
+
+_batch_physical= dict((q,physical_conversion(pq,pop=True)(_batch_output))
+                      for q,pq in [('potential','energy'),
+                                   ('Rforce','force'),
+                                   ('zforce','force'),
+                                   ('phiforce','force'),
+                                   ('R2deriv','forcederivative'),
+                                   ('z2deriv','forcederivative'),
+                                   ('Rzderiv','forcederivative'),
+                                   ('phi2deriv','forcederivative'),
+                                   ('Rphideriv','forcederivative'),
+                                   ('dens','density')])
+
+def _evaluate_single(Pot,quantity,R,z,phi,t):
+    """Evaluate a single quantity at a single point in python, for evaluateBatch"""
+    if quantity == 'potential':
+        return _evaluatePotentials(Pot,R,z,phi=phi,t=t)
+    elif quantity == 'dens':
+        return evaluateDensities(Pot,R,z,phi=phi,t=t,use_physical=False)
+    if not isinstance(Pot,list): Pot= [Pot]
+    return nu.sum([getattr(p,quantity)(R,z,phi=phi,t=t,use_physical=False)
+                   for p in Pot])
+
 def plotPotentials(Pot,rmin=0.,rmax=1.5,nrs=21,zmin=-0.5,zmax=0.5,nzs=21,
                    phi=None,xy=False,t=0.,
                    ncontours=21,savefilename=None,aspect=None,
@@ -2028,16 +2131,27 @@ def plotPotentials(Pot,rmin=0.,rmax=1.5,nrs=21,zmin=-0.5,zmax=0.5,nzs=21,
         else:
             Rs= nu.linspace(rmin,rmax,nrs)
             zs= nu.linspace(zmin,zmax,nzs)
-            potRz= nu.zeros((nrs,nzs))
-            for ii in range(nrs):
-                for jj in range(nzs):
-                    if xy:
-                        R,phi,z= bovy_coords.rect_to_cyl(Rs[ii],zs[jj],0.)
-                    else:
-                        R,z= Rs[ii], zs[jj]
-                    potRz[ii,jj]= evaluatePotentials(Pot,nu.fabs(R),
-                                                     z,phi=phi,t=t,
-                                                     use_physical=False)
+            if _check_c(Pot):
+                # Evaluate the whole grid at once in C
+                if xy:
+                    R,phis,z= bovy_coords.rect_to_cyl(\
+                        *nu.meshgrid(Rs,zs,0.,indexing='ij'))
+                    R,phis,z= R[:,:,0],phis[:,:,0],z[:,:,0]
+                else:
+                    R,z= nu.meshgrid(Rs,zs,indexing='ij')
+                    phis= phi
+                potRz= evaluateBatch(Pot,nu.fabs(R),z,phi=phis,t=t)
+            else:
+                potRz= nu.zeros((nrs,nzs))
+                for ii in range(nrs):
+                    for jj in range(nzs):
+                        if xy:
+                            R,phi,z= bovy_coords.rect_to_cyl(Rs[ii],zs[jj],0.)
+                        else:
+                            R,z= Rs[ii], zs[jj]
+                        potRz[ii,jj]= evaluatePotentials(Pot,nu.fabs(R),
+                                                         z,phi=phi,t=t,
+                                                         use_physical=False)
             if not savefilename == None:
                 print("Writing savefile "+savefilename+" ...")
                 savefile= open(savefilename,'wb')
@@ -2657,8 +2771,10 @@ def _check_c(Pot,dxdv=False):
 
        2017-07-01 - Generalized to dxdv, added general support for WrapperPotentials, and added support for planarPotentials
 
+       2017-09-21 - Added support for linearPotentials - agent
+
     """
-    from galpy.potential import planarPotential
+    from galpy.potential import planarPotential, linearPotential
     if dxdv: hasC_attr= 'hasC_dxdv'
     else: hasC_attr= 'hasC'
     from galpy.potential_src.WrapperPotential import WrapperPotential
@@ -2666,8 +2782,9 @@ def _check_c(Pot,dxdv=False):
         return nu.all(nu.array([_check_c(p,dxdv=dxdv) for p in Pot],
                                dtype='bool'))
     elif isinstance(Pot,WrapperPotential):
-        return bool(Pot.__dict__[hasC_attr]*_check_c(Pot._pot))
-    elif isinstance(Pot,Potential) or isinstance(Pot,planarPotential):
+        return bool(Pot.__dict__[hasC_attr]*_check_c(Pot._pot,dxdv=dxdv))
+    elif isinstance(Pot,Potential) or isinstance(Pot,planarPotential) \
+            or isinstance(Pot,linearPotential):
         return Pot.__dict__[hasC_attr]
 
 def _dim(Pot):
@@ -215,6 +215,7 @@ class InterpSnapshotRZPotential(interpRZPotential.interpRZPotential) :
         # the interpRZPotential class sets these flags
         self._enable_c = enable_c
         self.hasC = True
+        self.hasC_dxdv = True
                 
         # set up the flags for interpolated quantities
         # since the potential and force are always calculated together, 
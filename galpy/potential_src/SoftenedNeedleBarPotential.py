@@ -82,7 +82,7 @@ class SoftenedNeedleBarPotential(Potential):
         self._omegab= omegab
         self._force_hash= None
         self.hasC= True
-        self.hasC_dxdv= False
+        self.hasC_dxdv= True
         if normalize or \
                 (isinstance(normalize,(int,float)) \
                      and not isinstance(normalize,bool)): #pragma: no cover 
@@ -168,6 +168,71 @@ class SoftenedNeedleBarPotential(Potential):
         self._compute_xyzforces(R,z,phi,t)
         return self._cached_Fz
 
+    def _R2deriv(self,R,z,phi=0.,t=0.):
+        """
+        NAME:
+           _R2deriv
+        PURPOSE:
+           evaluate the second radial derivative for this potential
+        INPUT:
+           R - Galactocentric cylindrical radius
+           z - vertical height
+           phi - azimuth
+           t - time
+        OUTPUT:
+           the second radial derivative
+        HISTORY:
+           2017-09-18 - Written - agent
+        """
+        phi= phi-self._pa-self._omegab*t
+        Fx,Fy,phixx,phixy,phiyy= self._compute_xyhessian(R,z,phi)
+        return numpy.cos(phi)**2.*phixx+numpy.sin(phi)**2.*phiyy\
+            +2.*numpy.cos(phi)*numpy.sin(phi)*phixy
+
+    def _phi2deriv(self,R,z,phi=0.,t=0.):
+        """
+        NAME:
+           _phi2deriv
+        PURPOSE:
+           evaluate the second azimuthal derivative for this potential
+        INPUT:
+           R - Galactocentric cylindrical radius
+           z - vertical height
+           phi - azimuth
+           t - time
+        OUTPUT:
+           the second azimuthal derivative
+        HISTORY:
+           2017-09-18 - Written - agent
+        """
+        phi= phi-self._pa-self._omegab*t
+        Fx,Fy,phixx,phixy,phiyy= self._compute_xyhessian(R,z,phi)
+        return R**2.*(numpy.sin(phi)**2.*phixx+numpy.cos(phi)**2.*phiyy\
+                          -2.*numpy.cos(phi)*numpy.sin(phi)*phixy)\
+                          +R*(numpy.cos(phi)*Fx+numpy.sin(phi)*Fy)
+
+    def _Rphideriv(self,R,z,phi=0.,t=0.):
+        """
+        NAME:
+           _Rphideriv
+        PURPOSE:
+           evaluate the mixed radial, azimuthal derivative for this potential
+        INPUT:
+           R - Galactocentric cylindrical radius
+           z - vertical height
+           phi - azimuth
+           t - time
+        OUTPUT:
+           the mixed radial, azimuthal derivative
+        HISTORY:
+           2017-09-18 - Written - agent
+        """
+        phi= phi-self._pa-self._omegab*t
+        Fx,Fy,phixx,phixy,phiyy= self._compute_xyhessian(R,z,phi)
+        return R*numpy.cos(phi)*numpy.sin(phi)*(phiyy-phixx)\
+            +R*numpy.cos(2.*phi)*phixy\
+            +numpy.sin(phi)*Fx-numpy.cos(phi)*Fy
+
     def OmegaP(self):
         """
         NAME:
@@ -206,6 +271,19 @@ class SoftenedNeedleBarPotential(Potential):
             self._cached_Fx= cp*Fx-sp*Fy
             self._cached_Fy= sp*Fx+cp*Fy
             self._cached_Fz= Fz
+    def _compute_xyhessian(self,R,z,phi):
+        # Forces and second derivatives in x,y in the aligned frame
+        x,y= R*numpy.cos(phi), R*numpy.sin(phi)
+        Tp, Tm= self._compute_TpTm(x,y,z)
+        gm= 1./Tm/(x-self._a+Tm)
+        gp= 1./Tp/(x+self._a+Tp)
+        phixx= ((x+self._a)/Tp**3.-(x-self._a)/Tm**3.)/2./self._a
+        phixy= y*(1./Tp**3.-1./Tm**3.)/2./self._a
+        phiyy= (gm-gp)/2./self._a\
+            -y**2.*((x-self._a+2.*Tm)*gm**2./Tm
+                    -(x+self._a+2.*Tp)*gp**2./Tp)/2./self._a
+        return (self._xforce_xyz(x,y,z,Tp,Tm),-y*(gm-gp)/2./self._a,
+                phixx,phixy,phiyy)
     def _xforce_xyz(self,x,y,z,Tp,Tm):
         return -2.*x/Tp/Tm/(Tp+Tm)
     def _yforce_xyz(self,x,y,z,Tp,Tm):
@@ -91,6 +91,7 @@ class SteadyLogSpiralPotential(planarPotential):
             if self._tform is None: self._tsteady= None
             else: self._tsteady= self._tform+2.*self._ts
         self.hasC= True
+        self.hasC_dxdv= True
 
     def _evaluate(self,R,phi=0.,t=0.):
         """
@@ -183,6 +184,96 @@ class SteadyLogSpiralPotential(planarPotential):
                                                                      -self._omegas*t
                                                                      -self._gamma))
     
+    def _R2deriv(self,R,phi=0.,t=0.):
+        """
+        NAME:
+           _R2deriv
+        PURPOSE:
+           evaluate the second radial derivative for this potential
+        INPUT:
+           R - Galactocentric cylindrical radius
+           phi - azimuth
+           t - time
+        OUTPUT:
+           the second radial derivative
+        HISTORY:
+           2017-09-18 - Written - agent
+        """
+        if not self._tform is None:
+            if t < self._tform:
+                smooth= 0.
+            elif t < self._tsteady:
+                deltat= t-self._tform
+                xi= 2.*deltat/(self._tsteady-self._tform)-1.
+                smooth= (3./16.*xi**5.-5./8*xi**3.+15./16.*xi+.5)
+            else: #spiral is fully on
+                smooth= 1.
+        else:
+            smooth= 1.
+        theta= self._alpha*math.log(R)-self._m*(phi-self._omegas*t-self._gamma)
+        return smooth*self._A/R**2.*(math.sin(theta)
+                                     -self._alpha*math.cos(theta))
+
+    def _phi2deriv(self,R,phi=0.,t=0.):
+        """
+        NAME:
+           _phi2deriv
+        PURPOSE:
+           evaluate the second azimuthal derivative for this potential
+        INPUT:
+           R - Galactocentric cylindrical radius
+           phi - azimuth
+           t - time
+        OUTPUT:
+           the second azimuthal derivative
+        HISTORY:
+           2017-09-18 - Written - agent
+        """
+        if not self._tform is None:
+            if t < self._tform:
+                smooth= 0.
+            elif t < self._tsteady:
+                deltat= t-self._tform
+                xi= 2.*deltat/(self._tsteady-self._tform)-1.
+                smooth= (3./16.*xi**5.-5./8*xi**3.+15./16.*xi+.5)
+            else: #spiral is fully on
+                smooth= 1.
+        else:
+            smooth= 1.
+        return -smooth*self._A/self._alpha*self._m**2.\
+            *math.cos(self._alpha*math.log(R)
+                      -self._m*(phi-self._omegas*t-self._gamma))
+
+    def _Rphideriv(self,R,phi=0.,t=0.):
+        """
+        NAME:
+           _Rphideriv
+        PURPOSE:
+           evaluate the mixed radial, azimuthal derivative for this potential
+        INPUT:
+           R - Galactocentric cylindrical radius
+           phi - azimuth
+           t - time
+        OUTPUT:
+           the mixed radial, azimuthal derivative
+        HISTORY:
+           2017-09-18 - Written - agent
+        """
+        if not self._tform is None:
+            if t < self._tform:
+                smooth= 0.
+            elif t < self._tsteady:
+                deltat= t-self._tform
+                xi= 2.*deltat/(self._tsteady-self._tform)-1.
+                smooth= (3./16.*xi**5.-5./8*xi**3.+15./16.*xi+.5)
+            else: #spiral is fully on
+                smooth= 1.
+        else:
+            smooth= 1.
+        return smooth*self._A/R*self._m\
+            *math.cos(self._alpha*math.log(R)
+                      -self._m*(phi-self._omegas*t-self._gamma))
+
     def wavenumber(self,R):
         """
         NAME:
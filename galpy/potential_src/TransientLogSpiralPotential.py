@@ -93,6 +93,7 @@ class TransientLogSpiralPotential(planarPotential):
         else:
             self._alpha= alpha
         self.hasC= True
+        self.hasC_dxdv= True
 
     def _evaluate(self,R,phi=0.,t=0.):
         """
@@ -152,6 +153,64 @@ class TransientLogSpiralPotential(planarPotential):
                                           -self._m*(phi-self._omegas*t
                                                     -self._gamma))
 
+    def _R2deriv(self,R,phi=0.,t=0.):
+        """
+        NAME:
+           _R2deriv
+        PURPOSE:
+           evaluate the second radial derivative for this potential
+        INPUT:
+           R - Galactocentric cylindrical radius
+           phi - azimuth
+           t - time
+        OUTPUT:
+           the second radial derivative
+        HISTORY:
+           2017-09-18 - Written - agent
+        """
+        theta= self._alpha*math.log(R)-self._m*(phi-self._omegas*t-self._gamma)
+        return self._A*math.exp(-(t-self._to)**2./2./self._sigma2)\
+            /R**2.*(math.sin(theta)-self._alpha*math.cos(theta))
+
+    def _phi2deriv(self,R,phi=0.,t=0.):
+        """
+        NAME:
+           _phi2deriv
+        PURPOSE:
+           evaluate the second azimuthal derivative for this potential
+        INPUT:
+           R - Galactocentric cylindrical radius
+           phi - azimuth
+           t - time
+        OUTPUT:
+           the second azimuthal derivative
+        HISTORY:
+           2017-09-18 - Written - agent
+        """
+        return -self._A*math.exp(-(t-self._to)**2./2./self._sigma2)\
+            /self._alpha*self._m**2.*math.cos(self._alpha*math.log(R)
+                                              -self._m*(phi-self._omegas*t
+                                                        -self._gamma))
+
+    def _Rphideriv(self,R,phi=0.,t=0.):
+        """
+        NAME:
+           _Rphideriv
+        PURPOSE:
+           evaluate the mixed radial, azimuthal derivative for this potential
+        INPUT:
+           R - Galactocentric cylindrical radius
+           phi - azimuth
+           t - time
+        OUTPUT:
+           the mixed radial, azimuthal derivative
+        HISTORY:
+           2017-09-18 - Written - agent
+        """
+        return self._A*math.exp(-(t-self._to)**2./2./self._sigma2)\
+            /R*self._m*math.cos(self._alpha*math.log(R)
+                                -self._m*(phi-self._omegas*t-self._gamma))
+
     def OmegaP(self):
         """
         NAME:
@@ -632,7 +632,7 @@ class TriaxialHernquistPotential(TwoPowerTriaxialPotential):
                      and not isinstance(normalize,bool)):
             self.normalize(normalize)
         self.hasC= not self._glorder is None
-        self.hasC_dxdv= False
+        self.hasC_dxdv= self.hasC
         if not self._aligned or numpy.fabs(self._b-1.) > 10.**-10.:
             self.isNonAxi= True
         return None
@@ -719,7 +719,7 @@ class TriaxialJaffePotential(TwoPowerTriaxialPotential):
                      and not isinstance(normalize,bool)): #pragma: no cover
             self.normalize(normalize)
         self.hasC= not self._glorder is None
-        self.hasC_dxdv= False
+        self.hasC_dxdv= self.hasC
         if not self._aligned or numpy.fabs(self._b-1.) > 10.**-10.:
             self.isNonAxi= True
         return None
@@ -833,7 +833,7 @@ class TriaxialNFWPotential(TwoPowerTriaxialPotential):
             self._amp= dum._amp
         self._scale= self.a
         self.hasC= not self._glorder is None
-        self.hasC_dxdv= False
+        self.hasC_dxdv= self.hasC
         if not self._aligned or numpy.fabs(self._b-1.) > 10.**-10.:
             self.isNonAxi= True
         return None
@@ -2,6 +2,10 @@ import os
 import sys
 import sysconfig
 import copy
+import glob
+import types
+import hashlib
+import tempfile
 import ctypes
 import ctypes.util
 import warnings
@@ -9,10 +13,21 @@ from functools import wraps
 import numpy
 from numpy.ctypeslib import ndpointer
 from scipy import interpolate
-from galpy.util import multi, galpyWarning
+from galpy.util import multi, galpyWarning, config
 from galpy.potential_src.Potential import Potential
 from galpy.util.bovy_conversion import physical_conversion
+from galpy import __version__ as _galpy_version
 _DEBUG= False
+# On-disk grid cache: bump _CACHE_VERSION whenever the content or meaning of
+# the cached grids changes, such that old cache files are never reused
+_CACHE_VERSION= 1
+_CACHE_PREFIX= 'interpRZPotential_v%i_' % _CACHE_VERSION
+_CACHE_MAXSIZE= 500 # MB
+# Grids (and C spline coefficients) that are stored in the cache
+_CACHE_GRIDS= ['potGrid','rforceGrid','zforceGrid','densGrid',
+               'vcircGrid','dvcircdrGrid','epifreqGrid','verticalfreqGrid',
+               'potGrid_splinecoeffs','rforceGrid_splinecoeffs',
+               'zforceGrid_splinecoeffs']
 #Find and load the library
 _lib= None
 outerr= None
@@ -40,6 +55,7 @@ if _lib is None: #pragma: no cover
     ext_loaded= False
 else:
     ext_loaded= True
+    config._register_openmp_lib(_lib)
 
 def scalarVectorDecorator(func):
     """Decorator to return scalar outputs as a set"""
@@ -98,6 +114,159 @@ def scalarDecorator(func):
             return result
     return scalar_wrapper
 
+def _fingerprint_update(h,obj,seen=None):
+    """Update the hash h with a representation of obj; returns False if obj cannot be fingerprinted"""
+    if seen is None: seen= set()
+    if isinstance(obj,(list,tuple,dict,numpy.ndarray)) \
+            or hasattr(obj,'__dict__'):
+        if id(obj) in seen: # cyclic reference
+            h.update(b'seen')
+            return True
+        seen= seen | set([id(obj)])
+    if isinstance(obj,list) or isinstance(obj,tuple):
+        h.update(('%s%i' % (type(obj).__name__,len(obj))).encode('utf-8'))
+        return all([_fingerprint_update(h,o,seen) for o in obj])
+    elif isinstance(obj,dict):
+        h.update(('dict%i' % len(obj)).encode('utf-8'))
+        for key in sorted(obj.keys(),key=str):
+            # Skip caches of intermediate results, these do not change the potential
+            if isinstance(key,str) and '_cache' in key: continue
+            h.update(str(key).encode('utf-8'))
+            if not _fingerprint_update(h,obj[key],seen): return False
+        return True
+    elif obj is None or isinstance(obj,(bool,int,float,complex,str)):
+        h.update(('%s%r' % (type(obj).__name__,obj)).encode('utf-8'))
+        return True
+    elif isinstance(obj,numpy.ndarray) or isinstance(obj,numpy.generic):
+        obj= numpy.asarray(obj)
+        if obj.dtype == object:
+            return _fingerprint_update(h,obj.tolist(),seen)
+        h.update(('ndarray%s%s' % (obj.dtype.str,obj.shape)).encode('utf-8'))
+        h.update(numpy.ascontiguousarray(obj).tobytes())
+        return True
+    elif isinstance(obj,(types.ModuleType,types.BuiltinFunctionType,
+                         numpy.ufunc)):
+        h.update(('%s%s' % (type(obj).__name__,obj.__name__)).encode('utf-8'))
+        return True
+    elif isinstance(obj,types.MethodType):
+        h.update(b'method')
+        return _fingerprint_update(h,[obj.__func__,obj.__self__],seen)
+    elif isinstance(obj,types.FunctionType):
+        # User-supplied functions (e.g., for DiskSCFPotential): use their code
+        h.update(('function%s.%s' % (obj.__module__,obj.__name__)).encode('utf-8'))
+        h.update(obj.__code__.co_code)
+        if not _fingerprint_update(h,[c for c in obj.__code__.co_consts
+                                      if not isinstance(c,types.CodeType)],
+                                   seen):
+            return False
+        if not _fingerprint_update(h,obj.__defaults__,seen): return False
+        if obj.__closure__ is None: return True
+        return _fingerprint_update(h,[c.cell_contents for c in obj.__closure__],
+                                   seen)
+    elif hasattr(obj,'__dict__'):
+        h.update(('%s.%s' % (type(obj).__module__,type(obj).__name__))\
+                     .encode('utf-8'))
+        return _fingerprint_update(h,obj.__dict__,seen)
+    else:
+        return False
+
+def _cache_fingerprint(RZPot,rgrid,zgrid,logR):
+    """Fingerprint of the potential and the grid specification, None if the potential cannot be fingerprinted"""
+    h= hashlib.sha1()
+    h.update(('%s%i' % (_galpy_version,_CACHE_VERSION)).encode('utf-8'))
+    if not _fingerprint_update(h,[RZPot,[float(x) for x in rgrid[:2]],
+                                  int(rgrid[2]),
+                                  [float(x) for x in zgrid[:2]],int(zgrid[2]),
+                                  bool(logR)]):
+        return None
+    return h.hexdigest()
+
+def _cache_load(cachefile,fingerprint):
+    """Load the grids stored in cachefile, returns an empty dictionary if there is no (valid) cache"""
+    if not os.path.exists(cachefile): return {}
+    try:
+        with numpy.load(cachefile) as cached:
+            if str(cached['fingerprint']) != fingerprint \
+                    or int(cached['version']) != _CACHE_VERSION:
+                raise ValueError('Stale interpRZPotential cache file')
+            out= dict([(key,cached[key]) for key in _CACHE_GRIDS
+                       if key in cached.files])
+    except Exception:
+        warnings.warn("Ignoring and removing corrupted or stale interpRZPotential cache file %s" % cachefile,galpyWarning)
+        try:
+            os.remove(cachefile)
+        except OSError: #pragma: no cover
+            pass
+        return {}
+    # Mark as recently used for the least-recently-used eviction
+    try:
+        os.utime(cachefile,None)
+    except OSError: #pragma: no cover
+        pass
+    return out
+
+def _cache_save(cachedir,cachefile,fingerprint,grids,maxsize):
+    """Atomically write the grids to cachefile and evict old cache files"""
+    if not os.path.exists(cachedir):
+        os.makedirs(cachedir)
+    fd, tmpname= tempfile.mkstemp(suffix='.npz',dir=cachedir)
+    try:
+        with os.fdopen(fd,'wb') as tmpfile:
+            numpy.savez_compressed(tmpfile,fingerprint=fingerprint,
+                                   version=_CACHE_VERSION,**grids)
+        if hasattr(os,'replace'):
+            os.replace(tmpname,cachefile)
+        else: #pragma: no cover
+            if os.path.exists(cachefile): os.remove(cachefile)
+            os.rename(tmpname,cachefile)
+    except Exception: #pragma: no cover
+        if os.path.exists(tmpname): os.remove(tmpname)
+        raise
+    _cache_evict(cachedir,maxsize,keep=cachefile)
+    return None
+
+def _cache_evict(cachedir,maxsize,keep=None):
+    """Remove cache files written by other cache versions and the least-recently used files until the cache is smaller than maxsize MB"""
+    for filename in glob.glob(os.path.join(cachedir,'interpRZPotential_v*.npz')):
+        if not os.path.basename(filename).startswith(_CACHE_PREFIX):
+            os.remove(filename)
+    cachefiles= sorted(glob.glob(os.path.join(cachedir,_CACHE_PREFIX+'*.npz')),
+                       key=os.path.getmtime)
+    totsize= sum([os.path.getsize(filename) for filename in cachefiles])
+    for filename in cachefiles:
+        if totsize <= maxsize*1024.**2.: break
+        if filename == keep: continue
+        totsize-= os.path.getsize(filename)
+        os.remove(filename)
+    return None
+
+def clear_interpRZ_cache(cachedir):
+    """
+    NAME:
+
+       clear_interpRZ_cache
+
+    PURPOSE:
+
+       remove all interpRZPotential grids stored in an on-disk cache directory
+
+    INPUT:
+
+       cachedir - directory that was given as cachedir= to interpRZPotential
+
+    OUTPUT:
+
+       (none)
+
+    HISTORY:
+
+       2017-09-28 - Written - agent
+
+    """
+    for filename in glob.glob(os.path.join(cachedir,'interpRZPotential_v*.npz')):
+        os.remove(filename)
+    return None
+
 class interpRZPotential(Potential):
     """Class that interpolates a given potential on a grid for fast orbit integration"""
     def __init__(self,
@@ -110,7 +279,7 @@ class interpRZPotential(Potential):
                  interpepifreq=False,interpverticalfreq=False,
                  ro=None,vo=None,
                  use_c=False,enable_c=False,zsym=True,
-                 numcores=None):
+                 numcores=None,cachedir=None,cachemaxsize=_CACHE_MAXSIZE):
         """
         NAME:
 
@@ -142,6 +311,10 @@ class interpRZPotential(Potential):
 
            ro=, vo= distance and velocity scales for translation into internal units (default from configuration file)
 
+           cachedir= (None) if set to a directory, store the computed grids (and C spline coefficients) in a compressed file in this directory, keyed by a fingerprint of the potential's parameters and of the grid specification, and reload them from there when setting up the same interpolation again
+
+           cachemaxsize= (500) maximum size of the cache directory in MB; the least-recently used grids are removed when it is exceeded
+
         OUTPUT:
 
            instance
@@ -152,6 +325,8 @@ class interpRZPotential(Potential):
 
            2013-01-24 - Started with new implementation - Bovy (IAS)
 
+           2017-09-28 - Added on-disk grid cache - agent
+
         """
         if isinstance(RZPot,interpRZPotential):
             from galpy.potential import PotentialError
@@ -194,9 +369,23 @@ class interpRZPotential(Potential):
         self._interpverticalfreq= interpverticalfreq
         self._enable_c= enable_c*ext_loaded
         self.hasC= self._enable_c
+        self.hasC_dxdv= self._enable_c
         self._zsym= zsym
+        # Load previously computed grids from the on-disk cache
+        cached= {}
+        if not cachedir is None:
+            fingerprint= _cache_fingerprint(RZPot,rgrid,zgrid,logR)
+            if fingerprint is None: #pragma: no cover
+                warnings.warn("Potential cannot be fingerprinted, not using the interpRZPotential cache",galpyWarning)
+                cachedir= None
+            else:
+                cachefile= os.path.join(cachedir,
+                                        _CACHE_PREFIX+fingerprint+'.npz')
+                cached= _cache_load(cachefile,fingerprint)
         if interpPot:
-            if use_c*ext_loaded:
+            if 'potGrid' in cached:
+                self._potGrid= cached['potGrid']
+            elif use_c*ext_loaded:
                 self._potGrid, err= calc_potential_c(self._origPot,self._rgrid,self._zgrid)
             else:
                 from galpy.potential import evaluatePotentials
@@ -215,10 +404,14 @@ class interpRZPotential(Potential):
                                                                  self._zgrid,
                                                                  self._potGrid,
                                                                  kx=3,ky=3,s=0.)
-            if enable_c*ext_loaded:
+            if enable_c*ext_loaded and 'potGrid_splinecoeffs' in cached:
+                self._potGrid_splinecoeffs= cached['potGrid_splinecoeffs']
+            elif enable_c*ext_loaded:
                 self._potGrid_splinecoeffs= calc_2dsplinecoeffs_c(self._potGrid)
         if interpRforce:
-            if use_c*ext_loaded:
+            if 'rforceGrid' in cached:
+                self._rforceGrid= cached['rforceGrid']
+            elif use_c*ext_loaded:
                 self._rforceGrid, err= calc_potential_c(self._origPot,self._rgrid,self._zgrid,rforce=True)
             else:
                 from galpy.potential import evaluateRforces
@@ -237,10 +430,14 @@ class interpRZPotential(Potential):
                                                                     self._zgrid,
                                                                     self._rforceGrid,
                                                                     kx=3,ky=3,s=0.)
-            if enable_c*ext_loaded:
+            if enable_c*ext_loaded and 'rforceGrid_splinecoeffs' in cached:
+                self._rforceGrid_splinecoeffs= cached['rforceGrid_splinecoeffs']
+            elif enable_c*ext_loaded:
                 self._rforceGrid_splinecoeffs= calc_2dsplinecoeffs_c(self._rforceGrid)
         if interpzforce:
-            if use_c*ext_loaded:
+            if 'zforceGrid' in cached:
+                self._zforceGrid= cached['zforceGrid']
+            elif use_c*ext_loaded:
                 self._zforceGrid, err= calc_potential_c(self._origPot,self._rgrid,self._zgrid,zforce=True)
             else:
                 from galpy.potential import evaluatezforces
@@ -259,15 +456,20 @@ class interpRZPotential(Potential):
                                                                     self._zgrid,
                                                                     self._zforceGrid,
                                                                     kx=3,ky=3,s=0.)
-            if enable_c*ext_loaded:
+            if enable_c*ext_loaded and 'zforceGrid_splinecoeffs' in cached:
+                self._zforceGrid_splinecoeffs= cached['zforceGrid_splinecoeffs']
+            elif enable_c*ext_loaded:
                 self._zforceGrid_splinecoeffs= calc_2dsplinecoeffs_c(self._zforceGrid)
         if interpDens:
-            from galpy.potential import evaluateDensities
-            densGrid= numpy.zeros((len(self._rgrid),len(self._zgrid)))
-            for ii in range(len(self._rgrid)):
-                for jj in range(len(self._zgrid)):
-                    densGrid[ii,jj]= evaluateDensities(self._origPot,self._rgrid[ii],self._zgrid[jj])
-            self._densGrid= densGrid
+            if 'densGrid' in cached:
+                self._densGrid= cached['densGrid']
+            else:
+                from galpy.potential import evaluateDensities
+                densGrid= numpy.zeros((len(self._rgrid),len(self._zgrid)))
+                for ii in range(len(self._rgrid)):
+                    for jj in range(len(self._zgrid)):
+                        densGrid[ii,jj]= evaluateDensities(self._origPot,self._rgrid[ii],self._zgrid[jj])
+                self._densGrid= densGrid
             if self._logR:
                 self._densInterp= interpolate.RectBivariateSpline(self._logrgrid,
                                                                   self._zgrid,
@@ -280,7 +482,9 @@ class interpRZPotential(Potential):
                                                                   kx=3,ky=3,s=0.)
         if interpvcirc:
             from galpy.potential import vcirc
-            if not numcores is None:
+            if 'vcircGrid' in cached:
+                self._vcircGrid= cached['vcircGrid']
+            elif not numcores is None:
                 self._vcircGrid= multi.parallel_map((lambda x: vcirc(self._origPot,self._rgrid[x])),
                                                     list(range(len(self._rgrid))),numcores=numcores)
             else:
@@ -291,7 +495,9 @@ class interpRZPotential(Potential):
                 self._vcircInterp= interpolate.InterpolatedUnivariateSpline(self._rgrid,self._vcircGrid,k=3)
         if interpdvcircdr:
             from galpy.potential import dvcircdR
-            if not numcores is None:
+            if 'dvcircdrGrid' in cached:
+                self._dvcircdrGrid= cached['dvcircdrGrid']
+            elif not numcores is None:
                 self._dvcircdrGrid= multi.parallel_map((lambda x: dvcircdR(self._origPot,self._rgrid[x])),
                                                        list(range(len(self._rgrid))),numcores=numcores)
             else:
@@ -302,7 +508,9 @@ class interpRZPotential(Potential):
                 self._dvcircdrInterp= interpolate.InterpolatedUnivariateSpline(self._rgrid,self._dvcircdrGrid,k=3)
         if interpepifreq:
             from galpy.potential import epifreq
-            if not numcores is None:
+            if 'epifreqGrid' in cached:
+                self._epifreqGrid= cached['epifreqGrid']
+            elif not numcores is None:
                 self._epifreqGrid= numpy.array(multi.parallel_map((lambda x: epifreq(self._origPot,self._rgrid[x])),
                                                       list(range(len(self._rgrid))),numcores=numcores))
             else:
@@ -320,7 +528,9 @@ class interpRZPotential(Potential):
                     self._epifreqInterp= interpolate.InterpolatedUnivariateSpline(self._rgrid[indx],self._epifreqGrid[indx],k=3)
         if interpverticalfreq:
             from galpy.potential import verticalfreq
-            if not numcores is None:
+            if 'verticalfreqGrid' in cached:
+                self._verticalfreqGrid= cached['verticalfreqGrid']
+            elif not numcores is None:
                 self._verticalfreqGrid= multi.parallel_map((lambda x: verticalfreq(self._origPot,self._rgrid[x])),
                                                        list(range(len(self._rgrid))),numcores=numcores)
             else:
@@ -329,6 +539,15 @@ class interpRZPotential(Potential):
                 self._verticalfreqInterp= interpolate.InterpolatedUnivariateSpline(self._logrgrid,self._verticalfreqGrid,k=3)
             else:
                 self._verticalfreqInterp= interpolate.InterpolatedUnivariateSpline(self._rgrid,self._verticalfreqGrid,k=3)
+        # Store newly computed grids in the on-disk cache, together with
+        # those that were already cached
+        if not cachedir is None:
+            grids= dict([(key,numpy.asarray(getattr(self,'_'+key)))
+                         for key in _CACHE_GRIDS if hasattr(self,'_'+key)])
+            for key in cached:
+                if not key in grids: grids[key]= cached[key]
+            if sorted(grids.keys()) != sorted(cached.keys()):
+                _cache_save(cachedir,cachefile,fingerprint,grids,cachemaxsize)
         return None
                                                  
     @scalarVectorDecorator
@@ -405,6 +624,10 @@ class interpRZPotential(Potential):
         else:
             return evaluatezforces(self._origPot,R,z)
     
+    def _R2deriv(self,R,z,phi=0.,t=0.):
+        from galpy.potential import evaluateR2derivs
+        return evaluateR2derivs(self._origPot,R,z)
+
     def _Rzderiv(self,R,z,phi=0.,t=0.):
         from galpy.potential import evaluateRzderivs
         return evaluateRzderivs(self._origPot,R,z)
@@ -718,6 +941,82 @@ def eval_force_c(pot,R,z,zforce=False):
 
     return (out,err.value)
 
+# Quantities that can be evaluated with eval_batch_c, in the order of the C code
+_BATCH_QUANTITIES= ['potential','Rforce','zforce','phiforce','R2deriv',
+                    'z2deriv','Rzderiv','phi2deriv','Rphideriv','dens']
+
+def eval_batch_c(pot,R,z,phi,t,quantities):
+    """
+    NAME:
+       eval_batch_c
+    PURPOSE:
+       Use C to evaluate the potential, forces, second derivatives, and density at many points at once (parallelized with OpenMP)
+    INPUT:
+       pot - Potential or list of such instances
+       R - array
+       z - array
+       phi - array
+       t - array
+       quantities - list of quantities to evaluate (see _BATCH_QUANTITIES)
+    OUTPUT:
+       (array [len(quantities),len(R)],error)
+    HISTORY:
+       2017-09-25 - Written - agent
+    """
+    from galpy.orbit_src.integrateFullOrbit import _parse_pot #here bc otherwise there is an infinite loop
+    #Parse the potential, separately for the potential and the forces
+    npot, pot_type, pot_args= _parse_pot(pot)
+    npot_pot, pot_type_pot, pot_args_pot= _parse_pot(pot,potforactions=True)
+    quant= numpy.array([_BATCH_QUANTITIES.index(q) for q in quantities],
+                       dtype=numpy.int32)
+
+    #Set up result arrays
+    out= numpy.empty((len(quant),len(R)))
+    err= ctypes.c_int(0)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    interppotential_eval_batchFunc= _lib.eval_batch
+    interppotential_eval_batchFunc.argtypes= [ctypes.c_int,
+                                              ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                                              ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                                              ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                                              ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                                              ctypes.c_int,
+                                              ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+                                              ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                                              ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+                                              ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                                              ctypes.c_int,
+                                              ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+                                              ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                                              ctypes.POINTER(ctypes.c_int)]
+
+    #Array requirements
+    R= numpy.require(R,dtype=numpy.float64,requirements=['C','W'])
+    z= numpy.require(z,dtype=numpy.float64,requirements=['C','W'])
+    phi= numpy.require(phi,dtype=numpy.float64,requirements=['C','W'])
+    t= numpy.require(t,dtype=numpy.float64,requirements=['C','W'])
+    out= numpy.require(out,dtype=numpy.float64,requirements=['C','W'])
+
+    #Run the C code
+    interppotential_eval_batchFunc(len(R),
+                                   R,
+                                   z,
+                                   phi,
+                                   t,
+                                   ctypes.c_int(npot),
+                                   pot_type_pot,
+                                   pot_args_pot,
+                                   pot_type,
+                                   pot_args,
+                                   ctypes.c_int(len(quant)),
+                                   quant,
+                                   out,
+                                   ctypes.byref(err))
+
+    return (out,err.value)
+
 def sign(x):
     out= numpy.ones_like(x)
     out[(x < 0.)]= -1.
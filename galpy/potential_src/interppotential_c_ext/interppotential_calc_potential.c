@@ -8,6 +8,7 @@
 #ifdef _OPENMP
 #include <omp.h>
 #endif
+#include <bovy_openmp.h>
 #define CHUNKSIZE 1
 //Potentials
 #include <galpy_potentials.h>
@@ -38,8 +39,8 @@ void calc_potential(int nR,
   struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
   parse_actionAngleArgs(npot,potentialArgs,pot_type,pot_args,false);
   //Run through the grid and calculate
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk) private(ii,tid,jj)	\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii,tid,jj)	\
   shared(row,npot,potentialArgs,R,z,nR,nz)
   for (ii=0; ii < nR; ii++){
 #ifdef _OPENMP
@@ -76,8 +77,8 @@ void calc_rforce(int nR,
   struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
   parse_leapFuncArgs_Full(npot,potentialArgs,pot_type,pot_args);
   //Run through the grid and calculate
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk) private(ii,tid,jj)	\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii,tid,jj)	\
   shared(row,npot,potentialArgs,R,z,nR,nz)
   for (ii=0; ii < nR; ii++){
 #ifdef _OPENMP
@@ -114,8 +115,8 @@ void calc_zforce(int nR,
   struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
   parse_leapFuncArgs_Full(npot,potentialArgs,pot_type,pot_args);
   //Run through the grid and calculate
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk) private(ii,tid,jj)	\
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,CHUNKSIZE);
+#pragma omp parallel for schedule(runtime) private(ii,tid,jj)	\
   shared(row,npot,potentialArgs,R,z,nR,nz)
   for (ii=0; ii < nR; ii++){
 #ifdef _OPENMP
@@ -189,3 +190,173 @@ void eval_zforce(int nR,
   free_potentialArgs(npot,potentialArgs);
   free(potentialArgs);
 }
+/*
+  Batch evaluation of the potential, forces, second derivatives, and
+  density at a set of (R,z,phi,t), with second derivatives computed
+  using five-point central finite differences of the forces and the
+  density computed from these using the Poisson equation
+*/
+#define EVAL_FD_STEP 1e-4
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+static inline double eval_fd_deriv(double (*force)(double,double,double,double,
+						   int,struct potentialArg *),
+				   int coord,double R,double z,double phi,
+				   double t,double h,
+				   int npot,struct potentialArg * potentialArgs){
+  // -d force / d coord, coord= 0: R, 1: z, 2: phi
+  int kk;
+  double x[3], out= 0.;
+  double steps[4]= {2.,1.,-1.,-2.};
+  double weights[4]= {-1.,8.,-8.,1.};
+  for (kk=0; kk < 4; kk++) {
+    x[0]= R;
+    x[1]= z;
+    x[2]= phi;
+    x[coord]+= steps[kk] * h;
+    out+= weights[kk] * force(x[0],x[1],x[2],t,npot,potentialArgs);
+  }
+  return -out / 12. / h;
+}
+static inline double eval_fd_R2deriv_R0(double z,double phi,double t,double h,
+					int npot,
+					struct potentialArg * potentialArgs){
+  // -d Rforce / d R at R=0 in the direction phi, using that the radial
+  // force at -R in the direction phi is minus that at R in the direction
+  // phi+pi, such that the stencil does not evaluate the force at R=0
+  return - ( - calcRforce(2.*h,z,phi,t,npot,potentialArgs)
+	     + 8. * calcRforce(h,z,phi,t,npot,potentialArgs)
+	     + 8. * calcRforce(h,z,phi+M_PI,t,npot,potentialArgs)
+	     - calcRforce(2.*h,z,phi+M_PI,t,npot,potentialArgs) ) / 12. / h;
+}
+void eval_batch(int n,
+		double *R,
+		double *z,
+		double *phi,
+		double *t,
+		int npot,
+		int * pot_type_pot,
+		double * pot_args_pot,
+		int * pot_type,
+		double * pot_args,
+		int nquant,
+		int * quant,
+		double *out,
+		int * err){
+  int ii, jj, tid, max_threads;
+  bool need_pot= false, need_forces= false;
+  double tR, tz, tphi, tt, r, h, hR;
+  struct potentialArg * thesePotentialArgs, * thesePotentialArgsPot;
+  for (jj=0; jj < nquant; jj++) {
+    if ( *(quant+jj) == 0 ) need_pot= true;
+    else need_forces= true;
+  }
+#ifdef _OPENMP
+  max_threads= ( n < omp_get_max_threads() ) ? n : omp_get_max_threads();
+  if ( max_threads < 1 ) max_threads= 1;
+#else
+  max_threads= 1;
+#endif
+  // potentialArgs may cache intermediate results, so one copy / thread
+  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+  struct potentialArg * potentialArgsPot= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+  for (ii=0; ii < max_threads; ii++) {
+    if ( need_forces )
+      parse_leapFuncArgs_Full(npot,potentialArgs+ii*npot,pot_type,pot_args);
+    if ( need_pot )
+      parse_actionAngleArgs(npot,potentialArgsPot+ii*npot,
+			    pot_type_pot,pot_args_pot,false);
+  }
+  //Run through and evaluate
+  galpy_openmp_schedule(GALPY_SCHEDULE_STATIC,0);
+#pragma omp parallel for schedule(runtime) private(ii,jj,tid,tR,tz,tphi,tt,r,h,hR,thesePotentialArgs,thesePotentialArgsPot) num_threads(max_threads)
+  for (ii=0; ii < n; ii++){
+#ifdef _OPENMP
+    tid= omp_get_thread_num();
+#else
+    tid = 0;
+#endif
+    thesePotentialArgs= potentialArgs+tid*npot;
+    thesePotentialArgsPot= potentialArgsPot+tid*npot;
+    tR= *(R+ii);
+    tz= *(z+ii);
+    tphi= *(phi+ii);
+    tt= *(t+ii);
+    // Finite-difference step, relative to the spherical radius
+    r= sqrt ( tR * tR + tz * tz );
+    h= EVAL_FD_STEP * ( ( r > 1e-3 ) ? r : 1e-3 );
+    hR= ( h < 0.25 * tR ) ? h : 0.25 * tR;
+    for (jj=0; jj < nquant; jj++) {
+      switch ( *(quant+jj) ) {
+      case 0: //potential
+	*(out+jj*n+ii)= calcPotential(tR,tz,tphi,tt,npot,thesePotentialArgsPot);
+	break;
+      case 1: //Rforce
+	*(out+jj*n+ii)= calcRforce(tR,tz,tphi,tt,npot,thesePotentialArgs);
+	break;
+      case 2: //zforce
+	*(out+jj*n+ii)= calczforce(tR,tz,tphi,tt,npot,thesePotentialArgs);
+	break;
+      case 3: //phiforce
+	*(out+jj*n+ii)= calcPhiforce(tR,tz,tphi,tt,npot,thesePotentialArgs);
+	break;
+      case 4: //R2deriv
+	if ( tR == 0. )
+	  *(out+jj*n+ii)= eval_fd_R2deriv_R0(tz,tphi,tt,h,npot,
+					     thesePotentialArgs);
+	else
+	  *(out+jj*n+ii)= eval_fd_deriv(&calcRforce,0,tR,tz,tphi,tt,hR,
+					npot,thesePotentialArgs);
+	break;
+      case 5: //z2deriv
+	*(out+jj*n+ii)= eval_fd_deriv(&calczforce,1,tR,tz,tphi,tt,h,
+				      npot,thesePotentialArgs);
+	break;
+      case 6: //Rzderiv
+	*(out+jj*n+ii)= eval_fd_deriv(&calcRforce,1,tR,tz,tphi,tt,h,
+				      npot,thesePotentialArgs);
+	break;
+      case 7: //phi2deriv
+	*(out+jj*n+ii)= eval_fd_deriv(&calcPhiforce,2,tR,tz,tphi,tt,
+				      EVAL_FD_STEP,npot,thesePotentialArgs);
+	break;
+      case 8: //Rphideriv
+	*(out+jj*n+ii)= eval_fd_deriv(&calcRforce,2,tR,tz,tphi,tt,
+				      EVAL_FD_STEP,npot,thesePotentialArgs);
+	break;
+      case 9: //density, from the Poisson equation
+	if ( tR == 0. ) {
+	  // Limit R --> 0: the R and phi terms become the second derivatives
+	  // in the directions phi and phi+pi/2
+	  *(out+jj*n+ii)= ( eval_fd_R2deriv_R0(tz,tphi,tt,h,npot,
+					       thesePotentialArgs)
+			    + eval_fd_R2deriv_R0(tz,tphi+0.5*M_PI,tt,h,npot,
+						 thesePotentialArgs)
+			    + eval_fd_deriv(&calczforce,1,tR,tz,tphi,tt,h,
+					    npot,thesePotentialArgs) )
+	    / 4. / M_PI;
+	  break;
+	}
+	*(out+jj*n+ii)= ( eval_fd_deriv(&calcRforce,0,tR,tz,tphi,tt,hR,
+					npot,thesePotentialArgs)
+			  - calcRforce(tR,tz,tphi,tt,npot,thesePotentialArgs)/tR
+			  + eval_fd_deriv(&calcPhiforce,2,tR,tz,tphi,tt,
+					  EVAL_FD_STEP,npot,thesePotentialArgs)
+			  /tR/tR
+			  + eval_fd_deriv(&calczforce,1,tR,tz,tphi,tt,h,
+					  npot,thesePotentialArgs) )
+	  / 4. / M_PI;
+	break;
+      }
+    }
+  }
+  for (ii=0; ii < max_threads; ii++) {
+    if ( need_forces )
+      free_potentialArgs(npot,potentialArgs+ii*npot);
+    if ( need_pot )
+      free_potentialArgs(npot,potentialArgsPot+ii*npot);
+  }
+  free(potentialArgs);
+  free(potentialArgsPot);
+}
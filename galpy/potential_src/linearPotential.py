@@ -20,6 +20,7 @@ class linearPotential(object):
         self.dim= 1
         self.isRZ= False
         self.hasC= False
+        self.hasC_dxdv= False
         # Parse ro and vo
         if ro is None:
             self._ro= config.__config__.getfloat('normalization','ro')
@@ -15,6 +15,30 @@ double dehnenBarSmooth(double t,double tform, double tsteady){
     smooth= 1.;
   return smooth;
 }
+double DehnenBarPotentialEval(double R,double z,double phi,double t,
+			      struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //declare
+  double smooth;
+  double r2, r;
+  //Get args
+  double amp= *args++;
+  double tform= *args++;
+  double tsteady= *args++;
+  double rb= *args++;
+  double omegab= *args++;
+  double barphi= *args++;
+  //Calculate potential
+  smooth= dehnenBarSmooth(t,tform,tsteady);
+  r2= R * R + z * z;
+  r= sqrt( r2 );
+  if (r <= rb )
+    return amp*smooth*cos(2.*(phi-omegab*t-barphi))*\
+      (pow(r/rb,3.)-2.)*R*R/r2;
+  else
+    return -amp*smooth*cos(2.*(phi-omegab*t-barphi))\
+      *pow(rb/r,3.)*R*R/r2;
+}
 double DehnenBarPotentialRforce(double R,double z,double phi,double t,
 				struct potentialArg * potentialArgs){
   double * args= potentialArgs->args;
@@ -74,7 +98,7 @@ double DehnenBarPotentialphiforce(double R,double z,double phi,double t,
   smooth= dehnenBarSmooth(t,tform,tsteady);
   r2= R * R + z * z;
   r= sqrt( r2 );
-  if ( R <= rb )
+  if ( r <= rb )
     return 2.*amp*smooth*sin(2.*(phi-omegab*t-barphi))*(pow(r/rb,3.)-2.)\
       *R*R/r2;
   else
@@ -19,11 +19,11 @@ double DehnenSmoothWrapperPotentialEval(double R,double z,double phi,
 					double t,
 					struct potentialArg * potentialArgs){
   double * args= potentialArgs->args;
-  //Calculate potential, only used in actionAngle, so phi=0, t=0
+  //Calculate potential
   return *args * dehnenSmooth(t,*(args+1),*(args+2))	\
-    * evaluatePotentials(R,z,
-			 potentialArgs->nwrapped,
-			 potentialArgs->wrappedPotentialArg);
+    * calcPotential(R,z,phi,t,
+		    potentialArgs->nwrapped,
+		    potentialArgs->wrappedPotentialArg);
 }
 double DehnenSmoothWrapperPotentialRforce(double R,double z,double phi,
 					  double t,
@@ -54,8 +54,6 @@ double dSigmadR(double R,double * Sigma_args){
   }
   return -1; // LCOV_EXCL_LINE
 }
-//LCOV_EXCL_START
-// Not currently used, bc only in 2nd derivatives
 double d2SigmadR2(double R,double * Sigma_args){
   int Sigma_type= (int) *Sigma_args;
   switch ( Sigma_type ) {
@@ -70,6 +68,8 @@ double d2SigmadR2(double R,double * Sigma_args){
   }
   return -1; // LCOV_EXCL_LINE
 }
+//LCOV_EXCL_START
+// Not currently used, bc only in 2nd derivatives
 double hz(double z,double * hz_args){
   int hz_type= (int) *hz_args;
   double fz;
@@ -145,6 +145,18 @@ double DiskSCFPotentialPlanarRforce(double R,double phi,
   //Calculate Rforce
   return -dSigmadR(R,Sigma_args) * Hz(0.,hz_args);
 }
+double DiskSCFPotentialPlanarR2deriv(double R,double phi,
+				     double t,
+				     struct potentialArg * potentialArgs){
+  //Supposed to be zero (bc H(0) supposed to be zero), but just to make sure
+  double * args= potentialArgs->args;
+  //Get args
+  int nsigma_args= (int) *args;
+  double * Sigma_args= args+1;
+  double * hz_args= args+1+nsigma_args;
+  //Calculate R2deriv
+  return d2SigmadR2(R,Sigma_args) * Hz(0.,hz_args);
+}
 double DiskSCFPotentialzforce(double R,double Z, double phi,
 			      double t,
 			      struct potentialArg * potentialArgs){
@@ -130,6 +130,48 @@ double DoubleExponentialDiskPotentialPlanarRforce(double R,double phi,
   }
   return - amp * 2 * M_PI * alpha * out;
 }
+double DoubleExponentialDiskPotentialPlanarR2deriv(double R,double phi,
+						   double t,
+						   struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  double amp, alpha;
+  int nzeros, glorder;
+  if ( R > 6. ) { //Approximate as Keplerian
+    nzeros= (int) *(args+4);
+    glorder= (int) *(args+5);
+    amp= *(args + 6 + 2 * glorder + 4 * (nzeros + 1));
+    alpha= *(args + 7 + 2 * glorder + 4 * (nzeros + 1));
+    return *args * amp * (1. - alpha) * pow(R,-alpha);
+  }
+  //Get args
+  amp= *args++;
+  alpha= *args++;
+  double beta= *args++;
+  double kmaxFac= *args++;
+  double kmax= 2. * kmaxFac * beta;
+  nzeros= (int) *args++;
+  glorder= (int) *args++;
+  double * glx= args;
+  double * glw= args + glorder;
+  double * j1zeros= args + 2 * glorder + 2 * (nzeros + 1);
+  double * dj1zeros= args + 2 * glorder + 3 * (nzeros + 1);
+  //Calculate R2deriv, using J1'(x) = J0(x) - J1(x)/x on the J1 zeros grid
+  double out= 0.;
+  double k;
+  int ii, jj;
+  if ( R < 1. ) kmax= kmax/R;
+  for (ii=0; ii < ( nzeros + 1 ); ii++) {
+    for (jj=0; jj < glorder; jj++) {
+      k= 0.5 * ( *(glx+jj) + 1. ) * *(dj1zeros+ii+1) + *(j1zeros+ii);
+      out+= *(glw+jj) * *(dj1zeros+ii+1) * k * k 
+	* ( gsl_sf_bessel_J0(k*R) - gsl_sf_bessel_J1(k*R) / k / R )
+	* pow(alpha * alpha + k * k,-1.5) 
+	/ (beta + k);
+    }
+    if ( k > kmax ) break;
+  }
+  return amp * 2 * M_PI * alpha * out;
+}
 double DoubleExponentialDiskPotentialzforce(double R,double z,double phi,
 					    double t,
 					    struct potentialArg * potentialArgs){
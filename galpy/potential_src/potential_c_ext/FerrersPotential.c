@@ -0,0 +1,215 @@
+#include <math.h>
+#include <gsl/gsl_poly.h>
+#include <galpy_potentials.h>
+//FerrersPotential
+// The integrals over tau from lambda to infinity are computed using
+// Gauss-Legendre quadrature after substituting
+// tau = lambda + ( lambda + c2 ) * ( 1 / u^2 - 1 ), u = 1 - ( 1 - v )^2,
+// v in (0,1], which makes the integrands smooth at both ends
+static inline void ferrers_node(double glx, double glw,
+				double lambda, double scale,
+				double * tau, double * w){
+  // tau at the GL node and the weight times dtau/dv
+  double v= 0.5 * ( glx + 1. );
+  double u= 1. - ( 1. - v ) * ( 1. - v );
+  *tau= lambda + scale * ( 1. / u / u - 1. );
+  *w= 2. * glw * ( 1. - v ) * scale / u / u / u;
+}
+static inline double ferrers_lowerlim(double x2, double y2, double z2,
+				      double a2, double b2, double c2){
+  // Positive root of x2/(a2+t) + y2/(b2+t) + z2/(c2+t) = 1 (zero if inside)
+  double B, C, D;
+  double r0, r1, r2;
+  int nroots;
+  if ( x2 / a2 + y2 / b2 + z2 / c2 <= 1. )
+    return 0.;
+  B= a2 + b2 + c2 - x2 - y2 - z2;
+  C= a2 * b2 + a2 * c2 + b2 * c2 - a2 * y2 - a2 * z2 - b2 * x2
+    - b2 * z2 - c2 * x2 - c2 * y2;
+  D= a2 * b2 * c2 - a2 * b2 * z2 - a2 * c2 * y2 - b2 * c2 * x2;
+  nroots= gsl_poly_solve_cubic(B,C,D,&r0,&r1,&r2);
+  // roots are sorted in ascending order, the largest is the one we want
+  if ( nroots == 1 )
+    return ( r0 > 0. ) ? r0 : 0.;
+  return ( r2 > 0. ) ? r2 : 0.;
+}
+static inline double ferrers_B(double x2, double y2, double z2,
+			       double a2, double b2, double c2,
+			       double tau){
+  double B= 1. - x2 / ( a2 + tau ) - y2 / ( b2 + tau ) - z2 / ( c2 + tau );
+  return ( B > 0. ) ? B : 0.; // guard against round-off near lambda
+}
+void FerrersPotentialxyzforces_xyz(double x,double y, double z,
+				   double * Fx, double * Fy, double * Fz,
+				   double a2, double b2, double c2, double n,
+				   int glorder, double * glx, double * glw){
+  // Forces in the aligned frame, without the amplitude
+  int ii;
+  double x2= x * x;
+  double y2= y * y;
+  double z2= z * z;
+  double lambda= ferrers_lowerlim(x2,y2,z2,a2,b2,c2);
+  double scale= lambda + c2;
+  double tau, w, Bn;
+  *Fx= 0.;
+  *Fy= 0.;
+  *Fz= 0.;
+  for (ii=0; ii < glorder; ii++){
+    ferrers_node(*(glx+ii),*(glw+ii),lambda,scale,&tau,&w);
+    w/= sqrt ( ( a2 + tau ) * ( b2 + tau ) * ( c2 + tau ) );
+    Bn= pow ( ferrers_B(x2,y2,z2,a2,b2,c2,tau), n);
+    *Fx+= w * Bn / ( a2 + tau );
+    *Fy+= w * Bn / ( b2 + tau );
+    *Fz+= w * Bn / ( c2 + tau );
+  }
+  *Fx*= -2. * x;
+  *Fy*= -2. * y;
+  *Fz*= -2. * z;
+}
+double FerrersPotentialEval(double R,double z, double phi,
+			    double t,
+			    struct potentialArg * potentialArgs){
+  int ii;
+  double * args= potentialArgs->args;
+  //Get args: amp, a2, b2, c2, n, omegab, pa, glorder, glx, glw
+  double amp= *args++;
+  double a2= *args++;
+  double b2= *args++;
+  double c2= *args++;
+  double n= *args++;
+  double omegab= *args++;
+  double pa= *args++;
+  int glorder= (int) *args++;
+  double * glx= args;
+  double * glw= args + glorder;
+  double x,y,x2,y2,z2;
+  double lambda, scale, tau, w, out= 0.;
+  //Calculate potential in the aligned frame
+  cyl_to_rect(R,phi-pa-omegab*t,&x,&y);
+  x2= x * x;
+  y2= y * y;
+  z2= z * z;
+  lambda= ferrers_lowerlim(x2,y2,z2,a2,b2,c2);
+  scale= lambda + c2;
+  for (ii=0; ii < glorder; ii++){
+    ferrers_node(*(glx+ii),*(glw+ii),lambda,scale,&tau,&w);
+    out+= w * pow ( ferrers_B(x2,y2,z2,a2,b2,c2,tau), n + 1. )
+      / sqrt ( ( a2 + tau ) * ( b2 + tau ) * ( c2 + tau ) );
+  }
+  return -amp * out / ( n + 1. );
+}
+void FerrersPotentialxyzforces(double R,double z, double phi,
+			       double t,double * args,
+			       double a2,double b2, double c2, double n,
+			       double pa, double omegab,
+			       int glorder, double * glx, double * glw,
+			       double cached_R, double cached_z,
+			       double cached_phi,
+			       double cached_t){
+  double x,y;
+  double Fx, Fy, Fz;
+  double cp, sp;
+  if ( R != cached_R || phi != cached_phi || z != cached_z || t != cached_t){
+    // Set up cache
+    *args= R;
+    *(args + 1)= z;
+    *(args + 2)= phi;
+    *(args + 3)= t;
+    // Compute forces in rectangular, aligned frame
+    cyl_to_rect(R,phi-pa-omegab*t,&x,&y);
+    FerrersPotentialxyzforces_xyz(x,y,z,&Fx,&Fy,&Fz,a2,b2,c2,n,
+				  glorder,glx,glw);
+    cp= cos ( pa + omegab * t );
+    sp= sin ( pa + omegab * t );
+    // Rotate to rectangular, correct frame
+    *(args + 4)= cp * Fx - sp * Fy;
+    *(args + 5)= sp * Fx + cp * Fy;
+    *(args + 6)= Fz;
+  }
+}
+double FerrersPotentialRforce(double R,double z, double phi,
+			      double t,
+			      struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //Get args: amp, a2, b2, c2, n, omegab, pa, glorder, glx, glw, cache
+  double amp= *args++;
+  double a2= *args++;
+  double b2= *args++;
+  double c2= *args++;
+  double n= *args++;
+  double omegab= *args++;
+  double pa= *args++;
+  int glorder= (int) *args++;
+  double * glx= args;
+  double * glw= args + glorder;
+  args+= 2 * glorder;
+  double cached_R= *args;
+  double cached_z= *(args + 1);
+  double cached_phi= *(args + 2);
+  double cached_t= *(args + 3);
+  //Calculate force
+  FerrersPotentialxyzforces(R,z,phi,t,args,a2,b2,c2,n,pa,omegab,
+			    glorder,glx,glw,
+			    cached_R,cached_z,cached_phi,cached_t);
+  return amp * ( cos ( phi ) * *(args + 4) + sin( phi ) * *(args + 5) );
+}
+double FerrersPotentialPlanarRforce(double R,double phi,double t,
+				    struct potentialArg * potentialArgs){
+  return FerrersPotentialRforce(R,0.,phi,t,potentialArgs);
+}
+double FerrersPotentialphiforce(double R,double z, double phi,
+				double t,
+				struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //Get args: amp, a2, b2, c2, n, omegab, pa, glorder, glx, glw, cache
+  double amp= *args++;
+  double a2= *args++;
+  double b2= *args++;
+  double c2= *args++;
+  double n= *args++;
+  double omegab= *args++;
+  double pa= *args++;
+  int glorder= (int) *args++;
+  double * glx= args;
+  double * glw= args + glorder;
+  args+= 2 * glorder;
+  double cached_R= *args;
+  double cached_z= *(args + 1);
+  double cached_phi= *(args + 2);
+  double cached_t= *(args + 3);
+  //Calculate force
+  FerrersPotentialxyzforces(R,z,phi,t,args,a2,b2,c2,n,pa,omegab,
+			    glorder,glx,glw,
+			    cached_R,cached_z,cached_phi,cached_t);
+  return amp * R * ( -sin ( phi ) * *(args + 4) + cos( phi ) * *(args + 5) );
+}
+double FerrersPotentialPlanarphiforce(double R,double phi,double t,
+				      struct potentialArg * potentialArgs){
+  return FerrersPotentialphiforce(R,0.,phi,t,potentialArgs);
+}
+double FerrersPotentialzforce(double R,double z, double phi,
+			      double t,
+			      struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //Get args: amp, a2, b2, c2, n, omegab, pa, glorder, glx, glw, cache
+  double amp= *args++;
+  double a2= *args++;
+  double b2= *args++;
+  double c2= *args++;
+  double n= *args++;
+  double omegab= *args++;
+  double pa= *args++;
+  int glorder= (int) *args++;
+  double * glx= args;
+  double * glw= args + glorder;
+  args+= 2 * glorder;
+  double cached_R= *args;
+  double cached_z= *(args + 1);
+  double cached_phi= *(args + 2);
+  double cached_t= *(args + 3);
+  //Calculate force
+  FerrersPotentialxyzforces(R,z,phi,t,args,a2,b2,c2,n,pa,omegab,
+			    glorder,glx,glw,
+			    cached_R,cached_z,cached_phi,cached_t);
+  return amp * *(args + 6);
+}
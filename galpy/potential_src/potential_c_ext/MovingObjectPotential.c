@@ -0,0 +1,126 @@
+#include <stdlib.h>
+#include <math.h>
+#include <gsl/gsl_spline.h>
+#include <galpy_potentials.h>
+//MovingObjectPotential
+// The object's orbit is tabulated and interpolated using cubic splines of
+// its rectangular coordinates (x,y,z), stored in potentialArgs->spline1d
+void initMovingObjectSplines(struct potentialArg * potentialArgs,
+			     double ** pot_args){
+  // Set up the splines from [nt,t,x,y,z] and advance pot_args past them
+  gsl_interp_accel *x_accel_ptr= gsl_interp_accel_alloc();
+  gsl_interp_accel *y_accel_ptr= gsl_interp_accel_alloc();
+  gsl_interp_accel *z_accel_ptr= gsl_interp_accel_alloc();
+  int nPts= (int) **pot_args;
+  gsl_spline *x_spline= gsl_spline_alloc(gsl_interp_cspline,nPts);
+  gsl_spline *y_spline= gsl_spline_alloc(gsl_interp_cspline,nPts);
+  gsl_spline *z_spline= gsl_spline_alloc(gsl_interp_cspline,nPts);
+  double * t_arr= *pot_args+1;
+  double * x_arr= t_arr+nPts;
+  double * y_arr= t_arr+2*nPts;
+  double * z_arr= t_arr+3*nPts;
+  gsl_spline_init(x_spline,t_arr,x_arr,nPts);
+  gsl_spline_init(y_spline,t_arr,y_arr,nPts);
+  gsl_spline_init(z_spline,t_arr,z_arr,nPts);
+  potentialArgs->nspline1d= 3;
+  potentialArgs->spline1d= (gsl_spline **) \
+    malloc ( 3 * sizeof ( gsl_spline *) );
+  potentialArgs->acc1d= (gsl_interp_accel **) \
+    malloc ( 3 * sizeof ( gsl_interp_accel * ) );
+  *potentialArgs->spline1d= x_spline;
+  *potentialArgs->acc1d= x_accel_ptr;
+  *(potentialArgs->spline1d+1)= y_spline;
+  *(potentialArgs->acc1d+1)= y_accel_ptr;
+  *(potentialArgs->spline1d+2)= z_spline;
+  *(potentialArgs->acc1d+2)= z_accel_ptr;
+  *pot_args+= 4 * nPts + 1;
+}
+static inline void moving_object_position(double t,
+					  struct potentialArg * potentialArgs,
+					  double tmin, double tmax,
+					  double * obj_x, double * obj_y,
+					  double * obj_z){
+  // Clamp to the range over which the object's orbit was integrated
+  if ( t < tmin ) t= tmin;
+  else if ( t > tmax ) t= tmax;
+  *obj_x= gsl_spline_eval(*potentialArgs->spline1d,t,
+			  *potentialArgs->acc1d);
+  *obj_y= gsl_spline_eval(*(potentialArgs->spline1d+1),t,
+			  *(potentialArgs->acc1d+1));
+  *obj_z= gsl_spline_eval(*(potentialArgs->spline1d+2),t,
+			  *(potentialArgs->acc1d+2));
+}
+double MovingObjectPotentialEval(double R,double z, double phi,
+				 double t,
+				 struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //Get args: amp, softening_length, tmin, tmax
+  double amp= *args++;
+  double eps= *args++;
+  double tmin= *args++;
+  double tmax= *args;
+  double x,y,obj_x,obj_y,obj_z,d2;
+  cyl_to_rect(R,phi,&x,&y);
+  moving_object_position(t,potentialArgs,tmin,tmax,&obj_x,&obj_y,&obj_z);
+  d2= ( x - obj_x ) * ( x - obj_x ) + ( y - obj_y ) * ( y - obj_y )
+    + ( z - obj_z ) * ( z - obj_z );
+  return -amp / sqrt ( d2 + eps * eps );
+}
+static inline double MovingObjectPotentialxyzforces(double R, double z,
+						    double phi, double t,
+						    struct potentialArg * potentialArgs,
+						    double * Fx, double * Fy,
+						    double * Fz){
+  // Returns the amplitude, fills in the rectangular forces without it
+  double * args= potentialArgs->args;
+  //Get args: amp, softening_length, tmin, tmax
+  double amp= *args++;
+  double eps= *args++;
+  double tmin= *args++;
+  double tmax= *args;
+  double x,y,obj_x,obj_y,obj_z,d2,soft;
+  cyl_to_rect(R,phi,&x,&y);
+  moving_object_position(t,potentialArgs,tmin,tmax,&obj_x,&obj_y,&obj_z);
+  *Fx= obj_x - x;
+  *Fy= obj_y - y;
+  *Fz= obj_z - z;
+  d2= *Fx * *Fx + *Fy * *Fy + *Fz * *Fz;
+  // Plummer softening
+  soft= 1. / ( d2 + eps * eps ) / sqrt ( d2 + eps * eps );
+  *Fx*= soft;
+  *Fy*= soft;
+  *Fz*= soft;
+  return amp;
+}
+double MovingObjectPotentialRforce(double R,double z, double phi,
+				   double t,
+				   struct potentialArg * potentialArgs){
+  double Fx,Fy,Fz;
+  double amp= MovingObjectPotentialxyzforces(R,z,phi,t,potentialArgs,
+					     &Fx,&Fy,&Fz);
+  return amp * ( cos ( phi ) * Fx + sin ( phi ) * Fy );
+}
+double MovingObjectPotentialPlanarRforce(double R,double phi,double t,
+					 struct potentialArg * potentialArgs){
+  return MovingObjectPotentialRforce(R,0.,phi,t,potentialArgs);
+}
+double MovingObjectPotentialphiforce(double R,double z, double phi,
+				     double t,
+				     struct potentialArg * potentialArgs){
+  double Fx,Fy,Fz;
+  double amp= MovingObjectPotentialxyzforces(R,z,phi,t,potentialArgs,
+					     &Fx,&Fy,&Fz);
+  return amp * R * ( cos ( phi ) * Fy - sin ( phi ) * Fx );
+}
+double MovingObjectPotentialPlanarphiforce(double R,double phi,double t,
+					   struct potentialArg * potentialArgs){
+  return MovingObjectPotentialphiforce(R,0.,phi,t,potentialArgs);
+}
+double MovingObjectPotentialzforce(double R,double z, double phi,
+				   double t,
+				   struct potentialArg * potentialArgs){
+  double Fx,Fy,Fz;
+  double amp= MovingObjectPotentialxyzforces(R,z,phi,t,potentialArgs,
+					     &Fx,&Fy,&Fz);
+  return amp * Fz;
+}
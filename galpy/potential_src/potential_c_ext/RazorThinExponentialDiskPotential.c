@@ -0,0 +1,145 @@
+#include <math.h>
+#include <gsl/gsl_sf_bessel.h>
+#include <galpy_potentials.h>
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+#ifndef M_SQRT2
+#define M_SQRT2 1.41421356237309504880
+#endif
+//RazorThinExponentialDiskPotential
+// Products of modified Bessel functions are evaluated using the scaled
+// versions to avoid overflow at large R
+static inline double razorthin_k0(double x){
+  return gsl_sf_bessel_K0_scaled(x) * exp ( -x );
+}
+double RazorThinExponentialDiskPotentialEval(double R,double z, double phi,
+					     double t,
+					     struct potentialArg * potentialArgs){
+  int ii;
+  double * args= potentialArgs->args;
+  //Get args: amp, alpha, glorder, glx, glw
+  double amp= *args++;
+  double alpha= *args++;
+  int glorder= (int) *args++;
+  double * glx= args;
+  double * glw= args + glorder;
+  double y, ks, sqrtp, sqrtm, out= 0.;
+  double kalphamax= 10.;
+  if ( fabs ( z ) < 1e-6 ) {
+    if ( R == 0. ) return -2. * amp * M_PI / alpha;
+    y= 0.5 * alpha * R;
+    return -amp * M_PI * R
+      * ( gsl_sf_bessel_I0_scaled(y) * gsl_sf_bessel_K1_scaled(y)
+	  - gsl_sf_bessel_I1_scaled(y) * gsl_sf_bessel_K0_scaled(y) );
+  }
+  for (ii=0; ii < glorder; ii++){
+    ks= 0.5 * kalphamax * ( *(glx+ii) + 1. );
+    sqrtp= sqrt ( z * z + ( ks + R ) * ( ks + R ) );
+    sqrtm= sqrt ( z * z + ( ks - R ) * ( ks - R ) );
+    out+= kalphamax * *(glw+ii) * asin ( 2. * ks / ( sqrtp + sqrtm ) ) * ks
+      * razorthin_k0(alpha * ks);
+  }
+  return -2. * amp * alpha * out;
+}
+double RazorThinExponentialDiskPotentialRforce(double R,double z, double phi,
+					       double t,
+					       struct potentialArg * potentialArgs){
+  int ii;
+  double * args= potentialArgs->args;
+  //Get args: amp, alpha, glorder, glx, glw
+  double amp= *args++;
+  double alpha= *args++;
+  int glorder= (int) *args++;
+  double * glx= args;
+  double * glw= args + glorder;
+  double y, ks, sqrtp, sqrtm, out= 0.;
+  double kalphamax1= R;
+  double kalphamax2= 10.;
+  if ( fabs ( z ) < 1e-6 ) {
+    if ( R == 0. ) return 0.;
+    y= 0.5 * alpha * R;
+    return -2. * amp * M_PI * y
+      * ( gsl_sf_bessel_I0_scaled(y) * gsl_sf_bessel_K0_scaled(y)
+	  - gsl_sf_bessel_I1_scaled(y) * gsl_sf_bessel_K1_scaled(y) );
+  }
+  for (ii=0; ii < glorder; ii++){
+    if ( R > 0. ) {
+      ks= 0.5 * kalphamax1 * ( *(glx+ii) + 1. );
+      sqrtp= sqrt ( z * z + ( ks + R ) * ( ks + R ) );
+      sqrtm= sqrt ( z * z + ( ks - R ) * ( ks - R ) );
+      out+= kalphamax1 * *(glw+ii) * ks * ks * razorthin_k0(alpha * ks)
+	* ( ( ks + R ) / sqrtp - ( ks - R ) / sqrtm )
+	/ sqrt ( R * R + z * z - ks * ks + sqrtp * sqrtm ) / ( sqrtp + sqrtm );
+    }
+    if ( R < 10. ) {
+      ks= 0.5 * ( kalphamax2 - kalphamax1 ) * ( *(glx+ii) + 1. ) + kalphamax1;
+      sqrtp= sqrt ( z * z + ( ks + R ) * ( ks + R ) );
+      sqrtm= sqrt ( z * z + ( ks - R ) * ( ks - R ) );
+      out+= ( kalphamax2 - kalphamax1 ) * *(glw+ii) * ks * ks
+	* razorthin_k0(alpha * ks)
+	* ( ( ks + R ) / sqrtp - ( ks - R ) / sqrtm )
+	/ sqrt ( R * R + z * z - ks * ks + sqrtp * sqrtm ) / ( sqrtp + sqrtm );
+    }
+  }
+  return -2. * M_SQRT2 * amp * alpha * out;
+}
+double RazorThinExponentialDiskPotentialPlanarRforce(double R,double phi,
+						     double t,
+						     struct potentialArg * potentialArgs){
+  return RazorThinExponentialDiskPotentialRforce(R,0.,phi,t,potentialArgs);
+}
+double RazorThinExponentialDiskPotentialzforce(double R,double z, double phi,
+					       double t,
+					       struct potentialArg * potentialArgs){
+  int ii;
+  double * args= potentialArgs->args;
+  //Get args: amp, alpha, glorder, glx, glw
+  double amp= *args++;
+  double alpha= *args++;
+  int glorder= (int) *args++;
+  double * glx= args;
+  double * glw= args + glorder;
+  double ks, sqrtp, sqrtm, out= 0.;
+  double kalphamax1= R;
+  double kalphamax2= 10.;
+  if ( fabs ( z ) < 1e-6 )
+    return 0.;
+  for (ii=0; ii < glorder; ii++){
+    if ( R > 0. ) {
+      ks= 0.5 * kalphamax1 * ( *(glx+ii) + 1. );
+      sqrtp= sqrt ( z * z + ( ks + R ) * ( ks + R ) );
+      sqrtm= sqrt ( z * z + ( ks - R ) * ( ks - R ) );
+      out+= kalphamax1 * *(glw+ii) * ks * ks * razorthin_k0(alpha * ks)
+	* ( 1. / sqrtp + 1. / sqrtm )
+	/ sqrt ( R * R + z * z - ks * ks + sqrtp * sqrtm ) / ( sqrtp + sqrtm );
+    }
+    if ( R < 10. ) {
+      ks= 0.5 * ( kalphamax2 - kalphamax1 ) * ( *(glx+ii) + 1. ) + kalphamax1;
+      sqrtp= sqrt ( z * z + ( ks + R ) * ( ks + R ) );
+      sqrtm= sqrt ( z * z + ( ks - R ) * ( ks - R ) );
+      out+= ( kalphamax2 - kalphamax1 ) * *(glw+ii) * ks * ks
+	* razorthin_k0(alpha * ks)
+	* ( 1. / sqrtp + 1. / sqrtm )
+	/ sqrt ( R * R + z * z - ks * ks + sqrtp * sqrtm ) / ( sqrtp + sqrtm );
+    }
+  }
+  return -2. * M_SQRT2 * amp * alpha * z * out;
+}
+double RazorThinExponentialDiskPotentialPlanarR2deriv(double R,double phi,
+						      double t,
+						      struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //Get args: amp, alpha
+  double amp= *args++;
+  double alpha= *args;
+  double y= 0.5 * alpha * R;
+  double i0= gsl_sf_bessel_I0_scaled(y);
+  double i1= gsl_sf_bessel_I1_scaled(y);
+  double k0= gsl_sf_bessel_K0_scaled(y);
+  double k1= gsl_sf_bessel_K1_scaled(y);
+  return amp * ( M_PI * alpha * ( i0 * k0 - i1 * k1 )
+		 + 0.25 * M_PI * alpha * alpha * R
+		 * ( i1 * ( 3. * k0 + gsl_sf_bessel_Kn_scaled(2,y) )
+		     - k1 * ( 3. * i0 + gsl_sf_bessel_In_scaled(2,y) ) ) );
+}
@@ -110,6 +110,90 @@ double SoftenedNeedleBarPotentialPlanarphiforce(double R, double phi,double t,
 					  struct potentialArg * potentialArgs){
   return SoftenedNeedleBarPotentialphiforce(R,0.,phi,t,potentialArgs);
 }
+void SoftenedNeedleBarPotentialxyhessian_xyz(double x,double y, double z,
+					     double * Fx, double * Fy,
+					     double * phixx, double * phixy,
+					     double * phiyy,
+					     double a,double b, double c2){
+  // Forces and second derivatives in the x,y plane in the aligned frame,
+  // without the amplitude
+  double Tp,Tm;
+  double gp, gm;
+  compute_TpTm(x,y,z,&Tp,&Tm,a,b,c2);
+  gm= 1. / Tm / ( x - a + Tm );
+  gp= 1. / Tp / ( x + a + Tp );
+  *Fx= -2. * x / Tp / Tm / (Tp+Tm);
+  *Fy= -0.5 * y * ( gm - gp ) / a;
+  *phixx= 0.5 * ( ( x + a ) / pow(Tp,3) - ( x - a ) / pow(Tm,3) ) / a;
+  *phixy= 0.5 * y * ( 1. / pow(Tp,3) - 1. / pow(Tm,3) ) / a;
+  *phiyy= 0.5 * ( gm - gp ) / a
+    - 0.5 * y * y * ( ( x - a + 2. * Tm ) * gm * gm / Tm
+		      - ( x + a + 2. * Tp ) * gp * gp / Tp ) / a;
+}
+double SoftenedNeedleBarPotentialPlanarR2deriv(double R,double phi,double t,
+					       struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //Get args: amp, a, b, c2, pa, omegab
+  double amp= *args++;
+  double a= *args++;
+  double b= *args++;
+  double c2= *args++;
+  double pa= *args++;
+  double omegab= *args++;
+  double x,y;
+  double Fx,Fy,phixx,phixy,phiyy;
+  //Calculate R2deriv in the aligned frame
+  phi-= pa + omegab * t;
+  cyl_to_rect(R,phi,&x,&y);
+  SoftenedNeedleBarPotentialxyhessian_xyz(x,y,0.,&Fx,&Fy,&phixx,&phixy,&phiyy,
+					  a,b,c2);
+  return amp * ( cos ( phi ) * cos ( phi ) * phixx 
+		 + sin ( phi ) * sin ( phi ) * phiyy
+		 + 2. * cos ( phi ) * sin ( phi ) * phixy );
+}
+double SoftenedNeedleBarPotentialPlanarphi2deriv(double R,double phi,double t,
+						 struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //Get args: amp, a, b, c2, pa, omegab
+  double amp= *args++;
+  double a= *args++;
+  double b= *args++;
+  double c2= *args++;
+  double pa= *args++;
+  double omegab= *args++;
+  double x,y;
+  double Fx,Fy,phixx,phixy,phiyy;
+  //Calculate phi2deriv in the aligned frame
+  phi-= pa + omegab * t;
+  cyl_to_rect(R,phi,&x,&y);
+  SoftenedNeedleBarPotentialxyhessian_xyz(x,y,0.,&Fx,&Fy,&phixx,&phixy,&phiyy,
+					  a,b,c2);
+  return amp * ( R * R * ( sin ( phi ) * sin ( phi ) * phixx
+			   + cos ( phi ) * cos ( phi ) * phiyy
+			   - 2. * cos ( phi ) * sin ( phi ) * phixy )
+		 + R * ( cos ( phi ) * Fx + sin ( phi ) * Fy ) );
+}
+double SoftenedNeedleBarPotentialPlanarRphideriv(double R,double phi,double t,
+						 struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //Get args: amp, a, b, c2, pa, omegab
+  double amp= *args++;
+  double a= *args++;
+  double b= *args++;
+  double c2= *args++;
+  double pa= *args++;
+  double omegab= *args++;
+  double x,y;
+  double Fx,Fy,phixx,phixy,phiyy;
+  //Calculate Rphideriv in the aligned frame
+  phi-= pa + omegab * t;
+  cyl_to_rect(R,phi,&x,&y);
+  SoftenedNeedleBarPotentialxyhessian_xyz(x,y,0.,&Fx,&Fy,&phixx,&phixy,&phiyy,
+					  a,b,c2);
+  return amp * ( R * cos ( phi ) * sin ( phi ) * ( phiyy - phixx )
+		 + R * cos ( 2. * phi ) * phixy
+		 + sin ( phi ) * Fx - cos ( phi ) * Fy );
+}
 double SoftenedNeedleBarPotentialzforce(double R,double z, double phi,
 				       double t,
 				       struct potentialArg * potentialArgs){
@@ -2,6 +2,14 @@
 #include <math.h>
 #include <galpy_potentials.h>
 //SolidBodyRotationWrapperPotential
+double SolidBodyRotationWrapperPotentialEval(double R,double z,double phi,
+					     double t,
+					     struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //Calculate potential
+  return *args * calcPotential(R,z,phi - *(args+1) * t - *(args+2),t,
+		    potentialArgs->nwrapped,potentialArgs->wrappedPotentialArg);
+}
 double SolidBodyRotationWrapperPotentialRforce(double R,double z,double phi,
 					  double t,
 					  struct potentialArg * potentialArgs){
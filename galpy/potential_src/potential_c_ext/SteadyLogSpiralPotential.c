@@ -56,3 +56,60 @@ double SteadyLogSpiralPotentialphiforce(double R,double phi,double t,
   return -amp * smooth * A / alpha * m * 
     sin(alpha * log(R) - m * (phi-omegas*t-gamma));
 }
+double SteadyLogSpiralPotentialR2deriv(double R,double phi,double t,
+				       struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //declare
+  double smooth, theta;
+  //Get args
+  double amp= *args++;
+  double tform= *args++;
+  double tsteady= *args++;
+  double A= *args++;
+  double alpha= *args++;
+  double m= *args++;
+  double omegas= *args++;
+  double gamma= *args++;
+  //Calculate R2deriv
+  smooth= dehnenSpiralSmooth(t,tform,tsteady);
+  theta= alpha * log(R) - m * (phi-omegas*t-gamma);
+  return amp * smooth * A / R / R * ( sin(theta) - alpha * cos(theta) );
+}
+double SteadyLogSpiralPotentialphi2deriv(double R,double phi,double t,
+					 struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //declare
+  double smooth;
+  //Get args
+  double amp= *args++;
+  double tform= *args++;
+  double tsteady= *args++;
+  double A= *args++;
+  double alpha= *args++;
+  double m= *args++;
+  double omegas= *args++;
+  double gamma= *args++;
+  //Calculate phi2deriv
+  smooth= dehnenSpiralSmooth(t,tform,tsteady);
+  return -amp * smooth * A / alpha * m * m
+    * cos(alpha * log(R) - m * (phi-omegas*t-gamma));
+}
+double SteadyLogSpiralPotentialRphideriv(double R,double phi,double t,
+					 struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //declare
+  double smooth;
+  //Get args
+  double amp= *args++;
+  double tform= *args++;
+  double tsteady= *args++;
+  double A= *args++;
+  double alpha= *args++;
+  double m= *args++;
+  double omegas= *args++;
+  double gamma= *args++;
+  //Calculate Rphideriv
+  smooth= dehnenSpiralSmooth(t,tform,tsteady);
+  return amp * smooth * A / R * m
+    * cos(alpha * log(R) - m * (phi-omegas*t-gamma));
+}
@@ -66,6 +66,69 @@ void TwoPowerTriaxialPotentialxyzforces_xyz(double x,double y, double z,
   *(args + 4)= *Fy;
   *(args + 5)= *Fz;
 }
+static inline double densDeriv(double m, double alpha, double beta){
+  return - dens(m,alpha,beta) * ( alpha / m + ( beta - alpha ) / ( 1. + m ) );
+}
+static inline void rotate_hessian(double * H, double *rot){
+  // H --> rot^T H rot for a symmetric 3x3 H stored row-major
+  int ii,jj,kk;
+  double tmp[9];
+  for (ii=0; ii < 3; ii++)
+    for (jj=0; jj < 3; jj++) {
+      tmp[3*ii+jj]= 0.;
+      for (kk=0; kk < 3; kk++)
+	tmp[3*ii+jj]+= *(H+3*ii+kk) * *(rot+3*kk+jj);
+    }
+  for (ii=0; ii < 3; ii++)
+    for (jj=0; jj < 3; jj++) {
+      *(H+3*ii+jj)= 0.;
+      for (kk=0; kk < 3; kk++)
+	*(H+3*ii+jj)+= *(rot+3*kk+ii) * tmp[3*kk+jj];
+    }
+}
+void TwoPowerTriaxialPotentialxyzhessian_xyz(double x,double y, double z,
+					     double * F, double * H,
+					     double a,
+					     double alpha, double beta,
+					     double b2, double c2,
+					     bool aligned, double * rot, 
+					     int glorder,
+					     double * glx, double * glw){
+  // Computes the forces F and the second derivatives of the potential H
+  // (without the amplitude) in the rectangular, non-rotated frame
+  int ii,jj,kk;
+  double t, m, td, tdd;
+  double xt[3], tau[3];
+  if ( !aligned ) 
+    rotate(&x,&y,&z,rot);
+  for (jj=0; jj < 3; jj++) {
+    *(F+jj)= 0.;
+    for (kk=0; kk < 3; kk++)
+      *(H+3*jj+kk)= 0.;
+  }
+  for (ii=0; ii < glorder; ii++) {
+    t= 1. / *(glx+ii) / *(glx+ii) - 1.;
+    tau[0]= 1. + t;
+    tau[1]= b2 + t;
+    tau[2]= c2 + t;
+    xt[0]= x / tau[0];
+    xt[1]= y / tau[1];
+    xt[2]= z / tau[2];
+    m= sqrt ( x * xt[0] + y * xt[1] + z * xt[2] ) / a;
+    td= *(glw+ii) * dens(m,alpha,beta);
+    tdd= *(glw+ii) * densDeriv(m,alpha,beta) / m / a / a;
+    for (jj=0; jj < 3; jj++) {
+      *(F+jj)+= td * xt[jj];
+      *(H+4*jj)-= td / tau[jj];
+      for (kk=0; kk < 3; kk++)
+	*(H+3*jj+kk)-= tdd * xt[jj] * xt[kk];
+    }
+  }
+  if ( !aligned ) {
+    rotate_force(F,F+1,F+2,rot);
+    rotate_hessian(H,rot);
+  }
+}
 double TwoPowerTriaxialPotentialRforce(double R,double z, double phi,
 				       double t,
 				       double alpha, double beta,
@@ -183,6 +246,88 @@ double TwoPowerTriaxialPotentialzforce(double R,double z, double phi,
     rotate_force(&Fx,&Fy,&Fz,rot);
   return amp * Fz;
 }
+double TwoPowerTriaxialPotentialPlanarR2deriv(double R, double phi,
+					      double t,
+					      double alpha, double beta,
+					      struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //Get args
+  double amp= *args++;
+  double a= *args++;
+  double b2= *args++;
+  double c2= *args++;
+  bool aligned= (bool) *args++;
+  double * rot= args;
+  args+= 9;
+  int glorder= (int) *args++;
+  double * glx= args;
+  double * glw= args + glorder;
+  //Calculate R2deriv
+  double x, y;
+  double F[3], H[9];
+  double cp= cos ( phi );
+  double sp= sin ( phi );
+  cyl_to_rect(R,phi,&x,&y);
+  TwoPowerTriaxialPotentialxyzhessian_xyz(x,y,0.,F,H,a,alpha,beta,b2,c2,
+					  aligned,rot,glorder,glx,glw);
+  return amp * ( cp * cp * H[0] + sp * sp * H[4] + 2. * cp * sp * H[1] );
+}
+double TwoPowerTriaxialPotentialPlanarphi2deriv(double R, double phi,
+						double t,
+						double alpha, double beta,
+						struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //Get args
+  double amp= *args++;
+  double a= *args++;
+  double b2= *args++;
+  double c2= *args++;
+  bool aligned= (bool) *args++;
+  double * rot= args;
+  args+= 9;
+  int glorder= (int) *args++;
+  double * glx= args;
+  double * glw= args + glorder;
+  //Calculate phi2deriv
+  double x, y;
+  double F[3], H[9];
+  double cp= cos ( phi );
+  double sp= sin ( phi );
+  cyl_to_rect(R,phi,&x,&y);
+  TwoPowerTriaxialPotentialxyzhessian_xyz(x,y,0.,F,H,a,alpha,beta,b2,c2,
+					  aligned,rot,glorder,glx,glw);
+  return amp * ( R * R * ( sp * sp * H[0] + cp * cp * H[4] 
+			   - 2. * cp * sp * H[1] )
+		 + R * ( cp * F[0] + sp * F[1] ) );
+}
+double TwoPowerTriaxialPotentialPlanarRphideriv(double R, double phi,
+						double t,
+						double alpha, double beta,
+						struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //Get args
+  double amp= *args++;
+  double a= *args++;
+  double b2= *args++;
+  double c2= *args++;
+  bool aligned= (bool) *args++;
+  double * rot= args;
+  args+= 9;
+  int glorder= (int) *args++;
+  double * glx= args;
+  double * glw= args + glorder;
+  //Calculate Rphideriv
+  double x, y;
+  double F[3], H[9];
+  double cp= cos ( phi );
+  double sp= sin ( phi );
+  cyl_to_rect(R,phi,&x,&y);
+  TwoPowerTriaxialPotentialxyzhessian_xyz(x,y,0.,F,H,a,alpha,beta,b2,c2,
+					  aligned,rot,glorder,glx,glw);
+  return amp * ( R * cp * sp * ( H[4] - H[0] ) 
+		 + R * ( cp * cp - sp * sp ) * H[1]
+		 + sp * F[0] - cp * F[1] );
+}
 double TriaxialNFWPotentialRforce(double R,double z, double phi,
 				  double t,
 				  struct potentialArg * potentialArgs){
@@ -201,6 +346,18 @@ double TriaxialNFWPotentialPlanarphiforce(double R,double phi,double t,
 					  struct potentialArg * potentialArgs){
   return TwoPowerTriaxialPotentialphiforce(R,0.,phi,t,1,3,potentialArgs);
 }
+double TriaxialNFWPotentialPlanarR2deriv(double R,double phi,double t,
+					struct potentialArg * potentialArgs){
+  return TwoPowerTriaxialPotentialPlanarR2deriv(R,phi,t,1,3,potentialArgs);
+}
+double TriaxialNFWPotentialPlanarphi2deriv(double R,double phi,double t,
+					struct potentialArg * potentialArgs){
+  return TwoPowerTriaxialPotentialPlanarphi2deriv(R,phi,t,1,3,potentialArgs);
+}
+double TriaxialNFWPotentialPlanarRphideriv(double R,double phi,double t,
+					struct potentialArg * potentialArgs){
+  return TwoPowerTriaxialPotentialPlanarRphideriv(R,phi,t,1,3,potentialArgs);
+}
 double TriaxialNFWPotentialzforce(double R,double z, double phi,
 				  double t,
 				  struct potentialArg * potentialArgs){
@@ -225,6 +382,18 @@ double TriaxialHernquistPotentialPlanarphiforce(double R,double phi,double t,
 					  struct potentialArg * potentialArgs){
   return TwoPowerTriaxialPotentialphiforce(R,0.,phi,t,1,4,potentialArgs);
 }
+double TriaxialHernquistPotentialPlanarR2deriv(double R,double phi,double t,
+					struct potentialArg * potentialArgs){
+  return TwoPowerTriaxialPotentialPlanarR2deriv(R,phi,t,1,4,potentialArgs);
+}
+double TriaxialHernquistPotentialPlanarphi2deriv(double R,double phi,double t,
+					struct potentialArg * potentialArgs){
+  return TwoPowerTriaxialPotentialPlanarphi2deriv(R,phi,t,1,4,potentialArgs);
+}
+double TriaxialHernquistPotentialPlanarRphideriv(double R,double phi,double t,
+					struct potentialArg * potentialArgs){
+  return TwoPowerTriaxialPotentialPlanarRphideriv(R,phi,t,1,4,potentialArgs);
+}
 double TriaxialHernquistPotentialzforce(double R,double z, double phi,
 				  double t,
 				  struct potentialArg * potentialArgs){
@@ -249,6 +418,18 @@ double TriaxialJaffePotentialPlanarphiforce(double R,double phi,double t,
 					  struct potentialArg * potentialArgs){
   return TwoPowerTriaxialPotentialphiforce(R,0.,phi,t,2,4,potentialArgs);
 }
+double TriaxialJaffePotentialPlanarR2deriv(double R,double phi,double t,
+					struct potentialArg * potentialArgs){
+  return TwoPowerTriaxialPotentialPlanarR2deriv(R,phi,t,2,4,potentialArgs);
+}
+double TriaxialJaffePotentialPlanarphi2deriv(double R,double phi,double t,
+					struct potentialArg * potentialArgs){
+  return TwoPowerTriaxialPotentialPlanarphi2deriv(R,phi,t,2,4,potentialArgs);
+}
+double TriaxialJaffePotentialPlanarRphideriv(double R,double phi,double t,
+					struct potentialArg * potentialArgs){
+  return TwoPowerTriaxialPotentialPlanarRphideriv(R,phi,t,2,4,potentialArgs);
+}
 double TriaxialJaffePotentialzforce(double R,double z, double phi,
 				  double t,
 				  struct potentialArg * potentialArgs){
@@ -15,11 +15,14 @@ void init_potentialArgs(int npot, struct potentialArg * potentialArgs){
     (potentialArgs+ii)->i2dzforce= NULL;
     (potentialArgs+ii)->accxzforce= NULL;
     (potentialArgs+ii)->accyzforce= NULL;
+    (potentialArgs+ii)->spline1d= NULL;
+    (potentialArgs+ii)->acc1d= NULL;
+    (potentialArgs+ii)->nspline1d= 0;
     (potentialArgs+ii)->wrappedPotentialArg= NULL;
   }
 }
 void free_potentialArgs(int npot, struct potentialArg * potentialArgs){
-  int ii;
+  int ii, jj;
   for (ii=0; ii < npot; ii++) {
     if ( (potentialArgs+ii)->i2d )
       interp_2d_free((potentialArgs+ii)->i2d) ;
@@ -39,6 +42,16 @@ void free_potentialArgs(int npot, struct potentialArg * potentialArgs){
       gsl_interp_accel_free ((potentialArgs+ii)->accxzforce);
     if ( (potentialArgs+ii)->accyzforce )
       gsl_interp_accel_free ((potentialArgs+ii)->accyzforce);
+    if ( (potentialArgs+ii)->spline1d ) {
+      for (jj=0; jj < (potentialArgs+ii)->nspline1d; jj++)
+	gsl_spline_free(*((potentialArgs+ii)->spline1d+jj));
+      free((potentialArgs+ii)->spline1d);
+    }
+    if ( (potentialArgs+ii)->acc1d ) {
+      for (jj=0; jj < (potentialArgs+ii)->nspline1d; jj++)
+	gsl_interp_accel_free(*((potentialArgs+ii)->acc1d+jj));
+      free((potentialArgs+ii)->acc1d);
+    }
    if ( (potentialArgs+ii)->wrappedPotentialArg )
       free((potentialArgs+ii)->wrappedPotentialArg);
     free((potentialArgs+ii)->args);
@@ -56,6 +69,18 @@ double evaluatePotentials(double R, double Z,
   potentialArgs-= nargs;
   return pot;
 }
+double calcPotential(double R, double Z, double phi, double t, 
+		     int nargs, struct potentialArg * potentialArgs){
+  int ii;
+  double pot= 0.;
+  for (ii=0; ii < nargs; ii++){
+    pot+= potentialArgs->potentialEval(R,Z,phi,t,
+				       potentialArgs);
+    potentialArgs++;
+  }
+  potentialArgs-= nargs;
+  return pot;
+}
 double calcRforce(double R, double Z, double phi, double t, 
 		  int nargs, struct potentialArg * potentialArgs){
   int ii;
@@ -117,6 +142,18 @@ double calcPlanarphiforce(double R, double phi, double t,
   return phiforce;
 }
 
+double calcLinearForce(double x, double t,
+		       int nargs, struct potentialArg * potentialArgs){
+  int ii;
+  double force= 0.;
+  for (ii=0; ii < nargs; ii++){
+    force+= potentialArgs->linearForce(x,t,potentialArgs);
+    potentialArgs++;
+  }
+  potentialArgs-= nargs;
+  return force;
+}
+
 // LCOV_EXCL_START
 double calcR2deriv(double R, double Z, double phi, double t, 
 		   int nargs, struct potentialArg * potentialArgs){
@@ -33,6 +33,8 @@ struct potentialArg{
 			    struct potentialArg *);
   double (*planarRphideriv)(double R,double phi, double t,
 			    struct potentialArg *);
+  double (*linearForce)(double x, double t,
+			struct potentialArg *);
   int nargs;
   double * args;
   interp_2d * i2d;
@@ -44,6 +46,9 @@ struct potentialArg{
   interp_2d * i2dzforce;
   gsl_interp_accel * accxzforce;
   gsl_interp_accel * accyzforce;
+  gsl_spline ** spline1d; // For tabulated 1D functions (e.g., of time)
+  gsl_interp_accel ** acc1d;
+  int nspline1d;
   int nwrapped; // For wrappers
   struct potentialArg * wrappedPotentialArg;  
 };
@@ -57,6 +62,7 @@ void init_potentialArgs(int,struct potentialArg *);
 void free_potentialArgs(int,struct potentialArg *);
 //Potential and force evaluation
 double evaluatePotentials(double,double,int, struct potentialArg *);
+double calcPotential(double,double,double,double,int,struct potentialArg *);
 double calcRforce(double,double,double,double,int,struct potentialArg *);
 double calczforce(double,double,double,double,int,struct potentialArg *);
 double calcPhiforce(double, double,double, double, 
@@ -77,6 +83,7 @@ double calcPlanarphi2deriv(double, double, double,
 			   int, struct potentialArg *);
 double calcPlanarRphideriv(double, double, double, 
 			   int, struct potentialArg *);
+double calcLinearForce(double, double, int, struct potentialArg *);
 //ZeroForce
 double ZeroPlanarForce(double,double,double,
 		       struct potentialArg *);
@@ -94,6 +101,8 @@ double LogarithmicHaloPotentialzforce(double,double,double,double,
 double LogarithmicHaloPotentialPlanarR2deriv(double ,double, double,
 				    struct potentialArg *);
 //DehnenBarPotential
+double DehnenBarPotentialEval(double,double,double,double,
+			      struct potentialArg *);
 double DehnenBarPotentialRforce(double,double,double,double,
 				struct potentialArg *);
 double DehnenBarPotentialphiforce(double,double,double,double,
@@ -115,11 +124,23 @@ double TransientLogSpiralPotentialRforce(double,double,double,
 		       struct potentialArg *);
 double TransientLogSpiralPotentialphiforce(double,double,double,
 		       struct potentialArg *);
+double TransientLogSpiralPotentialR2deriv(double,double,double,
+		       struct potentialArg *);
+double TransientLogSpiralPotentialphi2deriv(double,double,double,
+		       struct potentialArg *);
+double TransientLogSpiralPotentialRphideriv(double,double,double,
+		       struct potentialArg *);
 //SteadyLogSpiralPotential
 double SteadyLogSpiralPotentialRforce(double,double,double,
 		       struct potentialArg *);
 double SteadyLogSpiralPotentialphiforce(double,double,double,
 		       struct potentialArg *);
+double SteadyLogSpiralPotentialR2deriv(double,double,double,
+		       struct potentialArg *);
+double SteadyLogSpiralPotentialphi2deriv(double,double,double,
+		       struct potentialArg *);
+double SteadyLogSpiralPotentialRphideriv(double,double,double,
+		       struct potentialArg *);
 //EllipticalDiskPotential
 double EllipticalDiskPotentialRforce(double,double,double,
 		       struct potentialArg *);
@@ -204,6 +225,8 @@ double DoubleExponentialDiskPotentialRforce(double,double, double,double,
 					    struct potentialArg *);
 double DoubleExponentialDiskPotentialPlanarRforce(double,double,double,
 						  struct potentialArg *);
+double DoubleExponentialDiskPotentialPlanarR2deriv(double,double,double,
+						   struct potentialArg *);
 double DoubleExponentialDiskPotentialzforce(double,double, double,double,
 					    struct potentialArg *);
 //FlattenedPowerPotential
@@ -224,6 +247,10 @@ double interpRZPotentialRforce(double ,double , double, double,
 			       struct potentialArg *);
 double interpRZPotentialzforce(double ,double , double, double,
 			       struct potentialArg *);
+double interpRZPotentialPlanarRforce(double ,double, double,
+				     struct potentialArg *);
+double interpRZPotentialPlanarR2deriv(double ,double, double,
+				      struct potentialArg *);
 //IsochronePotential
 double IsochronePotentialEval(double ,double , double, double,
 			      struct potentialArg *);
@@ -313,6 +340,12 @@ double TriaxialHernquistPotentialphiforce(double,double,double,double,
 					  struct potentialArg *);
 double TriaxialHernquistPotentialPlanarphiforce(double,double,double,
 						struct potentialArg *);
+double TriaxialHernquistPotentialPlanarR2deriv(double,double,double,
+					  struct potentialArg *);
+double TriaxialHernquistPotentialPlanarphi2deriv(double,double,double,
+					    struct potentialArg *);
+double TriaxialHernquistPotentialPlanarRphideriv(double,double,double,
+					    struct potentialArg *);
 double TriaxialHernquistPotentialzforce(double,double,double,double,
 					struct potentialArg *);
 //TriaxialNFWPotential
@@ -326,6 +359,12 @@ double TriaxialNFWPotentialphiforce(double,double,double,double,
 				    struct potentialArg *);
 double TriaxialNFWPotentialPlanarphiforce(double,double,double,
 					  struct potentialArg *);
+double TriaxialNFWPotentialPlanarR2deriv(double,double,double,
+					  struct potentialArg *);
+double TriaxialNFWPotentialPlanarphi2deriv(double,double,double,
+					    struct potentialArg *);
+double TriaxialNFWPotentialPlanarRphideriv(double,double,double,
+					    struct potentialArg *);
 double TriaxialNFWPotentialzforce(double,double,double,double,
 				  struct potentialArg *);
 //TriaxialJaffePotential
@@ -339,6 +378,12 @@ double TriaxialJaffePotentialphiforce(double,double,double,double,
 				      struct potentialArg *);
 double TriaxialJaffePotentialPlanarphiforce(double,double,double,
 					    struct potentialArg *);
+double TriaxialJaffePotentialPlanarR2deriv(double,double,double,
+					  struct potentialArg *);
+double TriaxialJaffePotentialPlanarphi2deriv(double,double,double,
+					    struct potentialArg *);
+double TriaxialJaffePotentialPlanarRphideriv(double,double,double,
+					    struct potentialArg *);
 double TriaxialJaffePotentialzforce(double,double,double,double,
 				    struct potentialArg *);					      
 //SCFPotential
@@ -374,6 +419,12 @@ double SoftenedNeedleBarPotentialPlanarRforce(double,double,double,
 					      struct potentialArg *);
 double SoftenedNeedleBarPotentialPlanarphiforce(double,double,double,
 					  struct potentialArg *);
+double SoftenedNeedleBarPotentialPlanarR2deriv(double,double,double,
+					       struct potentialArg *);
+double SoftenedNeedleBarPotentialPlanarphi2deriv(double,double,double,
+						 struct potentialArg *);
+double SoftenedNeedleBarPotentialPlanarRphideriv(double,double,double,
+						 struct potentialArg *);
 //DiskSCFPotential
 double DiskSCFPotentialEval(double,double,double,double,
 				      struct potentialArg *);
@@ -383,6 +434,8 @@ double DiskSCFPotentialzforce(double,double,double,double,
 				        struct potentialArg *);
 double DiskSCFPotentialPlanarRforce(double,double,double,
 					      struct potentialArg *);
+double DiskSCFPotentialPlanarR2deriv(double,double,double,
+				     struct potentialArg *);
 
 // SpiralArmsPotential
 double SpiralArmsPotentialEval(double, double, double, double,
@@ -435,6 +488,8 @@ double DehnenSmoothWrapperPotentialPlanarphi2deriv(double,double,double,
 double DehnenSmoothWrapperPotentialPlanarRphideriv(double,double,double,
 						   struct potentialArg *);
 //SolidBodyRotationWrapperPotential
+double SolidBodyRotationWrapperPotentialEval(double,double,double,double,
+					     struct potentialArg *);
 double SolidBodyRotationWrapperPotentialRforce(double,double,double,double,
 					struct potentialArg *);
 double SolidBodyRotationWrapperPotentialphiforce(double,double,double,double,
@@ -451,6 +506,46 @@ double SolidBodyRotationWrapperPotentialPlanarphi2deriv(double,double,double,
 						   struct potentialArg *);
 double SolidBodyRotationWrapperPotentialPlanarRphideriv(double,double,double,
 						   struct potentialArg *);
+//FerrersPotential
+double FerrersPotentialEval(double,double,double,double,
+			    struct potentialArg *);
+double FerrersPotentialRforce(double,double,double,double,
+			      struct potentialArg *);
+double FerrersPotentialzforce(double,double,double,double,
+			      struct potentialArg *);
+double FerrersPotentialphiforce(double,double,double,double,
+				struct potentialArg *);
+double FerrersPotentialPlanarRforce(double,double,double,
+				    struct potentialArg *);
+double FerrersPotentialPlanarphiforce(double,double,double,
+				      struct potentialArg *);
+//MovingObjectPotential
+void initMovingObjectSplines(struct potentialArg *, double **);
+double MovingObjectPotentialEval(double,double,double,double,
+				 struct potentialArg *);
+double MovingObjectPotentialRforce(double,double,double,double,
+				   struct potentialArg *);
+double MovingObjectPotentialzforce(double,double,double,double,
+				   struct potentialArg *);
+double MovingObjectPotentialphiforce(double,double,double,double,
+				     struct potentialArg *);
+double MovingObjectPotentialPlanarRforce(double,double,double,
+					 struct potentialArg *);
+double MovingObjectPotentialPlanarphiforce(double,double,double,
+					   struct potentialArg *);
+//RazorThinExponentialDiskPotential
+double RazorThinExponentialDiskPotentialEval(double,double,double,double,
+					     struct potentialArg *);
+double RazorThinExponentialDiskPotentialRforce(double,double,double,double,
+					       struct potentialArg *);
+double RazorThinExponentialDiskPotentialzforce(double,double,double,double,
+					       struct potentialArg *);
+double RazorThinExponentialDiskPotentialPlanarRforce(double,double,double,
+						     struct potentialArg *);
+double RazorThinExponentialDiskPotentialPlanarR2deriv(double,double,double,
+						      struct potentialArg *);
+//KGPotential (linear)
+double KGPotentialLinearForce(double,double,struct potentialArg *);
 #ifdef __cplusplus
 }
 #endif
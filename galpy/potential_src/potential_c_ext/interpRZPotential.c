@@ -61,3 +61,35 @@ double interpRZPotentialzforce(double R,double z, double phi,
 					      potentialArgs->accxzforce,
 					      potentialArgs->accyzforce);
 }
+double interpRZPotentialPlanarRforce(double R,double phi,double t,
+				     struct potentialArg * potentialArgs){
+  return interpRZPotentialRforce(R,0.,phi,t,potentialArgs);
+}
+double interpRZPotentialPlanarR2deriv(double R,double phi,double t,
+				      struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  //Get args
+  double y, grad[2];
+  double amp= *args++;
+  int logR= (int) *args;
+  double * xa= potentialArgs->i2drforce->xa;
+  double * ya= potentialArgs->i2drforce->ya;
+  int size1= potentialArgs->i2drforce->size1;
+  int size2= potentialArgs->i2drforce->size2;
+  //z=0, clamped to the grid like in interp_2d_eval_cubic_bspline
+  double z= ( ya[0] > 0. ) ? ya[0] : ( ( ya[size2-1] < 0. ) ? ya[size2-1] : 0.);
+  if ( logR == 1)
+    y= ( R > 0. ) ? log(R): -20.72326583694641;
+  else
+    y= R;
+  //Outside of the grid the force is constant
+  if ( y < xa[0] || y > xa[size1-1] ) return 0.;
+  //Derivative of the Rforce interpolation
+  interp_2d_eval_grad_cubic_bspline(potentialArgs->i2drforce,y,z,grad,
+				    potentialArgs->accxrforce,
+				    potentialArgs->accyrforce);
+  if ( logR == 1 )
+    return - amp * grad[0] / R;
+  else
+    return - amp * grad[0];
+}
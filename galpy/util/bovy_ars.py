@@ -29,6 +29,8 @@
 import scipy as sc
 import scipy.stats as stats
 import math as m
+_NBATCHMIN= 10 # number of candidates in the first batch
+_MINACCRATE= 0.1 # smallest acceptance rate used to size the next batch
 
 #TO DO:
 #Throw errors in the sample_hull routine
@@ -41,6 +43,10 @@ def bovy_ars(domain,isDomainFinite,abcissae,hx,hpx,nsamples=1,
     Based on Wild & Gilks (1993), Algorithm AS 287: Adaptive Rejection
     Sampling from Log-concave Density Functions, Applied Statistics, 42, 701
 
+    Candidates are drawn from the upper hull and accepted or rejected in
+    batches, the hull is refined with the function evaluations of each
+    batch before drawing the next batch
+
     Input:
 
        domain          - [.,.] upper and lower limit to the domain
@@ -63,6 +69,10 @@ def bovy_ars(domain,isDomainFinite,abcissae,hx,hpx,nsamples=1,
 
        list with nsamples of samples from exp(h(x))
 
+    Raises:
+
+       ValueError if the upper hull is not normalizable (e.g., when the abcissae do not lie on either side of the peak in hx for an unbounded domain)
+
     External dependencies:
 
        math
@@ -71,16 +81,58 @@ def bovy_ars(domain,isDomainFinite,abcissae,hx,hpx,nsamples=1,
 
     History:
        2009-05-21 - Written - Bovy (NYU)
+       2017-11-03 - Sample in batches - agent
+       2017-11-17 - Raise ValueError for a non-normalizable hull - agent
     """
     #First set-up the upper and lower hulls
     hull=setup_hull(domain,isDomainFinite,abcissae,hx,hpx,hxparams)
-    #Then start  sampling: call sampleone repeatedly
+    if (not isDomainFinite[0] and not hull[3][0] > 0.) \
+            or (not isDomainFinite[1] and not hull[3][-1] < 0.):
+        raise ValueError("Upper hull is not normalizable; for an unbounded domain, the abcissae must lie on either side of the peak in hx")
+    #Then start sampling in batches, starting with small batches such that
+    #the hull is refined quickly
+    nsamples= int(nsamples)
     out= []
+    nout= 0
     nupdates= 0
-    for ii in range(int(nsamples)):
-        thissample, hull, nupdates= sampleone(hull,hx,hpx,domain,isDomainFinite,maxn,nupdates,hxparams)
-        out.append(thissample)
-    return out
+    nbatch= _NBATCHMIN
+    accrate= 1.
+    while nout < nsamples:
+        ncandidates= int(min(nbatch,m.ceil((nsamples-nout)/accrate)+1))
+        candidates= sample_hull_batch(hull,domain,isDomainFinite,ncandidates)
+        thishux, thishlx= evaluate_hull_batch(candidates,hull)
+        u= stats.uniform.rvs(size=ncandidates)
+        #Squeezing test, for the others we need to evaluate h(x)
+        accept= u < sc.exp(thishlx-thishux)
+        evalindx= sc.arange(ncandidates)[True^accept]
+        thishx= sc.array([hx(candidates[ii],hxparams) for ii in evalindx])
+        if len(evalindx) > 0:
+            accept[evalindx]= u[evalindx] < sc.exp(thishx-thishux[evalindx])
+        out.append(candidates[accept])
+        nout+= sc.sum(accept)
+        accrate= max(sc.sum(accept)/float(ncandidates),_MINACCRATE)
+        nbatch*= 2
+        #Update the hull with the new function evaluations
+        if nupdates < maxn and len(evalindx) > 0:
+            newindx= sc.isfinite(thishx)\
+                *(True^sc.in1d(candidates[evalindx],hull[1]))
+            newxs, uniqindx= sc.unique(candidates[evalindx][newindx],
+                                       return_index=True)
+            newhxs= thishx[newindx][uniqindx]
+            if len(newxs) > maxn-nupdates: #spread the updates over the domain
+                keep= sc.unique(sc.linspace(0,len(newxs)-1,
+                                            maxn-nupdates).astype('int'))
+                newxs, newhxs= newxs[keep], newhxs[keep]
+            if len(newxs) > 0:
+                newhpxs= sc.array([hpx(x,hxparams) for x in newxs])
+                xs= sc.concatenate((hull[1],newxs))
+                sortindx= sc.argsort(xs)
+                hull= _hull_from_xs(xs[sortindx],
+                                    sc.concatenate((hull[2],newhxs))[sortindx],
+                                    sc.concatenate((hull[3],newhpxs))[sortindx],
+                                    domain,isDomainFinite)
+                nupdates+= len(newxs)
+    return list(sc.concatenate(out)[:nsamples])
 
 def setup_hull(domain,isDomainFinite,abcissae,hx,hpx,hxparams):
     """setup_hull: set up the upper and lower hull and everything that
@@ -108,40 +160,48 @@ def setup_hull(domain,isDomainFinite,abcissae,hx,hpx,hxparams):
     History:
        2009-05-21 - Written - Bovy (NYU)
     """
-    nx= len(abcissae)
-    #Create the output arrays
-    xs= sc.zeros(nx)
-    hxs= sc.zeros(nx)
-    hpxs= sc.zeros(nx)
-    zs= sc.zeros(nx-1)
-    scum= sc.zeros(nx-1)
-    hus= sc.zeros(nx-1)
-    #Function evaluations
     xs= sc.sort(abcissae)
-    for ii in range(nx):
-        hxs[ii]= hx(xs[ii],hxparams)
-        hpxs[ii]= hpx(xs[ii],hxparams)
+    hxs= sc.array([hx(x,hxparams) for x in xs])
+    hpxs= sc.array([hpx(x,hxparams) for x in xs])
     #THERE IS NO CHECKING HERE TO SEE WHETHER IN THE INFINITE DOMAIN CASE
     #WE HAVE ABCISSAE ON BOTH SIDES OF THE PEAK
+    return _hull_from_xs(xs,hxs,hpxs,domain,isDomainFinite)
+
+def _hull_from_xs(xs,hxs,hpxs,domain,isDomainFinite):
+    """_hull_from_xs: set up the hull from sorted abcissae and the
+    function evaluations at them
+
+    Input:
+       xs              - sorted abcissae
+       hxs             - h(xs)
+       hpxs            - hp(xs)
+       domain          - [.,.] upper and lower limit to the domain
+       isDomainFinite  - [.,.] is there a lower/upper limit to the domain?
+
+    Output:
+       hull (see setup_hull for a definition)
+
+    History:
+       2017-11-03 - Written based on setup_hull - agent
+    """
+    nx= len(xs)
     #zi
-    for jj in range(nx-1):
-        zs[jj]= (hxs[jj+1]-hxs[jj]-xs[jj+1]*hpxs[jj+1]+xs[jj]*hpxs[jj])/(
-            hpxs[jj]-hpxs[jj+1])
+    zs= (hxs[1:]-hxs[:-1]-xs[1:]*hpxs[1:]+xs[:-1]*hpxs[:-1])\
+        /(hpxs[:-1]-hpxs[1:])
     #hu
-    for jj in range(nx-1):
-        hus[jj]= hpxs[jj]*(zs[jj]-xs[jj])+hxs[jj]
+    hus= hpxs[:-1]*(zs-xs[:-1])+hxs[:-1]
     #Calculate cu and scum
+    scum= sc.zeros(nx-1)
     if isDomainFinite[0]:
         scum[0]= 1./hpxs[0]*(m.exp(hus[0])-m.exp(
             hpxs[0]*(domain[0]-xs[0])+hxs[0]))
     else:
         scum[0]= 1./hpxs[0]*m.exp(hus[0])
     if nx > 2:
-        for jj in range(nx-2):
-            if hpxs[jj+1] == 0.:
-                scum[jj+1]= (zs[jj+1]-zs[jj])*m.exp(hxs[jj+1])
-            else:
-                scum[jj+1]=1./hpxs[jj+1]*(m.exp(hus[jj+1])-m.exp(hus[jj]))
+        flat= hpxs[1:-1] == 0.
+        with sc.errstate(divide='ignore',invalid='ignore'):
+            scum[1:]= sc.where(flat,(zs[1:]-zs[:-1])*sc.exp(hxs[1:-1]),
+                               (sc.exp(hus[1:])-sc.exp(hus[:-1]))/hpxs[1:-1])
     if isDomainFinite[1]:
         cu=1./hpxs[nx-1]*(m.exp(hpxs[nx-1]*(
             domain[1]-xs[nx-1])+hxs[nx-1]) - m.exp(hus[nx-2]))
@@ -157,7 +217,6 @@ def setup_hull(domain,isDomainFinite,abcissae,hx,hpx,hxparams):
     out.append(zs)
     out.append(scum)
     out.append(hus)
-
     return out
 
 def sampleone(hull,hx,hpx,domain,isDomainFinite,maxn,nupdates,hxparams):
@@ -291,6 +350,82 @@ def evaluate_hull(x,hull):
             hlx= ((hull[1][indx+2]-x)*hull[2][indx+1]+(x-hull[1][indx+1])*hull[2][indx+2])/(hull[1][indx+2]-hull[1][indx+1])
     return hux, hlx
     
+def sample_hull_batch(hull,domain,isDomainFinite,n):
+    """sample_hull_batch: Sample n points from the upper hull at once
+
+    Input:
+       hull            - hull structure (see setup_hull for a definition of this)
+       domain          - [.,.] upper and lower limit to the domain
+       isDomainFinite  - [.,.] is there a lower/upper limit to the domain?
+       n               - number of samples
+
+    Output:
+       array of n samples from the hull
+
+    Raises:
+       ValueError if a flat segment at an infinite end of the domain is sampled, as the hull is then not normalizable
+
+    History:
+       2017-11-03 - Written based on sample_hull - agent
+    """
+    cu, xs, hxs, hpxs, zs, scum, hus= hull
+    u= stats.uniform.rvs(size=n)
+    #Segment k of the upper hull is the tangent at xs[k] between zs[k-1]
+    #and zs[k]
+    k= sc.searchsorted(scum,u)
+    # The cumulative mass and the value of the hull at the left edge of
+    # the segment (first segment: right edge, which works for infinite
+    # domains)
+    first= k == 0
+    km1= sc.clip(k-1,0,len(zs)-1)
+    edge= sc.where(first,zs[0],zs[km1])
+    du= sc.where(first,u-scum[0],u-scum[km1])
+    huedge= sc.where(first,hus[0],hus[km1])
+    thishpx= hpxs[k]
+    with sc.errstate(divide='ignore',invalid='ignore'):
+        out= edge+1./thishpx*sc.log(1.+thishpx*cu*du/sc.exp(huedge))
+    #Flat segments are sampled uniformly
+    flat= thishpx == 0.
+    if sc.any(flat):
+        if isDomainFinite[0]:
+            out[flat*first]= domain[0]+u[flat*first]/scum[0]\
+                *(zs[0]-domain[0])
+        elif sc.any(flat*first):
+            raise ValueError("Upper hull has a flat segment at the infinite lower end of the domain and is therefore not normalizable")
+        last= (k == len(scum))*(True^first)
+        if isDomainFinite[1]:
+            out[flat*last]= zs[-1]+du[flat*last]/(1.-scum[-1])\
+                *(domain[1]-zs[-1])
+        elif sc.any(flat*last):
+            raise ValueError("Upper hull has a flat segment at the infinite upper end of the domain and is therefore not normalizable")
+        mid= flat*(True^first)*(True^last)
+        out[mid]= edge[mid]+du[mid]/(scum[k[mid]]-scum[km1[mid]])\
+            *(zs[k[mid]]-zs[km1[mid]])
+    return out
+
+def evaluate_hull_batch(x,hull):
+    """evaluate_hull_batch: evaluate h_u(x) and h_l(x) for an array of x
+
+    Input:
+       x     - array of abcissae
+       hull  - the hull (see setup_hull for a definition)
+
+    Output:
+      hu(x), hl(x)
+
+    History:
+       2017-11-03 - Written based on evaluate_hull - agent
+    """
+    cu, xs, hxs, hpxs, zs, scum, hus= hull
+    #Upper hull: tangent at xs[k] for zs[k-1] < x <= zs[k]
+    k= sc.searchsorted(zs,x)
+    hux= hpxs[k]*(x-xs[k])+hxs[k]
+    #Lower hull: chord between xs[j] and xs[j+1]
+    j= sc.clip(sc.searchsorted(xs,x,side='right')-1,0,len(xs)-2)
+    hlx= ((xs[j+1]-x)*hxs[j]+(x-xs[j])*hxs[j+1])/(xs[j+1]-xs[j])
+    hlx[(x < xs[0])+(x > xs[-1])]= -sc.inf
+    return hux, hlx
+
 def update_hull(hull,newx,newhx,newhpx,domain,isDomainFinite):
     """update_hull: update the hull with a new function evaluation
 
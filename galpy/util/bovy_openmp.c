@@ -0,0 +1,40 @@
+/*
+  Thread-count and scheduling configuration for the OpenMP-parallel loops
+  in galpy's C extensions; loops use schedule(runtime) and call
+  galpy_openmp_schedule with their default schedule just before
+*/
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#include <bovy_openmp.h>
+static int galpy_schedule= GALPY_SCHEDULE_DEFAULT;
+static int galpy_chunk= 0;
+#ifdef _OPENMP
+static int galpy_default_nthreads= 0;
+#endif
+/*
+  set_galpy_openmp: set the number of threads (<= 0: OpenMP's default) and
+  the schedule (GALPY_SCHEDULE_...) and chunk size (<= 0: the loop's
+  default chunk size) used by all parallel loops called from this thread
+*/
+void set_galpy_openmp(int nthreads,int schedule,int chunk){
+#ifdef _OPENMP
+  if ( galpy_default_nthreads == 0 )
+    galpy_default_nthreads= omp_get_max_threads();
+  omp_set_num_threads( nthreads > 0 ? nthreads : galpy_default_nthreads);
+#endif
+  galpy_schedule= schedule;
+  galpy_chunk= chunk;
+}
+/*
+  galpy_openmp_schedule: set the runtime schedule for the next parallel loop,
+  using the configured schedule and chunk size where set and the given
+  (loop-default) schedule and chunk size otherwise
+*/
+void galpy_openmp_schedule(int schedule,int chunk){
+#ifdef _OPENMP
+  if ( galpy_schedule != GALPY_SCHEDULE_DEFAULT ) schedule= galpy_schedule;
+  if ( galpy_chunk > 0 ) chunk= galpy_chunk;
+  omp_set_schedule((omp_sched_t) schedule,chunk);
+#endif
+}
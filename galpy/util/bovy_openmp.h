@@ -0,0 +1,26 @@
+/*
+  Thread-count and scheduling configuration for the OpenMP-parallel loops
+  in galpy's C extensions, set from galpy.util.config
+*/
+#ifndef __BOVY_OPENMP_H__
+#define __BOVY_OPENMP_H__
+#ifdef __cplusplus
+extern "C" {
+#endif
+/*
+  Schedules, the same as OpenMP's omp_sched_t; GALPY_SCHEDULE_DEFAULT lets
+  each loop use its own default schedule
+*/
+#define GALPY_SCHEDULE_DEFAULT 0
+#define GALPY_SCHEDULE_STATIC 1
+#define GALPY_SCHEDULE_DYNAMIC 2
+#define GALPY_SCHEDULE_GUIDED 3
+/*
+  Function declarations
+*/
+void set_galpy_openmp(int,int,int);
+void galpy_openmp_schedule(int,int);
+#ifdef __cplusplus
+}
+#endif
+#endif /* bovy_openmp.h */
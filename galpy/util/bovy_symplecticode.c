@@ -31,6 +31,7 @@ POSSIBILITY OF SUCH DAMAGE.
 */
 #include <stdio.h>
 #include <stdlib.h>
+#include <string.h>
 #include <math.h>
 #include "signal.h"
 #include <bovy_symplecticode.h>
@@ -40,6 +41,23 @@ void handle_sigint(int signum)
 {
   interrupted= 1;
 }
+/*
+  Install handle_sigint once around a (parallel) loop over integrations;
+  the integrators only read interrupted, the previous handler is stored in
+  oldaction and put back by restore_sigint_handler
+*/
+void install_sigint_handler(struct sigaction * oldaction)
+{
+  struct sigaction action;
+  memset(&action, 0, sizeof(struct sigaction));
+  action.sa_handler= handle_sigint;
+  interrupted= 0; // need to reset, bc library and vars stay in memory
+  sigaction(SIGINT,&action,oldaction);
+}
+void restore_sigint_handler(struct sigaction * oldaction)
+{
+  sigaction(SIGINT,oldaction,NULL);
+}
 inline void leapfrog_leapq(int dim, double *q,double *p,double dt,double *qn){
   int ii;
   for (ii=0; ii < dim; ii++) (*qn++)= (*q++) +dt * (*p++);
@@ -111,15 +129,11 @@ void leapfrog(void (*func)(double t, double *q, double *a,
   long ndt= (long) (init_dt/dt);
   //Integrate the system
   double to= *t;
-  // Handle KeyboardInterrupt gracefully
-  struct sigaction action;
-  memset(&action, 0, sizeof(struct sigaction));
-  action.sa_handler= handle_sigint;
-  sigaction(SIGINT,&action,NULL);
+  // KeyboardInterrupt: the caller installs handle_sigint (see
+  // install_sigint_handler), such that interrupted is only read here
   for (ii=0; ii < (nt-1); ii++){
     if ( interrupted ) {
       *err= -10;
-      interrupted= 0; // need to reset, bc library and vars stay in memory
       break;
     }
     //drift half
@@ -149,9 +163,6 @@ void leapfrog(void (*func)(double t, double *q, double *a,
     save_qp(dim,qo,po,result);
     result+= 2 * dim;
   }
-  // Back to default handler
-  action.sa_handler= SIG_DFL;
-  sigaction(SIGINT,&action,NULL);
   //Free allocated memory
   free(qo);
   free(po);
@@ -225,15 +236,11 @@ void symplec4(void (*func)(double t, double *q, double *a,
   long ndt= (long) (init_dt/dt);
   //Integrate the system
   double to= *t;
-  // Handle KeyboardInterrupt gracefully
-  struct sigaction action;
-  memset(&action, 0, sizeof(struct sigaction));
-  action.sa_handler= handle_sigint;
-  sigaction(SIGINT,&action,NULL);
+  // KeyboardInterrupt: the caller installs handle_sigint (see
+  // install_sigint_handler), such that interrupted is only read here
   for (ii=0; ii < (nt-1); ii++){
     if ( interrupted ) {
       *err= -10;
-      interrupted= 0; // need to reset, bc library and vars stay in memory
       break;
     }
     //drift for c1*dt
@@ -290,9 +297,6 @@ void symplec4(void (*func)(double t, double *q, double *a,
     save_qp(dim,qo,po,result);
     result+= 2 * dim;
   }
-  // Back to default handler
-  action.sa_handler= SIG_DFL;
-  sigaction(SIGINT,&action,NULL);
   //Free allocated memory
   free(qo);
   free(po);
@@ -374,15 +378,11 @@ void symplec6(void (*func)(double t, double *q, double *a,
   long ndt= (long) (init_dt/dt);
   //Integrate the system
   double to= *t;
-  // Handle KeyboardInterrupt gracefully
-  struct sigaction action;
-  memset(&action, 0, sizeof(struct sigaction));
-  action.sa_handler= handle_sigint;
-  sigaction(SIGINT,&action,NULL);
+  // KeyboardInterrupt: the caller installs handle_sigint (see
+  // install_sigint_handler), such that interrupted is only read here
   for (ii=0; ii < (nt-1); ii++){
     if ( interrupted ) {
       *err= -10;
-      interrupted= 0; // need to reset, bc library and vars stay in memory
       break;
     }
     //drift for c1*dt
@@ -487,9 +487,6 @@ void symplec6(void (*func)(double t, double *q, double *a,
     save_qp(dim,qo,po,result);
     result+= 2 * dim;
   }
-  // Back to default handler
-  action.sa_handler= SIG_DFL;
-  sigaction(SIGINT,&action,NULL);
   //Free allocated memory
   free(qo);
   free(po);
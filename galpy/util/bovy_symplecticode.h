@@ -44,6 +44,8 @@ extern volatile sig_atomic_t interrupted;
   Function declarations
 */
 void handle_sigint(int);
+void install_sigint_handler(struct sigaction *);
+void restore_sigint_handler(struct sigaction *);
 void leapfrog(void (*func)(double, double *, double *,
 			   int, struct potentialArg *),
 	      int,
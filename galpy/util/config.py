@@ -1,4 +1,5 @@
 import os, os.path
+import ctypes
 try:
     import configparser
 except:
@@ -13,7 +14,10 @@ default_configuration= {'normalization': {'ro':'8.',
                                          'vo':'220.'},
                         'astropy': {'astropy-units':'False',
                                     'astropy-coords':'True'},
-                        'plot': {'seaborn-bovy-defaults':'False'}}
+                        'plot': {'seaborn-bovy-defaults':'False'},
+                        'openmp': {'nthreads':'0',
+                                   'schedule':'default',
+                                   'chunk':'0'}}
 default_filename= os.path.join(os.path.expanduser('~'),'.galpyrc')
 def check_config(configuration):
     # Check that the configuration is a valid galpy configuration
@@ -88,3 +92,48 @@ def set_vo(vo):
     if _APY_LOADED and isinstance(vo,units.Quantity):
         vo= vo.to(units.km/units.s).value
     __config__.set('normalization','vo',str(vo))
+
+# OpenMP configuration of the C extensions
+_OPENMP_SCHEDULES= {'default':0,'static':1,'dynamic':2,'guided':3}
+_openmp_libs= {} # by handle, each library is loaded by several modules
+def set_openmp(nthreads=None,schedule=None,chunk=None):
+    """
+    NAME:
+       set_openmp
+    PURPOSE:
+       set the global configuration of the OpenMP-parallel loops in the C extensions (orbit integration, action-angle calculations, ...)
+    INPUT:
+       nthreads= (None) maximum number of threads to use (0: OpenMP's default, typically the number of cores)
+       schedule= (None) 'static', 'dynamic', 'guided', or 'default' (each loop's own default; 'dynamic' is typically better for very uneven work, e.g., orbits near the escape energy)
+       chunk= (None) chunk size for the schedule (0: each loop's default)
+       (None: leave unchanged)
+    OUTPUT:
+       (none)
+    HISTORY:
+       2017-10-30 - Written - agent
+    """
+    if not schedule is None and not schedule.lower() in _OPENMP_SCHEDULES:
+        raise ValueError("OpenMP schedule %s not understood; should be one of %s" % (schedule,', '.join(sorted(_OPENMP_SCHEDULES.keys()))))
+    if not nthreads is None:
+        __config__.set('openmp','nthreads',str(int(nthreads)))
+    if not schedule is None:
+        __config__.set('openmp','schedule',schedule.lower())
+    if not chunk is None:
+        __config__.set('openmp','chunk',str(int(chunk)))
+    for lib in _openmp_libs.values():
+        _set_openmp_lib(lib)
+    return None
+
+def _register_openmp_lib(lib):
+    """Register a loaded C extension, such that it uses the OpenMP configuration"""
+    _openmp_libs[lib._handle]= lib
+    _set_openmp_lib(lib)
+    return None
+
+def _set_openmp_lib(lib):
+    lib.set_galpy_openmp(\
+        ctypes.c_int(__config__.getint('openmp','nthreads')),
+        ctypes.c_int(_OPENMP_SCHEDULES[\
+                __config__.get('openmp','schedule').lower()]),
+        ctypes.c_int(__config__.getint('openmp','chunk')))
+    return None
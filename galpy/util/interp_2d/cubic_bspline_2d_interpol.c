@@ -86,7 +86,23 @@ extern double	cubic_bspline_2d_interpol
     
 	return(interpolated);
 }
-// LCOV_EXCL_START
+/*--------------------------------------------------------------------------*/
+/* mirror boundary conditions for index k of an array of length n */
+static long	cubic_bspline_2d_mirror
+(
+    long	k,
+    long	n
+)
+
+{
+	long	n2 = 2L * n - 2L;
+	if (n == 1L)
+		return(0L);
+	k = (k < 0L) ? (-k - n2 * ((-k) / n2)) : (k - n2 * (k / n2));
+	if (n <= k)
+		k = n2 - k;
+	return(k);
+}
 /*--------------------------------------------------------------------------*/
 extern double	cubic_bspline_2d_interpol_dx
 (
@@ -100,19 +116,17 @@ extern double	cubic_bspline_2d_interpol_dx
 { /* begin InterpolatedValue */
 
     int spline_degree = 3;
-	//double	*p;
 	long	x_index[3], y_index[4];
 	double	x_weight[3], y_weight[4];
 		
 	double	interpolated;
-	double	w/*, w2, w4, t, t0, t1*/;
+	double	w;
 	
-	long	width2 = 2L * width - 2L, height2 = 2L * height - 2L;
-	long	i, j, k;
+	long	i, j, k, yj;
 
 	/* compute the interpolation indexes */
-	/* here we have to calculate B^2(x-j+0.5) */
-	i = (long)floor(x+1) - (spline_degree-1) / 2L;
+	/* the derivative is sum_k (c_k - c_{k-1}) B^2(x-k+0.5), with k = floor(x) + {0,1,2} */
+	i = (long)floor(x);
 	j = (long)floor(y) - spline_degree / 2L;
 	for (k = 0L; k <= spline_degree; k++)
 	{
@@ -137,43 +151,19 @@ extern double	cubic_bspline_2d_interpol_dx
 	y_weight[2] = w + y_weight[0] - 2.0 * y_weight[3];
 	y_weight[1] = 1.0 - y_weight[0] - y_weight[2] - y_weight[3];		
 
-	/* apply the mirror boundary conditions */
-    for (k = 0L; k <= spline_degree; k++)
-    {
-        if(k<spline_degree)
-        {
-            x_index[k] = (width == 1L) ? (0L) : ((x_index[k] < 0L) ? (-x_index[k] - width2 * ((-x_index[k]) / width2)) : (x_index[k] - width2 * (x_index[k] / width2)));
-            if (width <= x_index[k])
-            {
-                x_index[k] = width2 - x_index[k];
-            }
-        }
-        
-        y_index[k] = (height == 1L) ? (0L) : ((y_index[k] < 0L) ?(-y_index[k] - height2 * ((-y_index[k]) / height2)) : (y_index[k] - height2 * (y_index[k] / height2)));
-        if (height <= y_index[k])
-        {
-            y_index[k] = height2 - y_index[k];
-        }
-    }
-
-	/* perform interpolation */
+	/* perform interpolation, applying the mirror boundary conditions to
+	   both k and k-1 */
 	interpolated = 0.0;
-	/*for (j = 0L; j <= spline_degree; j++) {
-		p = coeffs + (ptrdiff_t)(y_index[j] * width);
-		w = 0.0;
-		for (i = 0L; i < spline_degree; i++) {
-			w += (p[x_index[i]] - p[x_index[i-1]]) * x_weight[i];
-		}
-		interpolated += y_weight[j] * w;
-	}*/
-	
-	for(i=0L; i<spline_degree; i++)
+	for(j=0L; j<=spline_degree; j++)
 	{
-	    for(j=0L; j<=spline_degree; j++)
+	    yj = cubic_bspline_2d_mirror(y_index[j],height);
+	    for(i=0L; i<spline_degree; i++)
 	    {
-	      interpolated += ( coeffs[x_index[i]*width+y_index[j]] - coeffs[(x_index[i]-1)*width+y_index[j]] ) * x_weight[i] * y_weight[j]; //these widths might have to be heights, like in the function above
+	        interpolated += ( coeffs[cubic_bspline_2d_mirror(x_index[i],width)*height+yj]
+				  - coeffs[cubic_bspline_2d_mirror(x_index[i]-1L,width)*height+yj] )
+		  * x_weight[i] * y_weight[j];
 	    }
-    }
+	}
 
 	return(interpolated);
 }
@@ -191,20 +181,18 @@ extern double	cubic_bspline_2d_interpol_dy
 { /* begin InterpolatedValue */
 
     int spline_degree = 3;
-	//double	*p;
 	long	x_index[4], y_index[3];
 	double	x_weight[4], y_weight[3];
 		
 	double	interpolated;
-	double	w/*, w2, w4, t, t0, t1*/;
+	double	w;
 	
-	long	width2 = 2L * width - 2L, height2 = 2L * height - 2L;
-	long	i, j, k;
+	long	i, j, k, xi;
 
 	/* compute the interpolation indexes */
-	/* here we have to calculate B^2(y-j+0.5) */
+	/* the derivative is sum_k (c_k - c_{k-1}) B^2(y-k+0.5), with k = floor(y) + {0,1,2} */
 	i = (long)floor(x) - spline_degree / 2L;
-	j = (long)floor(y+1) - (spline_degree-1) / 2L;
+	j = (long)floor(y);
 	for (k = 0L; k <= spline_degree; k++)
 	{
 	    x_index[k] = i++;
@@ -222,51 +210,25 @@ extern double	cubic_bspline_2d_interpol_dy
 	x_weight[0] = (1.0 / 6.0) + (1.0 / 2.0) * w * (w - 1.0) - x_weight[3];
 	x_weight[2] = w + x_weight[0] - 2.0 * x_weight[3];
 	x_weight[1] = 1.0 - x_weight[0] - x_weight[2] - x_weight[3];
-	/* y */
+	/* y + 0.5 */
 	w = y +0.5 - (double)y_index[1];
 	y_weight[1] = 3.0 / 4.0 - w * w;
 	y_weight[2] = (1.0 / 2.0) * (w - y_weight[1] + 1.0);
 	y_weight[0] = 1.0 - y_weight[1] - y_weight[2];
 
-	/* apply the mirror boundary conditions */
-    for (k = 0L; k <= spline_degree; k++)
-    {
-        
-        x_index[k] = (width == 1L) ? (0L) : ((x_index[k] < 0L) ? (-x_index[k] - width2 * ((-x_index[k]) / width2)) : (x_index[k] - width2 * (x_index[k] / width2)));
-        if (width <= x_index[k])
-        {
-            x_index[k] = width2 - x_index[k];
-        }
-        
-        if(k<spline_degree)
-        {
-            y_index[k] = (height == 1L) ? (0L) : ((y_index[k] < 0L) ?(-y_index[k] - height2 * ((-y_index[k]) / height2)) : (y_index[k] - height2 * (y_index[k] / height2)));
-            if (height <= y_index[k])
-            {
-                y_index[k] = height2 - y_index[k];
-            }
-        }
-    }
-
-	/* perform interpolation */
+	/* perform interpolation, applying the mirror boundary conditions to
+	   both k and k-1 */
 	interpolated = 0.0;
-	/*for (j = 0L; j <= spline_degree; j++) {
-		p = coeffs + (ptrdiff_t)(y_index[j] * width);
-		w = 0.0;
-		for (i = 0L; i < spline_degree; i++) {
-			w += (p[x_index[i]] - p[x_index[i-1]]) * x_weight[i];
-		}
-		interpolated += y_weight[j] * w;
-	}*/
-	
 	for(i=0L; i<=spline_degree; i++)
 	{
+	    xi = cubic_bspline_2d_mirror(x_index[i],width)*height;
 	    for(j=0L; j<spline_degree; j++)
 	    {
-	        interpolated += ( coeffs[x_index[i]*width+y_index[j]] - coeffs[x_index[i]*width+y_index[j]-1] ) * x_weight[i] * y_weight[j]; //these widths might have to be heights, like in the function above
+	        interpolated += ( coeffs[xi+cubic_bspline_2d_mirror(y_index[j],height)]
+				  - coeffs[xi+cubic_bspline_2d_mirror(y_index[j]-1L,height)] )
+		  * x_weight[i] * y_weight[j];
 	    }
-    }
+	}
 
 	return(interpolated);
 }
-// LCOV_EXCL_STOP
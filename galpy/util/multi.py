@@ -121,8 +121,9 @@ def run_tasks(procs, err_q, out_q, num):
     idx, result = out_q.get()
     results[idx] = result
 
-  # Remove extra dimension added by array_split
-  return list(numpy.concatenate(results))
+  # Remove extra dimension added by array_split; don't use numpy for this,
+  # because the results for different elements may have different shapes
+  return [result for chunk in results for result in chunk]
 
 
 def parallel_map(function, sequence, numcores=None):
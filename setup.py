@@ -104,7 +104,8 @@ extra_compile_args.append("-D GSL_MAJOR_VERSION=%s" % (gsl_version[0]))
 #gsl_version= ['0','0']
 
 #Orbit integration C extension
-orbit_int_c_src= ['galpy/util/bovy_symplecticode.c','galpy/util/bovy_rk.c']
+orbit_int_c_src= ['galpy/util/bovy_symplecticode.c','galpy/util/bovy_rk.c',
+                   'galpy/util/bovy_openmp.c']
 orbit_int_c_src.extend(glob.glob('galpy/potential_src/potential_c_ext/*.c'))
 orbit_int_c_src.extend(glob.glob('galpy/orbit_src/orbit_c_ext/*.c'))
 orbit_int_c_src.extend(glob.glob('galpy/util/interp_2d/*.c'))
@@ -112,6 +113,8 @@ orbit_int_c_src.extend(glob.glob('galpy/util/interp_2d/*.c'))
 orbit_libraries=['m']
 if float(gsl_version[0]) >= 1.:
     orbit_libraries.extend(['gsl','gslcblas'])
+if 'gomp' in pot_libraries: # OpenMP for integrating multiple orbits
+    orbit_libraries.append('gomp')
 
 orbit_include_dirs= ['galpy/util',
                      'galpy/util/interp_2d',
@@ -191,9 +194,14 @@ else:
 actionAngle_c_src= glob.glob('galpy/actionAngle_src/actionAngle_c_ext/*.c')
 actionAngle_c_src.extend(glob.glob('galpy/potential_src/potential_c_ext/*.c'))
 actionAngle_c_src.extend(glob.glob('galpy/util/interp_2d/*.c'))
+actionAngle_c_src.extend(['galpy/util/bovy_symplecticode.c','galpy/util/bovy_rk.c',
+                          'galpy/util/bovy_openmp.c'])
+actionAngle_c_src.append('galpy/orbit_src/orbit_c_ext/integrateFullOrbit.c')
 
 actionAngle_include_dirs= ['galpy/actionAngle_src/actionAngle_c_ext',
                            'galpy/util/interp_2d',
+                           'galpy/util/',
+                           'galpy/orbit_src/orbit_c_ext',
                            'galpy/potential_src/potential_c_ext']
 
 #Installation of this extension using the GSL may (silently) fail, if the GSL
@@ -217,7 +225,8 @@ else:
 #interppotential C extension
 interppotential_c_src= glob.glob('galpy/potential_src/potential_c_ext/*.c')
 interppotential_c_src.extend(glob.glob('galpy/potential_src/interppotential_c_ext/*.c'))
-interppotential_c_src.extend(['galpy/util/bovy_symplecticode.c','galpy/util/bovy_rk.c'])
+interppotential_c_src.extend(['galpy/util/bovy_symplecticode.c','galpy/util/bovy_rk.c',
+                              'galpy/util/bovy_openmp.c'])
 interppotential_c_src.append('galpy/actionAngle_src/actionAngle_c_ext/actionAngle.c')
 interppotential_c_src.append('galpy/orbit_src/orbit_c_ext/integrateFullOrbit.c')
 interppotential_c_src.extend(glob.glob('galpy/util/interp_2d/*.c'))
@@ -13,6 +13,10 @@ if __name__ == '__main__':
         elif sys.argv[2] == 'planar':
             o= Orbit([1.,0.1,1.1,0.1])
         o.integrate(ts,mp,method=sys.argv[1])
+    elif sys.argv[2] == 'fullmulti':
+        from galpy.orbit import integrateOrbits
+        vxvv= numpy.tile([1.,0.1,1.1,0.1,0.1,0.],(4,1))
+        integrateOrbits(vxvv,ts,mp,method=sys.argv[1])
     elif sys.argv[2] == 'planardxdv':
         o= Orbit([1.,0.1,1.1,0.1])
         o.integrate_dxdv([0.1,0.1,0.1,0.1],ts,mp,method=sys.argv[1])
@@ -298,6 +298,67 @@ def test_actionAngleSpherical_otherIsochrone_angles():
     assert daz < 10.**-6., 'actionAngleSpherical applied to isochrone potential fails for az at %g%%' % (daz*100.)
     return None
 
+#Test that the C implementation of actionAngleSpherical agrees with the Python one
+def test_actionAngleSpherical_c_vs_python():
+    from galpy.potential import NFWPotential, PlummerPotential
+    from galpy.actionAngle import actionAngleSpherical
+    from galpy.actionAngle_src.actionAngleSpherical_c import _ext_loaded
+    if not _ext_loaded: return None
+    numpy.random.seed(1)
+    nobj= 21
+    R= numpy.random.uniform(0.3,2.,nobj)
+    z= numpy.random.uniform(-1.,1.,nobj)
+    vR= 0.2*numpy.random.normal(size=nobj)
+    vT= 0.3+0.3*numpy.random.normal(size=nobj)
+    vz= 0.2*numpy.random.normal(size=nobj)
+    phi= numpy.random.uniform(0.,2.*numpy.pi,nobj)
+    for pot in [NFWPotential(normalize=1.,a=3.),
+                PlummerPotential(normalize=1.,b=0.5)]:
+        aAS= actionAngleSpherical(pot=pot)
+        assert aAS._c, 'actionAngleSpherical does not use C for a potential with a C implementation'
+        jfac= aAS.actionsFreqsAngles(R,vR,vT,z,vz,phi,c=True)
+        jfap= aAS.actionsFreqsAngles(R,vR,vT,z,vz,phi,c=False)
+        js= aAS(R,vR,vT,z,vz,c=True)
+        jfs= aAS.actionsFreqs(R,vR,vT,z,vz,c=True)
+        for ii in range(3):
+            assert numpy.all(numpy.fabs(jfac[ii]-jfap[ii]) < 10.**-8.), 'actionAngleSpherical actions in C and Python do not agree'
+            assert numpy.all(numpy.fabs(jfac[ii]-js[ii]) < 10.**-12.), 'actionAngleSpherical actions from __call__ and actionsFreqsAngles do not agree'
+        for ii in range(3,6):
+            assert numpy.all(numpy.fabs(jfac[ii]-jfap[ii]) < 10.**-5.), 'actionAngleSpherical frequencies in C and Python do not agree'
+            assert numpy.all(numpy.fabs(jfac[ii]-jfs[ii]) < 10.**-12.), 'actionAngleSpherical frequencies from actionsFreqs and actionsFreqsAngles do not agree'
+        for ii in range(6,9):
+            da= numpy.fabs((jfac[ii]-jfap[ii]+numpy.pi) % (2.*numpy.pi)-numpy.pi)
+            assert numpy.all(da < 10.**-5.), 'actionAngleSpherical angles in C and Python do not agree'
+    return None
+
+#Test that the OpenMP thread configuration does not change the C actionAngleSpherical output for a potential that caches intermediate results in its C arguments
+def test_actionAngleSpherical_openmp_c():
+    from galpy.potential import SCFPotential
+    from galpy.actionAngle import actionAngleSpherical
+    from galpy.actionAngle_src.actionAngleSpherical_c import _ext_loaded
+    from galpy.util import config
+    if not _ext_loaded: return None
+    aAS= actionAngleSpherical(pot=SCFPotential(normalize=1.,a=1.5))
+    numpy.random.seed(3)
+    nobj= 31
+    R= numpy.random.uniform(0.3,2.,nobj)
+    z= numpy.random.uniform(-1.,1.,nobj)
+    vR= 0.2*numpy.random.normal(size=nobj)
+    vT= 0.3+0.3*numpy.random.normal(size=nobj)
+    vz= 0.2*numpy.random.normal(size=nobj)
+    phi= numpy.random.uniform(0.,2.*numpy.pi,nobj)
+    try:
+        config.set_openmp(nthreads=1)
+        out= numpy.array(aAS.actionsFreqsAngles(R,vR,vT,z,vz,phi,c=True))
+        for nthreads,schedule,chunk in [(2,'dynamic',1),(4,'static',1)]:
+            config.set_openmp(nthreads=nthreads,schedule=schedule,chunk=chunk)
+            tout= numpy.array(aAS.actionsFreqsAngles(R,vR,vT,z,vz,phi,
+                                                     c=True))
+            assert numpy.amax(numpy.fabs(tout-out)) < 10.**-10., 'actionAngleSpherical gives a different result for OpenMP configuration (%i,%s,%i)' % (nthreads,schedule,chunk)
+    finally:
+        config.set_openmp(nthreads=0,schedule='default',chunk=0)
+    return None
+
 #Basic sanity checking of the actionAngleAdiabatic actions
 def test_actionAngleAdiabatic_basic_actions():
     from galpy.actionAngle import actionAngleAdiabatic
@@ -557,6 +618,28 @@ def test_actionAngleAdiabaticGrid_conserved_actions_c():
                                         -1.4,-8.,-1.7,ntimes=101)
     return None
 
+#Test that evaluating the actionAngleAdiabaticGrid interpolation in C agrees with python
+def test_actionAngleAdiabaticGrid_c_vs_python():
+    from galpy.potential import MWPotential
+    from galpy.actionAngle import actionAngleAdiabaticGrid
+    aAA= actionAngleAdiabaticGrid(pot=MWPotential,c=True,Rmax=2.,zmax=0.2)
+    numpy.random.seed(1)
+    nobj= 101
+    R= 0.5+numpy.random.uniform(size=nobj)
+    vR= 0.1*numpy.random.normal(size=nobj)
+    vT= 1.+0.1*numpy.random.normal(size=nobj)
+    z= 0.05*numpy.random.normal(size=nobj)
+    vz= 0.05*numpy.random.normal(size=nobj)
+    # Also include objects outside of the grid in R, Ez, and ER
+    R[:3]= [3.,1.,1.]
+    vR[1]= 1.5
+    vz[2]= 1.
+    jsc= aAA(R,vR,vT,z,vz)
+    jsp= aAA(R,vR,vT,z,vz,c=False)
+    assert numpy.all(numpy.fabs(jsc[0]-jsp[0]) < 10.**-8.), 'actionAngleAdiabaticGrid jr evaluated in C does not agree with python'
+    assert numpy.all(numpy.fabs(jsc[2]-jsp[2]) < 10.**-8.), 'actionAngleAdiabaticGrid jz evaluated in C does not agree with python'
+    return None
+
 #Test the actionAngleAdiabatic against an isochrone potential: actions
 def test_actionAngleAdiabaticGrid_Isochrone_actions():
     from galpy.potential import IsochronePotential
@@ -893,6 +976,31 @@ def test_actionAngleStaeckel_conserved_actions_c():
                                                 inclphi=True)
     return None
 
+#Test that the OpenMP thread and schedule configuration does not change the actionAngleStaeckel actions, frequencies, and angles
+def test_actionAngleStaeckel_openmp_c():
+    from galpy.potential import MWPotential2014
+    from galpy.actionAngle import actionAngleStaeckel
+    from galpy.util import config
+    aAS= actionAngleStaeckel(pot=MWPotential2014,c=True,delta=0.71)
+    numpy.random.seed(2)
+    nobj= 31
+    R= 1.+0.1*numpy.random.normal(size=nobj)
+    vR= 0.1*numpy.random.normal(size=nobj)
+    vT= 1.+0.1*numpy.random.normal(size=nobj)
+    z= 0.1*numpy.random.normal(size=nobj)
+    vz= 0.1*numpy.random.normal(size=nobj)
+    phi= 2.*numpy.pi*numpy.random.uniform(size=nobj)
+    out= numpy.array(aAS.actionsFreqsAngles(R,vR,vT,z,vz,phi))
+    try:
+        for nthreads,schedule,chunk in [(1,'static',0),(2,'dynamic',1),
+                                        (3,'guided',4)]:
+            config.set_openmp(nthreads=nthreads,schedule=schedule,chunk=chunk)
+            tout= numpy.array(aAS.actionsFreqsAngles(R,vR,vT,z,vz,phi))
+            assert numpy.amax(numpy.fabs(tout-out)) < 10.**-10., 'actionAngleStaeckel gives a different result for OpenMP configuration (%i,%s,%i)' % (nthreads,schedule,chunk)
+    finally:
+        config.set_openmp(nthreads=0,schedule='default',chunk=0)
+    return None
+
 #Test the actions of an actionAngleStaeckel, for a dblexp disk far away from the center
 def test_actionAngleStaeckel_conserved_actions_c_specialdblexp():
     from galpy.potential import DoubleExponentialDiskPotential
@@ -1112,6 +1220,102 @@ def test_actionAngleStaeckel_otherIsochrone_angles():
     assert daz < 10.**-4., 'actionAngleStaeckel applied to isochrone potential fails for az at %g%%' % (daz*100.)
     return None
 
+#Test that actionAngleStaeckel.xvFreqs inverts actionsFreqsAngles
+def test_actionAngleStaeckel_xvFreqs_inverse_c():
+    from galpy.potential import MWPotential2014
+    from galpy.actionAngle import actionAngleStaeckel
+    aAS= actionAngleStaeckel(pot=MWPotential2014,delta=0.45,c=True)
+    numpy.random.seed(2)
+    nobj= 21
+    R= 0.7+0.6*numpy.random.uniform(size=nobj)
+    vR= 0.15*numpy.random.normal(size=nobj)
+    vT= 1.+0.1*numpy.random.normal(size=nobj)
+    z= 0.1*numpy.random.normal(size=nobj)
+    vz= 0.1*numpy.random.normal(size=nobj)
+    phi= 2.*numpy.pi*numpy.random.uniform(size=nobj)
+    jr,lz,jz,Or,Op,Oz,ar,ap,az= aAS.actionsFreqsAngles(R,vR,vT,z,vz,phi)
+    RvR,Or2,Op2,Oz2,err= aAS.xvFreqs(jr,lz,jz,ar,ap,az)
+    assert numpy.all(err == 0), 'actionAngleStaeckel.xvFreqs did not converge'
+    for ii,x in enumerate([R,vR,vT,z,vz]):
+        assert numpy.all(numpy.fabs(RvR[:,ii]-x) < 10.**-3.), 'actionAngleStaeckel.xvFreqs does not invert actionsFreqsAngles'
+    dphi= (RvR[:,5]-phi+numpy.pi) % (2.*numpy.pi)-numpy.pi
+    assert numpy.all(numpy.fabs(dphi) < 10.**-3.), 'actionAngleStaeckel.xvFreqs does not invert actionsFreqsAngles'
+    for O,O2 in zip([Or,Op,Oz],[Or2,Op2,Oz2]):
+        assert numpy.all(numpy.fabs(O-O2) < 10.**-4.), 'actionAngleStaeckel.xvFreqs frequencies do not agree with actionsFreqsAngles'
+    # The actions and angles of the output should be those that were input
+    jr2,lz2,jz2,_,_,_,ar2,ap2,az2= aAS.actionsFreqsAngles(*RvR.T)
+    assert numpy.all(numpy.fabs(jr2-jr) < 10.**-6.), 'actionAngleStaeckel.xv does not return the input jr'
+    assert numpy.all(numpy.fabs(lz2-lz) < 10.**-10.), 'actionAngleStaeckel.xv does not return the input lz'
+    assert numpy.all(numpy.fabs(jz2-jz) < 10.**-6.), 'actionAngleStaeckel.xv does not return the input jz'
+    for a,a2 in zip([ar,ap,az],[ar2,ap2,az2]):
+        da= (a2-a+numpy.pi) % (2.*numpy.pi)-numpy.pi
+        assert numpy.all(numpy.fabs(da) < 10.**-4.), 'actionAngleStaeckel.xv does not return the input angles'
+    # A single set of actions with an array of angles
+    RvR= aAS.xv(jr[0],lz[0],jz[0],ar,ap,az)
+    assert RvR.shape == (nobj,6), 'actionAngleStaeckel.xv does not broadcast a single set of actions against an array of angles'
+    jr2,lz2,jz2= aAS(*RvR[:,:5].T)
+    assert numpy.all(numpy.fabs(jr2-jr[0]) < 10.**-6.), 'actionAngleStaeckel.xv for a single set of actions does not return the input jr'
+    assert numpy.all(numpy.fabs(jz2-jz[0]) < 10.**-6.), 'actionAngleStaeckel.xv for a single set of actions does not return the input jz'
+    return None
+
+#Test actionAngleStaeckel.xv for circular and in-plane orbits
+def test_actionAngleStaeckel_xv_circular_c():
+    from galpy.potential import MWPotential2014, rl, epifreq
+    from galpy.actionAngle import actionAngleStaeckel
+    aAS= actionAngleStaeckel(pot=MWPotential2014,delta=0.45,c=True)
+    RvR,Or,Op,Oz,err= aAS.xvFreqs(0.,1.1,0.,0.,2.,0.)
+    rg= rl(MWPotential2014,1.1)
+    assert numpy.fabs(RvR[0,0]-rg) < 10.**-8., 'actionAngleStaeckel.xv does not return the guiding-center radius for a circular orbit'
+    assert numpy.all(numpy.fabs(RvR[0,[1,3,4]]) < 10.**-10.), 'actionAngleStaeckel.xv does not return a circular orbit'
+    assert numpy.fabs(RvR[0,2]-1.1/rg) < 10.**-8., 'actionAngleStaeckel.xv does not return a circular orbit'
+    assert numpy.fabs(RvR[0,5]-2.) < 10.**-10., 'actionAngleStaeckel.xv does not return the right phi for a circular orbit'
+    assert numpy.fabs(Or[0]-epifreq(MWPotential2014,rg)) < 10.**-4., 'actionAngleStaeckel.xvFreqs does not return the epicycle frequency for a circular orbit'
+    # Exactly in-plane, eccentric orbits
+    numpy.random.seed(3)
+    nobj= 11
+    R= 0.8+0.4*numpy.random.uniform(size=nobj)
+    vR= 0.15*numpy.random.normal(size=nobj)
+    vT= 1.+0.1*numpy.random.normal(size=nobj)
+    phi= 2.*numpy.pi*numpy.random.uniform(size=nobj)
+    jr,lz,jz,Or,Op,Oz,ar,ap,az= aAS.actionsFreqsAngles(R,vR,vT,0.*R,0.*R,phi)
+    RvR,Or2,Op2,Oz2,err= aAS.xvFreqs(jr,lz,jz,ar,ap,az)
+    assert numpy.all(err == 0), 'actionAngleStaeckel.xvFreqs did not converge for in-plane orbits'
+    assert numpy.all(RvR[:,3:5] == 0.), 'actionAngleStaeckel.xvFreqs does not return z=vz=0 for in-plane orbits'
+    for ii,x in enumerate([R,vR,vT]):
+        assert numpy.all(numpy.fabs(RvR[:,ii]-x) < 10.**-3.), 'actionAngleStaeckel.xvFreqs does not invert actionsFreqsAngles for in-plane orbits'
+    dphi= (RvR[:,5]-phi+numpy.pi) % (2.*numpy.pi)-numpy.pi
+    assert numpy.all(numpy.fabs(dphi) < 10.**-3.), 'actionAngleStaeckel.xvFreqs does not invert actionsFreqsAngles for in-plane orbits'
+    for O,O2 in zip([Or,Op],[Or2,Op2]):
+        assert numpy.all(numpy.fabs(O-O2) < 10.**-4.), 'actionAngleStaeckel.xvFreqs frequencies do not agree with actionsFreqsAngles for in-plane orbits'
+    return None
+
+#Test that the C actionAngleStaeckel returns the jz --> 0 limit of the frequencies and angles for orbits exactly in the plane (used to be NaN)
+def test_actionAngleStaeckel_inplane_freqsAngles_c():
+    from galpy.potential import MWPotential2014
+    from galpy.actionAngle import actionAngleStaeckel
+    aAS= actionAngleStaeckel(pot=MWPotential2014,delta=0.45,c=True)
+    numpy.random.seed(3)
+    nobj= 11
+    R= 0.8+0.4*numpy.random.uniform(size=nobj)
+    vR= 0.15*numpy.random.normal(size=nobj)
+    vT= 1.+0.1*numpy.random.normal(size=nobj)
+    phi= 2.*numpy.pi*numpy.random.uniform(size=nobj)
+    jr,lz,jz,Or,Op,Oz,ar,ap,az= aAS.actionsFreqsAngles(R,vR,vT,0.*R,0.*R,phi)
+    assert numpy.all(jz == 0.), 'actionAngleStaeckel does not return jz=0 for an in-plane orbit'
+    for x in [Or,Op,Oz,ar,ap,az]:
+        assert not numpy.any(numpy.isnan(x)), 'actionAngleStaeckel returns NaN frequencies or angles for an in-plane orbit'
+    jrf,_,_,Orf,Opf,Ozf= aAS.actionsFreqs(R,vR,vT,0.*R,0.*R)
+    for x,xf in zip([jr,Or,Op,Oz],[jrf,Orf,Opf,Ozf]):
+        assert numpy.all(numpy.fabs(x-xf) < 10.**-10.), 'actionAngleStaeckel actionsFreqs and actionsFreqsAngles do not agree for in-plane orbits'
+    # In-plane frequencies and angles are the limit of those of orbits close to the plane
+    jrs,_,_,Ors,Ops,_,ars,aps,_= aAS.actionsFreqsAngles(R,vR,vT,0.*R+10.**-4.,0.*R,phi)
+    for x,xs in zip([jr,Or,Op],[jrs,Ors,Ops]):
+        assert numpy.all(numpy.fabs(x-xs) < 10.**-4.), 'actionAngleStaeckel in-plane actions and frequencies are not the limit of those close to the plane'
+    for a,a2 in zip([ar,ap],[ars,aps]):
+        da= (a2-a+numpy.pi) % (2.*numpy.pi)-numpy.pi
+        assert numpy.all(numpy.fabs(da) < 10.**-4.), 'actionAngleStaeckel in-plane angles are not the limit of those close to the plane'
+    return None
+
 #Basic sanity checking of the actionAngleStaeckelGrid actions (incl. conserved, bc takes a lot of time)
 def test_actionAngleStaeckelGrid_basicAndConserved_actions():
     from galpy.actionAngle import actionAngleStaeckelGrid
@@ -1167,6 +1371,33 @@ def test_actionAngleStaeckelGrid_conserved_actions_c():
                                         -1.4,-8.,-1.7,ntimes=101)
     return None
 
+#Test that evaluating the actionAngleStaeckelGrid interpolation in C agrees with python
+def test_actionAngleStaeckelGrid_c_vs_python():
+    from galpy.potential import MWPotential
+    from galpy.actionAngle import actionAngleStaeckelGrid
+    aAA= actionAngleStaeckelGrid(pot=MWPotential,delta=0.71,c=True,
+                                 Rmax=2.,nE=15,npsi=15,nLz=31)
+    numpy.random.seed(1)
+    nobj= 101
+    R= 0.5+numpy.random.uniform(size=nobj)
+    vR= 0.1*numpy.random.normal(size=nobj)
+    vT= 1.+0.1*numpy.random.normal(size=nobj)
+    z= 0.05*numpy.random.normal(size=nobj)
+    vz= 0.05*numpy.random.normal(size=nobj)
+    # Also include objects outside of the grid in Lz and E
+    R[:2]= [3.,1.]
+    vR[1]= 1.5
+    jsc= aAA(R,vR,vT,z,vz)
+    jsp= aAA(R,vR,vT,z,vz,c=False)
+    assert numpy.all(numpy.fabs(jsc[0]-jsp[0]) < 10.**-8.), 'actionAngleStaeckelGrid jr evaluated in C does not agree with python'
+    assert numpy.all(numpy.fabs(jsc[2]-jsp[2]) < 10.**-8.), 'actionAngleStaeckelGrid jz evaluated in C does not agree with python'
+    # Single object
+    jsc= aAA(R[5],vR[5],vT[5],z[5],vz[5])
+    jsp= aAA(R[5],vR[5],vT[5],z[5],vz[5],c=False)
+    assert numpy.fabs(jsc[0]-jsp[0]) < 10.**-8., 'actionAngleStaeckelGrid jr evaluated in C does not agree with python'
+    assert numpy.fabs(jsc[2]-jsp[2]) < 10.**-8., 'actionAngleStaeckelGrid jz evaluated in C does not agree with python'
+    return None
+
 #Test the setup of an actionAngleStaeckelGrid
 def test_actionAngleStaeckelGrid_setuperrs():
     from galpy.potential import MWPotential
@@ -1201,6 +1432,40 @@ def test_actionAngleStaeckelGrid_Isochrone_actions():
     assert djz < 10.**-1.2, 'actionAngleStaeckel applied to isochrone potential fails for Jz at %f%%' % (djz*100.)
     return None
 
+#Test that actionAngleStaeckelGrid grids can be saved and reloaded
+def test_actionAngleStaeckelGrid_saveload():
+    import os, shutil, tempfile, warnings
+    from galpy.potential import MWPotential
+    from galpy.actionAngle import actionAngleStaeckelGrid
+    from galpy.util import galpyWarning
+    savedir= tempfile.mkdtemp()
+    try:
+        savefilename= os.path.join(savedir,'aAG.npz')
+        aAA= actionAngleStaeckelGrid(pot=MWPotential,delta=0.71,c=True,
+                                     nE=11,npsi=11,nLz=11,
+                                     savefilename=savefilename)
+        assert os.path.exists(savefilename), 'actionAngleStaeckelGrid did not save its grids'
+        aAA2= actionAngleStaeckelGrid(pot=MWPotential,delta=0.71,c=True,
+                                      nE=11,npsi=11,nLz=11,
+                                      savefilename=savefilename,mmap=True)
+        assert isinstance(aAA2._jr,numpy.memmap), 'actionAngleStaeckelGrid grids loaded with mmap=True are not memory-mapped'
+        R,vR,vT,z,vz= 1.01, 0.05, 1.05, 0.05, 0.03
+        js= aAA(R,vR,vT,z,vz)
+        js2= aAA2(R,vR,vT,z,vz)
+        for ii in range(3):
+            assert numpy.fabs(js[ii]-js2[ii]) < 10.**-10., 'Actions from reloaded actionAngleStaeckelGrid grids differ from the original'
+        # Different delta --> grids are rebuilt
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always',galpyWarning)
+            aAA3= actionAngleStaeckelGrid(pot=MWPotential,delta=0.5,c=True,
+                                          nE=11,npsi=11,nLz=11,
+                                          savefilename=savefilename)
+            assert len(w) > 0, 'Loading actionAngleStaeckelGrid grids for a different setup did not raise a warning'
+        assert numpy.fabs(aAA3(R,vR,vT,z,vz)[0]-js[0]) > 10.**-8., 'actionAngleStaeckelGrid reused grids computed for a different delta'
+    finally:
+        shutil.rmtree(savedir)
+    return None
+
 #Test the actionAngleIsochroneApprox against an isochrone potential: actions
 def test_actionAngleIsochroneApprox_otherIsochrone_actions():
     from galpy.potential import IsochronePotential
@@ -1510,6 +1775,36 @@ def test_actionAngleIsochroneApprox_firstFlip():
         'actionAngleIsochroneApprox calculated w/ _firstFlip and w/o do not agree at %g%%' % (100.*numpy.amax(numpy.fabs((acfs-acfsfirstFlip)/acfs)))
     return None
 
+#Check that the C implementation of actionAngleIsochroneApprox agrees with the
+#Python implementation, for axisymmetric and triaxial potentials
+def test_actionAngleIsochroneApprox_c_vs_python():
+    from galpy.potential import LogarithmicHaloPotential, \
+        TriaxialNFWPotential
+    from galpy.actionAngle import actionAngleIsochroneApprox
+    from galpy.actionAngle_src.actionAngleIsochroneApprox_c import _ext_loaded
+    if not _ext_loaded: return None
+    R= numpy.array([1.,1.1,0.9])
+    vR= numpy.array([0.1,-0.2,0.05])
+    vT= numpy.array([1.1,0.9,-1.])
+    z= numpy.array([0.,0.1,-0.05])
+    vz= numpy.array([0.02,0.1,-0.03])
+    phi= numpy.array([0.,1.,4.])
+    for pot,ntintJ in zip([LogarithmicHaloPotential(normalize=1.,q=0.9),
+                           TriaxialNFWPotential(b=.9,c=.8,normalize=1.)],
+                          [5000,1000]):
+        aAIc= actionAngleIsochroneApprox(pot=pot,b=0.8,ntintJ=ntintJ,c=True)
+        aAIpy= actionAngleIsochroneApprox(pot=pot,b=0.8,ntintJ=ntintJ,c=False)
+        assert aAIc._c, 'actionAngleIsochroneApprox does not use C when it should'
+        jc= numpy.array(aAIc(R,vR,vT,z,vz,phi))
+        jpy= numpy.array(aAIpy(R,vR,vT,z,vz,phi))
+        assert numpy.all(numpy.fabs(jc-jpy) < 10.**-8.), \
+            'actionAngleIsochroneApprox actions in C and Python do not agree'
+        acfsc= numpy.array(aAIc.actionsFreqsAngles(R,vR,vT,z,vz,phi))
+        acfspy= numpy.array(aAIpy.actionsFreqsAngles(R,vR,vT,z,vz,phi))
+        assert numpy.all(numpy.fabs(acfsc-acfspy) < 10.**-8.), \
+            'actionAngleIsochroneApprox actions, frequencies, and angles in C and Python do not agree'
+    return None
+
 #Test the actionAngleIsochroneApprox used in Bovy (2014)
 def test_actionAngleIsochroneApprox_bovy14():   
     from galpy.potential import LogarithmicHaloPotential
@@ -2060,6 +2355,128 @@ def test_actionAngleTorus_jacobian_linear():
     assert numpy.all(numpy.fabs((xv_fromjac-xv_direct)/xv_direct) < 0.01), 'Jacobian returned by actionAngleTorus method xvJacobianFreqs does not appear to be correct'
     return None
 
+# Test that multiple tori fit in a single call agree with fitting them one by one
+def test_actionAngleTorus_multipletori():
+    from galpy.potential import MWPotential2014
+    from galpy.actionAngle import actionAngleTorus
+    aAT= actionAngleTorus(pot=MWPotential2014)
+    jr= numpy.array([0.075,0.05,0.02,0.1])
+    jphi= numpy.array([1.1,0.9,1.,1.2])
+    jz= numpy.array([0.05,0.03,0.01,0.02])
+    angler= numpy.array([[0.5,1.],[1.,2.],[1.5,3.],[2.,4.]])
+    anglephi= angler+1.
+    anglez= angler+2.
+    tol= 10.**-3.
+    # xv
+    xvs= aAT(jr,jphi,jz,angler,anglephi,anglez)
+    assert xvs.shape == (4,2,6), 'actionAngleTorus __call__ for multiple tori does not return an array of the expected shape'
+    for ii in range(len(jr)):
+        xv= aAT(jr[ii],jphi[ii],jz[ii],angler[ii],anglephi[ii],anglez[ii])
+        assert numpy.all(numpy.fabs(xvs[ii]-xv) < tol), 'actionAngleTorus __call__ for multiple tori does not agree with that for individual tori'
+    # same angles on all tori
+    xvs= aAT(jr,jphi,jz,angler[0],anglephi[0],anglez[0])
+    for ii in range(len(jr)):
+        xv= aAT(jr[ii],jphi[ii],jz[ii],angler[0],anglephi[0],anglez[0])
+        assert numpy.all(numpy.fabs(xvs[ii]-xv) < tol), 'actionAngleTorus __call__ for multiple tori with the same angles does not agree with that for individual tori'
+    # frequencies and Hessian
+    fOs= aAT.Freqs(jr,jphi,jz)
+    hOs= aAT.hessianFreqs(jr,jphi,jz)
+    for ii in range(len(jr)):
+        fO= aAT.Freqs(jr[ii],jphi[ii],jz[ii])
+        hO= aAT.hessianFreqs(jr[ii],jphi[ii],jz[ii])
+        assert numpy.all(numpy.fabs(numpy.array(fO[:3])-numpy.array([f[ii] for f in fOs[:3]])) < tol), 'actionAngleTorus Freqs for multiple tori does not agree with that for individual tori'
+        assert numpy.all(numpy.fabs(hO[0]-hOs[0][ii]) < 10.*tol), 'actionAngleTorus hessianFreqs for multiple tori does not agree with that for individual tori'
+    # Jacobian
+    jfs= aAT.xvJacobianFreqs(jr,jphi,jz,angler,anglephi,anglez)
+    for ii in range(len(jr)):
+        jf= aAT.xvJacobianFreqs(jr[ii],jphi[ii],jz[ii],
+                                angler[ii],anglephi[ii],anglez[ii])
+        assert numpy.all(numpy.fabs(jf[0]-jfs[0][ii]) < tol), 'actionAngleTorus xvJacobianFreqs for multiple tori does not agree with that for individual tori'
+        assert numpy.all(numpy.fabs(jf[1]-jfs[1][ii]) < 10.*tol), 'actionAngleTorus xvJacobianFreqs for multiple tori does not agree with that for individual tori'
+        assert numpy.all(numpy.fabs(jf[2]-jfs[2][ii]) < 10.*tol), 'actionAngleTorus xvJacobianFreqs for multiple tori does not agree with that for individual tori'
+    return None
+
+# Test that unsorted tori, which are fit in action-sorted order starting each
+# fit from the previous one, agree with fitting them one by one
+def test_actionAngleTorus_multipletori_unsorted():
+    from galpy.potential import MWPotential2014
+    from galpy.actionAngle import actionAngleTorus
+    aAT= actionAngleTorus(pot=MWPotential2014)
+    numpy.random.seed(2)
+    ntorus= 10
+    jr= 0.01+numpy.random.uniform(size=ntorus)*0.09
+    jphi= 1.+numpy.random.normal(size=ntorus)*0.1
+    jz= 0.005+numpy.random.uniform(size=ntorus)*0.045
+    angler= numpy.random.uniform(size=(ntorus,3))*2.*numpy.pi
+    anglephi= numpy.random.uniform(size=(ntorus,3))*2.*numpy.pi
+    anglez= numpy.random.uniform(size=(ntorus,3))*2.*numpy.pi
+    tol= 10.**-3.
+    xvs= aAT.xvFreqs(jr,jphi,jz,angler,anglephi,anglez)
+    for ii in range(ntorus):
+        xv= aAT.xvFreqs(jr[ii],jphi[ii],jz[ii],
+                        angler[ii],anglephi[ii],anglez[ii])
+        assert numpy.all(numpy.fabs(xvs[0][ii]-xv[0]) < tol), 'actionAngleTorus xvFreqs for multiple, unsorted tori does not agree with that for individual tori'
+        for jj in range(1,4):
+            assert numpy.fabs(xvs[jj][ii]-xv[jj]) < tol, 'actionAngleTorus xvFreqs for multiple, unsorted tori does not agree with that for individual tori'
+    return None
+
+# Test that the cache of fitted tori gives the same results as refitting
+def test_actionAngleTorus_cache():
+    from galpy.potential import MWPotential2014
+    from galpy.actionAngle import actionAngleTorus
+    aAT= actionAngleTorus(pot=MWPotential2014)
+    aATc= actionAngleTorus(pot=MWPotential2014,cache=10**7)
+    jr,jphi,jz= 0.075,1.1,0.05
+    angler= numpy.array([0.5,1.])
+    anglephi= numpy.array([1.,2.])
+    anglez= numpy.array([2.,3.])
+    tol= 10.**-3.
+    xv= aAT(jr,jphi,jz,angler,anglephi,anglez)
+    assert numpy.all(numpy.fabs(aATc(jr,jphi,jz,angler,anglephi,anglez)-xv) < tol), 'actionAngleTorus with a cache does not agree with that without'
+    assert aATc.cache_info()['misses'] == 1, 'actionAngleTorus cache did not record a miss for the first torus'
+    # Same torus, different angles: should be a hit
+    xv= aAT(jr,jphi,jz,angler+1.,anglephi,anglez)
+    assert numpy.all(numpy.fabs(aATc(jr,jphi,jz,angler+1.,anglephi,anglez)-xv) < tol), 'actionAngleTorus with a cache does not agree with that without'
+    info= aATc.cache_info()
+    assert info['hits'] == 1 and info['misses'] == 1 and info['size'] == 1, 'actionAngleTorus cache did not re-use a previously fitted torus'
+    assert info['nbytes'] > 0 and info['nbytes'] <= info['maxbytes'], 'actionAngleTorus cache does not report the memory of the cached tori'
+    # Nearby torus: fit starting from the cached one
+    fO= aAT.Freqs(jr+0.001,jphi,jz)
+    assert numpy.all(numpy.fabs(numpy.array(aATc.Freqs(jr+0.001,jphi,jz)[:3])-numpy.array(fO[:3])) < tol), 'actionAngleTorus with a cache does not agree with that without'
+    info= aATc.cache_info()
+    assert info['misses'] == 2 and info['seeded'] == 1, 'actionAngleTorus cache did not start the fit of a nearby torus from a cached one'
+    # Hessian and Jacobian
+    hO= aAT.hessianFreqs(jr,jphi,jz)
+    assert numpy.all(numpy.fabs(aATc.hessianFreqs(jr,jphi,jz)[0]-hO[0]) < 10.*tol), 'actionAngleTorus hessianFreqs with a cache does not agree with that without'
+    jf= aAT.xvJacobianFreqs(jr+0.01,jphi,jz,angler,anglephi,anglez)
+    jfc= aATc.xvJacobianFreqs(jr+0.01,jphi,jz,angler,anglephi,anglez)
+    for ii in range(3):
+        assert numpy.all(numpy.fabs(jfc[ii]-jf[ii]) < 10.*tol), 'actionAngleTorus xvJacobianFreqs with a cache does not agree with that without'
+    # Multiple tori, some of which are cached
+    jrs= numpy.array([jr,0.05,jr+0.001,0.02])
+    jphis= numpy.array([jphi,0.9,jphi,1.])
+    jzs= numpy.array([jz,0.03,jz,0.01])
+    misses= aATc.cache_info()['misses']
+    xvs= aAT(jrs,jphis,jzs,angler,anglephi,anglez)
+    assert numpy.all(numpy.fabs(aATc(jrs,jphis,jzs,angler,anglephi,anglez)-xvs) < tol), 'actionAngleTorus with a cache does not agree with that without for multiple tori'
+    assert aATc.cache_info()['misses'] == misses+2, 'actionAngleTorus cache did not re-use previously fitted tori for multiple tori'
+    hOs= aAT.hessianFreqs(jrs,jphis,jzs)
+    assert numpy.all(numpy.fabs(aATc.hessianFreqs(jrs,jphis,jzs)[0]-hOs[0]) < 10.*tol), 'actionAngleTorus hessianFreqs with a cache does not agree with that without for multiple tori'
+    jfs= aAT.xvJacobianFreqs(jrs,jphis,jzs,angler,anglephi,anglez)
+    jfcs= aATc.xvJacobianFreqs(jrs,jphis,jzs,angler,anglephi,anglez)
+    for ii in range(3):
+        assert numpy.all(numpy.fabs(jfcs[ii]-jfs[ii]) < 10.*tol), 'actionAngleTorus xvJacobianFreqs with a cache does not agree with that without for multiple tori'
+    # Memory budget that fits only a few tori
+    nbytes= aATc.cache_info()['nbytes']//aATc.cache_info()['size']
+    aATs= actionAngleTorus(pot=MWPotential2014,cache=3*nbytes)
+    aATs.Freqs(jrs,jphis,jzs)
+    info= aATs.cache_info()
+    assert info['nbytes'] <= info['maxbytes'] and info['size'] < 4, 'actionAngleTorus cache exceeds its memory budget'
+    aATc.clear_cache()
+    info= aATc.cache_info()
+    assert info['size'] == 0 and info['nbytes'] == 0, 'actionAngleTorus clear_cache does not empty the cache'
+    return None
+
 #Test error when potential is not implemented in C
 def test_actionAngleTorus_nocerr():
     from galpy.actionAngle import actionAngleTorus
@@ -2368,6 +2785,69 @@ def test_estimateDeltaStaeckel_spherical():
         'Estimated focal parameter delta when estimateDeltaStaeckel is applied to a spherical potential is wrong'
     return None
 
+# Test that the focal deltas estimated for many points at once agree with those estimated for each point separately
+def test_estimateDeltaStaeckel_no_median():
+    from galpy.potential import MWPotential2014, TwoPowerTriaxialPotential
+    from galpy.actionAngle import estimateDeltaStaeckel
+    from galpy.orbit import Orbit
+    o= Orbit([1.1, 0.05, 1.1, 0.05,0.,2.])
+    times= numpy.linspace(0.,100.,101)
+    o.integrate(times,MWPotential2014)
+    Rs, zs= o.R(times), o.z(times)
+    deltas= estimateDeltaStaeckel(MWPotential2014,Rs,zs,no_median=True)
+    assert len(deltas) == len(times), 'estimateDeltaStaeckel with no_median=True does not return a delta for each point'
+    for ii in range(len(times)):
+        assert numpy.fabs(deltas[ii]-estimateDeltaStaeckel(MWPotential2014,Rs[ii],zs[ii])) < 10.**-10., 'estimateDeltaStaeckel with no_median=True does not agree with estimateDeltaStaeckel for individual points'
+    assert numpy.fabs(numpy.median(deltas)-estimateDeltaStaeckel(MWPotential2014,Rs,zs)) < 10.**-10., 'estimateDeltaStaeckel with no_median=True does not agree with the median estimateDeltaStaeckel'
+    # Potential that cannot be evaluated for arrays at once
+    tp= TwoPowerTriaxialPotential(normalize=1.,c=0.7)
+    Rs= numpy.array([0.8,1.,1.2])
+    zs= numpy.array([0.3,0.5,0.2])
+    deltas= estimateDeltaStaeckel(tp,Rs,zs,no_median=True)
+    for ii in range(len(Rs)):
+        assert numpy.fabs(deltas[ii]-estimateDeltaStaeckel(tp,Rs[ii],zs[ii])) < 10.**-10., 'estimateDeltaStaeckel with no_median=True does not agree with estimateDeltaStaeckel for individual points'
+    return None
+
+# Test that using a different delta for each object in actionAngleStaeckel gives the same as using each delta separately
+def test_actionAngleStaeckel_indivdelta_actions_c():
+    from galpy.potential import MWPotential2014
+    from galpy.actionAngle import actionAngleStaeckel, estimateDeltaStaeckel
+    R= numpy.array([0.8,1.,1.2,1.5])
+    vR= numpy.array([0.1,-0.05,0.2,0.])
+    vT= numpy.array([1.,0.9,1.1,0.8])
+    z= numpy.array([0.1,0.05,-0.2,0.5])
+    vz= numpy.array([0.02,0.1,0.05,-0.1])
+    phi= numpy.zeros(4)
+    deltas= estimateDeltaStaeckel(MWPotential2014,R,z,no_median=True)
+    aAS= actionAngleStaeckel(pot=MWPotential2014,delta=deltas,c=True)
+    aASu= actionAngleStaeckel(pot=MWPotential2014,delta=deltas,c=True,
+                              useu0=True)
+    jr,lz,jz= aAS(R,vR,vT,z,vz)
+    ujr,ulz,ujz= aASu(R,vR,vT,z,vz)
+    out= aAS.actionsFreqsAngles(R,vR,vT,z,vz,phi)
+    # Also pass the deltas for a single call only
+    aASs= actionAngleStaeckel(pot=MWPotential2014,delta=0.4,c=True)
+    cjr,clz,cjz= aASs(R,vR,vT,z,vz,delta=deltas)
+    for ii in range(len(R)):
+        aASi= actionAngleStaeckel(pot=MWPotential2014,delta=deltas[ii],c=True)
+        aASiu= actionAngleStaeckel(pot=MWPotential2014,delta=deltas[ii],
+                                   c=True,useu0=True)
+        ijr,ilz,ijz= aASi(R[ii:ii+1],vR[ii:ii+1],vT[ii:ii+1],
+                          z[ii:ii+1],vz[ii:ii+1])
+        assert numpy.fabs(jr[ii]-ijr[0]) < 10.**-10., 'actionAngleStaeckel with array delta does not agree with individual deltas for jr'
+        assert numpy.fabs(jz[ii]-ijz[0]) < 10.**-10., 'actionAngleStaeckel with array delta does not agree with individual deltas for jz'
+        assert numpy.fabs(cjr[ii]-ijr[0]) < 10.**-10., 'actionAngleStaeckel with array delta passed to __call__ does not agree with individual deltas for jr'
+        assert numpy.fabs(cjz[ii]-ijz[0]) < 10.**-10., 'actionAngleStaeckel with array delta passed to __call__ does not agree with individual deltas for jz'
+        iujr,iulz,iujz= aASiu(R[ii:ii+1],vR[ii:ii+1],vT[ii:ii+1],
+                              z[ii:ii+1],vz[ii:ii+1])
+        assert numpy.fabs(ujr[ii]-iujr[0]) < 10.**-10., 'actionAngleStaeckel with array delta and useu0 does not agree with individual deltas for jr'
+        assert numpy.fabs(ujz[ii]-iujz[0]) < 10.**-10., 'actionAngleStaeckel with array delta and useu0 does not agree with individual deltas for jz'
+        iout= aASi.actionsFreqsAngles(R[ii:ii+1],vR[ii:ii+1],vT[ii:ii+1],
+                                      z[ii:ii+1],vz[ii:ii+1],phi[ii:ii+1])
+        for jj in range(len(out)):
+            assert numpy.fabs(out[jj][ii]-iout[jj][0]) < 10.**-10., 'actionAngleStaeckel.actionsFreqsAngles with array delta does not agree with individual deltas'
+    return None
+
 # Test that setting up the non-spherical actionAngle routines raises a warning when using MWPotential, see #229
 def test_MWPotential_warning_adiabatic():
     # Test that using MWPotential throws a warning, see #229
@@ -513,6 +513,33 @@ def test_vmomentsurfacemass_physical():
     assert numpy.fabs(dfc.vmomentsurfacemass(0.9,1.,2.,use_physical=True,ro=ro,vo=vo)-dfc.vmomentsurfacemass(0.9,1.,2.)*vo**3.*bovy_conversion.surfdens_in_msolpc2(vo,ro)) < 10.**-8., 'vmomentsurfacemass with (n,m) = (0,0) is not equal to surfacemass'
     return None
 
+def test_dehnendf_gl_moments():
+    #Test that the Gauss-Legendre moments agree with the dblquad ones
+    dfc= dehnendf(beta=0.1,profileParams=(1./3.,1.,0.2))
+    Rs= numpy.array([0.5,1.,1.5])
+    for method in ['surfacemass','sigma2surfacemass','sigma2','sigmaT2',
+                   'meanvT','skewvT','kurtosisvR','oortA','oortB']:
+        glm= getattr(dfc,method)(Rs,gl=True)
+        assert glm.shape == Rs.shape, 'Gauss-Legendre %s for an array of R does not return an array of the same shape' % method
+        for ii,R in enumerate(Rs):
+            assert numpy.fabs(glm[ii]-getattr(dfc,method)(R)) < 10.**-6., 'Gauss-Legendre %s does not agree with dblquad' % method
+            assert numpy.fabs(getattr(dfc,method)(R,gl=True)-glm[ii]) < 10.**-10., 'Gauss-Legendre %s for scalar R does not agree with that for array R' % method
+    assert numpy.all(numpy.fabs(dfc.meanvR(Rs,gl=True)) < 10.**-10.), 'Gauss-Legendre meanvR is not zero'
+    assert numpy.all(numpy.fabs(dfc.oortC(Rs,gl=True)) < 10.**-10.), 'Gauss-Legendre oortC is not zero'
+    assert numpy.fabs(dfc.vmomentsurfacemass(0.9,1,2,gl=True,ngl=40)-dfc.vmomentsurfacemass(0.9,1,2)) < 10.**-8., 'Gauss-Legendre vmomentsurfacemass with ngl=40 does not agree with dblquad'
+    return None
+
+def test_shudf_gl_moments():
+    #Test that the Gauss-Legendre moments agree with the dblquad ones
+    dfc= shudf(beta=-0.2,profileParams=(1./3.,1.,0.2))
+    Rs= numpy.array([0.5,1.,1.5])
+    for method in ['surfacemass','sigma2surfacemass','sigmaT2','meanvT',
+                   'oortA']:
+        glm= getattr(dfc,method)(Rs,gl=True,ngl=80)
+        for ii,R in enumerate(Rs):
+            assert numpy.fabs(glm[ii]-getattr(dfc,method)(R)) < 10.**-6., 'Gauss-Legendre %s does not agree with dblquad' % method
+    return None
+
 def test_cold_surfacemassLOS():
     dfc= dehnendf(profileParams=(0.3333333333333333,1.0, 0.01),
                   beta=0.,correct=False)
@@ -1169,8 +1196,10 @@ def test_shudf_sample_sampleLOS():
 def test_dehnendf_sample_flat_returnROrbit():
     beta= 0.
     dfc= dehnendf(beta=beta,profileParams=(1./4.,1.,0.2))
+    # 50 samples do not constrain the spread of the sampled (correctly
+    # dynamically hot) orbits to within the tolerances below
     numpy.random.seed(1)
-    os= dfc.sample(n=50,returnROrbit=True)
+    os= dfc.sample(n=2000,returnROrbit=True)
     #Test the spatial distribution
     rs= numpy.array([o.R() for o in os])
     assert numpy.fabs(numpy.mean(rs)-0.5) < 0.05, 'mean R of sampled points does not agree with that of the input surface profile'
@@ -1220,8 +1249,10 @@ def test_dehnendf_sample_powerrise_returnROrbit():
 def test_dehnendf_sample_flat_returnOrbit():
     beta= 0.
     dfc= dehnendf(beta=beta,profileParams=(1./4.,1.,0.2))
+    # 100 samples do not constrain the spread of the sampled (correctly
+    # dynamically hot) orbits to within the tolerances below
     numpy.random.seed(1)
-    os= dfc.sample(n=100,returnOrbit=True)
+    os= dfc.sample(n=2000,returnOrbit=True)
     #Test the spatial distribution
     rs= numpy.array([o.R() for o in os])
     phis= numpy.array([o.phi() for o in os])
@@ -1305,8 +1336,10 @@ def test_shudf_sample_powerrise_returnROrbit():
 def test_shudf_sample_flat_returnOrbit():
     beta= 0.
     dfc= shudf(beta=beta,profileParams=(1./4.,1.,0.2))
+    # 100 samples do not constrain the spread of the sampled (correctly
+    # dynamically hot) orbits to within the tolerances below
     numpy.random.seed(1)
-    os= dfc.sample(n=100,returnOrbit=True)
+    os= dfc.sample(n=2000,returnOrbit=True)
     #Test the spatial distribution
     rs= numpy.array([o.R() for o in os])
     phis= numpy.array([o.phi() for o in os])
@@ -1336,6 +1369,95 @@ def test_shudf_sample_flat_EL():
     #BOVY: Could use another test
     return None
 
+def test_sample_returnArray():
+    # Test that returnArray gives the same samples as the list of orbits
+    for dfc in [dehnendf(beta=0.,profileParams=(1./4.,1.,0.2)),
+                shudf(beta=0.2,profileParams=(1./4.,1.,0.2))]:
+        numpy.random.seed(1)
+        os= dfc.sample(n=100,returnROrbit=True)
+        numpy.random.seed(1)
+        rvrvt= dfc.sample(n=100,returnROrbit=True,returnArray=True)
+        assert rvrvt.shape == (len(os),3), 'returnArray sample does not have the expected shape'
+        assert numpy.all(numpy.fabs(rvrvt[:,0]-numpy.array([o.R() for o in os])) < 10.**-10.), 'returnArray sample does not agree with the returned orbits'
+        assert numpy.all(numpy.fabs(rvrvt[:,1]-numpy.array([o.vR() for o in os])) < 10.**-10.), 'returnArray sample does not agree with the returned orbits'
+        assert numpy.all(numpy.fabs(rvrvt[:,2]-numpy.array([o.vT() for o in os])) < 10.**-10.), 'returnArray sample does not agree with the returned orbits'
+        numpy.random.seed(1)
+        rvrvtphi= dfc.sample(n=100,returnOrbit=True,returnArray=True)
+        assert rvrvtphi.shape[1] == 4, 'returnArray sample with returnOrbit does not have the expected shape'
+        assert numpy.all((rvrvtphi[:,3] >= 0.)*(rvrvtphi[:,3] <= 2.*numpy.pi)), 'returnArray sample with returnOrbit has phi outside of [0,2pi]'
+    return None
+
+def test_sample_largehR():
+    # Test that sampling works for a scale length beyond the initial ARS
+    # abcissae, for which x Sigma(x) peaks at x = hR = 2
+    numpy.random.seed(1)
+    dfc= dehnendf(beta=0.,profileParams=(2.,1.,0.2))
+    EL= numpy.array(dfc.sample(n=2000,returnROrbit=False))
+    xE= numpy.exp(EL[:,0]-0.5)
+    assert numpy.fabs(numpy.mean(xE)-4.) < 0.25, 'sampled xE for hR=2 do not have the expected mean'
+    dfc= shudf(beta=0.,profileParams=(2.,1.,0.2))
+    EL= numpy.array(dfc.sample(n=2000,returnROrbit=False))
+    assert numpy.fabs(numpy.mean(EL[:,1])-4.) < 0.25, 'sampled Lz for hR=2 do not have the expected mean'
+    return None
+
+def test_sample_radialphase():
+    # Test that the sampled phase-space points have the sampled energy and
+    # angular momentum and lie between peri- and apocenter
+    from galpy.df_src.diskdf import axipotential, _sampleRadialPhase, \
+        _ELtoRapRperi
+    for beta in [0.,0.2,-0.2]:
+        dfc= dehnendf(beta=beta,profileParams=(1./4.,1.,0.2))
+        numpy.random.seed(1)
+        EL= numpy.array(dfc.sample(n=1000,returnROrbit=False))
+        R,vR,vT,wR= _sampleRadialPhase(EL[:,0],EL[:,1],beta)
+        rperi,rap= _ELtoRapRperi(EL[:,0],EL[:,1],beta)
+        # (E,L) that do not correspond to an orbit are returned as NaN
+        indx= True^numpy.isnan(R)
+        assert numpy.sum(indx) > 900, 'too many sampled (E,L) do not correspond to an orbit'
+        EL, R, vR, vT, wR= EL[indx], R[indx], vR[indx], vT[indx], wR[indx]
+        rperi, rap= rperi[indx], rap[indx]
+        E= axipotential(R,beta=beta)+0.5*vR**2.+0.5*vT**2.
+        assert numpy.all(numpy.fabs(E-EL[:,0]) < 10.**-8.), 'sampled phase-space points do not have the sampled energy'
+        assert numpy.all(numpy.fabs(R*vT-EL[:,1]) < 10.**-8.), 'sampled phase-space points do not have the sampled angular momentum'
+        assert numpy.all((R >= rperi-10.**-8.)*(R <= rap+10.**-8.)), 'sampled phase-space points do not lie between peri- and apocenter'
+        assert numpy.all(wR > 0.), 'radial frequencies of sampled orbits are not positive'
+    return None
+
+def test_sample_energy_powerrise():
+    # Test that the sampled orbits have the sampled energy and angular
+    # momentum for non-flat rotation curves (regression test for sampling
+    # the radial phase in the wrong potential, alpha=2-beta rather than
+    # alpha=2-2beta)
+    from galpy.df_src.diskdf import axipotential
+    for df in [dehnendf,shudf]:
+        for beta in [0.2,-0.2]:
+            dfc= df(beta=beta,profileParams=(1./4.,1.,0.2))
+            numpy.random.seed(1)
+            EL= numpy.array(dfc.sample(n=200,returnROrbit=False))
+            numpy.random.seed(1)
+            rvrvt= dfc.sample(n=200,returnROrbit=True,returnArray=True)
+            # The first samples are not affected by the recursion to get enough
+            rvrvt= rvrvt[:100]
+            E= axipotential(rvrvt[:,0],beta=beta)\
+                +0.5*rvrvt[:,1]**2.+0.5*rvrvt[:,2]**2.
+            L= rvrvt[:,0]*rvrvt[:,2]
+            dEL= numpy.amin(numpy.fabs(E[:,None]-EL[:,0])
+                            +numpy.fabs(L[:,None]-EL[:,1]),axis=1)
+            assert numpy.all(dEL < 10.**-8.), 'sampled orbits do not have the sampled energy and angular momentum for beta = %g' % beta
+    return None
+
+def test_sample_sigmaR():
+    # Test that the radial velocity dispersion of the sampled orbits near R=1
+    # agrees with that of the DF
+    for df in [dehnendf,shudf]:
+        for beta in [0.,0.2,-0.2]:
+            dfc= df(beta=beta,profileParams=(1./4.,1.,0.2))
+            numpy.random.seed(1)
+            rvrvt= dfc.sample(n=10000,returnROrbit=True,returnArray=True)
+            indx= numpy.fabs(rvrvt[:,0]-1.) < 0.1
+            assert numpy.fabs(numpy.std(rvrvt[indx,1])/numpy.sqrt(dfc.sigmaR2(1.))-1.) < 0.1, 'radial velocity dispersion of sampled orbits does not agree with that of the DF for beta = %g' % beta
+    return None
+
 ###############################################################################
 #Tests of DFcorrection
 ###############################################################################
@@ -1486,6 +1608,9 @@ def test_DFcorrection_setup():
     try:
         os.remove(dfc._corr._createSavefilename(2))
     except: raise AssertionError("removing DFcorrection's savefile did not work")
+    try: # checkpoint after the first iteration
+        os.remove(dfc._corr._createSavefilename(1))
+    except: raise AssertionError("removing DFcorrection's savefile did not work")
     #Also explicily setup a DFcorrection, to test for other stuff
     from galpy.df import DFcorrection
     from galpy.df_src.diskdf import DFcorrectionError
@@ -1507,6 +1632,53 @@ def test_DFcorrection_setup():
     except: raise AssertionError("removing DFcorrection's savefile did not work")
     return None
 
+def test_DFcorrection_checkpoints():
+    #Test that the corrections are saved after every iteration, that a
+    #calculation resumes from these, and that numcores and tol work
+    from galpy.df import DFcorrection
+    from galpy.df import expSurfaceSigmaProfile 
+    essp= expSurfaceSigmaProfile(params=(0.25,0.75,0.1))
+    dfc= DFcorrection(npoints=11,niter=3,surfaceSigmaProfile=essp,
+                      savedir='.')
+    for ii in range(1,4):
+        assert os.path.exists(dfc._createSavefilename(ii)), 'DFcorrection did not save the corrections after iteration %i' % ii
+    #Remove the final corrections, should resume from the checkpoint
+    os.remove(dfc._createSavefilename(3))
+    dfcr= DFcorrection(npoints=11,niter=3,surfaceSigmaProfile=essp,
+                       savedir='.')
+    assert numpy.all(numpy.fabs(dfcr._corrections-dfc._corrections) < 10.**-10.), 'DFcorrection resumed from a checkpoint does not agree with the direct calculation'
+    #Parallel calculation should give the same result
+    os.remove(dfc._createSavefilename(3))
+    dfcp= DFcorrection(npoints=11,niter=3,surfaceSigmaProfile=essp,
+                       savedir='.',numcores=2)
+    assert numpy.all(numpy.fabs(dfcp._corrections-dfc._corrections) < 10.**-10.), 'DFcorrection calculated in parallel does not agree with the serial calculation'
+    for ii in range(1,4):
+        os.remove(dfc._createSavefilename(ii))
+    #With a large tolerance, the iteration should stop after the first one
+    #and be saved as such, not as the niter result
+    dfct= DFcorrection(npoints=11,niter=3,surfaceSigmaProfile=essp,
+                       savedir='.',tol=1.)
+    assert os.path.exists(dfc._createSavefilename(1)), 'DFcorrection with tol did not save the corrections of the iteration reached'
+    assert not os.path.exists(dfc._createSavefilename(2)), 'DFcorrection with tol did not stop iterating when converged'
+    assert not os.path.exists(dfc._createSavefilename(3)), 'DFcorrection with tol saved early-stopped corrections as the niter result'
+    dfc1= DFcorrection(npoints=11,niter=1,surfaceSigmaProfile=essp,
+                       savedir='.')
+    assert numpy.all(numpy.fabs(dfct._corrections-dfc1._corrections) < 10.**-10.), 'DFcorrection with tol that converged after one iteration does not agree with niter=1'
+    #A subsequent run with the same tol should load the converged corrections
+    assert os.path.exists(dfct._createConvergedFilename()), 'DFcorrection with tol did not record that the corrections converged'
+    dfct2= DFcorrection(npoints=11,niter=3,surfaceSigmaProfile=essp,
+                        savedir='.',tol=1.)
+    assert not os.path.exists(dfc._createSavefilename(2)), 'DFcorrection with tol did not load the converged corrections of an earlier run'
+    assert numpy.all(numpy.fabs(dfct2._corrections-dfct._corrections) < 10.**-10.), 'DFcorrection with tol did not load the converged corrections of an earlier run'
+    os.remove(dfct._createConvergedFilename())
+    #A subsequent run without tol should perform all iterations
+    dfc3= DFcorrection(npoints=11,niter=3,surfaceSigmaProfile=essp,
+                       savedir='.')
+    assert numpy.all(numpy.fabs(dfc3._corrections-dfc._corrections) < 10.**-10.), 'DFcorrection without tol after an early-stopped run with tol does not perform all iterations'
+    for ii in range(1,4):
+        os.remove(dfc._createSavefilename(ii))
+    return None
+
 def test_dehnendf_sample_flat_returnROrbit_wcorrections():
     beta= 0.
     dfc= ddf_correct2_flat
@@ -539,6 +539,22 @@ def test_interpolation_potential_rzderiv():
     assert numpy.all(numpy.fabs((rzpot.Rzderiv(mr,mz)-potential.evaluateRzderivs(potential.MWPotential,mr,mz))/potential.evaluateRzderivs(potential.MWPotential,mr,mz)) < 10.**-10.), 'RZPot interpolation of Rzderiv (which is not an interpolation at all) w/ interpRZPotential fails for vector input'
     return None
 
+# Test R2deriv, taken from the origPot, so quite trivial
+def test_interpolation_potential_r2deriv():
+    rzpot= potential.interpRZPotential(RZPot=potential.MWPotential,
+                                       rgrid=(0.01,2.,101),
+                                       zgrid=(0.,0.2,101),
+                                       logR=False,
+                                       zsym=True)
+    #Test all at the same time to use vector evaluation
+    rs= numpy.linspace(0.01,2.,20)
+    zs= numpy.linspace(-0.2,0.2,40)
+    mr,mz= numpy.meshgrid(rs,zs)
+    mr= mr.flatten()
+    mz= mz.flatten()
+    assert numpy.all(numpy.fabs((rzpot.R2deriv(mr,mz)-potential.evaluateR2derivs(potential.MWPotential,mr,mz))/potential.evaluateR2derivs(potential.MWPotential,mr,mz)) < 10.**-10.), 'RZPot interpolation of R2deriv (which is not an interpolation at all) w/ interpRZPotential fails for vector input'
+    return None
+
 # Test density
 def test_interpolation_potential_dens():
     #Test the interpolation of the potential
@@ -949,3 +965,73 @@ def test_interpolation_potential_verticalfreq_notinterpolated():
         assert vfdiff < 10.**-10., 'RZPot interpolation w/ interpRZPotential fails when the potential was not interpolated at R = %g by %g' % (r,vfdiff)
     return None
 
+
+def test_interpolation_potential_cache():
+    # Test that grids are stored in and reloaded from the on-disk cache
+    import os, glob, shutil, tempfile, warnings
+    cachedir= tempfile.mkdtemp()
+    try:
+        kwargs= {'rgrid':(0.01,2.,21),'zgrid':(0.,0.2,21),'logR':False,
+                 'interpPot':True,'interpvcirc':True,'enable_c':True,
+                 'zsym':True,'cachedir':cachedir}
+        rzpot= potential.interpRZPotential(RZPot=potential.MWPotential,
+                                           **kwargs)
+        cachefiles= glob.glob(os.path.join(cachedir,'*.npz'))
+        assert len(cachefiles) == 1, 'interpRZPotential did not write a single cache file'
+        rzpot2= potential.interpRZPotential(RZPot=potential.MWPotential,
+                                            **kwargs)
+        assert numpy.all(rzpot._potGrid == rzpot2._potGrid), 'Grid reloaded from the interpRZPotential cache is different from the computed grid'
+        assert numpy.all(rzpot._vcircGrid == rzpot2._vcircGrid), 'Grid reloaded from the interpRZPotential cache is different from the computed grid'
+        if rzpot.hasC:
+            assert numpy.all(rzpot._potGrid_splinecoeffs == rzpot2._potGrid_splinecoeffs), 'Spline coefficients reloaded from the interpRZPotential cache are different from the computed coefficients'
+        rs= numpy.linspace(0.1,1.9,11)
+        zs= numpy.linspace(-0.19,0.19,11)
+        assert numpy.all(rzpot(rs,zs) == rzpot2(rs,zs)), 'Potential interpolated from cached grids is different'
+        assert len(glob.glob(os.path.join(cachedir,'*.npz'))) == 1, 'Reloading interpRZPotential from the cache wrote a new cache file'
+        # Interpolating an additional quantity adds it to the same file
+        kwargs['interpRforce']= True
+        rzpot3= potential.interpRZPotential(RZPot=potential.MWPotential,
+                                            **kwargs)
+        assert glob.glob(os.path.join(cachedir,'*.npz')) == cachefiles, 'Adding a grid to the interpRZPotential cache did not update the existing file'
+        with numpy.load(cachefiles[0]) as cached:
+            assert 'rforceGrid' in cached.files and 'potGrid' in cached.files, 'Adding a grid to the interpRZPotential cache did not store all grids'
+        assert numpy.all(rzpot._potGrid == rzpot3._potGrid), 'Grid reloaded from the interpRZPotential cache is different from the computed grid'
+        mwkwargs= kwargs.copy()
+        # Different potential parameters or grid --> different cache file
+        mp= potential.MiyamotoNagaiPotential(a=0.5,b=0.05,normalize=1.)
+        rzpot4= potential.interpRZPotential(RZPot=mp,**kwargs)
+        mp= potential.MiyamotoNagaiPotential(a=0.5,b=0.06,normalize=1.)
+        rzpot5= potential.interpRZPotential(RZPot=mp,**kwargs)
+        assert numpy.fabs(rzpot4(1.,0.1)-rzpot5(1.,0.1)) > 10.**-4., 'interpRZPotential cache reused the grid of a potential with different parameters'
+        assert numpy.fabs(rzpot5._potGrid[10,10]-mp(rzpot5._rgrid[10],rzpot5._zgrid[10])) < 10.**-10., 'interpRZPotential cache reused the grid of a potential with different parameters'
+        kwargs['zgrid']= (0.,0.3,21)
+        rzpot6= potential.interpRZPotential(RZPot=mp,**kwargs)
+        assert numpy.fabs(rzpot6._potGrid[10,-1]-mp(rzpot6._rgrid[10],0.3)) < 10.**-10., 'interpRZPotential cache reused the grid of a different grid specification'
+        assert len(glob.glob(os.path.join(cachedir,'*.npz'))) == 4, 'interpRZPotential cache does not contain the expected number of files'
+        # Corrupted cache files are ignored and replaced
+        with open(cachefiles[0],'w') as cfile:
+            cfile.write('corrupted')
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            rzpot7= potential.interpRZPotential(RZPot=potential.MWPotential,
+                                                **mwkwargs)
+            assert len(w) > 0 and 'corrupted' in str(w[-1].message), 'Corrupted interpRZPotential cache file did not raise a warning'
+        assert numpy.all(rzpot._potGrid == rzpot7._potGrid), 'Grid recomputed after finding a corrupted cache file is different from the original grid'
+        with numpy.load(cachefiles[0]) as cached:
+            assert 'potGrid' in cached.files, 'Corrupted interpRZPotential cache file was not replaced'
+        # Files written by a different cache version are removed
+        stalefile= os.path.join(cachedir,'interpRZPotential_v0_stale.npz')
+        numpy.savez_compressed(stalefile,potGrid=numpy.zeros(2))
+        rzpot8= potential.interpRZPotential(RZPot=mp,interpzforce=True,
+                                            **kwargs)
+        assert not os.path.exists(stalefile), 'Stale interpRZPotential cache file from a different version was not removed'
+        # Least-recently-used eviction
+        kwargs['cachemaxsize']= 0.
+        kwargs['zgrid']= (0.,0.4,21)
+        rzpot9= potential.interpRZPotential(RZPot=mp,**kwargs)
+        assert len(glob.glob(os.path.join(cachedir,'*.npz'))) == 1, 'interpRZPotential cache eviction did not remove the least-recently used files'
+        potential.clear_interpRZ_cache(cachedir)
+        assert len(glob.glob(os.path.join(cachedir,'*.npz'))) == 0, 'clear_interpRZ_cache did not remove all cache files'
+    finally:
+        shutil.rmtree(cachedir)
+    return None
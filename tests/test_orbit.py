@@ -597,6 +597,153 @@ def test_liouville_planar():
                                        or ('Burkert' in p and not ptp.hasC)): break
     return None
 
+# Test that the Jacobian of full 3D orbits integrated with integrate_dxdv
+# is one (Liouville), and that dxdv agrees with the difference between
+# nearby orbits
+def test_liouville_full():
+    from galpy.orbit import Orbit
+    from galpy.potential import MWPotential2014, LogarithmicHaloPotential, \
+        DehnenBarPotential
+    times= numpy.linspace(0.,10.,1001)
+    pots= [MWPotential2014,
+           [LogarithmicHaloPotential(normalize=1.,q=0.9),
+            DehnenBarPotential(omegab=1.85,rb=0.8,Af=0.05)]]
+    vxvv= [1.,0.1,1.1,0.1,0.1,0.3]
+    for pot in pots:
+        for integrator in ['odeint','rk4_c','rk6_c','dopr54_c']:
+            o= Orbit(vxvv)
+            jac= []
+            for ii in range(6):
+                dxdv= numpy.zeros(6)
+                dxdv[ii]= 1.
+                o.integrate_dxdv(dxdv,times,pot,method=integrator,
+                                 rectIn=True,rectOut=True)
+                jac.append(o.getOrbit_dxdv()[-1])
+            tjac= numpy.linalg.det(numpy.array(jac))
+            assert numpy.fabs(tjac-1.) < 10.**-5., 'Liouville theorem jacobian differs from one by %g for a full orbit and integrator %s' % (numpy.fabs(tjac-1.),integrator)
+            # Compare to the difference between two nearby orbits, cylindrical
+            dxdv= numpy.array([1.,0.,0.,2.,0.,-1.])*10.**-6.
+            o.integrate_dxdv(dxdv,times,pot,method=integrator)
+            o1= Orbit(vxvv)
+            o1.integrate(times,pot,method='dopr54_c')
+            o2= Orbit(list(numpy.array(vxvv)+dxdv))
+            o2.integrate(times,pot,method='dopr54_c')
+            assert numpy.amax(numpy.fabs(o.getOrbit()-o1.getOrbit())) < 10.**-4., 'Orbit integrated with integrate_dxdv does not agree with that integrated with integrate for integrator %s' % integrator
+            assert numpy.amax(numpy.fabs(o.getOrbit_dxdv()-(o2.getOrbit()-o1.getOrbit()))) < 10.**-6., 'dxdv integrated with integrate_dxdv does not agree with the difference between two nearby orbits for integrator %s' % integrator
+    # Symplectic integrators cannot be used
+    with pytest.raises(TypeError) as excinfo:
+        o.integrate_dxdv(dxdv,times,MWPotential2014,method='symplec4_c')
+    # Orbits without the azimuth are not supported
+    o= Orbit(vxvv[:5])
+    with pytest.raises(AttributeError) as excinfo:
+        o.integrate_dxdv(dxdv,times,MWPotential2014)
+    return None
+
+# Test that planar dxdv integration in C works for the potentials whose 2nd
+# derivatives are only implemented in C or are newly implemented in C:
+# Liouville and comparison with the difference between nearby orbits
+def test_liouville_planar_c_2ndderivs():
+    from galpy.orbit import Orbit
+    from galpy.potential_src.Potential import _check_c
+    times= numpy.linspace(0.,2.,101)
+    pots= [potential.DoubleExponentialDiskPotential(normalize=1.),
+           potential.TriaxialHernquistPotential(normalize=1.,b=0.8),
+           potential.TriaxialJaffePotential(normalize=1.,b=0.8),
+           potential.TriaxialNFWPotential(normalize=1.,b=0.8,pa=0.3),
+           potential.SoftenedNeedleBarPotential(normalize=1.),
+           potential.DiskSCFPotential(normalize=1.),
+           mockFlatSteadyLogSpiralPotential(),
+           mockSlowFlatSteadyLogSpiralPotential(),
+           mockFlatTransientLogSpiralPotential()]
+    vxvv= [1.,0.1,1.1,0.5]
+    for pot in pots:
+        if hasattr(pot,'_potlist'): pot= pot._potlist
+        else: pot= pot.toPlanar()
+        assert _check_c(pot,dxdv=True), 'Potential does not have C implementations of the 2nd derivatives'
+        for integrator in ['rk6_c','dopr54_c']:
+            o= Orbit(vxvv)
+            jac= []
+            for ii in range(4):
+                dxdv= numpy.zeros(4)
+                dxdv[ii]= 1.
+                o.integrate_dxdv(dxdv,times,pot,method=integrator,
+                                 rectIn=True,rectOut=True)
+                jac.append(o.getOrbit_dxdv()[-1])
+            tjac= numpy.linalg.det(numpy.array(jac))
+            assert numpy.fabs(tjac-1.) < 10.**-8., 'Liouville theorem jacobian differs from one by %g for integrator %s' % (numpy.fabs(tjac-1.),integrator)
+            dxdv= numpy.array([1.,0.,2.,-1.])*10.**-6.
+            o.integrate_dxdv(dxdv,times,pot,method=integrator)
+            o1= Orbit(vxvv)
+            o1.integrate(times,pot,method='dopr54_c')
+            o2= Orbit(list(numpy.array(vxvv)+dxdv))
+            o2.integrate(times,pot,method='dopr54_c')
+            assert numpy.amax(numpy.fabs(o.getOrbit_dxdv()-(o2.getOrbit()-o1.getOrbit()))) < 10.**-6., 'dxdv integrated with integrate_dxdv does not agree with the difference between two nearby orbits for integrator %s' % integrator
+    return None
+
+# Test that planar orbits and their dxdv in an interpRZPotential are
+# integrated in C and agree with the Python integration
+def test_orbit_c_planar_interpRZPotential():
+    from galpy.orbit import Orbit
+    from galpy.potential_src.Potential import _check_c
+    rzpot= potential.interpRZPotential(RZPot=potential.MWPotential2014,
+                                       rgrid=(numpy.log(0.01),numpy.log(20.),201),
+                                       logR=True,zgrid=(0.,1.,101),
+                                       interpRforce=True,interpzforce=True,
+                                       enable_c=True,zsym=True)
+    pot= rzpot.toPlanar()
+    assert _check_c(pot), 'Planar interpRZPotential does not have a C implementation'
+    assert _check_c(pot,dxdv=True), 'Planar interpRZPotential does not have C implementations of the 2nd derivatives'
+    times= numpy.linspace(0.,2.,101)
+    vxvv= [1.,0.1,1.1,0.5]
+    o= Orbit(vxvv)
+    o.integrate(times,pot,method='dopr54_c')
+    op= Orbit(vxvv)
+    op.integrate(times,pot,method='odeint')
+    assert numpy.amax(numpy.fabs(o.getOrbit()-op.getOrbit())) < 10.**-6., 'Planar orbit integrated in interpRZPotential in C does not agree with the Python integration'
+    dxdv= numpy.array([1.,0.,2.,-1.])*10.**-6.
+    o.integrate_dxdv(dxdv,times,pot,method='dopr54_c')
+    op.integrate_dxdv(dxdv,times,pot,method='odeint')
+    assert numpy.amax(numpy.fabs(o.getOrbit_dxdv()-op.getOrbit_dxdv())) < 10.**-10., 'dxdv integrated in interpRZPotential in C does not agree with the Python integration'
+    o2= Orbit(list(numpy.array(vxvv)+dxdv))
+    o2.integrate(times,pot,method='dopr54_c')
+    op.integrate(times,pot,method='dopr54_c')
+    assert numpy.amax(numpy.fabs(o.getOrbit_dxdv()-(o2.getOrbit()-op.getOrbit()))) < 10.**-10., 'dxdv integrated with integrate_dxdv in interpRZPotential does not agree with the difference between two nearby orbits'
+    return None
+
+# Test the maximal Lyapunov exponent of regular and chaotic orbits
+def test_lyapunovExponent():
+    from galpy.orbit import lyapunovExponent
+    from galpy.potential import MWPotential2014, LogarithmicHaloPotential, \
+        DehnenBarPotential
+    lp= LogarithmicHaloPotential(normalize=1.,q=0.9)
+    dp= DehnenBarPotential(omegab=1.85,rb=0.8,Af=0.05)
+    times= numpy.linspace(0.,500.,5001)
+    # First orbit is regular in the barred potential, second is chaotic
+    vxvv= numpy.array([[2.,0.05,1.,0.05,0.05,0.3],[0.6,0.4,0.5,0.05,0.,1.]])
+    for integrator in ['rk4_c','rk6_c','dopr54_c']:
+        # In an axisymmetric potential, orbits are regular
+        lyap= lyapunovExponent(vxvv,times,MWPotential2014,method=integrator)
+        assert numpy.all(lyap[:,-1] < 2.*numpy.log(times[-1])/times[-1]), 'Lyapunov exponent of a regular orbit is too large for integrator %s' % integrator
+        assert numpy.all(lyap[:,0] == 0.), 'Lyapunov exponent at the first time is not zero'
+        lyap= lyapunovExponent(vxvv,times,[lp,dp],method=integrator)
+        assert lyap[0,-1] < 2.*numpy.log(times[-1])/times[-1], 'Lyapunov exponent of a regular orbit is too large for integrator %s' % integrator
+        assert lyap[1,-1] > 0.1, 'Lyapunov exponent of a chaotic orbit is too small for integrator %s' % integrator
+        # Planar
+        lyap= lyapunovExponent(vxvv[:,[0,1,2,5]],times,[lp,dp],
+                               method=integrator)
+        assert lyap[0,-1] < 2.*numpy.log(times[-1])/times[-1], 'Lyapunov exponent of a regular planar orbit is too large for integrator %s' % integrator
+        assert lyap[1,-1] > 0.1, 'Lyapunov exponent of a chaotic planar orbit is too small for integrator %s' % integrator
+    # In-plane full orbits should agree with planar orbits
+    lyap= lyapunovExponent([2.,0.05,1.,0.,0.,0.3],times[:1001],[lp,dp],
+                           dxdv=[1.,1.,0.,1.,1.,0.])
+    lyapp= lyapunovExponent([2.,0.05,1.,0.3],times[:1001],[lp,dp],
+                            dxdv=[1.,1.,1.,1.])
+    assert numpy.fabs(lyap[0,-1]-lyapp[0,-1]) < 10.**-4., 'Lyapunov exponent of in-plane full orbit does not agree with that of the planar orbit'
+    # Python integrators are not supported
+    with pytest.raises(NotImplementedError) as excinfo:
+        lyapunovExponent(vxvv,times,MWPotential2014,method='odeint')
+    return None
+
 # Test that the eccentricity of circular orbits is zero
 def test_eccentricity():
     #return None
@@ -3178,6 +3325,37 @@ def test_orbit_c_sigint_planar():
         p.stderr.close()
     return None
 
+# Test that integrating multiple orbits in C with several OpenMP threads gets interrupted by SIGINT (CTRL-C)
+def test_orbit_c_sigint_fullmulti():
+    integrators= ['dopr54_c','leapfrog_c','symplec4_c']
+    scriptpath= 'orbitint4sigint.py'
+    if not 'tests' in os.getcwd():
+        scriptpath= os.path.join('tests',scriptpath)
+    env= os.environ.copy()
+    env['OMP_NUM_THREADS']= '2'
+    ntries= 10
+    for integrator in integrators:
+        p= subprocess.Popen(['python',scriptpath,integrator,'fullmulti'],
+                            stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE,
+                            env=env)
+        time.sleep(4)
+        os.kill(p.pid,signal.SIGINT)
+        time.sleep(4)
+        cnt= 0
+        while p.poll() is None and cnt < ntries: # wait a little longer
+            time.sleep(4)
+            cnt+= 1
+        if p.poll() is None or p.poll() != 1:
+            if p.poll() is None: msg= -100
+            else: msg= p.poll()
+            raise AssertionError("Multiple-orbit integration using %s should have been interrupted by SIGINT (CTRL-C), but was not because p.poll() == %i" % (integrator,msg))
+        p.stdin.close()
+        p.stdout.close()
+        p.stderr.close()
+    return None
+
 # Test that orbit integration in C gets interrupted by SIGINT (CTRL-C)
 def test_orbit_c_sigint_planardxdv():
     integrators= ['dopr54_c','rk4_c','rk6_c']
@@ -3225,6 +3403,306 @@ def test_orbitint_pythonfallback():
         assert raisedWarning, "Orbit integration did not raise fallback warning"
     return None
 
+# Test that integrating multiple orbits at once gives the same result as 
+# integrating them one by one
+def test_integrateOrbits():
+    from galpy.orbit import Orbit, integrateOrbits
+    from galpy.potential import MWPotential2014
+    numpy.random.seed(1)
+    nobj= 11
+    vxvv= numpy.array([1.,0.1,1.1,0.1,0.,0.])\
+        +numpy.random.normal(size=(nobj,6))*0.05
+    ts= numpy.linspace(0.,10.,101)
+    integrators= ['dopr54_c','leapfrog_c','rk4_c','rk6_c',
+                  'symplec4_c','symplec6_c','odeint']
+    for integrator in integrators:
+        # Full
+        orbs= integrateOrbits(vxvv,ts,MWPotential2014,method=integrator)
+        assert orbs.shape == (nobj,len(ts),6), 'integrateOrbits does not return an output array of the expected shape'
+        for ii in [0,5,nobj-1]:
+            o= Orbit(vxvv[ii])
+            o.integrate(ts,MWPotential2014,method=integrator)
+            assert numpy.amax(numpy.fabs(o.getOrbit()-orbs[ii])) < 10.**-10., 'integrateOrbits does not agree with Orbit.integrate for integrator %s' % integrator
+        # Planar
+        pvxvv= vxvv[:,[0,1,2,5]]
+        orbs= integrateOrbits(pvxvv,ts,MWPotential2014,method=integrator)
+        assert orbs.shape == (nobj,len(ts),4), 'integrateOrbits does not return an output array of the expected shape'
+        for ii in [0,5,nobj-1]:
+            o= Orbit(pvxvv[ii])
+            o.integrate(ts,MWPotential2014,method=integrator)
+            assert numpy.amax(numpy.fabs(o.getOrbit()-orbs[ii])) < 10.**-10., 'integrateOrbits does not agree with Orbit.integrate for integrator %s' % integrator
+    # Other shapes should raise a ValueError
+    with pytest.raises(ValueError) as excinfo:
+        integrateOrbits(vxvv[:,:5],ts,MWPotential2014)
+    return None
+
+# Test that the C representation of a potential is cached and that the cache
+# does not go stale when the parameters of the potential change
+def test_integrate_c_parse_cache():
+    from galpy.orbit import Orbit
+    from galpy.potential import MiyamotoNagaiPotential
+    mp= MiyamotoNagaiPotential(normalize=1.,a=0.5,b=0.05)
+    ts= numpy.linspace(0.,10.,1001)
+    for o in [Orbit([1.,0.1,1.1,0.1,0.,0.]),Orbit([1.,0.1,1.1,0.])]:
+        o.integrate(ts,mp,method='dopr54_c')
+        assert hasattr(mp,'_c_parse_cache') \
+            and len(mp._c_parse_cache) > 0, 'C representation of potential not cached'
+        # Re-normalize and compare to a newly set-up potential
+        mp.normalize(0.5)
+        o.integrate(ts,mp,method='dopr54_c')
+        mp2= MiyamotoNagaiPotential(normalize=0.5,a=0.5,b=0.05)
+        o2= o()
+        o2.integrate(ts,mp2,method='dopr54_c')
+        assert numpy.amax(numpy.fabs(o.getOrbit()-o2.getOrbit())) < 10.**-10., 'Orbit integrated in re-normalized potential does not agree with that in a newly set-up potential'
+        # Directly change a parameter that is passed to C
+        mp._b= 0.1
+        mp._b2= 0.01
+        o.integrate(ts,mp,method='dopr54_c')
+        mp3= MiyamotoNagaiPotential(amp=mp._amp,a=0.5,b=0.1)
+        o2.integrate(ts,mp3,method='dopr54_c')
+        assert numpy.amax(numpy.fabs(o.getOrbit()-o2.getOrbit())) < 10.**-10., 'Orbit integrated in potential with changed parameters does not agree with that in a newly set-up potential'
+        mp._b= 0.05
+        mp._b2= 0.0025
+        mp.normalize(1.)
+    return None
+
+# Test that dense output from the integrators gives an accurate orbit at
+# arbitrary times and better than spline interpolation on the same grid
+def test_integrate_dense_output():
+    from galpy.orbit import Orbit
+    from galpy.potential import MWPotential2014
+    ts= numpy.linspace(0.,20.,101)
+    tfine= numpy.linspace(0.,20.,20001)
+    for ic,tol in zip([[1.,0.1,1.1,0.1,0.,0.],[1.,0.1,1.1,0.]],
+                      [10.**-4.,10.**-5.]):
+        of= Orbit(ic)
+        of.integrate(tfine,MWPotential2014,method='dopr54_c')
+        tev= tfine[1:-1:7]
+        for method in ['leapfrog','odeint','leapfrog_c','rk4_c','rk6_c',
+                       'symplec4_c','symplec6_c','dopr54_c']:
+            o= Orbit(ic)
+            o.integrate(ts,MWPotential2014,method=method,dense_output=True)
+            os= Orbit(ic)
+            os.integrate(ts,MWPotential2014,method=method)
+            # Exact at the output times (phi may not be wrapped in getOrbit)
+            assert numpy.amax(numpy.fabs(o._orb(ts[1:-1])[:-1]-o.getOrbit()[1:-1,:-1].T)) < 10.**-10., 'Dense output does not return the orbit at the output times for method %s' % method
+            # Compare positions and velocities, phi through x and y
+            for func in ['x','y','vx','vy','vR','vT','z','vz']:
+                if len(ic) == 4 and 'z' in func: continue
+                dd= numpy.amax(numpy.fabs(getattr(o,func)(tev)
+                                          -getattr(of,func)(tev)))
+                ds= numpy.amax(numpy.fabs(getattr(os,func)(tev)
+                                          -getattr(of,func)(tev)))
+                assert dd < tol, 'Dense output orbit %s does not agree with orbit integrated on a fine grid for method %s' % (func,method)
+                assert dd < ds, 'Dense output orbit %s is not more accurate than spline interpolation for method %s' % (func,method)
+            # Outside of the integrated range
+            with pytest.raises(ValueError) as excinfo:
+                o.x(21.)
+    # Backward integration
+    o= Orbit([1.,0.1,1.1,0.1,0.,0.])
+    o.integrate(-ts,MWPotential2014,method='dopr54_c',dense_output=True)
+    of= Orbit([1.,0.1,1.1,0.1,0.,0.])
+    of.integrate(-tfine,MWPotential2014,method='dopr54_c')
+    assert numpy.amax(numpy.fabs(o.x(-tev)-of.x(-tev))) < 10.**-4., 'Dense output for backward integration does not agree with orbit integrated on a fine grid'
+    # Not implemented for orbits without the azimuth
+    o= Orbit([1.,0.1,1.1,0.1,0.])
+    with pytest.raises(NotImplementedError) as excinfo:
+        o.integrate(ts,MWPotential2014,dense_output=True)
+    return None
+
+def test_call_outputtimes():
+    # Orbit(t) at an output time returns the stored orbit, for forward and
+    # backward integration
+    from galpy.orbit import Orbit
+    from galpy.potential import MWPotential2014
+    ts= numpy.linspace(0.,10.,101)
+    for sign in [1.,-1.]:
+        o= Orbit([1.,0.1,1.1,0.1,0.,0.])
+        o.integrate(sign*ts,MWPotential2014,method='dopr54_c')
+        orb= o.getOrbit()
+        for ii in [0,1,50,99,100]:
+            assert numpy.all(o._orb(float(sign*ts[ii])) == orb[ii]), 'Orbit(t) at an output time does not return the stored orbit'
+        # In between output times, interpolate
+        assert numpy.amax(numpy.fabs(o._orb(sign*0.05)[:-1]-0.5*(orb[0]+orb[1])[:-1])) < 10.**-2., 'Orbit(t) in between output times does not interpolate'
+    return None
+
+# Test that event detection during the C integration finds the orbital
+# extrema and disk crossings
+def test_integrateOrbitEvents():
+    from galpy.orbit import Orbit, integrateOrbitEvents
+    from galpy.potential import MWPotential2014
+    numpy.random.seed(1)
+    nobj= 5
+    vxvv= numpy.array([1.,0.1,1.1,0.1,0.,0.])\
+        +numpy.random.normal(size=(nobj,6))*0.05
+    ts= numpy.linspace(0.,30.,301)
+    tfine= numpy.linspace(0.,30.,30001)
+    os= [Orbit(v) for v in vxvv]
+    [o.integrate(tfine,MWPotential2014,method='dopr54_c') for o in os]
+    for method in ['leapfrog_c','rk6_c','symplec4_c','symplec6_c','dopr54_c']:
+        ev= integrateOrbitEvents(vxvv,ts,MWPotential2014,method=method)
+        for ii,o in enumerate(os):
+            assert numpy.fabs(ev['rperi'][ii]-o.rperi()) < 10.**-6., 'Pericenter from integrateOrbitEvents does not agree with that from a finely-sampled orbit for method %s' % method
+            assert numpy.fabs(ev['rap'][ii]-o.rap()) < 10.**-6., 'Apocenter from integrateOrbitEvents does not agree with that from a finely-sampled orbit for method %s' % method
+            assert numpy.fabs(ev['zmax'][ii]-o.zmax()) < 10.**-6., 'zmax from integrateOrbitEvents does not agree with that from a finely-sampled orbit for method %s' % method
+            assert numpy.amax(numpy.fabs(ev['vxvv_end'][ii]-o.getOrbit()[-1])) < 10.**-5., 'Final phase-space point from integrateOrbitEvents does not agree with that from Orbit.integrate for method %s' % method
+            # Check the events themselves
+            nev= ev['nevents'][ii]
+            assert numpy.all(ev['type'][ii,nev:] == -1), 'Unused events should have type -1'
+            assert numpy.all(numpy.diff(ev['t'][ii,:nev]) > 0.), 'Events are not ordered in time'
+            etype= ev['type'][ii,:nev]
+            evxvv= ev['vxvv'][ii,:nev]
+            assert numpy.amax(numpy.fabs(evxvv[etype < 2,0]*evxvv[etype < 2,1]+evxvv[etype < 2,3]*evxvv[etype < 2,4])) < 10.**-10., 'Radial velocity not zero at peri- or apocenter'
+            assert numpy.amax(numpy.fabs(evxvv[etype == 2,4])) < 10.**-10., 'Vertical velocity not zero at z extremum'
+            assert numpy.amax(numpy.fabs(evxvv[etype == 3,3])) < 10.**-10., 'Height not zero at disk crossing'
+            # Pericenters and apocenters alternate
+            assert numpy.all(numpy.fabs(numpy.diff(etype[etype < 2])) == 1), 'Pericenters and apocenters do not alternate'
+            # Compare event time and location to the orbit
+            tperi= ev['t'][ii,:nev][etype == 0][0]
+            assert numpy.amax(numpy.fabs(o._orb(tperi)-evxvv[etype == 0][0])) < 10.**-5., 'Phase-space point at event does not agree with the orbit'
+    # Planar
+    ev= integrateOrbitEvents(vxvv[:,[0,1,2,5]],ts,MWPotential2014)
+    for ii in range(nobj):
+        o= Orbit(vxvv[ii,[0,1,2,5]])
+        o.integrate(tfine,MWPotential2014,method='dopr54_c')
+        assert numpy.fabs(ev['rperi'][ii]-o.rperi()) < 10.**-6., 'Pericenter from integrateOrbitEvents does not agree with that from a finely-sampled orbit for a planar orbit'
+        assert numpy.fabs(ev['rap'][ii]-o.rap()) < 10.**-6., 'Apocenter from integrateOrbitEvents does not agree with that from a finely-sampled orbit for a planar orbit'
+        assert numpy.all(ev['type'][ii,:ev['nevents'][ii]] < 2), 'Planar orbits should only have peri- and apocenter events'
+    # Too many events
+    with pytest.warns(galpyWarning) as record:
+        ev= integrateOrbitEvents(vxvv,ts,MWPotential2014,maxevents=3)
+    assert numpy.all(ev['nevents'] > 3), 'Number of events should be counted beyond maxevents'
+    assert numpy.all(numpy.isfinite(ev['t'])), 'Events up to maxevents should be stored'
+    # Not implemented for python integrators
+    with pytest.raises(NotImplementedError) as excinfo:
+        integrateOrbitEvents(vxvv,ts,MWPotential2014,method='odeint')
+    return None
+
+# Test that integrating orbits to a memory-mapped file or in chunks gives the
+# same orbits as integrating them in memory
+def test_integrate_memmap():
+    from galpy.orbit import Orbit, integrateOrbits, integrateOrbitsChunked
+    from galpy.potential import MWPotential2014
+    ts= numpy.linspace(0.,30.,3001)
+    tsi= ts[:-1:7]+0.0037
+    savefilename= 'orbit_memmap.npy'
+    try:
+        for vxvv in [[1.,0.1,1.1,0.1,0.1,0.],[1.,0.1,1.1,0.]]:
+            for method in ['odeint','symplec4_c','dopr54_c']:
+                o= Orbit(vxvv)
+                o.integrate(ts,MWPotential2014,method=method,dense_output=True)
+                om= Orbit(vxvv)
+                om.integrate(ts,MWPotential2014,method=method,
+                             memmap=savefilename,chunksize=333)
+                assert isinstance(om.getOrbit(),numpy.memmap), 'Orbit integrated with memmap= is not stored as a numpy.memmap'
+                assert numpy.amax(numpy.fabs(o.getOrbit()-om.getOrbit())) < 10.**-4., 'Orbit integrated with memmap= does not agree with orbit integrated in memory for method %s' % method
+                assert numpy.amax(numpy.fabs(o.x(tsi)-om.x(tsi))) < 10.**-4., 'Orbit integrated with memmap= does not agree with orbit integrated in memory for method %s' % method
+                assert numpy.amax(numpy.fabs(o.vR(tsi)-om.vR(tsi))) < 10.**-4., 'Orbit integrated with memmap= does not agree with orbit integrated in memory for method %s' % method
+                assert numpy.fabs(o.R(ts[1000])-om.R(ts[1000])) < 10.**-4., 'Orbit integrated with memmap= does not agree with orbit integrated in memory for method %s' % method
+                # The file contains the orbit
+                assert numpy.all(numpy.load(savefilename)[:,:len(vxvv)] == om.getOrbit()), 'File written by integrate with memmap= does not contain the orbit'
+                del om
+        # integrateOrbits and integrateOrbitsChunked
+        numpy.random.seed(2)
+        vxvv= numpy.array([1.,0.1,1.1,0.1,0.,0.])\
+            +numpy.random.normal(size=(3,6))*0.05
+        orbs= integrateOrbits(vxvv,ts,MWPotential2014,method='dopr54_c')
+        osm= integrateOrbits(vxvv,ts,MWPotential2014,method='dopr54_c',
+                             memmap=savefilename,chunksize=1000)
+        assert isinstance(osm,numpy.memmap), 'integrateOrbits with memmap= does not return a numpy.memmap'
+        assert numpy.amax(numpy.fabs(orbs-osm)) < 10.**-8., 'integrateOrbits with memmap= does not agree with integrateOrbits in memory'
+        del osm
+        chunks= list(integrateOrbitsChunked(vxvv,ts,MWPotential2014,
+                                            method='dopr54_c',chunksize=1000))
+        assert len(chunks) == 4, 'integrateOrbitsChunked did not return the expected number of chunks'
+        assert numpy.all(numpy.concatenate([c[0] for c in chunks]) == ts), 'integrateOrbitsChunked does not return all times'
+        assert numpy.amax(numpy.fabs(numpy.concatenate([c[1] for c in chunks],axis=1)-orbs)) < 10.**-8., 'integrateOrbitsChunked does not agree with integrateOrbits'
+    finally:
+        if os.path.exists(savefilename): os.remove(savefilename)
+    # memmap is not supported for orbits that do not include the azimuth
+    o= Orbit([1.,0.1,1.1,0.1,0.1])
+    with pytest.raises(NotImplementedError) as excinfo:
+        o.integrate(ts,MWPotential2014,memmap=savefilename)
+    return None
+
+# Test that integrating orbits in very small chunks gives the same orbits as
+# integrating them at once
+def test_integrate_chunked_smallchunks():
+    from galpy.orbit import integrateOrbits, integrateOrbitsChunked
+    from galpy.potential import MWPotential2014
+    ts= numpy.linspace(0.,3.,31)
+    vxvv= numpy.array([[1.,0.1,1.1,0.1,0.,0.],[1.1,-0.1,0.9,0.,0.1,1.]])
+    orbs= integrateOrbits(vxvv,ts,MWPotential2014,method='dopr54_c')
+    for chunksize in [1,2,7]:
+        chunks= list(integrateOrbitsChunked(vxvv,ts,MWPotential2014,
+                                            method='dopr54_c',
+                                            chunksize=chunksize))
+        assert numpy.all(numpy.concatenate([c[0] for c in chunks]) == ts), 'integrateOrbitsChunked does not return all times for chunksize=%i' % chunksize
+        assert numpy.amax(numpy.fabs(numpy.concatenate([c[1] for c in chunks],axis=1)-orbs)) < 10.**-8., 'integrateOrbitsChunked does not agree with integrateOrbits for chunksize=%i' % chunksize
+    return None
+
+# Test that orbits integrated in C in potentials with recently added C
+# implementations agree with those integrated in python
+def test_integrate_c_newpotentials():
+    from galpy.orbit import Orbit
+    from galpy.potential import LogarithmicHaloPotential, FerrersPotential, \
+        RazorThinExponentialDiskPotential, MovingObjectPotential, KGPotential
+    from galpy.potential_src.Potential import _check_c
+    ts= numpy.linspace(0.,5.,501)
+    lp= LogarithmicHaloPotential(normalize=1.)
+    fp= FerrersPotential(amp=1.,a=1.,n=2,b=0.35,c=0.2375,omegab=0.3,pa=0.2)
+    fp2= FerrersPotential(amp=1.,a=2.,n=1.5,b=1.,c=0.3)
+    rp= RazorThinExponentialDiskPotential(normalize=1.)
+    o_obj= Orbit([1.1,0.1,1.,0.1,0.,0.])
+    o_obj.integrate(numpy.linspace(0.,6.,1001),lp)
+    mp= MovingObjectPotential(o_obj,GM=0.1)
+    for pot in [[lp,fp],[lp,fp2],[lp,rp],[lp,mp]]:
+        assert _check_c(pot), 'Potential does not have a C implementation'
+        for vxvv in [[1.,0.1,1.1,0.1,0.05,0.3],[1.,0.1,1.1,0.3]]:
+            o= Orbit(vxvv)
+            o.integrate(ts,pot,method='odeint')
+            oc= Orbit(vxvv)
+            oc.integrate(ts,pot,method='dopr54_c')
+            assert numpy.amax(numpy.fabs(o.x(ts)-oc.x(ts))) < 10.**-4., 'Orbit integrated in C does not agree with that integrated in python for potential %s' % pot[1].__class__.__name__
+            assert numpy.amax(numpy.fabs(o.vy(ts)-oc.vy(ts))) < 10.**-4., 'Orbit integrated in C does not agree with that integrated in python for potential %s' % pot[1].__class__.__name__
+    # linearOrbits in KGPotential
+    kp= KGPotential()
+    assert _check_c(kp), 'KGPotential does not have a C implementation'
+    o= Orbit([0.1,0.2])
+    o.integrate(ts,kp,method='odeint')
+    for method in ['leapfrog_c','rk4_c','rk6_c','symplec4_c','symplec6_c',
+                   'dopr54_c']:
+        oc= Orbit([0.1,0.2])
+        oc.integrate(ts,kp,method=method)
+        assert numpy.amax(numpy.fabs(o.x(ts)-oc.x(ts))) < 10.**-4., 'linearOrbit integrated in C does not agree with that integrated in python for method %s' % method
+        assert numpy.amax(numpy.fabs(o.vx(ts)-oc.vx(ts))) < 10.**-4., 'linearOrbit integrated in C does not agree with that integrated in python for method %s' % method
+    return None
+
+# Test that the OpenMP thread and schedule configuration does not change the
+# result of integrating multiple orbits at once
+def test_integrateOrbits_openmp():
+    from galpy.orbit import integrateOrbits
+    from galpy.potential import MWPotential2014
+    from galpy.util import config
+    numpy.random.seed(1)
+    nobj= 11
+    vxvv= numpy.array([1.,0.1,1.1,0.1,0.,0.])\
+        +numpy.random.normal(size=(nobj,6))*0.05
+    ts= numpy.linspace(0.,10.,101)
+    orbs= integrateOrbits(vxvv,ts,MWPotential2014,method='dopr54_c')
+    try:
+        for nthreads,schedule,chunk in [(1,'static',0),(2,'dynamic',3),
+                                        (3,'guided',0),(0,'default',2)]:
+            config.set_openmp(nthreads=nthreads,schedule=schedule,chunk=chunk)
+            torbs= integrateOrbits(vxvv,ts,MWPotential2014,method='dopr54_c')
+            assert numpy.amax(numpy.fabs(torbs-orbs)) < 10.**-10., 'integrateOrbits gives a different result for OpenMP configuration (%i,%s,%i)' % (nthreads,schedule,chunk)
+        # Unknown schedules should raise a ValueError
+        with pytest.raises(ValueError) as excinfo:
+            config.set_openmp(schedule='affinity')
+    finally:
+        config.set_openmp(nthreads=0,schedule='default',chunk=0)
+    return None
+
 # Test that the functions that supposedly *always* return output in physical 
 # units actually do so; see issue #294
 def test_intrinsic_physical_output():
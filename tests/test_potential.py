@@ -1788,6 +1788,124 @@ def test_SoftenedNeedleBarPotential_density():
     assert sbp.dens(4.,0.,phi=numpy.pi/4.) > sbp.dens(2.*numpy.sqrt(2.),2.*numpy.sqrt(2.),phi=0.), 'SoftenedNeedleBarPotential with flattened softening kernel does not appear to have a consistent'
     return None
     
+# Test that evaluateBatch agrees with the individual evaluate functions
+def test_evaluateBatch():
+    from galpy.potential import MWPotential2014
+    numpy.random.seed(1)
+    nt= 21
+    Rs= numpy.random.uniform(0.2,2.,nt)
+    zs= numpy.random.uniform(-0.3,0.3,nt)
+    phis= numpy.random.uniform(0.,2.*numpy.pi,nt)
+    ts= numpy.random.uniform(0.,2.,nt)
+    pots= [MWPotential2014,
+           potential.TriaxialNFWPotential(normalize=1.,b=0.8,c=0.6),
+           potential.DehnenBarPotential(),
+           potential.DehnenSmoothWrapperPotential(\
+            pot=potential.DehnenBarPotential(),tform=0.5,tsteady=1.),
+           potential.SolidBodyRotationWrapperPotential(\
+            pot=potential.SoftenedNeedleBarPotential(normalize=1.,b=0.1),
+            omega=1.3,pa=0.2)]
+    # python z2deriv and Rzderiv not implemented for the last three
+    hasz2deriv= [True,True,False,False,False]
+    funcs= {'potential':potential.evaluatePotentials,
+            'Rforce':potential.evaluateRforces,
+            'zforce':potential.evaluatezforces,
+            'phiforce':potential.evaluatephiforces,
+            'R2deriv':potential.evaluateR2derivs,
+            'z2deriv':potential.evaluatez2derivs,
+            'Rzderiv':potential.evaluateRzderivs,
+            'dens':potential.evaluateDensities}
+    quantities= list(funcs.keys())
+    for pot,hasz2 in zip(pots,hasz2deriv):
+        if hasz2:
+            tquantities= quantities
+        else:
+            tquantities= [q for q in quantities
+                          if not q in ['z2deriv','Rzderiv']]
+        out= potential.evaluateBatch(pot,Rs,zs,phi=phis,t=ts,
+                                     quantities=tquantities)
+        for q,o in zip(tquantities,out):
+            assert o.shape == Rs.shape, 'evaluateBatch does not return an array of the correct shape'
+            for ii in range(nt):
+                po= funcs[q](pot,Rs[ii],zs[ii],phi=phis[ii],t=ts[ii])
+                assert numpy.fabs(o[ii]-po) < 10.**-8.*(1.+numpy.fabs(po)), 'evaluateBatch %s does not agree with the python evaluation for potential %s' % (q,pot.__class__.__name__ if not isinstance(pot,list) else 'MWPotential2014')
+    # phi2deriv and Rphideriv
+    pot= potential.DehnenBarPotential()
+    p2d, Rpd= potential.evaluateBatch(pot,Rs,zs,phi=phis,t=ts,
+                                      quantities=['phi2deriv','Rphideriv'])
+    for ii in range(nt):
+        assert numpy.fabs(p2d[ii]-pot.phi2deriv(Rs[ii],zs[ii],phi=phis[ii],t=ts[ii])) < 10.**-8., 'evaluateBatch phi2deriv does not agree with the python evaluation'
+        assert numpy.fabs(Rpd[ii]-pot.Rphideriv(Rs[ii],zs[ii],phi=phis[ii],t=ts[ii])) < 10.**-8., 'evaluateBatch Rphideriv does not agree with the python evaluation'
+    # Broadcasting and scalar input
+    out= potential.evaluateBatch(MWPotential2014,Rs[:,None],zs[None,:],
+                                 quantities='Rforce')
+    assert out.shape == (nt,nt), 'evaluateBatch does not broadcast its inputs'
+    assert numpy.fabs(out[3,5]-potential.evaluateRforces(MWPotential2014,Rs[3],zs[5])) < 10.**-10., 'evaluateBatch does not broadcast its inputs correctly'
+    out= potential.evaluateBatch(MWPotential2014,1.,0.1)
+    assert numpy.fabs(out-potential.evaluatePotentials(MWPotential2014,1.,0.1)) < 10.**-10., 'evaluateBatch with scalar input does not agree with evaluatePotentials'
+    # Potentials without a C implementation are evaluated in python
+    pot= potential.TwoPowerSphericalPotential(amp=1.,a=2.,alpha=1.5,beta=3.5)
+    out= potential.evaluateBatch(pot,Rs,zs,quantities='zforce')
+    assert numpy.amax(numpy.fabs(out-numpy.array([pot.zforce(R,z) for R,z in zip(Rs,zs)]))) < 10.**-10., 'evaluateBatch for a potential without C implementation does not agree with python'
+    # Errors
+    with pytest.raises(potential.PotentialError) as excinfo:
+        potential.evaluateBatch(potential.DehnenBarPotential(),Rs,zs)
+    with pytest.raises(ValueError) as excinfo:
+        potential.evaluateBatch(MWPotential2014,Rs,zs,quantities='Rforces')
+    with pytest.raises(potential.PotentialError) as excinfo:
+        potential.evaluateBatch(potential.toPlanarPotential(MWPotential2014),
+                                Rs,zs)
+    return None
+
+# Test that evaluateBatch gives the R --> 0 limit of R2deriv and the density at R=0
+def test_evaluateBatch_R0():
+    from galpy.potential import MWPotential2014
+    pots= [MWPotential2014,
+           potential.TriaxialNFWPotential(normalize=1.,b=0.8,c=0.6)]
+    for pot in pots:
+        for z in [0.1,-0.2]:
+            for phi in [0.,1.]:
+                R2d, dens= potential.evaluateBatch(pot,numpy.array([0.,0.3]),
+                                                   z,phi=phi,
+                                                   quantities=['R2deriv',
+                                                               'dens'])
+                assert not numpy.any(numpy.isnan(R2d)), 'evaluateBatch R2deriv is NaN at R=0'
+                assert not numpy.any(numpy.isnan(dens)), 'evaluateBatch density is NaN at R=0'
+                pR2d= potential.evaluateR2derivs(pot,0.,z,phi=phi)
+                pdens= potential.evaluateDensities(pot,0.,z,phi=phi)
+                assert numpy.fabs(R2d[0]-pR2d) < 10.**-8.*(1.+numpy.fabs(pR2d)), 'evaluateBatch R2deriv at R=0 does not agree with the python evaluation'
+                assert numpy.fabs(dens[0]-pdens) < 10.**-8.*(1.+numpy.fabs(pdens)), 'evaluateBatch density at R=0 does not agree with the python evaluation'
+    return None
+
+# Test that evaluateBatch returns each quantity in physical units when ro and vo are set
+def test_evaluateBatch_physical():
+    pot= potential.NFWPotential(normalize=1.,a=3.,ro=8.,vo=220.)
+    Rs= numpy.linspace(0.2,2.,11)
+    zs= numpy.linspace(-0.3,0.3,11)
+    funcs= {'potential':potential.evaluatePotentials,
+            'Rforce':potential.evaluateRforces,
+            'zforce':potential.evaluatezforces,
+            'R2deriv':potential.evaluateR2derivs,
+            'z2deriv':potential.evaluatez2derivs,
+            'Rzderiv':potential.evaluateRzderivs,
+            'dens':potential.evaluateDensities}
+    quantities= list(funcs.keys())
+    out= potential.evaluateBatch(pot,Rs,zs,quantities=quantities)
+    iout= potential.evaluateBatch(pot,Rs,zs,quantities=quantities,
+                                  use_physical=False)
+    for q,o,io in zip(quantities,out,iout):
+        po= numpy.array([funcs[q](pot,R,z) for R,z in zip(Rs,zs)])
+        ipo= numpy.array([funcs[q](pot,R,z,use_physical=False)
+                          for R,z in zip(Rs,zs)])
+        assert numpy.all(numpy.fabs(o-po) < 10.**-8.*(1.+numpy.fabs(po))), 'evaluateBatch %s does not return the physical value when ro and vo are set' % q
+        assert numpy.all(numpy.fabs(io-ipo) < 10.**-8.*(1.+numpy.fabs(ipo))), 'evaluateBatch %s with use_physical=False does not return the value in internal units' % q
+    # ro and vo as keywords
+    out= potential.evaluateBatch(potential.NFWPotential(normalize=1.,a=3.),
+                                 Rs,zs,quantities='Rforce',ro=8.,vo=220.)
+    po= numpy.array([potential.evaluateRforces(pot,R,z) for R,z in zip(Rs,zs)])
+    assert numpy.all(numpy.fabs(out-po) < 10.**-8.*(1.+numpy.fabs(po))), 'evaluateBatch does not return the physical value when ro and vo are given as keywords'
+    return None
+
 def test_DiskSCFPotential_SigmaDerivs():
     # Test that the derivatives of Sigma are correctly implemented in DiskSCF
     # Very rough finite difference checks
@@ -784,3 +784,60 @@ def test_meanjz_noaac_issue300():
                            cutcounter=True)
     assert numpy.fabs(qdf.meanjz(1.,0.125,nmc=100)-0.0157468008111) < 0.01, 'Mean Jz computed using MC with Python actionAngleAdiabatic integration fails'
     return None
+
+def test_cache_moments():
+    # Moments computed using the cache of actions on the GL velocity grid
+    # should be the same as those without
+    qdf= quasiisothermaldf(1./4.,0.2,0.1,1.,1.,
+                           pot=MWPotential,aA=aAS,cutcounter=True)
+    qdfc= quasiisothermaldf(1./4.,0.2,0.1,1.,1.,
+                            pot=MWPotential,aA=aAS,cutcounter=True,cache=2)
+    assert qdf.cache_info()['maxsize'] == 0, 'qdf cache_info does not report an empty cache when not using the cache'
+    R,z= 0.9,0.2
+    for moment in ['density','sigmaR2','sigmaz2','sigmaRz','meanvT']:
+        assert numpy.fabs(getattr(qdf,moment)(R,z,gl=True)
+                          -getattr(qdfc,moment)(R,z,gl=True)) < 10.**-10., 'qdf.%s computed with the cache of actions differs from that without' % moment
+    info= qdfc.cache_info()
+    assert info['misses'] == 1, 'qdf cache did not only compute the actions once for repeated moments at the same location'
+    assert info['hits'] == 4, 'qdf cache did not re-use the actions for repeated moments at the same location'
+    assert info['size'] == 1, 'qdf cache size is not equal to the number of different locations'
+    # Different locations and ngl are different entries, evicting old ones
+    qdfc.density(R,-z,gl=True)
+    qdfc.density(R,z,gl=True,ngl=20)
+    info= qdfc.cache_info()
+    assert info['misses'] == 3, 'qdf cache does not distinguish different locations or ngl'
+    assert info['size'] == 2, 'qdf cache does not evict the least-recently-used grid'
+    qdfc.density(R,-z,gl=True)
+    assert qdfc.cache_info()['hits'] == 5, 'qdf cache did not keep the most-recently-used grid'
+    qdfc.clear_cache()
+    info= qdfc.cache_info()
+    assert info['size'] == 0, 'qdf clear_cache does not empty the cache'
+    assert info['hits'] == 5, 'qdf clear_cache does not keep the statistics'
+    return None
+
+def test_moments_arrayin():
+    # Moments for arrays of (R,z) should be the same as those computed
+    # one (R,z) at a time
+    R= numpy.array([[0.7,0.9],[1.1,1.3]])
+    z= numpy.array([[0.,0.1],[-0.2,0.3]])
+    for aA in [aAA,aAS]:
+        qdf= quasiisothermaldf(1./4.,0.2,0.1,1.,1.,
+                               pot=MWPotential,aA=aA,cutcounter=True)
+        for moment in ['density','sigmaR2','sigmaT2','sigmaz2','sigmaRz',
+                       'tilt','meanvT','meanvR','meanvz']:
+            marr= getattr(qdf,moment)(R,z,gl=True)
+            assert marr.shape == R.shape, 'qdf.%s for array input does not return an array of the same shape' % moment
+            for ii in range(R.shape[0]):
+                for jj in range(R.shape[1]):
+                    assert numpy.fabs(marr[ii,jj]-getattr(qdf,moment)(R[ii,jj],z[ii,jj],gl=True)) < 10.**-8., 'qdf.%s for array input does not agree with that for scalar input' % moment
+    # Scalar z
+    assert numpy.all(numpy.fabs(qdf.sigmaR2(R,0.1,gl=True)-qdf.sigmaR2(R,0.1+numpy.zeros_like(R),gl=True)) < 10.**-10.), 'qdf.sigmaR2 for array R and scalar z does not agree with that for array z'
+    # Array input should fill the cache of actions
+    qdfc= quasiisothermaldf(1./4.,0.2,0.1,1.,1.,
+                            pot=MWPotential,aA=aAS,cutcounter=True,cache=4)
+    dens= qdfc.density(R,z,gl=True)
+    assert qdfc.cache_info()['size'] == 4, 'qdf.density for array input does not fill the cache of actions'
+    assert numpy.all(numpy.fabs(qdfc.density(R,z,gl=True)-dens) < 10.**-10.), 'qdf.density for array input with the cache of actions does not agree with that without'
+    assert qdfc.cache_info()['hits'] == 4, 'qdf.density for array input does not use the cache of actions'
+    assert numpy.fabs(qdfc.density(R[1,0],z[1,0],gl=True)-dens[1,0]) < 10.**-10., 'qdf.density for scalar input does not agree with the cached value from array input'
+    return None
@@ -1,6 +1,7 @@
 #Test the functions in galpy/util/__init__.py
 from __future__ import print_function, division
 import numpy
+import pytest
 
 def test_save_pickles():
     import os
@@ -64,3 +65,40 @@ def test_quadpack():
     int= dblquad(lambda y,x: 4.*x*y,0.,1.,lambda z: 0.,lambda z: 1.)
     assert numpy.fabs(int[0]-1.) < int[1], 'bovy_quadpack.dblquad did not work as expected'
     return None
+
+def test_bovy_ars():
+    from galpy.util.bovy_ars import bovy_ars
+    # Gaussian on an unbounded domain
+    numpy.random.seed(1)
+    xs= numpy.array(bovy_ars([0.,0.],[False,False],[-1.,3.],
+                             lambda x,p: -0.5*(x-p[0])**2./p[1],
+                             lambda x,p: -(x-p[0])/p[1],
+                             nsamples=100000,hxparams=(1.,4.)))
+    assert len(xs) == 100000, 'bovy_ars did not return the requested number of samples'
+    assert numpy.fabs(numpy.mean(xs)-1.) < 0.02, 'bovy_ars samples of a Gaussian do not have the expected mean'
+    assert numpy.fabs(numpy.std(xs)-2.) < 0.02, 'bovy_ars samples of a Gaussian do not have the expected dispersion'
+    # Gamma(3) distribution truncated at x=2
+    xs= numpy.array(bovy_ars([0.,2.],[True,True],[0.5,1.5],
+                             lambda x,p: 2.*numpy.log(x)-x,
+                             lambda x,p: 2./x-1.,nsamples=100000))
+    assert numpy.all((xs >= 0.)*(xs <= 2.)), 'bovy_ars samples are outside of the finite domain'
+    grid= numpy.linspace(0.,2.,20001)
+    pgrid= grid**2.*numpy.exp(-grid)
+    assert numpy.fabs(numpy.mean(xs)-numpy.sum(grid*pgrid)/numpy.sum(pgrid)) < 0.01, 'bovy_ars samples of a truncated Gamma distribution do not have the expected mean'
+    # A flat hull segment at an infinite end is not normalizable
+    with pytest.raises(ValueError):
+        bovy_ars([0.,0.],[True,False],[0.,2.],
+                 lambda x,p: numpy.where(x < 1.,-(x-1.)**2.,0.),
+                 lambda x,p: numpy.where(x < 1.,-2.*(x-1.),0.),
+                 nsamples=10)
+    with pytest.raises(ValueError):
+        bovy_ars([0.,0.],[False,True],[-2.,0.],
+                 lambda x,p: numpy.where(x > -1.,-(x+1.)**2.,0.),
+                 lambda x,p: numpy.where(x > -1.,-2.*(x+1.),0.),
+                 nsamples=10)
+    # Abcissae on one side of the peak for an unbounded domain
+    with pytest.raises(ValueError):
+        bovy_ars([0.,0.],[False,False],[-1.,1.],
+                 lambda x,p: -0.5*(x-1.)**2.,lambda x,p: -(x-1.),
+                 nsamples=10)
+    return None